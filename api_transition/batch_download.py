@@ -1,9 +1,13 @@
 # -*- coding: utf-8 -*-
-"""Module batch download: login 1 lần, tải tuần tự tất cả báo cáo đã implemented.
+"""Module batch download: login 1 lần, tải tất cả báo cáo đã implemented.
+
+Mặc định tải tuần tự; đặt ``--workers N`` hoặc ``download.max_workers`` trong
+config để tải song song tối đa N report trên cùng Authorization header.
 
 Có thể chạy standalone:
     python3 api_transition/batch_download.py
     python3 api_transition/batch_download.py --month 5 --year 2026 --month-id 99001234
+    python3 api_transition/batch_download.py --workers 4
 
 Hoặc import vào module main:
     from api_transition.batch_download import run_batch_download
@@ -16,6 +20,7 @@ import sys
 import time
 import traceback
 from calendar import monthrange
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from dataclasses import dataclass, field
 from datetime import datetime
 from pathlib import Path
@@ -27,6 +32,12 @@ if __package__ in (None, ""):
 from api_transition.auth import capture_authorization, login
 from api_transition.runtime_config import RuntimeContext, load_runtime_context
 from api_transition.report_api_client import build_report_page_url, make_common_headers
+from api_transition.session_store import (
+    invalidate_session,
+    is_auth_error,
+    load_cached_session,
+    save_session,
+)
 from api_transition.settings import Settings
 from api_transition.cts_api import download_cts_gpon_quality_detail_api
 from api_transition.downloaders import (
@@ -94,6 +105,9 @@ MAX_RETRIES = 3                          # Số lần thử tối đa (bao gồm
 RETRY_TIMEOUTS = [180, 300, 500]         # Timeout (giây) cho lần 1, 2, 3
 RETRY_DELAY = 3                          # Chờ (giây) giữa các lần retry
 
+# --- Số report tải song song (1 = tuần tự) ---
+MAX_WORKERS = 1
+
 # ===========================================================================
 # HẾT PHẦN CẤU HÌNH
 # ===========================================================================
@@ -458,31 +472,57 @@ REPORT_TASKS: List[ReportTask] = [
 _DEFAULT_AUTH_REPORT_URL = "https://baocao.hanoi.vnpt.vn/report/report-info?id=534964&menu_id=535020"
 
 
-def create_session(headed=False, auth_report_url=""):
-    """Login và capture Authorization, trả về session dict.
+def create_session(headed=False, auth_report_url="", use_cache=None, refresh=False):
+    """Trả về session dict, ưu tiên dùng lại session cache trên đĩa.
+
+    Nếu cache còn hạn và probe thành công thì không mở browser. Ngược lại
+    (hoặc khi ``refresh=True``) login + capture Authorization bằng Playwright
+    rồi ghi lại cache.
 
     Returns:
         dict:
             - "headers": dict headers cho mọi request API
-            - "playwright": playwright instance
-            - "browser": browser instance
-            - "context": browser context
-            - "page": page instance
+            - "cookies": cookies của browser context
+            - "from_cache": True nếu session lấy từ cache
+            - "playwright" / "browser" / "context" / "page": chỉ có khi login mới
     """
+    cache_enabled = Settings.SESSION_CACHE_ENABLED if use_cache is None else use_cache
+    if cache_enabled and not refresh:
+        cached = load_cached_session()
+        if cached is not None:
+            return cached
+
     Settings.validate()
     report_url = auth_report_url or _DEFAULT_AUTH_REPORT_URL
 
     playwright, browser, context, page = login(headless=not headed)
     auth_state = capture_authorization(page, report_url)
-    headers = make_common_headers(auth_state, context.cookies())
+    cookies = context.cookies()
+    headers = make_common_headers(auth_state, cookies)
 
-    return {
+    session = {
         "headers": headers,
+        "cookies": cookies,
+        "from_cache": False,
         "playwright": playwright,
         "browser": browser,
         "context": context,
         "page": page,
     }
+    if cache_enabled:
+        try:
+            cache_path = save_session(session)
+            print(f"Đã lưu session cache: {cache_path}")
+        except OSError as exc:
+            print(f"⚠️  Không ghi được session cache: {exc}")
+    return session
+
+
+def refresh_session(session, headed=False, auth_report_url=""):
+    """Bỏ session hiện tại (và cache) rồi login lại bằng browser."""
+    invalidate_session()
+    close_session(session)
+    return create_session(headed=headed, auth_report_url=auth_report_url, refresh=True)
 
 
 def close_session(session):
@@ -611,6 +651,80 @@ def _build_kwargs(task: ReportTask, params: dict, runtime_context: Optional[Runt
     return kwargs
 
 
+def _download_task(
+    task: ReportTask,
+    params: dict,
+    *,
+    session,
+    runtime_context: Optional[RuntimeContext],
+    headed: bool,
+    max_retries: int,
+    retry_timeouts: List[int],
+    retry_delay: int,
+    log_prefix: str,
+    start_message: str,
+) -> DownloadResult:
+    """Tải 1 báo cáo với retry/timeout riêng, trả về DownloadResult.
+
+    Mỗi task dùng bản sao nông của session để ``api_timeout`` của lần thử này
+    không ảnh hưởng tới các task đang chạy song song trên cùng header.
+    """
+    print(start_message)
+    started = time.time()
+    last_error = None
+    task_session = dict(session) if task.use_shared_session and session is not None else None
+
+    for attempt in range(max_retries):
+        attempt_timeout = retry_timeouts[attempt] if attempt < len(retry_timeouts) else retry_timeouts[-1]
+
+        if attempt > 0:
+            print(f"{log_prefix}🔄 Retry lần {attempt + 1}/{max_retries} (timeout={attempt_timeout}s, chờ {retry_delay}s...)")
+            time.sleep(retry_delay)
+
+        try:
+            kwargs = _build_kwargs(task, params, runtime_context=runtime_context)
+            if task.use_shared_session:
+                kwargs["session"] = task_session
+            kwargs["headed"] = headed
+
+            # Đặt timeout cho lần thử này
+            if task_session is not None:
+                task_session["api_timeout"] = attempt_timeout
+
+            output_path = task.func(**kwargs)
+            elapsed = time.time() - started
+            print(f"{log_prefix}✅ Thành công → {output_path} ({elapsed:.1f}s)")
+            return DownloadResult(
+                name=task.name,
+                group=task.group,
+                status="success",
+                output_path=str(output_path),
+                duration_seconds=round(elapsed, 1),
+            )
+
+        except (TimeoutError, OSError) as exc:
+            last_error = exc
+            print(f"{log_prefix}⏱️  Timeout lần {attempt + 1}: {type(exc).__name__}: {exc}")
+
+        except Exception as exc:
+            # Lỗi không phải timeout → không retry
+            last_error = exc
+            print(f"{log_prefix}❌ Lỗi: {type(exc).__name__}: {exc}")
+            traceback.print_exc()
+            break
+
+    elapsed = time.time() - started
+    error_msg = f"{type(last_error).__name__}: {last_error}"
+    print(f"{log_prefix}❌ Thất bại sau {max_retries} lần thử: {error_msg}")
+    return DownloadResult(
+        name=task.name,
+        group=task.group,
+        status="failed",
+        error=error_msg,
+        duration_seconds=round(elapsed, 1),
+    )
+
+
 def run_batch_download(
     report_month=None,
     report_year=None,
@@ -623,8 +737,10 @@ def run_batch_download(
     session=None,
     config_path: Optional[str] = None,
     runtime_context: Optional[RuntimeContext] = None,
+    max_workers: Optional[int] = None,
+    use_session_cache: Optional[bool] = None,
 ) -> Dict[str, Any]:
-    """Login 1 lần, tải tuần tự tất cả báo cáo đã implemented.
+    """Login 1 lần, tải tất cả báo cáo đã implemented.
 
     Nếu tham số là None, sẽ dùng giá trị trong phần CẤU HÌNH ở đầu file.
 
@@ -638,6 +754,10 @@ def run_batch_download(
         skip_reports: Danh sách tên report muốn bỏ qua.
         only_reports: Chỉ chạy các report có tên trong list này.
         session: Session dict đã tạo trước (nếu None sẽ tự login).
+        max_workers: Số report tải song song trên cùng Authorization header.
+            1 = tuần tự như cũ; None = lấy từ ``download.max_workers`` trong config.
+        use_session_cache: Dùng/ghi session cache trên đĩa khi tự login.
+            None = theo ``SESSION_CACHE_ENABLED``.
 
     Returns:
         dict với keys "success", "failed", "skipped" — mỗi key là list[DownloadResult].
@@ -670,6 +790,11 @@ def run_batch_download(
     eff_max_retries = runtime_context.download.max_retries if runtime_context is not None else MAX_RETRIES
     eff_retry_timeouts = list(runtime_context.download.retry_timeouts) if runtime_context is not None else list(RETRY_TIMEOUTS)
     eff_retry_delay = runtime_context.download.retry_delay_seconds if runtime_context is not None else RETRY_DELAY
+    eff_max_workers = max_workers if max_workers is not None else (
+        runtime_context.download.max_workers if runtime_context is not None else MAX_WORKERS
+    )
+    if eff_max_workers < 1:
+        raise ValueError("max_workers phai >= 1")
 
     # Tự tính các biến ngày từ tháng/năm
     start_date, end_date, cal_start_date, cal_end_date, t_minus_1 = _compute_dates(eff_month, eff_year)
@@ -708,6 +833,7 @@ def run_batch_download(
     print(f"  MAX_RETRIES      : {eff_max_retries}")
     print(f"  RETRY_TIMEOUTS   : {eff_retry_timeouts}")
     print(f"  RETRY_DELAY      : {eff_retry_delay}s")
+    print(f"  MAX_WORKERS      : {eff_max_workers}")
     if runtime_context is not None:
         print(f"  UNIT_CODE        : {runtime_context.unit.code}")
         print(f"  UNIT_NAME        : {runtime_context.unit.name}")
@@ -718,6 +844,7 @@ def run_batch_download(
         print(f"  BỎ QUA           : {', '.join(sorted(skip_set))}")
     print("=" * 70)
 
+    batch_started = time.time()
     try:
         def _task_should_run(task: ReportTask) -> bool:
             if only_set and task.name not in only_set:
@@ -735,111 +862,98 @@ def run_batch_download(
         )
 
         if own_session and needs_shared_session:
-            print("\nĐang đăng nhập...")
-            session = create_session(headed=eff_headed)
-            print("✅ Đăng nhập và capture Authorization thành công.\n")
+            print("\nĐang chuẩn bị session...")
+            session = create_session(headed=eff_headed, use_cache=use_session_cache)
+            if session.get("from_cache"):
+                print("✅ Dùng lại Authorization từ session cache, không mở browser.\n")
+            else:
+                print("✅ Đăng nhập và capture Authorization thành công.\n")
 
-        # --- 2. Duyệt từng báo cáo ---
+        # --- 2. Lọc skip / only / config ---
         total = len(REPORT_TASKS)
+        task_results: List[Optional[DownloadResult]] = [None] * total
+        pending: List[tuple] = []
         for index, task in enumerate(REPORT_TASKS, start=1):
-
-            # Kiểm tra skip / only
             if only_set and task.name not in only_set:
-                results["skipped"].append(
-                    DownloadResult(name=task.name, group=task.group, status="skipped")
-                )
+                task_results[index - 1] = DownloadResult(name=task.name, group=task.group, status="skipped")
                 continue
             if task.name in skip_set:
-                results["skipped"].append(
-                    DownloadResult(name=task.name, group=task.group, status="skipped")
-                )
+                task_results[index - 1] = DownloadResult(name=task.name, group=task.group, status="skipped")
                 print(f"[{index}/{total}] ⏭️  Bỏ qua: {task.name}")
                 continue
             if runtime_context is not None and not runtime_context.is_report_enabled(task.report_key):
-                results["skipped"].append(
-                    DownloadResult(
-                        name=task.name,
-                        group=task.group,
-                        status="skipped",
-                        error="Disabled by config",
-                    )
+                task_results[index - 1] = DownloadResult(
+                    name=task.name,
+                    group=task.group,
+                    status="skipped",
+                    error="Disabled by config",
                 )
                 print(f"[{index}/{total}] ⏭️  Tắt theo config: {task.name}")
                 continue
-
-            print(f"[{index}/{total}] 📥 Đang tải: {task.name} (nhóm: {task.group})")
-            started = time.time()
-            last_error = None
-            succeeded = False
-
-            for attempt in range(eff_max_retries):
-                attempt_timeout = eff_retry_timeouts[attempt] if attempt < len(eff_retry_timeouts) else eff_retry_timeouts[-1]
-
-                if attempt > 0:
-                    print(f"         🔄 Retry lần {attempt + 1}/{eff_max_retries} (timeout={attempt_timeout}s, chờ {eff_retry_delay}s...)")
-                    time.sleep(eff_retry_delay)
-
-                try:
-                    kwargs = _build_kwargs(task, params, runtime_context=runtime_context)
-                    if task.use_shared_session:
-                        kwargs["session"] = session
-                    kwargs["headed"] = eff_headed
-
-                    # Đặt timeout cho lần thử này
-                    if task.use_shared_session:
-                        session["api_timeout"] = attempt_timeout
-
-                    output_path = task.func(**kwargs)
-                    elapsed = time.time() - started
-
-                    results["success"].append(
-                        DownloadResult(
-                            name=task.name,
-                            group=task.group,
-                            status="success",
-                            output_path=str(output_path),
-                            duration_seconds=round(elapsed, 1),
-                        )
-                    )
-                    print(f"         ✅ Thành công → {output_path} ({elapsed:.1f}s)")
-                    succeeded = True
-                    break
-
-                except (TimeoutError, OSError) as exc:
-                    last_error = exc
-                    print(f"         ⏱️  Timeout lần {attempt + 1}: {type(exc).__name__}: {exc}")
-
-                except Exception as exc:
-                    # Lỗi không phải timeout → không retry
-                    last_error = exc
-                    print(f"         ❌ Lỗi: {type(exc).__name__}: {exc}")
-                    traceback.print_exc()
-                    break
-
-            if not succeeded:
-                elapsed = time.time() - started
-                error_msg = f"{type(last_error).__name__}: {last_error}"
-                results["failed"].append(
-                    DownloadResult(
-                        name=task.name,
-                        group=task.group,
-                        status="failed",
-                        error=error_msg,
-                        duration_seconds=round(elapsed, 1),
-                    )
-                )
-                print(f"         ❌ Thất bại sau {eff_max_retries} lần thử: {error_msg}")
+            pending.append((index, task))
+
+        # --- 3. Tải: tuần tự hoặc song song có giới hạn ---
+        def _run(index: int, task: ReportTask, concurrent: bool) -> DownloadResult:
+            return _download_task(
+                task,
+                params,
+                session=session,
+                runtime_context=runtime_context,
+                headed=eff_headed,
+                max_retries=eff_max_retries,
+                retry_timeouts=eff_retry_timeouts,
+                retry_delay=eff_retry_delay,
+                log_prefix=f"[{index}/{total}] " if concurrent else "         ",
+                start_message=f"[{index}/{total}] 📥 Đang tải: {task.name} (nhóm: {task.group})",
+            )
+
+        def _execute(items: List[tuple]) -> None:
+            if eff_max_workers > 1:
+                # Task không dùng shared session tự mở browser riêng → vẫn chạy tuần tự
+                shared_items = [(i, t) for i, t in items if t.use_shared_session]
+                own_items = [(i, t) for i, t in items if not t.use_shared_session]
+                with ThreadPoolExecutor(max_workers=eff_max_workers, thread_name_prefix="batch-download") as executor:
+                    futures = {
+                        executor.submit(_run, index, task, True): index
+                        for index, task in shared_items
+                    }
+                    for index, task in own_items:
+                        task_results[index - 1] = _run(index, task, True)
+                    for future in as_completed(futures):
+                        task_results[futures[future] - 1] = future.result()
+            else:
+                for index, task in items:
+                    task_results[index - 1] = _run(index, task, False)
+
+        _execute(pending)
+
+        # --- 4. Session cache bị server từ chối giữa chừng → login lại và tải lại ---
+        auth_failed = [
+            (index, task)
+            for index, task in pending
+            if task.use_shared_session
+            and task_results[index - 1].status == "failed"
+            and is_auth_error(task_results[index - 1].error)
+        ]
+        if own_session and auth_failed and session.get("from_cache"):
+            print(f"\n🔑 {len(auth_failed)} report bị từ chối Authorization, login lại và tải lại...")
+            session = refresh_session(session, headed=eff_headed)
+            _execute(auth_failed)
+
+        for result in task_results:
+            if result is not None:
+                results[result.status].append(result)
 
     finally:
         if own_session:
             close_session(session)
 
-    # --- 3. In bảng tổng kết ---
-    _print_summary(results)
+    # --- 5. In bảng tổng kết ---
+    _print_summary(results, wall_seconds=time.time() - batch_started)
     return results
 
 
-def _print_summary(results: Dict[str, Any]):
+def _print_summary(results: Dict[str, Any], wall_seconds: Optional[float] = None):
     """In bảng tổng kết kết quả batch download."""
     success = results["success"]
     failed = results["failed"]
@@ -857,6 +971,8 @@ def _print_summary(results: Dict[str, Any]):
     if success:
         total_time = sum(r.duration_seconds for r in success)
         print(f"\n  Tổng thời gian tải: {total_time:.1f}s")
+        if wall_seconds is not None:
+            print(f"  Thời gian thực tế : {wall_seconds:.1f}s")
         print("\n  📁 Danh sách file đã tải:")
         for r in success:
             print(f"     • [{r.group}] {r.name} → {r.output_path}")
@@ -875,7 +991,7 @@ def _print_summary(results: Dict[str, Any]):
 
 def parse_args():
     parser = argparse.ArgumentParser(
-        description="Batch download: login 1 lần, tải tuần tự tất cả báo cáo.",
+        description="Batch download: login 1 lần, tải tất cả báo cáo (tuần tự hoặc song song).",
         formatter_class=argparse.RawDescriptionHelpFormatter,
         epilog="""\
 Ví dụ:
@@ -888,6 +1004,9 @@ Ví dụ:
   # Chỉ tải 2 báo cáo cụ thể
   python3 api_transition/batch_download.py --only "C1.1" "C1.2"
 
+  # Tải song song tối đa 4 report cùng lúc
+  python3 api_transition/batch_download.py --workers 4
+
   # Tải tất cả trừ vật tư thu hồi
   python3 api_transition/batch_download.py --skip "Vật tư thu hồi"
 
@@ -902,6 +1021,8 @@ Ví dụ:
     parser.add_argument("--vattu-start-date", default=None, help=f"Mốc bắt đầu Vật tư thu hồi (mặc định: {VATTU_START_DATE!r})")
     parser.add_argument("--config", default=None, help="Đường dẫn file YAML config đơn vị")
     parser.add_argument("--headed", action="store_true", default=None, help="Mở trình duyệt có giao diện")
+    parser.add_argument("--workers", type=int, default=None, help=f"Số report tải song song (mặc định: {MAX_WORKERS} hoặc download.max_workers trong config)")
+    parser.add_argument("--no-session-cache", action="store_true", help="Luôn login bằng browser, không dùng/ghi session cache")
     parser.add_argument("--only", nargs="+", default=[], metavar="NAME", help="Chỉ chạy các report có tên này")
     parser.add_argument("--skip", nargs="+", default=[], metavar="NAME", help="Bỏ qua các report có tên này")
     parser.add_argument("--list", action="store_true", help="Liệt kê tên tất cả báo cáo rồi thoát")
@@ -951,6 +1072,8 @@ def main():
         skip_reports=args.skip,
         only_reports=args.only,
         runtime_context=runtime_context,
+        max_workers=args.workers,
+        use_session_cache=False if args.no_session_cache else None,
     )
 
     sys.exit(0 if not results["failed"] else 1)
@@ -0,0 +1,139 @@
+# -*- coding: utf-8 -*-
+"""Benchmark dong bo Supabase offline: tuan tu vs song song tren server gia lap.
+
+Sinh ``--workbooks`` workbook processed gia lap (1 sheet tong hop + 1 sheet chi
+tiet ``--detail-rows`` dong) hoac dung ``--processed-root`` co san, bat
+``supabase_stub_server`` voi do tre ``--latency-ms`` moi request va ti le loi
+429/503 ``--fail-rate``, roi chay ``sync_workbooks`` voi 2 cau hinh:
+
+- tuan tu : 1 workbook, 1 request dang bay, khong gzip (giong luong cu)
+- song song: ``--workers`` workbook, ``--max-in-flight`` request, gzip
+
+Kiem tra so dong/objects server nhan duoc cua 2 lan chay trung nhau.
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+if __package__ in (None, ""):
+    sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from api_transition.supabase_stub_server import start_stub_server
+from api_transition.supabase_sync import build_client, parse_args as parse_sync_args, sync_workbooks
+
+
+def parse_args(argv: Sequence[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmark dong bo Supabase tuan tu vs song song (server gia lap)")
+    parser.add_argument("--processed-root", help="Dung workbook that thay vi sinh du lieu gia lap")
+    parser.add_argument("--workbooks", type=int, default=6)
+    parser.add_argument("--detail-rows", type=int, default=3000)
+    parser.add_argument("--latency-ms", type=float, default=20.0)
+    parser.add_argument("--fail-rate", type=float, default=0.02)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--max-in-flight", type=int, default=8)
+    parser.add_argument("--chunk-size", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=14)
+    return parser.parse_args(argv)
+
+
+def write_synthetic_workbooks(root: Path, count: int, detail_rows: int, seed: int) -> None:
+    rng = np.random.default_rng(seed)
+    teams = [f"Tổ Kỹ thuật {index:02d}" for index in range(12)]
+    for index in range(count):
+        folder = root / f"nhom_{index % 3}"
+        folder.mkdir(parents=True, exist_ok=True)
+        summary = pd.DataFrame(
+            {
+                "Đơn vị": teams,
+                "Tổng phiếu": rng.integers(50, 500, len(teams)),
+                "Đạt": rng.integers(10, 50, len(teams)),
+                "Tỷ lệ (%)": rng.uniform(80, 100, len(teams)).round(2),
+            }
+        )
+        detail = pd.DataFrame(
+            {
+                "ACCOUNT_CTS": [f"hni_fiber_{index:02d}{row:06d}" for row in range(detail_rows)],
+                "TEN_TB": [f"Khách hàng {row}" for row in range(detail_rows)],
+                "DOI_ONE": [teams[row % len(teams)] for row in range(detail_rows)],
+                "NVKT_DB": [f"Nhân viên {row % 240:03d}" for row in range(detail_rows)],
+                "NGAY_HEN": pd.Timestamp("2026-03-01") + pd.to_timedelta(rng.integers(0, 720, detail_rows), unit="h"),
+                "SO_LAN": rng.integers(0, 5, detail_rows),
+            }
+        )
+        with pd.ExcelWriter(folder / f"bao_cao_{index:02d}_20260301.xlsx", engine="openpyxl") as writer:
+            summary.to_excel(writer, sheet_name="TH_don_vi", index=False)
+            detail.to_excel(writer, sheet_name="chi_tiet", index=False)
+
+
+def run_once(
+    base_url: str,
+    state: Any,
+    processed_root: Path,
+    workbook_paths: List[Path],
+    options: List[str],
+) -> Tuple[float, Dict[str, Any], Dict[str, Any], int]:
+    state.reset()
+    args = parse_sync_args(["--processed-root", str(processed_root), "--snapshot-date", "2026-03-01", *options])
+    client = build_client(args, base_url, "stub-service-role")
+    started = time.perf_counter()
+    _, exit_code = sync_workbooks(client, workbook_paths, processed_root, args)
+    elapsed = time.perf_counter() - started
+    client.session.close()
+    return elapsed, dict(client.stats), state.stats(), exit_code
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    args = parse_args(argv)
+    server, state, base_url = start_stub_server(latency_ms=args.latency_ms, fail_rate=args.fail_rate, seed=args.seed)
+    try:
+        with tempfile.TemporaryDirectory(prefix="supabase_sync_bench_") as scratch:
+            processed_root = Path(args.processed_root).resolve() if args.processed_root else Path(scratch)
+            if not args.processed_root:
+                write_synthetic_workbooks(processed_root, args.workbooks, args.detail_rows, args.seed)
+            workbook_paths = sorted(processed_root.rglob("*.xlsx"))
+            if not workbook_paths:
+                raise ValueError(f"Khong co workbook nao trong {processed_root}")
+
+            common = ["--chunk-size", str(args.chunk_size)]
+            configs = {
+                "tuan tu": [*common, "--workers", "1", "--max-in-flight", "1"],
+                "song song": [
+                    *common,
+                    "--workers",
+                    str(args.workers),
+                    "--max-in-flight",
+                    str(args.max_in_flight),
+                    "--gzip",
+                ],
+            }
+            outcomes = {name: run_once(base_url, state, processed_root, workbook_paths, options) for name, options in configs.items()}
+    finally:
+        server.shutdown()
+
+    print(
+        f"{len(workbook_paths)} workbook | do tre {args.latency_ms:g} ms/request | "
+        f"loi gia lap {args.fail_rate:.0%} | chunk {args.chunk_size}"
+    )
+    for name, (elapsed, client_stats, server_stats, exit_code) in outcomes.items():
+        print(
+            f"  {name:<9}: {elapsed:7.2f}s | request {client_stats['requests']:>5} | retry {client_stats['retries']:>4} | "
+            f"gui {client_stats['bytes_sent'] / 2**20:6.2f} MB | exit {exit_code}"
+        )
+    sequential, parallel = outcomes["tuan tu"], outcomes["song song"]
+    same_rows = sequential[2]["tables"] == parallel[2]["tables"] and sequential[2]["objects"] == parallel[2]["objects"]
+    print(f"  tang toc: x{sequential[0] / parallel[0]:.1f}")
+    print(f"  du lieu server nhan trung nhau: {'co' if same_rows else 'KHONG'} {parallel[2]['tables']}")
+    return 0 if same_rows and not sequential[3] and not parallel[3] else 2
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
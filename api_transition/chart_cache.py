@@ -0,0 +1,356 @@
+# -*- coding: utf-8 -*-
+"""Cache PNG theo nội dung cho các biểu đồ matplotlib của báo cáo Word.
+
+- ``cached_chart`` bọc hàm vẽ biểu đồ dạng ``f(..., output_path=None)`` trả về
+  ``BytesIO``: key cache là sha256 của dữ liệu đầu vào (DataFrame/Series được
+  băm theo nội dung), mã nguồn module định nghĩa hàm (đổi style/code là vẽ lại),
+  giá trị các biến global dạng dữ liệu mà hàm (và các hàm cùng module nó gọi)
+  đọc tới, vd ``TEAM_SHORT_NAMES``/``TEAM_ORDER`` dựng từ team_config.py,
+  phiên bản matplotlib và font. Trùng key thì đọc PNG trên đĩa thay vì vẽ lại,
+  kể cả giữa các lần chạy.
+- ``chart_figure``/``save_chart`` thay cho ``plt.subplots``/``plt.savefig``:
+  dùng API hướng đối tượng (``Figure`` + canvas Agg) và tái sử dụng Figure
+  mẫu theo kích thước trong từng thread/process, không đụng tới trạng thái
+  toàn cục của pyplot nên gọi được từ worker process/thread.
+- ``chart_key``/``is_chart_current``/``mark_chart_current`` cho các script ghi
+  biểu đồ ra đường dẫn cố định (file ``.key`` cạnh PNG): dữ liệu không đổi thì
+  bỏ qua bước vẽ.
+- PNG không được dùng trong ``CHART_CACHE_MAX_AGE_DAYS`` ngày bị dọn
+  (``prune_stale_charts``) sau mỗi lần chạy các script tạo báo cáo Word, hoặc dọn tay bằng::
+
+      python -m api_transition.chart_cache prune [--max-age-days 7]
+"""
+
+import argparse
+import functools
+import hashlib
+import inspect
+import io
+import json
+import marshal
+import os
+import tempfile
+import threading
+import time
+from datetime import date, datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional, Sequence, Tuple
+
+import matplotlib
+import numpy as np
+import pandas as pd
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+
+from api_transition.settings import Settings
+
+
+CHART_CACHE_VERSION = 1
+DEFAULT_DPI = 150
+_SUBPLOT_PARAMS = ("left", "right", "bottom", "top", "wspace", "hspace")
+
+# Kiểu global được đưa vào key (bỏ qua module, class, hàm...)
+_GLOBAL_DATA_TYPES = (dict, list, tuple, str, int, float, bool)
+
+_STATS = {"hits": 0, "misses": 0, "bypass": 0}
+_templates = threading.local()
+
+
+def cache_dir() -> Path:
+    return Path(Settings.CHART_CACHE_DIR).expanduser()
+
+
+def chart_cache_stats() -> Dict[str, int]:
+    """Số lần hit/miss/bypass của process hiện tại (dùng cho log/benchmark)."""
+    return dict(_STATS)
+
+
+# =============================================================================
+# Figure mẫu (API hướng đối tượng)
+# =============================================================================
+def chart_figure(figsize: Tuple[float, float], polar: bool = False) -> Tuple[Figure, Any]:
+    """``(fig, ax)`` giống ``plt.subplots(figsize=...)`` nhưng dùng Figure mẫu của thread hiện tại."""
+    pool = getattr(_templates, "figures", None)
+    if pool is None or getattr(_templates, "pid", None) != os.getpid():
+        pool = _templates.figures = {}
+        _templates.pid = os.getpid()
+    key = tuple(figsize)
+    fig = pool.get(key)
+    if fig is None:
+        fig = Figure(figsize=figsize)
+        FigureCanvasAgg(fig)
+        pool[key] = fig
+    else:
+        fig.clear()
+        # tight_layout lần trước đã đổi lề; trả về mặc định như figure mới
+        fig.subplots_adjust(**{name: matplotlib.rcParams[f"figure.subplot.{name}"] for name in _SUBPLOT_PARAMS})
+    ax = fig.add_subplot(projection="polar" if polar else None)
+    return fig, ax
+
+
+def save_chart(fig: Figure, output_path: Any = None, dpi: int = DEFAULT_DPI) -> Any:
+    """tight_layout + savefig(bbox_inches='tight'); trả về ``output_path`` hoặc ``BytesIO`` PNG."""
+    fig.tight_layout()
+    if output_path:
+        fig.savefig(output_path, dpi=dpi, bbox_inches="tight")
+        result = output_path
+    else:
+        result = io.BytesIO()
+        fig.savefig(result, format="png", dpi=dpi, bbox_inches="tight")
+        result.seek(0)
+    fig.clear()
+    return result
+
+
+# =============================================================================
+# Key theo nội dung
+# =============================================================================
+def _digest_frame(value: Any) -> str:
+    digest = hashlib.sha256()
+    if isinstance(value, pd.DataFrame):
+        digest.update(json.dumps([str(column) for column in value.columns], ensure_ascii=False).encode("utf-8"))
+        digest.update(json.dumps([str(dtype) for dtype in value.dtypes]).encode("utf-8"))
+    else:
+        digest.update(repr((value.name, str(value.dtype))).encode("utf-8"))
+    digest.update(pd.util.hash_pandas_object(value, index=True).to_numpy().tobytes())
+    return digest.hexdigest()
+
+
+def _normalise(value: Any) -> Any:
+    if value is None or isinstance(value, (bool, int, str)):
+        return value
+    if isinstance(value, float):
+        return repr(value)
+    if isinstance(value, np.generic):
+        return _normalise(value.item())
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        return {"__frame__": _digest_frame(value)}
+    if isinstance(value, np.ndarray):
+        if value.dtype == object:
+            return {"__array__": [_normalise(item) for item in value.tolist()]}
+        return {"__array__": [str(value.dtype), list(value.shape), hashlib.sha256(value.tobytes()).hexdigest()]}
+    if isinstance(value, (datetime, date, pd.Timestamp)):
+        return {"__time__": value.isoformat()}
+    if isinstance(value, dict):
+        items = [[_normalise(key), _normalise(item)] for key, item in value.items()]
+        return {"__dict__": sorted(items, key=lambda pair: json.dumps(pair[0], sort_keys=True, ensure_ascii=False))}
+    if isinstance(value, (list, tuple)):
+        return [_normalise(item) for item in value]
+    if inspect.isfunction(value):
+        return {"__code__": _code_digest(value)}
+    raise TypeError(f"Không tạo được key cache cho kiểu {type(value).__name__}")
+
+
+def chart_key(name: str, *inputs: Any) -> str:
+    """
+    sha256 của tên biểu đồ + dữ liệu đầu vào + phiên bản matplotlib/font.
+
+    Hàm trong ``inputs`` được băm theo mã nguồn module chứa nó. TypeError nếu không băm được.
+    """
+    payload = json.dumps(
+        {
+            "version": CHART_CACHE_VERSION,
+            "matplotlib": matplotlib.__version__,
+            "font": list(matplotlib.rcParams["font.family"]),
+            "name": name,
+            "inputs": _normalise(list(inputs)),
+        },
+        sort_keys=True,
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+@functools.lru_cache(maxsize=None)
+def _file_digest(path: str) -> str:
+    return hashlib.sha256(Path(path).read_bytes()).hexdigest()
+
+
+def _code_digest(func: Callable) -> str:
+    """Băm mã nguồn module chứa hàm (đổi code/style ở module là vẽ lại)."""
+    try:
+        source_file = inspect.getsourcefile(func)
+        if source_file:
+            return _file_digest(os.path.abspath(source_file))
+    except (OSError, TypeError):
+        pass
+    return hashlib.sha256(marshal.dumps(func.__code__)).hexdigest()
+
+
+@functools.lru_cache(maxsize=None)
+def _global_names(func: Callable) -> Tuple[str, ...]:
+    """Tên global dạng dữ liệu mà hàm và các hàm cùng module nó gọi (đệ quy) đọc tới."""
+    module_globals = func.__globals__
+    names = set()
+    seen = set()
+    pending = [func.__code__]
+    while pending:
+        code = pending.pop()
+        if code in seen:
+            continue
+        seen.add(code)
+        pending.extend(const for const in code.co_consts if inspect.iscode(const))
+        for name in code.co_names:
+            value = module_globals.get(name)
+            if inspect.isfunction(value):
+                value = inspect.unwrap(value)
+                if value.__globals__ is module_globals:
+                    pending.append(value.__code__)
+            elif isinstance(value, _GLOBAL_DATA_TYPES):
+                names.add(name)
+    return tuple(sorted(names))
+
+
+def _global_inputs(func: Callable) -> Dict[str, Any]:
+    """Giá trị hiện tại của các global trong ``_global_names`` (đọc lại mỗi lần gọi)."""
+    module_globals = func.__globals__
+    return {name: module_globals[name] for name in _global_names(func) if name in module_globals}
+
+
+# =============================================================================
+# Cache trên đĩa
+# =============================================================================
+def _atomic_write_bytes(target: Path, data: bytes) -> None:
+    target.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_name = tempfile.mkstemp(dir=target.parent, prefix=".chart-", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as handle:
+            handle.write(data)
+        os.replace(tmp_name, target)
+    finally:
+        if os.path.exists(tmp_name):
+            os.unlink(tmp_name)
+
+
+def _emit(data: bytes, output_path: Any) -> Any:
+    if output_path:
+        Path(output_path).write_bytes(data)
+        return output_path
+    return io.BytesIO(data)
+
+
+def cached_chart(func: Callable) -> Callable:
+    """Decorator cache PNG cho hàm vẽ biểu đồ (xem docstring module)."""
+    signature = inspect.signature(func)
+    name = f"{func.__module__}.{func.__qualname__}"
+
+    @functools.wraps(func)
+    def wrapper(*args: Any, **kwargs: Any) -> Any:
+        if not Settings.CHART_CACHE_ENABLED:
+            _STATS["bypass"] += 1
+            return func(*args, **kwargs)
+
+        bound = signature.bind(*args, **kwargs)
+        bound.apply_defaults()
+        inputs = dict(bound.arguments)
+        output_path = inputs.pop("output_path", None)
+        try:
+            key = chart_key(name, func, inputs, _global_inputs(func))
+        except TypeError:
+            _STATS["bypass"] += 1
+            return func(*args, **kwargs)
+
+        png_path = cache_dir() / key[:2] / f"{key}.png"
+        try:
+            data = png_path.read_bytes()
+        except OSError:
+            data = None
+        if data:
+            _STATS["hits"] += 1
+            try:
+                os.utime(png_path)
+            except OSError:
+                pass
+            return _emit(data, output_path)
+
+        _STATS["misses"] += 1
+        if "output_path" in bound.arguments:
+            bound.arguments["output_path"] = None
+        result = func(*bound.args, **bound.kwargs)
+        if result is None:
+            return None
+        data = result.getvalue()
+        try:
+            _atomic_write_bytes(png_path, data)
+        except OSError as exc:
+            print(f"⚠️  Không ghi được cache biểu đồ {func.__name__}: {exc}")
+        return _emit(data, output_path)
+
+    return wrapper
+
+
+def _key_path(chart_path: Any) -> Path:
+    path = Path(chart_path)
+    return path.with_name(path.name + ".key")
+
+
+def is_chart_current(chart_path: Any, key: str) -> bool:
+    """True nếu ``chart_path`` đã được vẽ từ đúng dữ liệu ``key`` (không cần vẽ lại)."""
+    if not Settings.CHART_CACHE_ENABLED or not Path(chart_path).is_file():
+        return False
+    try:
+        return _key_path(chart_path).read_text(encoding="utf-8").strip() == key
+    except OSError:
+        return False
+
+
+def mark_chart_current(chart_path: Any, key: str) -> None:
+    """Ghi key dữ liệu của biểu đồ vừa vẽ ra ``chart_path``."""
+    try:
+        _atomic_write_bytes(_key_path(chart_path), key.encode("utf-8"))
+    except OSError as exc:
+        print(f"⚠️  Không ghi được key biểu đồ {chart_path}: {exc}")
+
+
+def prune_chart_cache(max_age_days: Optional[float] = None) -> int:
+    """Xóa PNG không được dùng trong ``max_age_days`` ngày. Trả về số file đã xóa.
+
+    Mặc định lấy ``Settings.CHART_CACHE_MAX_AGE_DAYS``; giá trị <= 0 là không dọn.
+    """
+    if max_age_days is None:
+        max_age_days = Settings.CHART_CACHE_MAX_AGE_DAYS
+    root = cache_dir()
+    if max_age_days <= 0 or not root.exists():
+        return 0
+    cutoff = time.time() - max_age_days * 86400
+    removed = 0
+    for png_path in root.glob("*/*.png"):
+        if png_path.stat().st_mtime < cutoff:
+            png_path.unlink(missing_ok=True)
+            removed += 1
+    return removed
+
+
+def prune_stale_charts(verbose: bool = True) -> int:
+    """Dọn PNG cũ theo ``CHART_CACHE_MAX_AGE_DAYS`` sau khi tạo báo cáo (lỗi chỉ cảnh báo)."""
+    if not Settings.CHART_CACHE_ENABLED:
+        return 0
+    try:
+        removed = prune_chart_cache()
+    except OSError as exc:
+        print(f"⚠️  Không dọn được cache biểu đồ: {exc}")
+        return 0
+    if verbose and removed:
+        print(f"🧹 Đã xóa {removed} PNG cache biểu đồ không dùng quá {Settings.CHART_CACHE_MAX_AGE_DAYS:g} ngày")
+    return removed
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Quản lý cache biểu đồ (api_transition/.cache/charts)")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    prune_parser = subparsers.add_parser("prune", help="Xóa PNG không được dùng trong N ngày")
+    prune_parser.add_argument(
+        "--max-age-days",
+        type=float,
+        default=None,
+        help=f"Số ngày giữ PNG (mặc định CHART_CACHE_MAX_AGE_DAYS={Settings.CHART_CACHE_MAX_AGE_DAYS:g})",
+    )
+    args = parser.parse_args(argv)
+
+    removed = prune_chart_cache(args.max_age_days)
+    print(f"Đã xóa {removed} PNG cache biểu đồ trong {cache_dir()}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
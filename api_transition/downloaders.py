@@ -8,12 +8,11 @@ from pathlib import Path
 
 from api_transition.auth import capture_authorization, login
 from api_transition.report_api_client import (
-    export_report,
+    export_report_to_file,
     find_value_by_label,
     get_info_report,
     make_common_headers,
     print_candidate_pairs,
-    save_export_file,
 )
 
 API_TRANSITION_DIR = Path(__file__).resolve().parent
@@ -87,11 +86,9 @@ def download_with_recipe(
 
         payload = update_payload_input_values(recipe["export_payload"], effective_overrides)
         api_timeout = session.get("api_timeout", 120) if session else 120
-        export_response = export_report(headers, payload, timeout=api_timeout)
-
         target_dir = output_dir or group_output_dir("misc")
         target_name = output_name or recipe.get("default_output_name") or ""
-        return save_export_file(export_response, target_dir, target_name)
+        return export_report_to_file(headers, payload, target_dir, target_name, timeout=api_timeout)
 
     finally:
         if own_session:
@@ -0,0 +1,291 @@
+# -*- coding: utf-8 -*-
+"""Cache dạng cột cho các lần đọc workbook Excel lặp lại.
+
+``read_excel`` là drop-in cho ``pandas.read_excel``: lần đầu đọc một
+(file, sheet, tham số) sẽ parse xlsx như cũ rồi ghi DataFrame ra cache; các lần
+sau đọc lại từ cache thay vì parse lại XML của workbook.
+
+- Key cache gồm sha256 nội dung file (được nhớ theo path + size + mtime trong
+  process), tên sheet và các tham số đọc, nên file tải lại nhưng không đổi nội
+  dung vẫn dùng được cache, còn file bị ghi đè thì tự động lấy bản mới.
+- Định dạng ưu tiên là Arrow IPC (Feather), đọc lại bằng memory-map. Khi
+  không có ``pyarrow`` hoặc DataFrame không biểu diễn được bằng Arrow (cột
+  object lẫn kiểu, index/cột không phải chuỗi...), cache dùng pickle của pandas.
+- Lời gọi có tham số không hash được (``converters``, file-like...) sẽ đi
+  thẳng tới ``pandas.read_excel``.
+- Entry không được đọc trong ``EXCEL_CACHE_MAX_AGE_DAYS`` ngày bị runner processor
+  dọn sau mỗi lần chạy, hoặc dọn tay bằng::
+
+      python -m api_transition.excel_cache prune [--max-age-days 7]
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import pickle
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional, Sequence, Tuple
+
+import pandas as pd
+
+from api_transition.settings import Settings
+
+try:
+    import pyarrow as pa
+    import pyarrow.feather as feather
+
+    ARROW_AVAILABLE = True
+except ImportError:
+    pa = None
+    feather = None
+    ARROW_AVAILABLE = False
+
+
+CACHE_FORMAT_VERSION = 1
+HASH_CHUNK_SIZE = 1024 * 1024
+_EXCEL_SUFFIXES = {".xlsx", ".xlsm", ".xls"}
+
+# (path, size, mtime_ns) -> sha256, tránh hash lại file trong cùng process
+_CONTENT_HASHES: Dict[Tuple[str, int, int], str] = {}
+_STATS = {"hits": 0, "misses": 0, "bypass": 0}
+
+
+def cache_dir() -> Path:
+    return Path(Settings.EXCEL_CACHE_DIR).expanduser()
+
+
+def cache_stats() -> Dict[str, int]:
+    """Số lần hit/miss/bypass của process hiện tại (dùng cho log/benchmark)."""
+    return dict(_STATS)
+
+
+def _content_sha256(path: Path) -> str:
+    stat = path.stat()
+    memo_key = (str(path), stat.st_size, stat.st_mtime_ns)
+    cached = _CONTENT_HASHES.get(memo_key)
+    if cached is not None:
+        return cached
+
+    digest = hashlib.sha256()
+    with path.open("rb") as handle:
+        for chunk in iter(lambda: handle.read(HASH_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    value = digest.hexdigest()
+    _CONTENT_HASHES[memo_key] = value
+    return value
+
+
+def _normalise_kwarg(value: Any) -> Any:
+    """Chuẩn hóa tham số read_excel về JSON; raise TypeError nếu không cache được."""
+    if value is None or isinstance(value, (str, int, float, bool)):
+        return value
+    if isinstance(value, (list, tuple)):
+        return [_normalise_kwarg(item) for item in value]
+    if isinstance(value, (set, frozenset)):
+        return sorted((_normalise_kwarg(item) for item in value), key=repr)
+    if isinstance(value, dict):
+        return sorted(([_normalise_kwarg(key), _normalise_kwarg(item)] for key, item in value.items()), key=repr)
+    if isinstance(value, type):
+        return f"type:{value.__module__}.{value.__qualname__}"
+    try:
+        import numpy as np
+
+        if isinstance(value, np.dtype):
+            return f"dtype:{value.str}"
+    except ImportError:
+        pass
+    raise TypeError(f"Tham số read_excel không cache được: {type(value).__name__}")
+
+
+def _entry_key(content_sha256: str, sheet_name: Any, kwargs: Dict[str, Any]) -> str:
+    payload = json.dumps(
+        {
+            "version": CACHE_FORMAT_VERSION,
+            "pandas": pd.__version__,
+            "content": content_sha256,
+            "sheet_name": _normalise_kwarg(sheet_name),
+            "kwargs": _normalise_kwarg(kwargs),
+        },
+        sort_keys=True,
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _atomic_write(target: Path, writer) -> None:
+    target.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_name = tempfile.mkstemp(dir=target.parent, prefix=".excel-", suffix=".tmp")
+    os.close(fd)
+    try:
+        writer(tmp_name)
+        os.replace(tmp_name, target)
+    finally:
+        if os.path.exists(tmp_name):
+            os.unlink(tmp_name)
+
+
+def _arrow_compatible(df: pd.DataFrame) -> bool:
+    if not ARROW_AVAILABLE:
+        return False
+    if not isinstance(df.index, pd.RangeIndex) or df.index.start != 0 or df.index.step != 1:
+        return False
+    if isinstance(df.columns, pd.MultiIndex) or df.columns.has_duplicates:
+        return False
+    return all(isinstance(column, str) for column in df.columns)
+
+
+def _store_frame(base: Path, df: pd.DataFrame) -> None:
+    if _arrow_compatible(df):
+        try:
+            table = pa.Table.from_pandas(df, preserve_index=False)
+        except (pa.ArrowInvalid, pa.ArrowTypeError, pa.ArrowNotImplementedError, ValueError, TypeError):
+            table = None
+        if table is not None:
+            # Arrow trả ô trống của cột object về None; read_excel trả NaN.
+            # Ghi lại các cột này để khôi phục NaN khi đọc (code cũ hay dùng
+            # ``astype(str) == "nan"``).
+            nan_columns = [
+                column
+                for column in df.columns
+                if df[column].dtype == object and df[column].isna().any()
+            ]
+            table = table.replace_schema_metadata(
+                {**(table.schema.metadata or {}), b"excel_cache_nan_columns": json.dumps(nan_columns).encode("utf-8")}
+            )
+            _atomic_write(base.with_suffix(".arrow"), lambda tmp: feather.write_feather(table, tmp, compression="uncompressed"))
+            return
+    _atomic_write(base.with_suffix(".pkl"), lambda tmp: df.to_pickle(tmp))
+
+
+def _load_frame(base: Path) -> Optional[pd.DataFrame]:
+    arrow_path = base.with_suffix(".arrow")
+    if ARROW_AVAILABLE and arrow_path.exists():
+        table = feather.read_table(arrow_path, memory_map=True)
+        df = table.to_pandas()
+        nan_columns = json.loads((table.schema.metadata or {}).get(b"excel_cache_nan_columns", b"[]"))
+        for column in nan_columns:
+            df[column] = df[column].where(df[column].notna(), float("nan"))
+        return df
+    pickle_path = base.with_suffix(".pkl")
+    if pickle_path.exists():
+        return pd.read_pickle(pickle_path)
+    return None
+
+
+def _load_entry(key: str) -> Any:
+    base = cache_dir() / key[:2] / key
+    meta_path = base.with_suffix(".json")
+    if not meta_path.exists():
+        return None
+    try:
+        meta = json.loads(meta_path.read_text(encoding="utf-8"))
+        if meta.get("kind") == "dict":
+            frames = {}
+            for sheet, sheet_key in meta["sheets"]:
+                frame = _load_frame(base.parent / sheet_key)
+                if frame is None:
+                    return None
+                frames[sheet] = frame
+            os.utime(meta_path)
+            return frames
+        frame = _load_frame(base)
+        if frame is not None:
+            os.utime(meta_path)
+        return frame
+    except (OSError, ValueError, KeyError, pickle.UnpicklingError) as exc:
+        print(f"⚠️  Cache Excel hỏng ({meta_path.name}), đọc lại từ xlsx: {exc}")
+        return None
+
+
+def _save_entry(key: str, source: Path, result: Any) -> None:
+    base = cache_dir() / key[:2] / key
+    meta: Dict[str, Any] = {"source": str(source), "saved_at": time.time()}
+    if isinstance(result, dict):
+        sheets = []
+        for index, (sheet, frame) in enumerate(result.items()):
+            sheet_key = f"{key}-{index}"
+            _store_frame(base.parent / sheet_key, frame)
+            sheets.append([sheet, sheet_key])
+        meta.update(kind="dict", sheets=sheets)
+    else:
+        _store_frame(base, result)
+        meta["kind"] = "frame"
+    # Ghi meta sau cùng: meta tồn tại nghĩa là dữ liệu đã ghi xong.
+    _atomic_write(base.with_suffix(".json"), lambda tmp: Path(tmp).write_text(json.dumps(meta, ensure_ascii=False), encoding="utf-8"))
+
+
+def read_excel(io: Any, sheet_name: Any = 0, **kwargs: Any) -> Any:
+    """Drop-in cho ``pd.read_excel`` có cache dạng cột (xem docstring module)."""
+    if not Settings.EXCEL_CACHE_ENABLED or not isinstance(io, (str, os.PathLike)):
+        _STATS["bypass"] += 1
+        return pd.read_excel(io, sheet_name=sheet_name, **kwargs)
+
+    source = Path(io).expanduser()
+    if source.suffix.lower() not in _EXCEL_SUFFIXES or not source.is_file():
+        _STATS["bypass"] += 1
+        return pd.read_excel(io, sheet_name=sheet_name, **kwargs)
+
+    try:
+        key = _entry_key(_content_sha256(source.resolve()), sheet_name, kwargs)
+    except TypeError:
+        _STATS["bypass"] += 1
+        return pd.read_excel(io, sheet_name=sheet_name, **kwargs)
+
+    cached = _load_entry(key)
+    if cached is not None:
+        _STATS["hits"] += 1
+        return cached
+
+    _STATS["misses"] += 1
+    result = pd.read_excel(io, sheet_name=sheet_name, **kwargs)
+    try:
+        _save_entry(key, source.resolve(), result)
+    except OSError as exc:
+        print(f"⚠️  Không ghi được cache Excel cho {source.name}: {exc}")
+    return result
+
+
+def prune_cache(max_age_days: Optional[float] = None) -> int:
+    """Xóa các entry không được đọc trong ``max_age_days`` ngày. Trả về số entry đã xóa.
+
+    Mặc định lấy ``Settings.EXCEL_CACHE_MAX_AGE_DAYS``; giá trị <= 0 là không dọn.
+    """
+    if max_age_days is None:
+        max_age_days = Settings.EXCEL_CACHE_MAX_AGE_DAYS
+    root = cache_dir()
+    if max_age_days <= 0 or not root.exists():
+        return 0
+    cutoff = time.time() - max_age_days * 86400
+    removed = 0
+    for meta_path in root.glob("*/*.json"):
+        if meta_path.stat().st_mtime >= cutoff:
+            continue
+        key = meta_path.stem
+        for data_path in meta_path.parent.glob(f"{key}*"):
+            data_path.unlink(missing_ok=True)
+        removed += 1
+    return removed
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Quản lý cache đọc Excel (api_transition/.cache/excel)")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    prune_parser = subparsers.add_parser("prune", help="Xóa entry không được đọc trong N ngày")
+    prune_parser.add_argument(
+        "--max-age-days",
+        type=float,
+        default=None,
+        help=f"Số ngày giữ entry (mặc định EXCEL_CACHE_MAX_AGE_DAYS={Settings.EXCEL_CACHE_MAX_AGE_DAYS:g})",
+    )
+    args = parser.parse_args(argv)
+
+    removed = prune_cache(args.max_age_days)
+    print(f"Đã xóa {removed} entry cache Excel trong {cache_dir()}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -6,7 +6,9 @@ from __future__ import annotations
 
 import argparse
 import sys
-from dataclasses import dataclass
+import threading
+import time
+from dataclasses import dataclass, field
 from datetime import date
 from pathlib import Path
 from typing import Any, Dict, Iterable, List, Optional, Sequence
@@ -52,6 +54,7 @@ class FullPipelineSummary:
     import_failed: int
     skipped: int
     archived: int
+    stage_seconds: Dict[str, float] = field(default_factory=dict)
 
 
 def _effective_report_month(value: Optional[int]) -> int:
@@ -245,11 +248,16 @@ def run_full_pipeline(
     headed: Optional[bool] = None,
     download_only: Optional[Sequence[str]] = None,
     download_skip: Optional[Sequence[str]] = None,
+    download_workers: Optional[int] = None,
+    session: Optional[Dict[str, Any]] = None,
     overwrite_processed: bool = False,
     processor_only: Optional[Sequence[str]] = None,
     processor_skip: Optional[Sequence[str]] = None,
     processor_groups: Optional[Sequence[str]] = None,
     processor_stop_on_error: bool = False,
+    processor_workers: int = 1,
+    processor_force: bool = False,
+    overlap_download: bool = False,
     db_path: Optional[Path] = None,
     processed_root: Optional[Path] = None,
     archive_root: Optional[Path] = None,
@@ -267,6 +275,13 @@ def run_full_pipeline(
 
     Theo mac dinh, pipeline dung truoc khi import neu download hoac processor
     co loi de tranh nap du lieu cu/stale vao DB.
+
+    ``session`` la session dict da co san (vd. chia se giua nhieu don vi boi
+    ``multi_unit``); neu None, batch download tu tao/dung lai session cache.
+
+    ``overlap_download=True`` chay batch download trong thread rieng va cho
+    processor bat dau ngay khi file raw cua no da duoc tai xong trong lan chay
+    nay (xem ``run_all_processors(downloads_done=...)``).
     """
 
     active_runtime_context = runtime_context
@@ -312,7 +327,7 @@ def run_full_pipeline(
                 f" db_path={db_path}"
             )
 
-    download_results = run_batch_download(
+    download_kwargs: Dict[str, Any] = dict(
         config_path=config_path if active_runtime_context is None else None,
         runtime_context=active_runtime_context,
         report_month=report_month,
@@ -323,11 +338,10 @@ def run_full_pipeline(
         headed=headed,
         skip_reports=list(download_skip or []),
         only_reports=list(download_only or []),
+        max_workers=download_workers,
+        session=session,
     )
-    if download_results["failed"] and verbose:
-        print(f"[pipeline] Download failed for {len(download_results['failed'])} report(s)")
-
-    processor_results = run_all_processors(
+    processor_kwargs: Dict[str, Any] = dict(
         overwrite_processed=overwrite_processed,
         only=processor_only,
         skip=processor_skip,
@@ -335,7 +349,50 @@ def run_full_pipeline(
         runtime_context=active_runtime_context,
         stop_on_error=processor_stop_on_error,
         verbose=verbose,
+        max_workers=processor_workers,
+        force=processor_force,
     )
+
+    stage_seconds: Dict[str, float] = {}
+    stage_started = time.time()
+    if overlap_download:
+        downloads_done = threading.Event()
+        download_outcome: Dict[str, Any] = {}
+
+        def _download_in_background() -> None:
+            try:
+                download_outcome["results"] = run_batch_download(**download_kwargs)
+            except BaseException as exc:
+                download_outcome["error"] = exc
+            finally:
+                stage_seconds["download"] = round(time.time() - stage_started, 1)
+                downloads_done.set()
+
+        download_thread = threading.Thread(target=_download_in_background, name="batch-download", daemon=True)
+        download_thread.start()
+        try:
+            processor_results = run_all_processors(
+                downloads_done=downloads_done,
+                inputs_newer_than=stage_started,
+                **processor_kwargs,
+            )
+        finally:
+            download_thread.join()
+        if "error" in download_outcome:
+            raise download_outcome["error"]
+        download_results = download_outcome["results"]
+        stage_seconds["process"] = round(time.time() - stage_started, 1)
+        if download_results["failed"] and verbose:
+            print(f"[pipeline] Download failed for {len(download_results['failed'])} report(s)")
+    else:
+        download_results = run_batch_download(**download_kwargs)
+        stage_seconds["download"] = round(time.time() - stage_started, 1)
+        if download_results["failed"] and verbose:
+            print(f"[pipeline] Download failed for {len(download_results['failed'])} report(s)")
+
+        stage_started = time.time()
+        processor_results = run_all_processors(**processor_kwargs)
+        stage_seconds["process"] = round(time.time() - stage_started, 1)
     if processor_results["failed"] and verbose:
         print(f"[pipeline] Processor failed for {len(processor_results['failed'])} task(s)")
 
@@ -363,6 +420,7 @@ def run_full_pipeline(
             "Pipeline co loi o download/process va dang chay strict mode; dung truoc khi import."
         )
 
+    stage_started = time.time()
     _ensure_database(
         db_path,
         DEFAULT_SCHEMA_PATH,
@@ -388,6 +446,7 @@ def run_full_pipeline(
         verbose=verbose,
     )
     apply_views(db_path, DEFAULT_VIEWS_PATH)
+    stage_seconds["import"] = round(time.time() - stage_started, 1)
 
     summary = FullPipelineSummary(
         snapshot_date=snapshot_date.isoformat(),
@@ -400,6 +459,7 @@ def run_full_pipeline(
         import_failed=sum(1 for item in import_results["results"] if item["status"] == "failed"),
         skipped=sum(1 for item in import_results["results"] if item["status"] in {"skipped", "dry_run"}),
         archived=len(archived_paths),
+        stage_seconds=stage_seconds,
     )
 
     if verbose:
@@ -434,11 +494,15 @@ def _build_parser() -> argparse.ArgumentParser:
     parser.add_argument("--headed", action="store_true", default=None, help="Mo trinh duyet co giao dien.")
     parser.add_argument("--download-only", nargs="+", default=[], metavar="NAME", help="Chi tai cac report nay.")
     parser.add_argument("--download-skip", nargs="+", default=[], metavar="NAME", help="Bo qua cac report nay khi download.")
+    parser.add_argument("--download-workers", type=int, default=None, help="So report tai song song. Mac dinh: download.max_workers trong config hoac 1.")
     parser.add_argument("--processor-only", action="append", default=[], help="Chi chay processor co ten nay. Co the lap lai.")
     parser.add_argument("--processor-skip", action="append", default=[], help="Bo qua processor co ten nay. Co the lap lai.")
     parser.add_argument("--processor-group", action="append", default=[], help="Chi chay processor group nay. Co the lap lai.")
     parser.add_argument("--overwrite-processed", action="store_true", help="Ghi de workbook processed neu processor ho tro.")
     parser.add_argument("--processor-stop-on-error", action="store_true", help="Dung processor stage ngay khi gap loi.")
+    parser.add_argument("--processor-workers", type=int, default=1, help="So processor chay song song theo DAG. Mac dinh: 1 (tuan tu).")
+    parser.add_argument("--processor-force", action="store_true", help="Chay lai ca processor co raw input khong doi (bo qua manifest cache).")
+    parser.add_argument("--overlap-download", action="store_true", help="Chay processor ngay khi file raw cua no tai xong, song song voi batch download.")
     parser.add_argument("--db-path", default=None, help=f"Duong dan SQLite DB. Mac dinh: {DEFAULT_DB_PATH}")
     parser.add_argument("--processed-root", default=None, help=f"Thu muc Processed. Mac dinh: {DEFAULT_PROCESSED_ROOT}")
     parser.add_argument("--archive-root", default=None, help=f"Thu muc ProcessedDaily. Mac dinh: {DEFAULT_ARCHIVE_ROOT}")
@@ -471,11 +535,15 @@ def main(argv: Optional[Sequence[str]] = None) -> int:
         headed=args.headed,
         download_only=args.download_only,
         download_skip=args.download_skip,
+        download_workers=args.download_workers,
         overwrite_processed=args.overwrite_processed,
         processor_only=args.processor_only,
         processor_skip=args.processor_skip,
         processor_groups=args.processor_group,
         processor_stop_on_error=args.processor_stop_on_error,
+        processor_workers=args.processor_workers,
+        processor_force=args.processor_force,
+        overlap_download=args.overlap_download,
         db_path=Path(args.db_path) if args.db_path else None,
         processed_root=Path(args.processed_root) if args.processed_root else None,
         archive_root=Path(args.archive_root) if args.archive_root else None,
@@ -0,0 +1,402 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Chay full pipeline cho nhieu don vi song song, dung chung 1 session.
+
+Thay cho vong lap tuan tu trong ``run_all_units.py``:
+
+- login/capture Authorization 1 lan (hoac dung lai session cache), chia se
+  headers cho tat ca don vi
+- moi don vi chay ``run_full_pipeline`` trong 1 process rieng cua worker pool
+- so loi goi ``get-data-export`` dong thoi tren toan bo cac don vi bi gioi han
+  boi 1 semaphore chung (``--max-exports``)
+- log cua tung don vi duoc stream truc tiep ra console voi prefix ``[unit]``
+  va ghi rieng vao ``<run_dir>/<unit>.log``
+- cuoi luot chay ghi ``summary.json`` va ``summary.csv`` tong hop thoi gian
+
+Vi du:
+    python3 -m api_transition.multi_unit
+    python3 -m api_transition.multi_unit --workers 4 --max-exports 6
+    python3 -m api_transition.multi_unit --unit son_tay --unit ba_dinh
+"""
+
+from __future__ import annotations
+
+import argparse
+import csv
+import io
+import json
+import multiprocessing
+import sys
+import threading
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence
+
+if __package__ in (None, ""):
+    sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from api_transition.runtime_config import API_TRANSITION_DIR
+
+
+DEFAULT_CONFIG_DIR = API_TRANSITION_DIR / "configs" / "units"
+DEFAULT_RUNS_ROOT = API_TRANSITION_DIR / "runtime" / "_runs"
+DEFAULT_WORKERS = 4
+DEFAULT_MAX_EXPORTS = 6
+
+SUMMARY_CSV_FIELDS = [
+    "unit",
+    "config_path",
+    "status",
+    "started_at",
+    "finished_at",
+    "duration_seconds",
+    "download_seconds",
+    "process_seconds",
+    "import_seconds",
+    "download_success",
+    "download_failed",
+    "processor_success",
+    "processor_failed",
+    "imported",
+    "import_failed",
+    "log_path",
+    "error",
+]
+
+
+@dataclass
+class UnitRunResult:
+    unit: str
+    config_path: str
+    status: str  # "success" | "partial" | "failed"
+    started_at: str = ""
+    finished_at: str = ""
+    duration_seconds: float = 0.0
+    stage_seconds: Dict[str, float] = field(default_factory=dict)
+    download_success: int = 0
+    download_failed: int = 0
+    processor_success: int = 0
+    processor_failed: int = 0
+    imported: int = 0
+    import_failed: int = 0
+    log_path: str = ""
+    error: str = ""
+
+
+def discover_unit_configs(config_dir: Path, units: Optional[Sequence[str]] = None) -> List[Path]:
+    """Liet ke config don vi (bo qua file bat dau bang ``_``), loc theo ``units`` neu co."""
+    config_paths = sorted(
+        path for path in Path(config_dir).glob("*.yaml") if not path.name.startswith("_")
+    )
+    if units:
+        wanted = {unit.strip() for unit in units if unit.strip()}
+        config_paths = [path for path in config_paths if path.stem in wanted]
+        missing = wanted - {path.stem for path in config_paths}
+        if missing:
+            raise ValueError(f"Khong tim thay config don vi: {', '.join(sorted(missing))}")
+    return config_paths
+
+
+# ---------------------------------------------------------------------------
+# Worker process
+# ---------------------------------------------------------------------------
+
+class _PrefixedStream(io.TextIOBase):
+    """Ghi tung dong ra console voi prefix don vi va tee vao file log."""
+
+    def __init__(self, prefix: str, console, log_handle):
+        self._prefix = prefix
+        self._console = console
+        self._log_handle = log_handle
+        self._pending = ""
+        self._lock = threading.Lock()
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, text: str) -> int:
+        with self._lock:
+            self._log_handle.write(text)
+            self._pending += text
+            if "\n" in self._pending:
+                *lines, self._pending = self._pending.split("\n")
+                self._console.write("".join(f"{self._prefix}{line}\n" for line in lines))
+                self._console.flush()
+        return len(text)
+
+    def flush(self) -> None:
+        with self._lock:
+            self._log_handle.flush()
+            self._console.flush()
+
+    def close_pending(self) -> None:
+        with self._lock:
+            if self._pending:
+                self._console.write(f"{self._prefix}{self._pending}\n")
+                self._pending = ""
+            self._log_handle.flush()
+            self._console.flush()
+
+
+def _init_worker(export_limiter) -> None:
+    from api_transition.report_api_client import set_export_limiter
+
+    set_export_limiter(export_limiter)
+
+
+def _run_unit(
+    config_path: str,
+    log_path: str,
+    session: Dict[str, Any],
+    pipeline_kwargs: Dict[str, Any],
+) -> UnitRunResult:
+    from api_transition.full_pipeline import run_full_pipeline
+    from api_transition.runtime_config import load_runtime_context
+
+    unit = Path(config_path).stem
+    started = time.time()
+    result = UnitRunResult(
+        unit=unit,
+        config_path=config_path,
+        status="failed",
+        started_at=datetime.now().isoformat(timespec="seconds"),
+        log_path=log_path,
+    )
+
+    original_stdout, original_stderr = sys.stdout, sys.stderr
+    with open(log_path, "w", encoding="utf-8") as log_handle:
+        stream = _PrefixedStream(f"[{unit}] ", original_stdout, log_handle)
+        sys.stdout = sys.stderr = stream
+        try:
+            print(f"[multi] ▶ Bat dau pipeline {config_path}")
+            runtime_context = load_runtime_context(config_path)
+            result.unit = runtime_context.unit.code
+            pipeline_result = run_full_pipeline(
+                runtime_context=runtime_context,
+                session=session,
+                **pipeline_kwargs,
+            )
+            summary = pipeline_result["summary"]
+            result.stage_seconds = dict(summary.stage_seconds)
+            result.download_success = summary.download_success
+            result.download_failed = summary.download_failed
+            result.processor_success = summary.processor_success
+            result.processor_failed = summary.processor_failed
+            result.imported = summary.imported
+            result.import_failed = summary.import_failed
+            has_errors = summary.download_failed or summary.processor_failed or summary.import_failed
+            result.status = "partial" if has_errors else "success"
+        except Exception as exc:
+            result.error = f"{type(exc).__name__}: {exc}"
+            traceback.print_exc()
+        finally:
+            result.duration_seconds = round(time.time() - started, 1)
+            result.finished_at = datetime.now().isoformat(timespec="seconds")
+            print(f"[multi] ■ Ket thuc: {result.status} ({result.duration_seconds:.1f}s)")
+            stream.close_pending()
+            sys.stdout, sys.stderr = original_stdout, original_stderr
+    return result
+
+
+# ---------------------------------------------------------------------------
+# Orchestrator
+# ---------------------------------------------------------------------------
+
+def _shared_session(headed: bool, use_session_cache: Optional[bool]) -> Dict[str, Any]:
+    """Tao session 1 lan, tra ve ban picklable (chi headers/cookies) de chia se."""
+    from api_transition.batch_download import close_session, create_session
+
+    session = create_session(headed=headed, use_cache=use_session_cache)
+    try:
+        return {
+            "headers": dict(session["headers"]),
+            "cookies": list(session.get("cookies") or []),
+            "from_cache": bool(session.get("from_cache")),
+        }
+    finally:
+        close_session(session)
+
+
+def write_run_summary(run_dir: Path, results: Sequence[UnitRunResult], wall_seconds: float) -> Dict[str, Path]:
+    run_dir.mkdir(parents=True, exist_ok=True)
+    json_path = run_dir / "summary.json"
+    csv_path = run_dir / "summary.csv"
+
+    payload = {
+        "generated_at": datetime.now().isoformat(timespec="seconds"),
+        "wall_seconds": round(wall_seconds, 1),
+        "unit_seconds_total": round(sum(item.duration_seconds for item in results), 1),
+        "units": [asdict(item) for item in results],
+    }
+    json_path.write_text(json.dumps(payload, ensure_ascii=False, indent=2), encoding="utf-8")
+
+    with csv_path.open("w", encoding="utf-8-sig", newline="") as handle:
+        writer = csv.DictWriter(handle, fieldnames=SUMMARY_CSV_FIELDS)
+        writer.writeheader()
+        for item in results:
+            row = asdict(item)
+            stage_seconds = row.pop("stage_seconds")
+            row["download_seconds"] = stage_seconds.get("download", "")
+            row["process_seconds"] = stage_seconds.get("process", "")
+            row["import_seconds"] = stage_seconds.get("import", "")
+            writer.writerow(row)
+    return {"json": json_path, "csv": csv_path}
+
+
+def run_multi_unit(
+    *,
+    config_dir: Path = DEFAULT_CONFIG_DIR,
+    units: Optional[Sequence[str]] = None,
+    workers: int = DEFAULT_WORKERS,
+    max_exports: int = DEFAULT_MAX_EXPORTS,
+    download_workers: Optional[int] = None,
+    headed: bool = False,
+    use_session_cache: Optional[bool] = None,
+    runs_root: Path = DEFAULT_RUNS_ROOT,
+    pipeline_kwargs: Optional[Dict[str, Any]] = None,
+) -> Dict[str, Any]:
+    """Chay pipeline cho tat ca don vi voi worker pool.
+
+    Returns:
+        dict voi ``results`` (list[UnitRunResult] theo thu tu config),
+        ``run_dir`` va ``summary_paths``.
+    """
+    if workers < 1 or max_exports < 1:
+        raise ValueError("workers va max_exports phai >= 1")
+
+    config_paths = discover_unit_configs(config_dir, units)
+    if not config_paths:
+        raise ValueError(f"Khong co config don vi nao trong {config_dir}")
+
+    run_dir = Path(runs_root) / datetime.now().strftime("%Y%m%d_%H%M%S")
+    run_dir.mkdir(parents=True, exist_ok=True)
+
+    print(f"[multi] {len(config_paths)} don vi, workers={workers}, max_exports={max_exports}")
+    print(f"[multi] Log + summary: {run_dir}")
+
+    started = time.time()
+    session = _shared_session(headed, use_session_cache)
+
+    kwargs = dict(pipeline_kwargs or {})
+    kwargs.setdefault("headed", headed)
+    if download_workers is not None:
+        kwargs["download_workers"] = download_workers
+
+    results: Dict[str, UnitRunResult] = {}
+    with multiprocessing.Manager() as manager:
+        export_limiter = manager.BoundedSemaphore(max_exports)
+        with ProcessPoolExecutor(
+            max_workers=min(workers, len(config_paths)),
+            initializer=_init_worker,
+            initargs=(export_limiter,),
+        ) as executor:
+            futures = {
+                executor.submit(
+                    _run_unit,
+                    str(config_path),
+                    str(run_dir / f"{config_path.stem}.log"),
+                    session,
+                    kwargs,
+                ): config_path
+                for config_path in config_paths
+            }
+            for done_count, future in enumerate(as_completed(futures), start=1):
+                config_path = futures[future]
+                try:
+                    unit_result = future.result()
+                except Exception as exc:
+                    unit_result = UnitRunResult(
+                        unit=config_path.stem,
+                        config_path=str(config_path),
+                        status="failed",
+                        log_path=str(run_dir / f"{config_path.stem}.log"),
+                        error=f"{type(exc).__name__}: {exc}",
+                    )
+                results[str(config_path)] = unit_result
+                print(
+                    f"[multi] ({done_count}/{len(config_paths)}) {unit_result.unit}:"
+                    f" {unit_result.status} {unit_result.duration_seconds:.1f}s"
+                    + (f" — {unit_result.error}" if unit_result.error else "")
+                )
+
+    ordered_results = [results[str(path)] for path in config_paths]
+    wall_seconds = time.time() - started
+    summary_paths = write_run_summary(run_dir, ordered_results, wall_seconds)
+    _print_run_summary(ordered_results, wall_seconds, summary_paths)
+    return {
+        "results": ordered_results,
+        "run_dir": run_dir,
+        "summary_paths": summary_paths,
+    }
+
+
+def _print_run_summary(results: Sequence[UnitRunResult], wall_seconds: float, summary_paths: Dict[str, Path]) -> None:
+    print("\n" + "=" * 70)
+    print("TONG KET MULTI-UNIT")
+    print("=" * 70)
+    for item in results:
+        stages = " ".join(f"{name}={value:.0f}s" for name, value in item.stage_seconds.items())
+        print(
+            f"  {item.unit:<14} {item.status:<8} {item.duration_seconds:>7.1f}s  {stages}"
+            f"  dl={item.download_success}/{item.download_success + item.download_failed}"
+            f" proc={item.processor_success}/{item.processor_success + item.processor_failed}"
+            f" import={item.imported}"
+        )
+    unit_total = sum(item.duration_seconds for item in results)
+    print(f"\n  Tong thoi gian cac don vi: {unit_total:.1f}s")
+    print(f"  Thoi gian thuc te       : {wall_seconds:.1f}s")
+    print(f"  Summary JSON            : {summary_paths['json']}")
+    print(f"  Summary CSV             : {summary_paths['csv']}")
+    print("=" * 70 + "\n")
+
+
+def _build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Chay full pipeline song song cho nhieu don vi.")
+    parser.add_argument("--config-dir", default=str(DEFAULT_CONFIG_DIR), help="Thu muc chua config don vi.")
+    parser.add_argument("--unit", action="append", default=[], help="Chi chay don vi nay (ten file config, khong .yaml). Co the lap lai.")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help=f"So don vi chay dong thoi (mac dinh: {DEFAULT_WORKERS}).")
+    parser.add_argument("--max-exports", type=int, default=DEFAULT_MAX_EXPORTS, help=f"So loi goi export dong thoi toi da tren toan bo don vi (mac dinh: {DEFAULT_MAX_EXPORTS}).")
+    parser.add_argument("--download-workers", type=int, default=None, help="So report tai song song trong moi don vi.")
+    parser.add_argument("--runs-root", default=str(DEFAULT_RUNS_ROOT), help="Thu muc ghi log va summary cua tung luot chay.")
+    parser.add_argument("--headed", action="store_true", help="Mo trinh duyet co giao dien khi can login.")
+    parser.add_argument("--no-session-cache", action="store_true", help="Luon login moi, khong dung session cache.")
+    parser.add_argument("--snapshot-date", default=None, help="Ngay du lieu YYYY-MM-DD. Mac dinh: hom nay.")
+    parser.add_argument("--overwrite-processed", action="store_true", help="Ghi de workbook processed neu processor ho tro.")
+    parser.add_argument("--processor-force", action="store_true", help="Chay lai ca processor co raw input khong doi (bo qua manifest cache).")
+    parser.add_argument("--strict", action="store_true", help="Dung truoc khi import neu download/process co loi.")
+    return parser
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    from api_transition.sqlite_history.import_processed_to_sqlite import parse_optional_date
+
+    args = _build_parser().parse_args(argv)
+    pipeline_kwargs: Dict[str, Any] = {
+        "overwrite_processed": args.overwrite_processed,
+        "allow_partial": not args.strict,
+        "processor_force": args.processor_force,
+    }
+    snapshot_date = parse_optional_date(args.snapshot_date)
+    if snapshot_date is not None:
+        pipeline_kwargs["snapshot_date"] = snapshot_date
+
+    outcome = run_multi_unit(
+        config_dir=Path(args.config_dir),
+        units=args.unit,
+        workers=args.workers,
+        max_exports=args.max_exports,
+        download_workers=args.download_workers,
+        headed=args.headed,
+        use_session_cache=False if args.no_session_cache else None,
+        runs_root=Path(args.runs_root),
+        pipeline_kwargs=pipeline_kwargs,
+    )
+    return 0 if all(item.status == "success" for item in outcome["results"]) else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
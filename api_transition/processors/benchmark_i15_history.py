@@ -0,0 +1,405 @@
+# -*- coding: utf-8 -*-
+"""Benchmark ghi lich su I1.5: cach cu (iterrows tung account) vs set-based SQL.
+
+Sinh lich su gia lap: ngay D-1 co N account suy hao cao, ngay D mat ~5% va
+them ~5% account moi. Moi cach chay tren 1 ban copy DB sau ngay D-1, roi so
+sanh noi dung i15_snapshots / i15_daily_changes / i15_tracking /
+i15_daily_summary (bo qua id va cot thoi gian).
+
+Cach cu co do phuc tap O(n^2) nen mac dinh chi do tren ``--legacy-accounts``
+account; dung ``--legacy-accounts 50000`` de do day du.
+"""
+
+from __future__ import annotations
+
+import argparse
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Sequence
+
+import numpy as np
+import pandas as pd
+
+if __package__ in (None, ""):
+    sys.path.insert(0, str(Path(__file__).resolve().parent.parent.parent))
+
+from api_transition.processors.i15_processors import (
+    _delete_history_rows,
+    _ensure_history_schema,
+    _history_date,
+    _load_previous_snapshot,
+    _normalize_text,
+    _upsert_history,
+)
+
+K_SUFFIX = "K1"
+ACCOUNT_COL = "ACCOUNT_CTS"
+PREV_DATE = "2026-03-09"
+REPORT_DATE = "2026-03-10"
+COMPARE_TABLES = {
+    "i15_snapshots": ("k_suffix", "ngay_bao_cao", "account_cts"),
+    "i15_daily_changes": ("k_suffix", "ngay_bao_cao", "account_cts", "loai_bien_dong"),
+    "i15_tracking": ("k_suffix", "account_cts"),
+    "i15_daily_summary": ("k_suffix", "ngay_bao_cao", "doi_one", "nvkt_db_normalized"),
+}
+IGNORED_COLUMNS = {"id", "created_at", "updated_at"}
+
+
+def parse_args(argv: Sequence[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmark ghi lich su I1.5 vao SQLite")
+    parser.add_argument("--accounts", type=int, default=50000, help="So account suy hao cao moi ngay")
+    parser.add_argument("--legacy-accounts", type=int, default=5000, help="So account dung de do cach cu")
+    parser.add_argument("--seed", type=int, default=15)
+    return parser.parse_args(argv)
+
+
+def build_day_frames(account_count: int, seed: int) -> tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame]:
+    """Tra ve (df ngay D-1, df ngay D, thong_ke)."""
+    rng = np.random.default_rng(seed)
+    teams = [f"Tổ Kỹ thuật {index:02d}" for index in range(24)]
+    staff = [f"Nhân viên {index:03d}" for index in range(480)]
+
+    def frame(accounts: np.ndarray) -> pd.DataFrame:
+        size = len(accounts)
+        staff_idx = rng.integers(0, len(staff), size)
+        df = pd.DataFrame(
+            {
+                ACCOUNT_COL: [f"hni_fiber_{value:07d}" for value in accounts],
+                "TEN_TB_ONE": [f"Khách hàng {value}" for value in accounts],
+                "DT_ONEDIACHI_ONE": np.where(rng.random(size) < 0.1, None, [f"09{value:08d}" for value in accounts]),
+                "DOI_ONE": [teams[index % len(teams)] for index in staff_idx],
+                "NVKT_DB": [f"VNPT{index:04d}-{staff[index]}" for index in staff_idx],
+                "NVKT_DB_NORMALIZED": [staff[index] for index in staff_idx],
+                "SA": [f"SA{value % 300:03d}" for value in accounts],
+                "OLT_CTS": [f"OLT-{value % 900:03d}" for value in accounts],
+                "PORT_CTS": [f"0/{value % 16}/{value % 8}" for value in accounts],
+                "THIETBI": np.where(rng.random(size) < 0.05, None, "ONT GPON"),
+                "KETCUOI": [f"KC{value % 5000:04d}" for value in accounts],
+                "TRANGTHAI_TB": "Đang sử dụng",
+                "OLT_RX": rng.uniform(-32, -26, size).round(2),
+                "ONU_RX": np.where(rng.random(size) < 0.03, np.nan, rng.uniform(-30, -27, size).round(2)),
+            }
+        )
+        return df
+
+    prev_accounts = np.arange(account_count)
+    churn = max(1, account_count // 20)
+    keep = rng.permutation(prev_accounts)[churn:]
+    today_accounts = np.concatenate([np.sort(keep), np.arange(account_count, account_count + churn)])
+    df_prev = frame(prev_accounts)
+    df_today = frame(today_accounts)
+    # 1 account bi trung dong trong bao cao (nguon that thinh thoang co)
+    df_today = pd.concat([df_today, df_today.iloc[[0]]], ignore_index=True)
+
+    thong_ke = pd.DataFrame(
+        {
+            "DOI_VT": [teams[index % len(teams)] for index in range(len(staff))],
+            "NVKT": staff,
+            "so_thue_bao_pon_qly": rng.integers(300, 1500, len(staff)),
+        }
+    )
+    return df_prev, df_today, thong_ke
+
+
+# ---------------------------------------------------------------------------
+# Cach cu (iterrows tung account), giu lai lam moc so sanh
+# ---------------------------------------------------------------------------
+
+def legacy_upsert_history(
+    conn: sqlite3.Connection,
+    k_suffix: str,
+    report_date: str,
+    df: pd.DataFrame,
+    account_col: str,
+    prev_snapshot: pd.DataFrame,
+    df_thong_ke: pd.DataFrame,
+) -> None:
+    _delete_history_rows(conn, k_suffix, report_date)
+
+    prev_accounts = set(
+        prev_snapshot[account_col].dropna().astype(str).str.strip().tolist()
+    ) if not prev_snapshot.empty and account_col in prev_snapshot.columns else set()
+    today_accounts = set(df[account_col].dropna().astype(str).str.strip().tolist())
+
+    tang_moi = today_accounts - prev_accounts
+    giam_het = prev_accounts - today_accounts
+    van_con = today_accounts & prev_accounts
+
+    tracking_df = pd.read_sql_query("SELECT * FROM i15_tracking WHERE k_suffix = ?", conn, params=(k_suffix,))
+    tracking_map: Dict[str, Dict[str, Any]] = {}
+    for _, row in tracking_df.iterrows():
+        tracking_map[str(row["account_cts"])] = row.to_dict()
+
+    for _, row in df.iterrows():
+        account = _normalize_text(row.get(account_col))
+        if not account:
+            continue
+        conn.execute(
+            """
+            INSERT OR REPLACE INTO i15_snapshots (
+                k_suffix, ngay_bao_cao, account_cts, ten_tb_one, dt_onediachi_one,
+                doi_one, nvkt_db, nvkt_db_normalized, sa, olt_cts, port_cts,
+                thietbi, ketcuoi, trangthai_tb, olt_rx, onu_rx
+            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """,
+            (
+                k_suffix,
+                report_date,
+                account,
+                _normalize_text(row.get("TEN_TB_ONE")),
+                _normalize_text(row.get("DT_ONEDIACHI_ONE") or row.get("DT_ONE")),
+                _normalize_text(row.get("DOI_ONE")),
+                _normalize_text(row.get("NVKT_DB")),
+                _normalize_text(row.get("NVKT_DB_NORMALIZED")),
+                _normalize_text(row.get("SA")),
+                _normalize_text(row.get("OLT_CTS") or row.get("OLT_RX")),
+                _normalize_text(row.get("PORT_CTS")),
+                _normalize_text(row.get("THIETBI")),
+                _normalize_text(row.get("KETCUOI")),
+                _normalize_text(row.get("TRANGTHAI_TB")),
+                row.get("OLT_RX"),
+                row.get("ONU_RX"),
+            ),
+        )
+
+    def upsert_tracking(account: str, row: pd.Series, status: str, so_ngay: int) -> None:
+        existing = tracking_map.get(account)
+        first_date = existing.get("ngay_xuat_hien_dau_tien") if existing else report_date
+        if not first_date:
+            first_date = report_date
+        conn.execute(
+            """
+            INSERT OR REPLACE INTO i15_tracking (
+                k_suffix, account_cts, ngay_xuat_hien_dau_tien, ngay_thay_cuoi_cung,
+                so_ngay_lien_tuc, doi_one, nvkt_db, nvkt_db_normalized, sa, trang_thai
+            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """,
+            (
+                k_suffix,
+                account,
+                first_date,
+                report_date,
+                so_ngay,
+                _normalize_text(row.get("DOI_ONE")),
+                _normalize_text(row.get("NVKT_DB")),
+                _normalize_text(row.get("NVKT_DB_NORMALIZED")),
+                _normalize_text(row.get("SA")),
+                status,
+            ),
+        )
+
+    for account in tang_moi:
+        row = df[df[account_col].astype(str).str.strip() == account].iloc[0]
+        upsert_tracking(account, row, "DANG_SUY_HAO", 1)
+
+    for account in van_con:
+        row = df[df[account_col].astype(str).str.strip() == account].iloc[0]
+        existing = tracking_map.get(account)
+        so_ngay = int(existing.get("so_ngay_lien_tuc", 1)) + 1 if existing else 2
+        upsert_tracking(account, row, "DANG_SUY_HAO", so_ngay)
+
+    for account in giam_het:
+        prev_row = prev_snapshot[prev_snapshot[account_col].astype(str).str.strip() == account]
+        if prev_row.empty:
+            continue
+        existing = tracking_map.get(account)
+        so_ngay = int(existing.get("so_ngay_lien_tuc", 1)) if existing else 1
+        upsert_tracking(account, prev_row.iloc[0], "DA_HET_SUY_HAO", so_ngay)
+
+    def save_changes(records: pd.DataFrame, loai: str, source_df: pd.DataFrame, source_col: str) -> None:
+        if records.empty:
+            return
+        for account in records[source_col].dropna().astype(str).str.strip().unique():
+            if not account or source_df.empty:
+                continue
+            match = source_df[source_df[source_col].astype(str).str.strip() == account]
+            if match.empty:
+                continue
+            row = match.iloc[0]
+            existing = tracking_map.get(account, {})
+            conn.execute(
+                """
+                INSERT OR REPLACE INTO i15_daily_changes (
+                    k_suffix, ngay_bao_cao, account_cts, loai_bien_dong,
+                    doi_one, nvkt_db, nvkt_db_normalized, sa, so_ngay_lien_tuc,
+                    ten_tb_one, dt_onediachi_one, olt_cts, port_cts, thietbi, ketcuoi
+                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                """,
+                (
+                    k_suffix,
+                    report_date,
+                    account,
+                    loai,
+                    _normalize_text(row.get("DOI_ONE")),
+                    _normalize_text(row.get("NVKT_DB")),
+                    _normalize_text(row.get("NVKT_DB_NORMALIZED")),
+                    _normalize_text(row.get("SA")),
+                    int(existing.get("so_ngay_lien_tuc", 1)) if existing else 1,
+                    _normalize_text(row.get("TEN_TB_ONE")),
+                    _normalize_text(row.get("DT_ONEDIACHI_ONE") or row.get("DT_ONE")),
+                    _normalize_text(row.get("OLT_CTS") or row.get("OLT_RX")),
+                    _normalize_text(row.get("PORT_CTS")),
+                    _normalize_text(row.get("THIETBI")),
+                    _normalize_text(row.get("KETCUOI")),
+                ),
+            )
+
+    save_changes(df[df[account_col].astype(str).str.strip().isin(tang_moi)], "TANG_MOI", df, account_col)
+    if not prev_snapshot.empty:
+        save_changes(prev_snapshot[prev_snapshot[account_col].astype(str).str.strip().isin(giam_het)], "GIAM_HET", prev_snapshot, account_col)
+    save_changes(df[df[account_col].astype(str).str.strip().isin(van_con)], "VAN_CON", df, account_col)
+
+    group_cols = ["DOI_ONE", "NVKT_DB_NORMALIZED"]
+    curr_summary = (
+        df.assign(
+            _account=df[account_col].astype(str).str.strip(),
+            _is_tang=df[account_col].astype(str).str.strip().isin(tang_moi).astype(int),
+            _is_van=df[account_col].astype(str).str.strip().isin(van_con).astype(int),
+        )
+        .groupby(group_cols, dropna=False, as_index=False)
+        .agg(tong_so_hien_tai=("_account", "size"), so_tang_moi=("_is_tang", "sum"), so_van_con=("_is_van", "sum"))
+    )
+    curr_summary["so_giam_het"] = 0
+    if not prev_snapshot.empty:
+        prev_giam = prev_snapshot[prev_snapshot[account_col].astype(str).str.strip().isin(giam_het)]
+        prev_summary = (
+            prev_giam.assign(_account=prev_giam[account_col].astype(str).str.strip())
+            .groupby(group_cols, dropna=False, as_index=False)
+            .agg(so_giam_het=("_account", "size"))
+        )
+        curr_summary = curr_summary.merge(prev_summary, on=group_cols, how="left", suffixes=("", "_prev"))
+        curr_summary["so_giam_het"] = curr_summary["so_giam_het_prev"].fillna(0).astype(int)
+        curr_summary = curr_summary.drop(columns=["so_giam_het_prev"])
+
+    thong_ke = df_thong_ke.rename(
+        columns={"DOI_VT": "DOI_ONE", "NVKT": "NVKT_DB_NORMALIZED", "so_thue_bao_pon_qly": "so_tb_quan_ly"}
+    )
+    curr_summary = curr_summary.merge(thong_ke[["DOI_ONE", "NVKT_DB_NORMALIZED", "so_tb_quan_ly"]], on=group_cols, how="left")
+    curr_summary["so_tb_quan_ly"] = pd.to_numeric(curr_summary["so_tb_quan_ly"], errors="coerce").fillna(0).astype(int)
+    curr_summary["ty_le_shc"] = curr_summary.apply(
+        lambda row: round(row["tong_so_hien_tai"] / row["so_tb_quan_ly"] * 100, 2) if row["so_tb_quan_ly"] else 0.0,
+        axis=1,
+    )
+    for _, row in curr_summary.iterrows():
+        conn.execute(
+            """
+            INSERT INTO i15_daily_summary (
+                k_suffix, ngay_bao_cao, doi_one, nvkt_db_normalized,
+                tong_so_hien_tai, so_tang_moi, so_giam_het, so_van_con,
+                so_tb_quan_ly, ty_le_shc
+            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """,
+            (
+                k_suffix,
+                report_date,
+                _normalize_text(row.get("DOI_ONE")),
+                _normalize_text(row.get("NVKT_DB_NORMALIZED")),
+                int(row.get("tong_so_hien_tai", 0) or 0),
+                int(row.get("so_tang_moi", 0) or 0),
+                int(row.get("so_giam_het", 0) or 0),
+                int(row.get("so_van_con", 0) or 0),
+                int(row.get("so_tb_quan_ly", 0) or 0),
+                float(row.get("ty_le_shc", 0) or 0),
+            ),
+        )
+
+
+# ---------------------------------------------------------------------------
+# Do dac
+# ---------------------------------------------------------------------------
+
+def prepare_base_db(db_path: Path, df_prev: pd.DataFrame, thong_ke: pd.DataFrame) -> None:
+    """DB sau ngay D-1 (snapshot + tracking, 1/3 account da theo doi tu truoc)."""
+    conn = sqlite3.connect(db_path)
+    try:
+        _ensure_history_schema(conn)
+        seeded = df_prev.iloc[::3]
+        conn.executemany(
+            """
+            INSERT INTO i15_tracking (
+                k_suffix, account_cts, ngay_xuat_hien_dau_tien, ngay_thay_cuoi_cung,
+                so_ngay_lien_tuc, doi_one, nvkt_db, nvkt_db_normalized, sa, trang_thai
+            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, 'DANG_SUY_HAO')
+            """,
+            [
+                (K_SUFFIX, account, _history_date(PREV_DATE, -7), _history_date(PREV_DATE, -1), 7, doi, nvkt, nvkt_norm, sa)
+                for account, doi, nvkt, nvkt_norm, sa in zip(
+                    seeded[ACCOUNT_COL], seeded["DOI_ONE"], seeded["NVKT_DB"], seeded["NVKT_DB_NORMALIZED"], seeded["SA"]
+                )
+            ],
+        )
+        _upsert_history(conn, K_SUFFIX, PREV_DATE, df_prev, ACCOUNT_COL, thong_ke)
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def dump_tables(db_path: Path) -> Dict[str, List[tuple]]:
+    conn = sqlite3.connect(db_path)
+    try:
+        dumped = {}
+        for table, order_by in COMPARE_TABLES.items():
+            columns = [row[1] for row in conn.execute(f"PRAGMA table_info({table})") if row[1] not in IGNORED_COLUMNS]
+            dumped[table] = conn.execute(
+                f"SELECT {', '.join(columns)} FROM {table} ORDER BY {', '.join(order_by)}"
+            ).fetchall()
+        return dumped
+    finally:
+        conn.close()
+
+
+def run_once(base_db: Path, target_db: Path, df_today: pd.DataFrame, thong_ke: pd.DataFrame, legacy: bool) -> float:
+    shutil.copyfile(base_db, target_db)
+    conn = sqlite3.connect(target_db)
+    try:
+        started = time.perf_counter()
+        if legacy:
+            prev_snapshot = _load_previous_snapshot(conn, K_SUFFIX, REPORT_DATE, ACCOUNT_COL)
+            legacy_upsert_history(conn, K_SUFFIX, REPORT_DATE, df_today, ACCOUNT_COL, prev_snapshot, thong_ke)
+        else:
+            _upsert_history(conn, K_SUFFIX, REPORT_DATE, df_today, ACCOUNT_COL, thong_ke)
+        conn.commit()
+        return time.perf_counter() - started
+    finally:
+        conn.close()
+
+
+def compare_at(account_count: int, seed: int, scratch: Path, with_legacy: bool) -> None:
+    df_prev, df_today, thong_ke = build_day_frames(account_count, seed)
+    base_db = scratch / f"base_{account_count}.db"
+    prepare_base_db(base_db, df_prev, thong_ke)
+
+    set_db = scratch / f"set_{account_count}.db"
+    set_seconds = run_once(base_db, set_db, df_today, thong_ke, legacy=False)
+    line = f"{account_count:>8,} account | set-based {set_seconds:8.2f}s ({len(df_today) / set_seconds:>10,.0f} dong/s)"
+    if with_legacy:
+        legacy_db = scratch / f"legacy_{account_count}.db"
+        legacy_seconds = run_once(base_db, legacy_db, df_today, thong_ke, legacy=True)
+        same = dump_tables(legacy_db) == dump_tables(set_db)
+        line += (
+            f" | cu {legacy_seconds:8.2f}s ({len(df_today) / legacy_seconds:>8,.0f} dong/s)"
+            f" | x{legacy_seconds / set_seconds:6.1f} | ket qua trung nhau: {'co' if same else 'KHONG'}"
+        )
+        print(line)
+        if not same:
+            raise SystemExit(2)
+        return
+    print(line)
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    args = parse_args(argv)
+    with tempfile.TemporaryDirectory(prefix="i15_history_bench_") as scratch:
+        scratch_dir = Path(scratch)
+        if args.legacy_accounts and args.legacy_accounts != args.accounts:
+            compare_at(args.legacy_accounts, args.seed, scratch_dir, with_legacy=True)
+        compare_at(args.accounts, args.seed, scratch_dir, with_legacy=args.legacy_accounts == args.accounts)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
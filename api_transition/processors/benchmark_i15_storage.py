@@ -0,0 +1,219 @@
+# -*- coding: utf-8 -*-
+"""So sanh luu lich su I1.5 dang snapshot vs interval: dung luong DB va do tre.
+
+Sinh ``--days`` ngay bao cao gia lap (~``--accounts`` account/ngay, moi ngay
+~5% account het/moi suy hao, ~0.5% doi thong tin), ghi vao 2 DB (1 DB che do
+snapshot, 1 DB che do interval) qua ``_upsert_history`` roi:
+
+- kiem tra i15_daily_changes / i15_tracking / i15_daily_summary giong nhau,
+- kiem tra view ``v_i15_snapshots_interval`` tai tao dung tung ngay,
+- kiem tra migrate tu DB snapshot ra dung DB interval,
+- in dung luong file (sau VACUUM), thoi gian ghi moi ngay va thoi gian doc
+  snapshot 1 ngay.
+"""
+
+from __future__ import annotations
+
+import argparse
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List, Sequence
+
+import numpy as np
+import pandas as pd
+
+if __package__ in (None, ""):
+    sys.path.insert(0, str(Path(__file__).resolve().parent.parent.parent))
+
+from api_transition.processors.i15_interval_store import (
+    STORAGE_INTERVAL,
+    migrate_snapshots_to_intervals,
+    set_storage_mode,
+    verify_intervals,
+)
+from api_transition.processors.i15_processors import (
+    _ensure_history_schema,
+    _history_date,
+    _load_previous_snapshot,
+    _upsert_history,
+)
+
+K_SUFFIX = "K1"
+ACCOUNT_COL = "ACCOUNT_CTS"
+START_DATE = "2026-01-01"
+COMPARE_TABLES = {
+    "i15_daily_changes": ("k_suffix", "ngay_bao_cao", "account_cts", "loai_bien_dong"),
+    "i15_tracking": ("k_suffix", "account_cts"),
+    "i15_daily_summary": ("k_suffix", "ngay_bao_cao", "doi_one", "nvkt_db_normalized"),
+}
+IGNORED_COLUMNS = {"id", "created_at", "updated_at"}
+
+
+def parse_args(argv: Sequence[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="So sanh luu lich su I1.5 snapshot vs interval")
+    parser.add_argument("--accounts", type=int, default=20000, help="So account suy hao cao moi ngay")
+    parser.add_argument("--days", type=int, default=60, help="So ngay bao cao")
+    parser.add_argument("--seed", type=int, default=15)
+    return parser.parse_args(argv)
+
+
+def generate_days(account_count: int, day_count: int, seed: int):
+    """Sinh (ngay, df) cho tung ngay; account giu thong tin mo ta qua cac ngay."""
+    rng = np.random.default_rng(seed)
+    teams = [f"Tổ Kỹ thuật {index:02d}" for index in range(24)]
+    staff = [f"Nhân viên {index:03d}" for index in range(480)]
+    pool = account_count * 3
+    staff_of = rng.integers(0, len(staff), pool)
+    status = np.array(["Đang sử dụng"] * pool, dtype=object)
+    alive = rng.random(pool) < 1 / 3
+    for day_index in range(day_count):
+        if day_index:
+            # ~5% het suy hao, bu lai bang account moi
+            leaving = alive & (rng.random(pool) < 0.05)
+            joining = ~alive & (rng.random(pool) < 0.05 * alive.sum() / max(1, (~alive).sum()))
+            alive = (alive & ~leaving) | joining
+            moved = rng.random(pool) < 0.005
+            staff_of[moved] = rng.integers(0, len(staff), int(moved.sum()))
+            status[rng.random(pool) < 0.002] = "Tạm dừng"
+        accounts = np.nonzero(alive)[0]
+        size = len(accounts)
+        staff_idx = staff_of[accounts]
+        df = pd.DataFrame(
+            {
+                ACCOUNT_COL: [f"hni_fiber_{value:07d}" for value in accounts],
+                "TEN_TB_ONE": [f"Khách hàng {value}" for value in accounts],
+                "DT_ONEDIACHI_ONE": [f"09{value:08d}" for value in accounts],
+                "DOI_ONE": [teams[index % len(teams)] for index in staff_idx],
+                "NVKT_DB": [f"VNPT{index:04d}-{staff[index]}" for index in staff_idx],
+                "NVKT_DB_NORMALIZED": [staff[index] for index in staff_idx],
+                "SA": [f"SA{value % 300:03d}" for value in accounts],
+                "OLT_CTS": [f"OLT-{value % 900:03d}" for value in accounts],
+                "PORT_CTS": [f"0/{value % 16}/{value % 8}" for value in accounts],
+                "THIETBI": "ONT GPON",
+                "KETCUOI": [f"KC{value % 5000:04d}" for value in accounts],
+                "TRANGTHAI_TB": status[accounts],
+                "OLT_RX": rng.uniform(-32, -26, size).round(2),
+                "ONU_RX": np.where(rng.random(size) < 0.03, np.nan, rng.uniform(-30, -27, size).round(2)),
+            }
+        )
+        yield _history_date(START_DATE, day_index), df
+
+
+def thong_ke_frame() -> pd.DataFrame:
+    staff = [f"Nhân viên {index:03d}" for index in range(480)]
+    return pd.DataFrame(
+        {
+            "DOI_VT": [f"Tổ Kỹ thuật {index % 24:02d}" for index in range(len(staff))],
+            "NVKT": staff,
+            "so_thue_bao_pon_qly": [800 + index for index in range(len(staff))],
+        }
+    )
+
+
+def dump_tables(conn: sqlite3.Connection) -> Dict[str, List[tuple]]:
+    dumped = {}
+    for table, order_by in COMPARE_TABLES.items():
+        columns = [row[1] for row in conn.execute(f"PRAGMA table_info({table})") if row[1] not in IGNORED_COLUMNS]
+        dumped[table] = conn.execute(f"SELECT {', '.join(columns)} FROM {table} ORDER BY {', '.join(order_by)}").fetchall()
+    return dumped
+
+
+def vacuumed_size(path: Path) -> int:
+    conn = sqlite3.connect(path)
+    try:
+        conn.execute("VACUUM")
+    finally:
+        conn.close()
+    return path.stat().st_size
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    args = parse_args(argv)
+    thong_ke = thong_ke_frame()
+    with tempfile.TemporaryDirectory(prefix="i15_storage_bench_") as scratch:
+        scratch_dir = Path(scratch)
+        paths = {"snapshot": scratch_dir / "snapshot.db", "interval": scratch_dir / "interval.db"}
+        conns = {mode: sqlite3.connect(path) for mode, path in paths.items()}
+        for conn in conns.values():
+            _ensure_history_schema(conn)
+        set_storage_mode(conns["interval"], STORAGE_INTERVAL)
+        conns["interval"].commit()
+
+        write_seconds = {mode: 0.0 for mode in conns}
+        days = []
+        for report_date, df in generate_days(args.accounts, args.days, args.seed):
+            days.append(report_date)
+            for mode, conn in conns.items():
+                started = time.perf_counter()
+                _upsert_history(conn, K_SUFFIX, report_date, df, ACCOUNT_COL, thong_ke)
+                conn.commit()
+                write_seconds[mode] += time.perf_counter() - started
+
+        same_history = dump_tables(conns["snapshot"]) == dump_tables(conns["interval"])
+
+        # View interval tai tao dung snapshot tung ngay (so voi DB snapshot)
+        snapshot_conn = conns["snapshot"]
+        snapshot_conn.execute("ATTACH DATABASE ? AS iv", (str(paths["interval"]),))
+        columns = "account_cts, ten_tb_one, dt_onediachi_one, doi_one, nvkt_db, nvkt_db_normalized, sa, olt_cts, port_cts, thietbi, ketcuoi, trangthai_tb, olt_rx, onu_rx"
+        mismatched_days = 0
+        for report_date in days:
+            params = (K_SUFFIX, report_date)
+            expected = snapshot_conn.execute(
+                f"SELECT {columns} FROM main.i15_snapshots WHERE k_suffix = ? AND ngay_bao_cao = ? ORDER BY account_cts", params
+            ).fetchall()
+            actual = conns["interval"].execute(
+                f"SELECT {columns} FROM v_i15_snapshots_interval WHERE k_suffix = ? AND ngay_bao_cao = ? ORDER BY account_cts", params
+            ).fetchall()
+            mismatched_days += expected != actual
+        snapshot_conn.execute("DETACH DATABASE iv")
+
+        read_seconds = {}
+        probe_date = _history_date(days[-1], 1)
+        for mode, conn in conns.items():
+            started = time.perf_counter()
+            for _ in range(5):
+                prev = _load_previous_snapshot(conn, K_SUFFIX, probe_date, ACCOUNT_COL)
+            read_seconds[mode] = (time.perf_counter() - started) / 5
+            assert len(prev) > 0
+        interval_rows = conns["interval"].execute("SELECT COUNT(*) FROM i15_snapshot_intervals").fetchone()[0]
+        snapshot_rows = conns["snapshot"].execute("SELECT COUNT(*) FROM i15_snapshots").fetchone()[0]
+        for conn in conns.values():
+            conn.close()
+
+        migrated_path = scratch_dir / "migrated.db"
+        shutil.copyfile(paths["snapshot"], migrated_path)
+        conn = sqlite3.connect(migrated_path)
+        try:
+            started = time.perf_counter()
+            migrate_snapshots_to_intervals(conn)
+            migrate_seconds = time.perf_counter() - started
+            migrate_ok = not verify_intervals(conn, K_SUFFIX)
+            conn.commit()
+        finally:
+            conn.close()
+
+        sizes = {mode: vacuumed_size(path) for mode, path in paths.items()}
+
+    print(f"{args.days} ngay x ~{args.accounts:,} account ({K_SUFFIX})")
+    print(f"  dong luu tru        : snapshot {snapshot_rows:>10,} | interval {interval_rows:>10,} doan")
+    print(f"  dung luong DB       : snapshot {sizes['snapshot'] / 2**20:8.1f} MB | interval {sizes['interval'] / 2**20:8.1f} MB")
+    print(
+        f"  ghi 1 ngay (tb)     : snapshot {write_seconds['snapshot'] / args.days * 1000:8.1f} ms | "
+        f"interval {write_seconds['interval'] / args.days * 1000:8.1f} ms"
+    )
+    print(
+        f"  doc snapshot 1 ngay : snapshot {read_seconds['snapshot'] * 1000:8.1f} ms | "
+        f"interval {read_seconds['interval'] * 1000:8.1f} ms"
+    )
+    print(f"  migrate snapshot -> interval: {migrate_seconds:.2f}s, khop: {'co' if migrate_ok else 'KHONG'}")
+    print(f"  lich su (changes/tracking/summary) trung nhau: {'co' if same_history else 'KHONG'}")
+    print(f"  view interval tai tao dung: {len(days) - mismatched_days}/{len(days)} ngay")
+    return 0 if same_history and migrate_ok and not mismatched_days else 2
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
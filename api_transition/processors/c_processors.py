@@ -6,11 +6,15 @@ import re
 
 import pandas as pd
 
+from api_transition.excel_cache import read_excel
 from api_transition.processors.common import (
     DOWNLOADS_DIR,
+    ProcessedWorkbookWriter,
     append_or_replace_sheet,
     ensure_processed_workbook,
+    write_sheets,
 )
+from api_transition.processors.reference_data import normalize_person_name
 
 
 DEFAULT_C11_INPUT = DOWNLOADS_DIR / "chi_tieu_c" / "c1.1 report.xlsx"
@@ -121,20 +125,7 @@ def _extract_nvkt_name(ten_kv):
     if "(" in nvkt_name:
         nvkt_name = nvkt_name.split("(")[0].strip()
 
-    return _normalize_person_name(nvkt_name)
-
-
-def _normalize_person_name(name):
-    """Chuan hoa ten nguoi de gom cac bien the khac nhau ve hoa/thuong/khoang trang."""
-    if pd.isna(name):
-        return None
-
-    name = str(name).strip()
-    if not name:
-        return None
-
-    name = re.sub(r"\s+", " ", name)
-    return name.lower().title()
+    return normalize_person_name(nvkt_name)
 
 
 def _build_c11_detail_summary(df, has_team_column):
@@ -313,7 +304,7 @@ def process_c11_report_api_output(
         else exclude_unit_patterns
     )
 
-    df = pd.read_excel(raw_path)
+    df = read_excel(raw_path)
     if df.shape[1] < 11:
         raise ValueError(
             f"Bao cao C1.1 khong du cot de xu ly. So cot hien tai: {df.shape[1]}"
@@ -357,7 +348,7 @@ def process_c12_report_api_output(
         else exclude_unit_patterns
     )
 
-    df = pd.read_excel(raw_path)
+    df = read_excel(raw_path)
     if df.shape[1] < 8:
         raise ValueError(
             f"Bao cao C1.2 khong du cot de xu ly. So cot hien tai: {df.shape[1]}"
@@ -398,7 +389,7 @@ def process_c13_report_api_output(
         else exclude_unit_patterns
     )
 
-    df = pd.read_excel(raw_path)
+    df = read_excel(raw_path)
     if df.shape[1] < 11:
         raise ValueError(
             f"Bao cao C1.3 khong du cot de xu ly. So cot hien tai: {df.shape[1]}"
@@ -436,7 +427,7 @@ def process_c14_report_api_output(
     """Xu ly bao cao C1.4 va ghi ket qua vao file _processed."""
     raw_path = _resolve_path(input_path)
 
-    df = pd.read_excel(raw_path)
+    df = read_excel(raw_path)
     if df.shape[1] < 12:
         raise ValueError(
             f"Bao cao C1.4 khong du cot de xu ly. So cot hien tai: {df.shape[1]}"
@@ -498,7 +489,7 @@ def process_c15_report_api_output(
     """Xu ly bao cao C1.5 va ghi ket qua tong hop vao file _processed."""
     raw_path = _resolve_path(input_path)
 
-    df = pd.read_excel(raw_path, header=[0, 1])
+    df = read_excel(raw_path, header=[0, 1])
     if df.shape[1] < 17:
         raise ValueError(
             f"Bao cao C1.5 khong du cot de xu ly. So cot hien tai: {df.shape[1]}"
@@ -592,10 +583,9 @@ def process_c15_chitiet_report_api_output(
     raw_path = _resolve_path(input_path)
     processed_path = ensure_processed_workbook(raw_path, overwrite=overwrite_processed)
 
-    df = pd.read_excel(raw_path)
+    df = read_excel(raw_path)
     if df.empty or df.shape[1] == 0:
-        for sheet_name, empty_df in _empty_c15_detail_outputs().items():
-            append_or_replace_sheet(processed_path, sheet_name, empty_df)
+        write_sheets(processed_path, _empty_c15_detail_outputs())
         return processed_path
 
     required_columns = ["NGAY_LHD", "NGAY_HC"]
@@ -651,8 +641,7 @@ def process_c15_chitiet_report_api_output(
 
     summary_outputs = _empty_c15_detail_outputs()
     if filtered_df.empty:
-        for sheet_name, empty_df in summary_outputs.items():
-            append_or_replace_sheet(processed_path, sheet_name, empty_df)
+        write_sheets(processed_path, summary_outputs)
         return processed_path
 
     group_columns = ["DOIVT", "NVKT"] if has_team_column else ["NVKT"]
@@ -827,8 +816,10 @@ def process_c15_chitiet_report_api_output(
                 ]
             ]
 
-    for sheet_name in DEFAULT_C15_DETAIL_SHEETS:
-        append_or_replace_sheet(processed_path, sheet_name, summary_outputs[sheet_name])
+    write_sheets(
+        processed_path,
+        [(sheet_name, summary_outputs[sheet_name]) for sheet_name in DEFAULT_C15_DETAIL_SHEETS],
+    )
 
     return processed_path
 
@@ -842,7 +833,7 @@ def process_c14_chitiet_report_api_output(
 ):
     """Xu ly bao cao chi tiet C1.4 va tong hop hai long theo to/NVKT."""
     raw_path = _resolve_path(input_path)
-    df = pd.read_excel(raw_path)
+    df = read_excel(raw_path)
 
     required_columns = ["TEN_KV", "DO_HL", "KHL_KT"]
     missing_columns = [col for col in required_columns if col not in df.columns]
@@ -932,7 +923,7 @@ def process_c11_chitiet_report_api_output(
 ):
     """Xu ly bao cao chi tiet C1.1 va tao cac sheet tong hop theo KPI khung gio."""
     raw_path = _resolve_path(input_path)
-    df = pd.read_excel(raw_path)
+    df = read_excel(raw_path)
 
     required_columns = ["TEN_KV", "DAT_TT_KO_HEN"]
     missing_columns = [col for col in required_columns if col not in df.columns]
@@ -968,9 +959,6 @@ def process_c11_chitiet_report_api_output(
 
     processed_path = ensure_processed_workbook(raw_path, overwrite=overwrite_processed)
 
-    detail_summary = _build_c11_detail_summary(df, has_team_column)
-    append_or_replace_sheet(processed_path, "chi_tiet", detail_summary)
-
     hour_sheet_map = {
         15: "chi_tieu_ko_hen_15h",
         16: "chi_tieu_ko_hen_16h",
@@ -978,21 +966,20 @@ def process_c11_chitiet_report_api_output(
         18: "chi_tieu_ko_hen_18h",
     }
 
-    for max_hour, sheet_name in hour_sheet_map.items():
-        filtered_df = _filter_c11_detail_by_gio(df, max_hour)
-        summary_df = _build_c11_detail_summary(filtered_df, has_team_column)
-        append_or_replace_sheet(processed_path, sheet_name, summary_df)
+    with ProcessedWorkbookWriter(processed_path) as writer:
+        writer.add_sheet("chi_tiet", _build_c11_detail_summary(df, has_team_column))
 
-        failed_df = filtered_df[
-            pd.to_numeric(filtered_df["DAT_TT_KO_HEN"], errors="coerce").fillna(0) != 1
-        ].copy()
-        if "gio_giao" in failed_df.columns:
-            failed_df = failed_df.drop(columns=["gio_giao"])
-        append_or_replace_sheet(
-            processed_path,
-            f"chi_tiet_khong_dat_{max_hour}h",
-            failed_df,
-        )
+        for max_hour, sheet_name in hour_sheet_map.items():
+            filtered_df = _filter_c11_detail_by_gio(df, max_hour)
+            summary_df = _build_c11_detail_summary(filtered_df, has_team_column)
+            writer.add_sheet(sheet_name, summary_df)
+
+            failed_df = filtered_df[
+                pd.to_numeric(filtered_df["DAT_TT_KO_HEN"], errors="coerce").fillna(0) != 1
+            ].copy()
+            if "gio_giao" in failed_df.columns:
+                failed_df = failed_df.drop(columns=["gio_giao"])
+            writer.add_sheet(f"chi_tiet_khong_dat_{max_hour}h", failed_df)
 
     return processed_path
 
@@ -1006,7 +993,7 @@ def process_c12_chitiet_sm1_report_api_output(
 ):
     """Xu ly file C1.2 chi tiet SM1 va tao sheet tong hop phieu hong lai 7 ngay."""
     raw_path = _resolve_path(input_path)
-    df = pd.read_excel(raw_path)
+    df = read_excel(raw_path)
 
     required_columns = ["TEN_KV", "MA_TB"]
     missing_columns = [col for col in required_columns if col not in df.columns]
@@ -1053,7 +1040,7 @@ def process_c12_chitiet_sm2_report_api_output(
 ):
     """Xu ly file C1.2 chi tiet SM2 va tao sheet tong hop tong phieu bao hong thang."""
     raw_path = _resolve_path(input_path)
-    df = pd.read_excel(raw_path)
+    df = read_excel(raw_path)
 
     required_columns = ["TEN_KV", "MA_TB"]
     missing_columns = [col for col in required_columns if col not in df.columns]
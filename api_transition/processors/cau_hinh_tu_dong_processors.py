@@ -6,7 +6,9 @@ import re
 
 import pandas as pd
 
-from api_transition.processors.common import append_or_replace_sheet, ensure_processed_workbook
+from api_transition.excel_cache import read_excel
+from api_transition.processors.common import ensure_processed_workbook, write_sheets
+from api_transition.processors.reference_data import normalize_prefixed_person_names
 
 
 DEFAULT_CHTD_PTM_INPUT = (
@@ -77,22 +79,6 @@ def _strip_html_tags(value):
     return text.strip()
 
 
-def _normalize_person_name(value):
-    if pd.isna(value):
-        return None
-
-    text = str(value).strip()
-    if not text:
-        return None
-
-    if "-" in text:
-        text = text.split("-", 1)[1].strip()
-
-    text = re.sub(r"\([^)]*\)", "", text)
-    text = re.sub(r"\s+", " ", text)
-    return text.lower().title()
-
-
 def _extract_employee_code(value):
     if pd.isna(value):
         return None
@@ -106,7 +92,7 @@ def _extract_employee_code(value):
 
 def _prepare_cau_hinh_summary_df(input_path):
     raw_path = _resolve_path(input_path)
-    df = pd.read_excel(raw_path).copy()
+    df = read_excel(raw_path).copy()
     df.columns = [str(col).strip() for col in df.columns]
     df = df.rename(columns=SUMMARY_RENAME_MAP)
 
@@ -133,11 +119,11 @@ def _prepare_cau_hinh_summary_df(input_path):
 
 def _prepare_cau_hinh_detail_df(input_path):
     raw_path = _resolve_path(input_path)
-    df = pd.read_excel(raw_path).copy()
+    df = read_excel(raw_path).copy()
     df.columns = [str(col).strip() for col in df.columns]
 
     df["Mã nhân viên"] = df["Nhân viên phụ trách"].apply(_extract_employee_code)
-    df["NVKT"] = df["Nhân viên phụ trách"].apply(_normalize_person_name)
+    df["NVKT"] = normalize_prefixed_person_names(df["Nhân viên phụ trách"])
     df["Trang thái chuẩn hóa"] = df["Trang thái"].fillna("Chưa có trạng thái").astype(str).str.strip()
     df["Loại hợp đồng"] = df["Loại hợp đồng"].fillna("").astype(str).str.strip()
     df["Loại cấu hình"] = df["Loại cấu hình"].fillna("").astype(str).str.strip()
@@ -215,9 +201,14 @@ def process_cau_hinh_tu_dong_ptm_api_output(
     """Xu ly bao cao cau hinh tu dong PTM va ghi vao file processed."""
     raw_path, df_clean, df_ttvt, df_to = _prepare_cau_hinh_summary_df(input_path)
     processed_path = ensure_processed_workbook(raw_path, overwrite=overwrite_processed)
-    append_or_replace_sheet(processed_path, "du_lieu_sach", df_clean)
-    append_or_replace_sheet(processed_path, "tong_hop_ttvt", df_ttvt)
-    append_or_replace_sheet(processed_path, "tong_hop_to", df_to)
+    write_sheets(
+        processed_path,
+        {
+            "du_lieu_sach": df_clean,
+            "tong_hop_ttvt": df_ttvt,
+            "tong_hop_to": df_to,
+        },
+    )
     return processed_path
 
 
@@ -228,9 +219,14 @@ def process_cau_hinh_tu_dong_thay_the_api_output(
     """Xu ly bao cao cau hinh tu dong thay the va ghi vao file processed."""
     raw_path, df_clean, df_ttvt, df_to = _prepare_cau_hinh_summary_df(input_path)
     processed_path = ensure_processed_workbook(raw_path, overwrite=overwrite_processed)
-    append_or_replace_sheet(processed_path, "du_lieu_sach", df_clean)
-    append_or_replace_sheet(processed_path, "tong_hop_ttvt", df_ttvt)
-    append_or_replace_sheet(processed_path, "tong_hop_to", df_to)
+    write_sheets(
+        processed_path,
+        {
+            "du_lieu_sach": df_clean,
+            "tong_hop_ttvt": df_ttvt,
+            "tong_hop_to": df_to,
+        },
+    )
     return processed_path
 
 
@@ -251,8 +247,13 @@ def process_cau_hinh_tu_dong_chi_tiet_api_output(
     df_errors = _build_error_summary(df_detail)
 
     processed_path = ensure_processed_workbook(raw_path, overwrite=overwrite_processed)
-    append_or_replace_sheet(processed_path, "chi_tiet", df_detail)
-    append_or_replace_sheet(processed_path, "th_theo_to", df_team)
-    append_or_replace_sheet(processed_path, "th_theo_nvkt", df_nvkt)
-    append_or_replace_sheet(processed_path, "tong_hop_loi", df_errors)
+    write_sheets(
+        processed_path,
+        {
+            "chi_tiet": df_detail,
+            "th_theo_to": df_team,
+            "th_theo_nvkt": df_nvkt,
+            "tong_hop_loi": df_errors,
+        },
+    )
     return processed_path
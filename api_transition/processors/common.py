@@ -1,10 +1,14 @@
 # -*- coding: utf-8 -*-
 """Helper chung cho luong xu ly file trong api_transition."""
 
+from datetime import date, datetime, time
 from pathlib import Path
 import shutil
 
 import pandas as pd
+from openpyxl import Workbook, load_workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Alignment, Border, Font, Side
 
 
 API_TRANSITION_DIR = Path(__file__).resolve().parent.parent
@@ -119,3 +123,189 @@ def append_or_replace_sheet(workbook_path, sheet_name, df):
         df.to_excel(writer, sheet_name=sheet_name, index=False)
 
     return workbook_path
+
+
+DEFAULT_SHEET_NAMES = ("Sheet", "Sheet1")
+
+# Style header giong pandas.io.formats.excel.ExcelFormatter.header_style
+_HEADER_FONT = Font(bold=True)
+_HEADER_BORDER = Border(
+    left=Side(style="thin"),
+    right=Side(style="thin"),
+    top=Side(style="thin"),
+    bottom=Side(style="thin"),
+)
+_HEADER_ALIGNMENT = Alignment(horizontal="center", vertical="top")
+_DATETIME_NUMBER_FORMAT = "YYYY-MM-DD HH:MM:SS"
+
+
+def _excel_value(value):
+    """Chuyen gia tri pandas/numpy sang kieu openpyxl ghi duoc (NaN/NaT -> o trong)."""
+    if value is None:
+        return None
+    if isinstance(value, (str, bool, int, float, datetime, date, time)):
+        if isinstance(value, float) and value != value:
+            return None
+        return value
+    if value is pd.NaT:
+        return None
+    if isinstance(value, pd.Timestamp):
+        return value.to_pydatetime()
+    if isinstance(value, pd.Timedelta):
+        return value.to_pytimedelta()
+    try:
+        if pd.isna(value):
+            return None
+    except (TypeError, ValueError):
+        pass
+    if hasattr(value, "item"):
+        return value.item()
+    return str(value)
+
+
+def _is_empty_default_sheet(worksheet):
+    return (
+        worksheet.title in DEFAULT_SHEET_NAMES
+        and worksheet.max_row == 1
+        and worksheet.max_column == 1
+        and worksheet["A1"].value is None
+    )
+
+
+class ProcessedWorkbookWriter:
+    """Gom nhieu DataFrame cua 1 workbook processed va ghi trong 1 lan.
+
+    ``append_or_replace_sheet`` mo/parse/serialise lai ca workbook (kem sheet
+    raw) cho moi sheet; writer nay chi lam viec do 1 lan cho tat ca sheet:
+
+    - neu workbook con sheet can giu (vd. sheet raw do
+      ``ensure_processed_workbook`` copy sang), workbook duoc load 1 lan, cac
+      sheet trung ten duoc thay tai dung vi tri cu, sheet moi them vao cuoi,
+      roi save 1 lan;
+    - neu khong con sheet nao can giu (workbook moi, hoac moi sheet deu bi ghi
+      de), workbook duoc ghi lai bang openpyxl write-only, stream tung dong.
+
+    Dung nhu context manager; workbook chi duoc ghi khi khoi ``with`` khong loi::
+
+        with ProcessedWorkbookWriter(processed_path) as writer:
+            writer.add_sheet("Data", df)
+            writer.add_sheet("tong_hop", df_summary)
+    """
+
+    def __init__(self, workbook_path, drop_empty_default_sheet=False):
+        self.workbook_path = Path(workbook_path).expanduser().resolve()
+        self.drop_empty_default_sheet = drop_empty_default_sheet
+        self._sheets = {}
+
+    def add_sheet(self, sheet_name, df):
+        if not isinstance(df, pd.DataFrame):
+            raise TypeError("df phai la pandas.DataFrame")
+        # Ghi de trong cung 1 batch giu vi tri lan add dau tien, nhu goi
+        # append_or_replace_sheet 2 lan lien tiep.
+        self._sheets[sheet_name] = df
+        return self
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.write()
+        return False
+
+    def _existing_sheets(self):
+        """Tra ve [(ten sheet, can giu?)] theo thu tu hien co trong workbook."""
+        if not self.workbook_path.exists():
+            return []
+        workbook = load_workbook(self.workbook_path, read_only=True)
+        try:
+            existing = []
+            for worksheet in workbook.worksheets:
+                keep = worksheet.title not in self._sheets
+                if keep and self.drop_empty_default_sheet and worksheet.title in DEFAULT_SHEET_NAMES:
+                    worksheet.reset_dimensions()
+                    keep = any(
+                        value is not None
+                        for row in worksheet.iter_rows(max_row=2, values_only=True)
+                        for value in row
+                    )
+                existing.append((worksheet.title, keep))
+            return existing
+        finally:
+            workbook.close()
+
+    def write(self):
+        """Ghi cac sheet da gom vao workbook va tra ve path workbook."""
+        if not self._sheets:
+            return self.workbook_path
+        self.workbook_path.parent.mkdir(parents=True, exist_ok=True)
+        existing = self._existing_sheets()
+        if any(keep for _, keep in existing):
+            self._write_in_place()
+        else:
+            # Sheet da co giu vi tri cu nhu if_sheet_exists="replace", sheet moi o cuoi.
+            order = [name for name, _ in existing if name in self._sheets]
+            order += [name for name in self._sheets if name not in order]
+            self._write_streaming(order)
+        return self.workbook_path
+
+    def _write_in_place(self):
+        with pd.ExcelWriter(
+            self.workbook_path,
+            engine="openpyxl",
+            mode="a",
+            if_sheet_exists="replace",
+        ) as writer:
+            for sheet_name, df in self._sheets.items():
+                df.to_excel(writer, sheet_name=sheet_name, index=False)
+            if self.drop_empty_default_sheet and len(writer.book.sheetnames) > 1:
+                for worksheet in list(writer.book.worksheets):
+                    if worksheet.title not in self._sheets and _is_empty_default_sheet(worksheet):
+                        writer.book.remove(worksheet)
+
+    def _write_streaming(self, sheet_order):
+        workbook = Workbook(write_only=True)
+        for sheet_name in sheet_order:
+            df = self._sheets[sheet_name]
+            worksheet = workbook.create_sheet(title=sheet_name)
+            header = []
+            for column in df.columns:
+                cell = WriteOnlyCell(worksheet, value=_excel_value(column))
+                cell.font = _HEADER_FONT
+                cell.border = _HEADER_BORDER
+                cell.alignment = _HEADER_ALIGNMENT
+                header.append(cell)
+            worksheet.append(header)
+            datetime_positions = {
+                position
+                for position, dtype in enumerate(df.dtypes)
+                if pd.api.types.is_datetime64_any_dtype(dtype)
+            }
+            for row in df.itertuples(index=False, name=None):
+                values = [_excel_value(value) for value in row]
+                for position in datetime_positions:
+                    if values[position] is not None:
+                        cell = WriteOnlyCell(worksheet, value=values[position])
+                        cell.number_format = _DATETIME_NUMBER_FORMAT
+                        values[position] = cell
+                worksheet.append(values)
+
+        tmp_path = self.workbook_path.with_name(f".{self.workbook_path.name}.tmp")
+        try:
+            workbook.save(tmp_path)
+            tmp_path.replace(self.workbook_path)
+        finally:
+            if tmp_path.exists():
+                tmp_path.unlink()
+
+
+def write_sheets(workbook_path, sheets, drop_empty_default_sheet=False):
+    """Ghi nhieu sheet vao workbook processed trong 1 lan.
+
+    ``sheets`` la dict (giu thu tu) hoac list cap ``(sheet_name, df)``.
+    """
+    items = sheets.items() if isinstance(sheets, dict) else sheets
+    writer = ProcessedWorkbookWriter(workbook_path, drop_empty_default_sheet=drop_empty_default_sheet)
+    for sheet_name, df in items:
+        writer.add_sheet(sheet_name, df)
+    return writer.write()
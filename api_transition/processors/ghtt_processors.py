@@ -2,11 +2,12 @@
 """Processors cho nhom GHTT trong api_transition."""
 
 from pathlib import Path
-import re
 
 import pandas as pd
 
+from api_transition.excel_cache import read_excel
 from api_transition.processors.common import append_or_replace_sheet, ensure_processed_workbook
+from api_transition.processors.reference_data import donvi_lookup, normalize_person_names
 
 
 DEFAULT_DSNV_FILE = Path.cwd() / "dsnv.xlsx"
@@ -27,30 +28,6 @@ def _resolve_path(input_path):
     return path
 
 
-def _normalize_person_name(name):
-    if pd.isna(name):
-        return None
-    name = str(name).strip()
-    if not name:
-        return None
-    name = re.sub(r"\s+", " ", name)
-    return name.lower().title()
-
-
-def _build_donvi_lookup(dsnv_file):
-    dsnv_path = _resolve_path(dsnv_file)
-    df_dsnv = pd.read_excel(dsnv_path)
-    df_dsnv.columns = [str(col).strip() for col in df_dsnv.columns]
-    if "Họ tên" not in df_dsnv.columns or "đơn vị" not in df_dsnv.columns:
-        raise ValueError("File dsnv.xlsx phai co cot 'Họ tên' va 'đơn vị'")
-    return dict(
-        zip(
-            df_dsnv["Họ tên"].apply(_normalize_person_name),
-            df_dsnv["đơn vị"].astype(str).str.strip(),
-        )
-    )
-
-
 def _format_percent_value(value):
     if pd.isna(value):
         return ""
@@ -67,7 +44,7 @@ def _format_percent_value(value):
 
 def _prepare_ghtt_summary_df(input_path, *, keep_ttvt=True):
     raw_path = _resolve_path(input_path)
-    df_raw = pd.read_excel(raw_path, header=None, skiprows=2, usecols=range(12), dtype=object)
+    df_raw = read_excel(raw_path, header=None, skiprows=2, usecols=range(12), dtype=object)
     df_raw = df_raw.dropna(how="all").reset_index(drop=True)
     if df_raw.shape[1] < 12:
         raise ValueError(f"Bao cao GHTT khong du cot de xu ly: {raw_path}")
@@ -148,13 +125,13 @@ def process_ghtt_nvktdb_api_output(
     raw_path, df = _prepare_ghtt_summary_df(input_path, keep_ttvt=True)
 
     df = df.rename(columns={"Đơn vị": "NVKT raw"})
-    df["NVKT"] = df["NVKT raw"].apply(
-        lambda x: _normalize_person_name(
-            str(x).split("-", 1)[1].strip() if isinstance(x, str) and "-" in x else x
-        )
+    nvkt_raw = df["NVKT raw"].astype(object)
+    has_prefix = nvkt_raw.str.contains("-", regex=False, na=False)
+    df["NVKT"] = normalize_person_names(
+        nvkt_raw.where(~has_prefix, nvkt_raw.str.split("-", n=1).str[1].str.strip())
     )
 
-    lookup = _build_donvi_lookup(dsnv_file)
+    lookup = donvi_lookup(dsnv_file)
     df["Đơn vị"] = df["NVKT"].map(lookup)
 
     df = df[
@@ -0,0 +1,401 @@
+# -*- coding: utf-8 -*-
+"""Luu lich su I1.5 dang doan ngay (interval) thay cho snapshot day du moi ngay.
+
+Che do ``snapshot`` (mac dinh) ghi 1 dong ``i15_snapshots`` cho moi account moi
+ngay. Che do ``interval`` ghi:
+
+- ``i15_snapshot_intervals``: 1 dong cho moi doan ngay lien tiep (theo lich) ma
+  account xuat hien voi cung thong tin mo ta (ten, dia chi, doi, NVKT, SA, OLT,
+  port, thiet bi, ket cuoi, trang thai). Doi thong tin => mo doan moi.
+- ``i15_rx_readings``: gia tri OLT_RX/ONU_RX theo ngay (chi dong co gia tri),
+  vi so do nay thay doi hang ngay.
+- ``i15_report_days``: cac ngay da nap, lam lich cho view tai tao snapshot.
+
+View ``v_i15_snapshots_interval`` tra ve dung cac cot cua ``i15_snapshots``
+(tru ``id``) cho moi ngay da nap. Che do luu trong ``i15_history_meta`` theo
+tung k_suffix (khoa ``storage:K1``...), khoa ``storage`` la mac dinh cho ca DB;
+chuyen DB cu sang interval bang::
+
+    python -m api_transition.processors.i15_interval_store migrate --db report_history.db
+"""
+
+from __future__ import annotations
+
+import argparse
+import sqlite3
+import sys
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import pandas as pd
+
+if __package__ in (None, ""):
+    sys.path.insert(0, str(Path(__file__).resolve().parent.parent.parent))
+
+
+STORAGE_SNAPSHOT = "snapshot"
+STORAGE_INTERVAL = "interval"
+STORAGE_MODES = (STORAGE_SNAPSHOT, STORAGE_INTERVAL)
+
+# Thu tu cot mo ta trong khoa doan (sau account_cts)
+INTERVAL_ATTR_COLUMNS = (
+    "ten_tb_one",
+    "dt_onediachi_one",
+    "doi_one",
+    "nvkt_db",
+    "nvkt_db_normalized",
+    "sa",
+    "olt_cts",
+    "port_cts",
+    "thietbi",
+    "ketcuoi",
+    "trangthai_tb",
+)
+_KEY_COLUMNS = ("account_cts",) + INTERVAL_ATTR_COLUMNS
+
+INTERVAL_SCHEMA_SQL = f"""
+CREATE TABLE IF NOT EXISTS i15_history_meta (
+    khoa TEXT PRIMARY KEY,
+    gia_tri TEXT
+);
+
+CREATE TABLE IF NOT EXISTS i15_snapshot_intervals (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    k_suffix TEXT NOT NULL,
+    account_cts TEXT NOT NULL,
+    ngay_bat_dau DATE NOT NULL,
+    ngay_ket_thuc DATE NOT NULL,
+    {", ".join(f"{column} TEXT" for column in INTERVAL_ATTR_COLUMNS)}
+);
+
+CREATE TABLE IF NOT EXISTS i15_rx_readings (
+    k_suffix TEXT NOT NULL,
+    ngay_bao_cao DATE NOT NULL,
+    account_cts TEXT NOT NULL,
+    olt_rx REAL,
+    onu_rx REAL,
+    PRIMARY KEY (k_suffix, ngay_bao_cao, account_cts)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS i15_report_days (
+    k_suffix TEXT NOT NULL,
+    ngay_bao_cao DATE NOT NULL,
+    so_thue_bao INTEGER NOT NULL DEFAULT 0,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (k_suffix, ngay_bao_cao)
+);
+
+CREATE INDEX IF NOT EXISTS idx_i15_intervals_variant_end
+    ON i15_snapshot_intervals(k_suffix, ngay_ket_thuc, ngay_bat_dau);
+CREATE INDEX IF NOT EXISTS idx_i15_intervals_account
+    ON i15_snapshot_intervals(k_suffix, account_cts);
+
+CREATE VIEW IF NOT EXISTS v_i15_snapshots_interval AS
+SELECT
+    d.k_suffix,
+    d.ngay_bao_cao,
+    i.account_cts,
+    {", ".join(f"i.{column}" for column in INTERVAL_ATTR_COLUMNS)},
+    rx.olt_rx,
+    rx.onu_rx,
+    d.created_at
+FROM i15_report_days d
+JOIN i15_snapshot_intervals i
+    ON i.k_suffix = d.k_suffix
+   AND i.ngay_ket_thuc >= d.ngay_bao_cao
+   AND i.ngay_bat_dau <= d.ngay_bao_cao
+LEFT JOIN i15_rx_readings rx
+    ON rx.k_suffix = d.k_suffix
+   AND rx.ngay_bao_cao = d.ngay_bao_cao
+   AND rx.account_cts = i.account_cts;
+"""
+
+
+def ensure_interval_schema(conn: sqlite3.Connection) -> None:
+    conn.executescript(INTERVAL_SCHEMA_SQL)
+
+
+def _storage_key(k_suffix: Optional[str]) -> str:
+    return "storage" if k_suffix is None else f"storage:{k_suffix}"
+
+
+def get_storage_mode(conn: sqlite3.Connection, k_suffix: Optional[str] = None) -> str:
+    """Che do luu cua ``k_suffix`` (chua dat rieng thi theo mac dinh cua DB)."""
+    keys = [_storage_key(None)] if k_suffix is None else [_storage_key(k_suffix), _storage_key(None)]
+    try:
+        for key in keys:
+            row = conn.execute("SELECT gia_tri FROM i15_history_meta WHERE khoa = ?", (key,)).fetchone()
+            if row and row[0] in STORAGE_MODES:
+                return row[0]
+    except sqlite3.OperationalError:
+        pass
+    return STORAGE_SNAPSHOT
+
+
+def set_storage_mode(conn: sqlite3.Connection, mode: str, k_suffix: Optional[str] = None) -> None:
+    """Dat che do luu cho ``k_suffix``; ``k_suffix=None`` dat mac dinh cho ca DB."""
+    if mode not in STORAGE_MODES:
+        raise ValueError(f"Che do luu I1.5 khong hop le: {mode} (chi nhan {', '.join(STORAGE_MODES)})")
+    conn.execute(
+        """
+        INSERT INTO i15_history_meta (khoa, gia_tri) VALUES (?, ?)
+        ON CONFLICT (khoa) DO UPDATE SET gia_tri = excluded.gia_tri
+        """,
+        (_storage_key(k_suffix), mode),
+    )
+
+
+def snapshot_source(conn: sqlite3.Connection, k_suffix: Optional[str] = None) -> str:
+    """Ten bang/view chua snapshot theo ngay cua ``k_suffix`` (cung bo cot voi i15_snapshots)."""
+    return "v_i15_snapshots_interval" if get_storage_mode(conn, k_suffix) == STORAGE_INTERVAL else "i15_snapshots"
+
+
+def _shift_day(day: str, offset_days: int) -> str:
+    return (pd.Timestamp(day) + pd.Timedelta(days=offset_days)).strftime("%Y-%m-%d")
+
+
+def write_interval_day(
+    conn: sqlite3.Connection,
+    k_suffix: str,
+    report_date: str,
+    rows: Iterable[Sequence[Any]],
+) -> int:
+    """Thay du lieu ngay ``report_date`` bang ``rows`` (account_cts, 11 cot mo ta, olt_rx, onu_rx).
+
+    Chi doc/ghi cac doan cham toi ngay do (chua ngay do, ket thuc hom truoc, bat dau
+    hom sau) nen chi phi ti le voi so account quanh ngay do, khong phu thuoc do dai
+    lich su. Ghi lai 1 ngay da nap (force update) cung dung duoc. Khong commit.
+    """
+    prev_date = _shift_day(report_date, -1)
+    next_date = _shift_day(report_date, 1)
+
+    present: List[Tuple[Any, ...]] = []
+    readings: List[Tuple[Any, ...]] = []
+    for row in rows:
+        key = tuple(row[: len(_KEY_COLUMNS)])
+        olt_rx, onu_rx = row[len(_KEY_COLUMNS)], row[len(_KEY_COLUMNS) + 1]
+        present.append(key)
+        if olt_rx is not None or onu_rx is not None:
+            readings.append((k_suffix, report_date, key[0], olt_rx, onu_rx))
+
+    touching = conn.execute(
+        f"""
+        SELECT id, {", ".join(_KEY_COLUMNS)}, ngay_bat_dau, ngay_ket_thuc
+        FROM i15_snapshot_intervals
+        WHERE k_suffix = ? AND ngay_ket_thuc >= ? AND ngay_bat_dau <= ?
+        """,
+        (k_suffix, prev_date, next_date),
+    ).fetchall()
+
+    # Bo ngay report_date khoi cac doan cu, giu lai phan truoc/sau de noi voi du lieu moi
+    ends_before: Dict[Tuple[Any, ...], str] = {}
+    starts_after: Dict[Tuple[Any, ...], str] = {}
+    for _, *key, start, end in touching:
+        key = tuple(key)
+        if start <= prev_date:
+            ends_before[key] = start
+        if end >= next_date:
+            starts_after[key] = end
+
+    new_intervals = []
+    for key in present:
+        start = ends_before.pop(key, report_date)
+        end = starts_after.pop(key, report_date)
+        new_intervals.append((k_suffix, *key, start, end))
+    new_intervals.extend((k_suffix, *key, start, prev_date) for key, start in ends_before.items())
+    new_intervals.extend((k_suffix, *key, next_date, end) for key, end in starts_after.items())
+
+    conn.executemany("DELETE FROM i15_snapshot_intervals WHERE id = ?", [(row[0],) for row in touching])
+    conn.executemany(
+        f"""
+        INSERT INTO i15_snapshot_intervals (k_suffix, {", ".join(_KEY_COLUMNS)}, ngay_bat_dau, ngay_ket_thuc)
+        VALUES ({", ".join("?" for _ in range(len(_KEY_COLUMNS) + 3))})
+        """,
+        new_intervals,
+    )
+
+    conn.execute("DELETE FROM i15_rx_readings WHERE k_suffix = ? AND ngay_bao_cao = ?", (k_suffix, report_date))
+    conn.executemany(
+        "INSERT INTO i15_rx_readings (k_suffix, ngay_bao_cao, account_cts, olt_rx, onu_rx) VALUES (?, ?, ?, ?, ?)",
+        readings,
+    )
+
+    if present:
+        conn.execute(
+            """
+            INSERT INTO i15_report_days (k_suffix, ngay_bao_cao, so_thue_bao) VALUES (?, ?, ?)
+            ON CONFLICT (k_suffix, ngay_bao_cao) DO UPDATE SET
+                so_thue_bao = excluded.so_thue_bao,
+                created_at = CURRENT_TIMESTAMP
+            """,
+            (k_suffix, report_date, len(present)),
+        )
+    else:
+        conn.execute("DELETE FROM i15_report_days WHERE k_suffix = ? AND ngay_bao_cao = ?", (k_suffix, report_date))
+    return len(present)
+
+
+def migrate_snapshots_to_intervals(
+    conn: sqlite3.Connection,
+    k_suffixes: Optional[Sequence[str]] = None,
+    drop_snapshots: bool = False,
+) -> Dict[str, int]:
+    """Chuyen i15_snapshots sang dang interval (gaps-and-islands) va bat che do interval
+    cho tung k_suffix da chuyen (k_suffix khac giu nguyen che do cu).
+
+    ``drop_snapshots=True`` xoa cac dong snapshot da chuyen (nen VACUUM sau do).
+    Khong commit.
+    """
+    ensure_interval_schema(conn)
+    if k_suffixes is None:
+        k_suffixes = [row[0] for row in conn.execute("SELECT DISTINCT k_suffix FROM i15_snapshots ORDER BY k_suffix")]
+
+    counts = {"intervals": 0, "rx_readings": 0, "report_days": 0, "snapshots": 0}
+    key_sql = ", ".join(_KEY_COLUMNS)
+    for k_suffix in k_suffixes:
+        params = (k_suffix,)
+        for table in ("i15_snapshot_intervals", "i15_rx_readings", "i15_report_days"):
+            conn.execute(f"DELETE FROM {table} WHERE k_suffix = ?", params)
+
+        # Ngay lien tiep cung thong tin => julianday - ROW_NUMBER khong doi
+        counts["intervals"] += conn.execute(
+            f"""
+            INSERT INTO i15_snapshot_intervals (k_suffix, {key_sql}, ngay_bat_dau, ngay_ket_thuc)
+            WITH islands AS (
+                SELECT
+                    {key_sql},
+                    ngay_bao_cao,
+                    julianday(ngay_bao_cao) - ROW_NUMBER() OVER (
+                        PARTITION BY {key_sql}
+                        ORDER BY ngay_bao_cao
+                    ) AS island
+                FROM i15_snapshots
+                WHERE k_suffix = ?
+            )
+            SELECT ?, {key_sql}, MIN(ngay_bao_cao), MAX(ngay_bao_cao)
+            FROM islands
+            GROUP BY {key_sql}, island
+            """,
+            (k_suffix, k_suffix),
+        ).rowcount
+        counts["rx_readings"] += conn.execute(
+            """
+            INSERT INTO i15_rx_readings (k_suffix, ngay_bao_cao, account_cts, olt_rx, onu_rx)
+            SELECT k_suffix, ngay_bao_cao, account_cts, olt_rx, onu_rx
+            FROM i15_snapshots
+            WHERE k_suffix = ? AND (olt_rx IS NOT NULL OR onu_rx IS NOT NULL)
+            """,
+            params,
+        ).rowcount
+        counts["report_days"] += conn.execute(
+            """
+            INSERT INTO i15_report_days (k_suffix, ngay_bao_cao, so_thue_bao, created_at)
+            SELECT k_suffix, ngay_bao_cao, COUNT(*), MAX(created_at)
+            FROM i15_snapshots
+            WHERE k_suffix = ?
+            GROUP BY k_suffix, ngay_bao_cao
+            """,
+            params,
+        ).rowcount
+        if drop_snapshots:
+            counts["snapshots"] += conn.execute("DELETE FROM i15_snapshots WHERE k_suffix = ?", params).rowcount
+        set_storage_mode(conn, STORAGE_INTERVAL, k_suffix)
+
+    return counts
+
+
+def verify_intervals(conn: sqlite3.Connection, k_suffix: str) -> List[str]:
+    """Cac ngay ma view interval khac i15_snapshots (bo qua id/created_at)."""
+    columns = ", ".join(("account_cts",) + INTERVAL_ATTR_COLUMNS + ("olt_rx", "onu_rx"))
+    days = [
+        row[0]
+        for row in conn.execute(
+            "SELECT DISTINCT ngay_bao_cao FROM i15_snapshots WHERE k_suffix = ? ORDER BY ngay_bao_cao",
+            (k_suffix,),
+        )
+    ]
+    mismatched = []
+    for day in days:
+        params = (k_suffix, day)
+        expected = conn.execute(
+            f"SELECT {columns} FROM i15_snapshots WHERE k_suffix = ? AND ngay_bao_cao = ? ORDER BY account_cts",
+            params,
+        ).fetchall()
+        actual = conn.execute(
+            f"SELECT {columns} FROM v_i15_snapshots_interval WHERE k_suffix = ? AND ngay_bao_cao = ? ORDER BY account_cts",
+            params,
+        ).fetchall()
+        if expected != actual:
+            mismatched.append(day)
+    return mismatched
+
+
+def parse_args(argv: Sequence[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Quan ly che do luu lich su I1.5 dang interval")
+    parser.add_argument("command", choices=("status", "migrate", "verify"))
+    parser.add_argument("--db", required=True, help="Duong dan report_history.db")
+    parser.add_argument("--k-suffix", action="append", dest="k_suffixes", help="Chi xu ly K1/K2 (lap lai duoc)")
+    parser.add_argument("--drop-snapshots", action="store_true", help="Xoa i15_snapshots da chuyen va VACUUM")
+    return parser.parse_args(argv)
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    args = parse_args(argv)
+    db_path = Path(args.db)
+    if not db_path.exists():
+        raise FileNotFoundError(f"Khong tim thay DB: {db_path}")
+
+    conn = sqlite3.connect(db_path)
+    try:
+        ensure_interval_schema(conn)
+        if args.command == "status":
+            print(f"Che do luu I1.5 (mac dinh): {get_storage_mode(conn)}")
+            for (k_suffix,) in conn.execute(
+                "SELECT k_suffix FROM i15_snapshots UNION SELECT k_suffix FROM i15_report_days"
+            ).fetchall():
+                print(f"  {k_suffix}: {get_storage_mode(conn, k_suffix)}")
+            for table in ("i15_snapshots", "i15_snapshot_intervals", "i15_rx_readings", "i15_report_days"):
+                try:
+                    total = conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+                except sqlite3.OperationalError:
+                    total = 0
+                print(f"  {table}: {total:,} dong")
+            return 0
+
+        if args.command == "migrate":
+            suffixes = args.k_suffixes or [row[0] for row in conn.execute("SELECT DISTINCT k_suffix FROM i15_snapshots")]
+            counts = migrate_snapshots_to_intervals(conn, suffixes)
+            if args.drop_snapshots:
+                # Chi xoa snapshot goc khi view interval tai tao dung tung ngay
+                for k_suffix in suffixes:
+                    mismatched = verify_intervals(conn, k_suffix)
+                    if mismatched:
+                        conn.rollback()
+                        print(f"Interval {k_suffix} lech {len(mismatched)} ngay (vd {mismatched[0]}), giu nguyen snapshot")
+                        return 2
+                placeholders = ", ".join("?" for _ in suffixes)
+                counts["snapshots"] = conn.execute(
+                    f"DELETE FROM i15_snapshots WHERE k_suffix IN ({placeholders})", list(suffixes)
+                ).rowcount
+            conn.commit()
+            if args.drop_snapshots:
+                conn.execute("VACUUM")
+            print(
+                f"Da chuyen sang interval: {counts['intervals']:,} doan, {counts['rx_readings']:,} so do RX, "
+                f"{counts['report_days']:,} ngay; xoa {counts['snapshots']:,} dong snapshot"
+            )
+            return 0
+
+        suffixes = args.k_suffixes or [row[0] for row in conn.execute("SELECT DISTINCT k_suffix FROM i15_snapshots")]
+        failed = False
+        for k_suffix in suffixes:
+            mismatched = verify_intervals(conn, k_suffix)
+            print(f"{k_suffix}: {'khop' if not mismatched else f'lech {len(mismatched)} ngay (vd {mismatched[0]})'}")
+            failed = failed or bool(mismatched)
+        return 1 if failed else 0
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
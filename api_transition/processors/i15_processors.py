@@ -6,15 +6,25 @@ from __future__ import annotations
 import sqlite3
 from pathlib import Path
 import re
-from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+from typing import Any, Iterable, List, Optional, Sequence, Tuple
 
 import pandas as pd
 
+from api_transition.excel_cache import read_excel
 from api_transition.processors.common import (
     DOWNLOADS_DIR,
-    append_or_replace_sheet,
+    ProcessedWorkbookWriter,
     ensure_processed_workbook,
+    write_sheets,
 )
+from api_transition.processors.i15_interval_store import (
+    STORAGE_INTERVAL,
+    ensure_interval_schema,
+    get_storage_mode,
+    snapshot_source,
+    write_interval_day,
+)
+from api_transition.processors.reference_data import get_subscriber_directory
 
 
 API_TRANSITION_DIR = Path(__file__).resolve().parent.parent
@@ -90,36 +100,11 @@ def _safe_numeric(series: pd.Series) -> pd.Series:
 
 
 def _read_danhba_tables(dsnv_db_path: Path) -> tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame]:
-    if not dsnv_db_path.exists():
-        return pd.DataFrame(), pd.DataFrame(), pd.DataFrame()
-
-    try:
-        conn = sqlite3.connect(dsnv_db_path)
-        try:
-            df_danhba = pd.read_sql_query(
-                "SELECT MA_TB, THIETBI, SA, KETCUOI, DOI_VT, NVKT FROM danhba",
-                conn,
-            )
-        except Exception:
-            df_danhba = pd.DataFrame()
-        try:
-            df_thong_ke = pd.read_sql_query(
-                "SELECT DOI_VT, NVKT, so_thue_bao_pon_qly FROM thong_ke",
-                conn,
-            )
-        except Exception:
-            df_thong_ke = pd.DataFrame()
-        try:
-            df_thong_ke_dv = pd.read_sql_query(
-                "SELECT don_vi, so_thue_bao_pon_qly FROM thong_ke_theo_don_vi",
-                conn,
-            )
-        except Exception:
-            df_thong_ke_dv = pd.DataFrame()
-        conn.close()
-        return df_danhba, df_thong_ke, df_thong_ke_dv
-    except Exception:
+    """(danhba index theo MA_TB, thong_ke, thong_ke_theo_don_vi) tu cache du lieu tham chieu."""
+    directory = get_subscriber_directory(dsnv_db_path)
+    if directory is None:
         return pd.DataFrame(), pd.DataFrame(), pd.DataFrame()
+    return directory.by_ma_tb, directory.thong_ke.copy(), directory.thong_ke_theo_don_vi.copy()
 
 
 def _derive_report_date(df: pd.DataFrame) -> str:
@@ -219,6 +204,7 @@ def _ensure_history_schema(conn: sqlite3.Connection) -> None:
         CREATE INDEX IF NOT EXISTS idx_i15_daily_summary_variant_date ON i15_daily_summary(k_suffix, ngay_bao_cao);
         """
     )
+    ensure_interval_schema(conn)
 
 
 def _history_date(report_date: str, offset_days: int) -> str:
@@ -229,13 +215,15 @@ def _load_previous_snapshot(
     conn: sqlite3.Connection,
     k_suffix: str,
     report_date: str,
+    account_col: str = "ACCOUNT_CTS",
 ) -> pd.DataFrame:
+    """Snapshot ngay truoc, doi ten cot ve dang cot cua bao cao (DOI_ONE, ACCOUNT_CTS/MA_TB...)."""
     prev_date = _history_date(report_date, -1)
     try:
-        return pd.read_sql_query(
-            """
+        prev_snapshot = pd.read_sql_query(
+            f"""
             SELECT *
-            FROM i15_snapshots
+            FROM {snapshot_source(conn, k_suffix)}
             WHERE k_suffix = ? AND ngay_bao_cao = ?
             """,
             conn,
@@ -243,21 +231,8 @@ def _load_previous_snapshot(
         )
     except Exception:
         return pd.DataFrame()
-
-
-def _load_tracking(conn: sqlite3.Connection, k_suffix: str) -> pd.DataFrame:
-    try:
-        return pd.read_sql_query(
-            """
-            SELECT *
-            FROM i15_tracking
-            WHERE k_suffix = ?
-            """,
-            conn,
-            params=(k_suffix,),
-        )
-    except Exception:
-        return pd.DataFrame()
+    prev_snapshot = prev_snapshot.rename(columns={column: column.upper() for column in prev_snapshot.columns})
+    return prev_snapshot.rename(columns={"ACCOUNT_CTS": account_col})
 
 
 def _delete_history_rows(conn: sqlite3.Connection, k_suffix: str, report_date: str) -> None:
@@ -266,246 +241,316 @@ def _delete_history_rows(conn: sqlite3.Connection, k_suffix: str, report_date: s
     conn.execute("DELETE FROM i15_daily_summary WHERE k_suffix = ? AND ngay_bao_cao = ?", (k_suffix, report_date))
 
 
+def _normalize_text_series(df: pd.DataFrame, column: str) -> List[Optional[str]]:
+    """_normalize_text cho ca cot; cot khong ton tai -> toan None."""
+    if column not in df.columns:
+        return [None] * len(df.index)
+    series = df[column]
+    text = series.astype(str).str.strip()
+    return text.astype(object).where(series.notna() & text.ne(""), None).tolist()
+
+
+def _column_or(df: pd.DataFrame, column: str, fallback: str) -> pd.Series:
+    """Tuong duong ``row.get(column) or row.get(fallback)`` cho ca cot."""
+    missing = pd.Series([None] * len(df.index), index=df.index, dtype=object)
+    primary = df[column] if column in df.columns else missing
+    secondary = df[fallback] if fallback in df.columns else missing
+    return primary.where(primary.map(bool), secondary)
+
+
+def _raw_values(df: pd.DataFrame, column: str) -> List[Any]:
+    if column not in df.columns:
+        return [None] * len(df.index)
+    series = df[column]
+    return series.astype(object).where(series.notna(), None).tolist()
+
+
+_I15_TEMP_TABLES = ("_i15_today", "_i15_first", "_i15_prev", "_i15_delta", "_i15_thong_ke")
+_I15_TODAY_COLUMNS = (
+    "account_cts",
+    "ten_tb_one",
+    "dt_onediachi_one",
+    "doi_one",
+    "nvkt_db",
+    "nvkt_db_normalized",
+    "sa",
+    "olt_cts",
+    "port_cts",
+    "thietbi",
+    "ketcuoi",
+    "trangthai_tb",
+    "olt_rx",
+    "onu_rx",
+)
+
+
+def _load_today_temp_tables(
+    conn: sqlite3.Connection,
+    df: pd.DataFrame,
+    account_col: str,
+    df_thong_ke: pd.DataFrame,
+) -> None:
+    for table in _I15_TEMP_TABLES:
+        conn.execute(f"DROP TABLE IF EXISTS temp.{table}")
+    conn.execute(
+        f"""
+        CREATE TEMP TABLE _i15_today (
+            ord INTEGER PRIMARY KEY,
+            {", ".join(f"{column} {'REAL' if column.endswith('_rx') else 'TEXT'}" for column in _I15_TODAY_COLUMNS)}
+        )
+        """
+    )
+    dt_one = _column_or(df, "DT_ONEDIACHI_ONE", "DT_ONE").to_frame("v")
+    olt = _column_or(df, "OLT_CTS", "OLT_RX").to_frame("v")
+    columns = [
+        _normalize_text_series(df, account_col),
+        _normalize_text_series(df, "TEN_TB_ONE"),
+        _normalize_text_series(dt_one, "v"),
+        _normalize_text_series(df, "DOI_ONE"),
+        _normalize_text_series(df, "NVKT_DB"),
+        _normalize_text_series(df, "NVKT_DB_NORMALIZED"),
+        _normalize_text_series(df, "SA"),
+        _normalize_text_series(olt, "v"),
+        _normalize_text_series(df, "PORT_CTS"),
+        _normalize_text_series(df, "THIETBI"),
+        _normalize_text_series(df, "KETCUOI"),
+        _normalize_text_series(df, "TRANGTHAI_TB"),
+        _raw_values(df, "OLT_RX"),
+        _raw_values(df, "ONU_RX"),
+    ]
+    placeholders = ", ".join("?" for _ in range(len(_I15_TODAY_COLUMNS) + 1))
+    conn.executemany(
+        f"INSERT INTO _i15_today (ord, {', '.join(_I15_TODAY_COLUMNS)}) VALUES ({placeholders})",
+        zip(range(len(df.index)), *columns),
+    )
+
+    # Dong dau tien cua moi account (tracking/bien dong lay thong tin tu dong nay)
+    conn.executescript(
+        """
+        CREATE TEMP TABLE _i15_first AS
+        SELECT t.*
+        FROM _i15_today t
+        JOIN (
+            SELECT MIN(ord) AS ord
+            FROM _i15_today
+            WHERE account_cts IS NOT NULL
+            GROUP BY account_cts
+        ) f ON f.ord = t.ord;
+        CREATE UNIQUE INDEX temp._i15_first_account ON _i15_first(account_cts);
+        CREATE TEMP TABLE _i15_delta (
+            account_cts TEXT PRIMARY KEY,
+            loai_bien_dong TEXT NOT NULL
+        );
+        CREATE TEMP TABLE _i15_thong_ke (
+            doi_one TEXT,
+            nvkt_db_normalized TEXT,
+            so_tb_quan_ly INTEGER
+        );
+        """
+    )
+
+    if not df_thong_ke.empty:
+        thong_ke = df_thong_ke.copy()
+        thong_ke["DOI_VT"] = _normalize_text_series(thong_ke, "DOI_VT")
+        thong_ke["NVKT"] = _normalize_text_series(thong_ke, "NVKT")
+        thong_ke = thong_ke.drop_duplicates(subset=["DOI_VT", "NVKT"], keep="first")
+        so_tb = pd.to_numeric(thong_ke["so_thue_bao_pon_qly"], errors="coerce")
+        conn.executemany(
+            "INSERT INTO _i15_thong_ke (doi_one, nvkt_db_normalized, so_tb_quan_ly) VALUES (?, ?, ?)",
+            zip(
+                thong_ke["DOI_VT"].tolist(),
+                thong_ke["NVKT"].tolist(),
+                [None if pd.isna(value) else int(value) for value in so_tb.tolist()],
+            ),
+        )
+
+
 def _upsert_history(
     conn: sqlite3.Connection,
     k_suffix: str,
     report_date: str,
     df: pd.DataFrame,
     account_col: str,
-    prev_snapshot: pd.DataFrame,
     df_thong_ke: pd.DataFrame,
 ) -> None:
+    """Ghi lich su I1.5 theo tap: nap snapshot hom nay vao bang tam roi join voi ngay truoc.
+
+    - i15_snapshots (hoac i15_snapshot_intervals neu DB o che do interval):
+      1 dong/account (dong cuoi cung neu trung account)
+    - i15_daily_changes: TANG_MOI/GIAM_HET/VAN_CON, so_ngay_lien_tuc lay tu tracking truoc khi cap nhat
+    - i15_tracking: upsert ``ON CONFLICT DO UPDATE`` (TANG_MOI=1, VAN_CON=+1, GIAM_HET giu nguyen)
+    - i15_daily_summary: tong hop theo DOI_ONE + NVKT_DB_NORMALIZED
+    """
+    prev_date = _history_date(report_date, -1)
     _delete_history_rows(conn, k_suffix, report_date)
+    _load_today_temp_tables(conn, df, account_col, df_thong_ke)
+    conn.create_function("i15_round", 2, round, deterministic=True)
+
+    day_params = {"k_suffix": k_suffix, "report_date": report_date, "prev_date": prev_date}
 
-    prev_accounts = set(
-        prev_snapshot[account_col].dropna().astype(str).str.strip().tolist()
-    ) if not prev_snapshot.empty and account_col in prev_snapshot.columns else set()
-    today_accounts = set(df[account_col].dropna().astype(str).str.strip().tolist())
-
-    tang_moi = today_accounts - prev_accounts
-    giam_het = prev_accounts - today_accounts
-    van_con = today_accounts & prev_accounts
-
-    tracking_df = _load_tracking(conn, k_suffix)
-    tracking_map: Dict[str, Dict[str, Any]] = {}
-    for _, row in tracking_df.iterrows():
-        tracking_map[str(row["account_cts"])]= row.to_dict()
-
-    # Snapshot hiện tại
-    for _, row in df.iterrows():
-        account = _normalize_text(row.get(account_col))
-        if not account:
-            continue
+    # Snapshot ngay truoc doc 1 lan (tu bang snapshot hoac view interval) truoc khi ghi hom nay
+    conn.execute(
+        f"""
+        CREATE TEMP TABLE _i15_prev AS
+        SELECT *
+        FROM {snapshot_source(conn, k_suffix)}
+        WHERE k_suffix = :k_suffix AND ngay_bao_cao = :prev_date
+        """,
+        day_params,
+    )
+    conn.execute("CREATE UNIQUE INDEX temp._i15_prev_account ON _i15_prev(account_cts)")
+
+    last_rows_sql = """
+        SELECT
+            t.account_cts, t.ten_tb_one, t.dt_onediachi_one,
+            t.doi_one, t.nvkt_db, t.nvkt_db_normalized, t.sa, t.olt_cts, t.port_cts,
+            t.thietbi, t.ketcuoi, t.trangthai_tb, t.olt_rx, t.onu_rx
+        FROM _i15_today t
+        JOIN (
+            SELECT MAX(ord) AS ord
+            FROM _i15_today
+            WHERE account_cts IS NOT NULL
+            GROUP BY account_cts
+        ) last_row ON last_row.ord = t.ord
+    """
+    if get_storage_mode(conn, k_suffix) == STORAGE_INTERVAL:
+        write_interval_day(conn, k_suffix, report_date, conn.execute(last_rows_sql).fetchall())
+    else:
         conn.execute(
-            """
-            INSERT OR REPLACE INTO i15_snapshots (
+            f"""
+            INSERT INTO i15_snapshots (
                 k_suffix, ngay_bao_cao, account_cts, ten_tb_one, dt_onediachi_one,
                 doi_one, nvkt_db, nvkt_db_normalized, sa, olt_cts, port_cts,
                 thietbi, ketcuoi, trangthai_tb, olt_rx, onu_rx
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            )
+            SELECT :k_suffix, :report_date, last.*
+            FROM ({last_rows_sql}) last
             """,
-            (
-                k_suffix,
-                report_date,
-                account,
-                _normalize_text(row.get("TEN_TB_ONE")),
-                _normalize_text(row.get("DT_ONEDIACHI_ONE") or row.get("DT_ONE")),
-                _normalize_text(row.get("DOI_ONE")),
-                _normalize_text(row.get("NVKT_DB")),
-                _normalize_text(row.get("NVKT_DB_NORMALIZED")),
-                _normalize_text(row.get("SA")),
-                _normalize_text(row.get("OLT_CTS") or row.get("OLT_RX")),
-                _normalize_text(row.get("PORT_CTS")),
-                _normalize_text(row.get("THIETBI")),
-                _normalize_text(row.get("KETCUOI")),
-                _normalize_text(row.get("TRANGTHAI_TB")),
-                row.get("OLT_RX"),
-                row.get("ONU_RX"),
-            ),
+            day_params,
         )
 
-    # Tracking cập nhật cho hôm nay
-    def upsert_tracking(account: str, row: pd.Series, status: str, so_ngay: int) -> None:
-        existing = tracking_map.get(account)
-        first_date = existing.get("ngay_xuat_hien_dau_tien") if existing else report_date
-        if not first_date:
-            first_date = report_date
+    conn.execute(
+        """
+        INSERT INTO _i15_delta (account_cts, loai_bien_dong)
+        SELECT f.account_cts, CASE WHEN p.account_cts IS NULL THEN 'TANG_MOI' ELSE 'VAN_CON' END
+        FROM _i15_first f
+        LEFT JOIN _i15_prev p ON p.account_cts = f.account_cts
+        """,
+        day_params,
+    )
+    conn.execute(
+        """
+        INSERT INTO _i15_delta (account_cts, loai_bien_dong)
+        SELECT p.account_cts, 'GIAM_HET'
+        FROM _i15_prev p
+        LEFT JOIN _i15_first f ON f.account_cts = p.account_cts
+        WHERE f.account_cts IS NULL
+        """,
+        day_params,
+    )
+
+    # Bien dong trong ngay: so_ngay_lien_tuc la gia tri tracking truoc khi cap nhat
+    changes_sql = """
+        INSERT OR REPLACE INTO i15_daily_changes (
+            k_suffix, ngay_bao_cao, account_cts, loai_bien_dong,
+            doi_one, nvkt_db, nvkt_db_normalized, sa, so_ngay_lien_tuc,
+            ten_tb_one, dt_onediachi_one, olt_cts, port_cts, thietbi, ketcuoi
+        )
+        SELECT
+            :k_suffix, :report_date, d.account_cts, d.loai_bien_dong,
+            src.doi_one, src.nvkt_db, src.nvkt_db_normalized, src.sa, COALESCE(tr.so_ngay_lien_tuc, 1),
+            src.ten_tb_one, src.dt_onediachi_one, src.olt_cts, src.port_cts, src.thietbi, src.ketcuoi
+        FROM _i15_delta d
+        JOIN {source} src ON src.account_cts = d.account_cts
+        LEFT JOIN i15_tracking tr ON tr.k_suffix = :k_suffix AND tr.account_cts = d.account_cts
+        WHERE d.loai_bien_dong IN ({loai})
+    """
+    conn.execute(changes_sql.format(source="_i15_first", loai="'TANG_MOI', 'VAN_CON'"), day_params)
+    conn.execute(changes_sql.format(source="_i15_prev", loai="'GIAM_HET'"), day_params)
+
+    tracking_select = """
+        SELECT
+            :k_suffix, src.account_cts, :report_date, :report_date, {so_ngay},
+            src.doi_one, src.nvkt_db, src.nvkt_db_normalized, src.sa, '{trang_thai}'
+        FROM _i15_delta d
+        JOIN {source} src ON src.account_cts = d.account_cts
+        WHERE d.loai_bien_dong = '{loai}'
+        ON CONFLICT (k_suffix, account_cts) DO UPDATE SET
+            ngay_xuat_hien_dau_tien = COALESCE(NULLIF(i15_tracking.ngay_xuat_hien_dau_tien, ''), excluded.ngay_xuat_hien_dau_tien),
+            ngay_thay_cuoi_cung = excluded.ngay_thay_cuoi_cung,
+            so_ngay_lien_tuc = {so_ngay_update},
+            doi_one = excluded.doi_one,
+            nvkt_db = excluded.nvkt_db,
+            nvkt_db_normalized = excluded.nvkt_db_normalized,
+            sa = excluded.sa,
+            trang_thai = excluded.trang_thai,
+            updated_at = CURRENT_TIMESTAMP
+    """
+    tracking_rules = (
+        ("TANG_MOI", "_i15_first", "1", "1", "DANG_SUY_HAO"),
+        ("VAN_CON", "_i15_first", "2", "COALESCE(i15_tracking.so_ngay_lien_tuc, 1) + 1", "DANG_SUY_HAO"),
+        ("GIAM_HET", "_i15_prev", "1", "COALESCE(i15_tracking.so_ngay_lien_tuc, 1)", "DA_HET_SUY_HAO"),
+    )
+    for loai, source, so_ngay, so_ngay_update, trang_thai in tracking_rules:
         conn.execute(
             """
-            INSERT OR REPLACE INTO i15_tracking (
+            INSERT INTO i15_tracking (
                 k_suffix, account_cts, ngay_xuat_hien_dau_tien, ngay_thay_cuoi_cung,
                 so_ngay_lien_tuc, doi_one, nvkt_db, nvkt_db_normalized, sa, trang_thai
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """,
-            (
-                k_suffix,
-                account,
-                first_date,
-                report_date,
-                so_ngay,
-                _normalize_text(row.get("DOI_ONE")),
-                _normalize_text(row.get("NVKT_DB")),
-                _normalize_text(row.get("NVKT_DB_NORMALIZED")),
-                _normalize_text(row.get("SA")),
-                status,
+            )
+            """
+            + tracking_select.format(
+                loai=loai,
+                source=source,
+                so_ngay=so_ngay,
+                so_ngay_update=so_ngay_update,
+                trang_thai=trang_thai,
             ),
+            day_params,
         )
 
-    for account in tang_moi:
-        row = df[df[account_col].astype(str).str.strip() == account].iloc[0]
-        upsert_tracking(account, row, "DANG_SUY_HAO", 1)
-
-    for account in van_con:
-        row = df[df[account_col].astype(str).str.strip() == account].iloc[0]
-        existing = tracking_map.get(account)
-        so_ngay = int(existing.get("so_ngay_lien_tuc", 1)) + 1 if existing else 2
-        upsert_tracking(account, row, "DANG_SUY_HAO", so_ngay)
-
-    for account in giam_het:
-        if not prev_snapshot.empty and account_col in prev_snapshot.columns:
-            prev_row = prev_snapshot[prev_snapshot[account_col].astype(str).str.strip() == account]
-            if prev_row.empty:
-                continue
-            row = prev_row.iloc[0]
-        else:
-            continue
-        existing = tracking_map.get(account)
-        so_ngay = int(existing.get("so_ngay_lien_tuc", 1)) if existing else 1
-        upsert_tracking(account, row, "DA_HET_SUY_HAO", so_ngay)
-
-    def save_changes(records: pd.DataFrame, loai: str, source_df: pd.DataFrame, source_col: str) -> None:
-        if records.empty:
-            return
-        for account in records[source_col].dropna().astype(str).str.strip().unique():
-            if not account:
-                continue
-            if source_df.empty:
-                continue
-            match = source_df[source_df[source_col].astype(str).str.strip() == account]
-            if match.empty:
-                continue
-            row = match.iloc[0]
-            existing = tracking_map.get(account, {})
-            conn.execute(
-                """
-                INSERT OR REPLACE INTO i15_daily_changes (
-                    k_suffix, ngay_bao_cao, account_cts, loai_bien_dong,
-                    doi_one, nvkt_db, nvkt_db_normalized, sa, so_ngay_lien_tuc,
-                    ten_tb_one, dt_onediachi_one, olt_cts, port_cts, thietbi, ketcuoi
-                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                """,
-                (
-                    k_suffix,
-                    report_date,
-                    account,
-                    loai,
-                    _normalize_text(row.get("DOI_ONE")),
-                    _normalize_text(row.get("NVKT_DB")),
-                    _normalize_text(row.get("NVKT_DB_NORMALIZED")),
-                    _normalize_text(row.get("SA")),
-                    int(existing.get("so_ngay_lien_tuc", 1)) if existing else 1,
-                    _normalize_text(row.get("TEN_TB_ONE")),
-                    _normalize_text(row.get("DT_ONEDIACHI_ONE") or row.get("DT_ONE")),
-                    _normalize_text(row.get("OLT_CTS") or row.get("OLT_RX")),
-                    _normalize_text(row.get("PORT_CTS")),
-                    _normalize_text(row.get("THIETBI")),
-                    _normalize_text(row.get("KETCUOI")),
-                ),
-            )
-
-    save_changes(df[df[account_col].astype(str).str.strip().isin(tang_moi)], "TANG_MOI", df, account_col)
-    if not prev_snapshot.empty and account_col in prev_snapshot.columns:
-        save_changes(prev_snapshot[prev_snapshot[account_col].astype(str).str.strip().isin(giam_het)], "GIAM_HET", prev_snapshot, account_col)
-    save_changes(df[df[account_col].astype(str).str.strip().isin(van_con)], "VAN_CON", df, account_col)
-
-    # Tổng hợp lịch sử theo đơn vị và NVKT
-    group_cols = ["DOI_ONE", "NVKT_DB_NORMALIZED"]
-    curr_summary = (
-        df.assign(
-            _account=df[account_col].astype(str).str.strip(),
-            _is_tang=df[account_col].astype(str).str.strip().isin(tang_moi).astype(int),
-            _is_van=df[account_col].astype(str).str.strip().isin(van_con).astype(int),
-        )
-        .groupby(group_cols, dropna=False, as_index=False)
-        .agg(
-            tong_so_hien_tai=("_account", "size"),
-            so_tang_moi=("_is_tang", "sum"),
-            so_van_con=("_is_van", "sum"),
+    # Tong hop lich su theo don vi va NVKT (chi cac nhom co TB hom nay)
+    conn.execute(
+        """
+        INSERT INTO i15_daily_summary (
+            k_suffix, ngay_bao_cao, doi_one, nvkt_db_normalized,
+            tong_so_hien_tai, so_tang_moi, so_giam_het, so_van_con,
+            so_tb_quan_ly, ty_le_shc
         )
+        SELECT
+            :k_suffix, :report_date, g.doi_one, g.nvkt_db_normalized,
+            g.tong_so_hien_tai, g.so_tang_moi, COALESCE(gh.so_giam_het, 0), g.so_van_con,
+            COALESCE(tk.so_tb_quan_ly, 0),
+            CASE
+                WHEN COALESCE(tk.so_tb_quan_ly, 0) != 0
+                THEN i15_round(CAST(g.tong_so_hien_tai AS REAL) / tk.so_tb_quan_ly * 100, 2)
+                ELSE 0.0
+            END
+        FROM (
+            SELECT
+                t.doi_one,
+                t.nvkt_db_normalized,
+                COUNT(*) AS tong_so_hien_tai,
+                SUM(CASE WHEN d.loai_bien_dong = 'TANG_MOI' THEN 1 ELSE 0 END) AS so_tang_moi,
+                SUM(CASE WHEN d.loai_bien_dong = 'VAN_CON' THEN 1 ELSE 0 END) AS so_van_con
+            FROM _i15_today t
+            LEFT JOIN _i15_delta d ON d.account_cts = t.account_cts
+            GROUP BY t.doi_one, t.nvkt_db_normalized
+        ) g
+        LEFT JOIN (
+            SELECT p.doi_one, p.nvkt_db_normalized, COUNT(*) AS so_giam_het
+            FROM _i15_prev p
+            JOIN _i15_delta d ON d.account_cts = p.account_cts AND d.loai_bien_dong = 'GIAM_HET'
+            GROUP BY p.doi_one, p.nvkt_db_normalized
+        ) gh ON gh.doi_one IS g.doi_one AND gh.nvkt_db_normalized IS g.nvkt_db_normalized
+        LEFT JOIN _i15_thong_ke tk
+            ON tk.doi_one IS g.doi_one AND tk.nvkt_db_normalized IS g.nvkt_db_normalized
+        """,
+        day_params,
     )
-    curr_summary["so_giam_het"] = 0
-    prev_summary = pd.DataFrame()
-    if not prev_snapshot.empty and account_col in prev_snapshot.columns:
-        prev_summary = (
-            prev_snapshot.assign(
-                _account=prev_snapshot[account_col].astype(str).str.strip(),
-            )
-            .groupby(group_cols, dropna=False, as_index=False)
-            .agg(so_giam_het=("_account", "size"))
-        )
-    if not prev_summary.empty:
-        curr_summary = curr_summary.merge(prev_summary, on=group_cols, how="left", suffixes=("", "_prev"))
-        curr_summary["so_giam_het"] = curr_summary["so_giam_het_prev"].fillna(0).astype(int)
-        curr_summary = curr_summary.drop(columns=["so_giam_het_prev"])
-
-    if not curr_summary.empty:
-        curr_summary["doi_one"] = curr_summary["DOI_ONE"]
-        curr_summary["nvkt_db_normalized"] = curr_summary["NVKT_DB_NORMALIZED"]
-        curr_summary["k_suffix"] = k_suffix
-        curr_summary["ngay_bao_cao"] = report_date
-        curr_summary["so_tb_quan_ly"] = 0
-        curr_summary["ty_le_shc"] = 0.0
-
-        if not df_thong_ke.empty:
-            thong_ke = df_thong_ke.rename(
-                columns={
-                    "DOI_VT": "DOI_ONE",
-                    "NVKT": "NVKT_DB_NORMALIZED",
-                    "so_thue_bao_pon_qly": "so_tb_quan_ly",
-                }
-            )
-            curr_summary = curr_summary.merge(
-                thong_ke[["DOI_ONE", "NVKT_DB_NORMALIZED", "so_tb_quan_ly"]],
-                on=["DOI_ONE", "NVKT_DB_NORMALIZED"],
-                how="left",
-                suffixes=("", "_ref"),
-            )
-            if "so_tb_quan_ly_ref" in curr_summary.columns:
-                curr_summary["so_tb_quan_ly"] = curr_summary["so_tb_quan_ly_ref"].fillna(curr_summary["so_tb_quan_ly"])
-                curr_summary = curr_summary.drop(columns=["so_tb_quan_ly_ref"])
-
-        curr_summary["so_tb_quan_ly"] = pd.to_numeric(curr_summary["so_tb_quan_ly"], errors="coerce").fillna(0).astype(int)
-        curr_summary["ty_le_shc"] = curr_summary.apply(
-            lambda row: round(row["tong_so_hien_tai"] / row["so_tb_quan_ly"] * 100, 2) if row["so_tb_quan_ly"] else 0.0,
-            axis=1,
-        )
 
-    conn.execute(
-        "DELETE FROM i15_daily_summary WHERE k_suffix = ? AND ngay_bao_cao = ?",
-        (k_suffix, report_date),
-    )
-    for _, row in curr_summary.iterrows():
-        conn.execute(
-            """
-            INSERT INTO i15_daily_summary (
-                k_suffix, ngay_bao_cao, doi_one, nvkt_db_normalized,
-                tong_so_hien_tai, so_tang_moi, so_giam_het, so_van_con,
-                so_tb_quan_ly, ty_le_shc
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """,
-            (
-                k_suffix,
-                report_date,
-                _normalize_text(row.get("DOI_ONE")),
-                _normalize_text(row.get("NVKT_DB_NORMALIZED")),
-                int(row.get("tong_so_hien_tai", 0) or 0),
-                int(row.get("so_tang_moi", 0) or 0),
-                int(row.get("so_giam_het", 0) or 0),
-                int(row.get("so_van_con", 0) or 0),
-                int(row.get("so_tb_quan_ly", 0) or 0),
-                float(row.get("ty_le_shc", 0) or 0),
-            ),
-        )
+    for table in _I15_TEMP_TABLES:
+        conn.execute(f"DROP TABLE IF EXISTS temp.{table}")
 
 
 def _build_today_summary(
@@ -678,42 +723,43 @@ def _write_workbook(
 ) -> Path:
     processed_path = ensure_processed_workbook(raw_path, overwrite=overwrite_processed)
 
-    append_or_replace_sheet(processed_path, "Sheet1", add_tt_column(df_work))
-    append_or_replace_sheet(processed_path, "TH_SHC_I15", add_tt_column(result_df))
-    append_or_replace_sheet(processed_path, "TH_SHC_theo_to", add_tt_column(by_to_df))
-    append_or_replace_sheet(processed_path, "shc_theo_SA", add_tt_column(sa_df) if not sa_df.empty else sa_df)
-    append_or_replace_sheet(processed_path, "Bien_dong_tong_hop", add_tt_column(change_df) if not change_df.empty else change_df)
+    with ProcessedWorkbookWriter(processed_path) as writer:
+        writer.add_sheet("Sheet1", add_tt_column(df_work))
+        writer.add_sheet("TH_SHC_I15", add_tt_column(result_df))
+        writer.add_sheet("TH_SHC_theo_to", add_tt_column(by_to_df))
+        writer.add_sheet("shc_theo_SA", add_tt_column(sa_df) if not sa_df.empty else sa_df)
+        writer.add_sheet("Bien_dong_tong_hop", add_tt_column(change_df) if not change_df.empty else change_df)
 
-    if not tang_df.empty:
-        append_or_replace_sheet(processed_path, "Tang_moi", add_tt_column(tang_df))
-    else:
-        append_or_replace_sheet(processed_path, "Tang_moi", tang_df)
-    if not giam_df.empty:
-        giam_out = giam_df.copy()
-        if "so_ngay_lien_tuc" in giam_out.columns:
-            giam_out = giam_out.rename(columns={"so_ngay_lien_tuc": "Số ngày suy hao"})
-        append_or_replace_sheet(processed_path, "Giam_het", add_tt_column(giam_out))
-    else:
-        append_or_replace_sheet(processed_path, "Giam_het", giam_df)
-    if not van_df.empty:
-        van_out = van_df.copy()
-        if "so_ngay_lien_tuc" in van_out.columns:
-            van_out = van_out.rename(columns={"so_ngay_lien_tuc": "Số ngày liên tục"})
-        append_or_replace_sheet(processed_path, "Van_con", add_tt_column(van_out))
-    else:
-        append_or_replace_sheet(processed_path, "Van_con", van_df)
-
-    nvkt_col = "NVKT_DB_NORMALIZED"
-    if nvkt_col in df_work.columns:
-        for nvkt in sorted(df_work[nvkt_col].dropna().astype(str).str.strip().unique()):
-            nvkt_df = df_work[df_work[nvkt_col].astype(str).str.strip() == nvkt].copy()
-            if "SA" in nvkt_df.columns:
-                nvkt_df = nvkt_df.sort_values(by="SA", kind="stable").reset_index(drop=True)
-            sheet_name = nvkt[:31]
-            detail_df = _build_detail_sheet(nvkt_df)
-            if nvkt_col in detail_df.columns:
-                detail_df = detail_df.drop(columns=[nvkt_col])
-            append_or_replace_sheet(processed_path, sheet_name, add_tt_column(detail_df))
+        if not tang_df.empty:
+            writer.add_sheet("Tang_moi", add_tt_column(tang_df))
+        else:
+            writer.add_sheet("Tang_moi", tang_df)
+        if not giam_df.empty:
+            giam_out = giam_df.copy()
+            if "so_ngay_lien_tuc" in giam_out.columns:
+                giam_out = giam_out.rename(columns={"so_ngay_lien_tuc": "Số ngày suy hao"})
+            writer.add_sheet("Giam_het", add_tt_column(giam_out))
+        else:
+            writer.add_sheet("Giam_het", giam_df)
+        if not van_df.empty:
+            van_out = van_df.copy()
+            if "so_ngay_lien_tuc" in van_out.columns:
+                van_out = van_out.rename(columns={"so_ngay_lien_tuc": "Số ngày liên tục"})
+            writer.add_sheet("Van_con", add_tt_column(van_out))
+        else:
+            writer.add_sheet("Van_con", van_df)
+
+        nvkt_col = "NVKT_DB_NORMALIZED"
+        if nvkt_col in df_work.columns:
+            for nvkt in sorted(df_work[nvkt_col].dropna().astype(str).str.strip().unique()):
+                nvkt_df = df_work[df_work[nvkt_col].astype(str).str.strip() == nvkt].copy()
+                if "SA" in nvkt_df.columns:
+                    nvkt_df = nvkt_df.sort_values(by="SA", kind="stable").reset_index(drop=True)
+                sheet_name = nvkt[:31]
+                detail_df = _build_detail_sheet(nvkt_df)
+                if nvkt_col in detail_df.columns:
+                    detail_df = detail_df.drop(columns=[nvkt_col])
+                writer.add_sheet(sheet_name, add_tt_column(detail_df))
 
     return processed_path
 
@@ -727,11 +773,16 @@ def _process_i15_generic(
     overwrite_processed: bool = False,
 ) -> Path:
     raw_path = _resolve_path(input_path)
-    df = pd.read_excel(raw_path)
+    df = read_excel(raw_path)
     if df.empty:
         processed_path = ensure_processed_workbook(raw_path, overwrite=overwrite_processed)
-        for sheet in ("TH_SHC_I15", "TH_SHC_theo_to", "shc_theo_SA", "Bien_dong_tong_hop", "Tang_moi", "Giam_het", "Van_con"):
-            append_or_replace_sheet(processed_path, sheet, pd.DataFrame())
+        write_sheets(
+            processed_path,
+            [
+                (sheet, pd.DataFrame())
+                for sheet in ("TH_SHC_I15", "TH_SHC_theo_to", "shc_theo_SA", "Bien_dong_tong_hop", "Tang_moi", "Giam_het", "Van_con")
+            ],
+        )
         return processed_path
 
     if "NVKT_DB" not in df.columns and "NVKT_DB_NORMALIZED" in df.columns:
@@ -755,11 +806,17 @@ def _process_i15_generic(
     else:
         df["NGAY_SUYHAO"] = pd.Timestamp(report_date).strftime("%d/%m/%Y")
 
-    df_danhba, df_thong_ke, df_thong_ke_dv = _read_danhba_tables(Path(dsnv_db_path))
-    if not df_danhba.empty and account_col in df.columns:
+    danhba_by_ma_tb, df_thong_ke, df_thong_ke_dv = _read_danhba_tables(Path(dsnv_db_path))
+    if not danhba_by_ma_tb.empty and account_col in df.columns:
         merge_key = "ACCOUNT_CTS" if "ACCOUNT_CTS" in df.columns else "MA_TB"
         if merge_key in df.columns:
-            df = df.merge(df_danhba, left_on=merge_key, right_on="MA_TB", how="left", suffixes=("", "_db"))
+            # Tra index MA_TB dung san thay cho merge (left join, giu thu tu dong)
+            keys = df[merge_key]
+            matched = danhba_by_ma_tb.reindex(keys.to_numpy())
+            if merge_key != "MA_TB":
+                matched.insert(0, "MA_TB", keys.where(keys.isin(danhba_by_ma_tb.index)).to_numpy())
+            for col in matched.columns:
+                df[f"{col}_db" if col in df.columns else col] = matched[col].to_numpy()
             for col in ("THIETBI", "SA", "KETCUOI", "DOI_VT", "NVKT"):
                 db_col = f"{col}_db"
                 if db_col in df.columns:
@@ -781,7 +838,7 @@ def _process_i15_generic(
         conn = sqlite3.connect(history_db)
         try:
             _ensure_history_schema(conn)
-            prev_snapshot = _load_previous_snapshot(conn, k_suffix, report_date)
+            prev_snapshot = _load_previous_snapshot(conn, k_suffix, report_date, account_col)
         finally:
             conn.close()
 
@@ -813,7 +870,7 @@ def _process_i15_generic(
         conn = sqlite3.connect(Path(history_db_path))
         try:
             _ensure_history_schema(conn)
-            _upsert_history(conn, k_suffix, report_date, df_work, account_col, prev_snapshot, df_thong_ke)
+            _upsert_history(conn, k_suffix, report_date, df_work, account_col, df_thong_ke)
             conn.commit()
         finally:
             conn.close()
@@ -2,15 +2,16 @@
 """Processors cho nhom KPI NVKT trong api_transition."""
 
 from pathlib import Path
-import re
 
 import pandas as pd
 
+from api_transition.excel_cache import read_excel
 from api_transition.processors.common import (
     DOWNLOADS_DIR,
     append_or_replace_sheet,
     ensure_processed_workbook,
 )
+from api_transition.processors.reference_data import donvi_lookup, normalize_person_name
 
 
 DEFAULT_DSNV_FILE = Path.cwd() / "dsnv.xlsx"
@@ -31,18 +32,6 @@ def _resolve_path(input_path):
     return path
 
 
-def _normalize_person_name(name):
-    if pd.isna(name):
-        return None
-
-    name = str(name).strip()
-    if not name:
-        return None
-
-    name = re.sub(r"\s+", " ", name)
-    return name.lower().title()
-
-
 def _extract_nvkt_from_unit_cell(raw_value):
     """Boc ten NVKT tu chuoi dang ma-ma-ten."""
     if pd.isna(raw_value):
@@ -56,22 +45,7 @@ def _extract_nvkt_from_unit_cell(raw_value):
     candidate = parts[-1].strip() if parts else raw_value
     if "(" in candidate:
         candidate = candidate.split("(")[0].strip()
-    return _normalize_person_name(candidate)
-
-
-def _build_donvi_lookup(dsnv_file):
-    dsnv_path = _resolve_path(dsnv_file)
-    df_dsnv = pd.read_excel(dsnv_path)
-    df_dsnv.columns = [str(col).strip() for col in df_dsnv.columns]
-
-    if "Họ tên" not in df_dsnv.columns or "đơn vị" not in df_dsnv.columns:
-        raise ValueError(
-            "File dsnv.xlsx phai co cac cot 'Họ tên' va 'đơn vị'"
-        )
-
-    normalized_names = df_dsnv["Họ tên"].apply(_normalize_person_name)
-    donvi_values = df_dsnv["đơn vị"].astype(str).str.strip()
-    return dict(zip(normalized_names, donvi_values))
+    return normalize_person_name(candidate)
 
 
 def _process_kpi_nvkt_report(
@@ -83,9 +57,9 @@ def _process_kpi_nvkt_report(
     overwrite_processed=False,
 ):
     raw_path = _resolve_path(input_path)
-    lookup = _build_donvi_lookup(dsnv_file)
+    lookup = donvi_lookup(dsnv_file)
 
-    df_raw = pd.read_excel(raw_path, header=[0, 1])
+    df_raw = read_excel(raw_path, header=[0, 1])
     col_donvi_raw = df_raw.iloc[:, 0]
     nvkt_series = col_donvi_raw.apply(_extract_nvkt_from_unit_cell)
 
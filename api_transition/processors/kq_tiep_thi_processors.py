@@ -2,12 +2,13 @@
 """Processors cho nhom Ket qua tiep thi trong api_transition."""
 
 from pathlib import Path
-import re
 
 import pandas as pd
 from openpyxl.styles import Alignment, Border, Font, Side
 
+from api_transition.excel_cache import read_excel
 from api_transition.processors.common import ensure_processed_workbook
+from api_transition.processors.reference_data import donvi_lookup, normalize_person_names
 
 
 DEFAULT_KQ_TIEP_THI_INPUT = (
@@ -28,18 +29,6 @@ def _resolve_path(input_path):
     return path
 
 
-def _normalize_person_name(name):
-    if pd.isna(name):
-        return None
-
-    name = str(name).strip()
-    if not name:
-        return None
-
-    name = re.sub(r"\s+", " ", name)
-    return name.lower().title()
-
-
 def _normalize_multiindex_columns(columns):
     normalized = []
     for level_1, level_2 in columns:
@@ -52,19 +41,6 @@ def _normalize_multiindex_columns(columns):
     return pd.MultiIndex.from_tuples(normalized)
 
 
-def _build_donvi_lookup(dsnv_file):
-    dsnv_path = _resolve_path(dsnv_file)
-    df_dsnv = pd.read_excel(dsnv_path)
-    df_dsnv.columns = [str(col).strip() for col in df_dsnv.columns]
-
-    if "Họ tên" not in df_dsnv.columns or "đơn vị" not in df_dsnv.columns:
-        raise ValueError("File dsnv.xlsx phai co cot 'Họ tên' va 'đơn vị'")
-
-    names = df_dsnv["Họ tên"].apply(_normalize_person_name)
-    units = df_dsnv["đơn vị"].astype(str).str.strip()
-    return dict(zip(names, units))
-
-
 def _get_required_column(df, level_1, level_2_contains):
     for col in df.columns:
         if str(col[0]).strip() == level_1 and level_2_contains in str(col[1]).strip():
@@ -121,7 +97,7 @@ def process_kq_tiep_thi_api_output(
 ):
     """Xu ly bao cao ket qua tiep thi va ghi 2 sheet vao file processed."""
     raw_path = _resolve_path(input_path)
-    df = pd.read_excel(raw_path, header=[0, 1])
+    df = read_excel(raw_path, header=[0, 1])
     df.columns = _normalize_multiindex_columns(df.columns)
 
     cols_to_drop = [
@@ -137,8 +113,8 @@ def process_kq_tiep_thi_api_output(
     brcd_month_col = _get_required_column(df_processed, "Dịch vụ BRCĐ", "Kết quả thực hiện trong tháng")
     mytv_month_col = _get_required_column(df_processed, "Dịch vụ MyTV", "Kết quả thực hiện trong tháng")
 
-    lookup = _build_donvi_lookup(dsnv_file)
-    units = df_processed[ten_nv_col].apply(_normalize_person_name).map(lookup).fillna("")
+    lookup = donvi_lookup(dsnv_file)
+    units = normalize_person_names(df_processed[ten_nv_col]).map(lookup).fillna("")
     df_processed.insert(1, ("Đơn vị", ""), units)
 
     df_processed[brcd_month_col] = pd.to_numeric(df_processed[brcd_month_col], errors="coerce").fillna(0)
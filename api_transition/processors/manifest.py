@@ -0,0 +1,210 @@
+# -*- coding: utf-8 -*-
+"""Manifest content-hash cho processor runner.
+
+Moi processor co 1 file JSON trong ``<processed_root>/../.processor_manifest/``
+ghi lai fingerprint cua lan chay thanh cong gan nhat: sha256 cac file raw dau
+vao, sha256 source module processor (kem cac module api_transition ma no import,
+vd common/excel_cache/reference_data) va tham so runtime. Neu fingerprint khong
+doi va workbook processed van con, runner bao cache hit va bo qua processor.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import inspect
+import json
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+# Tang khi doi cach tinh fingerprint de vo hieu hoa toan bo manifest cu.
+MANIFEST_VERSION = 2
+MANIFEST_DIR_NAME = ".processor_manifest"
+HASH_CHUNK_SIZE = 1024 * 1024
+# Chi module nam trong package nay moi duoc tinh vao fingerprint (bo qua pandas, openpyxl...).
+PACKAGE_ROOT = Path(__file__).resolve().parents[1]
+
+_SOURCE_HASH_CACHE: Dict[str, str] = {}
+
+
+def manifest_dir_for(processed_root: Path) -> Path:
+    """Thu muc manifest nam canh Processed/ (cung cap voi Processed)."""
+    return Path(processed_root).expanduser().resolve().parent / MANIFEST_DIR_NAME
+
+
+def file_sha256(path: Path) -> str:
+    digest = hashlib.sha256()
+    with Path(path).open("rb") as handle:
+        for chunk in iter(lambda: handle.read(HASH_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _package_source_file(module: Any) -> Optional[Path]:
+    source_file = getattr(module, "__file__", None)
+    if not source_file or not source_file.endswith(".py"):
+        return None
+    path = Path(source_file).resolve()
+    return path if PACKAGE_ROOT in path.parents else None
+
+
+def _local_source_files(module: Any) -> List[Path]:
+    """File source cua module va cac module trong package no import (de quy)."""
+    seen: Dict[str, Path] = {}
+    pending = [module]
+    while pending:
+        current = pending.pop()
+        path = _package_source_file(current)
+        if path is None or current.__name__ in seen:
+            continue
+        seen[current.__name__] = path
+        for value in vars(current).values():
+            if inspect.ismodule(value):
+                pending.append(value)
+            else:
+                imported = sys.modules.get(getattr(value, "__module__", None) or "")
+                if imported is not None:
+                    pending.append(imported)
+    return sorted(set(seen.values()))
+
+
+def _module_source_sha256(func: Any) -> str:
+    """sha256 source module processor + helper dung chung no import (dai dien cho 'processor version')."""
+    module = sys.modules.get(getattr(func, "__module__", None) or "")
+    source_files = _local_source_files(module) if module is not None else []
+    if not source_files:
+        return getattr(func, "__qualname__", repr(func))
+    digest = hashlib.sha256()
+    for source_file in source_files:
+        key = str(source_file)
+        if key not in _SOURCE_HASH_CACHE:
+            _SOURCE_HASH_CACHE[key] = file_sha256(source_file)
+        digest.update(f"{source_file.relative_to(PACKAGE_ROOT).as_posix()}:{_SOURCE_HASH_CACHE[key]}\n".encode("utf-8"))
+    return digest.hexdigest()
+
+
+def _normalise_param(value: Any) -> Any:
+    if isinstance(value, Path):
+        return str(value.expanduser().resolve())
+    if isinstance(value, dict):
+        return {str(key): _normalise_param(item) for key, item in sorted(value.items())}
+    if isinstance(value, (list, tuple)):
+        return [_normalise_param(item) for item in value]
+    if value is None or isinstance(value, (str, int, float, bool)):
+        return value
+    return repr(value)
+
+
+def build_fingerprint(
+    func: Any,
+    input_paths: Sequence[Path],
+    params: Dict[str, Any],
+) -> Optional[Dict[str, Any]]:
+    """Tinh fingerprint cho 1 lan chay. None neu thieu file input (khong cache duoc)."""
+    if not input_paths:
+        return None
+    inputs: Dict[str, str] = {}
+    for path in input_paths:
+        resolved = Path(path).expanduser().resolve()
+        if not resolved.is_file():
+            return None
+        inputs[str(resolved)] = file_sha256(resolved)
+    return {
+        "manifest_version": MANIFEST_VERSION,
+        "processor": f"{getattr(func, '__module__', '')}.{getattr(func, '__qualname__', '')}",
+        "processor_source_sha256": _module_source_sha256(func),
+        "inputs": inputs,
+        "params": _normalise_param(params),
+    }
+
+
+def iter_output_paths(value: Any) -> Iterable[Path]:
+    """Lay cac path .xlsx trong ket qua processor (Path/str/dict/list/tuple)."""
+    if isinstance(value, Path):
+        if value.suffix.lower() == ".xlsx":
+            yield value
+        return
+    if isinstance(value, str):
+        if value.lower().endswith(".xlsx"):
+            yield Path(value)
+        return
+    if isinstance(value, dict):
+        for item in value.values():
+            yield from iter_output_paths(item)
+        return
+    if isinstance(value, (list, tuple, set)):
+        for item in value:
+            yield from iter_output_paths(item)
+
+
+def _entry_path(manifest_dir: Path, task_name: str) -> Path:
+    return manifest_dir / f"{task_name}.json"
+
+
+def load_entry(manifest_dir: Path, task_name: str) -> Optional[Dict[str, Any]]:
+    path = _entry_path(manifest_dir, task_name)
+    try:
+        return json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+
+
+def lookup_cache_hit(
+    manifest_dir: Path,
+    task_name: str,
+    fingerprint: Optional[Dict[str, Any]],
+) -> Optional[Dict[str, Any]]:
+    """Tra ve entry manifest neu fingerprint trung va moi output van ton tai."""
+    if fingerprint is None:
+        return None
+    entry = load_entry(manifest_dir, task_name)
+    if not entry or entry.get("fingerprint") != fingerprint:
+        return None
+    outputs: List[str] = list(entry.get("outputs") or [])
+    if not outputs or not all(Path(item).exists() for item in outputs):
+        return None
+    return entry
+
+
+def save_entry(
+    manifest_dir: Path,
+    task_name: str,
+    fingerprint: Optional[Dict[str, Any]],
+    result: Any,
+    duration_seconds: float,
+) -> Optional[Path]:
+    """Ghi manifest sau khi processor chay thanh cong (atomic)."""
+    if fingerprint is None:
+        return None
+    outputs = sorted({str(Path(item).expanduser().resolve()) for item in iter_output_paths(result)})
+    if not outputs:
+        return None
+
+    manifest_dir.mkdir(parents=True, exist_ok=True)
+    record = {
+        "task": task_name,
+        "saved_at": time.time(),
+        "duration_seconds": round(duration_seconds, 3),
+        "fingerprint": fingerprint,
+        "outputs": outputs,
+    }
+    target = _entry_path(manifest_dir, task_name)
+    fd, tmp_name = tempfile.mkstemp(dir=manifest_dir, prefix=f".{task_name}-", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as handle:
+            json.dump(record, handle, ensure_ascii=False, indent=2)
+        os.replace(tmp_name, target)
+    finally:
+        if os.path.exists(tmp_name):
+            os.unlink(tmp_name)
+    return target
+
+
+def invalidate_entry(manifest_dir: Path, task_name: str) -> None:
+    try:
+        _entry_path(manifest_dir, task_name).unlink()
+    except FileNotFoundError:
+        pass
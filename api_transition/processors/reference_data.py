@@ -0,0 +1,239 @@
+# -*- coding: utf-8 -*-
+"""Du lieu tham chieu dung chung cho cac processor: dsnv.xlsx, danhba.db, chuan hoa ten NVKT.
+
+- dsnv.xlsx / danhba.db chi duoc doc 1 lan trong process, doc lai khi file doi
+  (size + mtime); cac processor dung chung index da dung san (ten -> don vi,
+  MA_TB -> dong danhba) thay vi moi processor tu doc va dung lai.
+- Chuan hoa ten dang vector (.str) tren cac gia tri khac nhau cua cot; ban scalar
+  duoc nho (lru_cache) cho cac ten lap lai.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from functools import lru_cache
+from pathlib import Path
+import re
+import sqlite3
+import threading
+from typing import Any, Dict, Optional, Tuple
+
+import pandas as pd
+
+from api_transition.excel_cache import read_excel
+
+
+_WHITESPACE_RE = re.compile(r"\s+")
+_PARENTHESES_RE = re.compile(r"\([^)]*\)")
+
+DANHBA_QUERIES = {
+    "danhba": "SELECT MA_TB, THIETBI, SA, KETCUOI, DOI_VT, NVKT FROM danhba",
+    "thong_ke": "SELECT DOI_VT, NVKT, so_thue_bao_pon_qly FROM thong_ke",
+    "thong_ke_theo_don_vi": "SELECT don_vi, so_thue_bao_pon_qly FROM thong_ke_theo_don_vi",
+}
+
+
+# =============================================================================
+# Chuan hoa ten NVKT
+# =============================================================================
+@lru_cache(maxsize=65536)
+def _normalize_name_text(text: str) -> Optional[str]:
+    text = text.strip()
+    if not text:
+        return None
+    return _WHITESPACE_RE.sub(" ", text).lower().title()
+
+
+@lru_cache(maxsize=65536)
+def _normalize_prefixed_name_text(text: str) -> Optional[str]:
+    text = text.strip()
+    if not text:
+        return None
+    if "-" in text:
+        text = text.split("-", 1)[1].strip()
+    text = _PARENTHESES_RE.sub("", text)
+    return _WHITESPACE_RE.sub(" ", text).lower().title()
+
+
+def normalize_person_name(value: Any) -> Optional[str]:
+    """Chuan hoa ten nguoi (khoang trang, hoa/thuong) de gom cac bien the ve 1 ten."""
+    if pd.isna(value):
+        return None
+    return _normalize_name_text(str(value))
+
+
+def normalize_prefixed_person_name(value: Any) -> Optional[str]:
+    """Nhu normalize_person_name nhung bo tien to 'ma-' va phan trong ngoac (dang 'VNPT-Ten (ghi chu)')."""
+    if pd.isna(value):
+        return None
+    return _normalize_prefixed_name_text(str(value))
+
+
+def _map_unique(values: pd.Series, normalize_unique) -> pd.Series:
+    """Chuan hoa tren cac gia tri khac nhau roi map lai theo vi tri (ten lap lai chi xu ly 1 lan)."""
+    codes, uniques = pd.factorize(values, use_na_sentinel=True)
+    if len(uniques):
+        normalized = normalize_unique(pd.Series(uniques, dtype=object).astype(str))
+        normalized = normalized.astype(object).where(normalized.notna(), None).to_numpy(dtype=object)
+        result = normalized.take(codes)
+        result[codes < 0] = None
+    else:
+        result = [None] * len(values)
+    return pd.Series(result, index=values.index, name=values.name, dtype=object)
+
+
+def _normalize_unique_names(texts: pd.Series) -> pd.Series:
+    texts = texts.str.strip()
+    normalized = texts.str.replace(_WHITESPACE_RE, " ", regex=True).str.lower().str.title()
+    return normalized.where(texts.ne(""), None)
+
+
+def _normalize_unique_prefixed_names(texts: pd.Series) -> pd.Series:
+    texts = texts.str.strip()
+    has_prefix = texts.str.contains("-", regex=False)
+    names = texts.where(~has_prefix, texts.str.split("-", n=1).str[1].str.strip())
+    normalized = (
+        names.str.replace(_PARENTHESES_RE, "", regex=True)
+        .str.replace(_WHITESPACE_RE, " ", regex=True)
+        .str.lower()
+        .str.title()
+    )
+    return normalized.where(texts.ne(""), None)
+
+
+def normalize_person_names(values: pd.Series) -> pd.Series:
+    """Ban vector cua normalize_person_name (thay cho series.apply(...))."""
+    return _map_unique(values, _normalize_unique_names)
+
+
+def normalize_prefixed_person_names(values: pd.Series) -> pd.Series:
+    """Ban vector cua normalize_prefixed_person_name (thay cho series.apply(...))."""
+    return _map_unique(values, _normalize_unique_prefixed_names)
+
+
+# =============================================================================
+# Cache theo file
+# =============================================================================
+def _resolve_path(input_path) -> Path:
+    path = Path(input_path).expanduser()
+    if not path.is_absolute():
+        path = (Path.cwd() / path).resolve()
+    else:
+        path = path.resolve()
+    if not path.exists():
+        raise FileNotFoundError(f"Khong tim thay file input: {path}")
+    return path
+
+
+def _file_version(path: Path) -> Tuple[int, ...]:
+    stat = path.stat()
+    version = (stat.st_size, stat.st_mtime_ns)
+    # danhba.db co the dang o che do WAL: du lieu moi nam trong file -wal
+    wal_path = path.with_name(path.name + "-wal")
+    if wal_path.exists():
+        wal_stat = wal_path.stat()
+        version += (wal_stat.st_size, wal_stat.st_mtime_ns)
+    return version
+
+
+@dataclass
+class StaffDirectory:
+    """Danh sach nhan vien tu dsnv.xlsx va index ten da chuan hoa -> don vi (khong sua)."""
+
+    path: Path
+    frame: pd.DataFrame
+    donvi_by_name: Dict[Optional[str], str] = field(default_factory=dict)
+
+
+@dataclass
+class SubscriberDirectory:
+    """Cac bang cua danhba.db va index MA_TB -> dong danhba (khong sua)."""
+
+    path: Path
+    danhba: pd.DataFrame
+    thong_ke: pd.DataFrame
+    thong_ke_theo_don_vi: pd.DataFrame
+    by_ma_tb: pd.DataFrame
+
+
+_CACHE: Dict[Tuple[str, str], Tuple[Tuple[int, ...], Any]] = {}
+_LOCK = threading.Lock()
+_STATS = {"hits": 0, "loads": 0}
+
+
+def _cached(kind: str, path: Path, loader):
+    key = (kind, str(path))
+    version = _file_version(path)
+    with _LOCK:
+        entry = _CACHE.get(key)
+        if entry is not None and entry[0] == version:
+            _STATS["hits"] += 1
+            return entry[1]
+        value = loader(path)
+        _CACHE[key] = (version, value)
+        _STATS["loads"] += 1
+        return value
+
+
+def reference_cache_stats() -> Dict[str, int]:
+    """So lan dung lai cache / doc lai file cua process hien tai."""
+    return dict(_STATS)
+
+
+def clear_reference_cache() -> None:
+    with _LOCK:
+        _CACHE.clear()
+
+
+def _load_staff(path: Path) -> StaffDirectory:
+    df_dsnv = read_excel(path)
+    df_dsnv.columns = [str(col).strip() for col in df_dsnv.columns]
+    if "Họ tên" not in df_dsnv.columns or "đơn vị" not in df_dsnv.columns:
+        raise ValueError("File dsnv.xlsx phai co cac cot 'Họ tên' va 'đơn vị'")
+
+    names = normalize_person_names(df_dsnv["Họ tên"])
+    units = df_dsnv["đơn vị"].astype(str).str.strip()
+    return StaffDirectory(path, df_dsnv, dict(zip(names, units)))
+
+
+def get_staff_directory(dsnv_file) -> StaffDirectory:
+    """dsnv.xlsx da doc (dung chung trong process, doc lai khi file doi)."""
+    return _cached("dsnv", _resolve_path(dsnv_file), _load_staff)
+
+
+def donvi_lookup(dsnv_file) -> Dict[Optional[str], str]:
+    """Dict ten NVKT da chuan hoa -> don vi, dung voi series.map(...)."""
+    return get_staff_directory(dsnv_file).donvi_by_name
+
+
+def _read_table(conn: sqlite3.Connection, query: str) -> pd.DataFrame:
+    try:
+        return pd.read_sql_query(query, conn)
+    except Exception:
+        return pd.DataFrame()
+
+
+def _load_subscribers(path: Path) -> SubscriberDirectory:
+    try:
+        conn = sqlite3.connect(path)
+        try:
+            tables = {name: _read_table(conn, query) for name, query in DANHBA_QUERIES.items()}
+        finally:
+            conn.close()
+    except Exception:
+        tables = {name: pd.DataFrame() for name in DANHBA_QUERIES}
+
+    danhba = tables["danhba"]
+    if "MA_TB" in danhba.columns:
+        by_ma_tb = danhba.drop_duplicates("MA_TB").set_index("MA_TB")
+    else:
+        by_ma_tb = pd.DataFrame()
+    return SubscriberDirectory(path, danhba, tables["thong_ke"], tables["thong_ke_theo_don_vi"], by_ma_tb)
+
+
+def get_subscriber_directory(danhba_db_path) -> Optional[SubscriberDirectory]:
+    """Cac bang cua danhba.db (dung chung trong process); None neu khong co file."""
+    path = Path(danhba_db_path).expanduser()
+    if not path.exists():
+        return None
+    return _cached("danhba", path.resolve(), _load_subscribers)
@@ -4,13 +4,17 @@ from __future__ import annotations
 
 import argparse
 import inspect
+import threading
 import time
 import traceback
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
 from dataclasses import dataclass
 from pathlib import Path
 from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
 
+from api_transition import excel_cache
 from api_transition.runtime_config import RuntimeContext, load_runtime_context
+from api_transition.settings import Settings
 from api_transition.processors.c_processors import (
     process_c11_chitiet_report_api_output,
     process_c11_report_api_output,
@@ -65,7 +69,13 @@ from api_transition.processors.verification_processors import (
     process_ty_le_xac_minh_dung_thoi_gian_quy_dinh_chi_tiet_api_output,
     process_ty_le_xac_minh_dung_thoi_gian_quy_dinh_ttvtkv_api_output,
 )
-from api_transition.processors.common import configure_runtime_roots, reset_runtime_roots
+from api_transition.processors import manifest as processor_manifest
+from api_transition.processors.common import (
+    configure_runtime_roots,
+    get_downloads_dir,
+    get_processed_dir,
+    reset_runtime_roots,
+)
 
 
 API_TRANSITION_DIR = Path(__file__).resolve().parent.parent
@@ -81,6 +91,9 @@ class ProcessorTask:
     group: str
     func: Callable[..., Any]
     source_report_keys: Tuple[str, ...] = ()
+    # Tai nguyen ghi chung ngoai workbook processed (vd. SQLite history).
+    # Hai task cung source report hoac cung resource khong chay song song.
+    exclusive_resources: Tuple[str, ...] = ()
 
 
 @dataclass
@@ -93,6 +106,7 @@ class ProcessorRunResult:
     duration_seconds: float = 0.0
     result: Any = None
     error: str = ""
+    cache_hit: bool = False
 
 
 PROCESSOR_TASKS: Tuple[ProcessorTask, ...] = (
@@ -102,8 +116,8 @@ PROCESSOR_TASKS: Tuple[ProcessorTask, ...] = (
     ProcessorTask("c14", "chi_tieu_c", process_c14_report_api_output, ("c14",)),
     ProcessorTask("c15", "chi_tieu_c", process_c15_report_api_output, ("c15",)),
     ProcessorTask("c15_chitiet", "chi_tieu_c", process_c15_chitiet_report_api_output, ("c15_chitiet",)),
-    ProcessorTask("i15", "chi_tieu_i", process_i15_report_api_output, ("i15",)),
-    ProcessorTask("i15_k2", "chi_tieu_i", process_i15_k2_report_api_output, ("i15_k2",)),
+    ProcessorTask("i15", "chi_tieu_i", process_i15_report_api_output, ("i15",), ("report_history_db",)),
+    ProcessorTask("i15_k2", "chi_tieu_i", process_i15_k2_report_api_output, ("i15_k2",), ("report_history_db",)),
     ProcessorTask("c14_chi_tiet", "chi_tieu_c", process_c14_chitiet_report_api_output, ("c14_chi_tiet",)),
     ProcessorTask("c11_chi_tiet", "chi_tieu_c", process_c11_chitiet_report_api_output, ("c11_chi_tiet",)),
     ProcessorTask("c12_chi_tiet", "chi_tieu_c", process_c12_chitiet_reports_api_output, ("c12_chi_tiet_sm1", "c12_chi_tiet_sm2")),
@@ -135,6 +149,10 @@ PROCESSOR_TASKS: Tuple[ProcessorTask, ...] = (
 )
 
 PROCESSOR_TASK_BY_NAME = {task.name: task for task in PROCESSOR_TASKS}
+
+# Tham so runtime tro toi file tham chieu (khong phai raw report) nhung anh
+# huong ket qua processor, duoc dua vao fingerprint manifest.
+MANIFEST_EXTRA_INPUT_KWARGS = ("dsnv_db_path", "dsnv_file")
 PROCESSOR_GROUPS = tuple(dict.fromkeys(task.group for task in PROCESSOR_TASKS))
 
 DOWNLOADED_REPORT_FILES: Dict[str, Tuple[str, str]] = {
@@ -350,6 +368,257 @@ def _build_call_kwargs(
     return kwargs
 
 
+def build_task_dependencies(tasks: Sequence[ProcessorTask]) -> Dict[str, Tuple[str, ...]]:
+    """Dung DAG thu tu cho cac task da chon.
+
+    Task B phu thuoc task A (A dung truoc B trong ``tasks``) khi hai task dung
+    chung 1 source report hoac 1 exclusive resource: cac processor nay co the
+    ghi cung workbook processed (vd. ``phieu_hoan_cong_dich_vu`` va
+    ``mytv_hoan_cong``) nen phai giu dung thu tu khai bao.
+    """
+    dependencies: Dict[str, Tuple[str, ...]] = {}
+    for index, task in enumerate(tasks):
+        keys = set(task.source_report_keys) | {f"resource:{item}" for item in task.exclusive_resources}
+        depends_on = []
+        for previous in tasks[:index]:
+            previous_keys = set(previous.source_report_keys) | {
+                f"resource:{item}" for item in previous.exclusive_resources
+            }
+            if keys & previous_keys:
+                depends_on.append(previous.name)
+        dependencies[task.name] = tuple(depends_on)
+    return dependencies
+
+
+def _task_input_paths(task: ProcessorTask, runtime_context: Optional[RuntimeContext]) -> List[Path]:
+    paths: List[Path] = []
+    for report_key in task.source_report_keys:
+        if report_key not in DOWNLOADED_REPORT_FILES:
+            continue
+        if runtime_context is not None:
+            paths.append(_downloaded_report_path(runtime_context, report_key))
+        else:
+            group_name, filename = DOWNLOADED_REPORT_FILES[report_key]
+            paths.append(get_downloads_dir() / group_name / filename)
+    return paths
+
+
+def _inputs_ready(
+    task: ProcessorTask,
+    runtime_context: Optional[RuntimeContext],
+    inputs_newer_than: Optional[float],
+) -> bool:
+    for path in _task_input_paths(task, runtime_context):
+        try:
+            mtime = path.stat().st_mtime
+        except FileNotFoundError:
+            return False
+        if inputs_newer_than is not None and mtime < inputs_newer_than:
+            return False
+    return True
+
+
+def _task_fingerprint(
+    task: ProcessorTask,
+    call_kwargs: Dict[str, Any],
+    runtime_context: Optional[RuntimeContext],
+) -> Optional[Dict[str, Any]]:
+    input_paths = _task_input_paths(task, runtime_context)
+    for key in MANIFEST_EXTRA_INPUT_KWARGS:
+        if call_kwargs.get(key):
+            input_paths.append(Path(call_kwargs[key]))
+    return processor_manifest.build_fingerprint(task.func, input_paths, call_kwargs)
+
+
+def _lookup_cached_result(
+    task: ProcessorTask,
+    manifest_dir: Optional[Path],
+    fingerprint: Optional[Dict[str, Any]],
+) -> Optional[ProcessorRunResult]:
+    if manifest_dir is None:
+        return None
+    entry = processor_manifest.lookup_cache_hit(manifest_dir, task.name, fingerprint)
+    if entry is None:
+        return None
+    return ProcessorRunResult(
+        name=task.name,
+        group=task.group,
+        status="success",
+        result=[Path(item) for item in entry["outputs"]],
+        cache_hit=True,
+    )
+
+
+def _record_manifest(
+    manifest_dir: Optional[Path],
+    run_result: ProcessorRunResult,
+    fingerprint: Optional[Dict[str, Any]],
+) -> None:
+    if manifest_dir is None:
+        return
+    try:
+        if run_result.status == "success":
+            processor_manifest.save_entry(
+                manifest_dir,
+                run_result.name,
+                fingerprint,
+                run_result.result,
+                run_result.duration_seconds,
+            )
+        else:
+            processor_manifest.invalidate_entry(manifest_dir, run_result.name)
+    except OSError as exc:
+        print(f"    [manifest] Khong ghi duoc manifest cho {run_result.name}: {exc}")
+
+
+def _execute_task_in_worker(
+    task_name: str,
+    kwargs: Dict[str, Any],
+    downloads_root: Optional[str],
+    processed_root: Optional[str],
+) -> Tuple[str, float, Any, str]:
+    """Chay 1 processor trong process con, tra ve (status, duration, result, error)."""
+    configure_runtime_roots(downloads_root=downloads_root, processed_root=processed_root)
+    task = PROCESSOR_TASK_BY_NAME[task_name]
+    started = time.perf_counter()
+    try:
+        result = task.func(**kwargs)
+        return "success", time.perf_counter() - started, result, ""
+    except Exception as exc:
+        error = "".join(traceback.format_exception_only(type(exc), exc)).strip()
+        return "failed", time.perf_counter() - started, None, error
+    finally:
+        reset_runtime_roots()
+
+
+def _run_processors_dag(
+    tasks: Sequence[ProcessorTask],
+    results: Dict[str, List[ProcessorRunResult]],
+    *,
+    overwrite_processed: bool,
+    runtime_context: Optional[RuntimeContext],
+    stop_on_error: bool,
+    verbose: bool,
+    max_workers: int,
+    downloads_done: Optional[threading.Event],
+    inputs_newer_than: Optional[float],
+    poll_interval: float,
+    manifest_dir: Optional[Path] = None,
+    force: bool = False,
+) -> None:
+    """Chay cac task theo DAG tren process pool.
+
+    Task duoc submit khi moi task phu thuoc da xong va (neu dang chay chong
+    voi batch download) file raw dau vao da xuat hien/moi hon
+    ``inputs_newer_than``. Khi ``downloads_done`` da set, task con lai chay
+    ngay nhu runner tuan tu (file thieu se fail nhu cu).
+    """
+    dependencies = build_task_dependencies(tasks)
+    task_order = {task.name: index for index, task in enumerate(tasks)}
+    total = len(tasks)
+    waiting: List[ProcessorTask] = []
+    finished: set[str] = set()
+    collected: List[ProcessorRunResult] = []
+
+    for task in tasks:
+        if not _is_task_enabled(task, runtime_context):
+            collected.append(
+                ProcessorRunResult(
+                    name=task.name,
+                    group=task.group,
+                    status="skipped",
+                    error="Disabled by runtime config.",
+                )
+            )
+            finished.add(task.name)
+            if verbose:
+                print(f"[{task_order[task.name] + 1}/{total}] Skipping {task.name} ({task.group}) - disabled by config")
+            continue
+        waiting.append(task)
+
+    downloads_root = str(runtime_context.paths.downloads_root) if runtime_context is not None else None
+    processed_root = str(runtime_context.paths.processed_root) if runtime_context is not None else None
+    running: Dict[Future, ProcessorTask] = {}
+    fingerprints: Dict[str, Optional[Dict[str, Any]]] = {}
+    stop_submitting = False
+
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        while waiting or running:
+            if not stop_submitting:
+                downloads_finished = downloads_done is None or downloads_done.is_set()
+                for task in list(waiting):
+                    if len(running) >= max_workers:
+                        break
+                    if not all(name in finished for name in dependencies[task.name]):
+                        continue
+                    if not downloads_finished and not _inputs_ready(task, runtime_context, inputs_newer_than):
+                        continue
+                    waiting.remove(task)
+                    call_kwargs = _build_call_kwargs(task, overwrite_processed, runtime_context)
+                    fingerprints[task.name] = (
+                        _task_fingerprint(task, call_kwargs, runtime_context) if manifest_dir is not None else None
+                    )
+                    cached = None if force else _lookup_cached_result(task, manifest_dir, fingerprints[task.name])
+                    if cached is not None:
+                        collected.append(cached)
+                        finished.add(task.name)
+                        if verbose:
+                            print(f"[{task_order[task.name] + 1}/{total}] Cache hit {task.name} ({task.group}) - raw inputs unchanged")
+                        continue
+                    if verbose:
+                        print(f"[{task_order[task.name] + 1}/{total}] Running {task.name} ({task.group})")
+                    future = executor.submit(
+                        _execute_task_in_worker,
+                        task.name,
+                        call_kwargs,
+                        downloads_root,
+                        processed_root,
+                    )
+                    running[future] = task
+            elif not running:
+                break
+
+            if not running:
+                if not waiting:
+                    break
+                # Chua co task nao san sang: cho download tao them file raw.
+                if downloads_done is not None:
+                    downloads_done.wait(poll_interval)
+                else:
+                    time.sleep(poll_interval)
+                continue
+
+            done, _ = wait(list(running), timeout=poll_interval, return_when=FIRST_COMPLETED)
+            for future in done:
+                task = running.pop(future)
+                try:
+                    status, duration, result, error = future.result()
+                except Exception as exc:
+                    status, duration, result = "failed", 0.0, None
+                    error = "".join(traceback.format_exception_only(type(exc), exc)).strip()
+                run_result = ProcessorRunResult(
+                    name=task.name,
+                    group=task.group,
+                    status=status,
+                    duration_seconds=duration,
+                    result=result,
+                    error=error,
+                )
+                collected.append(run_result)
+                _record_manifest(manifest_dir, run_result, fingerprints.get(task.name))
+                finished.add(task.name)
+                if verbose:
+                    if status == "success":
+                        print(f"    {task.name} OK in {duration:.2f}s")
+                    else:
+                        print(f"    {task.name} FAILED in {duration:.2f}s: {error}")
+                if status == "failed" and stop_on_error:
+                    stop_submitting = True
+
+    for run_result in sorted(collected, key=lambda item: task_order[item.name]):
+        results[run_result.status].append(run_result)
+
+
 def run_all_processors(
     *,
     overwrite_processed: bool = False,
@@ -360,13 +629,31 @@ def run_all_processors(
     runtime_context: Optional[RuntimeContext] = None,
     stop_on_error: bool = False,
     verbose: bool = True,
+    max_workers: int = 1,
+    downloads_done: Optional[threading.Event] = None,
+    inputs_newer_than: Optional[float] = None,
+    poll_interval: float = 2.0,
+    force: bool = False,
+    use_manifest: bool = True,
 ) -> Dict[str, List[ProcessorRunResult]]:
     """Chay tat ca processor dang co trong `api_transition/processors`.
 
     Runner nay chi gom cac processor da co implementation trong package
     `api_transition.processors`. Cac luong chua duoc port vao package nay
     se khong nam trong danh sach.
+
+    ``max_workers > 1`` hoac co ``downloads_done`` se chay theo DAG tren process
+    pool (xem ``_run_processors_dag``); ``downloads_done`` + ``inputs_newer_than``
+    cho phep bat dau xu ly trong luc batch download van dang chay.
+
+    Voi ``use_manifest=True`` (mac dinh), processor co raw input, source
+    processor va tham so runtime khong doi so voi lan chay thanh cong truoc
+    (xem ``processors/manifest.py``) duoc bao cache hit (status ``success``,
+    ``cache_hit=True``) va khong chay lai. ``force=True`` bo qua cache nhung
+    van cap nhat manifest.
     """
+    if max_workers < 1:
+        raise ValueError("max_workers phai >= 1")
 
     active_runtime_context = runtime_context
     if active_runtime_context is None and config_path:
@@ -395,9 +682,14 @@ def run_all_processors(
             processed_root=active_runtime_context.paths.processed_root,
         )
 
+    manifest_dir = processor_manifest.manifest_dir_for(get_processed_dir()) if use_manifest else None
+
     try:
         if verbose:
-            print(f"[processors] Selected {len(tasks)} task(s). overwrite_processed={overwrite_processed}")
+            print(
+                f"[processors] Selected {len(tasks)} task(s). overwrite_processed={overwrite_processed}"
+                f" manifest={'off' if manifest_dir is None else ('force' if force else 'on')}"
+            )
             if active_runtime_context is not None:
                 print(
                     f"[processors] Unit={active_runtime_context.unit.code}"
@@ -405,67 +697,111 @@ def run_all_processors(
                     f" processed_root={active_runtime_context.paths.processed_root}"
                 )
 
-        for index, task in enumerate(tasks, start=1):
-            if not _is_task_enabled(task, active_runtime_context):
-                run_result = ProcessorRunResult(
-                    name=task.name,
-                    group=task.group,
-                    status="skipped",
-                    error="Disabled by runtime config.",
-                )
-                results["skipped"].append(run_result)
-                if verbose:
-                    print(f"[{index}/{len(tasks)}] Skipping {task.name} ({task.group}) - disabled by config")
-                continue
-
+        if max_workers > 1 or downloads_done is not None:
             if verbose:
-                print(f"[{index}/{len(tasks)}] Running {task.name} ({task.group})")
-
-            started = time.perf_counter()
-            try:
-                result = task.func(
-                    **_build_call_kwargs(task, overwrite_processed, active_runtime_context)
-                )
-                duration = time.perf_counter() - started
-                run_result = ProcessorRunResult(
-                    name=task.name,
-                    group=task.group,
-                    status="success",
-                    duration_seconds=duration,
-                    result=result,
-                )
-                results["success"].append(run_result)
-                if verbose:
-                    print(f"    OK in {duration:.2f}s")
-            except Exception as exc:
-                duration = time.perf_counter() - started
-                run_result = ProcessorRunResult(
-                    name=task.name,
-                    group=task.group,
-                    status="failed",
-                    duration_seconds=duration,
-                    error="".join(traceback.format_exception_only(type(exc), exc)).strip(),
+                print(f"[processors] DAG mode: workers={max_workers} overlap_download={downloads_done is not None}")
+            _run_processors_dag(
+                tasks,
+                results,
+                overwrite_processed=overwrite_processed,
+                runtime_context=active_runtime_context,
+                stop_on_error=stop_on_error,
+                verbose=verbose,
+                max_workers=max_workers,
+                downloads_done=downloads_done,
+                inputs_newer_than=inputs_newer_than,
+                poll_interval=poll_interval,
+                manifest_dir=manifest_dir,
+                force=force,
+            )
+        else:
+            for index, task in enumerate(tasks, start=1):
+                if not _is_task_enabled(task, active_runtime_context):
+                    run_result = ProcessorRunResult(
+                        name=task.name,
+                        group=task.group,
+                        status="skipped",
+                        error="Disabled by runtime config.",
+                    )
+                    results["skipped"].append(run_result)
+                    if verbose:
+                        print(f"[{index}/{len(tasks)}] Skipping {task.name} ({task.group}) - disabled by config")
+                    continue
+
+                call_kwargs = _build_call_kwargs(task, overwrite_processed, active_runtime_context)
+                fingerprint = (
+                    _task_fingerprint(task, call_kwargs, active_runtime_context) if manifest_dir is not None else None
                 )
-                results["failed"].append(run_result)
+                cached = None if force else _lookup_cached_result(task, manifest_dir, fingerprint)
+                if cached is not None:
+                    results["success"].append(cached)
+                    if verbose:
+                        print(f"[{index}/{len(tasks)}] Cache hit {task.name} ({task.group}) - raw inputs unchanged")
+                    continue
+
                 if verbose:
-                    print(f"    FAILED in {duration:.2f}s: {run_result.error}")
-                if stop_on_error:
-                    break
+                    print(f"[{index}/{len(tasks)}] Running {task.name} ({task.group})")
+
+                started = time.perf_counter()
+                try:
+                    result = task.func(**call_kwargs)
+                    duration = time.perf_counter() - started
+                    run_result = ProcessorRunResult(
+                        name=task.name,
+                        group=task.group,
+                        status="success",
+                        duration_seconds=duration,
+                        result=result,
+                    )
+                    results["success"].append(run_result)
+                    _record_manifest(manifest_dir, run_result, fingerprint)
+                    if verbose:
+                        print(f"    OK in {duration:.2f}s")
+                except Exception as exc:
+                    duration = time.perf_counter() - started
+                    run_result = ProcessorRunResult(
+                        name=task.name,
+                        group=task.group,
+                        status="failed",
+                        duration_seconds=duration,
+                        error="".join(traceback.format_exception_only(type(exc), exc)).strip(),
+                    )
+                    results["failed"].append(run_result)
+                    _record_manifest(manifest_dir, run_result, fingerprint)
+                    if verbose:
+                        print(f"    FAILED in {duration:.2f}s: {run_result.error}")
+                    if stop_on_error:
+                        break
     finally:
         if active_runtime_context is not None:
             reset_runtime_roots()
 
+    _prune_caches(verbose)
     if verbose:
         print(
             "[processors] Completed:"
             f" success={len(results['success'])}"
             f" failed={len(results['failed'])}"
             f" skipped={len(results['skipped'])}"
+            f" cache_hit={sum(1 for item in results['success'] if item.cache_hit)}"
         )
 
     return results
 
 
+def _prune_caches(verbose: bool) -> None:
+    """Don entry cache Excel cu theo EXCEL_CACHE_MAX_AGE_DAYS sau moi lan chay (loi chi canh bao)."""
+    if not Settings.EXCEL_CACHE_ENABLED:
+        return
+    try:
+        removed = excel_cache.prune_cache()
+    except OSError as exc:
+        print(f"[processors] Khong don duoc cache Excel: {exc}")
+        return
+    if verbose and removed:
+        print(f"[processors] Pruned {removed} Excel cache entries older than {Settings.EXCEL_CACHE_MAX_AGE_DAYS:g} day(s)")
+
+
 def _build_parser() -> argparse.ArgumentParser:
     parser = argparse.ArgumentParser(description="Run all processors in api_transition.processors.")
     parser.add_argument(
@@ -491,6 +827,22 @@ def _build_parser() -> argparse.ArgumentParser:
         action="store_true",
         help="Cho phep ghi de workbook processed neu processor ho tro.",
     )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="So processor chay song song theo DAG (mac dinh: 1 = tuan tu).",
+    )
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="Chay lai ca processor co raw input khong doi (bo qua manifest cache).",
+    )
+    parser.add_argument(
+        "--no-manifest",
+        action="store_true",
+        help="Tat manifest content-hash: khong doc/ghi .processor_manifest.",
+    )
     parser.add_argument(
         "--stop-on-error",
         action="store_true",
@@ -534,6 +886,9 @@ def main(argv: Optional[Sequence[str]] = None) -> int:
         runtime_context=runtime_context,
         stop_on_error=args.stop_on_error,
         verbose=not args.quiet,
+        max_workers=args.workers,
+        force=args.force,
+        use_manifest=not args.no_manifest,
     )
     return 1 if results["failed"] else 0
 
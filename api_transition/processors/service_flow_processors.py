@@ -2,18 +2,20 @@
 """Processors cho nhom luong dich vu trong api_transition."""
 
 from pathlib import Path
-import re
 
 import pandas as pd
-from openpyxl import Workbook, load_workbook
+from openpyxl import Workbook
 
+from api_transition.excel_cache import read_excel
 from api_transition.processors.common import (
     PROCESSED_DIR,
     append_or_replace_sheet,
     copy_raw_to_processed,
     ensure_processed_workbook,
     processed_group_dir,
+    write_sheets,
 )
+from api_transition.processors.reference_data import normalize_prefixed_person_name, normalize_prefixed_person_names
 
 
 DEFAULT_PHIEU_HOAN_CONG_INPUT = (
@@ -115,22 +117,6 @@ def _resolve_path(input_path):
     return path
 
 
-def _normalize_person_name(value):
-    if pd.isna(value):
-        return None
-
-    text = str(value).strip()
-    if not text:
-        return None
-
-    if "-" in text:
-        text = text.split("-", 1)[1].strip()
-
-    text = re.sub(r"\([^)]*\)", "", text)
-    text = re.sub(r"\s+", " ", text)
-    return text.lower().title()
-
-
 def _normalize_team_code(value):
     if pd.isna(value):
         return "(Chưa xác định)"
@@ -164,8 +150,8 @@ def _extract_nvkt_from_ten_kv(value):
 
     parts = [part.strip() for part in text.split("-") if part.strip()]
     if len(parts) >= 2:
-        return _normalize_person_name(parts[-1])
-    return _normalize_person_name(text)
+        return normalize_prefixed_person_name(parts[-1])
+    return normalize_prefixed_person_name(text)
 
 
 def _extract_nvkt_from_nhanvien_congviec(value):
@@ -179,7 +165,7 @@ def _extract_nvkt_from_nhanvien_congviec(value):
     first_line = text.splitlines()[0].strip()
     if ":" in first_line:
         first_line = first_line.split(":", 1)[0].strip()
-    return _normalize_person_name(first_line)
+    return normalize_prefixed_person_name(first_line)
 
 
 def _coalesce(*values):
@@ -235,22 +221,9 @@ def _ensure_generated_workbook(output_path, overwrite=False):
     return output_path
 
 
-def _remove_empty_default_sheet(workbook_path):
-    workbook = load_workbook(workbook_path)
-    if len(workbook.sheetnames) > 1:
-        for sheet_name in ["Sheet", "Sheet1"]:
-            if sheet_name in workbook.sheetnames:
-                sheet = workbook[sheet_name]
-                if sheet.max_row == 1 and sheet.max_column == 1 and sheet["A1"].value is None:
-                    workbook.remove(sheet)
-                    workbook.save(workbook_path)
-                    break
-    return workbook_path
-
-
 def _prepare_phieu_hoan_cong_df(input_path):
     raw_path = _resolve_path(input_path)
-    df = pd.read_excel(raw_path).copy()
+    df = read_excel(raw_path).copy()
     df.columns = [str(col).strip() for col in df.columns]
 
     required_cols = ["DOIVT", "TTVT"]
@@ -258,7 +231,7 @@ def _prepare_phieu_hoan_cong_df(input_path):
     if missing:
         raise ValueError(f"Bao cao phieu hoan cong thieu cot bat buoc: {missing}")
 
-    nvkt_from_db = df["TEN_NVKT_DB"].apply(_normalize_person_name) if "TEN_NVKT_DB" in df.columns else pd.Series([None] * len(df))
+    nvkt_from_db = normalize_prefixed_person_names(df["TEN_NVKT_DB"]) if "TEN_NVKT_DB" in df.columns else pd.Series([None] * len(df))
     nvkt_from_ten_kv = df["TEN_KV"].apply(_extract_nvkt_from_ten_kv) if "TEN_KV" in df.columns else pd.Series([None] * len(df))
     nvkt_from_congviec = (
         df["NHANVIEN_CONGVIEC"].apply(_extract_nvkt_from_nhanvien_congviec)
@@ -366,7 +339,7 @@ def _build_multirow_header_map(df_raw, header_row_count=3):
 
 def _extract_mytv_t_minus_1_summary_df(input_path, unit_level):
     raw_path = _resolve_path(input_path)
-    df_raw = pd.read_excel(raw_path, header=None)
+    df_raw = read_excel(raw_path, header=None)
     header_map = _build_multirow_header_map(df_raw)
     required_columns = {
         "Đơn vị/Nhân viên KT": "DON_VI",
@@ -577,16 +550,21 @@ def process_phieu_hoan_cong_dich_vu_chi_tiet_api_output(
     df_ttvt = _build_ttvt_summary(df)
 
     processed_path = ensure_processed_workbook(raw_path, overwrite=overwrite_processed)
-    append_or_replace_sheet(processed_path, "Data", df)
-    append_or_replace_sheet(processed_path, "fiber_hoan_cong_thang", df_nvkt)
-    append_or_replace_sheet(processed_path, "fiber_hoan_cong_thang_theo_to", df_team)
-    append_or_replace_sheet(processed_path, "fiber_hoan_cong_thang_theo_ttvt", df_ttvt)
+    write_sheets(
+        processed_path,
+        {
+            "Data": df,
+            "fiber_hoan_cong_thang": df_nvkt,
+            "fiber_hoan_cong_thang_theo_to": df_team,
+            "fiber_hoan_cong_thang_theo_ttvt": df_ttvt,
+        },
+    )
     return processed_path
 
 
 def _prepare_tam_dung_chi_tiet_df(input_path):
     raw_path = _resolve_path(input_path)
-    df = pd.read_excel(raw_path).copy()
+    df = read_excel(raw_path).copy()
     df.columns = [str(col).strip() for col in df.columns]
 
     required_cols = ["DOIVT", "TTVT"]
@@ -594,9 +572,9 @@ def _prepare_tam_dung_chi_tiet_df(input_path):
     if missing:
         raise ValueError(f"Bao cao tam dung/khoi phuc thieu cot bat buoc: {missing}")
 
-    nvkt_from_db = df["TEN_NVKT_DB"].apply(_normalize_person_name) if "TEN_NVKT_DB" in df.columns else pd.Series([None] * len(df))
+    nvkt_from_db = normalize_prefixed_person_names(df["TEN_NVKT_DB"]) if "TEN_NVKT_DB" in df.columns else pd.Series([None] * len(df))
     nvkt_from_ten_kv = df["TEN_KV"].apply(_extract_nvkt_from_ten_kv) if "TEN_KV" in df.columns else pd.Series([None] * len(df))
-    nvkt_from_xm = df["NVKT_XM"].apply(_normalize_person_name) if "NVKT_XM" in df.columns else pd.Series([None] * len(df))
+    nvkt_from_xm = normalize_prefixed_person_names(df["NVKT_XM"]) if "NVKT_XM" in df.columns else pd.Series([None] * len(df))
 
     df["NVKT"] = [
         _coalesce(a, b, c)
@@ -771,11 +749,16 @@ def _process_tam_dung_khoi_phuc_dich_vu_chi_tiet_output(
     df_reasons = _build_reason_summary(df, "LYDOHUY")
 
     processed_path = ensure_processed_workbook(raw_path, overwrite=overwrite_processed)
-    append_or_replace_sheet(processed_path, "Data", df)
-    append_or_replace_sheet(processed_path, nvkt_sheet_name, df_nvkt)
-    append_or_replace_sheet(processed_path, team_sheet_name, df_team)
-    append_or_replace_sheet(processed_path, ttvt_sheet_name, df_ttvt)
-    append_or_replace_sheet(processed_path, reason_sheet_name, df_reasons)
+    write_sheets(
+        processed_path,
+        {
+            "Data": df,
+            nvkt_sheet_name: df_nvkt,
+            team_sheet_name: df_team,
+            ttvt_sheet_name: df_ttvt,
+            reason_sheet_name: df_reasons,
+        },
+    )
     return processed_path
 
 
@@ -826,14 +809,19 @@ def process_tam_dung_khoi_phuc_dich_vu_chi_tiet_combined_api_output(
     df_unrestored = _build_unrestored_detail(df_tam_dung, df_khoi_phuc)
 
     combined_path = _ensure_generated_workbook(combined_output_path, overwrite=overwrite_processed)
-    append_or_replace_sheet(combined_path, "Data_tam_dung", df_tam_dung)
-    append_or_replace_sheet(combined_path, "Data_khoi_phuc", df_khoi_phuc)
-    append_or_replace_sheet(combined_path, "Data_combined", df_combined)
-    append_or_replace_sheet(combined_path, "tong_hop_theo_NVKT", df_nvkt)
-    append_or_replace_sheet(combined_path, "tong_hop_theo_to", df_team)
-    append_or_replace_sheet(combined_path, "tong_hop_theo_TTVT", df_ttvt)
-    append_or_replace_sheet(combined_path, "chi_tiet_chua_khoi_phuc", df_unrestored)
-    _remove_empty_default_sheet(combined_path)
+    write_sheets(
+        combined_path,
+        {
+            "Data_tam_dung": df_tam_dung,
+            "Data_khoi_phuc": df_khoi_phuc,
+            "Data_combined": df_combined,
+            "tong_hop_theo_NVKT": df_nvkt,
+            "tong_hop_theo_to": df_team,
+            "tong_hop_theo_TTVT": df_ttvt,
+            "chi_tiet_chua_khoi_phuc": df_unrestored,
+        },
+        drop_empty_default_sheet=True,
+    )
 
     return {
         "tam_dung_processed_path": tam_dung_processed_path,
@@ -853,7 +841,7 @@ def process_tam_dung_khoi_phuc_dich_vu_tong_hop_api_output(
     """
     raw_path = _resolve_path(input_path)
     try:
-        df = pd.read_excel(raw_path)
+        df = read_excel(raw_path)
     except ValueError:
         df = pd.DataFrame()
 
@@ -922,9 +910,14 @@ def process_fiber_thuc_tang_api_output(
     )
 
     processed_path = _ensure_generated_workbook(output_path, overwrite=overwrite_processed)
-    append_or_replace_sheet(processed_path, "thuc_tang_theo_to", df_thuc_tang_to)
-    append_or_replace_sheet(processed_path, "thuc_tang_theo_NVKT", df_thuc_tang_nvkt)
-    _remove_empty_default_sheet(processed_path)
+    write_sheets(
+        processed_path,
+        {
+            "thuc_tang_theo_to": df_thuc_tang_to,
+            "thuc_tang_theo_NVKT": df_thuc_tang_nvkt,
+        },
+        drop_empty_default_sheet=True,
+    )
     return processed_path
 
 
@@ -966,13 +959,18 @@ def process_mytv_ngung_psc_api_output(
     df_ttvt = _append_mytv_team_total_row(df_ttvt, "TTVT", "SỐ LƯỢNG NGƯNG PSC THÁNG")
 
     processed_path = _ensure_generated_workbook(output_path, overwrite=overwrite_processed)
-    append_or_replace_sheet(processed_path, "Data", data_df)
-    append_or_replace_sheet(processed_path, "mytv_ngung_psc_thang", df_nvkt)
-    append_or_replace_sheet(processed_path, "mytv_ngung_psc_thang_theo_to", df_team)
-    append_or_replace_sheet(processed_path, "mytv_ngung_psc_thang_theo_ttvt", df_ttvt)
-    append_or_replace_sheet(processed_path, "source_cap_to", df_team_source)
-    append_or_replace_sheet(processed_path, "source_cap_ttvt", df_ttvt_source)
-    _remove_empty_default_sheet(processed_path)
+    write_sheets(
+        processed_path,
+        {
+            "Data": data_df,
+            "mytv_ngung_psc_thang": df_nvkt,
+            "mytv_ngung_psc_thang_theo_to": df_team,
+            "mytv_ngung_psc_thang_theo_ttvt": df_ttvt,
+            "source_cap_to": df_team_source,
+            "source_cap_ttvt": df_ttvt_source,
+        },
+        drop_empty_default_sheet=True,
+    )
     return processed_path
 
 
@@ -983,7 +981,7 @@ def process_mytv_ngung_psc_ttvt_api_output(
 ):
     """Xu ly rieng bao cao MyTV ngung PSC cap TTVT."""
     raw_path = _resolve_path(input_path)
-    df_raw = pd.read_excel(raw_path, header=None).copy()
+    df_raw = read_excel(raw_path, header=None).copy()
     if len(df_raw) <= 3:
         raise ValueError(
             f"File MyTV TTVT khong du dong du lieu. Can it nhat 4 dong, nhung chi co {len(df_raw)} dong."
@@ -995,8 +993,11 @@ def process_mytv_ngung_psc_ttvt_api_output(
     df_data = df_data[df_data[first_col].notna() & (df_data[first_col].astype(str).str.strip() != "")].reset_index(drop=True)
 
     processed_path = _ensure_generated_workbook(output_path, overwrite=overwrite_processed)
-    append_or_replace_sheet(processed_path, "TH_ngung_PSC-Thang T-1", df_data)
-    _remove_empty_default_sheet(processed_path)
+    write_sheets(
+        processed_path,
+        {"TH_ngung_PSC-Thang T-1": df_data},
+        drop_empty_default_sheet=True,
+    )
     return processed_path
 
 
@@ -1028,11 +1029,16 @@ def process_mytv_hoan_cong_api_output(
     df_ttvt = _append_mytv_team_total_row(df_ttvt, "TEN_TTVT", "SỐ LƯỢNG HOÀN CÔNG THÁNG")
 
     processed_path = _ensure_generated_workbook(output_path, overwrite=overwrite_processed)
-    append_or_replace_sheet(processed_path, "Data", df)
-    append_or_replace_sheet(processed_path, "mytv_hoan_cong_thang", df_nvkt)
-    append_or_replace_sheet(processed_path, "mytv_hoan_cong_thang_theo_to", df_team)
-    append_or_replace_sheet(processed_path, "mytv_hoan_cong_thang_theo_ttvt", df_ttvt)
-    _remove_empty_default_sheet(processed_path)
+    write_sheets(
+        processed_path,
+        {
+            "Data": df,
+            "mytv_hoan_cong_thang": df_nvkt,
+            "mytv_hoan_cong_thang_theo_to": df_team,
+            "mytv_hoan_cong_thang_theo_ttvt": df_ttvt,
+        },
+        drop_empty_default_sheet=True,
+    )
     return processed_path
 
 
@@ -1071,20 +1077,21 @@ def process_mytv_thuc_tang_api_output(
     )
 
     processed_path = _ensure_generated_workbook(output_path, overwrite=overwrite_processed)
-    append_or_replace_sheet(processed_path, "thuc_tang_theo_to", df_thuc_tang_to)
-    append_or_replace_sheet(
+    write_sheets(
         processed_path,
-        "thong_bao",
-        pd.DataFrame(
-            [
-                {
-                    "Trạng thái": "Không có dữ liệu NVKT",
-                    "Ghi chú": "Nguồn MyTV ngưng PSC API hiện chỉ có cấp tổ/TTVT, chưa có chi tiết theo NVKT nên không sinh sheet thuc_tang_theo_NVKT.",
-                }
-            ]
-        ),
+        {
+            "thuc_tang_theo_to": df_thuc_tang_to,
+            "thong_bao": pd.DataFrame(
+                [
+                    {
+                        "Trạng thái": "Không có dữ liệu NVKT",
+                        "Ghi chú": "Nguồn MyTV ngưng PSC API hiện chỉ có cấp tổ/TTVT, chưa có chi tiết theo NVKT nên không sinh sheet thuc_tang_theo_NVKT.",
+                    }
+                ]
+            ),
+        },
+        drop_empty_default_sheet=True,
     )
-    _remove_empty_default_sheet(processed_path)
     return processed_path
 
 
@@ -1094,7 +1101,7 @@ def process_son_tay_mytv_ngung_psc_t_minus_1_api_output(
 ):
     """Xu ly bao cao MyTV Son Tay ngung PSC thang T-1."""
     raw_path = _resolve_path(input_path)
-    df_raw = pd.read_excel(raw_path, header=None)
+    df_raw = read_excel(raw_path, header=None)
     df_subset = _extract_son_tay_ngung_psc_subset(df_raw)
 
     numeric_cols = list(df_subset.columns[1:])
@@ -1124,7 +1131,7 @@ def process_son_tay_fiber_ngung_psc_t_minus_1_api_output(
 ):
     """Xu ly bao cao Fiber Son Tay ngung PSC thang T-1."""
     raw_path = _resolve_path(input_path)
-    df_raw = pd.read_excel(raw_path, header=None)
+    df_raw = read_excel(raw_path, header=None)
     df_subset = _extract_son_tay_ngung_psc_subset(df_raw)
 
     numeric_cols = list(df_subset.columns[1:])
@@ -1158,7 +1165,7 @@ def process_son_tay_fiber_ngung_psc_t_minus_1_ttvt_api_output(
 ):
     """Xu ly bao cao Fiber Son Tay ngung PSC thang T-1 cap TTVT."""
     raw_path = _resolve_path(input_path)
-    df_raw = pd.read_excel(raw_path, header=None).copy()
+    df_raw = read_excel(raw_path, header=None).copy()
     if len(df_raw) <= 3:
         raise ValueError(
             f"File Fiber TTVT khong du dong du lieu. Can it nhat 4 dong, nhung chi co {len(df_raw)} dong."
@@ -2,11 +2,12 @@
 """Processors cho nhom vat tu trong api_transition."""
 
 from pathlib import Path
-import re
 
 import pandas as pd
 
+from api_transition.excel_cache import read_excel
 from api_transition.processors.common import append_or_replace_sheet, ensure_processed_workbook
+from api_transition.processors.reference_data import normalize_prefixed_person_names
 
 
 DEFAULT_VATTU_THU_HOI_INPUT = (
@@ -27,29 +28,13 @@ def _resolve_path(input_path):
     return path
 
 
-def _normalize_person_name(value):
-    if pd.isna(value):
-        return None
-
-    text = str(value).strip()
-    if not text:
-        return None
-
-    if "-" in text:
-        text = text.split("-", 1)[1].strip()
-
-    text = re.sub(r"\([^)]*\)", "", text)
-    text = re.sub(r"\s+", " ", text)
-    return text.lower().title()
-
-
 def _prepare_vattu_thu_hoi_df(input_path):
     raw_path = _resolve_path(input_path)
-    df = pd.read_excel(raw_path).copy()
+    df = read_excel(raw_path).copy()
     df.columns = [str(col).strip() for col in df.columns]
 
     if "NVKT_DIABAN_GIAO" in df.columns:
-        df["NVKT_DIABAN_GIAO"] = df["NVKT_DIABAN_GIAO"].apply(_normalize_person_name)
+        df["NVKT_DIABAN_GIAO"] = normalize_prefixed_person_names(df["NVKT_DIABAN_GIAO"])
 
     filter_cols = {
         "TRANGTHAI_THUHOI": "CHUA_THU_HOI",
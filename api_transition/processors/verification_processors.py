@@ -2,11 +2,12 @@
 """Processors cho nhom ty le xac minh dung thoi gian quy dinh."""
 
 from pathlib import Path
-import re
 
 import pandas as pd
 
-from api_transition.processors.common import append_or_replace_sheet, ensure_processed_workbook
+from api_transition.excel_cache import read_excel
+from api_transition.processors.common import append_or_replace_sheet, ensure_processed_workbook, write_sheets
+from api_transition.processors.reference_data import normalize_prefixed_person_name, normalize_prefixed_person_names
 
 
 DEFAULT_XM_TTVTKV_INPUT = (
@@ -41,22 +42,6 @@ def _resolve_path(input_path):
     return path
 
 
-def _normalize_person_name(value):
-    if pd.isna(value):
-        return None
-
-    text = str(value).strip()
-    if not text:
-        return None
-
-    if "-" in text:
-        text = text.split("-", 1)[1].strip()
-
-    text = re.sub(r"\([^)]*\)", "", text)
-    text = re.sub(r"\s+", " ", text)
-    return text.lower().title()
-
-
 def _extract_nvkt_from_ten_kv(value):
     if pd.isna(value):
         return None
@@ -67,8 +52,8 @@ def _extract_nvkt_from_ten_kv(value):
 
     parts = [part.strip() for part in text.split("-") if part.strip()]
     if len(parts) >= 2:
-        return _normalize_person_name(parts[-1])
-    return _normalize_person_name(text)
+        return normalize_prefixed_person_name(parts[-1])
+    return normalize_prefixed_person_name(text)
 
 
 def _append_total_row(df, total_col, fixed_values):
@@ -81,7 +66,7 @@ def _append_total_row(df, total_col, fixed_values):
 
 def _prepare_xac_minh_tam_dung_df(input_path):
     raw_path = _resolve_path(input_path)
-    df = pd.read_excel(raw_path).copy()
+    df = read_excel(raw_path).copy()
     df.columns = [str(col).strip() for col in df.columns]
 
     for col in ("TEN_DVVT_HNI", "PHAN_LOAI_KH", "TEN_KV", "DOIVT", "TTVT", "LYDOHUY", "TRANGTHAI_TB", "TRANGTHAI_HD"):
@@ -89,7 +74,7 @@ def _prepare_xac_minh_tam_dung_df(input_path):
             df[col] = df[col].fillna("(Chưa xác định)").astype(str).str.strip()
 
     if "TEN_NVKT_DB" in df.columns:
-        df["NVKT"] = df["TEN_NVKT_DB"].apply(_normalize_person_name).fillna("(Chưa phân công)")
+        df["NVKT"] = normalize_prefixed_person_names(df["TEN_NVKT_DB"]).fillna("(Chưa phân công)")
     else:
         df["NVKT"] = "(Chưa phân công)"
 
@@ -152,10 +137,15 @@ def process_xac_minh_tam_dung_api_output(
     df_ly_do = _build_xac_minh_tam_dung_ly_do_huy_summary(df)
 
     processed_path = ensure_processed_workbook(raw_path, overwrite=overwrite_processed)
-    append_or_replace_sheet(processed_path, "Data", df)
-    append_or_replace_sheet(processed_path, "tong_hop_theo_nvkt", df_nvkt)
-    append_or_replace_sheet(processed_path, "tong_hop_theo_dich_vu", df_dich_vu)
-    append_or_replace_sheet(processed_path, "tong_hop_theo_ly_do_huy", df_ly_do)
+    write_sheets(
+        processed_path,
+        {
+            "Data": df,
+            "tong_hop_theo_nvkt": df_nvkt,
+            "tong_hop_theo_dich_vu": df_dich_vu,
+            "tong_hop_theo_ly_do_huy": df_ly_do,
+        },
+    )
     return processed_path
 
 
@@ -166,7 +156,7 @@ def process_ty_le_xac_minh_dung_thoi_gian_quy_dinh_ttvtkv_api_output(
 ):
     """Xu ly bao cao tong hop ty le xac minh dung thoi gian quy dinh cap to."""
     raw_path = _resolve_path(input_path)
-    df = pd.read_excel(raw_path).copy()
+    df = read_excel(raw_path).copy()
     df.columns = [str(col).strip() for col in df.columns]
 
     numeric_cols = [col for col in df.columns if col != "Đơn vị"]
@@ -195,7 +185,7 @@ def process_ty_le_xac_minh_dung_thoi_gian_quy_dinh_ttvtkv_api_output(
 
 def _prepare_xm_chi_tiet_df(input_path):
     raw_path = _resolve_path(input_path)
-    df = pd.read_excel(raw_path).copy()
+    df = read_excel(raw_path).copy()
     df.columns = [str(col).strip() for col in df.columns]
 
     df["NVKT"] = df["TEN_KV"].apply(_extract_nvkt_from_ten_kv)
@@ -263,8 +253,13 @@ def process_ty_le_xac_minh_dung_thoi_gian_quy_dinh_chi_tiet_api_output(
     df_loai = _build_xm_loai_phieu_summary(df)
 
     processed_path = ensure_processed_workbook(raw_path, overwrite=overwrite_processed)
-    append_or_replace_sheet(processed_path, "Data", df)
-    append_or_replace_sheet(processed_path, "tong_hop_theo_nvkt", df_nvkt)
-    append_or_replace_sheet(processed_path, "tong_hop_theo_to", df_team)
-    append_or_replace_sheet(processed_path, "tong_hop_theo_loai_phieu", df_loai)
+    write_sheets(
+        processed_path,
+        {
+            "Data": df,
+            "tong_hop_theo_nvkt": df_nvkt,
+            "tong_hop_theo_to": df_team,
+            "tong_hop_theo_loai_phieu": df_loai,
+        },
+    )
     return processed_path
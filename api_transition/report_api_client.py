@@ -2,8 +2,12 @@
 """Helper gọi report-api và xử lý response export."""
 
 import base64
+import codecs
 import json
+import os
 import re
+import tempfile
+from contextlib import contextmanager
 from pathlib import Path
 from urllib.error import HTTPError, URLError
 from urllib.parse import urlencode
@@ -30,14 +34,39 @@ def make_common_headers(auth_state, cookies):
     }
 
 
-def http_json_request(url, method="GET", headers=None, payload=None, timeout=120):
+STREAM_CHUNK_SIZE = 1024 * 1024
+
+# Giới hạn số lời gọi get-data-export đồng thời (dùng chung giữa thread/process).
+# None = không giới hạn. Xem set_export_limiter().
+_EXPORT_LIMITER = None
+
+
+def set_export_limiter(limiter):
+    """Đặt semaphore (threading/multiprocessing) giới hạn export đồng thời."""
+    global _EXPORT_LIMITER
+    _EXPORT_LIMITER = limiter
+
+
+@contextmanager
+def export_slot():
+    if _EXPORT_LIMITER is None:
+        yield
+        return
+    with _EXPORT_LIMITER:
+        yield
+
+
+def _build_json_request(url, method="GET", headers=None, payload=None):
     request_headers = dict(headers or {})
     data = None
     if payload is not None:
         data = json.dumps(payload, ensure_ascii=False).encode("utf-8")
         request_headers.setdefault("Content-Type", "application/json")
+    return Request(url=url, data=data, headers=request_headers, method=method.upper())
+
 
-    req = Request(url=url, data=data, headers=request_headers, method=method.upper())
+def http_json_request(url, method="GET", headers=None, payload=None, timeout=120):
+    req = _build_json_request(url, method=method, headers=headers, payload=payload)
     try:
         with urlopen(req, timeout=timeout) as response:
             body = response.read().decode("utf-8")
@@ -136,17 +165,309 @@ def build_report_page_url(report_id, menu_id):
     return f"{Settings.BAOCAO_BASE_URL}/report/report-info?id={report_id}&menu_id={menu_id}"
 
 
-def get_info_report(report_id, menu_id, headers):
+def get_info_report(report_id, menu_id, headers, timeout=120):
     url = f"{Settings.API_BASE_URL}/get-info-report/{report_id}?{urlencode({'menu_id': menu_id})}"
     print(f"Đang gọi metadata report: {url}")
-    return http_json_request(url, method="GET", headers=headers)
+    return http_json_request(url, method="GET", headers=headers, timeout=timeout)
 
 
 def export_report(headers, payload, timeout=120):
     url = f"{Settings.API_BASE_URL}/get-data-export"
     print(f"Đang gọi export API: {url}")
     print(json.dumps(payload, ensure_ascii=False, indent=2))
-    return http_json_request(url, method="POST", headers=headers, payload=payload, timeout=timeout)
+    with export_slot():
+        return http_json_request(url, method="POST", headers=headers, payload=payload, timeout=timeout)
+
+
+def export_report_to_file(headers, payload, output_dir, output_name="", timeout=120):
+    """Gọi get-data-export và ghi thẳng FileContents ra đĩa theo từng chunk.
+
+    Không giữ toàn bộ JSON response hay bản decode base64 trong bộ nhớ: response
+    được đọc từng ``STREAM_CHUNK_SIZE`` byte, phần base64 được decode dần vào file
+    tạm trong ``output_dir`` rồi rename atomic sang tên đích.
+    """
+    url = f"{Settings.API_BASE_URL}/get-data-export"
+    print(f"Đang gọi export API (stream): {url}")
+    print(json.dumps(payload, ensure_ascii=False, indent=2))
+
+    output_root = Path(output_dir)
+    output_root.mkdir(parents=True, exist_ok=True)
+    req = _build_json_request(url, method="POST", headers=headers, payload=payload)
+
+    tmp_handle = tempfile.NamedTemporaryFile(dir=output_root, prefix=".export-", suffix=".part", delete=False)
+    tmp_path = Path(tmp_handle.name)
+    try:
+        with tmp_handle:
+            decoder = ExportStreamDecoder(tmp_handle)
+            try:
+                with export_slot(), urlopen(req, timeout=timeout) as response:
+                    while True:
+                        chunk = response.read(STREAM_CHUNK_SIZE)
+                        if not chunk:
+                            break
+                        decoder.feed(chunk)
+                    metadata = decoder.close()
+            except HTTPError as exc:
+                error_body = exc.read().decode("utf-8", errors="replace")
+                raise RuntimeError(
+                    f"HTTP {exc.code} khi gọi {url}\nResponse:\n{error_body}"
+                ) from exc
+            except URLError as exc:
+                raise RuntimeError(f"Lỗi kết nối khi gọi {url}: {exc}") from exc
+            except ValueError as exc:
+                raise RuntimeError(
+                    f"Response không phải JSON từ {url}: {exc}\n{decoder.head[:1000]}"
+                ) from exc
+
+        if not decoder.found_contents:
+            raise RuntimeError(
+                f"Response export không chứa FileContents:\n{json.dumps(metadata, ensure_ascii=False)[:1000]}"
+            )
+
+        file_name = output_name or metadata.get("FileDownloadName") or "report.xlsx"
+        output_path = output_root / sanitize_filename(file_name)
+        os.replace(tmp_path, output_path)
+        return output_path
+    finally:
+        if tmp_path.exists():
+            try:
+                tmp_path.unlink()
+            except OSError:
+                pass
+
+
+_JSON_WHITESPACE = " \t\r\n"
+_JSON_SIMPLE_ESCAPES = {
+    '"': '"',
+    "\\": "\\",
+    "/": "/",
+    "b": "\b",
+    "f": "\f",
+    "n": "\n",
+    "r": "\r",
+    "t": "\t",
+}
+_BASE64_STRIP = str.maketrans("", "", _JSON_WHITESPACE)
+
+
+class ExportStreamDecoder:
+    """Parser JSON tăng dần cho response get-data-export.
+
+    Chỉ hỗ trợ object JSON ở cấp gốc. Giá trị của ``stream_key`` (mặc định
+    ``FileContents``) được unescape + base64-decode trực tiếp vào ``sink``;
+    các member khác (FileDownloadName, ContentType...) nhỏ nên được gom lại
+    và trả về qua ``close()``.
+    """
+
+    def __init__(self, sink, stream_key="FileContents"):
+        self.sink = sink
+        self.stream_key = stream_key
+        self.found_contents = False
+        self.head = ""
+        self.metadata = {}
+        self._decoder = codecs.getincrementaldecoder("utf-8")()
+        self._buffer = ""
+        self._state = "start"
+        self._key = None
+        self._raw = []
+        self._depth = 0
+        self._in_string = False
+        self._escaped = False
+        self._b64_pending = ""
+
+    def feed(self, data):
+        text = self._decoder.decode(data)
+        if len(self.head) < 1000:
+            self.head += text[: 1000 - len(self.head)]
+        self._buffer += text
+        self._consume()
+
+    def close(self):
+        self._buffer += self._decoder.decode(b"", final=True)
+        self._consume()
+        self._buffer = self._buffer.lstrip(_JSON_WHITESPACE)
+        if self._state != "done" or self._buffer:
+            raise ValueError(f"JSON không hoàn chỉnh (state={self._state})")
+        return self.metadata
+
+    def _consume(self):
+        while self._buffer:
+            state = self._state
+            if state == "stream":
+                if not self._consume_stream():
+                    return
+                continue
+            if state == "raw_value":
+                if not self._consume_raw_value():
+                    return
+                continue
+            if state == "key":
+                if not self._consume_key():
+                    return
+                continue
+
+            stripped = self._buffer.lstrip(_JSON_WHITESPACE)
+            if not stripped:
+                self._buffer = ""
+                return
+            char = stripped[0]
+            self._buffer = stripped[1:]
+
+            if state == "start":
+                if char != "{":
+                    raise ValueError("response không phải JSON object")
+                self._state = "key_or_end"
+            elif state in {"key_or_end", "key_required"}:
+                if char == "}" and state == "key_or_end":
+                    self._state = "done"
+                elif char == '"':
+                    self._raw = []
+                    self._escaped = False
+                    self._state = "key"
+                else:
+                    raise ValueError(f"ký tự không hợp lệ {char!r} khi chờ key")
+            elif state == "colon":
+                if char != ":":
+                    raise ValueError(f"thiếu ':' sau key {self._key!r}")
+                self._state = "value"
+            elif state == "value":
+                if self._key == self.stream_key and char == '"':
+                    self.found_contents = True
+                    self._b64_pending = ""
+                    self._state = "stream"
+                else:
+                    self._raw = [char]
+                    self._depth = 1 if char in "[{" else 0
+                    self._in_string = char == '"'
+                    self._escaped = False
+                    self._state = "raw_value"
+            elif state == "after_value":
+                if char == ",":
+                    self._state = "key_required"
+                elif char == "}":
+                    self._state = "done"
+                else:
+                    raise ValueError(f"ký tự không hợp lệ {char!r} sau value")
+            elif state == "done":
+                raise ValueError("dữ liệu thừa sau JSON object")
+
+    def _consume_key(self):
+        buffer = self._buffer
+        index = 0
+        while index < len(buffer):
+            char = buffer[index]
+            index += 1
+            if self._escaped:
+                self._escaped = False
+            elif char == "\\":
+                self._escaped = True
+            elif char == '"':
+                self._key = json.loads('"' + "".join(self._raw) + '"')
+                self._buffer = buffer[index:]
+                self._state = "colon"
+                return True
+            self._raw.append(char)
+        self._buffer = ""
+        return False
+
+    def _consume_raw_value(self):
+        buffer = self._buffer
+        index = 0
+        while index < len(buffer):
+            char = buffer[index]
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif char == "\\":
+                    self._escaped = True
+                elif char == '"':
+                    self._in_string = False
+            elif char == '"':
+                self._in_string = True
+            elif char in "[{":
+                self._depth += 1
+            elif char in "]}":
+                if self._depth == 0:
+                    break
+                self._depth -= 1
+            elif char == "," and self._depth == 0:
+                break
+            self._raw.append(char)
+            index += 1
+        else:
+            self._buffer = ""
+            return False
+
+        self.metadata[self._key] = json.loads("".join(self._raw))
+        self._buffer = buffer[index:]
+        self._state = "after_value"
+        return True
+
+    def _consume_stream(self):
+        # Duyệt chunk 1 lần theo index, gom các đoạn đã unescape rồi ghi/cắt buffer 1 lần
+        buffer = self._buffer
+        length = len(buffer)
+        pieces = []
+        index = 0
+        quote_index = buffer.find('"')
+        finished = False
+        while index < length:
+            if self._escaped:
+                index = self._take_escape(buffer, index, pieces)
+                if self._escaped:
+                    break
+                continue
+            if quote_index != -1 and quote_index < index:
+                quote_index = buffer.find('"', index)
+            end = length if quote_index == -1 else quote_index
+            backslash_index = buffer.find("\\", index, end)
+            if backslash_index != -1:
+                pieces.append(buffer[index:backslash_index])
+                index = backslash_index + 1
+                self._escaped = True
+                continue
+            pieces.append(buffer[index:end])
+            index = end
+            if quote_index != -1:
+                index += 1
+                finished = True
+            break
+
+        self._write_base64("".join(pieces))
+        self._buffer = buffer[index:]
+        if finished:
+            self._flush_base64()
+            self._state = "after_value"
+        return finished
+
+    def _take_escape(self, buffer, index, pieces):
+        char = buffer[index]
+        if char == "u":
+            if len(buffer) < index + 5:
+                return index
+            pieces.append(chr(int(buffer[index + 1:index + 5], 16)))
+            index += 5
+        elif char in _JSON_SIMPLE_ESCAPES:
+            pieces.append(_JSON_SIMPLE_ESCAPES[char])
+            index += 1
+        else:
+            raise ValueError(f"escape không hợp lệ \\{char}")
+        self._escaped = False
+        return index
+
+    def _write_base64(self, text):
+        if not text:
+            return
+        pending = self._b64_pending + text.translate(_BASE64_STRIP)
+        usable = len(pending) - (len(pending) % 4)
+        if usable:
+            self.sink.write(base64.b64decode(pending[:usable]))
+        self._b64_pending = pending[usable:]
+
+    def _flush_base64(self):
+        if self._b64_pending:
+            self.sink.write(base64.b64decode(self._b64_pending))
+            self._b64_pending = ""
 
 
 def sanitize_filename(filename):
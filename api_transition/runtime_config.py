@@ -49,6 +49,7 @@ class DownloadConfig:
     max_retries: int = 3
     retry_timeouts: tuple[int, ...] = (180, 300, 500)
     retry_delay_seconds: int = 3
+    max_workers: int = 1
 
 
 def _deep_merge_dict(base: Mapping[str, Any], override: Mapping[str, Any]) -> Dict[str, Any]:
@@ -176,6 +177,18 @@ def _coerce_retry_timeouts(value: Any) -> tuple[int, ...]:
     return tuple(result)
 
 
+def _coerce_positive_int(value: Any, *, field_name: str, default: int) -> int:
+    if value is None:
+        return default
+    try:
+        result = int(value)
+    except (TypeError, ValueError) as exc:
+        raise ValueError(f"Truong '{field_name}' phai la so nguyen") from exc
+    if result < 1:
+        raise ValueError(f"Truong '{field_name}' phai >= 1")
+    return result
+
+
 def _normalize_string_mapping(
     value: Any,
     *,
@@ -347,6 +360,13 @@ def load_runtime_context(config_path: str | Path) -> RuntimeContext:
         max_retries=int(download_raw.get("max_retries", 3)) if download_raw else 3,
         retry_timeouts=_coerce_retry_timeouts(download_raw.get("retry_timeouts")) if download_raw else (180, 300, 500),
         retry_delay_seconds=int(download_raw.get("retry_delay_seconds", 3)) if download_raw else 3,
+        max_workers=_coerce_positive_int(
+            download_raw.get("max_workers"),
+            field_name="download.max_workers",
+            default=1,
+        )
+        if download_raw
+        else 1,
     )
 
     report_configs = {
@@ -0,0 +1,160 @@
+# -*- coding: utf-8 -*-
+"""Cache session report-api ra đĩa để các lượt chạy sau không phải login lại.
+
+Session được lưu dưới dạng JSON gồm headers (Authorization, Cookie...),
+cookies thô của browser context và thời điểm hết hạn. Khi đọc lại, cache chỉ
+được dùng nếu còn hạn và probe ``get-info-report`` trả về thành công; ngược lại
+caller tự login bằng Playwright và ghi đè cache.
+"""
+
+import base64
+import json
+import os
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from api_transition.report_api_client import get_info_report
+from api_transition.settings import Settings
+
+
+SESSION_CACHE_VERSION = 1
+
+# Report dùng để probe session: cùng report với _DEFAULT_AUTH_REPORT_URL
+PROBE_REPORT_ID = "534964"
+PROBE_MENU_ID = "535020"
+
+_AUTH_ERROR_MARKERS = ("HTTP 401", "HTTP 403")
+
+
+def default_cache_path() -> Path:
+    return Path(Settings.SESSION_CACHE_PATH).expanduser()
+
+
+def token_expiry(authorization: str) -> Optional[float]:
+    """Đọc claim ``exp`` từ Bearer JWT (không verify chữ ký). None nếu không đọc được."""
+    token = str(authorization or "").strip()
+    if token.lower().startswith("bearer "):
+        token = token[7:].strip()
+    parts = token.split(".")
+    if len(parts) != 3:
+        return None
+    payload = parts[1] + "=" * (-len(parts[1]) % 4)
+    try:
+        claims = json.loads(base64.urlsafe_b64decode(payload.encode("ascii")))
+    except (ValueError, UnicodeDecodeError):
+        return None
+    exp = claims.get("exp") if isinstance(claims, dict) else None
+    try:
+        return float(exp) if exp is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+def is_auth_error(error: Any) -> bool:
+    """True nếu lỗi (exception hoặc chuỗi) là do Authorization hết hạn/bị từ chối."""
+    text = str(error or "")
+    return any(marker in text for marker in _AUTH_ERROR_MARKERS)
+
+
+def _session_expires_at(headers: Dict[str, str], saved_at: float) -> float:
+    candidates = [saved_at + Settings.SESSION_CACHE_TTL_SECONDS]
+    jwt_exp = token_expiry(headers.get("Authorization", ""))
+    if jwt_exp is not None:
+        candidates.append(jwt_exp)
+    return min(candidates)
+
+
+def save_session(session: Dict[str, Any], path: Optional[Path] = None) -> Path:
+    """Ghi headers/cookies của session ra cache (atomic, quyền 0600)."""
+    cache_path = Path(path) if path is not None else default_cache_path()
+    cache_path.parent.mkdir(parents=True, exist_ok=True)
+
+    headers = dict(session["headers"])
+    cookies = list(session.get("cookies") or [])
+    saved_at = time.time()
+    record = {
+        "version": SESSION_CACHE_VERSION,
+        "base_url": Settings.BAOCAO_BASE_URL,
+        "username": Settings.BAOCAO_USERNAME,
+        "saved_at": saved_at,
+        "expires_at": _session_expires_at(headers, saved_at),
+        "headers": headers,
+        "cookies": cookies,
+    }
+
+    fd, tmp_name = tempfile.mkstemp(dir=cache_path.parent, prefix=".session-", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as handle:
+            json.dump(record, handle, ensure_ascii=False, indent=2)
+        os.chmod(tmp_name, 0o600)
+        os.replace(tmp_name, cache_path)
+    finally:
+        if os.path.exists(tmp_name):
+            os.unlink(tmp_name)
+    return cache_path
+
+
+def invalidate_session(path: Optional[Path] = None) -> None:
+    cache_path = Path(path) if path is not None else default_cache_path()
+    try:
+        cache_path.unlink()
+    except FileNotFoundError:
+        pass
+
+
+def probe_session(headers: Dict[str, str], timeout: int = 30) -> bool:
+    """Gọi get-info-report nhẹ để kiểm tra Authorization còn dùng được không."""
+    try:
+        get_info_report(PROBE_REPORT_ID, PROBE_MENU_ID, headers, timeout=timeout)
+    except RuntimeError as exc:
+        if is_auth_error(exc):
+            return False
+        print(f"⚠️  Probe session lỗi không xác định, bỏ qua cache: {exc}")
+        return False
+    except OSError as exc:
+        print(f"⚠️  Probe session lỗi kết nối, bỏ qua cache: {exc}")
+        return False
+    return True
+
+
+def load_cached_session(path: Optional[Path] = None, probe: bool = True) -> Optional[Dict[str, Any]]:
+    """Trả về session dict từ cache nếu còn hạn và hợp lệ, ngược lại None.
+
+    Session trả về không có browser/playwright; ``close_session`` vẫn xử lý được.
+    """
+    cache_path = Path(path) if path is not None else default_cache_path()
+    if not cache_path.exists():
+        return None
+
+    try:
+        record = json.loads(cache_path.read_text(encoding="utf-8"))
+    except (OSError, ValueError) as exc:
+        print(f"⚠️  Không đọc được session cache {cache_path}: {exc}")
+        return None
+
+    if record.get("version") != SESSION_CACHE_VERSION:
+        return None
+    if record.get("base_url") != Settings.BAOCAO_BASE_URL or record.get("username") != Settings.BAOCAO_USERNAME:
+        return None
+
+    remaining = float(record.get("expires_at") or 0) - time.time()
+    if remaining < Settings.SESSION_CACHE_MIN_TTL_SECONDS:
+        print("Session cache đã hết hạn hoặc sắp hết hạn, cần login lại.")
+        return None
+
+    headers = record.get("headers") or {}
+    if not headers.get("Authorization"):
+        return None
+    if probe and not probe_session(headers):
+        print("Session cache bị server từ chối, cần login lại.")
+        invalidate_session(cache_path)
+        return None
+
+    print(f"✅ Dùng lại session cache ({cache_path}, còn ~{int(remaining // 60)} phút)")
+    return {
+        "headers": headers,
+        "cookies": record.get("cookies") or [],
+        "from_cache": True,
+    }
@@ -29,6 +29,28 @@ class Settings:
     API_BASE_URL = "https://baocaobe.myhanoi.vn/report-api"
     DEFAULT_REFERER = BAOCAO_BASE_URL + "/"
 
+    SESSION_CACHE_ENABLED = os.getenv("SESSION_CACHE_ENABLED", "True").lower() == "true"
+    SESSION_CACHE_PATH = os.getenv(
+        "SESSION_CACHE_PATH",
+        str(ROOT_DIR / "api_transition" / ".cache" / "report_api_session.json"),
+    )
+    SESSION_CACHE_TTL_SECONDS = int(os.getenv("SESSION_CACHE_TTL_SECONDS", "28800"))
+    SESSION_CACHE_MIN_TTL_SECONDS = int(os.getenv("SESSION_CACHE_MIN_TTL_SECONDS", "600"))
+
+    EXCEL_CACHE_ENABLED = os.getenv("EXCEL_CACHE_ENABLED", "True").lower() == "true"
+    EXCEL_CACHE_DIR = os.getenv(
+        "EXCEL_CACHE_DIR",
+        str(ROOT_DIR / "api_transition" / ".cache" / "excel"),
+    )
+    EXCEL_CACHE_MAX_AGE_DAYS = float(os.getenv("EXCEL_CACHE_MAX_AGE_DAYS", "14"))
+
+    CHART_CACHE_ENABLED = os.getenv("CHART_CACHE_ENABLED", "True").lower() == "true"
+    CHART_CACHE_DIR = os.getenv(
+        "CHART_CACHE_DIR",
+        str(ROOT_DIR / "api_transition" / ".cache" / "charts"),
+    )
+    CHART_CACHE_MAX_AGE_DAYS = float(os.getenv("CHART_CACHE_MAX_AGE_DAYS", "30"))
+
     @classmethod
     def validate(cls):
         errors = []
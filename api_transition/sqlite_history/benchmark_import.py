@@ -0,0 +1,296 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Benchmark import sheet tong hop vao SQLite: duong cu (dict tung dong) vs bulk theo cot.
+
+Do 2 giai doan cho tung workbook:
+- read: doc workbook thanh du lieu san sang import
+- insert: ghi cac dong vao bang du lieu dong
+
+Duong cu duoc giu lai trong file nay lam moc so sanh. Sau khi chay, script so
+sanh noi dung 2 DB (bo qua id va __imported_at) de dam bao ket qua trung nhau.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import sqlite3
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Sequence, Tuple
+
+import pandas as pd
+
+if __package__ in (None, ""):
+    sys.path.insert(0, str(Path(__file__).resolve().parent.parent.parent))
+
+from api_transition.sqlite_history.import_processed_to_sqlite import (
+    DEFAULT_PROCESSED_ROOT,
+    META_IMPORTED_AT,
+    META_ROW_HASH,
+    META_ROW_NUM,
+    META_SHEET_ID,
+    META_SNAPSHOT_ID,
+    SheetData,
+    build_report_meta,
+    clean_column_names,
+    connect_sqlite,
+    current_timestamp,
+    detect_measure_columns,
+    drop_empty_records,
+    ensure_sheet_data_table,
+    get_allowed_sheet_names,
+    infer_sheet_column_types,
+    insert_sheet_frame,
+    jsonable_value,
+    load_import_allowlist,
+    normalize_key,
+    non_empty_row_mask,
+    quote_ident,
+    read_workbook_sheets,
+    sanitize_slug,
+    sha256_bytes,
+)
+
+BENCH_SNAPSHOT_ID = 1
+BENCH_SHEET_ID = 1
+
+
+def parse_args(argv: Sequence[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmark import processed workbook vao SQLite")
+    parser.add_argument("workbooks", nargs="*", help="Workbook can do. Mac dinh: cac file lon nhat trong Processed.")
+    parser.add_argument("--processed-root", default=str(DEFAULT_PROCESSED_ROOT), help="Thu muc Processed.")
+    parser.add_argument("--top", type=int, default=3, help="So workbook lon nhat lay tu Processed.")
+    parser.add_argument(
+        "--synthetic-rows",
+        type=int,
+        default=0,
+        help="Sinh them 1 workbook gia lap co so dong nay (dung khi may khong co du lieu that).",
+    )
+    return parser.parse_args(argv)
+
+
+# ---------------------------------------------------------------------------
+# Duong cu (truoc khi chuyen sang bulk theo cot)
+# ---------------------------------------------------------------------------
+
+def legacy_read_workbook_sheets(workbook_path: Path) -> List[Tuple[str, List[str], List[Dict[str, Any]]]]:
+    excel = pd.ExcelFile(workbook_path, engine="openpyxl")
+    results = []
+    for sheet_name in excel.sheet_names:
+        df = excel.parse(sheet_name=sheet_name, dtype=object)
+        df = drop_empty_records(df.copy())
+        df.columns = clean_column_names(df.columns)
+        detect_measure_columns(df)
+        rows = [{key: jsonable_value(value) for key, value in row.items()} for row in df.to_dict(orient="records")]
+        results.append((sheet_name, list(df.columns), rows))
+    return results
+
+
+def legacy_insert_rows(
+    conn: sqlite3.Connection,
+    table_name: str,
+    sheet_name: str,
+    column_names: Sequence[str],
+    rows: Sequence[Dict[str, Any]],
+) -> int:
+    rows_to_insert: List[Dict[str, Any]] = []
+    for row_number, record in enumerate(rows, start=1):
+        if not any(jsonable_value(value) is not None for value in record.values()):
+            continue
+        full_row_json = json.dumps(record, ensure_ascii=False, sort_keys=True)
+        row_payload: Dict[str, Any] = {
+            META_SNAPSHOT_ID: BENCH_SNAPSHOT_ID,
+            META_SHEET_ID: BENCH_SHEET_ID,
+            META_ROW_NUM: row_number,
+            META_ROW_HASH: sha256_bytes(f"{sheet_name}|{row_number}|{full_row_json}".encode("utf-8")),
+            META_IMPORTED_AT: current_timestamp(),
+        }
+        for column_name in column_names:
+            row_payload[column_name] = jsonable_value(record.get(column_name))
+        rows_to_insert.append(row_payload)
+    if not rows_to_insert:
+        return 0
+    columns = list(rows_to_insert[0])
+    placeholders = ", ".join("?" for _ in columns)
+    quoted_columns = ", ".join(quote_ident(column) for column in columns)
+    sql = f"INSERT INTO {quote_ident(table_name)} ({quoted_columns}) VALUES ({placeholders})"
+    conn.executemany(sql, [tuple(row.get(column) for column in columns) for row in rows_to_insert])
+    return len(rows_to_insert)
+
+
+# ---------------------------------------------------------------------------
+# Do dac
+# ---------------------------------------------------------------------------
+
+def pick_workbooks(args: argparse.Namespace, scratch_dir: Path) -> List[Path]:
+    workbooks = [Path(value).expanduser().resolve() for value in args.workbooks]
+    processed_root = Path(args.processed_root).expanduser().resolve()
+    if not workbooks and processed_root.exists():
+        candidates = sorted(processed_root.rglob("*.xlsx"), key=lambda path: path.stat().st_size, reverse=True)
+        workbooks = candidates[: args.top]
+    if args.synthetic_rows > 0:
+        workbooks.append(build_synthetic_workbook(scratch_dir / "synthetic_processed.xlsx", args.synthetic_rows))
+    return workbooks
+
+
+def build_synthetic_workbook(path: Path, row_count: int) -> Path:
+    frame = pd.DataFrame(
+        {
+            "TTVT": [f"TTVT {index % 9}" for index in range(row_count)],
+            "DOIVT": [f"Doi {index % 47}" for index in range(row_count)],
+            "NVKT": [f"Nhân viên {index % 613}" for index in range(row_count)],
+            "Tổng phiếu": [index % 250 for index in range(row_count)],
+            "Phiếu đạt": [(index * 7) % 200 for index in range(row_count)],
+            "Tỷ lệ đạt (%)": [round((index % 1000) / 10, 2) for index in range(row_count)],
+            "Điểm BSC": [None if index % 17 == 0 else round(1 + (index % 400) / 100, 2) for index in range(row_count)],
+            "Ngày cập nhật": [pd.Timestamp("2026-01-01") + pd.Timedelta(hours=index % 720) for index in range(row_count)],
+        }
+    )
+    frame.to_excel(path, sheet_name="Tong_hop_theo_NVKT", index=False)
+    return path
+
+
+def importable_sheet_names(workbook_path: Path, processed_root: Path) -> set[str] | None:
+    try:
+        report_meta = build_report_meta(processed_root, workbook_path)
+    except ValueError:
+        return None
+    allowed = get_allowed_sheet_names(report_meta, load_import_allowlist())
+    return allowed or None
+
+
+def open_bench_db(db_path: Path) -> sqlite3.Connection:
+    conn = connect_sqlite(db_path)
+    # Bang dong tham chieu bao_cao_tong_hop_ngay/sheet_bao_cao_tong_hop; benchmark chi do phan ghi dong.
+    conn.execute("PRAGMA foreign_keys = OFF")
+    return conn
+
+
+def table_for(workbook_path: Path, sheet_name: str) -> str:
+    return sanitize_slug(f"bench_{workbook_path.stem}_{sheet_name}") or "bench_sheet"
+
+
+def run_legacy(workbook_path: Path, allowed: set[str] | None, db_path: Path, column_types: Dict[str, Dict[str, str]]) -> Tuple[float, float, int]:
+    started = time.perf_counter()
+    sheets = legacy_read_workbook_sheets(workbook_path)
+    read_seconds = time.perf_counter() - started
+
+    conn = open_bench_db(db_path)
+    row_count = 0
+    try:
+        started = time.perf_counter()
+        conn.execute("BEGIN")
+        for sheet_name, column_names, rows in sheets:
+            if sheet_name not in column_types:
+                continue
+            table_name = table_for(workbook_path, sheet_name)
+            ensure_sheet_data_table(conn, table_name, column_types[sheet_name])
+            row_count += legacy_insert_rows(conn, table_name, sheet_name, column_names, rows)
+        conn.commit()
+        insert_seconds = time.perf_counter() - started
+    finally:
+        conn.close()
+    return read_seconds, insert_seconds, row_count
+
+
+def run_bulk(workbook_path: Path, allowed: set[str] | None, db_path: Path) -> Tuple[float, float, int, Dict[str, Dict[str, str]]]:
+    started = time.perf_counter()
+    sheets = [sheet for sheet in read_workbook_sheets(workbook_path) if is_selected(sheet, allowed)]
+    read_seconds = time.perf_counter() - started
+
+    column_types = {sheet.sheet_name: infer_sheet_column_types(sheet) for sheet in sheets}
+    conn = open_bench_db(db_path)
+    row_count = 0
+    try:
+        started = time.perf_counter()
+        conn.execute("BEGIN")
+        for sheet in sheets:
+            table_name = table_for(workbook_path, sheet.sheet_name)
+            ensure_sheet_data_table(conn, table_name, column_types[sheet.sheet_name])
+            mask = non_empty_row_mask(sheet)
+            row_numbers = [int(position) + 1 for position in mask.to_numpy().nonzero()[0]]
+            row_count += insert_sheet_frame(
+                conn,
+                table_name,
+                sheet.sheet_name,
+                sheet.frame.loc[mask, sheet.column_names],
+                row_numbers,
+                BENCH_SNAPSHOT_ID,
+                BENCH_SHEET_ID,
+            )
+        conn.commit()
+        insert_seconds = time.perf_counter() - started
+    finally:
+        conn.close()
+    return read_seconds, insert_seconds, row_count, column_types
+
+
+def is_selected(sheet: SheetData, allowed: set[str] | None) -> bool:
+    if allowed is None:
+        return sheet.sheet_kind not in {"source", "note"}
+    return normalize_key(sheet.sheet_name) in allowed
+
+
+def dump_tables(db_path: Path, table_names: Sequence[str]) -> Dict[str, List[Tuple[Any, ...]]]:
+    conn = sqlite3.connect(db_path)
+    try:
+        dumped = {}
+        for table_name in table_names:
+            columns = [
+                row[1]
+                for row in conn.execute(f"PRAGMA table_info({quote_ident(table_name)})").fetchall()
+                if row[1] not in {"id", META_IMPORTED_AT}
+            ]
+            quoted = ", ".join(quote_ident(column) for column in columns)
+            dumped[table_name] = conn.execute(
+                f"SELECT {quoted} FROM {quote_ident(table_name)} ORDER BY {quote_ident(META_ROW_NUM)}"
+            ).fetchall()
+        return dumped
+    finally:
+        conn.close()
+
+
+def rate(rows: int, seconds: float) -> str:
+    return f"{rows / seconds:>10,.0f} dong/s" if seconds > 0 else "         - dong/s"
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    args = parse_args(argv)
+    processed_root = Path(args.processed_root).expanduser().resolve()
+    with tempfile.TemporaryDirectory(prefix="sqlite_import_bench_") as scratch:
+        scratch_dir = Path(scratch)
+        workbooks = pick_workbooks(args, scratch_dir)
+        if not workbooks:
+            print("Khong co workbook de do. Truyen duong dan workbook hoac dung --synthetic-rows.")
+            return 1
+
+        for index, workbook_path in enumerate(workbooks, start=1):
+            allowed = importable_sheet_names(workbook_path, processed_root)
+            legacy_db = scratch_dir / f"legacy_{index}.db"
+            bulk_db = scratch_dir / f"bulk_{index}.db"
+
+            bulk_read, bulk_insert, bulk_rows, column_types = run_bulk(workbook_path, allowed, bulk_db)
+            legacy_read, legacy_insert, legacy_rows = run_legacy(workbook_path, allowed, legacy_db, column_types)
+
+            table_names = [table_for(workbook_path, sheet_name) for sheet_name in column_types]
+            same = legacy_rows == bulk_rows and dump_tables(legacy_db, table_names) == dump_tables(bulk_db, table_names)
+
+            print(f"\n{workbook_path.name}: {len(column_types)} sheet, {bulk_rows:,} dong")
+            print(f"  read   cu  {legacy_read:8.2f}s | moi {bulk_read:8.2f}s")
+            print(f"  insert cu  {legacy_insert:8.2f}s {rate(legacy_rows, legacy_insert)} | "
+                  f"moi {bulk_insert:8.2f}s {rate(bulk_rows, bulk_insert)}")
+            legacy_total = legacy_read + legacy_insert
+            bulk_total = bulk_read + bulk_insert
+            print(f"  tong   cu  {legacy_total:8.2f}s {rate(legacy_rows, legacy_total)} | "
+                  f"moi {bulk_total:8.2f}s {rate(bulk_rows, bulk_total)}")
+            print(f"  du lieu trung nhau: {'co' if same else 'KHONG'}")
+            if not same:
+                return 2
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
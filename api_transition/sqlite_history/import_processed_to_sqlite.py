@@ -7,6 +7,7 @@ from __future__ import annotations
 import argparse
 import csv
 import hashlib
+import itertools
 import json
 import numbers
 import re
@@ -97,6 +98,7 @@ SYSTEM_COLUMNS = (
     (META_ROW_HASH, "TEXT NOT NULL"),
     (META_IMPORTED_AT, "TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP"),
 )
+INSERT_CHUNK_SIZE = 5000
 
 
 @dataclass(frozen=True)
@@ -117,7 +119,8 @@ class SheetData:
     row_count: int
     column_names: List[str]
     measure_columns: List[str]
-    rows: List[Dict[str, Any]]
+    # Gia tri da qua jsonable_value, dtype object, cot = column_names.
+    frame: pd.DataFrame
 
 
 @dataclass(frozen=True)
@@ -402,7 +405,11 @@ def read_workbook_sheets(workbook_path: Path) -> List[SheetData]:
         df = drop_empty_records(df.copy())
         df.columns = clean_column_names(df.columns)
         measure_columns = detect_measure_columns(df)
-        rows = [{key: jsonable_value(value) for key, value in row.items()} for row in df.to_dict(orient="records")]
+        frame = pd.DataFrame(
+            {column: [jsonable_value(value) for value in df[column].tolist()] for column in df.columns},
+            columns=list(df.columns),
+            dtype=object,
+        )
         results.append(
             SheetData(
                 sheet_name=sheet_name,
@@ -411,7 +418,7 @@ def read_workbook_sheets(workbook_path: Path) -> List[SheetData]:
                 row_count=len(df.index),
                 column_names=list(df.columns),
                 measure_columns=measure_columns,
-                rows=rows,
+                frame=frame,
             )
         )
     return results
@@ -540,7 +547,7 @@ def infer_sheet_column_types(sheet: SheetData) -> Dict[str, str]:
     measure_set = set(sheet.measure_columns)
     column_types: Dict[str, str] = {}
     for column_name in sheet.column_names:
-        values = [row.get(column_name) for row in sheet.rows]
+        values = sheet.frame[column_name].tolist()
         if column_name in measure_set:
             column_types[column_name] = infer_measure_column_type(values)
         else:
@@ -592,25 +599,6 @@ def ensure_sheet_data_table(
         )
 
 
-def insert_rows_with_quoted_columns(
-    conn: sqlite3.Connection,
-    table_name: str,
-    rows: Sequence[Dict[str, Any]],
-) -> int:
-    if not rows:
-        return 0
-    columns: List[str] = []
-    for row in rows:
-        for key in row:
-            if key not in columns:
-                columns.append(key)
-    placeholders = ", ".join("?" for _ in columns)
-    quoted_columns = ", ".join(quote_ident(column) for column in columns)
-    sql = f"INSERT INTO {quote_ident(table_name)} ({quoted_columns}) VALUES ({placeholders})"
-    conn.executemany(sql, [tuple(row.get(column) for column in columns) for row in rows])
-    return len(rows)
-
-
 def archive_processed_file(workbook_path: Path, processed_root: Path, archive_root: Path, snapshot_date: date) -> Path:
     rel_path = workbook_path.relative_to(processed_root)
     archive_path = archive_root / snapshot_date.isoformat() / rel_path
@@ -891,16 +879,16 @@ def get_dimension_columns(sheet: SheetData) -> List[str]:
     return [column for column in sheet.column_names if column not in sheet.measure_columns]
 
 
-def row_has_values(record: Dict[str, Any]) -> bool:
-    return any(jsonable_value(value) is not None for value in record.values())
+def non_empty_row_mask(sheet: SheetData) -> pd.Series:
+    if sheet.frame.columns.empty:
+        return pd.Series(False, index=sheet.frame.index)
+    return sheet.frame.notna().any(axis=1)
 
 
-def measure_value_count(record: Dict[str, Any], measure_columns: Sequence[str]) -> int:
-    count = 0
-    for column_name in measure_columns:
-        if jsonable_value(record.get(column_name)) is not None:
-            count += 1
-    return count
+def measure_value_total(sheet: SheetData, mask: pd.Series) -> int:
+    if not sheet.measure_columns:
+        return 0
+    return int(sheet.frame.loc[mask, sheet.measure_columns].notna().to_numpy().sum())
 
 
 def analyse_importable_sheets(importable_sheets: Sequence[SheetData]) -> Tuple[int, int, int, int]:
@@ -909,14 +897,74 @@ def analyse_importable_sheets(importable_sheets: Sequence[SheetData]) -> Tuple[i
     row_count = 0
     metric_count = 0
     for sheet in importable_sheets:
-        for record in sheet.rows:
-            if not row_has_values(record):
-                continue
-            row_count += 1
-            metric_count += measure_value_count(record, sheet.measure_columns)
+        mask = non_empty_row_mask(sheet)
+        row_count += int(mask.sum())
+        metric_count += measure_value_total(sheet, mask)
     return sheet_count, table_count, row_count, metric_count
 
 
+def _json_value_column(values: Sequence[Any]) -> List[str]:
+    """json.dumps tung gia tri cua 1 cot, nho ket qua theo (kieu, gia tri)."""
+    encoded: Dict[Tuple[type, Any], str] = {}
+    output: List[str] = []
+    for value in values:
+        key = (value.__class__, value)
+        text = encoded.get(key)
+        if text is None:
+            text = json.dumps(value, ensure_ascii=False)
+            encoded[key] = text
+        output.append(text)
+    return output
+
+
+def compute_row_hashes(sheet_name: str, frame: pd.DataFrame, row_numbers: Sequence[int]) -> List[str]:
+    """Hash tung dong theo cot, trung voi sha256("sheet|row|json.dumps(record, sort_keys=True)")."""
+    fragments = []
+    for column in sorted(frame.columns):
+        prefix = f"{json.dumps(column, ensure_ascii=False)}: "
+        fragments.append([prefix + text for text in _json_value_column(frame[column].tolist())])
+    bodies = (", ".join(parts) for parts in zip(*fragments)) if fragments else ("" for _ in row_numbers)
+    return [
+        sha256_bytes(f"{sheet_name}|{row_number}|{{{body}}}".encode("utf-8"))
+        for row_number, body in zip(row_numbers, bodies)
+    ]
+
+
+def insert_sheet_frame(
+    conn: sqlite3.Connection,
+    table_name: str,
+    sheet_name: str,
+    frame: pd.DataFrame,
+    row_numbers: Sequence[int],
+    report_day_id: int,
+    sheet_id: int,
+    chunk_size: int = INSERT_CHUNK_SIZE,
+) -> int:
+    """executemany theo lo, tuple lay thang tu cac cot cua frame (1 timestamp cho ca sheet)."""
+    if frame.empty:
+        return 0
+    columns = [META_SNAPSHOT_ID, META_SHEET_ID, META_ROW_NUM, META_ROW_HASH, META_IMPORTED_AT, *frame.columns]
+    placeholders = ", ".join("?" for _ in columns)
+    quoted_columns = ", ".join(quote_ident(column) for column in columns)
+    sql = f"INSERT INTO {quote_ident(table_name)} ({quoted_columns}) VALUES ({placeholders})"
+
+    imported_at = current_timestamp()
+    row_iter = zip(
+        itertools.repeat(report_day_id),
+        itertools.repeat(sheet_id),
+        row_numbers,
+        compute_row_hashes(sheet_name, frame, row_numbers),
+        itertools.repeat(imported_at),
+        *(frame[column].tolist() for column in frame.columns),
+    )
+    while True:
+        chunk = list(itertools.islice(row_iter, chunk_size))
+        if not chunk:
+            break
+        conn.executemany(sql, chunk)
+    return len(frame.index)
+
+
 def insert_sheet_rows(
     conn: sqlite3.Connection,
     report_meta: ReportMeta,
@@ -969,28 +1017,19 @@ def insert_sheet_rows(
         )
         sheet_id = int(sheet_cursor.lastrowid)
 
-        rows_to_insert: List[Dict[str, Any]] = []
-        imported_row_count = 0
-        imported_metric_count = 0
-
-        for row_number, record in enumerate(sheet.rows, start=1):
-            if not row_has_values(record):
-                continue
-            full_row_json = json.dumps(record, ensure_ascii=False, sort_keys=True)
-            row_payload: Dict[str, Any] = {
-                META_SNAPSHOT_ID: report_day_id,
-                META_SHEET_ID: sheet_id,
-                META_ROW_NUM: row_number,
-                META_ROW_HASH: sha256_bytes(f"{target.sheet_name}|{row_number}|{full_row_json}".encode("utf-8")),
-                META_IMPORTED_AT: current_timestamp(),
-            }
-            for column_name in sheet.column_names:
-                row_payload[column_name] = jsonable_value(record.get(column_name))
-            rows_to_insert.append(row_payload)
-            imported_row_count += 1
-            imported_metric_count += measure_value_count(record, sheet.measure_columns)
-
-        insert_rows_with_quoted_columns(conn, target.table_name, rows_to_insert)
+        mask = non_empty_row_mask(sheet)
+        kept = sheet.frame.loc[mask, sheet.column_names]
+        row_numbers = [int(position) + 1 for position in mask.to_numpy().nonzero()[0]]
+        imported_row_count = insert_sheet_frame(
+            conn,
+            target.table_name,
+            target.sheet_name,
+            kept,
+            row_numbers,
+            report_day_id,
+            sheet_id,
+        )
+        imported_metric_count = measure_value_total(sheet, mask)
         conn.execute(
             """
             UPDATE sheet_bao_cao_tong_hop
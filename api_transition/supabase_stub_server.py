@@ -0,0 +1,305 @@
+# -*- coding: utf-8 -*-
+"""Server gia lap PostgREST + Storage cua Supabase de chay/benchmark supabase_sync offline.
+
+Ho tro cac endpoint ma ``supabase_sync.SupabaseClient`` goi:
+
+- ``POST /rest/v1/<table>`` (insert / upsert theo ``on_conflict`` + ``Prefer: resolution=merge-duplicates``)
+- ``GET`` (``select=``) / ``DELETE`` / ``PATCH /rest/v1/<table>?<cot>=eq.<gia tri>``
+- ``POST /storage/v1/object/<bucket>/<path>``
+- ``GET /__stats`` (so dong moi bang, so object, so request/loi da tra), ``POST /__reset``
+
+Body ``Content-Encoding: gzip`` duoc giai nen. ``--latency-ms`` gia lap do tre mang moi
+request, ``--fail-rate`` tra ngau nhien 429/503 (kem ``Retry-After``) de thu retry.
+
+Vi du:
+    python api_transition/supabase_stub_server.py --port 54321 --latency-ms 30
+    SUPABASE_URL=http://127.0.0.1:54321 SUPABASE_SERVICE_ROLE_KEY=stub \\
+        python api_transition/supabase_sync.py --snapshot-date 2026-03-01
+"""
+
+from __future__ import annotations
+
+import argparse
+import gzip
+import hashlib
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from urllib.parse import parse_qs, unquote, urlsplit
+
+CASCADE_PARENT = "meta_ingest_run"
+
+
+class StubState:
+    """Du lieu trong RAM cua server gia lap (khoa chung cho moi thread)."""
+
+    def __init__(self, latency_ms: float = 0.0, fail_rate: float = 0.0, seed: Optional[int] = None):
+        self.latency = latency_ms / 1000.0
+        self.fail_rate = fail_rate
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        with self.lock:
+            self.tables: Dict[str, List[Dict[str, Any]]] = {}
+            self.unique: Dict[Tuple[str, str], Dict[Tuple[Any, ...], int]] = {}
+            self.objects: Dict[str, Dict[str, Any]] = {}
+            self.counters = {"requests": 0, "failures_injected": 0, "gzip_requests": 0, "bytes_received": 0}
+
+    def should_fail(self) -> bool:
+        with self.lock:
+            return self.fail_rate > 0 and self.random.random() < self.fail_rate
+
+    def insert(self, table: str, rows: List[Dict[str, Any]], on_conflict: Optional[str]) -> None:
+        with self.lock:
+            stored = self.tables.setdefault(table, [])
+            if not on_conflict:
+                stored.extend(rows)
+                return
+            columns = [column.strip() for column in on_conflict.split(",")]
+            index = self.unique.setdefault((table, on_conflict), {})
+            for row in rows:
+                key = tuple(row.get(column) for column in columns)
+                position = index.get(key)
+                if position is None:
+                    index[key] = len(stored)
+                    stored.append(row)
+                else:
+                    stored[position] = {**stored[position], **row}
+
+    def _matches(self, row: Dict[str, Any], filters: Dict[str, str]) -> bool:
+        for column, condition in filters.items():
+            if not condition.startswith("eq."):
+                continue
+            if str(row.get(column)) != condition[3:]:
+                return False
+        return True
+
+    def delete(self, table: str, filters: Dict[str, str]) -> None:
+        with self.lock:
+            self._delete_locked(table, filters)
+            if table == CASCADE_PARENT and "run_id" in filters:
+                # gia lap ON DELETE CASCADE tu meta_ingest_run sang cac bang con
+                for child in list(self.tables):
+                    if child != table:
+                        self._delete_locked(child, {"run_id": filters["run_id"]})
+
+    def _delete_locked(self, table: str, filters: Dict[str, str]) -> None:
+        stored = self.tables.get(table, [])
+        kept = [row for row in stored if not self._matches(row, filters)]
+        if len(kept) == len(stored):
+            return
+        self.tables[table] = kept
+        for (name, on_conflict), index in self.unique.items():
+            if name != table:
+                continue
+            columns = [column.strip() for column in on_conflict.split(",")]
+            index.clear()
+            for position, row in enumerate(kept):
+                index[tuple(row.get(column) for column in columns)] = position
+
+    def select(self, table: str, filters: Dict[str, str], columns: str = "*") -> List[Dict[str, Any]]:
+        with self.lock:
+            rows = [dict(row) for row in self.tables.get(table, []) if self._matches(row, filters)]
+        if columns.strip() == "*":
+            return rows
+        wanted = [column.strip() for column in columns.split(",")]
+        return [{column: row.get(column) for column in wanted} for row in rows]
+
+    def patch(self, table: str, filters: Dict[str, str], payload: Dict[str, Any]) -> None:
+        with self.lock:
+            for row in self.tables.get(table, []):
+                if self._matches(row, filters):
+                    row.update(payload)
+
+    def put_object(self, path: str, content: bytes, content_type: str) -> None:
+        with self.lock:
+            self.objects[path] = {
+                "size_bytes": len(content),
+                "sha256": hashlib.sha256(content).hexdigest(),
+                "content_type": content_type,
+            }
+
+    def stats(self) -> Dict[str, Any]:
+        with self.lock:
+            return {
+                "tables": {table: len(rows) for table, rows in sorted(self.tables.items())},
+                "objects": len(self.objects),
+                **self.counters,
+            }
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server_version = "SupabaseStub/1.0"
+
+    @property
+    def state(self) -> StubState:
+        return self.server.state  # type: ignore[attr-defined]
+
+    def log_message(self, format: str, *args: Any) -> None:
+        if getattr(self.server, "verbose", False):
+            super().log_message(format, *args)
+
+    def _send(self, status: int, payload: Any = None, headers: Optional[Dict[str, str]] = None) -> None:
+        body = b"" if payload is None else json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        if body:
+            self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if body:
+            self.wfile.write(body)
+
+    def _read_body(self) -> bytes:
+        length = int(self.headers.get("Content-Length") or 0)
+        body = self.rfile.read(length) if length else b""
+        with self.state.lock:
+            self.state.counters["bytes_received"] += len(body)
+            if self.headers.get("Content-Encoding", "").lower() == "gzip":
+                self.state.counters["gzip_requests"] += 1
+        if self.headers.get("Content-Encoding", "").lower() == "gzip":
+            body = gzip.decompress(body)
+        return body
+
+    def _route(self) -> Tuple[str, str, Dict[str, str]]:
+        parts = urlsplit(self.path)
+        query = {key: values[-1] for key, values in parse_qs(parts.query).items()}
+        return parts.path, unquote(parts.path), query
+
+    def _begin(self) -> bool:
+        """Do tre + loi gia lap. Tra ve False neu da tra loi loi."""
+        with self.state.lock:
+            self.state.counters["requests"] += 1
+        if self.state.latency:
+            time.sleep(self.state.latency)
+        if self.path.startswith("/__"):
+            return True
+        if self.state.should_fail():
+            self._read_body()
+            with self.state.lock:
+                self.state.counters["failures_injected"] += 1
+            status = 429 if self.state.random.random() < 0.5 else 503
+            self._send(status, {"message": "stub: loi gia lap"}, {"Retry-After": "0"})
+            return False
+        return True
+
+    def do_GET(self) -> None:
+        if not self._begin():
+            return
+        _, path, query = self._route()
+        if path == "/__stats":
+            self._send(200, self.state.stats())
+            return
+        if path.startswith("/rest/v1/"):
+            columns = query.pop("select", "*")
+            self._send(200, self.state.select(path[len("/rest/v1/"):], query, columns))
+            return
+        self._send(404, {"message": f"khong ho tro GET {self.path}"})
+
+    def do_POST(self) -> None:
+        if not self._begin():
+            return
+        _, path, query = self._route()
+        body = self._read_body()
+        if path == "/__reset":
+            self.state.reset()
+            self._send(204)
+        elif path.startswith("/rest/v1/"):
+            table = path[len("/rest/v1/"):]
+            payload = json.loads(body.decode("utf-8")) if body else []
+            rows = payload if isinstance(payload, list) else [payload]
+            prefer = self.headers.get("Prefer", "")
+            on_conflict = query.get("on_conflict") if "merge-duplicates" in prefer else None
+            self.state.insert(table, rows, on_conflict)
+            self._send(201)
+        elif path.startswith("/storage/v1/object/"):
+            self.state.put_object(path[len("/storage/v1/object/"):], body, self.headers.get("Content-Type", ""))
+            self._send(200, {"Key": path[len("/storage/v1/object/"):]})
+        else:
+            self._send(404, {"message": f"khong ho tro POST {path}"})
+
+    def do_DELETE(self) -> None:
+        if not self._begin():
+            return
+        _, path, query = self._route()
+        self._read_body()
+        if not path.startswith("/rest/v1/"):
+            self._send(404, {"message": f"khong ho tro DELETE {path}"})
+            return
+        self.state.delete(path[len("/rest/v1/"):], query)
+        self._send(204)
+
+    def do_PATCH(self) -> None:
+        if not self._begin():
+            return
+        _, path, query = self._route()
+        body = self._read_body()
+        if not path.startswith("/rest/v1/"):
+            self._send(404, {"message": f"khong ho tro PATCH {path}"})
+            return
+        self.state.patch(path[len("/rest/v1/"):], query, json.loads(body.decode("utf-8")) if body else {})
+        self._send(204)
+
+
+def start_stub_server(
+    host: str = "127.0.0.1",
+    port: int = 0,
+    *,
+    latency_ms: float = 0.0,
+    fail_rate: float = 0.0,
+    seed: Optional[int] = None,
+    verbose: bool = False,
+) -> Tuple[ThreadingHTTPServer, StubState, str]:
+    """Chay server trong thread nen; tra ve (server, state, base_url). Goi ``server.shutdown()`` de dung."""
+    server = ThreadingHTTPServer((host, port), StubHandler)
+    server.daemon_threads = True
+    server.state = StubState(latency_ms=latency_ms, fail_rate=fail_rate, seed=seed)  # type: ignore[attr-defined]
+    server.verbose = verbose  # type: ignore[attr-defined]
+    thread = threading.Thread(target=server.serve_forever, name="supabase-stub", daemon=True)
+    thread.start()
+    bound_host, bound_port = server.server_address[:2]
+    return server, server.state, f"http://{bound_host}:{bound_port}"  # type: ignore[attr-defined]
+
+
+def parse_args(argv: Optional[Sequence[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Server gia lap PostgREST/Storage cua Supabase.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=54321)
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Do tre gia lap moi request (ms).")
+    parser.add_argument("--fail-rate", type=float, default=0.0, help="Ti le request tra 429/503 ngau nhien (0-1).")
+    parser.add_argument("--seed", type=int)
+    parser.add_argument("--verbose", action="store_true", help="In log tung request.")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    args = parse_args(argv)
+    server, state, base_url = start_stub_server(
+        args.host,
+        args.port,
+        latency_ms=args.latency_ms,
+        fail_rate=args.fail_rate,
+        seed=args.seed,
+        verbose=args.verbose,
+    )
+    print(f"Supabase stub dang chay tai {base_url} (Ctrl+C de dung)")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.shutdown()
+        print(json.dumps(state.stats(), ensure_ascii=False, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
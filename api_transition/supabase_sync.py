@@ -5,28 +5,49 @@
 from __future__ import annotations
 
 import argparse
+import gzip
 import hashlib
 import json
 import mimetypes
 import numbers
 import os
+import random
 import re
 import sys
+import threading
+import time
 import uuid
+from concurrent.futures import FIRST_EXCEPTION, Future, ThreadPoolExecutor, wait
 from dataclasses import dataclass
 from datetime import date, datetime
+from functools import lru_cache
 from pathlib import Path
 from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
 
 import pandas as pd
 import requests
 from dotenv import load_dotenv
+from requests.adapters import HTTPAdapter
 
 
 PROJECT_ROOT = Path(__file__).resolve().parent.parent
 DEFAULT_PROCESSED_ROOT = Path(__file__).resolve().parent / "Processed"
 DATE_IN_NAME_RE = re.compile(r"(\d{8})")
 
+DEFAULT_WORKERS = 2
+DEFAULT_MAX_IN_FLIGHT = 8
+DEFAULT_MAX_RETRIES = 5
+RETRY_BACKOFF_BASE = 0.5
+RETRY_BACKOFF_MAX = 30.0
+# 429/503: server chua xu ly request nen luon gui lai duoc; 5xx khac chi gui lai
+# request idempotent (upsert/delete/patch/upload) de tranh insert trung.
+ALWAYS_RETRY_STATUSES = {429, 503}
+IDEMPOTENT_RETRY_STATUSES = {500, 502, 503, 504}
+GZIP_MIN_BYTES = 8 * 1024
+HASH_CHUNK_SIZE = 1024 * 1024
+RUN_STATE_COLUMNS = "status,source_hash,params,summary,raw_row_count,metric_row_count,detail_row_count"
+SHEET_ROW_TABLES = ("raw_workbook_row", "mart_metric_snapshot", "mart_detail_record")
+
 GROUP_CATEGORY_MAP = {
     "chi_tieu_c": "quality",
     "ghtt": "quality",
@@ -175,16 +196,42 @@ class SheetPlan:
 
 
 class SupabaseClient:
-    def __init__(self, base_url: str, service_role_key: str, timeout: int = 60):
+    """Client REST/Storage cho Supabase, dung chung duoc giua nhieu thread.
+
+    - Pool keep-alive ``pool_size`` ket noi (nen >= so request song song).
+    - Tu gui lai khi gap 429/5xx/loi mang voi backoff luy thua + jitter, ton trong ``Retry-After``.
+    - ``gzip_requests=True`` nen body JSON >= ``GZIP_MIN_BYTES`` (``Content-Encoding: gzip``);
+      chi bat khi gateway phia truoc PostgREST giai nen duoc request body.
+    """
+
+    def __init__(
+        self,
+        base_url: str,
+        service_role_key: str,
+        timeout: int = 60,
+        *,
+        pool_size: int = DEFAULT_MAX_IN_FLIGHT,
+        max_retries: int = DEFAULT_MAX_RETRIES,
+        backoff_base: float = RETRY_BACKOFF_BASE,
+        gzip_requests: bool = False,
+    ):
         self.base_url = base_url.rstrip("/")
         self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.gzip_requests = gzip_requests
         self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, pool_block=True)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
         self.session.headers.update(
             {
                 "apikey": service_role_key,
                 "Authorization": f"Bearer {service_role_key}",
             }
         )
+        self._stats_lock = threading.Lock()
+        self.stats = {"requests": 0, "retries": 0, "bytes_sent": 0}
 
     def _check(self, response: requests.Response, context: str) -> None:
         if response.ok:
@@ -192,11 +239,79 @@ class SupabaseClient:
         detail = response.text.strip()
         raise RuntimeError(f"{context} that bai: HTTP {response.status_code} - {detail}")
 
+    def _count(self, key: str, amount: int = 1) -> None:
+        with self._stats_lock:
+            self.stats[key] += amount
+
+    def _backoff_delay(self, attempt: int, retry_after: Optional[str]) -> float:
+        if retry_after:
+            try:
+                return min(RETRY_BACKOFF_MAX, max(0.0, float(retry_after)))
+            except ValueError:
+                pass
+        return min(RETRY_BACKOFF_MAX, self.backoff_base * (2 ** attempt)) * (0.5 + random.random() / 2)
+
+    def _request(
+        self,
+        method: str,
+        url: str,
+        *,
+        idempotent: bool,
+        body: Any = None,
+        **kwargs: Any,
+    ) -> requests.Response:
+        """Gui request co retry. ``body`` la bytes hoac ham tra ve file-like (mo lai moi lan gui)."""
+        kwargs.setdefault("timeout", self.timeout)
+        attempt = 0
+        while True:
+            data = body() if callable(body) else body
+            try:
+                response = self.session.request(method, url, data=data, **kwargs)
+            except (requests.ConnectionError, requests.Timeout):
+                if not idempotent or attempt >= self.max_retries:
+                    raise
+                delay = self._backoff_delay(attempt, None)
+            else:
+                status = response.status_code
+                retryable = status in ALWAYS_RETRY_STATUSES or (idempotent and status in IDEMPOTENT_RETRY_STATUSES)
+                if not retryable or attempt >= self.max_retries:
+                    self._count("requests")
+                    if isinstance(data, bytes):
+                        self._count("bytes_sent", len(data))
+                    return response
+                delay = self._backoff_delay(attempt, response.headers.get("Retry-After"))
+                response.close()
+            finally:
+                if hasattr(data, "close"):
+                    data.close()
+            attempt += 1
+            self._count("retries")
+            time.sleep(delay)
+
+    def _json_body(self, payload: Any, headers: Dict[str, str]) -> bytes:
+        body = json.dumps(payload, ensure_ascii=False, separators=(",", ":"), allow_nan=False).encode("utf-8")
+        headers["Content-Type"] = "application/json"
+        if self.gzip_requests and len(body) >= GZIP_MIN_BYTES:
+            body = gzip.compress(body, compresslevel=5)
+            headers["Content-Encoding"] = "gzip"
+        return body
+
+    def select_rows(self, table: str, filters: Dict[str, str], columns: str = "*") -> List[Dict[str, Any]]:
+        response = self._request(
+            "GET",
+            f"{self.base_url}/rest/v1/{table}",
+            idempotent=True,
+            params={"select": columns, **filters},
+        )
+        self._check(response, f"SELECT {table}")
+        return response.json()
+
     def delete_rows(self, table: str, filters: Dict[str, str]) -> None:
-        response = self.session.delete(
+        response = self._request(
+            "DELETE",
             f"{self.base_url}/rest/v1/{table}",
+            idempotent=True,
             params=filters,
-            timeout=self.timeout,
         )
         if response.status_code not in (200, 204):
             self._check(response, f"DELETE {table}")
@@ -218,22 +333,27 @@ class SupabaseClient:
         params: Dict[str, str] = {}
         if on_conflict:
             params["on_conflict"] = on_conflict
-        response = self.session.post(
+        body = self._json_body(list(rows), headers)
+        response = self._request(
+            "POST",
             f"{self.base_url}/rest/v1/{table}",
+            idempotent=upsert,
+            body=body,
             params=params,
             headers=headers,
-            json=list(rows),
-            timeout=self.timeout,
         )
         self._check(response, f"INSERT {table}")
 
     def patch_rows(self, table: str, filters: Dict[str, str], payload: Dict[str, Any]) -> None:
-        response = self.session.patch(
+        headers = {"Prefer": "return=minimal"}
+        body = self._json_body(payload, headers)
+        response = self._request(
+            "PATCH",
             f"{self.base_url}/rest/v1/{table}",
+            idempotent=True,
+            body=body,
             params=filters,
-            headers={"Prefer": "return=minimal"},
-            json=payload,
-            timeout=self.timeout,
+            headers=headers,
         )
         self._check(response, f"PATCH {table}")
 
@@ -241,19 +361,57 @@ class SupabaseClient:
         self,
         bucket: str,
         object_path: str,
-        content: bytes,
+        content: Any,
         content_type: str,
     ) -> None:
-        response = self.session.post(
+        """Upload ``content`` (bytes hoac ham tra ve file-like de stream tu dia)."""
+        response = self._request(
+            "POST",
             f"{self.base_url}/storage/v1/object/{bucket}/{object_path}",
+            idempotent=True,
+            body=content,
             params={"upsert": "true"},
             headers={"Content-Type": content_type, "x-upsert": "true"},
-            data=content,
             timeout=max(self.timeout, 120),
         )
         self._check(response, f"UPLOAD storage {bucket}/{object_path}")
 
 
+class ChunkPoster:
+    """Pool thread dung chung de gui cac batch insert/upload song song.
+
+    So request dang bay toi da = ``max_in_flight`` (so thread cua pool), dung
+    chung cho moi workbook dang ingest.
+    """
+
+    def __init__(self, client: SupabaseClient, max_in_flight: int = DEFAULT_MAX_IN_FLIGHT):
+        self.client = client
+        self.executor = ThreadPoolExecutor(max_workers=max(1, max_in_flight), thread_name_prefix="supabase-post")
+
+    def submit(self, fn: Any, *args: Any, **kwargs: Any) -> Future:
+        return self.executor.submit(fn, *args, **kwargs)
+
+    def submit_rows(self, table: str, rows: Sequence[Dict[str, Any]], chunk_size: int) -> List[Future]:
+        return [self.submit(self.client.insert_rows, table, batch) for batch in chunked(rows, chunk_size)]
+
+    def close(self) -> None:
+        self.executor.shutdown(wait=True)
+
+
+def wait_all(futures: Sequence[Future]) -> None:
+    """Cho tat ca future; loi dau tien => huy phan con lai va raise."""
+    if not futures:
+        return
+    done, pending = wait(futures, return_when=FIRST_EXCEPTION)
+    for future in done:
+        exc = future.exception()
+        if exc is not None:
+            for other in pending:
+                other.cancel()
+            wait(pending)
+            raise exc
+
+
 def load_environment() -> None:
     load_dotenv(PROJECT_ROOT / ".env")
     load_dotenv(Path.cwd() / ".env")
@@ -341,8 +499,14 @@ def strip_accents(text: str) -> str:
     return "".join(replacements.get(ch, ch) for ch in text.lower())
 
 
+@lru_cache(maxsize=8192)
+def _normalize_text(text: str) -> str:
+    return re.sub(r"\s+", " ", strip_accents(text.strip())).strip()
+
+
 def normalize_key(value: str) -> str:
-    return re.sub(r"\s+", " ", strip_accents(str(value).strip())).strip()
+    # Ten cot lap lai o moi dong => cache ket qua theo chuoi
+    return _normalize_text(str(value))
 
 
 def build_report_meta(processed_root: Path, workbook_path: Path) -> ReportMeta:
@@ -403,6 +567,14 @@ def sha256_bytes(content: bytes) -> str:
     return hashlib.sha256(content).hexdigest()
 
 
+def sha256_file(path: Path) -> str:
+    digest = hashlib.sha256()
+    with path.open("rb") as handle:
+        for chunk in iter(lambda: handle.read(HASH_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
 def file_content_type(path: Path) -> str:
     mime, _ = mimetypes.guess_type(path.name)
     return mime or "application/octet-stream"
@@ -676,6 +848,41 @@ def infer_metric_level(context: Dict[str, Optional[str]], subject_type: Optional
     return "total"
 
 
+def describe_sheet(sheet_name: str, df: pd.DataFrame) -> Tuple[pd.DataFrame, List[str], List[str], str]:
+    df = drop_empty_records(df.copy())
+    df.columns = clean_column_names(df.columns)
+    numeric_columns = detect_numeric_columns(df)
+    text_columns = [column for column in df.columns if column not in numeric_columns]
+    return df, numeric_columns, text_columns, classify_sheet(sheet_name, df, numeric_columns)
+
+
+def describe_unchanged_sheet(sheet_name: str, df: pd.DataFrame) -> SheetPlan:
+    """SheetPlan chi co metadata (khong co dong) cho sheet khong doi so voi lan sync truoc."""
+    df, numeric_columns, text_columns, sheet_kind = describe_sheet(sheet_name, df)
+    return SheetPlan(
+        sheet_name=sheet_name,
+        sheet_kind=sheet_kind,
+        row_count=len(df.index),
+        column_names=list(df.columns),
+        numeric_columns=list(numeric_columns),
+        text_columns=text_columns,
+        raw_rows=[],
+        metric_rows=[],
+        detail_rows=[],
+        fallback_detail_rows=[],
+    )
+
+
+def sheet_fingerprint(sheet_name: str, sheet_order: int, df: pd.DataFrame) -> str:
+    """Hash noi dung sheet (ten, vi tri, cot, gia tri tung o) de phat hien sheet thay doi."""
+    digest = hashlib.sha256()
+    header = [sheet_name, sheet_order, [str(column) for column in df.columns], len(df.index)]
+    digest.update(json.dumps(header, ensure_ascii=False).encode("utf-8"))
+    if len(df.columns) and len(df.index):
+        digest.update(pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes())
+    return digest.hexdigest()
+
+
 def prepare_sheet(
     report_meta: ReportMeta,
     run_id: uuid.UUID,
@@ -688,11 +895,7 @@ def prepare_sheet(
     sheet_order: int,
     df: pd.DataFrame,
 ) -> SheetPlan:
-    df = drop_empty_records(df.copy())
-    df.columns = clean_column_names(df.columns)
-    numeric_columns = detect_numeric_columns(df)
-    text_columns = [column for column in df.columns if column not in numeric_columns]
-    sheet_kind = classify_sheet(sheet_name, df, numeric_columns)
+    df, numeric_columns, text_columns, sheet_kind = describe_sheet(sheet_name, df)
 
     raw_rows: List[Dict[str, Any]] = []
     metric_rows: List[Dict[str, Any]] = []
@@ -869,14 +1072,15 @@ def upload_local_file(
     bucket: str,
     object_path: str,
     path: Path,
+    sha256: Optional[str] = None,
 ) -> Dict[str, Any]:
-    content = path.read_bytes()
-    client.upload_bytes(bucket, object_path, content, file_content_type(path))
+    """Upload file bang stream tu dia (khong doc ca file vao RAM)."""
+    client.upload_bytes(bucket, object_path, lambda: path.open("rb"), file_content_type(path))
     return {
         "bucket": bucket,
         "object_path": object_path,
-        "sha256": sha256_bytes(content),
-        "size_bytes": len(content),
+        "sha256": sha256 or sha256_file(path),
+        "size_bytes": path.stat().st_size,
         "content_type": file_content_type(path),
     }
 
@@ -886,6 +1090,194 @@ def build_storage_object_path(snapshot_date: date, report_code: str, suffix: str
     return f"{prefix}/{report_code}/{suffix}"
 
 
+def _push_workbook(
+    client: SupabaseClient,
+    poster: ChunkPoster,
+    workbook_path: Path,
+    report_meta: ReportMeta,
+    snapshot_date: date,
+    run_id: uuid.UUID,
+    source_hash: str,
+    catalog_row: Dict[str, Any],
+    run_row: Dict[str, Any],
+    manifest: Dict[str, Any],
+    sheet_plans: Sequence[SheetPlan],
+    *,
+    skip_storage: bool,
+    replace_existing: bool,
+    chunk_size: int,
+    purge_sheets: Optional[Sequence[str]] = None,
+    removed_sheets: Sequence[str] = (),
+) -> List[Dict[str, Any]]:
+    """Ghi 1 workbook: run/sheet tuan tu (khoa ngoai), upload file + cac batch dong song song qua ``poster``.
+
+    ``purge_sheets`` (che do gui lai 1 phan): chi xoa dong cua cac sheet nay thay vi xoa ca run.
+    """
+    if replace_existing:
+        client.delete_rows("meta_ingest_run", {"run_id": f"eq.{run_id}"})
+    if purge_sheets:
+        wait_all(
+            [
+                poster.submit(client.delete_rows, table, {"run_id": f"eq.{run_id}", "sheet_name": f"eq.{sheet_name}"})
+                for sheet_name in purge_sheets
+                for table in SHEET_ROW_TABLES
+            ]
+        )
+        wait_all(
+            [
+                poster.submit(client.delete_rows, "raw_workbook_sheet", {"run_id": f"eq.{run_id}", "sheet_name": f"eq.{sheet_name}"})
+                for sheet_name in removed_sheets
+            ]
+        )
+
+    client.insert_rows(
+        "meta_report_catalog",
+        [catalog_row],
+        upsert=True,
+        on_conflict="report_code",
+    )
+    client.insert_rows(
+        "meta_ingest_run",
+        [run_row],
+        upsert=True,
+        on_conflict="run_key",
+    )
+
+    ingest_files: List[Dict[str, Any]] = []
+    futures: List[Future] = []
+
+    if not skip_storage:
+        processed_object = build_storage_object_path(
+            snapshot_date,
+            report_meta.report_code,
+            f"{workbook_path.stem}__{source_hash[:12]}.xlsx",
+        )
+        processed_meta = {
+            "bucket": "processed-reports",
+            "object_path": processed_object,
+            "sha256": source_hash,
+            "size_bytes": workbook_path.stat().st_size,
+            "content_type": file_content_type(workbook_path),
+        }
+        futures.append(
+            poster.submit(
+                upload_local_file,
+                client,
+                processed_meta["bucket"],
+                processed_object,
+                workbook_path,
+                source_hash,
+            )
+        )
+        ingest_files.append(
+            {
+                "run_id": str(run_id),
+                "file_kind": "processed",
+                "storage_bucket": processed_meta["bucket"],
+                "storage_object_path": processed_meta["object_path"],
+                "local_rel_path": report_meta.processed_rel_path,
+                "content_type": processed_meta["content_type"],
+                "size_bytes": processed_meta["size_bytes"],
+                "sha256": processed_meta["sha256"],
+                "sheet_count": len(sheet_plans),
+            }
+        )
+
+        manifest_content = json.dumps(manifest, ensure_ascii=False, indent=2).encode("utf-8")
+        manifest_object = build_storage_object_path(
+            snapshot_date,
+            report_meta.report_code,
+            f"{workbook_path.stem}__{source_hash[:12]}.json",
+        )
+        futures.append(
+            poster.submit(
+                client.upload_bytes,
+                "report-manifests",
+                manifest_object,
+                manifest_content,
+                "application/json",
+            )
+        )
+        ingest_files.append(
+            {
+                "run_id": str(run_id),
+                "file_kind": "manifest",
+                "storage_bucket": "report-manifests",
+                "storage_object_path": manifest_object,
+                "local_rel_path": f"{report_meta.processed_rel_path}.manifest.json",
+                "content_type": "application/json",
+                "size_bytes": len(manifest_content),
+                "sha256": sha256_bytes(manifest_content),
+                "sheet_count": len(sheet_plans),
+            }
+        )
+
+    # Dong sheet phai co truoc cac dong raw/mart tro toi no: gui 1 batch upsert cho ca workbook
+    client.insert_rows(
+        "raw_workbook_sheet",
+        [
+            {
+                "sheet_id": str(uuid.uuid5(run_id, plan.sheet_name)),
+                "run_id": str(run_id),
+                "sheet_name": plan.sheet_name,
+                "sheet_order": sheet_order,
+                "sheet_kind": plan.sheet_kind,
+                "column_names": plan.column_names,
+                "numeric_columns": plan.numeric_columns,
+                "text_columns": plan.text_columns,
+                "row_count": plan.row_count,
+            }
+            for sheet_order, plan in enumerate(sheet_plans, start=1)
+        ],
+        upsert=True,
+        on_conflict="run_id,sheet_name",
+    )
+
+    for plan in sheet_plans:
+        futures.extend(poster.submit_rows("raw_workbook_row", plan.raw_rows, chunk_size))
+        futures.extend(poster.submit_rows("mart_metric_snapshot", plan.metric_rows, chunk_size))
+        futures.extend(poster.submit_rows("mart_detail_record", plan.detail_rows, chunk_size))
+    wait_all(futures)
+    return ingest_files
+
+
+def fetch_previous_run(client: SupabaseClient, run_id: uuid.UUID) -> Optional[Dict[str, Any]]:
+    rows = client.select_rows("meta_ingest_run", {"run_id": f"eq.{run_id}"}, RUN_STATE_COLUMNS)
+    return rows[0] if rows else None
+
+
+def is_unchanged_run(previous_run: Optional[Dict[str, Any]], source_hash: str, params: Dict[str, Any]) -> bool:
+    return bool(
+        previous_run
+        and previous_run.get("status") == "success"
+        and previous_run.get("source_hash") == source_hash
+        and previous_run.get("params") == params
+    )
+
+
+def reusable_sheet_states(previous_run: Optional[Dict[str, Any]], params: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
+    """Fingerprint tung sheet cua lan sync thanh cong truoc (cung tham so ky bao cao)."""
+    if not previous_run or previous_run.get("status") != "success" or previous_run.get("params") != params:
+        return {}
+    summary = previous_run.get("summary") or {}
+    return dict(summary.get("sheet_fingerprints") or {})
+
+
+def build_sheet_plans(
+    sheets: Sequence[Tuple[str, pd.DataFrame]],
+    unchanged: Iterable[str],
+    **prepare_kwargs: Any,
+) -> List[SheetPlan]:
+    unchanged = set(unchanged)
+    plans: List[SheetPlan] = []
+    for sheet_order, (sheet_name, df) in enumerate(sheets, start=1):
+        if sheet_name in unchanged:
+            plans.append(describe_unchanged_sheet(sheet_name, df))
+        else:
+            plans.append(prepare_sheet(sheet_name=sheet_name, sheet_order=sheet_order, df=df, **prepare_kwargs))
+    return plans
+
+
 def ingest_workbook(
     client: Optional[SupabaseClient],
     workbook_path: Path,
@@ -901,12 +1293,13 @@ def ingest_workbook(
     skip_storage: bool,
     replace_existing: bool,
     chunk_size: int,
+    poster: Optional[ChunkPoster] = None,
+    skip_unchanged: bool = False,
 ) -> Dict[str, Any]:
     report_meta = build_report_meta(processed_root, workbook_path)
     run_key = make_run_key(report_meta.report_code, snapshot_date, report_meta.processed_rel_path)
     run_id = uuid.uuid5(uuid.NAMESPACE_URL, run_key)
-    workbook_bytes = workbook_path.read_bytes()
-    source_hash = sha256_bytes(workbook_bytes)
+    source_hash = sha256_file(workbook_path)
 
     run_row = {
         "run_id": str(run_id),
@@ -942,35 +1335,76 @@ def ingest_workbook(
         "description": f"Auto-discovered from {report_meta.processed_rel_path}",
     }
 
-    sheets = read_workbook_sheets(workbook_path)
-    sheet_plans: List[SheetPlan] = []
-    raw_count = 0
-    metric_count = 0
-    detail_count = 0
+    previous_run: Optional[Dict[str, Any]] = None
+    if skip_unchanged and not dry_run and client is not None:
+        previous_run = fetch_previous_run(client, run_id)
+        if is_unchanged_run(previous_run, source_hash, run_row["params"]):
+            return {
+                "run_id": str(run_id),
+                "report_code": report_meta.report_code,
+                "report_name": report_meta.report_name,
+                "processed_rel_path": report_meta.processed_rel_path,
+                "snapshot_date": snapshot_date.isoformat(),
+                "raw_rows": previous_run.get("raw_row_count"),
+                "metric_rows": previous_run.get("metric_row_count"),
+                "detail_rows": previous_run.get("detail_row_count"),
+                "sheets": [],
+                "sync_mode": "skipped",
+                "resent_sheets": [],
+            }
+    previous_sheets = reusable_sheet_states(previous_run, run_row["params"])
 
-    for sheet_order, (sheet_name, df) in enumerate(sheets, start=1):
-        plan = prepare_sheet(
-            report_meta=report_meta,
-            run_id=run_id,
-            snapshot_date=snapshot_date,
-            period_start=period_start,
-            period_end=period_end,
-            report_month=report_month,
-            report_year=report_year,
-            sheet_name=sheet_name,
-            sheet_order=sheet_order,
-            df=df,
-        )
-        sheet_plans.append(plan)
-        raw_count += len(plan.raw_rows)
-        metric_count += len(plan.metric_rows)
-        detail_count += len(plan.detail_rows)
+    sheets = read_workbook_sheets(workbook_path)
+    fingerprints = [sheet_fingerprint(name, order, df) for order, (name, df) in enumerate(sheets, start=1)]
+    unchanged = {
+        name
+        for (name, _), fingerprint in zip(sheets, fingerprints)
+        if (previous_sheets.get(name) or {}).get("fingerprint") == fingerprint
+    }
+    prepare_kwargs = {
+        "report_meta": report_meta,
+        "run_id": run_id,
+        "snapshot_date": snapshot_date,
+        "period_start": period_start,
+        "period_end": period_end,
+        "report_month": report_month,
+        "report_year": report_year,
+    }
+    sheet_plans = build_sheet_plans(sheets, unchanged, **prepare_kwargs)
 
-    if detail_count == 0:
-        for plan in sheet_plans:
-            if plan.fallback_detail_rows:
-                plan.detail_rows.extend(plan.fallback_detail_rows)
-                detail_count += len(plan.fallback_detail_rows)
+    own_detail_count = sum(
+        previous_sheets[plan.sheet_name]["detail_rows"] if plan.sheet_name in unchanged else len(plan.detail_rows)
+        for plan in sheet_plans
+    )
+    use_fallback = own_detail_count == 0
+    if unchanged and use_fallback != bool(((previous_run or {}).get("summary") or {}).get("detail_fallback")):
+        # Dong chi tiet du phong phu thuoc ca workbook: doi trang thai => gui lai toan bo
+        unchanged = set()
+        sheet_plans = build_sheet_plans(sheets, unchanged, **prepare_kwargs)
+
+    sheet_states: Dict[str, Dict[str, Any]] = {}
+    for fingerprint, plan in zip(fingerprints, sheet_plans):
+        if plan.sheet_name in unchanged:
+            sheet_states[plan.sheet_name] = dict(previous_sheets[plan.sheet_name])
+            continue
+        sheet_states[plan.sheet_name] = {
+            "fingerprint": fingerprint,
+            "raw_rows": len(plan.raw_rows),
+            "metric_rows": len(plan.metric_rows),
+            "detail_rows": len(plan.detail_rows),
+            "fallback_rows": len(plan.fallback_detail_rows),
+        }
+        if use_fallback and plan.fallback_detail_rows:
+            plan.detail_rows.extend(plan.fallback_detail_rows)
+
+    raw_count = sum(state["raw_rows"] for state in sheet_states.values())
+    metric_count = sum(state["metric_rows"] for state in sheet_states.values())
+    detail_count = sum(
+        state["detail_rows"] + (state["fallback_rows"] if use_fallback else 0) for state in sheet_states.values()
+    )
+    partial = bool(unchanged)
+    resent_sheets = [plan.sheet_name for plan in sheet_plans if plan.sheet_name not in unchanged]
+    removed_sheets = [name for name in previous_sheets if name not in sheet_states] if partial else []
 
     manifest = {
         "run_id": str(run_id),
@@ -999,105 +1433,31 @@ def ingest_workbook(
     }
 
     if not dry_run and client is not None:
-        if replace_existing:
-            client.delete_rows("meta_ingest_run", {"run_id": f"eq.{run_id}"})
-
-        client.insert_rows(
-            "meta_report_catalog",
-            [catalog_row],
-            upsert=True,
-            on_conflict="report_code",
-        )
-        client.insert_rows(
-            "meta_ingest_run",
-            [run_row],
-            upsert=True,
-            on_conflict="run_key",
-        )
-
-        ingest_files: List[Dict[str, Any]] = []
-
-        if not skip_storage:
-            processed_object = build_storage_object_path(
-                snapshot_date,
-                report_meta.report_code,
-                f"{workbook_path.stem}__{source_hash[:12]}.xlsx",
-            )
-            processed_meta = upload_local_file(
+        own_poster = poster is None
+        if own_poster:
+            poster = ChunkPoster(client, max_in_flight=1)
+        try:
+            ingest_files = _push_workbook(
                 client,
-                "processed-reports",
-                processed_object,
+                poster,
                 workbook_path,
-            )
-            ingest_files.append(
-                {
-                    "run_id": str(run_id),
-                    "file_kind": "processed",
-                    "storage_bucket": processed_meta["bucket"],
-                    "storage_object_path": processed_meta["object_path"],
-                    "local_rel_path": report_meta.processed_rel_path,
-                    "content_type": processed_meta["content_type"],
-                    "size_bytes": processed_meta["size_bytes"],
-                    "sha256": processed_meta["sha256"],
-                    "sheet_count": len(sheet_plans),
-                }
-            )
-
-            manifest_content = json.dumps(manifest, ensure_ascii=False, indent=2).encode("utf-8")
-            manifest_object = build_storage_object_path(
+                report_meta,
                 snapshot_date,
-                report_meta.report_code,
-                f"{workbook_path.stem}__{source_hash[:12]}.json",
-            )
-            client.upload_bytes(
-                "report-manifests",
-                manifest_object,
-                manifest_content,
-                "application/json",
-            )
-            ingest_files.append(
-                {
-                    "run_id": str(run_id),
-                    "file_kind": "manifest",
-                    "storage_bucket": "report-manifests",
-                    "storage_object_path": manifest_object,
-                    "local_rel_path": f"{report_meta.processed_rel_path}.manifest.json",
-                    "content_type": "application/json",
-                    "size_bytes": len(manifest_content),
-                    "sha256": sha256_bytes(manifest_content),
-                    "sheet_count": len(sheet_plans),
-                }
-            )
-
-        for plan in sheet_plans:
-            sheet_id = str(uuid.uuid5(run_id, plan.sheet_name))
-            client.insert_rows(
-                "raw_workbook_sheet",
-                [
-                    {
-                        "sheet_id": sheet_id,
-                        "run_id": str(run_id),
-                        "sheet_name": plan.sheet_name,
-                        "sheet_order": next(
-                            idx for idx, (name, _) in enumerate(sheets, start=1) if name == plan.sheet_name
-                        ),
-                        "sheet_kind": plan.sheet_kind,
-                        "column_names": plan.column_names,
-                        "numeric_columns": plan.numeric_columns,
-                        "text_columns": plan.text_columns,
-                        "row_count": plan.row_count,
-                    }
-                ],
-                upsert=True,
-                on_conflict="run_id,sheet_name",
+                run_id,
+                source_hash,
+                catalog_row,
+                run_row,
+                manifest,
+                sheet_plans,
+                skip_storage=skip_storage,
+                replace_existing=replace_existing and not partial,
+                chunk_size=chunk_size,
+                purge_sheets=resent_sheets + removed_sheets if partial else None,
+                removed_sheets=removed_sheets,
             )
-
-            for batch in chunked(plan.raw_rows, chunk_size):
-                client.insert_rows("raw_workbook_row", batch)
-            for batch in chunked(plan.metric_rows, chunk_size):
-                client.insert_rows("mart_metric_snapshot", batch)
-            for batch in chunked(plan.detail_rows, chunk_size):
-                client.insert_rows("mart_detail_record", batch)
+        finally:
+            if own_poster:
+                poster.close()
 
         if ingest_files:
             client.insert_rows("meta_ingest_file", ingest_files, upsert=True, on_conflict="run_id,file_kind,local_rel_path")
@@ -1110,7 +1470,11 @@ def ingest_workbook(
                 "raw_row_count": raw_count,
                 "metric_row_count": metric_count,
                 "detail_row_count": detail_count,
-                "summary": manifest["counts"],
+                "summary": {
+                    **manifest["counts"],
+                    "detail_fallback": use_fallback,
+                    "sheet_fingerprints": sheet_states,
+                },
                 "finished_at": datetime.utcnow().isoformat(),
             },
         )
@@ -1132,6 +1496,8 @@ def ingest_workbook(
             }
             for plan in sheet_plans
         ],
+        "sync_mode": "partial" if partial else "full",
+        "resent_sheets": resent_sheets,
     }
 
 
@@ -1157,9 +1523,123 @@ def parse_args(argv: Optional[Sequence[str]] = None) -> argparse.Namespace:
     parser.add_argument("--dry-run", action="store_true", help="Khong goi Supabase, chi doc workbook va in manifest.")
     parser.add_argument("--no-replace-existing", action="store_true", help="Khong xoa run cu cung run_id truoc khi import.")
     parser.add_argument("--json", action="store_true", help="In ket qua theo JSON.")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="So workbook ingest dong thoi.")
+    parser.add_argument(
+        "--max-in-flight",
+        type=int,
+        default=DEFAULT_MAX_IN_FLIGHT,
+        help="So request batch/upload gui song song toi da (dung chung moi workbook).",
+    )
+    parser.add_argument("--pool-size", type=int, help="So ket noi keep-alive toi Supabase (mac dinh max-in-flight + workers).")
+    parser.add_argument("--max-retries", type=int, default=DEFAULT_MAX_RETRIES, help="So lan gui lai khi gap 429/5xx/loi mang.")
+    parser.add_argument(
+        "--gzip",
+        action="store_true",
+        default=os.getenv("SUPABASE_GZIP_REQUESTS", "").lower() in {"1", "true", "yes"},
+        help="Nen gzip body JSON lon (can gateway ho tro Content-Encoding: gzip; env SUPABASE_GZIP_REQUESTS=1).",
+    )
+    parser.add_argument(
+        "--skip-unchanged",
+        action="store_true",
+        help="Bo qua workbook co source_hash trung lan sync thanh cong truoc; chi gui lai cac sheet thay doi.",
+    )
     return parser.parse_args(argv)
 
 
+def sync_one_workbook(
+    client: Optional[SupabaseClient],
+    poster: Optional[ChunkPoster],
+    workbook_path: Path,
+    processed_root: Path,
+    args: argparse.Namespace,
+) -> Dict[str, Any]:
+    snapshot_date = parse_snapshot_date(args.snapshot_date, workbook_path)
+    report_month = args.report_month or snapshot_date.month
+    report_year = args.report_year or snapshot_date.year
+    period_start = parse_optional_date(args.period_start)
+    period_end = parse_optional_date(args.period_end)
+
+    try:
+        return ingest_workbook(
+            client=client,
+            workbook_path=workbook_path,
+            processed_root=processed_root,
+            snapshot_date=snapshot_date,
+            period_kind=args.period_kind,
+            period_start=period_start,
+            period_end=period_end,
+            report_month=report_month,
+            report_year=report_year,
+            dry_run=args.dry_run,
+            skip_storage=args.skip_storage,
+            replace_existing=not args.no_replace_existing,
+            chunk_size=args.chunk_size,
+            poster=poster,
+            skip_unchanged=args.skip_unchanged,
+        )
+    except Exception as exc:
+        error_payload = {
+            "file": str(workbook_path.relative_to(processed_root)),
+            "error": str(exc),
+        }
+        if not args.dry_run and client is not None:
+            try:
+                report_meta = build_report_meta(processed_root, workbook_path)
+                failed_run_key = make_run_key(
+                    report_meta.report_code,
+                    snapshot_date,
+                    report_meta.processed_rel_path,
+                )
+                failed_run_id = uuid.uuid5(uuid.NAMESPACE_URL, failed_run_key)
+                client.patch_rows(
+                    "meta_ingest_run",
+                    {"run_id": f"eq.{failed_run_id}"},
+                    {
+                        "status": "failed",
+                        "error_message": str(exc),
+                        "finished_at": datetime.utcnow().isoformat(),
+                    },
+                )
+            except Exception:
+                pass
+        return error_payload
+
+
+def sync_workbooks(
+    client: Optional[SupabaseClient],
+    workbook_paths: Sequence[Path],
+    processed_root: Path,
+    args: argparse.Namespace,
+) -> Tuple[List[Dict[str, Any]], int]:
+    """Ingest ``args.workers`` workbook dong thoi; ket qua giu dung thu tu ``workbook_paths``."""
+    poster = ChunkPoster(client, max_in_flight=args.max_in_flight) if client is not None and not args.dry_run else None
+    try:
+        workers = max(1, min(args.workers, len(workbook_paths)))
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="supabase-workbook") as executor:
+            results = list(
+                executor.map(
+                    lambda path: sync_one_workbook(client, poster, path, processed_root, args),
+                    workbook_paths,
+                )
+            )
+    finally:
+        if poster is not None:
+            poster.close()
+    exit_code = 1 if any("error" in item for item in results) else 0
+    return results, exit_code
+
+
+def build_client(args: argparse.Namespace, supabase_url: str, service_role_key: str) -> SupabaseClient:
+    pool_size = args.pool_size or args.max_in_flight + args.workers
+    return SupabaseClient(
+        supabase_url,
+        service_role_key,
+        pool_size=pool_size,
+        max_retries=args.max_retries,
+        gzip_requests=args.gzip,
+    )
+
+
 def main(argv: Optional[Sequence[str]] = None) -> int:
     load_environment()
     args = parse_args(argv)
@@ -1191,63 +1671,9 @@ def main(argv: Optional[Sequence[str]] = None) -> int:
         service_role_key = os.getenv("SUPABASE_SERVICE_ROLE_KEY")
         if not supabase_url or not service_role_key:
             raise EnvironmentError("Can SUPABASE_URL va SUPABASE_SERVICE_ROLE_KEY trong .env de ingest that.")
-        client = SupabaseClient(supabase_url, service_role_key)
-
-    results: List[Dict[str, Any]] = []
-    exit_code = 0
-
-    for workbook_path in workbook_paths:
-        snapshot_date = parse_snapshot_date(args.snapshot_date, workbook_path)
-        report_month = args.report_month or snapshot_date.month
-        report_year = args.report_year or snapshot_date.year
-        period_start = parse_optional_date(args.period_start)
-        period_end = parse_optional_date(args.period_end)
+        client = build_client(args, supabase_url, service_role_key)
 
-        try:
-            result = ingest_workbook(
-                client=client,
-                workbook_path=workbook_path,
-                processed_root=processed_root,
-                snapshot_date=snapshot_date,
-                period_kind=args.period_kind,
-                period_start=period_start,
-                period_end=period_end,
-                report_month=report_month,
-                report_year=report_year,
-                dry_run=args.dry_run,
-                skip_storage=args.skip_storage,
-                replace_existing=not args.no_replace_existing,
-                chunk_size=args.chunk_size,
-            )
-            results.append(result)
-        except Exception as exc:
-            exit_code = 1
-            error_payload = {
-                "file": str(workbook_path.relative_to(processed_root)),
-                "error": str(exc),
-            }
-            results.append(error_payload)
-            if not args.dry_run and client is not None:
-                try:
-                    report_meta = build_report_meta(processed_root, workbook_path)
-                    failed_snapshot_date = parse_snapshot_date(args.snapshot_date, workbook_path)
-                    failed_run_key = make_run_key(
-                        report_meta.report_code,
-                        failed_snapshot_date,
-                        report_meta.processed_rel_path,
-                    )
-                    failed_run_id = uuid.uuid5(uuid.NAMESPACE_URL, failed_run_key)
-                    client.patch_rows(
-                        "meta_ingest_run",
-                        {"run_id": f"eq.{failed_run_id}"},
-                        {
-                            "status": "failed",
-                            "error_message": str(exc),
-                            "finished_at": datetime.utcnow().isoformat(),
-                        },
-                    )
-                except Exception:
-                    pass
+    results, exit_code = sync_workbooks(client, workbook_paths, processed_root, args)
 
     if args.json:
         print(json.dumps(results, ensure_ascii=False, indent=2))
@@ -1255,6 +1681,13 @@ def main(argv: Optional[Sequence[str]] = None) -> int:
         for item in results:
             if "error" in item:
                 print(f"[ERROR] {item['file']}: {item['error']}")
+            elif item.get("sync_mode") == "skipped":
+                print(f"[SKIP] {item['processed_rel_path']} -> {item['report_code']} | khong doi so voi lan sync truoc")
+            elif item.get("sync_mode") == "partial":
+                print(
+                    f"[OK] {item['processed_rel_path']} -> {item['report_code']} | "
+                    f"gui lai {len(item['resent_sheets'])}/{len(item['sheets'])} sheet: {', '.join(item['resent_sheets'])}"
+                )
             else:
                 print(
                     f"[OK] {item['processed_rel_path']} -> {item['report_code']} | "
@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+Nạp báo cáo Excel vào SQLite theo lô, dùng chung cho import_baocao.py và import_baocao_thang.py.
+
+Thay cho kiểu df.iterrows() + get_or_create_don_vi/get_or_create_nvkt từng dòng
+(mỗi dòng 1 SELECT, thiếu thì INSERT + commit, rồi 1 INSERT dữ liệu):
+- Lấy ID đơn vị / NVKT cho tất cả tên khác nhau trong báo cáo bằng 1 truy vấn IN (...),
+  tên chưa có được thêm bằng 1 executemany
+- Cột số được chuyển kiểu theo cả cột (pd.to_numeric), dòng dữ liệu ghi bằng
+  1 executemany trong 1 transaction cho mỗi báo cáo
+"""
+
+import sqlite3
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+
+# SQLite giới hạn số tham số trong 1 câu lệnh (mặc định 999 với bản cũ)
+SQL_BATCH_SIZE = 500
+
+ColumnRef = Union[int, str, Callable[[pd.DataFrame], Any]]
+
+
+@dataclass(frozen=True)
+class ReportSpec:
+    """
+    Mô tả 1 báo cáo cần nạp.
+
+    sql nhận tham số (kỳ báo cáo, don_vi_id hoặc nvkt_id, *values).
+    Cột được chỉ định bằng vị trí (int), tên cột (str) hoặc hàm nhận df trả về tên cột.
+    """
+    label: str
+    sql: str
+    values: Tuple[Tuple[ColumnRef, type], ...]
+    don_vi_col: ColumnRef = 0
+    nvkt_col: Optional[ColumnRef] = None      # None: báo cáo theo đơn vị
+    tong_don_vi: Optional[str] = None         # None: bỏ dòng "Tổng"; khác: đổi "Tổng" thành tên này
+
+
+def _column(df: pd.DataFrame, ref: ColumnRef) -> pd.Series:
+    if isinstance(ref, int):
+        return df.iloc[:, ref]
+    if callable(ref):
+        ref = ref(df)
+    return df[ref]
+
+
+def report_rows(spec: ReportSpec, df: pd.DataFrame) -> Tuple[pd.Series, Optional[pd.Series], List[pd.Series]]:
+    """Lọc dòng hợp lệ như bản cũ, trả về (tên đơn vị, tên NVKT hoặc None, các cột giá trị)"""
+    don_vi = _column(df, spec.don_vi_col)
+    keep = don_vi.notna()
+    nvkt = None
+    if spec.nvkt_col is not None:
+        nvkt = _column(df, spec.nvkt_col)
+        keep &= nvkt.notna()
+    else:
+        is_tong = don_vi.eq("Tổng")
+        if spec.tong_don_vi is None:
+            keep &= ~is_tong
+        else:
+            don_vi = don_vi.mask(is_tong, spec.tong_don_vi)
+
+    keep = keep.to_numpy()
+    values = [_column(df, ref)[keep] for ref, _ in spec.values]
+    return don_vi[keep], nvkt[keep] if nvkt is not None else None, values
+
+
+def to_sql_values(series: pd.Series, kind: type) -> List[Any]:
+    """Giống `kind(x) if pd.notna(x) else None` cho cả cột (int cắt phần thập phân như int())"""
+    numbers = pd.to_numeric(series).to_numpy(dtype=float, na_value=np.nan)
+    missing = np.isnan(numbers)
+    if kind is int:
+        numbers = np.trunc(numbers)
+    return [None if is_missing else kind(value) for value, is_missing in zip(numbers.tolist(), missing.tolist())]
+
+
+def _batches(items: List[Any]) -> Iterable[List[Any]]:
+    for start in range(0, len(items), SQL_BATCH_SIZE):
+        yield items[start:start + SQL_BATCH_SIZE]
+
+
+def _select_don_vi(conn: sqlite3.Connection, names: List[str]) -> Dict[str, int]:
+    ids = {}
+    for batch in _batches(names):
+        placeholders = ",".join("?" * len(batch))
+        for row_id, ten in conn.execute(
+            f"SELECT id, ten_don_vi FROM don_vi WHERE ten_don_vi IN ({placeholders})", batch
+        ):
+            ids[ten] = row_id
+    return ids
+
+
+def resolve_don_vi_ids(conn: sqlite3.Connection, names: Iterable[Any]) -> Dict[str, int]:
+    """ID đơn vị cho mọi tên (thêm tên chưa có). Không commit: chạy trong transaction của người gọi"""
+    distinct = list(dict.fromkeys(str(name) for name in names))
+    ids = _select_don_vi(conn, distinct)
+    missing = [name for name in distinct if name not in ids]
+    if missing:
+        conn.executemany("INSERT OR IGNORE INTO don_vi (ten_don_vi) VALUES (?)", [(name,) for name in missing])
+        ids.update(_select_don_vi(conn, missing))
+    return ids
+
+
+def _select_nvkt(conn: sqlite3.Connection, wanted: List[Tuple[int, str]]) -> Dict[Tuple[int, str], int]:
+    wanted_set = set(wanted)
+    don_vi_ids = sorted({don_vi_id for don_vi_id, _ in wanted})
+    ids = {}
+    for batch in _batches(don_vi_ids):
+        placeholders = ",".join("?" * len(batch))
+        for row_id, don_vi_id, ten in conn.execute(
+            f"SELECT id, don_vi_id, ten_nvkt FROM nhan_vien_kt WHERE don_vi_id IN ({placeholders})", batch
+        ):
+            if (don_vi_id, ten) in wanted_set:
+                ids[(don_vi_id, ten)] = row_id
+    return ids
+
+
+def resolve_nvkt_ids(conn: sqlite3.Connection, pairs: Iterable[Tuple[int, Any]]) -> Dict[Tuple[int, str], int]:
+    """ID NVKT cho mọi cặp (don_vi_id, tên) (thêm cặp chưa có). Không commit"""
+    distinct = list(dict.fromkeys((int(don_vi_id), str(ten)) for don_vi_id, ten in pairs))
+    ids = _select_nvkt(conn, distinct)
+    missing = [pair for pair in distinct if pair not in ids]
+    if missing:
+        conn.executemany("INSERT OR IGNORE INTO nhan_vien_kt (don_vi_id, ten_nvkt) VALUES (?, ?)", missing)
+        ids.update(_select_nvkt(conn, missing))
+    return ids
+
+
+def bulk_import(conn: sqlite3.Connection, spec: ReportSpec, df: pd.DataFrame, period: str) -> int:
+    """Nạp 1 báo cáo trong 1 transaction (lỗi thì rollback cả báo cáo). Trả về số dòng đã ghi"""
+    don_vi, nvkt, value_columns = report_rows(spec, df)
+    values = [to_sql_values(series, kind) for series, (_, kind) in zip(value_columns, spec.values)]
+
+    with conn:
+        don_vi_ids = resolve_don_vi_ids(conn, don_vi)
+        ids = [don_vi_ids[str(name)] for name in don_vi.tolist()]
+        if nvkt is not None:
+            nvkt_ids = resolve_nvkt_ids(conn, zip(ids, nvkt.tolist()))
+            ids = [nvkt_ids[(don_vi_id, str(ten))] for don_vi_id, ten in zip(ids, nvkt.tolist())]
+        rows = [(period, row_id, *row_values) for row_id, *row_values in zip(ids, *values)]
+        conn.executemany(spec.sql, rows)
+    return len(rows)
@@ -61,6 +61,7 @@ from make_chart_pttb import (
     make_chart_pttb_thuc_tang_nvkt,
 )
 from report_generator import generate_kpi_report
+from api_transition.chart_cache import prune_stale_charts
 from suy_hao_reports import (
     generate_daily_comparison_report,
     generate_daily_comparison_report_k2,
@@ -573,6 +574,7 @@ def main():
             ),
             [f"downloads/reports/Bao_cao_KPI_NVKT_{_rm.replace('/', '_')}.docx"] if _rm else []
         )
+        prune_stale_charts()
 
         # Import dữ liệu vào SQLite database
         print("\n=== Import dữ liệu vào database ===")
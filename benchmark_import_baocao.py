@@ -0,0 +1,156 @@
+"""
+Benchmark nạp báo cáo vào SQLite: từng dòng (get_or_create + INSERT + commit) vs theo lô (baocao_bulk)
+
+Sinh dữ liệu giả lập đúng dạng 8 báo cáo của import_baocao.py / import_baocao_thang.py
+(báo cáo theo đơn vị có dòng "Tổng", báo cáo theo NVKT có ô trống), nạp vào 2 DB mới
+trên đĩa bằng 2 cách, kiểm tra nội dung 2 DB giống nhau rồi in thời gian từng báo cáo.
+Cách cũ là bản sao đóng băng các hàm import_* trước khi chuyển sang nạp theo lô
+(benchmark_import_baocao_legacy.py), không dựng lại từ REPORT_SPECS, nên so sánh
+bắt được cả spec lọc dòng / đổi tên "Tổng" / map cột sai.
+Mỗi cách chạy 2 lượt: lượt 1 DB trống (phải tạo đơn vị/NVKT), lượt 2 nạp lại cùng kỳ.
+
+Cách dùng:
+    python benchmark_import_baocao.py
+    python benchmark_import_baocao.py --don-vi 30 --nvkt 2000 --thang
+"""
+
+import argparse
+import contextlib
+import io
+import shutil
+import sqlite3
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+import import_baocao
+import import_baocao_thang
+from baocao_bulk import bulk_import
+from benchmark_import_baocao_legacy import LEGACY_IMPORTS
+
+
+BO_QUA_COT = {"id", "created_at", "updated_at"}
+
+
+def tao_bao_cao(so_don_vi, so_nvkt, seed):
+    """Sinh DataFrame cho từng báo cáo theo REPORT_FILES (~3% ô số trống, ~1% dòng thiếu tên)."""
+    rng = np.random.default_rng(seed)
+    don_vi = [f"Tổ KT {i:02d}" for i in range(1, so_don_vi + 1)] + ["Tổng"]
+    doi_nvkt = rng.choice(don_vi[:-1], so_nvkt)
+    ten_nvkt = np.array([f"Nguyễn Văn {i:04d}" for i in range(so_nvkt)], dtype=object)
+    ten_nvkt[rng.random(so_nvkt) < 0.01] = None
+
+    def cot_so(so_dong, kieu):
+        cot = rng.integers(0, 500, so_dong).astype(float) if kieu is int else rng.uniform(0, 100, so_dong).round(2)
+        cot[rng.random(so_dong) < 0.03] = np.nan
+        return cot
+
+    def bang_don_vi(so_cot):
+        data = {"Đơn vị": don_vi}
+        for i in range(1, so_cot):
+            data[f"Cột {i}"] = cot_so(len(don_vi), int if i % 3 else float)
+        return pd.DataFrame(data)
+
+    def bang_nvkt(cot_gia_tri):
+        data = {"TEN_DOI": doi_nvkt, "NVKT": ten_nvkt}
+        for ten, kieu in cot_gia_tri:
+            data[ten] = cot_so(so_nvkt, kieu)
+        return pd.DataFrame(data)
+
+    cot_sm4 = [("Tổng phiếu", int), ("Số phiếu đạt", int), ("Tỷ lệ đạt (không hẹn, %)", float)]
+    return {
+        "c11": bang_don_vi(11),
+        "c12": bang_don_vi(8),
+        "c13": bang_don_vi(11),
+        "c14": bang_don_vi(12),
+        "c14_nvkt": bang_nvkt([("Tổng phiếu KS", int), ("Tổng phiếu KHL", int), ("Tỷ lệ HL", float)]),
+        "sm1c12": bang_nvkt([("Số phiếu HLL", int), ("Số phiếu báo hỏng", int), ("Tỉ lệ HLL tháng (2.5%)", float)]),
+        "sm4c11_chitiet": bang_nvkt(cot_sm4),
+        "sm4c11_18h": bang_nvkt(cot_sm4),
+    }
+
+
+def nap_tung_dong(module, conn, key, df, ky):
+    """Cách cũ: hàm import_* đóng băng (mỗi dòng get_or_create + 1 INSERT, commit cuối báo cáo)."""
+    with contextlib.redirect_stdout(io.StringIO()):
+        return LEGACY_IMPORTS[module.__name__][key](conn, df, ky)
+
+
+def nap_theo_lo(module, conn, key, df, ky):
+    """Cách mới: baocao_bulk.bulk_import theo REPORT_SPECS của module."""
+    return bulk_import(conn, module.REPORT_SPECS[key], df, ky)
+
+
+def chay(module, db_path, bao_cao, ky, ham_nap):
+    """2 lượt nạp toàn bộ báo cáo, trả về {key: [giây lượt 1, giây lượt 2]} và số dòng."""
+    thoi_gian = {key: [] for key in bao_cao}
+    so_dong = {}
+    conn = sqlite3.connect(db_path)
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            module.init_database(conn)
+        for _ in range(2):
+            for key, df in bao_cao.items():
+                bat_dau = time.perf_counter()
+                so_dong[key] = ham_nap(module, conn, key, df, ky)
+                thoi_gian[key].append(time.perf_counter() - bat_dau)
+    finally:
+        conn.close()
+    return thoi_gian, so_dong
+
+
+def dump_db(db_path):
+    conn = sqlite3.connect(db_path)
+    try:
+        bang = [row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type='table' AND name NOT LIKE 'sqlite_%'")]
+        ket_qua = {}
+        for ten in bang:
+            cot = [row[1] for row in conn.execute(f"PRAGMA table_info({ten})")]
+            if ten.startswith("bao_cao_"):
+                cot = [c for c in cot if c not in BO_QUA_COT]
+            ket_qua[ten] = sorted(conn.execute(f"SELECT {', '.join(cot)} FROM {ten}").fetchall(), key=repr)
+        return ket_qua
+    finally:
+        conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark nạp báo cáo từng dòng vs theo lô")
+    parser.add_argument("--don-vi", type=int, default=15, help="Số đơn vị trong báo cáo theo đơn vị")
+    parser.add_argument("--nvkt", type=int, default=600, help="Số dòng NVKT trong báo cáo theo NVKT")
+    parser.add_argument("--thang", action="store_true", help="Dùng schema/SQL của import_baocao_thang")
+    parser.add_argument("--seed", type=int, default=25)
+    args = parser.parse_args()
+
+    module, ky = (import_baocao_thang, "2026-10") if args.thang else (import_baocao, "2026-10-18")
+    bao_cao = tao_bao_cao(args.don_vi, args.nvkt, args.seed)
+    thu_muc = Path(tempfile.mkdtemp(prefix="bench_import_"))
+    try:
+        db_cu, db_moi = thu_muc / "tung_dong.db", thu_muc / "theo_lo.db"
+        tg_cu, so_dong = chay(module, db_cu, bao_cao, ky, nap_tung_dong)
+        tg_moi, so_dong_moi = chay(module, db_moi, bao_cao, ky, nap_theo_lo)
+
+        assert so_dong == so_dong_moi, (so_dong, so_dong_moi)
+        du_lieu_cu, du_lieu_moi = dump_db(db_cu), dump_db(db_moi)
+        khac = [ten for ten in du_lieu_cu if du_lieu_cu[ten] != du_lieu_moi.get(ten)]
+        print(f"{module.__name__}: {args.don_vi} đơn vị, {args.nvkt} NVKT - "
+              f"{'nội dung 2 DB giống nhau' if not khac else 'KHÁC NHAU: ' + ', '.join(khac)}\n")
+
+        print(f"{'Báo cáo':<18}{'Dòng':>6}{'Từng dòng L1':>14}{'Theo lô L1':>12}{'Từng dòng L2':>14}{'Theo lô L2':>12}{'Tăng tốc L1':>13}")
+        for key in bao_cao:
+            cu, moi = tg_cu[key], tg_moi[key]
+            print(f"{module.REPORT_SPECS[key].label:<18}{so_dong[key]:>6}"
+                  f"{cu[0] * 1000:>12.1f}ms{moi[0] * 1000:>10.1f}ms{cu[1] * 1000:>12.1f}ms{moi[1] * 1000:>10.1f}ms"
+                  f"{cu[0] / moi[0]:>12.1f}x")
+        tong_cu, tong_moi = sum(sum(v) for v in tg_cu.values()), sum(sum(v) for v in tg_moi.values())
+        print(f"\nTổng 2 lượt: từng dòng {tong_cu:.2f}s, theo lô {tong_moi:.2f}s ({tong_cu / tong_moi:.1f}x)")
+        return 0 if not khac else 1
+    finally:
+        shutil.rmtree(thu_muc, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    exit(main())
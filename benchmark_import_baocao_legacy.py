@@ -0,0 +1,707 @@
+"""
+Bản sao đóng băng của cách nạp báo cáo cũ (trước baocao_bulk), dùng làm mốc cho benchmark_import_baocao.py
+
+Các hàm import_* giữ nguyên vòng lặp iterrows + get_or_create_don_vi/get_or_create_nvkt
+(commit khi tạo mới) + 1 INSERT từng dòng của import_baocao.py / import_baocao_thang.py
+trước khi chuyển sang nạp theo lô. Chỉ khác bản gốc ở chỗ nhận DataFrame thay vì tự
+đọc Excel và trả về số dòng đã ghi.
+
+Không sửa file này theo REPORT_SPECS: đây là mốc để phát hiện spec lọc dòng, đổi tên
+"Tổng" hoặc map cột sai.
+"""
+
+import sqlite3
+
+import pandas as pd
+
+
+def get_or_create_don_vi(conn: sqlite3.Connection, ten_don_vi: str) -> int:
+    """Lấy hoặc tạo đơn vị, trả về ID."""
+    cursor = conn.cursor()
+    cursor.execute("SELECT id FROM don_vi WHERE ten_don_vi = ?", (ten_don_vi,))
+    row = cursor.fetchone()
+    if row:
+        return row[0]
+    cursor.execute("INSERT INTO don_vi (ten_don_vi) VALUES (?)", (ten_don_vi,))
+    conn.commit()
+    return cursor.lastrowid
+
+
+def get_or_create_nvkt(conn: sqlite3.Connection, don_vi_id: int, ten_nvkt: str) -> int:
+    """Lấy hoặc tạo nhân viên KT, trả về ID."""
+    cursor = conn.cursor()
+    cursor.execute(
+        "SELECT id FROM nhan_vien_kt WHERE don_vi_id = ? AND ten_nvkt = ?",
+        (don_vi_id, ten_nvkt)
+    )
+    row = cursor.fetchone()
+    if row:
+        return row[0]
+    cursor.execute(
+        "INSERT INTO nhan_vien_kt (don_vi_id, ten_nvkt) VALUES (?, ?)",
+        (don_vi_id, ten_nvkt)
+    )
+    conn.commit()
+    return cursor.lastrowid
+
+
+# =============================================================================
+# import_baocao.py (theo ngày)
+# =============================================================================
+def import_c11(conn: sqlite3.Connection, df: pd.DataFrame, ngay: str):
+    """Import báo cáo C1.1."""
+    cursor = conn.cursor()
+
+    count = 0
+    for _, row in df.iterrows():
+        ten_don_vi = row.iloc[0]
+        if pd.isna(ten_don_vi) or ten_don_vi == "Tổng":
+            continue
+
+        don_vi_id = get_or_create_don_vi(conn, ten_don_vi)
+
+        cursor.execute("""
+            INSERT OR REPLACE INTO bao_cao_c11
+            (ngay_bao_cao, don_vi_id, sm1_cl_chu_dong, sm2_cl_chu_dong, ty_le_cl_chu_dong,
+             sm3_brcd, sm4_brcd, ty_le_brcd, chi_tieu_bsc)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """, (
+            ngay, don_vi_id,
+            int(row.iloc[1]) if pd.notna(row.iloc[1]) else None,
+            int(row.iloc[2]) if pd.notna(row.iloc[2]) else None,
+            float(row.iloc[3]) if pd.notna(row.iloc[3]) else None,
+            int(row.iloc[4]) if pd.notna(row.iloc[4]) else None,
+            int(row.iloc[5]) if pd.notna(row.iloc[5]) else None,
+            float(row.iloc[6]) if pd.notna(row.iloc[6]) else None,
+            float(row.iloc[10]) if pd.notna(row.iloc[10]) else None,
+        ))
+        count += 1
+
+    conn.commit()
+    print(f"  ✓ C1.1: {count} records imported")
+    return count
+
+
+def import_c12(conn: sqlite3.Connection, df: pd.DataFrame, ngay: str):
+    """Import báo cáo C1.2."""
+    cursor = conn.cursor()
+
+    count = 0
+    for _, row in df.iterrows():
+        ten_don_vi = row.iloc[0]
+        if pd.isna(ten_don_vi) or ten_don_vi == "Tổng":
+            continue
+
+        don_vi_id = get_or_create_don_vi(conn, ten_don_vi)
+
+        cursor.execute("""
+            INSERT OR REPLACE INTO bao_cao_c12
+            (ngay_bao_cao, don_vi_id, sm1_lap_lai, sm2_lap_lai, ty_le_lap_lai,
+             sm3_su_co, sm4_su_co, ty_le_su_co, chi_tieu_bsc)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """, (
+            ngay, don_vi_id,
+            int(row.iloc[1]) if pd.notna(row.iloc[1]) else None,
+            int(row.iloc[2]) if pd.notna(row.iloc[2]) else None,
+            float(row.iloc[3]) if pd.notna(row.iloc[3]) else None,
+            int(row.iloc[4]) if pd.notna(row.iloc[4]) else None,
+            int(row.iloc[5]) if pd.notna(row.iloc[5]) else None,
+            float(row.iloc[6]) if pd.notna(row.iloc[6]) else None,
+            float(row.iloc[7]) if pd.notna(row.iloc[7]) else None,
+        ))
+        count += 1
+
+    conn.commit()
+    print(f"  ✓ C1.2: {count} records imported")
+    return count
+
+
+def import_c13(conn: sqlite3.Connection, df: pd.DataFrame, ngay: str):
+    """Import báo cáo C1.3."""
+    cursor = conn.cursor()
+
+    count = 0
+    for _, row in df.iterrows():
+        ten_don_vi = row.iloc[0]
+        if pd.isna(ten_don_vi) or ten_don_vi == "Tổng":
+            continue
+
+        don_vi_id = get_or_create_don_vi(conn, ten_don_vi)
+
+        cursor.execute("""
+            INSERT OR REPLACE INTO bao_cao_c13
+            (ngay_bao_cao, don_vi_id, sm1_sua_chua, sm2_sua_chua, ty_le_sua_chua,
+             sm3_lap_lai, sm4_lap_lai, ty_le_lap_lai, sm5_su_co, sm6_su_co, ty_le_su_co, chi_tieu_bsc)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """, (
+            ngay, don_vi_id,
+            int(row.iloc[1]) if pd.notna(row.iloc[1]) else None,
+            int(row.iloc[2]) if pd.notna(row.iloc[2]) else None,
+            float(row.iloc[3]) if pd.notna(row.iloc[3]) else None,
+            int(row.iloc[4]) if pd.notna(row.iloc[4]) else None,
+            int(row.iloc[5]) if pd.notna(row.iloc[5]) else None,
+            float(row.iloc[6]) if pd.notna(row.iloc[6]) else None,
+            int(row.iloc[7]) if pd.notna(row.iloc[7]) else None,
+            int(row.iloc[8]) if pd.notna(row.iloc[8]) else None,
+            float(row.iloc[9]) if pd.notna(row.iloc[9]) else None,
+            float(row.iloc[10]) if pd.notna(row.iloc[10]) else None,
+        ))
+        count += 1
+
+    conn.commit()
+    print(f"  ✓ C1.3: {count} records imported")
+    return count
+
+
+def import_c14(conn: sqlite3.Connection, df: pd.DataFrame, ngay: str):
+    """Import báo cáo C1.4."""
+    cursor = conn.cursor()
+
+    count = 0
+    for _, row in df.iterrows():
+        ten_don_vi = row.iloc[0]
+        if pd.isna(ten_don_vi) or ten_don_vi == "Tổng":
+            continue
+
+        don_vi_id = get_or_create_don_vi(conn, ten_don_vi)
+
+        cursor.execute("""
+            INSERT OR REPLACE INTO bao_cao_c14
+            (ngay_bao_cao, don_vi_id, tong_phieu, sl_da_ks, sl_ks_thanh_cong, sl_kh_hai_long,
+             khong_hl_kt_phuc_vu, ty_le_hl_kt_phuc_vu, khong_hl_kt_dich_vu, ty_le_hl_kt_dich_vu,
+             tong_phieu_hai_long_kt, ty_le_kh_hai_long, diem_bsc)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """, (
+            ngay, don_vi_id,
+            int(row.iloc[1]) if pd.notna(row.iloc[1]) else None,
+            int(row.iloc[2]) if pd.notna(row.iloc[2]) else None,
+            int(row.iloc[3]) if pd.notna(row.iloc[3]) else None,
+            int(row.iloc[4]) if pd.notna(row.iloc[4]) else None,
+            int(row.iloc[5]) if pd.notna(row.iloc[5]) else None,
+            float(row.iloc[6]) if pd.notna(row.iloc[6]) else None,
+            int(row.iloc[7]) if pd.notna(row.iloc[7]) else None,
+            float(row.iloc[8]) if pd.notna(row.iloc[8]) else None,
+            int(row.iloc[9]) if pd.notna(row.iloc[9]) else None,
+            float(row.iloc[10]) if pd.notna(row.iloc[10]) else None,
+            float(row.iloc[11]) if pd.notna(row.iloc[11]) else None,
+        ))
+        count += 1
+
+    conn.commit()
+    print(f"  ✓ C1.4: {count} records imported")
+    return count
+
+
+def import_c14_nvkt(conn: sqlite3.Connection, df: pd.DataFrame, ngay: str):
+    """Import báo cáo C1.4 chi tiết NVKT."""
+    cursor = conn.cursor()
+
+    count = 0
+    for _, row in df.iterrows():
+        ten_don_vi = row.iloc[0]  # DOIVT
+        ten_nvkt = row.iloc[1]    # NVKT
+
+        if pd.isna(ten_don_vi) or pd.isna(ten_nvkt):
+            continue
+
+        don_vi_id = get_or_create_don_vi(conn, ten_don_vi)
+        nvkt_id = get_or_create_nvkt(conn, don_vi_id, ten_nvkt)
+
+        cursor.execute("""
+            INSERT OR REPLACE INTO bao_cao_c14_nvkt
+            (ngay_bao_cao, nvkt_id, tong_phieu_ks_thanh_cong, tong_phieu_khl, ty_le_hai_long)
+            VALUES (?, ?, ?, ?, ?)
+        """, (
+            ngay, nvkt_id,
+            int(row.iloc[2]) if pd.notna(row.iloc[2]) else None,
+            int(row.iloc[3]) if pd.notna(row.iloc[3]) else None,
+            float(row.iloc[4]) if pd.notna(row.iloc[4]) else None,
+        ))
+        count += 1
+
+    conn.commit()
+    print(f"  ✓ C1.4 NVKT: {count} records imported")
+    return count
+
+
+def import_sm1c12_hll(conn: sqlite3.Connection, df: pd.DataFrame, ngay: str):
+    """Import báo cáo SM1-C12: Tỷ lệ hỏng lại tháng theo NVKT."""
+    cursor = conn.cursor()
+
+    count = 0
+    for _, row in df.iterrows():
+        ten_don_vi = row['TEN_DOI']
+        ten_nvkt = row['NVKT']
+
+        if pd.isna(ten_don_vi) or pd.isna(ten_nvkt):
+            continue
+
+        # Chuẩn hóa tên đơn vị thành tên ngắn
+        don_vi_id = get_or_create_don_vi(conn, ten_don_vi)
+        nvkt_id = get_or_create_nvkt(conn, don_vi_id, ten_nvkt)
+
+        cursor.execute("""
+            INSERT OR REPLACE INTO bao_cao_sm1c12_hll
+            (ngay_bao_cao, nvkt_id, so_phieu_hll, so_phieu_bao_hong, ty_le_hll)
+            VALUES (?, ?, ?, ?, ?)
+        """, (
+            ngay, nvkt_id,
+            int(row['Số phiếu HLL']) if pd.notna(row['Số phiếu HLL']) else None,
+            int(row['Số phiếu báo hỏng']) if pd.notna(row['Số phiếu báo hỏng']) else None,
+            float(row['Tỉ lệ HLL tháng (2.5%)']) if pd.notna(row['Tỉ lệ HLL tháng (2.5%)']) else None,
+        ))
+        count += 1
+
+    conn.commit()
+    print(f"  ✓ SM1-C12 HLL: {count} records imported")
+    return count
+
+
+def import_sm4c11_chitiet(conn: sqlite3.Connection, df: pd.DataFrame, ngay: str):
+    """Import báo cáo SM4-C11: Chi tiết BRCD không hẹn theo NVKT."""
+    cursor = conn.cursor()
+
+    # Lấy tên cột tỷ lệ (có thể dài)
+    ty_le_col = [c for c in df.columns if 'Tỷ lệ' in c][0]
+
+    count = 0
+    for _, row in df.iterrows():
+        ten_don_vi = row['TEN_DOI']
+        ten_nvkt = row['NVKT']
+
+        if pd.isna(ten_don_vi) or pd.isna(ten_nvkt):
+            continue
+
+        don_vi_id = get_or_create_don_vi(conn, ten_don_vi)
+        nvkt_id = get_or_create_nvkt(conn, don_vi_id, ten_nvkt)
+
+        cursor.execute("""
+            INSERT OR REPLACE INTO bao_cao_sm4c11_chitiet
+            (ngay_bao_cao, nvkt_id, tong_phieu, so_phieu_dat, ty_le_dat)
+            VALUES (?, ?, ?, ?, ?)
+        """, (
+            ngay, nvkt_id,
+            int(row['Tổng phiếu']) if pd.notna(row['Tổng phiếu']) else None,
+            int(row['Số phiếu đạt']) if pd.notna(row['Số phiếu đạt']) else None,
+            float(row[ty_le_col]) if pd.notna(row[ty_le_col]) else None,
+        ))
+        count += 1
+
+    conn.commit()
+    print(f"  ✓ SM4-C11 Chi tiết: {count} records imported")
+    return count
+
+
+def import_sm4c11_18h(conn: sqlite3.Connection, df: pd.DataFrame, ngay: str):
+    """Import báo cáo SM4-C11: Chỉ tiêu không hẹn 18h theo NVKT."""
+    cursor = conn.cursor()
+
+    # Lấy tên cột tỷ lệ (có thể dài)
+    ty_le_col = [c for c in df.columns if 'Tỷ lệ' in c][0]
+
+    count = 0
+    for _, row in df.iterrows():
+        ten_don_vi = row['TEN_DOI']
+        ten_nvkt = row['NVKT']
+
+        if pd.isna(ten_don_vi) or pd.isna(ten_nvkt):
+            continue
+
+        don_vi_id = get_or_create_don_vi(conn, ten_don_vi)
+        nvkt_id = get_or_create_nvkt(conn, don_vi_id, ten_nvkt)
+
+        cursor.execute("""
+            INSERT OR REPLACE INTO bao_cao_sm4c11_18h
+            (ngay_bao_cao, nvkt_id, tong_phieu, so_phieu_dat, ty_le_dat)
+            VALUES (?, ?, ?, ?, ?)
+        """, (
+            ngay, nvkt_id,
+            int(row['Tổng phiếu']) if pd.notna(row['Tổng phiếu']) else None,
+            int(row['Số phiếu đạt']) if pd.notna(row['Số phiếu đạt']) else None,
+            float(row[ty_le_col]) if pd.notna(row[ty_le_col]) else None,
+        ))
+        count += 1
+
+    conn.commit()
+    print(f"  ✓ SM4-C11 18h: {count} records imported")
+    return count
+
+
+# =============================================================================
+# import_baocao_thang.py (theo tháng, "Tổng" đổi thành "TTVT Sơn Tây")
+# =============================================================================
+def import_c11_thang(conn: sqlite3.Connection, df: pd.DataFrame, thang: str):
+    """Import báo cáo C1.1."""
+    cursor = conn.cursor()
+
+    count = 0
+    for _, row in df.iterrows():
+        ten_don_vi = row.iloc[0]
+        if pd.isna(ten_don_vi):
+            continue
+        # Đổi tên "Tổng" thành "TTVT Sơn Tây" (đơn vị cha)
+        if ten_don_vi == "Tổng":
+            ten_don_vi = "TTVT Sơn Tây"
+
+        don_vi_id = get_or_create_don_vi(conn, ten_don_vi)
+
+        cursor.execute("""
+            INSERT INTO bao_cao_c11
+            (thang_bao_cao, don_vi_id, sm1_cl_chu_dong, sm2_cl_chu_dong, ty_le_cl_chu_dong,
+             sm3_brcd, sm4_brcd, ty_le_brcd, chi_tieu_bsc, updated_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
+            ON CONFLICT(thang_bao_cao, don_vi_id) DO UPDATE SET
+                sm1_cl_chu_dong = excluded.sm1_cl_chu_dong,
+                sm2_cl_chu_dong = excluded.sm2_cl_chu_dong,
+                ty_le_cl_chu_dong = excluded.ty_le_cl_chu_dong,
+                sm3_brcd = excluded.sm3_brcd,
+                sm4_brcd = excluded.sm4_brcd,
+                ty_le_brcd = excluded.ty_le_brcd,
+                chi_tieu_bsc = excluded.chi_tieu_bsc,
+                updated_at = CURRENT_TIMESTAMP
+        """, (
+            thang, don_vi_id,
+            int(row.iloc[1]) if pd.notna(row.iloc[1]) else None,
+            int(row.iloc[2]) if pd.notna(row.iloc[2]) else None,
+            float(row.iloc[3]) if pd.notna(row.iloc[3]) else None,
+            int(row.iloc[4]) if pd.notna(row.iloc[4]) else None,
+            int(row.iloc[5]) if pd.notna(row.iloc[5]) else None,
+            float(row.iloc[6]) if pd.notna(row.iloc[6]) else None,
+            float(row.iloc[10]) if pd.notna(row.iloc[10]) else None,
+        ))
+        count += 1
+
+    conn.commit()
+    print(f"  ✓ C1.1: {count} records imported")
+    return count
+
+
+def import_c12_thang(conn: sqlite3.Connection, df: pd.DataFrame, thang: str):
+    """Import báo cáo C1.2."""
+    cursor = conn.cursor()
+
+    count = 0
+    for _, row in df.iterrows():
+        ten_don_vi = row.iloc[0]
+        if pd.isna(ten_don_vi):
+            continue
+        # Đổi tên "Tổng" thành "TTVT Sơn Tây" (đơn vị cha)
+        if ten_don_vi == "Tổng":
+            ten_don_vi = "TTVT Sơn Tây"
+
+        don_vi_id = get_or_create_don_vi(conn, ten_don_vi)
+
+        cursor.execute("""
+            INSERT INTO bao_cao_c12
+            (thang_bao_cao, don_vi_id, sm1_lap_lai, sm2_lap_lai, ty_le_lap_lai,
+             sm3_su_co, sm4_su_co, ty_le_su_co, chi_tieu_bsc, updated_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
+            ON CONFLICT(thang_bao_cao, don_vi_id) DO UPDATE SET
+                sm1_lap_lai = excluded.sm1_lap_lai,
+                sm2_lap_lai = excluded.sm2_lap_lai,
+                ty_le_lap_lai = excluded.ty_le_lap_lai,
+                sm3_su_co = excluded.sm3_su_co,
+                sm4_su_co = excluded.sm4_su_co,
+                ty_le_su_co = excluded.ty_le_su_co,
+                chi_tieu_bsc = excluded.chi_tieu_bsc,
+                updated_at = CURRENT_TIMESTAMP
+        """, (
+            thang, don_vi_id,
+            int(row.iloc[1]) if pd.notna(row.iloc[1]) else None,
+            int(row.iloc[2]) if pd.notna(row.iloc[2]) else None,
+            float(row.iloc[3]) if pd.notna(row.iloc[3]) else None,
+            int(row.iloc[4]) if pd.notna(row.iloc[4]) else None,
+            int(row.iloc[5]) if pd.notna(row.iloc[5]) else None,
+            float(row.iloc[6]) if pd.notna(row.iloc[6]) else None,
+            float(row.iloc[7]) if pd.notna(row.iloc[7]) else None,
+        ))
+        count += 1
+
+    conn.commit()
+    print(f"  ✓ C1.2: {count} records imported")
+    return count
+
+
+def import_c13_thang(conn: sqlite3.Connection, df: pd.DataFrame, thang: str):
+    """Import báo cáo C1.3."""
+    cursor = conn.cursor()
+
+    count = 0
+    for _, row in df.iterrows():
+        ten_don_vi = row.iloc[0]
+        if pd.isna(ten_don_vi):
+            continue
+        # Đổi tên "Tổng" thành "TTVT Sơn Tây" (đơn vị cha)
+        if ten_don_vi == "Tổng":
+            ten_don_vi = "TTVT Sơn Tây"
+
+        don_vi_id = get_or_create_don_vi(conn, ten_don_vi)
+
+        cursor.execute("""
+            INSERT INTO bao_cao_c13
+            (thang_bao_cao, don_vi_id, sm1_sua_chua, sm2_sua_chua, ty_le_sua_chua,
+             sm3_lap_lai, sm4_lap_lai, ty_le_lap_lai, sm5_su_co, sm6_su_co, ty_le_su_co, chi_tieu_bsc, updated_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
+            ON CONFLICT(thang_bao_cao, don_vi_id) DO UPDATE SET
+                sm1_sua_chua = excluded.sm1_sua_chua,
+                sm2_sua_chua = excluded.sm2_sua_chua,
+                ty_le_sua_chua = excluded.ty_le_sua_chua,
+                sm3_lap_lai = excluded.sm3_lap_lai,
+                sm4_lap_lai = excluded.sm4_lap_lai,
+                ty_le_lap_lai = excluded.ty_le_lap_lai,
+                sm5_su_co = excluded.sm5_su_co,
+                sm6_su_co = excluded.sm6_su_co,
+                ty_le_su_co = excluded.ty_le_su_co,
+                chi_tieu_bsc = excluded.chi_tieu_bsc,
+                updated_at = CURRENT_TIMESTAMP
+        """, (
+            thang, don_vi_id,
+            int(row.iloc[1]) if pd.notna(row.iloc[1]) else None,
+            int(row.iloc[2]) if pd.notna(row.iloc[2]) else None,
+            float(row.iloc[3]) if pd.notna(row.iloc[3]) else None,
+            int(row.iloc[4]) if pd.notna(row.iloc[4]) else None,
+            int(row.iloc[5]) if pd.notna(row.iloc[5]) else None,
+            float(row.iloc[6]) if pd.notna(row.iloc[6]) else None,
+            int(row.iloc[7]) if pd.notna(row.iloc[7]) else None,
+            int(row.iloc[8]) if pd.notna(row.iloc[8]) else None,
+            float(row.iloc[9]) if pd.notna(row.iloc[9]) else None,
+            float(row.iloc[10]) if pd.notna(row.iloc[10]) else None,
+        ))
+        count += 1
+
+    conn.commit()
+    print(f"  ✓ C1.3: {count} records imported")
+    return count
+
+
+def import_c14_thang(conn: sqlite3.Connection, df: pd.DataFrame, thang: str):
+    """Import báo cáo C1.4."""
+    cursor = conn.cursor()
+
+    count = 0
+    for _, row in df.iterrows():
+        ten_don_vi = row.iloc[0]
+        if pd.isna(ten_don_vi):
+            continue
+        # Đổi tên "Tổng" thành "TTVT Sơn Tây" (đơn vị cha)
+        if ten_don_vi == "Tổng":
+            ten_don_vi = "TTVT Sơn Tây"
+
+        don_vi_id = get_or_create_don_vi(conn, ten_don_vi)
+
+        cursor.execute("""
+            INSERT INTO bao_cao_c14
+            (thang_bao_cao, don_vi_id, tong_phieu, sl_da_ks, sl_ks_thanh_cong, sl_kh_hai_long,
+             khong_hl_kt_phuc_vu, ty_le_hl_kt_phuc_vu, khong_hl_kt_dich_vu, ty_le_hl_kt_dich_vu,
+             tong_phieu_hai_long_kt, ty_le_kh_hai_long, diem_bsc, updated_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
+            ON CONFLICT(thang_bao_cao, don_vi_id) DO UPDATE SET
+                tong_phieu = excluded.tong_phieu,
+                sl_da_ks = excluded.sl_da_ks,
+                sl_ks_thanh_cong = excluded.sl_ks_thanh_cong,
+                sl_kh_hai_long = excluded.sl_kh_hai_long,
+                khong_hl_kt_phuc_vu = excluded.khong_hl_kt_phuc_vu,
+                ty_le_hl_kt_phuc_vu = excluded.ty_le_hl_kt_phuc_vu,
+                khong_hl_kt_dich_vu = excluded.khong_hl_kt_dich_vu,
+                ty_le_hl_kt_dich_vu = excluded.ty_le_hl_kt_dich_vu,
+                tong_phieu_hai_long_kt = excluded.tong_phieu_hai_long_kt,
+                ty_le_kh_hai_long = excluded.ty_le_kh_hai_long,
+                diem_bsc = excluded.diem_bsc,
+                updated_at = CURRENT_TIMESTAMP
+        """, (
+            thang, don_vi_id,
+            int(row.iloc[1]) if pd.notna(row.iloc[1]) else None,
+            int(row.iloc[2]) if pd.notna(row.iloc[2]) else None,
+            int(row.iloc[3]) if pd.notna(row.iloc[3]) else None,
+            int(row.iloc[4]) if pd.notna(row.iloc[4]) else None,
+            int(row.iloc[5]) if pd.notna(row.iloc[5]) else None,
+            float(row.iloc[6]) if pd.notna(row.iloc[6]) else None,
+            int(row.iloc[7]) if pd.notna(row.iloc[7]) else None,
+            float(row.iloc[8]) if pd.notna(row.iloc[8]) else None,
+            int(row.iloc[9]) if pd.notna(row.iloc[9]) else None,
+            float(row.iloc[10]) if pd.notna(row.iloc[10]) else None,
+            float(row.iloc[11]) if pd.notna(row.iloc[11]) else None,
+        ))
+        count += 1
+
+    conn.commit()
+    print(f"  ✓ C1.4: {count} records imported")
+    return count
+
+
+def import_c14_nvkt_thang(conn: sqlite3.Connection, df: pd.DataFrame, thang: str):
+    """Import báo cáo C1.4 chi tiết NVKT."""
+    cursor = conn.cursor()
+
+    count = 0
+    for _, row in df.iterrows():
+        ten_don_vi = row.iloc[0]  # DOIVT
+        ten_nvkt = row.iloc[1]    # NVKT
+
+        if pd.isna(ten_don_vi) or pd.isna(ten_nvkt):
+            continue
+
+        don_vi_id = get_or_create_don_vi(conn, ten_don_vi)
+        nvkt_id = get_or_create_nvkt(conn, don_vi_id, ten_nvkt)
+
+        cursor.execute("""
+            INSERT INTO bao_cao_c14_nvkt
+            (thang_bao_cao, nvkt_id, tong_phieu_ks_thanh_cong, tong_phieu_khl, ty_le_hai_long, updated_at)
+            VALUES (?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
+            ON CONFLICT(thang_bao_cao, nvkt_id) DO UPDATE SET
+                tong_phieu_ks_thanh_cong = excluded.tong_phieu_ks_thanh_cong,
+                tong_phieu_khl = excluded.tong_phieu_khl,
+                ty_le_hai_long = excluded.ty_le_hai_long,
+                updated_at = CURRENT_TIMESTAMP
+        """, (
+            thang, nvkt_id,
+            int(row.iloc[2]) if pd.notna(row.iloc[2]) else None,
+            int(row.iloc[3]) if pd.notna(row.iloc[3]) else None,
+            float(row.iloc[4]) if pd.notna(row.iloc[4]) else None,
+        ))
+        count += 1
+
+    conn.commit()
+    print(f"  ✓ C1.4 NVKT: {count} records imported")
+    return count
+
+
+def import_sm1c12_hll_thang(conn: sqlite3.Connection, df: pd.DataFrame, thang: str):
+    """Import báo cáo SM1-C12: Tỷ lệ hỏng lại tháng theo NVKT."""
+    cursor = conn.cursor()
+
+    count = 0
+    for _, row in df.iterrows():
+        ten_don_vi = row['TEN_DOI']
+        ten_nvkt = row['NVKT']
+
+        if pd.isna(ten_don_vi) or pd.isna(ten_nvkt):
+            continue
+
+        don_vi_id = get_or_create_don_vi(conn, ten_don_vi)
+        nvkt_id = get_or_create_nvkt(conn, don_vi_id, ten_nvkt)
+
+        cursor.execute("""
+            INSERT INTO bao_cao_sm1c12_hll
+            (thang_bao_cao, nvkt_id, so_phieu_hll, so_phieu_bao_hong, ty_le_hll, updated_at)
+            VALUES (?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
+            ON CONFLICT(thang_bao_cao, nvkt_id) DO UPDATE SET
+                so_phieu_hll = excluded.so_phieu_hll,
+                so_phieu_bao_hong = excluded.so_phieu_bao_hong,
+                ty_le_hll = excluded.ty_le_hll,
+                updated_at = CURRENT_TIMESTAMP
+        """, (
+            thang, nvkt_id,
+            int(row['Số phiếu HLL']) if pd.notna(row['Số phiếu HLL']) else None,
+            int(row['Số phiếu báo hỏng']) if pd.notna(row['Số phiếu báo hỏng']) else None,
+            float(row['Tỉ lệ HLL tháng (2.5%)']) if pd.notna(row['Tỉ lệ HLL tháng (2.5%)']) else None,
+        ))
+        count += 1
+
+    conn.commit()
+    print(f"  ✓ SM1-C12 HLL: {count} records imported")
+    return count
+
+
+def import_sm4c11_chitiet_thang(conn: sqlite3.Connection, df: pd.DataFrame, thang: str):
+    """Import báo cáo SM4-C11: Chi tiết BRCD không hẹn theo NVKT."""
+    cursor = conn.cursor()
+
+    # Lấy tên cột tỷ lệ (có thể dài)
+    ty_le_col = [c for c in df.columns if 'Tỷ lệ' in c][0]
+
+    count = 0
+    for _, row in df.iterrows():
+        ten_don_vi = row['TEN_DOI']
+        ten_nvkt = row['NVKT']
+
+        if pd.isna(ten_don_vi) or pd.isna(ten_nvkt):
+            continue
+
+        don_vi_id = get_or_create_don_vi(conn, ten_don_vi)
+        nvkt_id = get_or_create_nvkt(conn, don_vi_id, ten_nvkt)
+
+        cursor.execute("""
+            INSERT INTO bao_cao_sm4c11_chitiet
+            (thang_bao_cao, nvkt_id, tong_phieu, so_phieu_dat, ty_le_dat, updated_at)
+            VALUES (?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
+            ON CONFLICT(thang_bao_cao, nvkt_id) DO UPDATE SET
+                tong_phieu = excluded.tong_phieu,
+                so_phieu_dat = excluded.so_phieu_dat,
+                ty_le_dat = excluded.ty_le_dat,
+                updated_at = CURRENT_TIMESTAMP
+        """, (
+            thang, nvkt_id,
+            int(row['Tổng phiếu']) if pd.notna(row['Tổng phiếu']) else None,
+            int(row['Số phiếu đạt']) if pd.notna(row['Số phiếu đạt']) else None,
+            float(row[ty_le_col]) if pd.notna(row[ty_le_col]) else None,
+        ))
+        count += 1
+
+    conn.commit()
+    print(f"  ✓ SM4-C11 Chi tiết: {count} records imported")
+    return count
+
+
+def import_sm4c11_18h_thang(conn: sqlite3.Connection, df: pd.DataFrame, thang: str):
+    """Import báo cáo SM4-C11: Chỉ tiêu không hẹn 18h theo NVKT."""
+    cursor = conn.cursor()
+
+    # Lấy tên cột tỷ lệ (có thể dài)
+    ty_le_col = [c for c in df.columns if 'Tỷ lệ' in c][0]
+
+    count = 0
+    for _, row in df.iterrows():
+        ten_don_vi = row['TEN_DOI']
+        ten_nvkt = row['NVKT']
+
+        if pd.isna(ten_don_vi) or pd.isna(ten_nvkt):
+            continue
+
+        don_vi_id = get_or_create_don_vi(conn, ten_don_vi)
+        nvkt_id = get_or_create_nvkt(conn, don_vi_id, ten_nvkt)
+
+        cursor.execute("""
+            INSERT INTO bao_cao_sm4c11_18h
+            (thang_bao_cao, nvkt_id, tong_phieu, so_phieu_dat, ty_le_dat, updated_at)
+            VALUES (?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
+            ON CONFLICT(thang_bao_cao, nvkt_id) DO UPDATE SET
+                tong_phieu = excluded.tong_phieu,
+                so_phieu_dat = excluded.so_phieu_dat,
+                ty_le_dat = excluded.ty_le_dat,
+                updated_at = CURRENT_TIMESTAMP
+        """, (
+            thang, nvkt_id,
+            int(row['Tổng phiếu']) if pd.notna(row['Tổng phiếu']) else None,
+            int(row['Số phiếu đạt']) if pd.notna(row['Số phiếu đạt']) else None,
+            float(row[ty_le_col]) if pd.notna(row[ty_le_col]) else None,
+        ))
+        count += 1
+
+    conn.commit()
+    print(f"  ✓ SM4-C11 18h: {count} records imported")
+    return count
+
+
+LEGACY_IMPORTS = {
+    "import_baocao": {
+        "c11": import_c11,
+        "c12": import_c12,
+        "c13": import_c13,
+        "c14": import_c14,
+        "c14_nvkt": import_c14_nvkt,
+        "sm1c12": import_sm1c12_hll,
+        "sm4c11_chitiet": import_sm4c11_chitiet,
+        "sm4c11_18h": import_sm4c11_18h,
+    },
+    "import_baocao_thang": {
+        "c11": import_c11_thang,
+        "c12": import_c12_thang,
+        "c13": import_c13_thang,
+        "c14": import_c14_thang,
+        "c14_nvkt": import_c14_nvkt_thang,
+        "sm1c12": import_sm1c12_hll_thang,
+        "sm4c11_chitiet": import_sm4c11_chitiet_thang,
+        "sm4c11_18h": import_sm4c11_18h_thang,
+    },
+}
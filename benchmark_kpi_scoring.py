@@ -0,0 +1,124 @@
+"""
+Benchmark tính điểm BSC: .apply() từng dòng vs tinh_diem_bsc() vector hóa
+
+Sinh dữ liệu giả lập theo đúng dạng 2 bảng thực tế:
+- Bảng theo NVKT (kpi_calculator): cột tỷ lệ dạng thập phân, có NaN
+- Bảng theo đơn vị (kpi_calculator_donvi / exclusion_process): cột tỷ lệ dạng %
+
+Kiểm tra kết quả 2 cách trùng nhau từng bit rồi in thời gian và hệ số tăng tốc.
+
+Cách dùng:
+    python benchmark_kpi_scoring.py
+    python benchmark_kpi_scoring.py --nvkt-rows 200000 --donvi-rows 5000 --repeat 5
+"""
+
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from kpi_scoring import (
+    chuan_hoa_ty_le,
+    tinh_diem_bsc,
+    tinh_diem_C11_TP1, tinh_diem_C11_TP2,
+    tinh_diem_C12_TP1, tinh_diem_C12_TP2,
+    tinh_diem_C14, tinh_diem_C15,
+)
+
+
+HAM_SCALAR = {
+    'C11_TP1': tinh_diem_C11_TP1,
+    'C11_TP2': tinh_diem_C11_TP2,
+    'C12_TP1': tinh_diem_C12_TP1,
+    'C12_TP2': tinh_diem_C12_TP2,
+    'C14': tinh_diem_C14,
+    'C15': tinh_diem_C15,
+}
+
+# Khoảng giá trị (thập phân) trải qua mọi ngưỡng của từng chỉ tiêu
+KHOANG_GIA_TRI = {
+    'C11_TP1': (0.90, 1.0),
+    'C11_TP2': (0.70, 0.95),
+    'C12_TP1': (0.0, 0.06),
+    'C12_TP2': (0.0, 0.05),
+    'C14': (0.90, 1.0),
+    'C15': (0.85, 1.0),
+}
+
+
+def tao_du_lieu(so_dong, dang_phan_tram, seed):
+    """Sinh DataFrame tỷ lệ cho 6 chỉ tiêu, ~5% ô trống."""
+    rng = np.random.default_rng(seed)
+    data = {}
+    for chi_tieu, (thap, cao) in KHOANG_GIA_TRI.items():
+        cot = rng.uniform(thap, cao, so_dong).round(4)
+        cot[rng.random(so_dong) < 0.05] = np.nan
+        data[chi_tieu] = cot * 100 if dang_phan_tram else cot
+    return pd.DataFrame(data)
+
+
+def tinh_bang_apply(df, dang_phan_tram):
+    ket_qua = {}
+    for chi_tieu, ham in HAM_SCALAR.items():
+        if dang_phan_tram:
+            ket_qua[chi_tieu] = df[chi_tieu].apply(lambda x, ham=ham: ham(chuan_hoa_ty_le(x))).round(2)
+        else:
+            ket_qua[chi_tieu] = df[chi_tieu].apply(ham)
+    return ket_qua
+
+
+def tinh_bang_vector(df, dang_phan_tram):
+    ket_qua = {}
+    for chi_tieu in HAM_SCALAR:
+        if dang_phan_tram:
+            ket_qua[chi_tieu] = tinh_diem_bsc(chi_tieu, df[chi_tieu], chuan_hoa=True).round(2)
+        else:
+            ket_qua[chi_tieu] = tinh_diem_bsc(chi_tieu, df[chi_tieu])
+    return ket_qua
+
+
+def do_thoi_gian(ham, repeat):
+    tot_nhat = None
+    ket_qua = None
+    for _ in range(repeat):
+        bat_dau = time.perf_counter()
+        ket_qua = ham()
+        thoi_gian = time.perf_counter() - bat_dau
+        tot_nhat = thoi_gian if tot_nhat is None else min(tot_nhat, thoi_gian)
+    return tot_nhat, ket_qua
+
+
+def chay_benchmark(ten, so_dong, dang_phan_tram, repeat, seed):
+    df = tao_du_lieu(so_dong, dang_phan_tram, seed)
+    t_apply, kq_apply = do_thoi_gian(lambda: tinh_bang_apply(df, dang_phan_tram), repeat)
+    t_vector, kq_vector = do_thoi_gian(lambda: tinh_bang_vector(df, dang_phan_tram), repeat)
+
+    for chi_tieu in HAM_SCALAR:
+        cu = kq_apply[chi_tieu].astype(float).to_numpy()
+        moi = kq_vector[chi_tieu].to_numpy()
+        if not np.array_equal(cu, moi, equal_nan=True):
+            lech = int((~((cu == moi) | (np.isnan(cu) & np.isnan(moi)))).sum())
+            raise AssertionError(f"{ten} - {chi_tieu}: {lech} giá trị lệch giữa .apply và tinh_diem_bsc")
+
+    print(f"{ten:<22} {so_dong:>9,} dòng | .apply: {t_apply * 1000:9.1f} ms | "
+          f"vector: {t_vector * 1000:7.1f} ms | x{t_apply / t_vector:6.1f} | khớp từng bit")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark tính điểm BSC vector hóa")
+    parser.add_argument("--nvkt-rows", type=int, default=50000, help="Số dòng bảng theo NVKT")
+    parser.add_argument("--donvi-rows", type=int, default=2000, help="Số dòng bảng theo đơn vị")
+    parser.add_argument("--repeat", type=int, default=3, help="Số lần chạy, lấy thời gian tốt nhất")
+    parser.add_argument("--seed", type=int, default=2025)
+    args = parser.parse_args()
+
+    print("=" * 90)
+    print("BENCHMARK TÍNH ĐIỂM BSC (6 chỉ tiêu)")
+    print("=" * 90)
+    chay_benchmark("Theo NVKT (thập phân)", args.nvkt_rows, False, args.repeat, args.seed)
+    chay_benchmark("Theo đơn vị (%)", args.donvi_rows, True, args.repeat, args.seed + 1)
+
+
+if __name__ == "__main__":
+    main()
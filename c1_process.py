@@ -4,6 +4,8 @@ import os
 import sqlite3
 import math
 
+from api_transition.excel_cache import read_excel
+
 
 def process_c11_report():
     """
@@ -29,7 +31,7 @@ def process_c11_report():
         print(f"\n✓ Đang đọc file: {input_file}")
 
         # Đọc file Excel
-        df = pd.read_excel(input_file)
+        df = read_excel(input_file)
         print(f"✅ Đã đọc file, tổng số dòng: {len(df)}")
 
         # Xóa hàng đầu tiên
@@ -112,7 +114,7 @@ def process_c12_report():
         print(f"\n✓ Đang đọc file: {input_file}")
 
         # Đọc file Excel
-        df = pd.read_excel(input_file)
+        df = read_excel(input_file)
         print(f"✅ Đã đọc file, tổng số dòng: {len(df)}")
 
         # Xóa hàng đầu tiên
@@ -192,7 +194,7 @@ def process_c13_report():
         print(f"\n✓ Đang đọc file: {input_file}")
 
         # Đọc file Excel
-        df = pd.read_excel(input_file)
+        df = read_excel(input_file)
         print(f"✅ Đã đọc file, tổng số dòng: {len(df)}")
 
         # Xóa hàng đầu tiên
@@ -275,7 +277,7 @@ def process_c14_report():
         print(f"\n✓ Đang đọc file: {input_file}")
 
         # Đọc file Excel
-        df = pd.read_excel(input_file)
+        df = read_excel(input_file)
         print(f"✅ Đã đọc file, tổng số dòng: {len(df)}, tổng số cột: {df.shape[1]}")
 
         # Xóa hàng đầu tiên
@@ -425,7 +427,7 @@ def process_c14_chitiet_report():
         print(f"\n✓ Đang đọc file: {input_file}")
 
         # Đọc file Excel
-        df = pd.read_excel(input_file)
+        df = read_excel(input_file)
         print(f"✅ Đã đọc file, tổng số dòng: {len(df)}")
 
         # Kiểm tra các cột cần thiết
@@ -613,7 +615,7 @@ def process_c15_report():
         print(f"\n✓ Đang đọc file: {input_file}")
 
         # Đọc file Excel
-        df = pd.read_excel(input_file)
+        df = read_excel(input_file)
         print(f"✅ Đã đọc file, tổng số dòng: {len(df)}, tổng số cột: {df.shape[1]}")
 
         # Xóa 1 dòng đầu tiên (dòng header thừa)
@@ -933,7 +935,7 @@ def process_c15_chitiet_report():
         print(f"\n✓ Đang đọc file: {input_file}")
 
         # Đọc file Excel
-        df = pd.read_excel(input_file)
+        df = read_excel(input_file)
         print(f"✅ Đã đọc file, tổng số dòng: {len(df)}, tổng số cột: {df.shape[1]}")
         print(f"Các cột hiện có: {', '.join(df.columns)}")
 
@@ -1419,7 +1421,7 @@ def process_c11_chitiet_report():
         print(f"\n✓ Đang đọc file: {input_file}")
 
         # Đọc file Excel
-        df = pd.read_excel(input_file)
+        df = read_excel(input_file)
         print(f"✅ Đã đọc file, tổng số dòng: {len(df)}")
 
         # Kiểm tra cột TEN_KV có tồn tại không
@@ -2141,7 +2143,7 @@ def process_c11_chitiet_report_SM2():
         print(f"\n✓ Đang đọc file: {input_file}")
 
         # Đọc file Excel
-        df = pd.read_excel(input_file)
+        df = read_excel(input_file)
         print(f"✅ Đã đọc file, tổng số dòng: {len(df)}")
 
         # Kiểm tra các cột cần thiết
@@ -2480,7 +2482,7 @@ def process_c12_chitiet_report_SM1SM2():
         print(f"\n✓ Đang đọc file: {input_file}")
 
         # Đọc file Excel
-        df = pd.read_excel(input_file)
+        df = read_excel(input_file)
         print(f"✅ Đã đọc file, tổng số dòng: {len(df)}")
 
         # Kiểm tra cột TEN_KV
@@ -2632,7 +2634,7 @@ def process_c12_chitiet_report_SM1SM2():
         print(f"\n✓ Đang đọc file: {input_file_sm2}")
 
         # Đọc file Excel SM2-C12
-        df_sm2 = pd.read_excel(input_file_sm2)
+        df_sm2 = read_excel(input_file_sm2)
         print(f"✅ Đã đọc file, tổng số dòng: {len(df_sm2)}")
 
         # Kiểm tra cột TEN_KV
@@ -2889,7 +2891,7 @@ def process_c12_ti_le_bao_hong():
 
         # Đọc file SM4-C11.xlsx Sheet 1
         print(f"\n✓ Đang đọc file: {input_file}")
-        df_sm4 = pd.read_excel(input_file, sheet_name=0)  # Sheet 1 (index 0)
+        df_sm4 = read_excel(input_file, sheet_name=0)  # Sheet 1 (index 0)
         print(f"✅ Đã đọc file, tổng số dòng: {len(df_sm4)}")
 
         # Kiểm tra cột TEN_DICH_VU và TEN_KV
@@ -2959,7 +2961,7 @@ def process_c12_ti_le_bao_hong():
 
         # Đọc file tham chiếu thuê bao
         print(f"\n✓ Đang đọc file tham chiếu: {ref_file}")
-        df_ref = pd.read_excel(ref_file)
+        df_ref = read_excel(ref_file)
         print(f"✅ Đã đọc file tham chiếu, tổng số dòng: {len(df_ref)}")
 
         # Kiểm tra các cột cần thiết trong file tham chiếu
@@ -3168,7 +3170,7 @@ def process_c11_ct_tp1_72h():
         print(f"\n✓ Đang đọc Sheet1 từ file: {input_file}")
         
         # Đọc Sheet1 (dữ liệu chi tiết)
-        df = pd.read_excel(input_file, sheet_name='Sheet1')
+        df = read_excel(input_file, sheet_name='Sheet1')
         print(f"✅ Đã đọc Sheet1, tổng số dòng: {len(df)}")
         
         # Kiểm tra cột TG
@@ -3371,7 +3373,7 @@ def process_c15_ti_le_khong_dat():
         
         # Đọc sheet KQ_C15_chitiet
         try:
-            df = pd.read_excel(input_file, sheet_name='KQ_C15_chitiet')
+            df = read_excel(input_file, sheet_name='KQ_C15_chitiet')
             print(f"✅ Đã đọc sheet, tổng số dòng: {len(df)}")
         except Exception as e:
             print(f"❌ Không thể đọc sheet 'KQ_C15_chitiet': {e}")
@@ -3529,7 +3531,7 @@ def process_c14_ti_le_khl():
         
         # Đọc sheet TH_HL_NVKT
         try:
-            df = pd.read_excel(input_file, sheet_name='TH_HL_NVKT')
+            df = read_excel(input_file, sheet_name='TH_HL_NVKT')
             print(f"✅ Đã đọc sheet, tổng số dòng: {len(df)}")
         except Exception as e:
             print(f"❌ Không thể đọc sheet 'TH_HL_NVKT': {e}")
@@ -3685,7 +3687,7 @@ def process_c11_ti_le_khong_dat():
         
         # Đọc sheet chi_tiet
         try:
-            df = pd.read_excel(input_file, sheet_name='chi_tiet')
+            df = read_excel(input_file, sheet_name='chi_tiet')
             print(f"✅ Đã đọc sheet, tổng số dòng: {len(df)}")
         except Exception as e:
             print(f"❌ Không thể đọc sheet 'chi_tiet': {e}")
@@ -3845,7 +3847,7 @@ def process_c12_ti_le_hll():
         
         # Đọc sheet TH_SM1C12_HLL_Thang
         try:
-            df = pd.read_excel(input_file, sheet_name='TH_SM1C12_HLL_Thang')
+            df = read_excel(input_file, sheet_name='TH_SM1C12_HLL_Thang')
             print(f"✅ Đã đọc sheet, tổng số dòng: {len(df)}")
         except Exception as e:
             print(f"❌ Không thể đọc sheet 'TH_SM1C12_HLL_Thang': {e}")
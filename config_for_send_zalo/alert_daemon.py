@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Chạy các luật cảnh báo (send_warning_*) liên tục ở chế độ theo dõi file.
+
+- Mỗi ALERT_WATCH_INTERVAL giây kiểm tra size + mtime của các workbook nguồn
+  (chiTietBrcd5Doi.xlsx, bc_BRCD.xlsx); file nào đổi thì parse lại 1 lần vào
+  TicketModel dùng chung rồi chạy các luật đọc file đó với changed_only=True:
+  chỉ các phiếu mới/thay đổi so với lần load trước được xét
+- Mỗi ALERT_FULL_SCAN_MINUTES phút chạy lại toàn bộ luật trên toàn bộ phiếu, để các
+  nhắc lại theo thời gian (quá giờ nhắc lại sau 6 tiếng, ...) và các phiếu bị bỏ qua
+  do ngoài khung giờ gửi vẫn được xử lý
+- File đang được ghi dở (đọc lỗi) sẽ được thử lại ở lần kiểm tra sau
+
+Cách dùng:
+    python alert_daemon.py                                  # chạy liên tục
+    python alert_daemon.py --once                           # 1 vòng quét đầy đủ rồi thoát
+    python alert_daemon.py --rules phieu_qua_gio,khdn_uu_tien --interval 5
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import time
+from datetime import datetime
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from config import ALERT_FULL_SCAN_MINUTES, ALERT_WATCH_INTERVAL, EXCEL_FILE_BRCD
+from alert_dispatcher import get_dispatcher
+from ticket_model import get_ticket_model
+import send_zalo_via_n8n_webhook as alerts
+
+
+BC_BRCD_FILE = os.path.join('downloads', 'kq_dhsc', 'bc_BRCD.xlsx')
+
+# Tên luật -> (workbook nguồn, hàm cảnh báo nhận tham số changed_only)
+RULES: Dict[str, Tuple[str, Callable[..., bool]]] = {
+    'phieu_ton_brcd': (EXCEL_FILE_BRCD, alerts.send_warning_phieu_ton_brcd),
+    'phieu_qua_gio': (EXCEL_FILE_BRCD, alerts.send_warning_phieu_qua_gio),
+    'phieu_ton_sap_qua_gio': (EXCEL_FILE_BRCD, alerts.send_warning_phieu_ton_sap_qua_gio),
+    'hong_lai_trong_thang': (BC_BRCD_FILE, alerts.send_warning_hong_lai_trong_thang),
+    'khdn_uu_tien': (BC_BRCD_FILE, alerts.send_warning_khdn_uu_tien),
+    'phieu_ob_khl': (BC_BRCD_FILE, alerts.send_warning_phieu_ob_khl),
+    'phieu_hll_7_ngay': (BC_BRCD_FILE, alerts.send_warning_phieu_hll_7_ngay),
+}
+
+
+class AlertDaemon:
+    """Vòng lặp theo dõi workbook nguồn và chạy các luật cảnh báo khi có thay đổi"""
+
+    def __init__(self, rule_names: Optional[Iterable[str]] = None,
+                 interval: float = ALERT_WATCH_INTERVAL,
+                 full_scan_minutes: float = ALERT_FULL_SCAN_MINUTES):
+        names = list(rule_names) if rule_names else list(RULES)
+        unknown = [name for name in names if name not in RULES]
+        if unknown:
+            raise ValueError(f"Luật không tồn tại: {', '.join(unknown)}")
+        self.rules = {name: RULES[name] for name in names}
+        self.files = sorted({path for path, _ in self.rules.values()})
+        self.interval = interval
+        self.full_scan_seconds = full_scan_minutes * 60
+        self.model = get_ticket_model()
+        self.model.pin(self.files)
+        self._last_full: Optional[float] = None
+
+    def _refresh(self) -> List[str]:
+        """Load lại các file đã thay đổi, trả về danh sách file vừa load"""
+        changed = []
+        for path in self.files:
+            if not os.path.exists(path):
+                continue
+            try:
+                if self.model.refresh(path):
+                    changed.append(path)
+            except Exception as e:
+                print(f"  ⚠️ Chưa đọc được {path} (có thể đang được ghi), thử lại sau: {e}")
+        return changed
+
+    def run_cycle(self, force_full: bool = False) -> List[str]:
+        """1 vòng kiểm tra. Trả về danh sách luật đã chạy"""
+        changed = self._refresh()
+        now = time.monotonic()
+        full = (force_full or self._last_full is None
+                or now - self._last_full >= self.full_scan_seconds)
+
+        for path in changed:
+            counts = self.model.changed_count(path)
+            detail = ", ".join(f"{sheet}: {count}" for sheet, count in counts.items() if count)
+            print(f"📂 {path} thay đổi - phiếu mới/thay đổi: {detail or 'không có'}")
+
+        ran = []
+        for name, (path, func) in self.rules.items():
+            if not full and path not in changed:
+                continue
+            print(f"\n▶️ [{datetime.now():%H:%M:%S}] Luật {name} "
+                  f"({'quét đầy đủ' if full else 'chỉ phiếu thay đổi'})")
+            try:
+                func(changed_only=not full)
+            except Exception as e:
+                print(f"  ❌ Luật {name} lỗi: {e}")
+            ran.append(name)
+
+        if full:
+            self._last_full = now
+        if ran:
+            print(get_dispatcher().metrics.summary())
+        return ran
+
+    def run_forever(self) -> None:
+        print(f"👀 Theo dõi {len(self.files)} file, {len(self.rules)} luật, "
+              f"kiểm tra mỗi {self.interval:g}s, quét đầy đủ mỗi {self.full_scan_seconds / 60:g} phút "
+              f"(Ctrl+C để dừng)")
+        try:
+            while True:
+                started = time.monotonic()
+                self.run_cycle()
+                time.sleep(max(0.0, self.interval - (time.monotonic() - started)))
+        except KeyboardInterrupt:
+            print("\n🛑 Dừng daemon cảnh báo")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Daemon cảnh báo: chỉ xét phiếu mới/thay đổi khi file nguồn đổi")
+    parser.add_argument("--rules", help=f"Danh sách luật, cách nhau bởi dấu phẩy ({', '.join(RULES)})")
+    parser.add_argument("--interval", type=float, default=ALERT_WATCH_INTERVAL, help="Số giây giữa 2 lần kiểm tra file")
+    parser.add_argument("--full-every", type=float, default=ALERT_FULL_SCAN_MINUTES,
+                        help="Số phút giữa 2 lần quét đầy đủ")
+    parser.add_argument("--once", action="store_true", help="Chạy 1 vòng quét đầy đủ rồi thoát")
+    args = parser.parse_args()
+
+    rule_names = [name.strip() for name in args.rules.split(",") if name.strip()] if args.rules else None
+    daemon = AlertDaemon(rule_names, args.interval, args.full_every)
+    if args.once:
+        daemon.run_cycle(force_full=True)
+    else:
+        daemon.run_forever()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,421 @@
+#!/usr/bin/env python3
+"""
+Gửi bản tin cảnh báo Zalo (qua webhook n8n) và Telegram song song, có giới hạn tốc độ.
+
+Thay cho kiểu gửi tuần tự + time.sleep(0.5)/time.sleep(1) trong send_warning_*:
+- Mỗi (kênh, nhóm) là 1 hàng đợi FIFO: bản tin trong cùng 1 nhóm vẫn đến đúng thứ tự,
+  các nhóm khác nhau được gửi song song (tối đa ALERT_MAX_WORKERS luồng; nên >= số nhóm
+  x số kênh vì luồng chờ rate limit của nhóm nào thì giữ hàng đợi của nhóm đó)
+- Token bucket theo kênh (ZALO_RATE_PER_SEC, TELEGRAM_RATE_PER_SEC) và theo từng
+  nhóm/chat (ZALO_THREAD_RATE_PER_SEC, TELEGRAM_CHAT_RATE_PER_SEC)
+- Lỗi mạng, HTTP 429 và 5xx được gửi lại với backoff lũy thừa (tôn trọng retry_after
+  của Telegram / header Retry-After)
+- Thống kê số bản tin thành công/thất bại, số lần thử lại, độ trễ theo kênh
+
+Cách dùng:
+    python alert_dispatcher.py --stub --port 8765           # chạy webhook giả để test
+    python alert_dispatcher.py --benchmark 300 --groups 4   # đo thông lượng với webhook giả
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Deque, Dict, Optional, Tuple
+
+import requests
+
+from config import (
+    ALERT_MAX_RETRIES,
+    ALERT_MAX_WORKERS,
+    ALERT_RETRY_BACKOFF,
+    ALERT_SEND_TIMEOUT,
+    TELEGRAM_CHAT_RATE_PER_SEC,
+    TELEGRAM_RATE_PER_SEC,
+    WEBHOOK_TEXT_URL,
+    ZALO_RATE_PER_SEC,
+    ZALO_THREAD_RATE_PER_SEC,
+)
+
+
+ZALO = "zalo"
+TELEGRAM = "telegram"
+TELEGRAM_API_URL = "https://api.telegram.org"
+
+MAX_BACKOFF_SECONDS = 60
+
+
+class TokenBucket:
+    """Token bucket an toàn luồng; rate <= 0 là không giới hạn"""
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(1.0, rate)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self) -> float:
+        """Lấy 1 token (có thể ghi nợ), trả về số giây phải chờ trước khi dùng"""
+        if self.rate <= 0:
+            return 0.0
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            return 0.0 if self._tokens >= 0 else -self._tokens / self.rate
+
+    def acquire(self) -> float:
+        wait = self.reserve()
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+
+@dataclass
+class DeliveryResult:
+    channel: str
+    target: str
+    ok: bool
+    status_code: Optional[int] = None
+    error: Optional[str] = None
+    attempts: int = 0
+    latency: float = 0.0
+
+    def describe(self) -> str:
+        """Mô tả lỗi ngắn gọn để in log"""
+        if self.ok:
+            return "OK"
+        if self.status_code is not None:
+            return f"Status: {self.status_code}"
+        return self.error or "Không rõ lỗi"
+
+
+@dataclass
+class ChannelMetrics:
+    sent: int = 0
+    failed: int = 0
+    retries: int = 0
+    total_latency: float = 0.0
+    max_latency: float = 0.0
+    throttled_seconds: float = 0.0
+
+    def add(self, result: DeliveryResult, throttled: float) -> None:
+        if result.ok:
+            self.sent += 1
+        else:
+            self.failed += 1
+        self.retries += max(0, result.attempts - 1)
+        self.total_latency += result.latency
+        self.max_latency = max(self.max_latency, result.latency)
+        self.throttled_seconds += throttled
+
+
+@dataclass
+class DispatchMetrics:
+    started: float = field(default_factory=time.monotonic)
+    channels: Dict[str, ChannelMetrics] = field(default_factory=dict)
+
+    def summary(self) -> str:
+        elapsed = max(time.monotonic() - self.started, 1e-9)
+        lines = []
+        for channel, m in sorted(self.channels.items()):
+            total = m.sent + m.failed
+            avg = m.total_latency / total if total else 0.0
+            lines.append(
+                f"  [{channel}] ✅ {m.sent} | ❌ {m.failed} | 🔁 thử lại {m.retries} | "
+                f"trễ TB {avg:.2f}s (max {m.max_latency:.2f}s) | chờ rate limit {m.throttled_seconds:.1f}s | "
+                f"{total / elapsed:.2f} bản tin/s"
+            )
+        return "\n".join(lines) if lines else "  (chưa gửi bản tin nào)"
+
+
+@dataclass
+class _Job:
+    channel: str
+    target: str
+    payload: Dict
+    future: Future
+    token: Optional[str] = None
+
+
+@dataclass
+class AlertDelivery:
+    """Kết quả gửi 1 bản tin tới Zalo (+ Telegram nếu có chat_id)"""
+    zalo: Future
+    telegram: Optional[Future] = None
+
+    def zalo_result(self) -> DeliveryResult:
+        return self.zalo.result()
+
+    def telegram_result(self) -> Optional[DeliveryResult]:
+        return self.telegram.result() if self.telegram is not None else None
+
+
+class AlertDispatcher:
+    """
+    Hàng đợi gửi bản tin có giới hạn tốc độ.
+
+    submit()/zalo()/telegram() trả về Future[DeliveryResult] ngay; Future không bao
+    giờ raise, lỗi được ghi trong DeliveryResult.ok/status_code/error.
+    """
+
+    def __init__(self,
+                 max_workers: int = ALERT_MAX_WORKERS,
+                 zalo_url: str = WEBHOOK_TEXT_URL,
+                 telegram_api_url: str = TELEGRAM_API_URL,
+                 zalo_rate: float = ZALO_RATE_PER_SEC,
+                 zalo_thread_rate: float = ZALO_THREAD_RATE_PER_SEC,
+                 telegram_rate: float = TELEGRAM_RATE_PER_SEC,
+                 telegram_chat_rate: float = TELEGRAM_CHAT_RATE_PER_SEC,
+                 max_retries: int = ALERT_MAX_RETRIES,
+                 backoff: float = ALERT_RETRY_BACKOFF,
+                 timeout: float = ALERT_SEND_TIMEOUT):
+        self.zalo_url = zalo_url
+        self.telegram_api_url = telegram_api_url.rstrip("/")
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.timeout = timeout
+        self.metrics = DispatchMetrics()
+
+        self._channel_buckets = {ZALO: TokenBucket(zalo_rate), TELEGRAM: TokenBucket(telegram_rate)}
+        self._lane_rates = {ZALO: zalo_thread_rate, TELEGRAM: telegram_chat_rate}
+        self._lane_buckets: Dict[Tuple[str, str], TokenBucket] = {}
+        self._lanes: Dict[Tuple[str, str], Deque[_Job]] = {}
+        self._active: set = set()
+        self._lock = threading.Lock()
+        self._sessions = threading.local()
+        self._executor = ThreadPoolExecutor(max_workers=max(1, max_workers), thread_name_prefix="alert")
+
+    # ------------------------------------------------------------------
+    # API gửi
+    # ------------------------------------------------------------------
+    def submit(self, channel: str, target, payload: Dict, token: Optional[str] = None) -> Future:
+        future: Future = Future()
+        job = _Job(channel, str(target), payload, future, token)
+        lane = (channel, job.target)
+        with self._lock:
+            self._lanes.setdefault(lane, deque()).append(job)
+            if lane not in self._lane_buckets:
+                self._lane_buckets[lane] = TokenBucket(self._lane_rates[channel], capacity=1)
+            if lane not in self._active:
+                self._active.add(lane)
+                self._executor.submit(self._drain, lane)
+        return future
+
+    def zalo(self, thread_id, message: str) -> Future:
+        return self.submit(ZALO, thread_id, {"threadID": thread_id, "message": message})
+
+    def telegram(self, chat_id, message: str, token: str, parse_mode: str = "HTML") -> Future:
+        return self.submit(TELEGRAM, chat_id, {"chat_id": chat_id, "text": message, "parse_mode": parse_mode}, token=token)
+
+    def send_alert(self, thread_id, message: str, telegram_chat_id=None,
+                   telegram_token: Optional[str] = None) -> AlertDelivery:
+        """Gửi 1 bản tin tới nhóm Zalo và (nếu có chat_id + token) nhóm Telegram tương ứng"""
+        telegram_future = None
+        if telegram_chat_id and telegram_token:
+            telegram_future = self.telegram(telegram_chat_id, message, telegram_token)
+        return AlertDelivery(self.zalo(thread_id, message), telegram_future)
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=True)
+
+    def __enter__(self) -> "AlertDispatcher":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.shutdown()
+
+    # ------------------------------------------------------------------
+    # Xử lý hàng đợi
+    # ------------------------------------------------------------------
+    def _drain(self, lane: Tuple[str, str]) -> None:
+        while True:
+            with self._lock:
+                queue = self._lanes[lane]
+                if not queue:
+                    self._active.discard(lane)
+                    return
+                job = queue.popleft()
+            try:
+                result, throttled = self._deliver(job, self._lane_buckets[lane])
+            except Exception as e:  # không để 1 bản tin lỗi làm kẹt cả hàng đợi
+                result, throttled = DeliveryResult(job.channel, job.target, False, error=str(e)), 0.0
+            with self._lock:
+                self.metrics.channels.setdefault(job.channel, ChannelMetrics()).add(result, throttled)
+            job.future.set_result(result)
+
+    def _deliver(self, job: _Job, lane_bucket: TokenBucket) -> Tuple[DeliveryResult, float]:
+        started = time.monotonic()
+        throttled = 0.0
+        attempt = 0
+        while True:
+            attempt += 1
+            throttled += lane_bucket.acquire()
+            throttled += self._channel_buckets[job.channel].acquire()
+            status_code, error, retry_after = self._send_once(job)
+            ok = status_code == 200
+            retryable = error is not None or status_code == 429 or (status_code or 0) >= 500
+            if ok or not retryable or attempt > self.max_retries:
+                latency = time.monotonic() - started - throttled
+                return DeliveryResult(job.channel, job.target, ok, status_code, error, attempt, latency), throttled
+            delay = retry_after if retry_after else self.backoff * (2 ** (attempt - 1))
+            time.sleep(min(MAX_BACKOFF_SECONDS, delay * random.uniform(1.0, 1.25)))
+
+    def _session(self) -> requests.Session:
+        session = getattr(self._sessions, "session", None)
+        if session is None:
+            session = self._sessions.session = requests.Session()
+        return session
+
+    def _send_once(self, job: _Job) -> Tuple[Optional[int], Optional[str], Optional[float]]:
+        """(status_code, lỗi mạng, retry_after giây)"""
+        try:
+            if job.channel == ZALO:
+                response = self._session().get(self.zalo_url, json=job.payload, timeout=self.timeout)
+            else:
+                url = f"{self.telegram_api_url}/bot{job.token}/sendMessage"
+                response = self._session().post(url, data=job.payload, timeout=self.timeout)
+        except requests.RequestException as e:
+            return None, str(e), None
+        return response.status_code, None, _retry_after(response)
+
+
+def _retry_after(response) -> Optional[float]:
+    if response.status_code != 429:
+        return None
+    try:
+        return float(response.json()["parameters"]["retry_after"])
+    except (ValueError, KeyError, TypeError):
+        pass
+    try:
+        return float(response.headers.get("Retry-After"))
+    except (TypeError, ValueError):
+        return None
+
+
+_default_dispatcher: Optional[AlertDispatcher] = None
+_default_lock = threading.Lock()
+
+
+def get_dispatcher() -> AlertDispatcher:
+    """Dispatcher dùng chung trong process (giới hạn tốc độ áp dụng cho mọi send_warning_*)"""
+    global _default_dispatcher
+    with _default_lock:
+        if _default_dispatcher is None:
+            _default_dispatcher = AlertDispatcher()
+        return _default_dispatcher
+
+
+# ----------------------------------------------------------------------
+# Webhook giả để đo thông lượng
+# ----------------------------------------------------------------------
+class _StubHandler(BaseHTTPRequestHandler):
+    latency = 0.0
+    fail_rate = 0.0
+    counter = {"requests": 0, "throttled": 0}
+    counter_lock = threading.Lock()
+
+    def _handle(self) -> None:
+        length = int(self.headers.get("Content-Length") or 0)
+        if length:
+            self.rfile.read(length)
+        if self.latency:
+            time.sleep(self.latency)
+        with self.counter_lock:
+            self.counter["requests"] += 1
+            throttle = random.random() < self.fail_rate
+            if throttle:
+                self.counter["throttled"] += 1
+        if throttle:
+            body = {"ok": False, "error_code": 429, "parameters": {"retry_after": 0.2}}
+            self.send_response(429)
+        else:
+            body = {"ok": True}
+            self.send_response(200)
+        data = json.dumps(body).encode("utf-8")
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    do_GET = _handle
+    do_POST = _handle
+
+    def log_message(self, format, *args) -> None:
+        pass
+
+
+def start_stub_server(port: int = 0, latency: float = 0.0, fail_rate: float = 0.0) -> ThreadingHTTPServer:
+    """Chạy webhook giả (trả 200, hoặc 429 với xác suất fail_rate) trong thread nền"""
+    handler = type("StubHandler", (_StubHandler,), {
+        "latency": latency,
+        "fail_rate": fail_rate,
+        "counter": {"requests": 0, "throttled": 0},
+    })
+    server = ThreadingHTTPServer(("127.0.0.1", port), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def run_benchmark(messages: int, groups: int, latency: float, fail_rate: float, max_workers: int) -> None:
+    server = start_stub_server(latency=latency, fail_rate=fail_rate)
+    base_url = f"http://127.0.0.1:{server.server_address[1]}"
+    dispatcher = AlertDispatcher(max_workers=max_workers, zalo_url=f"{base_url}/webhook/text",
+                                 telegram_api_url=base_url, backoff=0.1)
+    print(f"🚀 Gửi {messages} bản tin (Zalo + Telegram) tới {groups} nhóm qua webhook giả {base_url}")
+    started = time.monotonic()
+    deliveries = [
+        dispatcher.send_alert(f"thread-{i % groups}", f"Bản tin {i}", f"chat-{i % groups}", "stub-token")
+        for i in range(messages)
+    ]
+    for delivery in deliveries:
+        delivery.zalo_result()
+        delivery.telegram_result()
+    elapsed = time.monotonic() - started
+    dispatcher.shutdown()
+    server.shutdown()
+
+    # Cách cũ: mỗi phiếu gửi Zalo, chờ 0.5s, gửi Telegram, chờ 1s
+    sequential = messages * (2 * latency + 1.5)
+    print(dispatcher.metrics.summary())
+    print(f"  ⏱️ {elapsed:.1f}s (tuần tự + sleep ước tính {sequential:.1f}s), "
+          f"webhook nhận {server.RequestHandlerClass.counter['requests']} request, "
+          f"{server.RequestHandlerClass.counter['throttled']} lần trả 429")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Dispatcher gửi cảnh báo Zalo/Telegram có giới hạn tốc độ")
+    parser.add_argument("--stub", action="store_true", help="Chạy webhook giả (Ctrl+C để dừng)")
+    parser.add_argument("--port", type=int, default=8765, help="Cổng webhook giả")
+    parser.add_argument("--benchmark", type=int, metavar="N", help="Đo thông lượng với N bản tin")
+    parser.add_argument("--groups", type=int, default=4, help="Số nhóm nhận khi benchmark")
+    parser.add_argument("--latency", type=float, default=0.05, help="Độ trễ giả lập của webhook (giây)")
+    parser.add_argument("--fail-rate", type=float, default=0.0, help="Tỷ lệ webhook giả trả 429")
+    parser.add_argument("--workers", type=int, default=ALERT_MAX_WORKERS, help="Số luồng gửi")
+    args = parser.parse_args()
+
+    if args.stub:
+        server = start_stub_server(args.port, args.latency, args.fail_rate)
+        print(f"🧪 Webhook giả đang chạy tại http://127.0.0.1:{server.server_address[1]} (Ctrl+C để dừng)")
+        try:
+            while True:
+                time.sleep(3600)
+        except KeyboardInterrupt:
+            server.shutdown()
+    elif args.benchmark:
+        run_benchmark(args.benchmark, args.groups, args.latency, args.fail_rate, args.workers)
+    else:
+        parser.print_help()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,356 @@
+#!/usr/bin/env python3
+"""
+Lưu trạng thái "đã gửi" của các cảnh báo Zalo/Telegram trong SQLite.
+
+Thay cho các file log xlsx trong log_message/ (đọc lại toàn bộ mỗi lần chạy, lọc
+theo từng phiếu rồi ghi đè cả file):
+- alert_state: 1 dòng / (alert_type, alert_key), khóa chính nên kiểm tra throttle O(1)
+- alert_log: lịch sử gửi, chỉ append; xóa bản ghi cũ theo số ngày lưu giữ
+- Lần đầu mở store sẽ tự chuyển dữ liệu từ các file log xlsx cũ (mỗi file 1 lần)
+
+Cách dùng:
+    python alert_store.py --stats
+    python alert_store.py --prune 90
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import sqlite3
+import threading
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from config import ALERT_LOG_DIR, ALERT_LOG_RETENTION_DAYS, ALERT_STATE_DB
+
+
+# Loại cảnh báo (alert_type) dùng trong send_zalo_via_n8n_webhook
+HONG_LAI_TRONG_THANG = "hong_lai_trong_thang"
+PHIEU_QUA_GIO = "phieu_qua_gio"
+PHIEU_OB_KHL = "phieu_ob_khl"
+PHIEU_HLL_7_NGAY = "phieu_hll_7_ngay"
+PHIEU_SAP_QUA_GIO = "phieu_sap_qua_gio"
+
+TIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS alert_state (
+    alert_type TEXT NOT NULL,
+    alert_key TEXT NOT NULL,
+    send_count INTEGER NOT NULL DEFAULT 0,
+    first_sent TEXT NOT NULL,
+    last_sent TEXT NOT NULL,
+    last_status TEXT NOT NULL,
+    PRIMARY KEY (alert_type, alert_key)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS alert_log (
+    id INTEGER PRIMARY KEY,
+    alert_type TEXT NOT NULL,
+    alert_key TEXT NOT NULL,
+    sent_at TEXT NOT NULL,
+    status TEXT NOT NULL,
+    details TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_alert_log_sent_at ON alert_log (sent_at);
+CREATE INDEX IF NOT EXISTS idx_alert_state_last_sent ON alert_state (last_sent);
+
+CREATE TABLE IF NOT EXISTS migrated_files (
+    file_name TEXT PRIMARY KEY,
+    rows INTEGER NOT NULL,
+    migrated_at TEXT NOT NULL
+);
+"""
+
+
+@dataclass
+class AlertState:
+    send_count: int
+    first_sent: datetime
+    last_sent: datetime
+    last_status: str
+
+
+def _format_time(value: datetime) -> str:
+    return value.strftime(TIME_FORMAT)
+
+
+def _parse_time(value: str) -> datetime:
+    return datetime.strptime(value, TIME_FORMAT)
+
+
+def _key(*parts) -> str:
+    """Ghép các phần của khóa cảnh báo (vd: ID báo hỏng + mã TB) thành 1 chuỗi"""
+    return "|".join(str(part) for part in parts)
+
+
+class AlertStore:
+    """
+    Trạng thái gửi cảnh báo theo (alert_type, alert_key).
+
+    Mỗi lần record() là 1 transaction nhỏ (WAL), nên dừng giữa chừng vẫn giữ được
+    các bản tin đã gửi; dùng được từ nhiều thread (mỗi thread 1 connection).
+    """
+
+    def __init__(self, db_path: str = ALERT_STATE_DB, migrate_from: Optional[str] = ALERT_LOG_DIR):
+        self.db_path = db_path
+        self._local = threading.local()
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._connection() as conn:
+            conn.executescript(_SCHEMA)
+        if migrate_from:
+            self.migrate_xlsx_logs(migrate_from)
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def close(self) -> None:
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+    # ------------------------------------------------------------------
+    # Đọc trạng thái
+    # ------------------------------------------------------------------
+    def get(self, alert_type: str, alert_key: str) -> Optional[AlertState]:
+        row = self._connection().execute(
+            "SELECT send_count, first_sent, last_sent, last_status FROM alert_state "
+            "WHERE alert_type = ? AND alert_key = ?",
+            (alert_type, alert_key),
+        ).fetchone()
+        if row is None:
+            return None
+        return AlertState(row[0], _parse_time(row[1]), _parse_time(row[2]), row[3])
+
+    def was_sent(self, alert_type: str, alert_key: str) -> bool:
+        return self.get(alert_type, alert_key) is not None
+
+    def sent_within(self, alert_type: str, alert_key: str, interval: timedelta,
+                    now: Optional[datetime] = None) -> Tuple[bool, Optional[AlertState]]:
+        """(True nếu lần gửi cuối cách now < interval, trạng thái hiện tại)"""
+        state = self.get(alert_type, alert_key)
+        if state is None:
+            return False, None
+        now = now or datetime.now()
+        return now - state.last_sent < interval, state
+
+    def sent_keys(self, alert_type: str) -> Set[str]:
+        """Tập alert_key đã gửi của 1 loại cảnh báo (lọc nhanh cả bảng phiếu bằng isin)"""
+        rows = self._connection().execute(
+            "SELECT alert_key FROM alert_state WHERE alert_type = ?", (alert_type,)
+        )
+        return {row[0] for row in rows}
+
+    # ------------------------------------------------------------------
+    # Ghi trạng thái
+    # ------------------------------------------------------------------
+    def record(self, alert_type: str, alert_key: str, status: str = "SENT",
+               sent_at: Optional[datetime] = None, details: Optional[Dict] = None,
+               send_count: Optional[int] = None) -> int:
+        """
+        Ghi 1 lần gửi: append vào alert_log và cập nhật alert_state.
+
+        send_count=None thì tăng số lần gửi thêm 1. Trả về số lần gửi sau khi ghi.
+        """
+        sent_at_text = _format_time(sent_at or datetime.now())
+        details_text = json.dumps(details, ensure_ascii=False, default=str) if details else None
+        conn = self._connection()
+        with conn:
+            conn.execute(
+                "INSERT INTO alert_log (alert_type, alert_key, sent_at, status, details) VALUES (?, ?, ?, ?, ?)",
+                (alert_type, alert_key, sent_at_text, status, details_text),
+            )
+            conn.execute(
+                """
+                INSERT INTO alert_state (alert_type, alert_key, send_count, first_sent, last_sent, last_status)
+                VALUES (?, ?, COALESCE(?, 1), ?, ?, ?)
+                ON CONFLICT (alert_type, alert_key) DO UPDATE SET
+                    send_count = COALESCE(?, alert_state.send_count + 1),
+                    last_sent = MAX(alert_state.last_sent, excluded.last_sent),
+                    last_status = excluded.last_status
+                """,
+                (alert_type, alert_key, send_count, sent_at_text, sent_at_text, status, send_count),
+            )
+            row = conn.execute(
+                "SELECT send_count FROM alert_state WHERE alert_type = ? AND alert_key = ?",
+                (alert_type, alert_key),
+            ).fetchone()
+        return row[0]
+
+    def prune(self, retention_days: int = ALERT_LOG_RETENTION_DAYS) -> Tuple[int, int]:
+        """Xóa lịch sử và trạng thái cũ hơn retention_days ngày. Trả về (số log, số trạng thái) đã xóa"""
+        cutoff = _format_time(datetime.now() - timedelta(days=retention_days))
+        conn = self._connection()
+        with conn:
+            logs = conn.execute("DELETE FROM alert_log WHERE sent_at < ?", (cutoff,)).rowcount
+            states = conn.execute("DELETE FROM alert_state WHERE last_sent < ?", (cutoff,)).rowcount
+        return logs, states
+
+    def stats(self) -> List[Tuple[str, int, int]]:
+        """[(alert_type, số khóa, số bản ghi lịch sử)]"""
+        rows = self._connection().execute(
+            """
+            SELECT s.alert_type, s.keys, COALESCE(l.logs, 0)
+            FROM (SELECT alert_type, COUNT(*) AS keys FROM alert_state GROUP BY alert_type) s
+            LEFT JOIN (SELECT alert_type, COUNT(*) AS logs FROM alert_log GROUP BY alert_type) l
+                ON l.alert_type = s.alert_type
+            ORDER BY s.alert_type
+            """
+        )
+        return [tuple(row) for row in rows]
+
+    # ------------------------------------------------------------------
+    # Chuyển dữ liệu từ log xlsx cũ
+    # ------------------------------------------------------------------
+    def migrate_xlsx_logs(self, log_dir: str = ALERT_LOG_DIR) -> int:
+        """Nạp các file log xlsx cũ trong log_dir (mỗi file chỉ 1 lần). Trả về số bản ghi đã nạp"""
+        conn = self._connection()
+        done = {row[0] for row in conn.execute("SELECT file_name FROM migrated_files")}
+        pending = [
+            (file_name, converter)
+            for file_name, (alert_type, converter) in LEGACY_XLSX_LOGS.items()
+            if file_name not in done and os.path.exists(os.path.join(log_dir, file_name))
+        ]
+        if not pending:
+            return 0
+
+        import pandas as pd
+
+        total = 0
+        for file_name, converter in pending:
+            alert_type = LEGACY_XLSX_LOGS[file_name][0]
+            path = os.path.join(log_dir, file_name)
+            try:
+                records = list(converter(pd.read_excel(path)))
+            except Exception as e:
+                print(f"  ⚠️ Không chuyển được log {path}: {e}")
+                continue
+            records.sort(key=lambda record: record[1])
+            with conn:
+                for alert_key, sent_at, status, send_count in records:
+                    self._record_in_tx(conn, alert_type, alert_key, status, sent_at, send_count)
+                conn.execute(
+                    "INSERT INTO migrated_files (file_name, rows, migrated_at) VALUES (?, ?, ?)",
+                    (file_name, len(records), _format_time(datetime.now())),
+                )
+            total += len(records)
+            print(f"  📦 Đã chuyển {len(records)} bản ghi từ {path} vào {self.db_path}")
+        return total
+
+    def _record_in_tx(self, conn, alert_type, alert_key, status, sent_at, send_count):
+        sent_at_text = _format_time(sent_at)
+        conn.execute(
+            "INSERT INTO alert_log (alert_type, alert_key, sent_at, status) VALUES (?, ?, ?, ?)",
+            (alert_type, alert_key, sent_at_text, status),
+        )
+        conn.execute(
+            """
+            INSERT INTO alert_state (alert_type, alert_key, send_count, first_sent, last_sent, last_status)
+            VALUES (?, ?, COALESCE(?, 1), ?, ?, ?)
+            ON CONFLICT (alert_type, alert_key) DO UPDATE SET
+                send_count = MAX(alert_state.send_count, COALESCE(?, alert_state.send_count + 1)),
+                last_sent = MAX(alert_state.last_sent, excluded.last_sent),
+                last_status = excluded.last_status
+            """,
+            (alert_type, alert_key, send_count, sent_at_text, sent_at_text, status, send_count),
+        )
+
+
+# ----------------------------------------------------------------------
+# Đọc các file log xlsx cũ -> (alert_key, sent_at, status, send_count)
+# ----------------------------------------------------------------------
+LegacyRecord = Tuple[str, datetime, str, Optional[int]]
+
+
+def _legacy_rows(df, time_column: str) -> Iterator[Tuple[dict, datetime]]:
+    import pandas as pd
+
+    times = pd.to_datetime(df[time_column], errors="coerce")
+    for row, sent_at in zip(df.to_dict("records"), times):
+        if pd.isna(sent_at):
+            continue
+        yield row, sent_at.to_pydatetime().replace(microsecond=0)
+
+
+def _count(value) -> Optional[int]:
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _convert_hong_lai(df) -> Iterable[LegacyRecord]:
+    for row, sent_at in _legacy_rows(df, "Thời gian gửi"):
+        yield _key(row["ID báo hỏng"], row["Mã thuê bao"]), sent_at, "SENT", _count(row.get("Số lần gửi"))
+
+
+def _convert_qua_gio(df) -> Iterable[LegacyRecord]:
+    for row, sent_at in _legacy_rows(df, "Thời gian gửi"):
+        yield _key(row["Địa bàn"], row["Mã thuê bao"]), sent_at, "SENT", _count(row.get("Số lần gửi"))
+
+
+def _convert_sent_once(df) -> Iterable[LegacyRecord]:
+    # Log OB KHL / HLL 7 ngày: mọi bản ghi (kể cả thất bại) đều được coi là đã gửi
+    for row, sent_at in _legacy_rows(df, "Thời gian gửi"):
+        yield str(row["baohong_id"]), sent_at, str(row.get("Trạng thái", "")), None
+
+
+def _convert_sap_qua_gio(df) -> Iterable[LegacyRecord]:
+    for row, sent_at in _legacy_rows(df, "last_sent_time"):
+        if str(row.get("status", "")).upper() == "SENT":
+            yield str(row["ma_tb"]), sent_at, "SENT", None
+
+
+LEGACY_XLSX_LOGS: Dict[str, Tuple[str, Callable]] = {
+    "hong_lai_trong_thang_log.xlsx": (HONG_LAI_TRONG_THANG, _convert_hong_lai),
+    "phieu_qua_gio_log.xlsx": (PHIEU_QUA_GIO, _convert_qua_gio),
+    "ob_khl_sent.xlsx": (PHIEU_OB_KHL, _convert_sent_once),
+    "hll_7_ngay_sent.xlsx": (PHIEU_HLL_7_NGAY, _convert_sent_once),
+    "phieu_sap_qua_gio_sent.xlsx": (PHIEU_SAP_QUA_GIO, _convert_sap_qua_gio),
+}
+
+
+_default_store: Optional[AlertStore] = None
+_default_lock = threading.Lock()
+
+
+def get_alert_store() -> AlertStore:
+    """Store dùng chung trong process (mở + chuyển log cũ ở lần gọi đầu)"""
+    global _default_store
+    with _default_lock:
+        if _default_store is None:
+            _default_store = AlertStore()
+        return _default_store
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Quản lý trạng thái gửi cảnh báo Zalo/Telegram (SQLite)")
+    parser.add_argument("--db", default=ALERT_STATE_DB, help="Đường dẫn file SQLite")
+    parser.add_argument("--log-dir", default=ALERT_LOG_DIR, help="Thư mục log xlsx cũ cần chuyển")
+    parser.add_argument("--prune", type=int, metavar="DAYS", help="Xóa lịch sử cũ hơn DAYS ngày")
+    parser.add_argument("--stats", action="store_true", help="Thống kê số bản ghi theo loại cảnh báo")
+    args = parser.parse_args()
+
+    store = AlertStore(args.db, migrate_from=args.log_dir)
+    if args.prune is not None:
+        logs, states = store.prune(args.prune)
+        print(f"🧹 Đã xóa {logs} bản ghi lịch sử, {states} trạng thái cũ hơn {args.prune} ngày")
+    if args.stats or args.prune is None:
+        for alert_type, keys, logs in store.stats():
+            print(f"  {alert_type}: {keys} phiếu, {logs} lần gửi")
+
+
+if __name__ == "__main__":
+    main()
@@ -69,6 +69,24 @@ SEND_START_MINUTE = int(os.getenv('SEND_START_MINUTE', '30'))
 SEND_END_HOUR = int(os.getenv('SEND_END_HOUR', '21'))
 SEND_END_MINUTE = int(os.getenv('SEND_END_MINUTE', '0'))
 
+# ================================
+# ALERT DISPATCH (rate limit / retry)
+# ================================
+ALERT_MAX_WORKERS = int(os.getenv('ALERT_MAX_WORKERS', '8'))
+ZALO_RATE_PER_SEC = float(os.getenv('ZALO_RATE_PER_SEC', '3'))
+ZALO_THREAD_RATE_PER_SEC = float(os.getenv('ZALO_THREAD_RATE_PER_SEC', '1'))
+TELEGRAM_RATE_PER_SEC = float(os.getenv('TELEGRAM_RATE_PER_SEC', '25'))
+TELEGRAM_CHAT_RATE_PER_SEC = float(os.getenv('TELEGRAM_CHAT_RATE_PER_SEC', '1'))
+ALERT_SEND_TIMEOUT = float(os.getenv('ALERT_SEND_TIMEOUT', '10'))
+ALERT_MAX_RETRIES = int(os.getenv('ALERT_MAX_RETRIES', '3'))
+ALERT_RETRY_BACKOFF = float(os.getenv('ALERT_RETRY_BACKOFF', '1'))
+
+# ================================
+# ALERT DAEMON (watch mode)
+# ================================
+ALERT_WATCH_INTERVAL = float(os.getenv('ALERT_WATCH_INTERVAL', '15'))
+ALERT_FULL_SCAN_MINUTES = float(os.getenv('ALERT_FULL_SCAN_MINUTES', '30'))
+
 # ================================
 # FILE PATHS
 # ================================
@@ -76,6 +94,9 @@ WARNING_DB = os.getenv('WARNING_DB', 'warning_tracking.db')
 EXCEL_FILE_BRCD = os.getenv('EXCEL_FILE_BRCD', 'chiaTheoDoi/chiTietBrcd5Doi.xlsx')
 LOG_FILE_WARNING = os.getenv('LOG_FILE_WARNING', 'warning_sender.log')
 LOG_FILE_TELEGRAM = os.getenv('LOG_FILE_TELEGRAM', 'telegram_sender.log')
+ALERT_LOG_DIR = os.getenv('ALERT_LOG_DIR', 'log_message')
+ALERT_STATE_DB = os.getenv('ALERT_STATE_DB', os.path.join(ALERT_LOG_DIR, 'alert_state.db'))
+ALERT_LOG_RETENTION_DAYS = int(os.getenv('ALERT_LOG_RETENTION_DAYS', '90'))
 
 # ================================
 # FOLDER PATHS
@@ -2,7 +2,6 @@ import pandas as pd
 import time
 import os
 from datetime import datetime, timedelta
-import requests
 import zipfile
 import cloudinary
 import cloudinary.uploader
@@ -16,7 +15,6 @@ from config import (
     SEND_START_MINUTE,
     SEND_END_HOUR,
     SEND_END_MINUTE,
-    WEBHOOK_TEXT_URL,
     LOCATION_THREAD_MAPPING,
     LOCATION_CHAT_MAPPING
 )
@@ -24,6 +22,22 @@ from config import (
 # Import team_config for dynamic team mappings
 from team_config import get_active_teams
 
+# Trạng thái đã gửi / throttle của các cảnh báo (SQLite thay cho log xlsx)
+from alert_store import (
+    get_alert_store,
+    HONG_LAI_TRONG_THANG,
+    PHIEU_QUA_GIO,
+    PHIEU_OB_KHL,
+    PHIEU_HLL_7_NGAY,
+    PHIEU_SAP_QUA_GIO,
+)
+
+# Gửi bản tin song song giữa các nhóm, có giới hạn tốc độ + thử lại (thay cho time.sleep)
+from alert_dispatcher import get_dispatcher
+
+# Workbook nguồn được parse 1 lần / lần thay đổi, dùng chung cho mọi luật cảnh báo
+from ticket_model import read_sheet
+
 # Load environment variables
 from dotenv import load_dotenv
 load_dotenv()
@@ -174,14 +188,15 @@ def send_image_to_zalo(receiver='xuanthinh'):
     return total_sent, total_failed
 
 
-def send_warning_phieu_ton_brcd():
+def send_warning_phieu_ton_brcd(changed_only: bool = False):
     """
     Gửi cảnh báo phiếu tồn BRCD sắp quá giờ tới 4 nhóm Zalo + Telegram.
     Đọc từ file chiTietBrcd5Doi.xlsx, từ 4 sheet: thachthat, hoalac, hatmon, odien
     Gửi cảnh báo cho các phiếu sắp quá giờ (0 < giờ còn lại thực < 1.5).
+
+    changed_only=True: chỉ xét các phiếu mới/thay đổi kể từ lần load trước (chế độ daemon).
     """
     file_path = os.path.join('chiaTheoDoi', 'chiTietBrcd5Doi.xlsx')
-    webhook_url = WEBHOOK_TEXT_URL
 
     # Import Telegram config
     try:
@@ -218,13 +233,17 @@ def send_warning_phieu_ton_brcd():
         total_sent_telegram = 0
         total_failed_telegram = 0
 
+        # Bản tin được đưa vào hàng đợi gửi chung, chờ kết quả sau khi đọc hết các sheet
+        dispatcher = get_dispatcher()
+        pending = []
+
         # Đọc từng sheet
         for sheet_name, thread_id in sheet_to_thread_id.items():
             try:
                 print(f"\n📋 Đang xử lý sheet: {sheet_name}")
 
                 # Đọc sheet
-                df = pd.read_excel(file_path, sheet_name=sheet_name)
+                df = read_sheet(file_path, sheet_name, changed_only=changed_only)
 
                 if df.empty:
                     print(f"  ℹ️ Sheet {sheet_name} không có dữ liệu")
@@ -295,73 +314,17 @@ def send_warning_phieu_ton_brcd():
 
                     messages_to_send.append(message)
 
-                # Gửi từng bản tin
-                print(f"  📤 Đang gửi {len(messages_to_send)} bản tin cho sheet {sheet_name}...")
-
-                sent_count_zalo = 0
-                failed_count_zalo = 0
-                sent_count_telegram = 0
-                failed_count_telegram = 0
+                # Đưa bản tin vào hàng đợi gửi
+                print(f"  📤 Đưa {len(messages_to_send)} bản tin của sheet {sheet_name} vào hàng đợi gửi...")
 
                 # Lấy Telegram chat ID cho sheet này
                 telegram_chat_id = sheet_to_telegram_chat_id.get(sheet_name)
 
-                for i, message in enumerate(messages_to_send, 1):
-                    # Gửi Zalo
-                    try:
-                        # Chuẩn bị dữ liệu để gửi qua webhook
-                        data = {
-                            'threadID': thread_id,
-                            'message': message
-                        }
-
-                        # Gửi request
-                        response = requests.get(webhook_url, json=data, timeout=10)
-
-                        if response.status_code == 200:
-                            sent_count_zalo += 1
-                            print(f"    ✅ Zalo [{i}/{len(messages_to_send)}] Gửi thành công")
-                        else:
-                            failed_count_zalo += 1
-                            print(f"    ❌ Zalo [{i}/{len(messages_to_send)}] Gửi thất bại. Status: {response.status_code}")
-
-                    except Exception as e:
-                        failed_count_zalo += 1
-                        print(f"    ❌ Zalo [{i}/{len(messages_to_send)}] Lỗi khi gửi: {e}")
-
-                    # Gửi Telegram
-                    if telegram_chat_id and TELEGRAM_TOKEN:
-                        try:
-                            import requests as telegram_requests
-                            url = f"https://api.telegram.org/bot{TELEGRAM_TOKEN}/sendMessage"
-                            data = {
-                                "chat_id": telegram_chat_id,
-                                "text": message,
-                                "parse_mode": "HTML"
-                            }
-                            response = telegram_requests.post(url, data=data, timeout=10)
-
-                            if response.status_code == 200:
-                                sent_count_telegram += 1
-                                print(f"    ✅ Telegram [{i}/{len(messages_to_send)}] Gửi thành công")
-                            else:
-                                failed_count_telegram += 1
-                                print(f"    ❌ Telegram [{i}/{len(messages_to_send)}] Gửi thất bại. Status: {response.status_code}")
-
-                        except Exception as e:
-                            failed_count_telegram += 1
-                            print(f"    ❌ Telegram [{i}/{len(messages_to_send)}] Lỗi khi gửi: {e}")
-
-                    # Tạm dừng 1 giây để tránh spam
-                    if i < len(messages_to_send):
-                        time.sleep(1)
-
-                total_sent_zalo += sent_count_zalo
-                total_failed_zalo += failed_count_zalo
-                total_sent_telegram += sent_count_telegram
-                total_failed_telegram += failed_count_telegram
-
-                print(f"  📊 Sheet {sheet_name}: Zalo ✅ {sent_count_zalo} | ❌ {failed_count_zalo} | Telegram ✅ {sent_count_telegram} | ❌ {failed_count_telegram}")
+                deliveries = [
+                    dispatcher.send_alert(thread_id, message, telegram_chat_id, TELEGRAM_TOKEN)
+                    for message in messages_to_send
+                ]
+                pending.append((sheet_name, deliveries))
 
             except ValueError as e:
                 if "Worksheet named" in str(e):
@@ -373,6 +336,40 @@ def send_warning_phieu_ton_brcd():
                 print(f"  ❌ Lỗi khi xử lý sheet {sheet_name}: {e}")
                 continue
 
+        # Chờ kết quả gửi của từng sheet
+        for sheet_name, deliveries in pending:
+            print(f"\n📨 Kết quả gửi sheet {sheet_name}:")
+
+            sent_count_zalo = 0
+            failed_count_zalo = 0
+            sent_count_telegram = 0
+            failed_count_telegram = 0
+
+            for i, delivery in enumerate(deliveries, 1):
+                zalo_result = delivery.zalo_result()
+                if zalo_result.ok:
+                    sent_count_zalo += 1
+                    print(f"    ✅ Zalo [{i}/{len(deliveries)}] Gửi thành công")
+                else:
+                    failed_count_zalo += 1
+                    print(f"    ❌ Zalo [{i}/{len(deliveries)}] Gửi thất bại. {zalo_result.describe()}")
+
+                telegram_result = delivery.telegram_result()
+                if telegram_result is not None:
+                    if telegram_result.ok:
+                        sent_count_telegram += 1
+                        print(f"    ✅ Telegram [{i}/{len(deliveries)}] Gửi thành công")
+                    else:
+                        failed_count_telegram += 1
+                        print(f"    ❌ Telegram [{i}/{len(deliveries)}] Gửi thất bại. {telegram_result.describe()}")
+
+            total_sent_zalo += sent_count_zalo
+            total_failed_zalo += failed_count_zalo
+            total_sent_telegram += sent_count_telegram
+            total_failed_telegram += failed_count_telegram
+
+            print(f"  📊 Sheet {sheet_name}: Zalo ✅ {sent_count_zalo} | ❌ {failed_count_zalo} | Telegram ✅ {sent_count_telegram} | ❌ {failed_count_telegram}")
+
         # Tổng kết
         print("\n" + "=" * 60)
         print("📋 TỔNG KẾT:")
@@ -395,7 +392,7 @@ def send_warning_phieu_ton_brcd():
         return False
 
 
-def send_warning_hong_lai_trong_thang():
+def send_warning_hong_lai_trong_thang(changed_only: bool = False):
     """
     Gửi cảnh báo phiếu Hỏng lại trong tháng tới 3 nhóm Zalo và Telegram.
     Đọc từ file bc_BRCD.xlsx, sheet chi_tiet_ton_brcd.
@@ -403,6 +400,8 @@ def send_warning_hong_lai_trong_thang():
     Có cơ chế log để tránh gửi trùng lặp trong vòng 4 tiếng.
 
     Chỉ gửi trong khung giờ 06:30 - 21:00
+
+    changed_only=True: chỉ xét các phiếu mới/thay đổi kể từ lần load trước (chế độ daemon).
     """
     print("\n" + "=" * 70)
     print("🔔 KIỂM TRA GỬI CẢNH BÁO HỎNG LẠI TRONG THÁNG")
@@ -423,7 +422,6 @@ def send_warning_hong_lai_trong_thang():
             ID_CHAT_SONTAY, ID_CHAT_SUOIHAI, ID_CHAT_QUANGOAI,
             TELEGRAM_TOKEN, send_message as send_telegram_message
         )
-        import requests as telegram_requests
     except ImportError:
         print("⚠️ Không thể import module send_tele. Chỉ gửi Zalo.")
         ID_CHAT_SONTAY = None
@@ -432,15 +430,12 @@ def send_warning_hong_lai_trong_thang():
         TELEGRAM_TOKEN = None
 
     file_path = os.path.join('downloads', 'kq_dhsc', 'bc_BRCD.xlsx')
-    webhook_url_zalo = WEBHOOK_TEXT_URL
 
-    # Cấu hình log
-    log_dir = "log_message"
-    os.makedirs(log_dir, exist_ok=True)
-    log_file = os.path.join(log_dir, "hong_lai_trong_thang_log.xlsx")
+    # Trạng thái đã gửi (SQLite)
+    store = get_alert_store()
 
     # Thời gian chờ giữa các lần gửi (4 tiếng = 240 phút)
-    TIME_THRESHOLD = pd.Timedelta(hours=4)
+    TIME_THRESHOLD = timedelta(hours=4)
 
     # Mapping DOI_VT sang thread_id Zalo và Telegram chat_id
     # Dựa vào sheet_to_thread_id trong send_warning_phieu_ton_brcd
@@ -471,7 +466,7 @@ def send_warning_hong_lai_trong_thang():
             return False
 
         # Đọc sheet chi_tiet_ton_brcd
-        df = pd.read_excel(file_path, sheet_name='chi_tiet_ton_brcd')
+        df = read_sheet(file_path, 'chi_tiet_ton_brcd', changed_only=changed_only)
 
         if df.empty:
             print(f"  ℹ️ Sheet chi_tiet_ton_brcd không có dữ liệu")
@@ -503,26 +498,18 @@ def send_warning_hong_lai_trong_thang():
 
         print(f"  🔍 Tìm thấy {len(df_filtered)} phiếu hỏng lại trong tháng")
 
-        # Load existing log
-        existing_log = pd.DataFrame()
-        if os.path.exists(log_file):
-            try:
-                existing_log = pd.read_excel(log_file)
-                existing_log['Thời gian gửi'] = pd.to_datetime(existing_log['Thời gian gửi'], errors='coerce')
-                print(f"  📂 Đã load log từ file: {len(existing_log)} bản ghi")
-            except Exception as e:
-                print(f"  ⚠️ Lỗi khi đọc log file: {e}")
-                existing_log = pd.DataFrame()
-
         # Tổng số bản tin đã gửi
         total_sent_zalo = 0
         total_failed_zalo = 0
         total_sent_telegram = 0
         total_failed_telegram = 0
         total_skipped = 0
+        total_logged = 0
 
-        # Danh sách log mới
-        log_data = []
+        # Bản tin được đưa vào hàng đợi gửi chung (các nhóm gửi song song), chờ kết quả ở cuối
+        dispatcher = get_dispatcher()
+        pending = []
+        queued_keys = set()
 
         # Nhóm theo DOI_VT để gửi từng nhóm
         grouped = df_filtered.groupby('DOI_VT')
@@ -544,11 +531,8 @@ def send_warning_hong_lai_trong_thang():
                 print(f"  📤 Thread ID (Zalo): {thread_id}")
                 print(f"  📤 Chat ID (Telegram): {telegram_chat_id}")
 
-                # Gửi từng phiếu
-                sent_zalo = 0
-                failed_zalo = 0
-                sent_telegram = 0
-                failed_telegram = 0
+                # Đưa từng phiếu vào hàng đợi gửi
+                deliveries = []
                 skipped = 0
 
                 for idx, row in group.iterrows():
@@ -579,32 +563,22 @@ def send_warning_hong_lai_trong_thang():
                     if pd.isna(so_lan_khl):
                         so_lan_khl = 0
 
-                    # Kiểm tra log - đã gửi trong vòng 4 tiếng chưa?
-                    send_count = 0
-                    should_skip = False
-
-                    if not existing_log.empty:
-                        # Tìm các bản ghi matching trong log
-                        matching_records = existing_log[
-                            (existing_log['ID báo hỏng'] == str(id_bh)) &
-                            (existing_log['Mã thuê bao'] == str(ma_tb))
-                        ]
-
-                        if not matching_records.empty:
-                            # Lấy bản ghi gần nhất
-                            most_recent = matching_records['Thời gian gửi'].max()
-                            time_since_last = current_time - most_recent
-
-                            # Lấy số lần đã gửi
-                            send_count = matching_records['Số lần gửi'].max()
-
-                            # Kiểm tra nếu trong vòng 4 tiếng
-                            if time_since_last < TIME_THRESHOLD:
-                                should_skip = True
-                                skipped += 1
-                                total_skipped += 1
-                                print(f"    ⏭️ Bỏ qua {ma_tb} (đã gửi {send_count} lần, lần cuối: {most_recent.strftime('%Y-%m-%d %H:%M:%S')})")
-                                continue
+                    # Kiểm tra trạng thái - đã gửi trong vòng 4 tiếng chưa?
+                    alert_key = f"{id_bh}|{ma_tb}"
+                    recently_sent, state = store.sent_within(
+                        HONG_LAI_TRONG_THANG, alert_key, TIME_THRESHOLD, now=current_time
+                    )
+                    send_count = state.send_count if state else 0
+
+                    if recently_sent or alert_key in queued_keys:
+                        skipped += 1
+                        total_skipped += 1
+                        if recently_sent:
+                            print(f"    ⏭️ Bỏ qua {ma_tb} (đã gửi {send_count} lần, lần cuối: {state.last_sent.strftime('%Y-%m-%d %H:%M:%S')})")
+                        else:
+                            print(f"    ⏭️ Bỏ qua {ma_tb} (trùng phiếu trong lần chạy này)")
+                        continue
+                    queued_keys.add(alert_key)
 
                     # Tăng số lần gửi
                     send_count += 1
@@ -631,93 +605,68 @@ def send_warning_hong_lai_trong_thang():
                             f"  - Số lần Không hài lòng: {int(so_lan_khl)}"
                         )
 
-                    # Gửi Zalo
-                    zalo_success = False
-                    try:
-                        data = {
-                            'threadID': thread_id,
-                            'message': message
-                        }
-                        response = requests.get(webhook_url_zalo, json=data, timeout=10)
-
-                        if response.status_code == 200:
-                            sent_zalo += 1
-                            zalo_success = True
-                            print(f"    ✅ [Zalo] Gửi thành công: {ma_tb} (Lần {send_count})")
-                        else:
-                            failed_zalo += 1
-                            print(f"    ❌ [Zalo] Gửi thất bại: {ma_tb} (Status: {response.status_code})")
-
-                    except Exception as e:
-                        failed_zalo += 1
-                        print(f"    ❌ [Zalo] Lỗi khi gửi {ma_tb}: {e}")
-
-                    # Tạm dừng 0.5 giây giữa Zalo và Telegram
-                    time.sleep(0.5)
-
-                    # Gửi Telegram
-                    telegram_success = False
-                    if telegram_chat_id and TELEGRAM_TOKEN:
-                        try:
-                            url = f"https://api.telegram.org/bot{TELEGRAM_TOKEN}/sendMessage"
-                            data = {
-                                "chat_id": telegram_chat_id,
-                                "text": message,
-                                "parse_mode": "HTML"
-                            }
-                            response = telegram_requests.post(url, data=data, timeout=10)
-
-                            if response.status_code == 200:
-                                sent_telegram += 1
-                                telegram_success = True
-                                print(f"    ✅ [Telegram] Gửi thành công: {ma_tb} (Lần {send_count})")
-                            else:
-                                failed_telegram += 1
-                                print(f"    ❌ [Telegram] Gửi thất bại: {ma_tb} (Status: {response.status_code})")
-
-                        except Exception as e:
-                            failed_telegram += 1
-                            print(f"    ❌ [Telegram] Lỗi khi gửi {ma_tb}: {e}")
-
-                    # Ghi log nếu gửi thành công (ít nhất 1 nền tảng)
-                    if zalo_success or telegram_success:
-                        log_entry = {
-                            'Thời gian gửi': current_time,
-                            'ID báo hỏng': str(id_bh),
-                            'Mã thuê bao': str(ma_tb),
-                            'Tên thuê bao': str(ten_tb),
-                            'Địa bàn': str(doi_vt),
-                            'NVKT': str(nvkt),
-                            'Số lần gửi': send_count,
-                            'Trạng thái Zalo': 'Thành công' if zalo_success else 'Thất bại',
-                            'Trạng thái Telegram': 'Thành công' if telegram_success else 'Thất bại'
-                        }
-                        log_data.append(log_entry)
-
-                    # Tạm dừng 1 giây giữa các phiếu để tránh spam
-                    time.sleep(1)
-
-                total_sent_zalo += sent_zalo
-                total_failed_zalo += failed_zalo
-                total_sent_telegram += sent_telegram
-                total_failed_telegram += failed_telegram
+                    delivery = dispatcher.send_alert(thread_id, message, telegram_chat_id, TELEGRAM_TOKEN)
+                    deliveries.append((delivery, alert_key, ma_tb, send_count, ten_tb, nvkt))
 
-                print(f"  📊 {display_name}: Zalo ✅ {sent_zalo} | ❌ {failed_zalo} | Telegram ✅ {sent_telegram} | ❌ {failed_telegram} | ⏭️ Bỏ qua: {skipped}")
+                pending.append((doi_vt, display_name, skipped, deliveries))
 
             except Exception as e:
                 print(f"  ❌ Lỗi khi xử lý {doi_vt}: {e}")
                 continue
 
-        # Lưu log
-        if log_data:
-            log_df = pd.DataFrame(log_data)
-            if not existing_log.empty:
-                # Kết hợp log cũ và mới
-                log_df = pd.concat([existing_log, log_df], ignore_index=True)
+        # Chờ kết quả gửi của từng nhóm
+        for doi_vt, display_name, skipped, deliveries in pending:
+            print(f"\n📨 Kết quả gửi {doi_vt}:")
+
+            sent_zalo = 0
+            failed_zalo = 0
+            sent_telegram = 0
+            failed_telegram = 0
+
+            for delivery, alert_key, ma_tb, send_count, ten_tb, nvkt in deliveries:
+                zalo_result = delivery.zalo_result()
+                zalo_success = zalo_result.ok
+                if zalo_success:
+                    sent_zalo += 1
+                    print(f"    ✅ [Zalo] Gửi thành công: {ma_tb} (Lần {send_count})")
+                else:
+                    failed_zalo += 1
+                    print(f"    ❌ [Zalo] Gửi thất bại: {ma_tb} ({zalo_result.describe()})")
+
+                telegram_result = delivery.telegram_result()
+                telegram_success = telegram_result is not None and telegram_result.ok
+                if telegram_result is not None:
+                    if telegram_success:
+                        sent_telegram += 1
+                        print(f"    ✅ [Telegram] Gửi thành công: {ma_tb} (Lần {send_count})")
+                    else:
+                        failed_telegram += 1
+                        print(f"    ❌ [Telegram] Gửi thất bại: {ma_tb} ({telegram_result.describe()})")
+
+                # Ghi trạng thái nếu gửi thành công (ít nhất 1 nền tảng)
+                if zalo_success or telegram_success:
+                    store.record(
+                        HONG_LAI_TRONG_THANG, alert_key, status='SENT', sent_at=current_time,
+                        send_count=send_count,
+                        details={
+                            'ten_tb': str(ten_tb),
+                            'doi_vt': str(doi_vt),
+                            'nvkt': str(nvkt),
+                            'zalo': 'Thành công' if zalo_success else 'Thất bại',
+                            'telegram': 'Thành công' if telegram_success else 'Thất bại',
+                        },
+                    )
+                    total_logged += 1
+
+            total_sent_zalo += sent_zalo
+            total_failed_zalo += failed_zalo
+            total_sent_telegram += sent_telegram
+            total_failed_telegram += failed_telegram
 
-            # Lưu file
-            log_df.to_excel(log_file, index=False)
-            print(f"\n💾 Đã lưu log: {len(log_data)} bản ghi mới")
+            print(f"  📊 {display_name}: Zalo ✅ {sent_zalo} | ❌ {failed_zalo} | Telegram ✅ {sent_telegram} | ❌ {failed_telegram} | ⏭️ Bỏ qua: {skipped}")
+
+        if total_logged:
+            print(f"\n💾 Đã lưu trạng thái: {total_logged} bản ghi mới")
 
         # Tổng kết
         print("\n" + "=" * 60)
@@ -742,7 +691,7 @@ def send_warning_hong_lai_trong_thang():
         return False
 
 
-def send_warning_phieu_qua_gio():
+def send_warning_phieu_qua_gio(changed_only: bool = False):
     """
     Gửi cảnh báo phiếu quá giờ BRCD tới 3 nhóm Zalo.
     Đọc từ file chiTietBrcd5Doi.xlsx, từ 3 sheet: sontay, suoihai, quangoai
@@ -755,6 +704,8 @@ def send_warning_phieu_qua_gio():
     - Đếm số lần đã nhắc và hiển thị
 
     Chỉ gửi trong khung giờ 06:30 - 21:00
+
+    changed_only=True: chỉ xét các phiếu mới/thay đổi kể từ lần load trước (chế độ daemon).
     """
     print("\n" + "=" * 70)
     print("🔔 KIỂM TRA GỬI CẢNH BÁO PHIẾU QUÁ GIỜ")
@@ -770,15 +721,12 @@ def send_warning_phieu_qua_gio():
         return
 
     file_path = os.path.join('chiaTheoDoi', 'chiTietBrcd5Doi.xlsx')
-    webhook_url = WEBHOOK_TEXT_URL
 
-    # Cấu hình log
-    log_dir = "log_message"
-    os.makedirs(log_dir, exist_ok=True)
-    log_file = os.path.join(log_dir, "phieu_qua_gio_log.xlsx")
+    # Trạng thái đã gửi (SQLite)
+    store = get_alert_store()
 
     # Thời gian chờ giữa các lần gửi (6 tiếng = 360 phút)
-    TIME_THRESHOLD = pd.Timedelta(hours=6)
+    TIME_THRESHOLD = timedelta(hours=6)
 
     # Auto-generate mappings from team_config (BRCD - 4 teams)
     brcd_teams = get_active_teams('BRCD')
@@ -801,24 +749,16 @@ def send_warning_phieu_qua_gio():
             print(f"❌ Không tìm thấy file: {file_path}")
             return False
 
-        # Load existing log
-        existing_log = pd.DataFrame()
-        if os.path.exists(log_file):
-            try:
-                existing_log = pd.read_excel(log_file)
-                existing_log['Thời gian gửi'] = pd.to_datetime(existing_log['Thời gian gửi'], errors='coerce')
-                print(f"  📂 Đã load log từ file: {len(existing_log)} bản ghi")
-            except Exception as e:
-                print(f"  ⚠️ Lỗi khi đọc log file: {e}")
-                existing_log = pd.DataFrame()
-
         # Tổng số bản tin đã gửi
         total_sent = 0
         total_failed = 0
         total_skipped = 0
+        total_logged = 0
 
-        # Danh sách log mới
-        log_data = []
+        # Bản tin được đưa vào hàng đợi gửi chung (các nhóm gửi song song), chờ kết quả ở cuối
+        dispatcher = get_dispatcher()
+        pending = []
+        queued_keys = set()
 
         # Đọc từng sheet
         for sheet_name, thread_id in sheet_to_thread_id.items():
@@ -827,7 +767,7 @@ def send_warning_phieu_qua_gio():
                 display_name = sheet_to_display_name[sheet_name]
 
                 # Đọc sheet
-                df = pd.read_excel(file_path, sheet_name=sheet_name)
+                df = read_sheet(file_path, sheet_name, changed_only=changed_only)
 
                 if df.empty:
                     print(f"  ℹ️ Sheet {sheet_name} không có dữ liệu")
@@ -865,11 +805,10 @@ def send_warning_phieu_qua_gio():
                 else:
                     df_filtered['ngay_bh_formatted'] = 'N/A'
 
-                sent_count = 0
-                failed_count = 0
+                deliveries = []
                 skipped = 0
 
-                # Gửi từng phiếu
+                # Đưa từng phiếu vào hàng đợi gửi
                 for idx, row in df_filtered.iterrows():
                     # Lấy thông tin từ row
                     ma_tb = row.get('ma_tb', 'N/A')
@@ -898,32 +837,22 @@ def send_warning_phieu_qua_gio():
                     # Làm tròn số ngày tồn
                     so_ngay_ton_rounded = int(round(so_ngay_ton))
 
-                    # Kiểm tra log - đã gửi trong vòng 6 tiếng chưa?
-                    send_count = 0
-                    should_skip = False
-
-                    if not existing_log.empty:
-                        # Tìm các bản ghi matching trong log
-                        matching_records = existing_log[
-                            (existing_log['Mã thuê bao'] == str(ma_tb)) &
-                            (existing_log['Địa bàn'] == sheet_name)
-                        ]
-
-                        if not matching_records.empty:
-                            # Lấy bản ghi gần nhất
-                            most_recent = matching_records['Thời gian gửi'].max()
-                            time_since_last = current_time - most_recent
-
-                            # Lấy số lần đã gửi
-                            send_count = matching_records['Số lần gửi'].max()
-
-                            # Kiểm tra nếu trong vòng 6 tiếng
-                            if time_since_last < TIME_THRESHOLD:
-                                should_skip = True
-                                skipped += 1
-                                total_skipped += 1
-                                print(f"    ⏭️ Bỏ qua {ma_tb} (đã gửi {send_count} lần, lần cuối: {most_recent.strftime('%Y-%m-%d %H:%M:%S')})")
-                                continue
+                    # Kiểm tra trạng thái - đã gửi trong vòng 6 tiếng chưa?
+                    alert_key = f"{sheet_name}|{ma_tb}"
+                    recently_sent, state = store.sent_within(
+                        PHIEU_QUA_GIO, alert_key, TIME_THRESHOLD, now=current_time
+                    )
+                    send_count = state.send_count if state else 0
+
+                    if recently_sent or alert_key in queued_keys:
+                        skipped += 1
+                        total_skipped += 1
+                        if recently_sent:
+                            print(f"    ⏭️ Bỏ qua {ma_tb} (đã gửi {send_count} lần, lần cuối: {state.last_sent.strftime('%Y-%m-%d %H:%M:%S')})")
+                        else:
+                            print(f"    ⏭️ Bỏ qua {ma_tb} (trùng phiếu trong lần chạy này)")
+                        continue
+                    queued_keys.add(alert_key)
 
                     # Tăng số lần gửi
                     send_count += 1
@@ -952,46 +881,10 @@ def send_warning_phieu_qua_gio():
                         )
 
                     # Gửi qua webhook
-                    success = False
-                    try:
-                        data = {
-                            'threadID': thread_id,
-                            'message': message
-                        }
-                        response = requests.get(webhook_url, json=data, timeout=10)
-
-                        if response.status_code == 200:
-                            sent_count += 1
-                            success = True
-                            print(f"    ✅ Gửi thành công: {ma_tb} (Lần {send_count})")
-                        else:
-                            failed_count += 1
-                            print(f"    ❌ Gửi thất bại: {ma_tb} (Status: {response.status_code})")
-
-                    except Exception as e:
-                        failed_count += 1
-                        print(f"    ❌ Lỗi khi gửi {ma_tb}: {e}")
-
-                    # Ghi log nếu gửi thành công
-                    if success:
-                        log_entry = {
-                            'Thời gian gửi': current_time,
-                            'Mã thuê bao': str(ma_tb),
-                            'Địa bàn': sheet_name,
-                            'NVKT': str(nvkt),
-                            'Số ngày tồn': so_ngay_ton_rounded,
-                            'Số lần gửi': send_count,
-                            'Trạng thái': 'Thành công'
-                        }
-                        log_data.append(log_entry)
-
-                    # Tạm dừng 1 giây giữa các phiếu để tránh spam
-                    time.sleep(1)
-
-                total_sent += sent_count
-                total_failed += failed_count
+                    future = dispatcher.zalo(thread_id, message)
+                    deliveries.append((future, alert_key, ma_tb, send_count, nvkt, so_ngay_ton_rounded))
 
-                print(f"  📊 {display_name}: ✅ {sent_count} thành công | ❌ {failed_count} thất bại | ⏭️ Bỏ qua: {skipped}")
+                pending.append((display_name, skipped, deliveries))
 
             except Exception as e:
                 print(f"  ❌ Lỗi khi xử lý sheet {sheet_name}: {e}")
@@ -999,16 +892,37 @@ def send_warning_phieu_qua_gio():
                 traceback.print_exc()
                 continue
 
-        # Lưu log
-        if log_data:
-            log_df = pd.DataFrame(log_data)
-            if not existing_log.empty:
-                # Kết hợp log cũ và mới
-                log_df = pd.concat([existing_log, log_df], ignore_index=True)
+        # Chờ kết quả gửi của từng nhóm
+        for display_name, skipped, deliveries in pending:
+            print(f"\n📨 Kết quả gửi {display_name}:")
 
-            # Lưu file
-            log_df.to_excel(log_file, index=False)
-            print(f"\n💾 Đã lưu log: {len(log_data)} bản ghi mới")
+            sent_count = 0
+            failed_count = 0
+
+            for future, alert_key, ma_tb, send_count, nvkt, so_ngay_ton_rounded in deliveries:
+                result = future.result()
+                if result.ok:
+                    sent_count += 1
+                    print(f"    ✅ Gửi thành công: {ma_tb} (Lần {send_count})")
+
+                    # Ghi trạng thái nếu gửi thành công
+                    store.record(
+                        PHIEU_QUA_GIO, alert_key, status='SENT', sent_at=current_time,
+                        send_count=send_count,
+                        details={'nvkt': str(nvkt), 'so_ngay_ton': so_ngay_ton_rounded},
+                    )
+                    total_logged += 1
+                else:
+                    failed_count += 1
+                    print(f"    ❌ Gửi thất bại: {ma_tb} ({result.describe()})")
+
+            total_sent += sent_count
+            total_failed += failed_count
+
+            print(f"  📊 {display_name}: ✅ {sent_count} thành công | ❌ {failed_count} thất bại | ⏭️ Bỏ qua: {skipped}")
+
+        if total_logged:
+            print(f"\n💾 Đã lưu trạng thái: {total_logged} bản ghi mới")
 
         # Tổng kết
         print("\n" + "=" * 60)
@@ -1031,7 +945,7 @@ def send_warning_phieu_qua_gio():
         return False
 
 
-def send_warning_khdn_uu_tien():
+def send_warning_khdn_uu_tien(changed_only: bool = False):
     """
     Gửi cảnh báo phiếu KHDN ưu tiên tới 3 nhóm Zalo và Telegram.
     Đọc từ file bc_BRCD.xlsx, sheet chi_tiet_ton_brcd.
@@ -1041,6 +955,8 @@ def send_warning_khdn_uu_tien():
     Chỉ gửi trong khung giờ 06:30 - 21:00
 
     Danh sách loại trừ: Các mã TB trong KHDN_EXCLUSION_LIST sẽ KHÔNG gửi cảnh báo
+
+    changed_only=True: chỉ xét các phiếu mới/thay đổi kể từ lần load trước (chế độ daemon).
     """
     print("\n" + "=" * 70)
     print("🔔 KIỂM TRA GỬI CẢNH BÁO KHDN ƯU TIÊN")
@@ -1069,7 +985,6 @@ def send_warning_khdn_uu_tien():
             ID_CHAT_SONTAY, ID_CHAT_SUOIHAI, ID_CHAT_QUANGOAI,
             TELEGRAM_TOKEN, send_message as send_telegram_message
         )
-        import requests as telegram_requests
     except ImportError:
         print("⚠️ Không thể import module send_tele. Chỉ gửi Zalo.")
         ID_CHAT_SONTAY = None
@@ -1078,7 +993,6 @@ def send_warning_khdn_uu_tien():
         TELEGRAM_TOKEN = None
 
     file_path = os.path.join('downloads', 'kq_dhsc', 'bc_BRCD.xlsx')
-    webhook_url_zalo = WEBHOOK_TEXT_URL
 
     # Danh sách loại hình dịch vụ ưu tiên
     PRIORITY_SERVICES = [
@@ -1122,7 +1036,7 @@ def send_warning_khdn_uu_tien():
             return False
 
         # Đọc sheet chi_tiet_ton_brcd
-        df = pd.read_excel(file_path, sheet_name='chi_tiet_ton_brcd')
+        df = read_sheet(file_path, 'chi_tiet_ton_brcd', changed_only=changed_only)
 
         if df.empty:
             print(f"  ℹ️ Sheet chi_tiet_ton_brcd không có dữ liệu")
@@ -1157,6 +1071,10 @@ def send_warning_khdn_uu_tien():
         total_sent_telegram = 0
         total_failed_telegram = 0
 
+        # Bản tin được đưa vào hàng đợi gửi chung (các nhóm gửi song song), chờ kết quả ở cuối
+        dispatcher = get_dispatcher()
+        pending = []
+
         # Nhóm theo DOI_VT để gửi từng nhóm
         grouped = df_filtered.groupby('DOI_VT')
 
@@ -1177,11 +1095,8 @@ def send_warning_khdn_uu_tien():
                 print(f"  📤 Thread ID (Zalo): {thread_id}")
                 print(f"  📤 Chat ID (Telegram): {telegram_chat_id}")
 
-                # Gửi từng phiếu
-                sent_zalo = 0
-                failed_zalo = 0
-                sent_telegram = 0
-                failed_telegram = 0
+                # Đưa từng phiếu vào hàng đợi gửi
+                deliveries = []
 
                 for idx, row in group.iterrows():
                     # Lấy thông tin từ row
@@ -1233,69 +1148,50 @@ def send_warning_khdn_uu_tien():
                         f"  - Số lần Không hài lòng: {int(so_lan_khl)}"
                     )
 
-                    # Gửi Zalo
-                    zalo_success = False
-                    try:
-                        data = {
-                            'threadID': thread_id,
-                            'message': message
-                        }
-                        print(f"    📤 Gọi webhook Zalo cho {ma_tb}...")
-                        response = requests.get(webhook_url_zalo, json=data, timeout=10)
-
-                        if response.status_code == 200:
-                            sent_zalo += 1
-                            zalo_success = True
-                            print(f"    ✅ [Zalo] Gửi thành công: {ma_tb} ({loaihinh_tb})")
-                        else:
-                            failed_zalo += 1
-                            print(f"    ❌ [Zalo] Gửi thất bại: {ma_tb} (Status: {response.status_code})")
-
-                    except Exception as e:
-                        failed_zalo += 1
-                        print(f"    ❌ [Zalo] Lỗi khi gửi {ma_tb}: {e}")
-
-                    # Tạm dừng 0.5 giây giữa Zalo và Telegram
-                    time.sleep(0.5)
-
-                    # Gửi Telegram
-                    telegram_success = False
-                    if telegram_chat_id and TELEGRAM_TOKEN:
-                        try:
-                            url = f"https://api.telegram.org/bot{TELEGRAM_TOKEN}/sendMessage"
-                            data = {
-                                "chat_id": telegram_chat_id,
-                                "text": message,
-                                "parse_mode": "HTML"
-                            }
-                            response = telegram_requests.post(url, data=data, timeout=10)
-
-                            if response.status_code == 200:
-                                sent_telegram += 1
-                                telegram_success = True
-                                print(f"    ✅ [Telegram] Gửi thành công: {ma_tb} ({loaihinh_tb})")
-                            else:
-                                failed_telegram += 1
-                                print(f"    ❌ [Telegram] Gửi thất bại: {ma_tb} (Status: {response.status_code})")
-
-                        except Exception as e:
-                            failed_telegram += 1
-                            print(f"    ❌ [Telegram] Lỗi khi gửi {ma_tb}: {e}")
-
-                    # Tạm dừng 1 giây giữa các phiếu để tránh spam
-                    time.sleep(1)
-
-                total_sent_zalo += sent_zalo
-                total_failed_zalo += failed_zalo
-                total_sent_telegram += sent_telegram
-                total_failed_telegram += failed_telegram
+                    print(f"    📤 Đưa {ma_tb} vào hàng đợi gửi...")
+                    delivery = dispatcher.send_alert(thread_id, message, telegram_chat_id, TELEGRAM_TOKEN)
+                    deliveries.append((delivery, ma_tb, loaihinh_tb))
 
-                print(f"  📊 {display_name}: Zalo ✅ {sent_zalo} | ❌ {failed_zalo} | Telegram ✅ {sent_telegram} | ❌ {failed_telegram}")
+                pending.append((display_name, deliveries))
 
             except Exception as e:
                 print(f"  ❌ Lỗi khi xử lý {doi_vt}: {e}")
                 continue
 
+        # Chờ kết quả gửi của từng nhóm
+        for display_name, deliveries in pending:
+            print(f"\n📨 Kết quả gửi {display_name}:")
+
+            sent_zalo = 0
+            failed_zalo = 0
+            sent_telegram = 0
+            failed_telegram = 0
+
+            for delivery, ma_tb, loaihinh_tb in deliveries:
+                zalo_result = delivery.zalo_result()
+                if zalo_result.ok:
+                    sent_zalo += 1
+                    print(f"    ✅ [Zalo] Gửi thành công: {ma_tb} ({loaihinh_tb})")
+                else:
+                    failed_zalo += 1
+                    print(f"    ❌ [Zalo] Gửi thất bại: {ma_tb} ({zalo_result.describe()})")
+
+                telegram_result = delivery.telegram_result()
+                if telegram_result is not None:
+                    if telegram_result.ok:
+                        sent_telegram += 1
+                        print(f"    ✅ [Telegram] Gửi thành công: {ma_tb} ({loaihinh_tb})")
+                    else:
+                        failed_telegram += 1
+                        print(f"    ❌ [Telegram] Gửi thất bại: {ma_tb} ({telegram_result.describe()})")
+
+            total_sent_zalo += sent_zalo
+            total_failed_zalo += failed_zalo
+            total_sent_telegram += sent_telegram
+            total_failed_telegram += failed_telegram
+
+            print(f"  📊 {display_name}: Zalo ✅ {sent_zalo} | ❌ {failed_zalo} | Telegram ✅ {sent_telegram} | ❌ {failed_telegram}")
+
         # Tổng kết
         print("\n" + "=" * 60)
         print("📋 TỔNG KẾT KHDN ƯU TIÊN:")
@@ -1335,8 +1231,8 @@ def send_warning_mat_huong_sa(thread_id: str, message: str) -> bool:
     print(f"Thread ID: {thread_id}")
     print(f"Message: {message}")
 
-    # Webhook URL
-    webhook_url_zalo = WEBHOOK_TEXT_URL
+    # Gửi qua dispatcher chung (giới hạn tốc độ + thử lại khi lỗi mạng/429/5xx)
+    dispatcher = get_dispatcher()
 
     success_zalo = False
     success_telegram = False
@@ -1344,18 +1240,13 @@ def send_warning_mat_huong_sa(thread_id: str, message: str) -> bool:
     # 1. Gửi Zalo
     try:
         print("\n📱 Gửi cảnh báo qua Zalo...")
-        data = {
-            'threadID': thread_id,
-            'message': message
-        }
-        response = requests.get(webhook_url_zalo, json=data, timeout=10)
+        result = dispatcher.zalo(thread_id, message).result()
 
-        if response.status_code == 200:
-            print(f"  ✅ Gửi Zalo thành công (status: {response.status_code})")
+        if result.ok:
+            print(f"  ✅ Gửi Zalo thành công (status: {result.status_code})")
             success_zalo = True
         else:
-            print(f"  ❌ Gửi Zalo thất bại (status: {response.status_code})")
-            print(f"  Response: {response.text}")
+            print(f"  ❌ Gửi Zalo thất bại ({result.describe()}, {result.attempts} lần thử)")
 
     except Exception as e:
         print(f"  ❌ Lỗi khi gửi Zalo: {e}")
@@ -1378,19 +1269,13 @@ def send_warning_mat_huong_sa(thread_id: str, message: str) -> bool:
             telegram_chat_id = thread_to_telegram.get(thread_id)
 
             if telegram_chat_id and TELEGRAM_TOKEN:
-                telegram_url = f"https://api.telegram.org/bot{TELEGRAM_TOKEN}/sendMessage"
-                telegram_data = {
-                    'chat_id': telegram_chat_id,
-                    'text': message,
-                    'parse_mode': 'HTML'
-                }
-                telegram_response = requests.post(telegram_url, json=telegram_data, timeout=10)
-
-                if telegram_response.status_code == 200:
+                telegram_result = dispatcher.telegram(telegram_chat_id, message, TELEGRAM_TOKEN).result()
+
+                if telegram_result.ok:
                     print(f"  ✅ Gửi Telegram thành công (chat_id: {telegram_chat_id})")
                     success_telegram = True
                 else:
-                    print(f"  ❌ Gửi Telegram thất bại (status: {telegram_response.status_code})")
+                    print(f"  ❌ Gửi Telegram thất bại ({telegram_result.describe()})")
             else:
                 print(f"  ⚠️  Không tìm thấy Telegram chat_id cho thread_id: {thread_id}")
 
@@ -1412,18 +1297,17 @@ def send_warning_mat_huong_sa(thread_id: str, message: str) -> bool:
 
     return success_zalo or success_telegram
 
-def send_warning_phieu_ob_khl():
+def send_warning_phieu_ob_khl(changed_only: bool = False):
     """
     Gửi cảnh báo phiếu OB (Observation) KHL tới 4 nhóm Zalo
     Đọc từ file bc_BRCD.xlsx sheet chi_tiet_ton_brcd
     Gửi cảnh báo khi cột GHICHU_HONG = "OBTT Dieu lai phieu tu khao sat bao hong"
     Ghi log để mỗi bản ghi chỉ gửi 1 lần duy nhất
+
+    changed_only=True: chỉ xét các phiếu mới/thay đổi kể từ lần load trước (chế độ daemon).
     """
     file_path = os.path.join('downloads', 'kq_dhsc', 'bc_BRCD.xlsx')
-    webhook_url = WEBHOOK_TEXT_URL
-    log_dir = "log_message"
-    os.makedirs(log_dir, exist_ok=True)
-    log_file = os.path.join(log_dir, "ob_khl_sent.xlsx")
+    store = get_alert_store()
 
     # Custom thread ID mapping for OB KHL warnings (different from global config)
     # These thread IDs are specific for OB KHL messages
@@ -1444,20 +1328,14 @@ def send_warning_phieu_ob_khl():
             print(f"❌ Không tìm thấy file: {file_path}")
             return False
 
-        # Load existing log (danh sách các baohong_id đã gửi)
-        sent_baohong_ids = set()
-        if os.path.exists(log_file):
-            try:
-                df_log = pd.read_excel(log_file)
-                sent_baohong_ids = set(df_log['baohong_id'].astype(str).unique())
-                print(f"  📋 Đã load {len(sent_baohong_ids)} bản ghi đã gửi từ log")
-            except Exception as e:
-                print(f"  ⚠️ Lỗi khi đọc log file: {e}")
+        # Danh sách các baohong_id đã gửi
+        sent_baohong_ids = store.sent_keys(PHIEU_OB_KHL)
+        print(f"  📋 Đã load {len(sent_baohong_ids)} bản ghi đã gửi")
 
         # Đọc sheet chi_tiet_ton_brcd
         print(f"  📖 Đang đọc sheet chi_tiet_ton_brcd từ {file_path}...")
         try:
-            df = pd.read_excel(file_path, sheet_name='chi_tiet_ton_brcd')
+            df = read_sheet(file_path, 'chi_tiet_ton_brcd', changed_only=changed_only)
         except Exception as e:
             print(f"  ❌ Lỗi khi đọc file: {e}")
             return False
@@ -1494,10 +1372,9 @@ def send_warning_phieu_ob_khl():
 
         print(f"  📤 Có {len(df_ob_new)} phiếu OB mới chưa được gửi")
 
-        # Chuẩn bị log data để ghi vào file
-        log_data = []
-
-        # Gửi từng bản tin
+        # Đưa từng bản tin vào hàng đợi gửi (các nhóm gửi song song), chờ kết quả ở cuối
+        dispatcher = get_dispatcher()
+        deliveries = []
         sent_count = 0
         failed_count = 0
 
@@ -1553,68 +1430,29 @@ def send_warning_phieu_ob_khl():
                 )
 
                 # Gửi Zalo
-                try:
-                    data = {
-                        'threadID': thread_id,
-                        'message': message
-                    }
-                    response = requests.get(webhook_url, json=data, timeout=10)
-
-                    if response.status_code == 200:
-                        sent_count += 1
-                        print(f"  ✅ Gửi OB {baohong_id} tới {doi_vt} thành công")
-
-                        # Ghi log
-                        log_data.append({
-                            'baohong_id': baohong_id,
-                            'ma_tb': ma_tb,
-                            'DOI_VT': doi_vt,
-                            'Thời gian gửi': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
-                            'Trạng thái': 'Thành công'
-                        })
-                    else:
-                        failed_count += 1
-                        print(f"  ❌ Gửi OB {baohong_id} thất bại. Status: {response.status_code}")
-                        log_data.append({
-                            'baohong_id': baohong_id,
-                            'ma_tb': ma_tb,
-                            'DOI_VT': doi_vt,
-                            'Thời gian gửi': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
-                            'Trạng thái': f'Thất bại (Status: {response.status_code})'
-                        })
-
-                except Exception as e:
-                    failed_count += 1
-                    print(f"  ❌ Lỗi khi gửi OB {baohong_id}: {e}")
-                    log_data.append({
-                        'baohong_id': baohong_id,
-                        'ma_tb': ma_tb,
-                        'DOI_VT': doi_vt,
-                        'Thời gian gửi': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
-                        'Trạng thái': f'Lỗi: {str(e)}'
-                    })
-
-                # Delay 1 giây giữa các bản tin
-                time.sleep(1)
+                deliveries.append((dispatcher.zalo(thread_id, message), baohong_id, ma_tb, doi_vt))
 
             except Exception as e:
                 failed_count += 1
                 print(f"  ❌ Lỗi xử lý bản ghi: {e}")
 
-        # Ghi log vào file
-        if log_data:
-            try:
-                df_new_log = pd.DataFrame(log_data)
-
-                if os.path.exists(log_file):
-                    # Append vào file cũ
-                    df_existing = pd.read_excel(log_file)
-                    df_new_log = pd.concat([df_existing, df_new_log], ignore_index=True)
+        for future, baohong_id, ma_tb, doi_vt in deliveries:
+            result = future.result()
+            if result.ok:
+                sent_count += 1
+                print(f"  ✅ Gửi OB {baohong_id} tới {doi_vt} thành công")
+                status = 'Thành công'
+            elif result.status_code is not None:
+                failed_count += 1
+                print(f"  ❌ Gửi OB {baohong_id} thất bại. Status: {result.status_code}")
+                status = f'Thất bại (Status: {result.status_code})'
+            else:
+                failed_count += 1
+                print(f"  ❌ Lỗi khi gửi OB {baohong_id}: {result.error}")
+                status = f'Lỗi: {result.error}'
 
-                df_new_log.to_excel(log_file, index=False)
-                print(f"  💾 Đã ghi log vào {log_file}")
-            except Exception as e:
-                print(f"  ⚠️ Lỗi khi ghi log: {e}")
+            # Ghi trạng thái (cả khi thất bại, mỗi phiếu chỉ gửi 1 lần)
+            store.record(PHIEU_OB_KHL, baohong_id, status=status, details={'ma_tb': ma_tb, 'doi_vt': doi_vt})
 
         # Tổng kết
         print("\n" + "=" * 60)
@@ -1632,19 +1470,18 @@ def send_warning_phieu_ob_khl():
         return False
 
 
-def send_warning_phieu_hll_7_ngay():
+def send_warning_phieu_hll_7_ngay(changed_only: bool = False):
     """
     Gửi cảnh báo phiếu Hỏng lại trong vòng 7 ngày.
     So sánh MA_TB từ phiếu đang tồn (bc_BRCD.xlsx) với toàn bộ phiếu báo hỏng trong tháng (SM4-C11.xlsx).
     Nếu cùng MA_TB có phiếu báo hỏng trong vòng 7 ngày trước thời điểm nhận phiếu hiện tại, gửi cảnh báo.
     Ghi log để mỗi bản ghi chỉ gửi 1 lần duy nhất.
+
+    changed_only=True: chỉ xét các phiếu mới/thay đổi kể từ lần load trước (chế độ daemon).
     """
     file_brcd = os.path.join('downloads', 'kq_dhsc', 'bc_BRCD.xlsx')
     file_sm4 = '/home/vtst/baocaohanoi/downloads/baocao_hanoi/SM4-C11.xlsx'
-    webhook_url = WEBHOOK_TEXT_URL
-    log_dir = "log_message"
-    os.makedirs(log_dir, exist_ok=True)
-    log_file = os.path.join(log_dir, "hll_7_ngay_sent.xlsx")
+    store = get_alert_store()
 
     # Thread ID mapping (giống send_warning_phieu_ob_khl)
     doi_vt_to_thread_id = {
@@ -1666,20 +1503,14 @@ def send_warning_phieu_hll_7_ngay():
             print(f"❌ Không tìm thấy file SM4-C11: {file_sm4}")
             return False
 
-        # Load log đã gửi
-        sent_baohong_ids = set()
-        if os.path.exists(log_file):
-            try:
-                df_log = pd.read_excel(log_file)
-                sent_baohong_ids = set(df_log['baohong_id'].astype(str).unique())
-                print(f"  📋 Đã load {len(sent_baohong_ids)} bản ghi đã gửi từ log")
-            except Exception as e:
-                print(f"  ⚠️ Lỗi khi đọc log file: {e}")
+        # Danh sách các baohong_id đã gửi
+        sent_baohong_ids = store.sent_keys(PHIEU_HLL_7_NGAY)
+        print(f"  📋 Đã load {len(sent_baohong_ids)} bản ghi đã gửi")
 
         # Đọc phiếu đang tồn từ bc_BRCD
         print(f"  📖 Đang đọc sheet chi_tiet_ton_brcd từ {file_brcd}...")
         try:
-            df_brcd = pd.read_excel(file_brcd, sheet_name='chi_tiet_ton_brcd')
+            df_brcd = read_sheet(file_brcd, 'chi_tiet_ton_brcd', changed_only=changed_only)
         except Exception as e:
             print(f"  ❌ Lỗi khi đọc file bc_BRCD: {e}")
             return False
@@ -1697,7 +1528,7 @@ def send_warning_phieu_hll_7_ngay():
         # Đọc lịch sử phiếu báo hỏng từ SM4-C11
         print(f"  📖 Đang đọc file SM4-C11...")
         try:
-            df_sm4 = pd.read_excel(file_sm4)
+            df_sm4 = read_sheet(file_sm4)
         except Exception as e:
             print(f"  ❌ Lỗi khi đọc file SM4-C11: {e}")
             return False
@@ -1727,8 +1558,9 @@ def send_warning_phieu_hll_7_ngay():
 
         print(f"  🔍 Đã tạo lookup cho {len(sm4_lookup)} MA_TB từ SM4-C11")
 
-        # Xử lý từng phiếu đang tồn
-        log_data = []
+        # Xử lý từng phiếu đang tồn; bản tin được đưa vào hàng đợi gửi chung, chờ kết quả ở cuối
+        dispatcher = get_dispatcher()
+        deliveries = []
         sent_count = 0
         failed_count = 0
         hll_count = 0
@@ -1812,69 +1644,32 @@ def send_warning_phieu_hll_7_ngay():
                 )
 
                 # Gửi Zalo
-                try:
-                    data = {
-                        'threadID': thread_id,
-                        'message': message
-                    }
-                    response = requests.get(webhook_url, json=data, timeout=10)
-
-                    if response.status_code == 200:
-                        sent_count += 1
-                        print(f"  ✅ Gửi HLL {baohong_id} ({ma_tb}) tới {doi_vt} thành công")
-
-                        log_data.append({
-                            'baohong_id': baohong_id,
-                            'ma_tb': ma_tb,
-                            'DOI_VT': doi_vt,
-                            'lich_su_hong_7_ngay': lich_su_hong,
-                            'Thời gian gửi': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
-                            'Trạng thái': 'Thành công'
-                        })
-                    else:
-                        failed_count += 1
-                        print(f"  ❌ Gửi HLL {baohong_id} thất bại. Status: {response.status_code}")
-                        log_data.append({
-                            'baohong_id': baohong_id,
-                            'ma_tb': ma_tb,
-                            'DOI_VT': doi_vt,
-                            'lich_su_hong_7_ngay': lich_su_hong,
-                            'Thời gian gửi': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
-                            'Trạng thái': f'Thất bại (Status: {response.status_code})'
-                        })
-
-                except Exception as e:
-                    failed_count += 1
-                    print(f"  ❌ Lỗi khi gửi HLL {baohong_id}: {e}")
-                    log_data.append({
-                        'baohong_id': baohong_id,
-                        'ma_tb': ma_tb,
-                        'DOI_VT': doi_vt,
-                        'lich_su_hong_7_ngay': lich_su_hong,
-                        'Thời gian gửi': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
-                        'Trạng thái': f'Lỗi: {str(e)}'
-                    })
-
-                # Delay 1 giây giữa các bản tin
-                time.sleep(1)
+                deliveries.append((dispatcher.zalo(thread_id, message), baohong_id, ma_tb, doi_vt, lich_su_hong))
 
             except Exception as e:
                 failed_count += 1
                 print(f"  ❌ Lỗi xử lý bản ghi: {e}")
 
-        # Ghi log vào file
-        if log_data:
-            try:
-                df_new_log = pd.DataFrame(log_data)
-
-                if os.path.exists(log_file):
-                    df_existing = pd.read_excel(log_file)
-                    df_new_log = pd.concat([df_existing, df_new_log], ignore_index=True)
+        for future, baohong_id, ma_tb, doi_vt, lich_su_hong in deliveries:
+            result = future.result()
+            if result.ok:
+                sent_count += 1
+                print(f"  ✅ Gửi HLL {baohong_id} ({ma_tb}) tới {doi_vt} thành công")
+                status = 'Thành công'
+            elif result.status_code is not None:
+                failed_count += 1
+                print(f"  ❌ Gửi HLL {baohong_id} thất bại. Status: {result.status_code}")
+                status = f'Thất bại (Status: {result.status_code})'
+            else:
+                failed_count += 1
+                print(f"  ❌ Lỗi khi gửi HLL {baohong_id}: {result.error}")
+                status = f'Lỗi: {result.error}'
 
-                df_new_log.to_excel(log_file, index=False)
-                print(f"  💾 Đã ghi log vào {log_file}")
-            except Exception as e:
-                print(f"  ⚠️ Lỗi khi ghi log: {e}")
+            # Ghi trạng thái (cả khi thất bại, mỗi phiếu chỉ gửi 1 lần)
+            store.record(
+                PHIEU_HLL_7_NGAY, baohong_id, status=status,
+                details={'ma_tb': ma_tb, 'doi_vt': doi_vt, 'lich_su_hong_7_ngay': lich_su_hong},
+            )
 
         # Tổng kết
         print("\n" + "=" * 60)
@@ -1893,7 +1688,7 @@ def send_warning_phieu_hll_7_ngay():
         return False
 
 
-def should_send_sap_qua_gio_warning(ma_tb: str, gio_con_lai: float, log_df: pd.DataFrame) -> tuple:
+def should_send_sap_qua_gio_warning(ma_tb: str, gio_con_lai: float, last_sent: datetime = None) -> tuple:
     """
     Determine if warning should be sent based on remaining time and last sent time.
     
@@ -1906,13 +1701,11 @@ def should_send_sap_qua_gio_warning(ma_tb: str, gio_con_lai: float, log_df: pd.D
     Args:
         ma_tb: Mã thuê bao
         gio_con_lai: Giờ còn lại (hours)
-        log_df: DataFrame chứa log đã gửi
+        last_sent: Thời điểm gửi thành công gần nhất (None nếu chưa gửi)
         
     Returns:
         (should_send: bool, reason: str)
     """
-    from datetime import datetime
-    
     # Calculate throttle interval based on remaining time
     if gio_con_lai >= 1.0:  # 1-2 hours
         throttle_minutes = 30
@@ -1923,13 +1716,9 @@ def should_send_sap_qua_gio_warning(ma_tb: str, gio_con_lai: float, log_df: pd.D
     else:  # < 10 minutes
         throttle_minutes = 0  # Send every time (no throttle)
     
-    # Check if ma_tb exists in log
-    if log_df.empty or ma_tb not in log_df['ma_tb'].values:
+    if last_sent is None:
         return True, "Lần đầu gửi"
     
-    # Get last sent time for this ma_tb
-    last_record = log_df[log_df['ma_tb'] == ma_tb].iloc[-1]
-    last_sent = pd.to_datetime(last_record['last_sent_time'])
     time_diff_minutes = (datetime.now() - last_sent).total_seconds() / 60
     
     if throttle_minutes == 0:  # No throttle for < 10 min
@@ -1940,14 +1729,15 @@ def should_send_sap_qua_gio_warning(ma_tb: str, gio_con_lai: float, log_df: pd.D
     else:
         return False, f"Chưa đủ {throttle_minutes} phút (mới {time_diff_minutes:.1f} phút)"
 
-def send_warning_phieu_ton_sap_qua_gio():
+def send_warning_phieu_ton_sap_qua_gio(changed_only: bool = False):
     """
     Gửi cảnh báo phiếu tồn BRCD sắp quá giờ tới 4 nhóm Zalo + Telegram.
     Đọc từ file chiTietBrcd5Doi.xlsx, từ 4 sheet: thachthat, hoalac, hatmon, odien
     Gửi cảnh báo cho các phiếu sắp quá giờ (0 < giờ còn lại thực < 1.5).
+
+    changed_only=True: chỉ xét các phiếu mới/thay đổi kể từ lần load trước (chế độ daemon).
     """
     file_path = os.path.join('chiaTheoDoi', 'chiTietBrcd5Doi.xlsx')
-    webhook_url = WEBHOOK_TEXT_URL
 
     # Import Telegram config
     try:
@@ -1978,25 +1768,9 @@ def send_warning_phieu_ton_sap_qua_gio():
             print(f"❌ Không tìm thấy file: {file_path}")
             return False
 
-        # Load log file for throttle tracking
-        log_dir = "log_message"
-        os.makedirs(log_dir, exist_ok=True)
-        log_file = os.path.join(log_dir, "phieu_sap_qua_gio_sent.xlsx")
-        
-        # Load existing log or create new DataFrame
-        if os.path.exists(log_file):
-            try:
-                log_df = pd.read_excel(log_file)
-                print(f"  📋 Đã load {len(log_df)} bản ghi từ log")
-            except Exception as e:
-                print(f"  ⚠️ Lỗi khi đọc log file: {e}, tạo mới")
-                log_df = pd.DataFrame(columns=['ma_tb', 'baohong_id', 'last_sent_time', 'gio_con_lai', 'DOI_VT', 'status'])
-        else:
-            log_df = pd.DataFrame(columns=['ma_tb', 'baohong_id', 'last_sent_time', 'gio_con_lai', 'DOI_VT', 'status'])
-            print(f"  📋 Tạo log file mới")
-        
-        # Track new entries to append
-        new_log_entries = []
+        # Trạng thái gửi để throttle (SQLite)
+        store = get_alert_store()
+        total_logged = 0
 
         # Tổng số bản tin đã gửi
         total_sent_zalo = 0
@@ -2005,13 +1779,18 @@ def send_warning_phieu_ton_sap_qua_gio():
         total_failed_telegram = 0
         total_skipped = 0
 
+        # Bản tin được đưa vào hàng đợi gửi chung (các nhóm gửi song song), chờ kết quả ở cuối
+        dispatcher = get_dispatcher()
+        pending = []
+        queued_ma_tb = set()
+
         # Đọc từng sheet
         for sheet_name, thread_id in sheet_to_thread_id.items():
             try:
                 print(f"\n📋 Đang xử lý sheet: {sheet_name}")
 
                 # Đọc sheet
-                df = pd.read_excel(file_path, sheet_name=sheet_name)
+                df = read_sheet(file_path, sheet_name, changed_only=changed_only)
 
                 if df.empty:
                     print(f"  ℹ️ Sheet {sheet_name} không có dữ liệu")
@@ -2094,104 +1873,35 @@ def send_warning_phieu_ton_sap_qua_gio():
 
                     messages_to_send.append((row, message, ma_tb, gio_con_lai, baohong_id))
 
-                # Gửi từng bản tin
-                print(f"  📤 Đang gửi {len(messages_to_send)} bản tin cho sheet {sheet_name}...")
+                # Đưa bản tin vào hàng đợi gửi
+                print(f"  📤 Đưa {len(messages_to_send)} bản tin của sheet {sheet_name} vào hàng đợi gửi...")
 
-                sent_count_zalo = 0
-                failed_count_zalo = 0
-                sent_count_telegram = 0
-                failed_count_telegram = 0
+                deliveries = []
 
                 # Lấy Telegram chat ID cho sheet này
                 telegram_chat_id = sheet_to_telegram_chat_id.get(sheet_name)
 
                 for i, (row, message, ma_tb, gio_con_lai, baohong_id) in enumerate(messages_to_send, 1):
-                    # CHECK THROTTLE BEFORE SENDING
-                    should_send, reason = should_send_sap_qua_gio_warning(ma_tb, gio_con_lai, log_df)
+                    # CHECK THROTTLE BEFORE SENDING (chỉ tính lần gửi thành công, lần bỏ qua không reset đồng hồ)
+                    state = store.get(PHIEU_SAP_QUA_GIO, str(ma_tb))
+                    should_send, reason = should_send_sap_qua_gio_warning(
+                        ma_tb, gio_con_lai, state.last_sent if state else None
+                    )
                     
-                    if not should_send:
+                    if not should_send or str(ma_tb) in queued_ma_tb:
                         total_skipped += 1
-                        print(f"    ⏭️  [{i}/{len(messages_to_send)}] Skip {ma_tb}: {reason}")
-                        # Log as SKIP
-                        new_log_entries.append({
-                            'ma_tb': ma_tb,
-                            'baohong_id': baohong_id,
-                            'last_sent_time': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
-                            'gio_con_lai': gio_con_lai,
-                            'DOI_VT': sheet_name,
-                            'status': 'SKIP'
-                        })
+                        if not should_send:
+                            print(f"    ⏭️  [{i}/{len(messages_to_send)}] Skip {ma_tb}: {reason}")
+                        else:
+                            print(f"    ⏭️  [{i}/{len(messages_to_send)}] Skip {ma_tb}: trùng phiếu trong lần chạy này")
                         continue  # Skip sending this message
+                    queued_ma_tb.add(str(ma_tb))
                     
                     print(f"    📨 [{i}/{len(messages_to_send)}] Gửi {ma_tb}: {reason}")
-                    
-                    # Gửi Zalo
-                    zalo_success = False
-                    try:
-                        # Chuẩn bị dữ liệu để gửi qua webhook
-                        data = {
-                            'threadID': thread_id,
-                            'message': message
-                        }
-
-                        # Gửi request
-                        response = requests.get(webhook_url, json=data, timeout=10)
-
-                        if response.status_code == 200:
-                            sent_count_zalo += 1
-                            print(f"    ✅ Zalo [{i}/{len(messages_to_send)}] Gửi thành công")
-                        else:
-                            failed_count_zalo += 1
-                            print(f"    ❌ Zalo [{i}/{len(messages_to_send)}] Gửi thất bại. Status: {response.status_code}")
-
-                    except Exception as e:
-                        failed_count_zalo += 1
-                        print(f"    ❌ Zalo [{i}/{len(messages_to_send)}] Lỗi khi gửi: {e}")
-
-                    # Gửi Telegram
-                    if telegram_chat_id and TELEGRAM_TOKEN:
-                        try:
-                            import requests as telegram_requests
-                            url = f"https://api.telegram.org/bot{TELEGRAM_TOKEN}/sendMessage"
-                            data = {
-                                "chat_id": telegram_chat_id,
-                                "text": message,
-                                "parse_mode": "HTML"
-                            }
-                            response = telegram_requests.post(url, data=data, timeout=10)
-
-                            if response.status_code == 200:
-                                sent_count_telegram += 1
-                                print(f"    ✅ Telegram [{i}/{len(messages_to_send)}] Gửi thành công")
-                            else:
-                                failed_count_telegram += 1
-                                print(f"    ❌ Telegram [{i}/{len(messages_to_send)}] Gửi thất bại. Status: {response.status_code}")
-
-                        except Exception as e:
-                            failed_count_telegram += 1
-                            print(f"    ❌ Telegram [{i}/{len(messages_to_send)}] Lỗi khi gửi: {e}")
-
-                    # Log successful send
-                    if zalo_success or telegram_success:
-                        new_log_entries.append({
-                            'ma_tb': ma_tb,
-                            'baohong_id': baohong_id,
-                            'last_sent_time': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
-                            'gio_con_lai': gio_con_lai,
-                            'DOI_VT': sheet_name,
-                            'status': 'SENT'
-                        })
-
-                    # Tạm dừng 1 giây để tránh spam
-                    if i < len(messages_to_send):
-                        time.sleep(1)
-
-                total_sent_zalo += sent_count_zalo
-                total_failed_zalo += failed_count_zalo
-                total_sent_telegram += sent_count_telegram
-                total_failed_telegram += failed_count_telegram
-
-                print(f"  📊 Sheet {sheet_name}: Zalo ✅ {sent_count_zalo} | ❌ {failed_count_zalo} | Telegram ✅ {sent_count_telegram} | ❌ {failed_count_telegram}")
+                    delivery = dispatcher.send_alert(thread_id, message, telegram_chat_id, TELEGRAM_TOKEN)
+                    deliveries.append((delivery, ma_tb, gio_con_lai, baohong_id))
+
+                pending.append((sheet_name, deliveries))
 
             except ValueError as e:
                 if "Worksheet named" in str(e):
@@ -2203,22 +1913,52 @@ def send_warning_phieu_ton_sap_qua_gio():
                 print(f"  ❌ Lỗi khi xử lý sheet {sheet_name}: {e}")
                 continue
 
-        # Save log file
-        if new_log_entries:
-            try:
-                df_new_log = pd.DataFrame(new_log_entries)
-                
-                if os.path.exists(log_file):
-                    # Append to existing log
-                    df_existing = pd.read_excel(log_file)
-                    df_combined = pd.concat([df_existing, df_new_log], ignore_index=True)
+        # Chờ kết quả gửi của từng sheet
+        for sheet_name, deliveries in pending:
+            print(f"\n📨 Kết quả gửi sheet {sheet_name}:")
+
+            sent_count_zalo = 0
+            failed_count_zalo = 0
+            sent_count_telegram = 0
+            failed_count_telegram = 0
+
+            for i, (delivery, ma_tb, gio_con_lai, baohong_id) in enumerate(deliveries, 1):
+                zalo_result = delivery.zalo_result()
+                zalo_success = zalo_result.ok
+                if zalo_success:
+                    sent_count_zalo += 1
+                    print(f"    ✅ Zalo [{i}/{len(deliveries)}] Gửi thành công: {ma_tb}")
                 else:
-                    df_combined = df_new_log
-                
-                df_combined.to_excel(log_file, index=False)
-                print(f"\n💾 Đã lưu log: {len(new_log_entries)} entries vào {log_file}")
-            except Exception as e:
-                print(f"\n⚠️ Lỗi khi lưu log: {e}")
+                    failed_count_zalo += 1
+                    print(f"    ❌ Zalo [{i}/{len(deliveries)}] Gửi thất bại: {ma_tb}. {zalo_result.describe()}")
+
+                telegram_result = delivery.telegram_result()
+                telegram_success = telegram_result is not None and telegram_result.ok
+                if telegram_result is not None:
+                    if telegram_success:
+                        sent_count_telegram += 1
+                        print(f"    ✅ Telegram [{i}/{len(deliveries)}] Gửi thành công: {ma_tb}")
+                    else:
+                        failed_count_telegram += 1
+                        print(f"    ❌ Telegram [{i}/{len(deliveries)}] Gửi thất bại: {ma_tb}. {telegram_result.describe()}")
+
+                # Log successful send
+                if zalo_success or telegram_success:
+                    store.record(
+                        PHIEU_SAP_QUA_GIO, str(ma_tb), status='SENT',
+                        details={'baohong_id': baohong_id, 'gio_con_lai': gio_con_lai, 'doi_vt': sheet_name},
+                    )
+                    total_logged += 1
+
+            total_sent_zalo += sent_count_zalo
+            total_failed_zalo += failed_count_zalo
+            total_sent_telegram += sent_count_telegram
+            total_failed_telegram += failed_count_telegram
+
+            print(f"  📊 Sheet {sheet_name}: Zalo ✅ {sent_count_zalo} | ❌ {failed_count_zalo} | Telegram ✅ {sent_count_telegram} | ❌ {failed_count_telegram}")
+
+        if total_logged:
+            print(f"\n💾 Đã lưu trạng thái: {total_logged} bản tin vào {store.db_path}")
 
         # Tổng kết
         print("\n" + "=" * 60)
@@ -2251,7 +1991,6 @@ def send_thong_ke_phieu_ton_tong_hop():
     Tạo báo cáo thống kê tổng hợp cho mỗi tổ.
     """
     file_path = os.path.join('chiaTheoDoi', 'chiTietBrcd5Doi.xlsx')
-    webhook_url = WEBHOOK_TEXT_URL
 
     # Check allowed time
     allowed, time_msg = is_allowed_send_time()
@@ -2297,6 +2036,10 @@ def send_thong_ke_phieu_ton_tong_hop():
         total_sent_telegram = 0
         total_failed_telegram = 0
 
+        # Báo cáo của các tổ được gửi song song qua hàng đợi chung, chờ kết quả ở cuối
+        dispatcher = get_dispatcher()
+        pending = []
+
         # Đọc từng sheet
         for sheet_name, team in sheet_mapping.items():
             if not team:
@@ -2307,7 +2050,7 @@ def send_thong_ke_phieu_ton_tong_hop():
                 print(f"\n📋 Đang xử lý sheet: {sheet_name} - Tổ {team.short_name}")
 
                 # Đọc sheet
-                df = pd.read_excel(file_path, sheet_name=sheet_name)
+                df = read_sheet(file_path, sheet_name)
 
                 if df.empty:
                     print(f"  ℹ️ Sheet {sheet_name} không có dữ liệu")
@@ -2451,62 +2194,33 @@ Thời gian: {current_time}
 {chr(10).join(all_nvkt) if all_nvkt else 'Không có dữ liệu'}"""
 
 
-                # Gửi Zalo
-                zalo_success = False
-                try:
-                    data = {
-                        'threadID': team.zalo_thread_id,
-                        'message': message
-                    }
-                    print(f"  📤 Gọi webhook Zalo cho tổ {team.short_name}...")
-                    response = requests.get(webhook_url, json=data, timeout=10)
-
-                    if response.status_code == 200:
-                        total_sent_zalo += 1
-                        zalo_success = True
-                        print(f"  ✅ [Zalo] Gửi thành công cho tổ {team.short_name}")
-                    else:
-                        total_failed_zalo += 1
-                        print(f"  ❌ [Zalo] Gửi thất bại (Status: {response.status_code})")
-
-                except Exception as e:
-                    total_failed_zalo += 1
-                    print(f"  ❌ [Zalo] Lỗi khi gửi: {e}")
-
-                # Tạm dừng 0.5 giây giữa Zalo và Telegram
-                time.sleep(0.5)
-
-                # Gửi Telegram
-                telegram_success = False
-                if team.telegram_chat_id and TELEGRAM_TOKEN:
-                    try:
-                        url = f"https://api.telegram.org/bot{TELEGRAM_TOKEN}/sendMessage"
-                        data = {
-                            "chat_id": team.telegram_chat_id,
-                            "text": message,
-                            "parse_mode": "HTML"
-                        }
-                        response = requests.post(url, data=data, timeout=10)
-
-                        if response.status_code == 200:
-                            total_sent_telegram += 1
-                            telegram_success = True
-                            print(f"  ✅ [Telegram] Gửi thành công cho tổ {team.short_name}")
-                        else:
-                            total_failed_telegram += 1
-                            print(f"  ❌ [Telegram] Gửi thất bại (Status: {response.status_code})")
-
-                    except Exception as e:
-                        total_failed_telegram += 1
-                        print(f"  ❌ [Telegram] Lỗi khi gửi: {e}")
-
-                # Tạm dừng 1 giây giữa các tổ để tránh spam
-                time.sleep(1)
+                # Gửi Zalo + Telegram
+                print(f"  📤 Đưa báo cáo tổ {team.short_name} vào hàng đợi gửi...")
+                delivery = dispatcher.send_alert(team.zalo_thread_id, message, team.telegram_chat_id, TELEGRAM_TOKEN)
+                pending.append((team, delivery))
 
             except Exception as e:
                 print(f"  ❌ Lỗi khi xử lý sheet {sheet_name}: {e}")
                 continue
 
+        for team, delivery in pending:
+            zalo_result = delivery.zalo_result()
+            if zalo_result.ok:
+                total_sent_zalo += 1
+                print(f"  ✅ [Zalo] Gửi thành công cho tổ {team.short_name}")
+            else:
+                total_failed_zalo += 1
+                print(f"  ❌ [Zalo] Gửi thất bại cho tổ {team.short_name} ({zalo_result.describe()})")
+
+            telegram_result = delivery.telegram_result()
+            if telegram_result is not None:
+                if telegram_result.ok:
+                    total_sent_telegram += 1
+                    print(f"  ✅ [Telegram] Gửi thành công cho tổ {team.short_name}")
+                else:
+                    total_failed_telegram += 1
+                    print(f"  ❌ [Telegram] Gửi thất bại cho tổ {team.short_name} ({telegram_result.describe()})")
+
         # Tổng kết
         print("\n" + "=" * 60)
         print("📋 TỔNG KẾT BÁO CÁO THỐNG KÊ:")
@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+Mô hình phiếu trong bộ nhớ dùng chung cho các luật cảnh báo (send_warning_*).
+
+- Mỗi workbook (chiTietBrcd5Doi.xlsx, bc_BRCD.xlsx, ...) chỉ được parse 1 lần cho mỗi
+  lần file thay đổi (theo size + mtime), đọc tất cả sheet trong 1 lần thay vì mỗi
+  pd.read_excel(file_path, sheet_name=...) lại mở và parse lại cả file
+- Khi file thay đổi, so từng dòng với lần load trước (hash nội dung dòng): dòng mới hoặc
+  có thay đổi được đánh dấu "changed"; các luật chạy ở chế độ changed_only chỉ xét
+  các phiếu này
+- Các hàm trả về bản copy nên luật nào sửa DataFrame cũng không ảnh hưởng luật khác
+"""
+
+from __future__ import annotations
+
+import os
+import threading
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+import pandas as pd
+
+
+@dataclass
+class _Workbook:
+    version: Tuple[int, int]
+    sheets: Dict[str, pd.DataFrame]
+    changed: Dict[str, pd.Series] = field(default_factory=dict)
+    hashes: Dict[str, pd.Series] = field(default_factory=dict)
+
+
+def _row_hashes(df: pd.DataFrame) -> pd.Series:
+    """
+    Hash nội dung từng dòng (không tính index).
+
+    Cột số được đưa về float trước khi hash: cột int thành float vì có thêm 1 ô trống
+    (1 -> 1.0) thì các dòng khác vẫn giữ nguyên hash
+    """
+    if df.empty:
+        return pd.Series([], dtype="uint64")
+    normalized = df.astype(str)
+    for position, dtype in enumerate(df.dtypes):
+        if pd.api.types.is_numeric_dtype(dtype):
+            normalized.isetitem(position, df.iloc[:, position].astype("float64"))
+    return pd.util.hash_pandas_object(normalized, index=False)
+
+
+class TicketModel:
+    """Cache các workbook nguồn theo mtime + danh sách dòng thay đổi so với lần load trước"""
+
+    def __init__(self):
+        self._books: Dict[str, _Workbook] = {}
+        # File được daemon theo dõi: chỉ load lại khi gọi refresh()/refresh_all(), để mọi
+        # luật trong cùng 1 vòng xét cùng 1 phiên bản dữ liệu. File khác tự load lại khi đọc
+        self._pinned: Set[str] = set()
+        self._lock = threading.RLock()
+
+    def pin(self, paths: Iterable[str]) -> None:
+        with self._lock:
+            self._pinned.update(os.path.abspath(path) for path in paths)
+
+    @staticmethod
+    def _version(path: str) -> Tuple[int, int]:
+        stat = os.stat(path)
+        return stat.st_size, stat.st_mtime_ns
+
+    def refresh(self, path: str) -> bool:
+        """Parse lại workbook nếu file đã thay đổi. Trả về True nếu có load mới"""
+        key = os.path.abspath(path)
+        version = self._version(key)
+        with self._lock:
+            book = self._books.get(key)
+            if book is not None and book.version == version:
+                return False
+
+            sheets = pd.read_excel(key, sheet_name=None)
+            new_book = _Workbook(version, sheets)
+            for sheet_name, df in sheets.items():
+                hashes = _row_hashes(df)
+                new_book.hashes[sheet_name] = hashes
+                previous = book.hashes.get(sheet_name) if book is not None else None
+                if previous is None:
+                    new_book.changed[sheet_name] = pd.Series(True, index=df.index)
+                else:
+                    new_book.changed[sheet_name] = pd.Series(~hashes.isin(previous).to_numpy(), index=df.index)
+            self._books[key] = new_book
+            return True
+
+    def refresh_all(self, paths: Iterable[str]) -> List[str]:
+        """Refresh các file đang tồn tại, trả về danh sách file vừa được load lại"""
+        return [path for path in paths if os.path.exists(path) and self.refresh(path)]
+
+    def _book(self, path: str) -> _Workbook:
+        key = os.path.abspath(path)
+        if key not in self._pinned or key not in self._books:
+            self.refresh(key)
+        return self._books[key]
+
+    def sheet_names(self, path: str) -> List[str]:
+        return list(self._book(path).sheets)
+
+    def read_sheet(self, path: str, sheet_name=0, changed_only: bool = False) -> pd.DataFrame:
+        """
+        Thay cho pd.read_excel(path, sheet_name=...): trả về bản copy của sheet.
+
+        changed_only=True chỉ trả về các dòng mới/thay đổi so với lần load trước.
+        Sheet không tồn tại -> ValueError giống pd.read_excel.
+        """
+        with self._lock:
+            book = self._book(path)
+            if isinstance(sheet_name, int):
+                sheet_name = list(book.sheets)[sheet_name]
+            if sheet_name not in book.sheets:
+                raise ValueError(f"Worksheet named '{sheet_name}' not found")
+            df = book.sheets[sheet_name]
+            if changed_only:
+                df = df[book.changed[sheet_name].to_numpy()]
+            return df.copy()
+
+    def changed_count(self, path: str) -> Dict[str, int]:
+        """Số dòng mới/thay đổi của từng sheet ở lần load gần nhất"""
+        with self._lock:
+            book = self._books.get(os.path.abspath(path))
+            if book is None:
+                return {}
+            return {name: int(mask.sum()) for name, mask in book.changed.items()}
+
+
+_default_model: Optional[TicketModel] = None
+_default_lock = threading.Lock()
+
+
+def get_ticket_model() -> TicketModel:
+    """Mô hình dùng chung trong process (mọi luật cảnh báo đọc từ đây)"""
+    global _default_model
+    with _default_lock:
+        if _default_model is None:
+            _default_model = TicketModel()
+        return _default_model
+
+
+def read_sheet(path: str, sheet_name=0, changed_only: bool = False) -> pd.DataFrame:
+    return get_ticket_model().read_sheet(path, sheet_name, changed_only)
@@ -0,0 +1,303 @@
+# -*- coding: utf-8 -*-
+"""
+Engine giảm trừ dùng chung cho exclusion_process, exclusion_process_hni và exclusion_processor_v2
+
+Chức năng:
+- load_detail: đọc sheet dữ liệu chi tiết (SM4-C11, SM2-C11, SM1/SM2-C12, C1.4, C1.5)
+  một lần mỗi process; các create_*_comparison_report dùng chung bản đã đọc
+- normalize_id_series / extract_nvkt_series: chuẩn hóa mã phiếu và tên NVKT theo cả cột
+- group_stats / compare_stats: thống kê trước/sau giảm trừ theo nhóm (Tổ, NVKT) bằng
+  một lần groupby().agg, áp danh sách giảm trừ bằng isin trên cột ID đã chuẩn hóa
+- unit_stats: thống kê theo đơn vị (Tổ) + dòng tổng TTVT
+
+Cơ chế giảm trừ (policy):
+- POLICY_REMOVE: loại phiếu giảm trừ khỏi cả tử số và mẫu số
+- POLICY_KEEP_DENOMINATOR: giữ nguyên mẫu số, cộng phiếu KHÔNG ĐẠT bị giảm trừ vào
+  tử số (không vượt quá tổng) - cách tính của exclusion_process
+- POLICY_HNI: giữ nguyên mẫu số, tử số = đạt gốc + phiếu GT không đạt, có thêm cột
+  'Số phiếu GT' - cách tính của exclusion_process_hni / exclusion_processor_v2
+"""
+
+import os
+import re
+
+import pandas as pd
+
+from api_transition.excel_cache import read_excel
+
+
+POLICY_REMOVE = "remove"
+POLICY_KEEP_DENOMINATOR = "keep_denominator"
+POLICY_HNI = "hni"
+POLICIES = (POLICY_REMOVE, POLICY_KEEP_DENOMINATOR, POLICY_HNI)
+
+TOTAL_LABEL = 'TTVT Sơn Tây'
+
+# (đường dẫn tuyệt đối, sheet) -> ((size, mtime_ns), DataFrame)
+_DETAIL_CACHE = {}
+
+
+def normalize_id(id_val):
+    """
+    Chuẩn hóa BAOHONG_ID:
+    - Chuyển về string
+    - Loại bỏ ký tự lạ _x000d_, _x000D_ (carriage return từ Excel), khoảng trắng, xuống dòng
+    - Loại bỏ hậu tố .0 nếu có (do pandas đọc nhầm thành float)
+    """
+    if pd.isna(id_val):
+        return ""
+
+    # Chuyển về string và loại bỏ khoảng trắng
+    s = str(id_val).strip()
+
+    # Loại bỏ _x000d_ và _x000D_ (case-insensitive) - đây là ký tự carriage return từ Excel
+    s = re.sub(r'_x000[dD]_', '', s).strip()
+
+    # Loại bỏ các ký tự điều khiển khác
+    s = re.sub(r'[\r\n\t]', '', s)
+
+    # Loại bỏ .0 nếu là số
+    if s.endswith('.0'):
+        s = s[:-2]
+
+    return s
+
+
+def normalize_id_series(ids):
+    """normalize_id cho cả cột (kết quả giống apply(normalize_id), ô trống -> "")"""
+    missing = ids.isna()
+    s = ids.astype(str).str.strip()
+    s = s.str.replace(r'_x000[dD]_', '', regex=True).str.strip()
+    s = s.str.replace(r'[\r\n\t]', '', regex=True)
+    s = s.where(~s.str.endswith('.0'), s.str[:-2])
+    return s.where(~missing, "")
+
+
+def normalize_id_set(ids):
+    """Tập ID đã chuẩn hóa (bỏ ô trống) từ 1 cột danh sách giảm trừ"""
+    exclusion_ids = set(normalize_id_series(ids[ids.notna()]))
+    exclusion_ids.discard("")
+    return exclusion_ids
+
+
+def extract_nvkt_name(ten_kv):
+    """
+    Trích xuất tên NVKT từ cột TEN_KV
+    Ví dụ:
+    - Sơn Lộc 1 - Nguyễn Thành Sơn -> Nguyễn Thành Sơn
+    - VNM3-Khuất Anh Chiến( VXN) -> Khuất Anh Chiến
+    """
+    if pd.isna(ten_kv):
+        return None
+
+    ten_kv = str(ten_kv).strip()
+
+    # Trường hợp có dấu "-"
+    if '-' in ten_kv:
+        parts = ten_kv.split('-')
+        nvkt_name = parts[-1].strip()
+    else:
+        nvkt_name = ten_kv
+
+    # Loại bỏ phần trong ngoặc đơn
+    if '(' in nvkt_name:
+        nvkt_name = nvkt_name.split('(')[0].strip()
+
+    return nvkt_name
+
+
+def extract_nvkt_series(ten_kv):
+    """extract_nvkt_name cho cả cột (kết quả giống apply(extract_nvkt_name), ô trống -> NaN)"""
+    missing = ten_kv.isna()
+    s = ten_kv.astype(str).str.strip()
+    s = s.str.replace(r'(?s)^.*-', '', regex=True).str.strip()
+    s = s.str.replace(r'(?s)\(.*$', '', regex=True).str.strip()
+    return s.where(~missing)
+
+
+def load_detail(path, sheet_name='Sheet1'):
+    """
+    Đọc 1 sheet dữ liệu chi tiết, nhớ kết quả trong process.
+
+    Nhiều báo cáo so sánh cùng đọc SM1/SM2-C12, C1.4... nên chỉ đọc file 1 lần; file
+    bị ghi đè (đổi size/mtime) thì đọc lại. Trả về bản copy để nơi gọi tự do sửa cột.
+    """
+    key = (os.path.abspath(path), sheet_name)
+    stat = os.stat(path)
+    version = (stat.st_size, stat.st_mtime_ns)
+    cached = _DETAIL_CACHE.get(key)
+    if cached is None or cached[0] != version:
+        cached = (version, read_excel(path, sheet_name=sheet_name))
+        _DETAIL_CACHE[key] = cached
+    return cached[1].copy()
+
+
+def clear_detail_cache():
+    """Xóa các sheet chi tiết đã nhớ (giải phóng bộ nhớ sau khi tạo xong báo cáo)"""
+    _DETAIL_CACHE.clear()
+
+
+def _percent(numerators, denominators, empty=0):
+    """Tỷ lệ % làm tròn 2 chữ số bằng round() như các bản báo cáo cũ (mẫu số 0 -> empty)"""
+    return [
+        round((num / den * 100), 2) if den > 0 else empty
+        for num, den in zip(numerators, denominators)
+    ]
+
+
+def _aggregate(df, group_columns, dat_column, dat_value, exclusion_ids, id_column):
+    """Đếm tổng/đạt/GT theo nhóm trong 1 lần groupby().agg"""
+    group_columns = list(group_columns)
+    is_dat = df[dat_column] == dat_value
+    if exclusion_ids:
+        is_gt = df[id_column].isin(exclusion_ids)
+    else:
+        is_gt = pd.Series(False, index=df.index)
+    flags = df[group_columns].assign(
+        _dat=is_dat,
+        _gt=is_gt,
+        _gt_dat=is_gt & is_dat,
+        _gt_khong_dat=is_gt & ~is_dat,
+    )
+    counts = flags.groupby(group_columns).agg(
+        tong=('_dat', 'size'),
+        dat=('_dat', 'sum'),
+        gt=('_gt', 'sum'),
+        gt_dat=('_gt_dat', 'sum'),
+        gt_khong_dat=('_gt_khong_dat', 'sum'),
+    )
+    return counts.reset_index()
+
+
+def _stats_frame(counts, group_columns, tong, dat, gt=None):
+    stats = counts[list(group_columns)].copy()
+    stats['Tổng phiếu'] = tong.astype('int64')
+    stats['Số phiếu đạt'] = dat.astype('int64')
+    if gt is not None:
+        stats['Số phiếu GT'] = gt.astype('int64')
+    stats['Tỷ lệ %'] = _percent(stats['Số phiếu đạt'], stats['Tổng phiếu'])
+    return stats
+
+
+def _after_stats(counts, group_columns, policy):
+    if policy == POLICY_REMOVE:
+        stats = _stats_frame(counts, group_columns, counts['tong'] - counts['gt'], counts['dat'] - counts['gt_dat'])
+        # Nhóm chỉ gồm phiếu bị loại trừ thì không còn trong thống kê sau GT
+        return stats[stats['Tổng phiếu'] > 0].reset_index(drop=True)
+    if policy == POLICY_KEEP_DENOMINATOR:
+        dat = (counts['dat'] + counts['gt_khong_dat']).clip(upper=counts['tong'])
+        return _stats_frame(counts, group_columns, counts['tong'], dat)
+    if policy == POLICY_HNI:
+        return _stats_frame(
+            counts, group_columns, counts['tong'], counts['dat'] + counts['gt_khong_dat'], counts['gt_khong_dat']
+        )
+    raise ValueError(f"Cơ chế giảm trừ không hợp lệ: {policy!r} (hợp lệ: {', '.join(POLICIES)})")
+
+
+def group_stats(df, group_columns=('TEN_DOI', 'NVKT'), dat_column='DAT_TT_KO_HEN', dat_value=1,
+                exclusion_ids=None, policy=None, id_column='BAOHONG_ID_STR'):
+    """
+    Thống kê theo nhóm: group_columns + 'Tổng phiếu', 'Số phiếu đạt', ['Số phiếu GT'], 'Tỷ lệ %'
+
+    Args:
+        df: DataFrame dữ liệu thô (đã có cột NVKT, và cột id_column nếu có giảm trừ)
+        group_columns: Cột nhóm, ví dụ ['TEN_DOI', 'NVKT'] hoặc ['NVKT']
+        dat_column, dat_value: Phiếu đạt là phiếu có df[dat_column] == dat_value
+        exclusion_ids: Set mã phiếu giảm trừ (đã chuẩn hóa)
+        policy: None = thống kê thô, hoặc một trong POLICIES
+        id_column: Cột mã phiếu đã chuẩn hóa để so với exclusion_ids
+
+    Returns:
+        DataFrame, các nhóm sắp xếp theo group_columns
+    """
+    counts = _aggregate(df, group_columns, dat_column, dat_value, exclusion_ids, id_column)
+    if policy is None:
+        return _stats_frame(counts, group_columns, counts['tong'], counts['dat'])
+    return _after_stats(counts, group_columns, policy)
+
+
+def calculate_statistics(df, has_ten_doi=True, dat_column='DAT_TT_KO_HEN', dat_value=1):
+    """
+    Tính toán thống kê theo TEN_DOI và NVKT
+
+    Args:
+        df: DataFrame đã được xử lý với cột NVKT
+        has_ten_doi: Có cột TEN_DOI hay không
+        dat_column: Tên cột để xác định phiếu đạt
+        dat_value: Giá trị để xác định phiếu đạt
+
+    Returns:
+        DataFrame với thống kê
+    """
+    group_columns = ['TEN_DOI', 'NVKT'] if has_ten_doi else ['NVKT']
+    return group_stats(df, group_columns, dat_column, dat_value)
+
+
+def compare_stats(df, exclusion_ids, policy, group_columns=('TEN_DOI', 'NVKT'),
+                  dat_column='DAT_TT_KO_HEN', dat_value=1, id_column='BAOHONG_ID_STR'):
+    """Thống kê (trước, sau) giảm trừ theo policy từ cùng 1 lần groupby().agg"""
+    counts = _aggregate(df, group_columns, dat_column, dat_value, exclusion_ids, id_column)
+    before = _stats_frame(counts, group_columns, counts['tong'], counts['dat'])
+    return before, _after_stats(counts, group_columns, policy)
+
+
+def unit_stats(df_before, df_after, short_names=None, policy=None, ten_doi_col='TEN_DOI',
+               tong_col='Tổng phiếu', dat_col='Số phiếu đạt', total_label=TOTAL_LABEL):
+    """
+    Thống kê theo từng đơn vị (Tổ) trước và sau giảm trừ + dòng tổng TTVT
+
+    Với POLICY_HNI: Tổng phiếu (Sau GT) = Tổng phiếu (Thô), cột 'Phiếu GT (KĐ→Đ)' thay cho
+    'Phiếu loại trừ' (lấy từ cột 'Số phiếu GT' của df_after nếu có).
+
+    Args:
+        df_before, df_after: Thống kê TRƯỚC/SAU giảm trừ (nhóm theo NVKT)
+        short_names: Mapping tên Tổ -> tên ngắn hiển thị
+        ten_doi_col, tong_col, dat_col: Tên cột đơn vị, tổng phiếu, số phiếu đạt
+
+    Returns:
+        DataFrame với thống kê theo từng đơn vị + dòng tổng TTVT
+    """
+    short_names = short_names or {}
+    hni = policy == POLICY_HNI
+    gt_col = 'Số phiếu GT'
+    has_gt = hni and gt_col in df_after.columns
+
+    names = []
+    tong_tho, tong_sau, dat_tho, dat_sau, so_gt = [], [], [], [], []
+
+    if ten_doi_col in df_before.columns:
+        after_cols = [tong_col, dat_col] + ([gt_col] if has_gt else [])
+        unit_before = df_before.groupby(ten_doi_col)[[tong_col, dat_col]].sum()
+        unit_after = df_after.groupby(ten_doi_col)[after_cols].sum()
+        units = unit_before.join(unit_after, how='outer', lsuffix=' (Thô)', rsuffix=' (Sau GT)').fillna(0)
+
+        names = [short_names.get(ten_doi, ten_doi) for ten_doi in units.index]
+        tong_tho = units[f'{tong_col} (Thô)'].tolist()
+        tong_sau = tong_tho if hni else units[f'{tong_col} (Sau GT)'].tolist()
+        dat_tho = units[f'{dat_col} (Thô)'].tolist()
+        dat_sau = units[f'{dat_col} (Sau GT)'].tolist()
+        so_gt = units[gt_col].tolist() if has_gt else [0] * len(units)
+
+    tong_tho_all = df_before[tong_col].sum()
+    names = names + [total_label]
+    tong_tho = tong_tho + [tong_tho_all]
+    tong_sau = tong_sau + [tong_tho_all if hni else df_after[tong_col].sum()]
+    dat_tho = dat_tho + [df_before[dat_col].sum()]
+    dat_sau = dat_sau + [df_after[dat_col].sum()]
+    so_gt = so_gt + [df_after[gt_col].sum() if has_gt else 0]
+
+    tyle_tho = _percent(dat_tho, tong_tho)
+    tyle_sau = _percent(dat_sau, tong_sau)
+
+    result = pd.DataFrame({'Đơn vị': names, 'Tổng phiếu (Thô)': [int(v) for v in tong_tho]})
+    if hni:
+        result['Phiếu GT (KĐ→Đ)'] = [int(v) for v in so_gt]
+    else:
+        result['Phiếu loại trừ'] = [int(t - s) for t, s in zip(tong_tho, tong_sau)]
+    result['Tổng phiếu (Sau GT)'] = [int(v) for v in tong_sau]
+    result['Phiếu đạt (Thô)'] = [int(v) for v in dat_tho]
+    result['Phiếu đạt (Sau GT)'] = [int(v) for v in dat_sau]
+    result['Tỷ lệ % (Thô)'] = tyle_tho
+    result['Tỷ lệ % (Sau GT)'] = tyle_sau
+    result['Thay đổi %'] = [round(sau - tho, 2) for tho, sau in zip(tyle_tho, tyle_sau)]
+    return result
@@ -11,146 +11,38 @@ Chức năng:
 import pandas as pd
 import os
 from datetime import datetime
-import re
 from pathlib import Path
 
+from api_transition.chart_cache import prune_stale_charts
+from api_transition.excel_cache import read_excel
+import exclusion_engine
+from exclusion_engine import (
+    POLICY_KEEP_DENOMINATOR,
+    compare_stats, group_stats, unit_stats, load_detail,
+    extract_nvkt_series, normalize_id_series, normalize_id_set,
+)
+
 import kpi_calculator
 from kpi_calculator import (
     tinh_diem_kpi_nvkt, 
     tinh_diem_kpi_nvkt_sau_giam_tru,
+)
+from kpi_scoring import (
     tinh_diem_C11_TP1, tinh_diem_C11_TP2,
     tinh_diem_C12_TP1, tinh_diem_C12_TP2,
-    tinh_diem_C14, tinh_diem_C15
+    tinh_diem_C14, tinh_diem_C15,
+    chuan_hoa_ty_le, tinh_diem_bsc,
 )
 import report_generator
 
 
-def normalize_id(id_val):
-    """
-    Chuẩn hóa BAOHONG_ID:
-    - Chuyển về string
-    - Loại bỏ ký tự lạ _x000d_, _x000D_ (carriage return từ Excel), khoảng trắng, xuống dòng
-    - Loại bỏ hậu tố .0 nếu có (do pandas đọc nhầm thành float)
-    """
-    if pd.isna(id_val):
-        return ""
-    
-    # Chuyển về string và loại bỏ khoảng trắng
-    s = str(id_val).strip()
-    
-    # Loại bỏ _x000d_ và _x000D_ (case-insensitive) - đây là ký tự carriage return từ Excel
-    s = re.sub(r'_x000[dD]_', '', s).strip()
-    
-    # Loại bỏ các ký tự điều khiển khác
-    s = re.sub(r'[\r\n\t]', '', s)
-    
-    # Loại bỏ .0 nếu là số
-    if s.endswith('.0'):
-        s = s[:-2]
-        
-    return s
-
-
-def tinh_diem_C11_TP1(kq):
-    """
-    Tính điểm C1.1 Thành phần 1 (30%): Tỷ lệ sửa chữa phiếu chất lượng chủ động
-    
-    Args:
-        kq: Tỷ lệ sửa chữa chủ động (dạng phần trăm, vd: 98 = 98%)
-    
-    Returns:
-        Điểm từ 1-5
-    """
-    if pd.isna(kq) or kq is None:
-        return 5  # Không có dữ liệu = không có phiếu cần sửa = tốt
-    
-    # Chuyển về dạng thập phân (98% -> 0.98)
-    kq_decimal = kq / 100 if kq > 1 else kq
-    
-    if kq_decimal >= 0.99:
-        return 5
-    elif kq_decimal > 0.96:
-        return 1 + 4 * (kq_decimal - 0.96) / 0.03
-    else:
-        return 1
-
-
-def tinh_diem_C11_TP2(kq):
-    """
-    Tính điểm C1.1 Thành phần 2 (70%): Tỷ lệ sửa chữa báo hỏng đúng quy định (không tính hẹn)
-    
-    Args:
-        kq: Tỷ lệ sửa chữa báo hỏng đúng quy định (dạng phần trăm, vd: 85 = 85%)
-    
-    Returns:
-        Điểm từ 1-5
-    """
-    if pd.isna(kq) or kq is None:
-        return 5  # Không có dữ liệu = không có phiếu báo hỏng = tốt
-    
-    # Chuyển về dạng thập phân (85% -> 0.85)
-    kq_decimal = kq / 100 if kq > 1 else kq
-    
-    if kq_decimal >= 0.85:
-        return 5
-    elif kq_decimal >= 0.82:
-        return 4 + (kq_decimal - 0.82) / 0.03
-    elif kq_decimal >= 0.79:
-        return 3 + (kq_decimal - 0.79) / 0.03
-    elif kq_decimal >= 0.76:
-        return 2
-    else:
-        return 1
-
-
-def tinh_diem_C12_TP1(kq):
-    """
-    Tính điểm C1.2 Thành phần 1 (50%): Tỷ lệ thuê bao báo hỏng lặp lại
-    LƯU Ý: Càng thấp càng tốt
-    
-    Args:
-        kq: Tỷ lệ báo hỏng lặp lại (dạng phần trăm, vd: 2.5 = 2.5%)
-    
-    Returns:
-        Điểm từ 1-5
-    """
-    if pd.isna(kq) or kq is None:
-        return 5  # Không có dữ liệu = không có hỏng lặp lại = tốt
-    
-    # Chuyển về dạng thập phân (2.5% -> 0.025)
-    kq_decimal = kq / 100 if kq > 1 else kq
-    
-    if kq_decimal <= 0.025:
-        return 5
-    elif kq_decimal < 0.04:
-        return 5 - 4 * (kq_decimal - 0.025) / 0.015
-    else:
-        return 1
-
-
-def tinh_diem_C12_TP2(kq):
-    """
-    Tính điểm C1.2 Thành phần 2 (50%): Tỷ lệ sự cố dịch vụ BRCĐ
-    LƯU Ý: Càng thấp càng tốt
-    
-    Args:
-        kq: Tỷ lệ sự cố dịch vụ BRCĐ (dạng phần trăm, vd: 2.0 = 2.0%)
-    
-    Returns:
-        Điểm từ 1-5
-    """
-    if pd.isna(kq) or kq is None:
-        return 5  # Không có dữ liệu = không có sự cố = tốt
-    
-    # Chuyển về dạng thập phân (2.0% -> 0.02)
-    kq_decimal = kq / 100 if kq > 1 else kq
-    
-    if kq_decimal <= 0.02:
-        return 5
-    elif kq_decimal < 0.03:
-        return 5 - 4 * (kq_decimal - 0.02) / 0.01
-    else:
-        return 1
+# Mapping tên đội ngắn
+TEAM_SHORT_NAMES = {
+    'Tổ Kỹ thuật địa bàn Phúc Thọ': 'Phúc Thọ',
+    'Tổ Kỹ thuật địa bàn Quảng Oai': 'Quảng Oai',
+    'Tổ Kỹ thuật địa bàn Suối Hai': 'Suối Hai',
+    'Tổ Kỹ thuật địa bàn Sơn Tây': 'Sơn Tây',
+}
 
 
 def add_bsc_scores_to_c12_tp2(file_path):
@@ -177,11 +69,11 @@ def add_bsc_scores_to_c12_tp2(file_path):
         # XỬ LÝ SHEET 1: So_sanh_chi_tiet
         if 'So_sanh_chi_tiet' in excel_file.sheet_names:
             print("✓ Đang xử lý sheet: So_sanh_chi_tiet")
-            df = pd.read_excel(file_path, sheet_name='So_sanh_chi_tiet')
+            df = read_excel(file_path, sheet_name='So_sanh_chi_tiet')
             
             # Tính điểm BSC - LƯU Ý: Dùng tỷ lệ báo hỏng
-            df['Điểm BSC (Thô)'] = df['Tỷ lệ báo hỏng (%) (Thô)'].apply(tinh_diem_C12_TP2).round(2)
-            df['Điểm BSC (Sau GT)'] = df['Tỷ lệ báo hỏng (%) (Sau GT)'].apply(tinh_diem_C12_TP2).round(2)
+            df['Điểm BSC (Thô)'] = tinh_diem_bsc('C12_TP2', df['Tỷ lệ báo hỏng (%) (Thô)'], chuan_hoa=True).round(2)
+            df['Điểm BSC (Sau GT)'] = tinh_diem_bsc('C12_TP2', df['Tỷ lệ báo hỏng (%) (Sau GT)'], chuan_hoa=True).round(2)
             df['Chênh lệch Điểm'] = (df['Điểm BSC (Sau GT)'] - df['Điểm BSC (Thô)']).round(2)
             
             # Sắp xếp lại cột
@@ -198,11 +90,11 @@ def add_bsc_scores_to_c12_tp2(file_path):
         # XỬ LÝ SHEET 2: Thong_ke_theo_don_vi
         if 'Thong_ke_theo_don_vi' in excel_file.sheet_names:
             print("✓ Đang xử lý sheet: Thong_ke_theo_don_vi")
-            df = pd.read_excel(file_path, sheet_name='Thong_ke_theo_don_vi')
+            df = read_excel(file_path, sheet_name='Thong_ke_theo_don_vi')
             
             # Tính điểm BSC - LƯU Ý: Dùng tỷ lệ báo hỏng
-            df['Điểm BSC (Thô)'] = df['Tỷ lệ báo hỏng % (Thô)'].apply(tinh_diem_C12_TP2).round(2)
-            df['Điểm BSC (Sau GT)'] = df['Tỷ lệ báo hỏng % (Sau GT)'].apply(tinh_diem_C12_TP2).round(2)
+            df['Điểm BSC (Thô)'] = tinh_diem_bsc('C12_TP2', df['Tỷ lệ báo hỏng % (Thô)'], chuan_hoa=True).round(2)
+            df['Điểm BSC (Sau GT)'] = tinh_diem_bsc('C12_TP2', df['Tỷ lệ báo hỏng % (Sau GT)'], chuan_hoa=True).round(2)
             df['Chênh lệch Điểm'] = (df['Điểm BSC (Sau GT)'] - df['Điểm BSC (Thô)']).round(2)
             
             # Sắp xếp lại cột
@@ -219,7 +111,7 @@ def add_bsc_scores_to_c12_tp2(file_path):
         # Giữ nguyên các sheet khác
         for sheet_name in excel_file.sheet_names:
             if sheet_name not in all_sheets:
-                all_sheets[sheet_name] = pd.read_excel(file_path, sheet_name=sheet_name)
+                all_sheets[sheet_name] = read_excel(file_path, sheet_name=sheet_name)
         
         # Ghi lại file
         with pd.ExcelWriter(file_path, engine='openpyxl') as writer:
@@ -234,54 +126,6 @@ def add_bsc_scores_to_c12_tp2(file_path):
         traceback.print_exc()
 
 
-def tinh_diem_C14(kq):
-    """
-    Tính điểm C1.4: Độ hài lòng của khách hàng sau lắp đặt và sửa chữa
-    
-    Args:
-        kq: Độ hài lòng khách hàng (dạng phần trăm, vd: 99.5 = 99.5%)
-    
-    Returns:
-        Điểm từ 1-5
-    """
-    if pd.isna(kq) or kq is None:
-        return pd.NA  # Không có dữ liệu
-    
-    # Chuyển về dạng thập phân (99.5% -> 0.995)
-    kq_decimal = kq / 100 if kq > 1 else kq
-    
-    if kq_decimal >= 0.995:
-        return 5
-    elif kq_decimal > 0.95:
-        return 1 + 4 * (kq_decimal - 0.95) / 0.045
-    else:
-        return 1
-
-
-def tinh_diem_C15(kq):
-    """
-    Tính điểm C1.5: Tỉ lệ thiết lập dịch vụ đạt thời gian quy định
-    
-    Args:
-        kq: Tỉ lệ thiết lập dịch vụ đạt (dạng phần trăm, vd: 99.5 = 99.5%)
-    
-    Returns:
-        Điểm từ 1-5
-    """
-    if pd.isna(kq) or kq is None:
-        return pd.NA  # Không có dữ liệu
-    
-    # Chuyển về dạng thập phân (99.5% -> 0.995)
-    kq_decimal = kq / 100 if kq > 1 else kq
-    
-    if kq_decimal >= 0.995:
-        return 5
-    elif kq_decimal > 0.895:
-        return 1 + 4 * (kq_decimal - 0.895) / 0.10
-    else:
-        return 1
-
-
 def add_bsc_scores_to_c15(file_path):
     """
     Thêm cột Điểm BSC vào file So_sanh_C15.xlsx
@@ -306,11 +150,11 @@ def add_bsc_scores_to_c15(file_path):
         # XỬ LÝ SHEET 1: So_sanh_chi_tiet
         if 'So_sanh_chi_tiet' in excel_file.sheet_names:
             print("✓ Đang xử lý sheet: So_sanh_chi_tiet")
-            df = pd.read_excel(file_path, sheet_name='So_sanh_chi_tiet')
+            df = read_excel(file_path, sheet_name='So_sanh_chi_tiet')
             
             # Tính điểm BSC
-            df['Điểm BSC (Thô)'] = df['Tỷ lệ đạt (%) (Thô)'].apply(tinh_diem_C15).round(2)
-            df['Điểm BSC (Sau GT)'] = df['Tỷ lệ đạt (%) (Sau GT)'].apply(tinh_diem_C15).round(2)
+            df['Điểm BSC (Thô)'] = tinh_diem_bsc('C15', df['Tỷ lệ đạt (%) (Thô)'], chuan_hoa=True).round(2)
+            df['Điểm BSC (Sau GT)'] = tinh_diem_bsc('C15', df['Tỷ lệ đạt (%) (Sau GT)'], chuan_hoa=True).round(2)
             df['Chênh lệch Điểm'] = (df['Điểm BSC (Sau GT)'] - df['Điểm BSC (Thô)']).round(2)
             
             # Sắp xếp lại cột
@@ -327,11 +171,11 @@ def add_bsc_scores_to_c15(file_path):
         # XỬ LÝ SHEET 2: Thong_ke_theo_don_vi
         if 'Thong_ke_theo_don_vi' in excel_file.sheet_names:
             print("✓ Đang xử lý sheet: Thong_ke_theo_don_vi")
-            df = pd.read_excel(file_path, sheet_name='Thong_ke_theo_don_vi')
+            df = read_excel(file_path, sheet_name='Thong_ke_theo_don_vi')
             
             # Tính điểm BSC
-            df['Điểm BSC (Thô)'] = df['Tỷ lệ đạt % (Thô)'].apply(tinh_diem_C15).round(2)
-            df['Điểm BSC (Sau GT)'] = df['Tỷ lệ đạt % (Sau GT)'].apply(tinh_diem_C15).round(2)
+            df['Điểm BSC (Thô)'] = tinh_diem_bsc('C15', df['Tỷ lệ đạt % (Thô)'], chuan_hoa=True).round(2)
+            df['Điểm BSC (Sau GT)'] = tinh_diem_bsc('C15', df['Tỷ lệ đạt % (Sau GT)'], chuan_hoa=True).round(2)
             df['Chênh lệch Điểm'] = (df['Điểm BSC (Sau GT)'] - df['Điểm BSC (Thô)']).round(2)
             
             # Sắp xếp lại cột
@@ -348,7 +192,7 @@ def add_bsc_scores_to_c15(file_path):
         # Giữ nguyên các sheet khác
         for sheet_name in excel_file.sheet_names:
             if sheet_name not in all_sheets:
-                all_sheets[sheet_name] = pd.read_excel(file_path, sheet_name=sheet_name)
+                all_sheets[sheet_name] = read_excel(file_path, sheet_name=sheet_name)
         
         # Ghi lại file
         with pd.ExcelWriter(file_path, engine='openpyxl') as writer:
@@ -387,11 +231,11 @@ def add_bsc_scores_to_c14(file_path):
         # XỬ LÝ SHEET 1: So_sanh_chi_tiet
         if 'So_sanh_chi_tiet' in excel_file.sheet_names:
             print("✓ Đang xử lý sheet: So_sanh_chi_tiet")
-            df = pd.read_excel(file_path, sheet_name='So_sanh_chi_tiet')
+            df = read_excel(file_path, sheet_name='So_sanh_chi_tiet')
             
             # Tính điểm BSC - LƯU Ý: Dùng tỷ lệ hài lòng
-            df['Điểm BSC (Thô)'] = df['Tỷ lệ HL (%) (Thô)'].apply(tinh_diem_C14).round(2)
-            df['Điểm BSC (Sau GT)'] = df['Tỷ lệ HL (%) (Sau GT)'].apply(tinh_diem_C14).round(2)
+            df['Điểm BSC (Thô)'] = tinh_diem_bsc('C14', df['Tỷ lệ HL (%) (Thô)'], chuan_hoa=True).round(2)
+            df['Điểm BSC (Sau GT)'] = tinh_diem_bsc('C14', df['Tỷ lệ HL (%) (Sau GT)'], chuan_hoa=True).round(2)
             df['Chênh lệch Điểm'] = (df['Điểm BSC (Sau GT)'] - df['Điểm BSC (Thô)']).round(2)
             
             # Sắp xếp lại cột
@@ -408,11 +252,11 @@ def add_bsc_scores_to_c14(file_path):
         # XỬ LÝ SHEET 2: Thong_ke_theo_don_vi
         if 'Thong_ke_theo_don_vi' in excel_file.sheet_names:
             print("✓ Đang xử lý sheet: Thong_ke_theo_don_vi")
-            df = pd.read_excel(file_path, sheet_name='Thong_ke_theo_don_vi')
+            df = read_excel(file_path, sheet_name='Thong_ke_theo_don_vi')
             
             # Tính điểm BSC - LƯU Ý: Dùng tỷ lệ hài lòng
-            df['Điểm BSC (Thô)'] = df['Tỷ lệ HL % (Thô)'].apply(tinh_diem_C14).round(2)
-            df['Điểm BSC (Sau GT)'] = df['Tỷ lệ HL % (Sau GT)'].apply(tinh_diem_C14).round(2)
+            df['Điểm BSC (Thô)'] = tinh_diem_bsc('C14', df['Tỷ lệ HL % (Thô)'], chuan_hoa=True).round(2)
+            df['Điểm BSC (Sau GT)'] = tinh_diem_bsc('C14', df['Tỷ lệ HL % (Sau GT)'], chuan_hoa=True).round(2)
             df['Chênh lệch Điểm'] = (df['Điểm BSC (Sau GT)'] - df['Điểm BSC (Thô)']).round(2)
             
             # Sắp xếp lại cột
@@ -429,7 +273,7 @@ def add_bsc_scores_to_c14(file_path):
         # Giữ nguyên các sheet khác
         for sheet_name in excel_file.sheet_names:
             if sheet_name not in all_sheets:
-                all_sheets[sheet_name] = pd.read_excel(file_path, sheet_name=sheet_name)
+                all_sheets[sheet_name] = read_excel(file_path, sheet_name=sheet_name)
         
         # Ghi lại file
         with pd.ExcelWriter(file_path, engine='openpyxl') as writer:
@@ -468,11 +312,11 @@ def add_bsc_scores_to_c12_sm1(file_path):
         # XỬ LÝ SHEET 1: So_sanh_chi_tiet
         if 'So_sanh_chi_tiet' in excel_file.sheet_names:
             print("✓ Đang xử lý sheet: So_sanh_chi_tiet")
-            df = pd.read_excel(file_path, sheet_name='So_sanh_chi_tiet')
+            df = read_excel(file_path, sheet_name='So_sanh_chi_tiet')
             
             # Tính điểm BSC - LƯU Ý: Dùng tỷ lệ HLL
-            df['Điểm BSC (Thô)'] = df['Tỷ lệ HLL % (Thô)'].apply(tinh_diem_C12_TP1).round(2)
-            df['Điểm BSC (Sau GT)'] = df['Tỷ lệ HLL % (Sau GT)'].apply(tinh_diem_C12_TP1).round(2)
+            df['Điểm BSC (Thô)'] = tinh_diem_bsc('C12_TP1', df['Tỷ lệ HLL % (Thô)'], chuan_hoa=True).round(2)
+            df['Điểm BSC (Sau GT)'] = tinh_diem_bsc('C12_TP1', df['Tỷ lệ HLL % (Sau GT)'], chuan_hoa=True).round(2)
             df['Chênh lệch Điểm'] = (df['Điểm BSC (Sau GT)'] - df['Điểm BSC (Thô)']).round(2)
             
             # Sắp xếp lại cột
@@ -489,11 +333,11 @@ def add_bsc_scores_to_c12_sm1(file_path):
         # XỬ LÝ SHEET 2: Thong_ke_theo_don_vi
         if 'Thong_ke_theo_don_vi' in excel_file.sheet_names:
             print("✓ Đang xử lý sheet: Thong_ke_theo_don_vi")
-            df = pd.read_excel(file_path, sheet_name='Thong_ke_theo_don_vi')
+            df = read_excel(file_path, sheet_name='Thong_ke_theo_don_vi')
             
             # Tính điểm BSC - LƯU Ý: Dùng tỷ lệ HLL
-            df['Điểm BSC (Thô)'] = df['Tỷ lệ HLL % (Thô)'].apply(tinh_diem_C12_TP1).round(2)
-            df['Điểm BSC (Sau GT)'] = df['Tỷ lệ HLL % (Sau GT)'].apply(tinh_diem_C12_TP1).round(2)
+            df['Điểm BSC (Thô)'] = tinh_diem_bsc('C12_TP1', df['Tỷ lệ HLL % (Thô)'], chuan_hoa=True).round(2)
+            df['Điểm BSC (Sau GT)'] = tinh_diem_bsc('C12_TP1', df['Tỷ lệ HLL % (Sau GT)'], chuan_hoa=True).round(2)
             df['Chênh lệch Điểm'] = (df['Điểm BSC (Sau GT)'] - df['Điểm BSC (Thô)']).round(2)
             
             # Sắp xếp lại cột
@@ -510,7 +354,7 @@ def add_bsc_scores_to_c12_sm1(file_path):
         # Giữ nguyên các sheet khác
         for sheet_name in excel_file.sheet_names:
             if sheet_name not in all_sheets:
-                all_sheets[sheet_name] = pd.read_excel(file_path, sheet_name=sheet_name)
+                all_sheets[sheet_name] = read_excel(file_path, sheet_name=sheet_name)
         
         # Ghi lại file
         with pd.ExcelWriter(file_path, engine='openpyxl') as writer:
@@ -549,11 +393,11 @@ def add_bsc_scores_to_c11_sm4(file_path):
         # XỬ LÝ SHEET 1: So_sanh_chi_tiet
         if 'So_sanh_chi_tiet' in excel_file.sheet_names:
             print("✓ Đang xử lý sheet: So_sanh_chi_tiet")
-            df = pd.read_excel(file_path, sheet_name='So_sanh_chi_tiet')
+            df = read_excel(file_path, sheet_name='So_sanh_chi_tiet')
             
             # Tính điểm BSC
-            df['Điểm BSC (Thô)'] = df['Tỷ lệ % (Thô)'].apply(tinh_diem_C11_TP2).round(2)
-            df['Điểm BSC (Sau GT)'] = df['Tỷ lệ % (Sau GT)'].apply(tinh_diem_C11_TP2).round(2)
+            df['Điểm BSC (Thô)'] = tinh_diem_bsc('C11_TP2', df['Tỷ lệ % (Thô)'], chuan_hoa=True).round(2)
+            df['Điểm BSC (Sau GT)'] = tinh_diem_bsc('C11_TP2', df['Tỷ lệ % (Sau GT)'], chuan_hoa=True).round(2)
             df['Chênh lệch Điểm'] = (df['Điểm BSC (Sau GT)'] - df['Điểm BSC (Thô)']).round(2)
             
             # Sắp xếp lại cột
@@ -570,11 +414,11 @@ def add_bsc_scores_to_c11_sm4(file_path):
         # XỬ LÝ SHEET 2: Thong_ke_theo_don_vi
         if 'Thong_ke_theo_don_vi' in excel_file.sheet_names:
             print("✓ Đang xử lý sheet: Thong_ke_theo_don_vi")
-            df = pd.read_excel(file_path, sheet_name='Thong_ke_theo_don_vi')
+            df = read_excel(file_path, sheet_name='Thong_ke_theo_don_vi')
             
             # Tính điểm BSC
-            df['Điểm BSC (Thô)'] = df['Tỷ lệ % (Thô)'].apply(tinh_diem_C11_TP2).round(2)
-            df['Điểm BSC (Sau GT)'] = df['Tỷ lệ % (Sau GT)'].apply(tinh_diem_C11_TP2).round(2)
+            df['Điểm BSC (Thô)'] = tinh_diem_bsc('C11_TP2', df['Tỷ lệ % (Thô)'], chuan_hoa=True).round(2)
+            df['Điểm BSC (Sau GT)'] = tinh_diem_bsc('C11_TP2', df['Tỷ lệ % (Sau GT)'], chuan_hoa=True).round(2)
             df['Chênh lệch Điểm'] = (df['Điểm BSC (Sau GT)'] - df['Điểm BSC (Thô)']).round(2)
             
             # Sắp xếp lại cột
@@ -591,7 +435,7 @@ def add_bsc_scores_to_c11_sm4(file_path):
         # Giữ nguyên các sheet khác
         for sheet_name in excel_file.sheet_names:
             if sheet_name not in all_sheets:
-                all_sheets[sheet_name] = pd.read_excel(file_path, sheet_name=sheet_name)
+                all_sheets[sheet_name] = read_excel(file_path, sheet_name=sheet_name)
         
         # Ghi lại file
         with pd.ExcelWriter(file_path, engine='openpyxl') as writer:
@@ -630,11 +474,11 @@ def add_bsc_scores_to_c11_sm2(file_path):
         # XỬ LÝ SHEET 1: So_sanh_chi_tiet
         if 'So_sanh_chi_tiet' in excel_file.sheet_names:
             print("✓ Đang xử lý sheet: So_sanh_chi_tiet")
-            df = pd.read_excel(file_path, sheet_name='So_sanh_chi_tiet')
+            df = read_excel(file_path, sheet_name='So_sanh_chi_tiet')
             
             # Tính điểm BSC
-            df['Điểm BSC (Thô)'] = df['Tỷ lệ % (Thô)'].apply(tinh_diem_C11_TP1).round(2)
-            df['Điểm BSC (Sau GT)'] = df['Tỷ lệ % (Sau GT)'].apply(tinh_diem_C11_TP1).round(2)
+            df['Điểm BSC (Thô)'] = tinh_diem_bsc('C11_TP1', df['Tỷ lệ % (Thô)'], chuan_hoa=True).round(2)
+            df['Điểm BSC (Sau GT)'] = tinh_diem_bsc('C11_TP1', df['Tỷ lệ % (Sau GT)'], chuan_hoa=True).round(2)
             df['Chênh lệch Điểm'] = (df['Điểm BSC (Sau GT)'] - df['Điểm BSC (Thô)']).round(2)
             
             # Sắp xếp lại cột
@@ -651,11 +495,11 @@ def add_bsc_scores_to_c11_sm2(file_path):
         # XỬ LÝ SHEET 2: Thong_ke_theo_don_vi
         if 'Thong_ke_theo_don_vi' in excel_file.sheet_names:
             print("✓ Đang xử lý sheet: Thong_ke_theo_don_vi")
-            df = pd.read_excel(file_path, sheet_name='Thong_ke_theo_don_vi')
+            df = read_excel(file_path, sheet_name='Thong_ke_theo_don_vi')
             
             # Tính điểm BSC
-            df['Điểm BSC (Thô)'] = df['Tỷ lệ % (Thô)'].apply(tinh_diem_C11_TP1).round(2)
-            df['Điểm BSC (Sau GT)'] = df['Tỷ lệ % (Sau GT)'].apply(tinh_diem_C11_TP1).round(2)
+            df['Điểm BSC (Thô)'] = tinh_diem_bsc('C11_TP1', df['Tỷ lệ % (Thô)'], chuan_hoa=True).round(2)
+            df['Điểm BSC (Sau GT)'] = tinh_diem_bsc('C11_TP1', df['Tỷ lệ % (Sau GT)'], chuan_hoa=True).round(2)
             df['Chênh lệch Điểm'] = (df['Điểm BSC (Sau GT)'] - df['Điểm BSC (Thô)']).round(2)
             
             # Sắp xếp lại cột
@@ -672,7 +516,7 @@ def add_bsc_scores_to_c11_sm2(file_path):
         # Giữ nguyên các sheet khác
         for sheet_name in excel_file.sheet_names:
             if sheet_name not in all_sheets:
-                all_sheets[sheet_name] = pd.read_excel(file_path, sheet_name=sheet_name)
+                all_sheets[sheet_name] = read_excel(file_path, sheet_name=sheet_name)
         
         # Ghi lại file
         with pd.ExcelWriter(file_path, engine='openpyxl') as writer:
@@ -702,15 +546,14 @@ def load_exclusion_list(exclusion_file="du_lieu_tham_chieu/ds_phieu_loai_tru.xls
             print(f"⚠️ Không tìm thấy file loại trừ: {exclusion_file}")
             return set()
         
-        df = pd.read_excel(exclusion_file)
+        df = read_excel(exclusion_file)
         
         if 'BAOHONG_ID' not in df.columns:
             print(f"⚠️ Không tìm thấy cột 'BAOHONG_ID' trong file {exclusion_file}")
             return set()
         
         # Chuẩn hóa tất cả ID
-        exclusion_ids = {normalize_id(idx) for idx in df['BAOHONG_ID'].tolist() if pd.notna(idx)}
-        exclusion_ids.discard("") # Loại bỏ chuỗi rỗng nếu có
+        exclusion_ids = normalize_id_set(df['BAOHONG_ID'])
         
         print(f"✅ Đã đọc {len(exclusion_ids)} mã BAOHONG_ID sau khi chuẩn hóa")
         return exclusion_ids
@@ -720,75 +563,19 @@ def load_exclusion_list(exclusion_file="du_lieu_tham_chieu/ds_phieu_loai_tru.xls
         return set()
 
 
+def normalize_id(id_val):
+    """Chuẩn hóa 1 BAOHONG_ID (giữ tương thích, xem exclusion_engine.normalize_id)"""
+    return exclusion_engine.normalize_id(id_val)
+
+
 def extract_nvkt_name(ten_kv):
-    """
-    Trích xuất tên NVKT từ cột TEN_KV
-    Ví dụ:
-    - Sơn Lộc 1 - Nguyễn Thành Sơn -> Nguyễn Thành Sơn
-    - VNM3-Khuất Anh Chiến( VXN) -> Khuất Anh Chiến
-    """
-    if pd.isna(ten_kv):
-        return None
-    
-    ten_kv = str(ten_kv).strip()
-    
-    # Trường hợp có dấu "-"
-    if '-' in ten_kv:
-        parts = ten_kv.split('-')
-        nvkt_name = parts[-1].strip()
-    else:
-        nvkt_name = ten_kv
-    
-    # Loại bỏ phần trong ngoặc đơn
-    if '(' in nvkt_name:
-        nvkt_name = nvkt_name.split('(')[0].strip()
-    
-    return nvkt_name
+    """Trích xuất tên NVKT từ TEN_KV (giữ tương thích, xem exclusion_engine.extract_nvkt_name)"""
+    return exclusion_engine.extract_nvkt_name(ten_kv)
 
 
 def calculate_statistics(df, has_ten_doi=True, dat_column='DAT_TT_KO_HEN', dat_value=1):
-    """
-    Tính toán thống kê theo TEN_DOI và NVKT
-    
-    Args:
-        df: DataFrame đã được xử lý với cột NVKT
-        has_ten_doi: Có cột TEN_DOI hay không
-        dat_column: Tên cột để xác định phiếu đạt
-        dat_value: Giá trị để xác định phiếu đạt
-        
-    Returns:
-        DataFrame với thống kê
-    """
-    report_data = []
-    
-    if has_ten_doi:
-        group_columns = ['TEN_DOI', 'NVKT']
-    else:
-        group_columns = ['NVKT']
-    
-    for group_key, group_df in df.groupby(group_columns):
-        tong_phieu = len(group_df)
-        so_phieu_dat = len(group_df[group_df[dat_column] == dat_value])
-        ty_le = round((so_phieu_dat / tong_phieu * 100), 2) if tong_phieu > 0 else 0
-        
-        if has_ten_doi:
-            ten_doi, nvkt = group_key
-            report_data.append({
-                'TEN_DOI': ten_doi,
-                'NVKT': nvkt,
-                'Tổng phiếu': tong_phieu,
-                'Số phiếu đạt': so_phieu_dat,
-                'Tỷ lệ %': ty_le
-            })
-        else:
-            report_data.append({
-                'NVKT': group_key,
-                'Tổng phiếu': tong_phieu,
-                'Số phiếu đạt': so_phieu_dat,
-                'Tỷ lệ %': ty_le
-            })
-    
-    return pd.DataFrame(report_data)
+    """Thống kê theo TEN_DOI và NVKT (giữ tương thích, xem exclusion_engine.calculate_statistics)"""
+    return exclusion_engine.calculate_statistics(df, has_ten_doi, dat_column, dat_value)
 
 
 def calculate_statistics_keep_denominator(df_before_stats, df_raw, exclusion_ids,
@@ -799,7 +586,8 @@ def calculate_statistics_keep_denominator(df_before_stats, df_raw, exclusion_ids
     - Tử số (Phiếu đạt): TĂNG thêm số phiếu KHÔNG ĐẠT bị loại trừ (chuyển thành đạt)
 
     Args:
-        df_before_stats: DataFrame thống kê TRƯỚC giảm trừ (từ calculate_statistics)
+        df_before_stats: DataFrame thống kê TRƯỚC giảm trừ (từ calculate_statistics(df_raw),
+            cùng nhóm với df_raw nên mẫu số được tính lại trực tiếp từ df_raw)
         df_raw: DataFrame dữ liệu thô đầy đủ
         exclusion_ids: Set các BAOHONG_ID cần loại trừ
         has_ten_doi: Có cột TEN_DOI hay không
@@ -809,65 +597,10 @@ def calculate_statistics_keep_denominator(df_before_stats, df_raw, exclusion_ids
     Returns:
         DataFrame với thống kê SAU giảm trừ (mẫu giữ nguyên, tử tăng)
     """
-    report_data = []
-
-    if has_ten_doi:
-        group_columns = ['TEN_DOI', 'NVKT']
-    else:
-        group_columns = ['NVKT']
-
-    # Xác định các phiếu bị loại trừ
-    df_raw['BAOHONG_ID_STR'] = df_raw['BAOHONG_ID'].apply(normalize_id)
-    df_excluded_items = df_raw[df_raw['BAOHONG_ID_STR'].isin(exclusion_ids)].copy()
-
-    for group_key, group_df_before_row in df_before_stats.groupby(group_columns):
-        if len(group_df_before_row) == 0:
-            continue
-
-        # Lấy thống kê TRƯỚC từ df_before_stats
-        before_row = group_df_before_row.iloc[0]
-        tong_phieu_truoc = before_row['Tổng phiếu']
-        so_phieu_dat_truoc = before_row['Số phiếu đạt']
-
-        # Đếm số phiếu KHÔNG ĐẠT bị loại trừ cho nhóm này (sẽ chuyển thành đạt)
-        if has_ten_doi:
-            ten_doi, nvkt = group_key
-            excluded_not_dat_count = len(df_excluded_items[
-                (df_excluded_items['TEN_DOI'] == ten_doi) &
-                (df_excluded_items['NVKT'] == nvkt) &
-                (df_excluded_items[dat_column] != dat_value)
-            ])
-        else:
-            nvkt = group_key
-            excluded_not_dat_count = len(df_excluded_items[
-                (df_excluded_items['NVKT'] == nvkt) &
-                (df_excluded_items[dat_column] != dat_value)
-            ])
-
-        # Tính toán SAU giảm trừ
-        tong_phieu_sau = tong_phieu_truoc  # GIỮ NGUYÊN MẪU SỐ
-        so_phieu_dat_sau = so_phieu_dat_truoc + excluded_not_dat_count  # TĂNG TỬ SỐ (chuyển không đạt -> đạt)
-        so_phieu_dat_sau = min(so_phieu_dat_sau, tong_phieu_sau)  # Đảm bảo không vượt quá tổng
-
-        ty_le = round((so_phieu_dat_sau / tong_phieu_sau * 100), 2) if tong_phieu_sau > 0 else 0
-
-        if has_ten_doi:
-            report_data.append({
-                'TEN_DOI': ten_doi,
-                'NVKT': nvkt,
-                'Tổng phiếu': tong_phieu_sau,
-                'Số phiếu đạt': so_phieu_dat_sau,
-                'Tỷ lệ %': ty_le
-            })
-        else:
-            report_data.append({
-                'NVKT': nvkt,
-                'Tổng phiếu': tong_phieu_sau,
-                'Số phiếu đạt': so_phieu_dat_sau,
-                'Tỷ lệ %': ty_le
-            })
-
-    return pd.DataFrame(report_data)
+    group_columns = ['TEN_DOI', 'NVKT'] if has_ten_doi else ['NVKT']
+    df_raw['BAOHONG_ID_STR'] = normalize_id_series(df_raw['BAOHONG_ID'])
+    return group_stats(df_raw, group_columns, dat_column, dat_value,
+                       exclusion_ids=exclusion_ids, policy=POLICY_KEEP_DENOMINATOR)
 
 
 def calculate_unit_stats(df_before, df_after, ten_doi_col='TEN_DOI', 
@@ -885,83 +618,8 @@ def calculate_unit_stats(df_before, df_after, ten_doi_col='TEN_DOI',
     Returns:
         DataFrame với thống kê theo từng đơn vị + dòng Tổng TTVT
     """
-    # Mapping tên đội ngắn
-    TEAM_SHORT_NAMES = {
-        'Tổ Kỹ thuật địa bàn Phúc Thọ': 'Phúc Thọ',
-        'Tổ Kỹ thuật địa bàn Quảng Oai': 'Quảng Oai',
-        'Tổ Kỹ thuật địa bàn Suối Hai': 'Suối Hai',
-        'Tổ Kỹ thuật địa bàn Sơn Tây': 'Sơn Tây',
-    }
-    
-    unit_stats = []
-    
-    # Nếu có cột TEN_DOI, nhóm theo đơn vị
-    if ten_doi_col in df_before.columns:
-        # Nhóm theo đơn vị TRƯỚC giảm trừ
-        unit_before = df_before.groupby(ten_doi_col).agg({
-            tong_col: 'sum',
-            dat_col: 'sum'
-        }).reset_index()
-        
-        # Nhóm theo đơn vị SAU giảm trừ
-        unit_after = df_after.groupby(ten_doi_col).agg({
-            tong_col: 'sum',
-            dat_col: 'sum'
-        }).reset_index()
-        
-        # Merge để có cả 2
-        unit_merged = pd.merge(
-            unit_before, unit_after,
-            on=ten_doi_col, how='outer',
-            suffixes=(' (Thô)', ' (Sau GT)')
-        )
-        
-        for _, row in unit_merged.iterrows():
-            ten_doi = row[ten_doi_col]
-            short_name = TEAM_SHORT_NAMES.get(ten_doi, ten_doi)
-            
-            tong_tho = row.get(f'{tong_col} (Thô)', 0) or 0
-            tong_sau = row.get(f'{tong_col} (Sau GT)', 0) or 0
-            dat_tho = row.get(f'{dat_col} (Thô)', 0) or 0
-            dat_sau = row.get(f'{dat_col} (Sau GT)', 0) or 0
-            
-            tyle_tho = round((dat_tho / tong_tho * 100), 2) if tong_tho > 0 else 0
-            tyle_sau = round((dat_sau / tong_sau * 100), 2) if tong_sau > 0 else 0
-            
-            unit_stats.append({
-                'Đơn vị': short_name,
-                'Tổng phiếu (Thô)': int(tong_tho),
-                'Phiếu loại trừ': int(tong_tho - tong_sau),
-                'Tổng phiếu (Sau GT)': int(tong_sau),
-                'Phiếu đạt (Thô)': int(dat_tho),
-                'Phiếu đạt (Sau GT)': int(dat_sau),
-                'Tỷ lệ % (Thô)': tyle_tho,
-                'Tỷ lệ % (Sau GT)': tyle_sau,
-                'Thay đổi %': round(tyle_sau - tyle_tho, 2)
-            })
-    
-    # Thêm dòng TỔNG TTVT
-    tong_tho_all = df_before[tong_col].sum()
-    tong_sau_all = df_after[tong_col].sum()
-    dat_tho_all = df_before[dat_col].sum()
-    dat_sau_all = df_after[dat_col].sum()
-    
-    tyle_tho_all = round((dat_tho_all / tong_tho_all * 100), 2) if tong_tho_all > 0 else 0
-    tyle_sau_all = round((dat_sau_all / tong_sau_all * 100), 2) if tong_sau_all > 0 else 0
-    
-    unit_stats.append({
-        'Đơn vị': 'TTVT Sơn Tây',
-        'Tổng phiếu (Thô)': int(tong_tho_all),
-        'Phiếu loại trừ': int(tong_tho_all - tong_sau_all),
-        'Tổng phiếu (Sau GT)': int(tong_sau_all),
-        'Phiếu đạt (Thô)': int(dat_tho_all),
-        'Phiếu đạt (Sau GT)': int(dat_sau_all),
-        'Tỷ lệ % (Thô)': tyle_tho_all,
-        'Tỷ lệ % (Sau GT)': tyle_sau_all,
-        'Thay đổi %': round(tyle_sau_all - tyle_tho_all, 2)
-    })
-    
-    return pd.DataFrame(unit_stats)
+    return unit_stats(df_before, df_after, TEAM_SHORT_NAMES, ten_doi_col=ten_doi_col,
+                      tong_col=tong_col, dat_col=dat_col)
 
 
 def create_c11_comparison_report(exclusion_ids, output_dir):
@@ -987,7 +645,7 @@ def create_c11_comparison_report(exclusion_ids, output_dir):
             return None
         
         # Đọc dữ liệu thô
-        df_raw = pd.read_excel(input_file, sheet_name='Sheet1')
+        df_raw = load_detail(input_file, sheet_name='Sheet1')
         print(f"✅ Đã đọc file, tổng số dòng thô: {len(df_raw)}")
         
         # Kiểm tra cột cần thiết
@@ -1002,24 +660,21 @@ def create_c11_comparison_report(exclusion_ids, output_dir):
         has_ten_doi = 'TEN_DOI' in df_raw.columns
         
         # Chuẩn hóa cột NVKT
-        df_raw['NVKT'] = df_raw['TEN_KV'].apply(extract_nvkt_name)
+        df_raw['NVKT'] = extract_nvkt_series(df_raw['TEN_KV'])
         df_raw = df_raw[df_raw['NVKT'].notna()].copy()
         
         # Lọc dữ liệu sau giảm trừ
-        df_raw['BAOHONG_ID_STR'] = df_raw['BAOHONG_ID'].apply(normalize_id)
+        df_raw['BAOHONG_ID_STR'] = normalize_id_series(df_raw['BAOHONG_ID'])
         df_excluded = df_raw[~df_raw['BAOHONG_ID_STR'].isin(exclusion_ids)].copy()
         
         num_excluded = len(df_raw) - len(df_excluded)
         print(f"✅ Đã loại trừ {num_excluded} phiếu, còn lại {len(df_excluded)} phiếu")
         
-        # Tính thống kê TRƯỚC giảm trừ
-        print("\n✓ Đang tính thống kê TRƯỚC giảm trừ...")
-        df_stats_before = calculate_statistics(df_raw, has_ten_doi)
-
-        # Tính thống kê SAU giảm trừ - LOGIC MỚI: GIỮ NGUYÊN MẪU SỐ
-        print("✓ Đang tính thống kê SAU giảm trừ (giữ nguyên mẫu số)...")
-        df_stats_after = calculate_statistics_keep_denominator(
-            df_stats_before, df_raw, exclusion_ids, has_ten_doi
+        # Tính thống kê TRƯỚC và SAU giảm trừ trong 1 lần groupby
+        print("\n✓ Đang tính thống kê TRƯỚC/SAU giảm trừ (giữ nguyên mẫu số)...")
+        df_stats_before, df_stats_after = compare_stats(
+            df_raw, exclusion_ids, POLICY_KEEP_DENOMINATOR,
+            ['TEN_DOI', 'NVKT'] if has_ten_doi else ['NVKT']
         )
         
         # Merge kết quả để so sánh
@@ -1158,7 +813,7 @@ def create_c11_sm2_comparison_report(exclusion_ids, output_dir):
             return None
         
         # Đọc dữ liệu thô
-        df_raw = pd.read_excel(input_file, sheet_name='Sheet1')
+        df_raw = load_detail(input_file, sheet_name='Sheet1')
         print(f"✅ Đã đọc file, tổng số dòng thô: {len(df_raw)}")
         
         # Kiểm tra cột cần thiết
@@ -1173,7 +828,7 @@ def create_c11_sm2_comparison_report(exclusion_ids, output_dir):
         has_ten_doi = 'TEN_DOI' in df_raw.columns
         
         # Chuẩn hóa cột NVKT
-        df_raw['NVKT'] = df_raw['TEN_KV'].apply(extract_nvkt_name)
+        df_raw['NVKT'] = extract_nvkt_series(df_raw['TEN_KV'])
         df_raw = df_raw[df_raw['NVKT'].notna()].copy()
         
         # Tính cột TG (thời gian xử lý) nếu chưa có
@@ -1192,20 +847,17 @@ def create_c11_sm2_comparison_report(exclusion_ids, output_dir):
         df_raw['PHIEU_DAT'] = (df_raw['TG'] <= 72).astype(int)
         
         # Lọc dữ liệu sau giảm trừ
-        df_raw['BAOHONG_ID_STR'] = df_raw['BAOHONG_ID'].apply(normalize_id)
+        df_raw['BAOHONG_ID_STR'] = normalize_id_series(df_raw['BAOHONG_ID'])
         df_excluded = df_raw[~df_raw['BAOHONG_ID_STR'].isin(exclusion_ids)].copy()
         
         num_excluded = len(df_raw) - len(df_excluded)
         print(f"✅ Đã loại trừ {num_excluded} phiếu, còn lại {len(df_excluded)} phiếu")
         
-        # Tính thống kê TRƯỚC giảm trừ
-        print("\n✓ Đang tính thống kê TRƯỚC giảm trừ...")
-        df_stats_before = calculate_statistics(df_raw, has_ten_doi, dat_column='PHIEU_DAT', dat_value=1)
-
-        # Tính thống kê SAU giảm trừ - LOGIC MỚI: GIỮ NGUYÊN MẪU SỐ
-        print("✓ Đang tính thống kê SAU giảm trừ (giữ nguyên mẫu số)...")
-        df_stats_after = calculate_statistics_keep_denominator(
-            df_stats_before, df_raw, exclusion_ids, has_ten_doi,
+        # Tính thống kê TRƯỚC và SAU giảm trừ trong 1 lần groupby
+        print("\n✓ Đang tính thống kê TRƯỚC/SAU giảm trừ (giữ nguyên mẫu số)...")
+        df_stats_before, df_stats_after = compare_stats(
+            df_raw, exclusion_ids, POLICY_KEEP_DENOMINATOR,
+            ['TEN_DOI', 'NVKT'] if has_ten_doi else ['NVKT'],
             dat_column='PHIEU_DAT', dat_value=1
         )
         
@@ -1361,7 +1013,7 @@ def create_c12_comparison_report(exclusion_ids, output_dir):
         print("-"*40)
         
         # Đọc sheet TH_SM1C12_HLL_Thang (dữ liệu đã tổng hợp sẵn)
-        df_before = pd.read_excel(input_file_sm1, sheet_name='TH_SM1C12_HLL_Thang')
+        df_before = load_detail(input_file_sm1, sheet_name='TH_SM1C12_HLL_Thang')
         print(f"✅ Đã đọc TH_SM1C12_HLL_Thang (trước GT): {len(df_before)} dòng")
         print(f"   - Tổng HLL: {df_before['Số phiếu HLL'].sum()}")
         print(f"   - Tổng BH: {df_before['Số phiếu báo hỏng'].sum()}")
@@ -1374,13 +1026,13 @@ def create_c12_comparison_report(exclusion_ids, output_dir):
         print("-"*40)
         
         # ĐỌC VÀ LỌC SM1 (dữ liệu thô)
-        df_sm1_raw = pd.read_excel(input_file_sm1, sheet_name='Sheet1')
+        df_sm1_raw = load_detail(input_file_sm1, sheet_name='Sheet1')
         print(f"✅ Đã đọc SM1-C12 Sheet1: {len(df_sm1_raw)} dòng")
         
-        df_sm1_raw['NVKT'] = df_sm1_raw['TEN_KV'].apply(extract_nvkt_name)
+        df_sm1_raw['NVKT'] = extract_nvkt_series(df_sm1_raw['TEN_KV'])
         df_sm1_raw = df_sm1_raw[df_sm1_raw['NVKT'].notna()].copy()
         
-        df_sm1_raw['BAOHONG_ID_STR'] = df_sm1_raw['BAOHONG_ID'].apply(normalize_id)
+        df_sm1_raw['BAOHONG_ID_STR'] = normalize_id_series(df_sm1_raw['BAOHONG_ID'])
         df_sm1_excluded = df_sm1_raw[~df_sm1_raw['BAOHONG_ID_STR'].isin(exclusion_ids)].copy()
         num_excluded_sm1 = len(df_sm1_raw) - len(df_sm1_excluded)
         print(f"✅ Loại trừ SM1: {num_excluded_sm1} phiếu, còn lại {len(df_sm1_excluded)} phiếu")
@@ -1417,11 +1069,11 @@ def create_c12_comparison_report(exclusion_ids, output_dir):
         print("XỬ LÝ SM2-C12 (Tổng phiếu báo hỏng)")
         print("-"*40)
         
-        df_sm2_raw = pd.read_excel(input_file_sm2, sheet_name='Sheet1')
+        df_sm2_raw = load_detail(input_file_sm2, sheet_name='Sheet1')
         print(f"✅ Đã đọc SM2-C12 thô: {len(df_sm2_raw)} dòng")
         
         # Chuẩn hóa cột NVKT
-        df_sm2_raw['NVKT'] = df_sm2_raw['TEN_KV'].apply(extract_nvkt_name)
+        df_sm2_raw['NVKT'] = extract_nvkt_series(df_sm2_raw['TEN_KV'])
         df_sm2_raw = df_sm2_raw[df_sm2_raw['NVKT'].notna()].copy()
 
         # KHÔNG ÁP DỤNG GIẢM TRỪ CHO SM2 (Mẫu số giữ nguyên)
@@ -1549,7 +1201,7 @@ def create_c12_comparison_report(exclusion_ids, output_dir):
         df_loai_tru_sm1 = df_sm1_raw[df_sm1_raw['BAOHONG_ID_STR'].isin(exclusion_ids)].copy()
 
         # Lấy danh sách phiếu trong exclusion_ids từ SM2 (CHỈ ĐỂ THAM KHẢO, không loại trừ khỏi mẫu số)
-        df_sm2_raw['BAOHONG_ID_STR'] = df_sm2_raw['BAOHONG_ID'].apply(normalize_id)
+        df_sm2_raw['BAOHONG_ID_STR'] = normalize_id_series(df_sm2_raw['BAOHONG_ID'])
         df_loai_tru_sm2 = df_sm2_raw[df_sm2_raw['BAOHONG_ID_STR'].isin(exclusion_ids)].copy()
         df_loai_tru_sm2['Ghi chú'] = 'Chỉ tham khảo - Không loại trừ khỏi mẫu số'
         
@@ -1661,11 +1313,11 @@ def create_sm1_c12_excluded_file(exclusion_ids, output_dir):
         print("BƯỚC 1: Xử lý dữ liệu Sheet1")
         print("-"*40)
         
-        df_sm1 = pd.read_excel(input_file_sm1, sheet_name='Sheet1')
+        df_sm1 = load_detail(input_file_sm1, sheet_name='Sheet1')
         print(f"✅ Đã đọc SM1-C12, tổng số dòng thô: {len(df_sm1)}")
         
         # Lọc dữ liệu sau giảm trừ
-        df_sm1['BAOHONG_ID_STR'] = df_sm1['BAOHONG_ID'].apply(normalize_id)
+        df_sm1['BAOHONG_ID_STR'] = normalize_id_series(df_sm1['BAOHONG_ID'])
         df_sm1_excluded = df_sm1[~df_sm1['BAOHONG_ID_STR'].isin(exclusion_ids)].copy()
         
         # Xóa cột tạm
@@ -1680,7 +1332,7 @@ def create_sm1_c12_excluded_file(exclusion_ids, output_dir):
         print("-"*40)
         
         # Chuẩn hóa cột NVKT
-        df_sm1_excluded['NVKT'] = df_sm1_excluded['TEN_KV'].apply(extract_nvkt_name)
+        df_sm1_excluded['NVKT'] = extract_nvkt_series(df_sm1_excluded['TEN_KV'])
         
         has_ten_doi = 'TEN_DOI' in df_sm1_excluded.columns
         
@@ -1723,12 +1375,12 @@ def create_sm1_c12_excluded_file(exclusion_ids, output_dir):
         
         # Đọc dữ liệu SM2-C12 để lấy tổng phiếu báo hỏng
         if os.path.exists(input_file_sm2):
-            df_sm2 = pd.read_excel(input_file_sm2, sheet_name='Sheet1')
+            df_sm2 = load_detail(input_file_sm2, sheet_name='Sheet1')
             print(f"✅ Đã đọc SM2-C12, tổng số dòng thô: {len(df_sm2)}")
 
             # KHÔNG ÁP DỤNG GIẢM TRỪ CHO SM2-C12 (Mẫu số giữ nguyên)
             # Chuẩn hóa cột NVKT cho SM2 (dữ liệu gốc)
-            df_sm2['NVKT'] = df_sm2['TEN_KV'].apply(extract_nvkt_name)
+            df_sm2['NVKT'] = extract_nvkt_series(df_sm2['TEN_KV'])
 
             has_ten_doi_sm2 = 'TEN_DOI' in df_sm2.columns
 
@@ -1832,7 +1484,7 @@ def create_sm1_c12_excluded_file(exclusion_ids, output_dir):
         
         # Đọc dữ liệu gốc để so sánh
         try:
-            df_goc = pd.read_excel(input_file_sm1, sheet_name='TH_SM1C12_HLL_Thang')
+            df_goc = load_detail(input_file_sm1, sheet_name='TH_SM1C12_HLL_Thang')
             tong_hll_tho = df_goc['Số phiếu HLL'].sum()
             tong_bh_tho = df_goc['Số phiếu báo hỏng'].sum()
             tyle_tho = round((tong_hll_tho / tong_bh_tho * 100), 2) if tong_bh_tho > 0 else 0
@@ -1894,7 +1546,7 @@ def create_c12_ti_le_bao_hong_comparison_report(exclusion_ids, output_dir):
         print("XỬ LÝ SM4-C11 (Phiếu báo hỏng dịch vụ BRCĐ)")
         print("-"*40)
         
-        df_raw = pd.read_excel(input_file, sheet_name=0)  # Sheet 1
+        df_raw = load_detail(input_file, sheet_name=0)  # Sheet 1
         print(f"✅ Đã đọc SM4-C11 thô: {len(df_raw)} dòng")
         
         # Kiểm tra cột cần thiết
@@ -1916,7 +1568,7 @@ def create_c12_ti_le_bao_hong_comparison_report(exclusion_ids, output_dir):
         print(f"✅ Đã lọc {len(df_brcd)} bản ghi dịch vụ BRCĐ")
         
         # Chuẩn hóa cột NVKT
-        df_brcd['NVKT'] = df_brcd['TEN_KV'].apply(extract_nvkt_name)
+        df_brcd['NVKT'] = extract_nvkt_series(df_brcd['TEN_KV'])
         df_brcd = df_brcd[df_brcd['NVKT'].notna()].copy()
         
         # Chuẩn hóa tên về Title Case để đồng nhất
@@ -1925,7 +1577,7 @@ def create_c12_ti_le_bao_hong_comparison_report(exclusion_ids, output_dir):
         has_ten_doi = 'TEN_DOI' in df_brcd.columns
         
         # Áp dụng giảm trừ
-        df_brcd['BAOHONG_ID_STR'] = df_brcd['BAOHONG_ID'].apply(normalize_id)
+        df_brcd['BAOHONG_ID_STR'] = normalize_id_series(df_brcd['BAOHONG_ID'])
         df_excluded = df_brcd[~df_brcd['BAOHONG_ID_STR'].isin(exclusion_ids)].copy()
         num_excluded = len(df_brcd) - len(df_excluded)
         print(f"✅ Loại trừ: {num_excluded} phiếu, còn lại {len(df_excluded)} phiếu")
@@ -1946,7 +1598,7 @@ def create_c12_ti_le_bao_hong_comparison_report(exclusion_ids, output_dir):
         print("XỬ LÝ FILE THAM CHIẾU THUÊ BAO")
         print("-"*40)
         
-        df_ref = pd.read_excel(ref_file)
+        df_ref = read_excel(ref_file)
         print(f"✅ Đã đọc file tham chiếu: {len(df_ref)} dòng")
         
         # Tìm cột tên NVKT
@@ -1964,7 +1616,7 @@ def create_c12_ti_le_bao_hong_comparison_report(exclusion_ids, output_dir):
         df_ref_clean.columns = ['NVKT', 'Tổng TB']
         
         # Chuẩn hóa tên NVKT để khớp với dữ liệu từ df_brcd
-        df_ref_clean['NVKT'] = df_ref_clean['NVKT'].apply(extract_nvkt_name)
+        df_ref_clean['NVKT'] = extract_nvkt_series(df_ref_clean['NVKT'])
         df_ref_clean = df_ref_clean.dropna(subset=['NVKT', 'Tổng TB'])
         
         # Chuẩn hóa tên về Title Case để đồng nhất
@@ -2149,15 +1801,14 @@ def load_c14_exclusion_list(exclusion_file="du_lieu_tham_chieu/LOAI_TRU_C1.4.xls
             print(f"⚠️ Không tìm thấy file loại trừ C1.4: {exclusion_file}")
             return set()
         
-        df = pd.read_excel(exclusion_file)
+        df = read_excel(exclusion_file)
         
         if 'BAOHONG_ID' not in df.columns:
             print(f"⚠️ Không tìm thấy cột 'BAOHONG_ID' trong file {exclusion_file}")
             return set()
         
         # Chuẩn hóa tất cả ID
-        exclusion_ids = {normalize_id(idx) for idx in df['BAOHONG_ID'].tolist() if pd.notna(idx)}
-        exclusion_ids.discard("")
+        exclusion_ids = normalize_id_set(df['BAOHONG_ID'])
         
         print(f"✅ Đã đọc {len(exclusion_ids)} mã BAOHONG_ID loại trừ C1.4")
         return exclusion_ids
@@ -2192,14 +1843,14 @@ def create_c14_comparison_report(exclusion_ids, output_dir):
             print(f"❌ Không tìm thấy file dữ liệu C1.4: {data_file}")
             return None
         
-        df_raw = pd.read_excel(data_file, sheet_name="Sheet1")
+        df_raw = load_detail(data_file, sheet_name="Sheet1")
         print(f"✅ Đã đọc file dữ liệu: {len(df_raw)} phiếu khảo sát")
         
         # Chuẩn hóa cột NVKT
         if 'TEN_NVKT_DB' in df_raw.columns:
-            df_raw['NVKT'] = df_raw['TEN_NVKT_DB'].apply(extract_nvkt_name)
+            df_raw['NVKT'] = extract_nvkt_series(df_raw['TEN_NVKT_DB'])
         elif 'TEN_KV' in df_raw.columns:
-            df_raw['NVKT'] = df_raw['TEN_KV'].apply(extract_nvkt_name)
+            df_raw['NVKT'] = extract_nvkt_series(df_raw['TEN_KV'])
         else:
             print("❌ Không tìm thấy cột tên NVKT")
             return None
@@ -2226,7 +1877,7 @@ def create_c14_comparison_report(exclusion_ids, output_dir):
         df_ks['IS_KHL'] = df_ks['KHL_KT'].notna().astype(int)
         
         # Áp dụng giảm trừ
-        df_ks['BAOHONG_ID_STR'] = df_ks['BAOHONG_ID'].apply(normalize_id)
+        df_ks['BAOHONG_ID_STR'] = normalize_id_series(df_ks['BAOHONG_ID'])
         df_excluded = df_ks[~df_ks['BAOHONG_ID_STR'].isin(exclusion_ids)].copy()
         num_excluded = len(df_ks) - len(df_excluded)
         print(f"✅ Loại trừ: {num_excluded} phiếu, còn lại {len(df_excluded)} phiếu")
@@ -2413,15 +2064,14 @@ def load_c15_exclusion_list(exclusion_file="du_lieu_tham_chieu/LOAI_TRU_C1.5.xls
             print(f"⚠️ Không tìm thấy file loại trừ C1.5: {exclusion_file}")
             return set()
         
-        df = pd.read_excel(exclusion_file)
+        df = read_excel(exclusion_file)
         
         if 'HDTB_ID' not in df.columns:
             print(f"⚠️ Không tìm thấy cột 'HDTB_ID' trong file {exclusion_file}")
             return set()
         
         # Chuẩn hóa tất cả ID
-        exclusion_ids = {normalize_id(idx) for idx in df['HDTB_ID'].tolist() if pd.notna(idx)}
-        exclusion_ids.discard("")
+        exclusion_ids = normalize_id_set(df['HDTB_ID'])
         
         print(f"✅ Đã đọc {len(exclusion_ids)} mã HDTB_ID loại trừ C1.5")
         return exclusion_ids
@@ -2459,7 +2109,7 @@ def create_c15_comparison_report(exclusion_ids, output_dir):
             print(f"❌ Không tìm thấy file dữ liệu C1.5: {data_file}")
             return None
         
-        df_raw = pd.read_excel(data_file, sheet_name="DATA")
+        df_raw = load_detail(data_file, sheet_name="DATA")
         print(f"✅ Đã đọc file dữ liệu: {len(df_raw)} bản ghi tổng")
         
         # Kiểm tra cột cần thiết
@@ -2474,7 +2124,7 @@ def create_c15_comparison_report(exclusion_ids, output_dir):
         print(f"✅ Số phiếu đã hoàn công (NGAY_HC != null): {len(df_hc)}")
         
         # Chuẩn hóa cột NVKT
-        df_hc['NVKT'] = df_hc['TEN_NVKT'].apply(extract_nvkt_name)
+        df_hc['NVKT'] = extract_nvkt_series(df_hc['TEN_NVKT'])
         df_hc = df_hc[df_hc['NVKT'].notna()].copy()
         df_hc['NVKT'] = df_hc['NVKT'].str.strip().str.title()
         
@@ -2487,7 +2137,7 @@ def create_c15_comparison_report(exclusion_ids, output_dir):
         df_hc['IS_DAT'] = (df_hc['PT2_KR16'] != 1).astype(int)
         
         # Áp dụng giảm trừ
-        df_hc['HDTB_ID_STR'] = df_hc['HDTB_ID'].apply(normalize_id)
+        df_hc['HDTB_ID_STR'] = normalize_id_series(df_hc['HDTB_ID'])
         df_excluded = df_hc[~df_hc['HDTB_ID_STR'].isin(exclusion_ids)].copy()
         num_excluded = len(df_hc) - len(df_excluded)
         print(f"✅ Loại trừ: {num_excluded} phiếu, còn lại {len(df_excluded)} phiếu")
@@ -2691,7 +2341,7 @@ def create_unit_bsc_comparison_report(exclusion_folder, original_data_folder, ou
             
             # Đọc điểm C1.1 TP1 (SM2)
             try:
-                df_tp1 = pd.read_excel(os.path.join(folder, 'So_sanh_C11_SM2.xlsx'), sheet_name='Thong_ke_theo_don_vi')
+                df_tp1 = read_excel(os.path.join(folder, 'So_sanh_C11_SM2.xlsx'), sheet_name='Thong_ke_theo_don_vi')
                 df_tp1 = df_tp1[df_tp1['Đơn vị'] != 'TTVT Sơn Tây'].copy()  # Loại bỏ dòng TTVT (sẽ tính riêng)
                 df_tp1 = df_tp1.rename(columns={'Đơn vị': 'don_vi'})
                 df_tp1['c11_tp1_tho'] = df_tp1['Điểm BSC (Thô)']
@@ -2703,7 +2353,7 @@ def create_unit_bsc_comparison_report(exclusion_folder, original_data_folder, ou
             
             # Đọc điểm C1.1 TP2 (SM4)
             try:
-                df_tp2 = pd.read_excel(os.path.join(folder, 'So_sanh_C11_SM4.xlsx'), sheet_name='Thong_ke_theo_don_vi')
+                df_tp2 = read_excel(os.path.join(folder, 'So_sanh_C11_SM4.xlsx'), sheet_name='Thong_ke_theo_don_vi')
                 df_tp2 = df_tp2[df_tp2['Đơn vị'] != 'TTVT Sơn Tây'].copy()
                 df_tp2 = df_tp2.rename(columns={'Đơn vị': 'don_vi'})
                 df_tp2['c11_tp2_tho'] = df_tp2['Điểm BSC (Thô)']
@@ -2715,7 +2365,7 @@ def create_unit_bsc_comparison_report(exclusion_folder, original_data_folder, ou
             
             # Đọc điểm C1.2 TP1 (SM1 - Hỏng lặp lại)
             try:
-                df_c12_tp1 = pd.read_excel(os.path.join(folder, 'So_sanh_C12_SM1.xlsx'), sheet_name='Thong_ke_theo_don_vi')
+                df_c12_tp1 = read_excel(os.path.join(folder, 'So_sanh_C12_SM1.xlsx'), sheet_name='Thong_ke_theo_don_vi')
                 df_c12_tp1 = df_c12_tp1[df_c12_tp1['Đơn vị'] != 'TTVT Sơn Tây'].copy()
                 df_c12_tp1 = df_c12_tp1.rename(columns={'Đơn vị': 'don_vi'})
                 df_c12_tp1['c12_tp1_tho'] = df_c12_tp1['Điểm BSC (Thô)']
@@ -2727,7 +2377,7 @@ def create_unit_bsc_comparison_report(exclusion_folder, original_data_folder, ou
             
             # Đọc điểm C1.2 TP2 (SM4-C12 - Tỷ lệ sự cố)
             try:
-                df_c12_tp2 = pd.read_excel(os.path.join(folder, 'SM4-C12-ti-le-su-co-dv-brcd.xlsx'), sheet_name='Thong_ke_theo_don_vi')
+                df_c12_tp2 = read_excel(os.path.join(folder, 'SM4-C12-ti-le-su-co-dv-brcd.xlsx'), sheet_name='Thong_ke_theo_don_vi')
                 df_c12_tp2 = df_c12_tp2[df_c12_tp2['Đơn vị'] != 'TTVT Sơn Tây'].copy()
                 df_c12_tp2 = df_c12_tp2.rename(columns={'Đơn vị': 'don_vi'})
                 df_c12_tp2['c12_tp2_tho'] = df_c12_tp2['Điểm BSC (Thô)']
@@ -2739,7 +2389,7 @@ def create_unit_bsc_comparison_report(exclusion_folder, original_data_folder, ou
             
             # Đọc điểm C1.4
             try:
-                df_c14 = pd.read_excel(os.path.join(folder, 'So_sanh_C14.xlsx'), sheet_name='Thong_ke_theo_don_vi')
+                df_c14 = read_excel(os.path.join(folder, 'So_sanh_C14.xlsx'), sheet_name='Thong_ke_theo_don_vi')
                 df_c14 = df_c14[df_c14['Đơn vị'] != 'TTVT Sơn Tây'].copy()
                 df_c14 = df_c14.rename(columns={'Đơn vị': 'don_vi'})
                 df_c14['c14_tho'] = df_c14['Điểm BSC (Thô)']
@@ -2751,7 +2401,7 @@ def create_unit_bsc_comparison_report(exclusion_folder, original_data_folder, ou
             
             # Đọc điểm C1.5
             try:
-                df_c15 = pd.read_excel(os.path.join(folder, 'So_sanh_C15.xlsx'), sheet_name='Thong_ke_theo_don_vi')
+                df_c15 = read_excel(os.path.join(folder, 'So_sanh_C15.xlsx'), sheet_name='Thong_ke_theo_don_vi')
                 df_c15 = df_c15[df_c15['Đơn vị'] != 'TTVT Sơn Tây'].copy()
                 df_c15 = df_c15.rename(columns={'Đơn vị': 'don_vi'})
                 df_c15['c15_tho'] = df_c15['Điểm BSC (Thô)']
@@ -2823,7 +2473,7 @@ def create_unit_bsc_comparison_report(exclusion_folder, original_data_folder, ou
                 # Đọc từng file và lấy số liệu tổng hợp
                 # C1.1 TP1 (SM2)
                 try:
-                    df_c11_tp1 = pd.read_excel(os.path.join(exclusion_folder, 'So_sanh_C11_SM2.xlsx'), sheet_name='Thong_ke_tong_hop')
+                    df_c11_tp1 = read_excel(os.path.join(exclusion_folder, 'So_sanh_C11_SM2.xlsx'), sheet_name='Thong_ke_tong_hop')
                     c11_tp1_tong_tho = df_c11_tp1['Tổng phiếu (Thô)'].iloc[0]
                     c11_tp1_dat_tho = df_c11_tp1['Phiếu đạt (Thô)'].iloc[0]
                     c11_tp1_tong_sau = df_c11_tp1['Tổng phiếu (Sau GT)'].iloc[0]
@@ -2834,7 +2484,7 @@ def create_unit_bsc_comparison_report(exclusion_folder, original_data_folder, ou
                 
                 # C1.1 TP2 (SM4)
                 try:
-                    df_c11_tp2 = pd.read_excel(os.path.join(exclusion_folder, 'So_sanh_C11_SM4.xlsx'), sheet_name='Thong_ke_tong_hop')
+                    df_c11_tp2 = read_excel(os.path.join(exclusion_folder, 'So_sanh_C11_SM4.xlsx'), sheet_name='Thong_ke_tong_hop')
                     c11_tp2_tong_tho = df_c11_tp2['Tổng phiếu (Thô)'].iloc[0]
                     c11_tp2_dat_tho = df_c11_tp2['Phiếu đạt (Thô)'].iloc[0]
                     c11_tp2_tong_sau = df_c11_tp2['Tổng phiếu (Sau GT)'].iloc[0]
@@ -2845,7 +2495,7 @@ def create_unit_bsc_comparison_report(exclusion_folder, original_data_folder, ou
                 
                 # C1.2 TP1 (SM1 - Hỏng lặp lại)
                 try:
-                    df_c12_tp1 = pd.read_excel(os.path.join(exclusion_folder, 'So_sanh_C12_SM1.xlsx'), sheet_name='Thong_ke_tong_hop')
+                    df_c12_tp1 = read_excel(os.path.join(exclusion_folder, 'So_sanh_C12_SM1.xlsx'), sheet_name='Thong_ke_tong_hop')
                     c12_tp1_hll_tho = df_c12_tp1['Phiếu HLL (Thô)'].iloc[0]
                     c12_tp1_bh_tho = df_c12_tp1['Phiếu báo hỏng (Thô)'].iloc[0]
                     c12_tp1_hll_sau = df_c12_tp1['Phiếu HLL (Sau GT)'].iloc[0]
@@ -2856,7 +2506,7 @@ def create_unit_bsc_comparison_report(exclusion_folder, original_data_folder, ou
                 
                 # C1.2 TP2 (SM4 - Sự cố BRCĐ)
                 try:
-                    df_c12_tp2 = pd.read_excel(os.path.join(exclusion_folder, 'SM4-C12-ti-le-su-co-dv-brcd.xlsx'), sheet_name='Thong_ke_tong_hop')
+                    df_c12_tp2 = read_excel(os.path.join(exclusion_folder, 'SM4-C12-ti-le-su-co-dv-brcd.xlsx'), sheet_name='Thong_ke_tong_hop')
                     c12_tp2_tb = df_c12_tp2['Tổng thuê bao'].iloc[0]
                     c12_tp2_bh_tho = df_c12_tp2['Phiếu báo hỏng (Thô)'].iloc[0]
                     c12_tp2_bh_sau = df_c12_tp2['Phiếu báo hỏng (Sau GT)'].iloc[0]
@@ -2865,7 +2515,7 @@ def create_unit_bsc_comparison_report(exclusion_folder, original_data_folder, ou
                 
                 # C1.4 (Độ hài lòng)
                 try:
-                    df_c14 = pd.read_excel(os.path.join(exclusion_folder, 'So_sanh_C14.xlsx'), sheet_name='Thong_ke_tong_hop')
+                    df_c14 = read_excel(os.path.join(exclusion_folder, 'So_sanh_C14.xlsx'), sheet_name='Thong_ke_tong_hop')
                     c14_ks_tho = df_c14['Tổng phiếu KS (Thô)'].iloc[0]
                     c14_khl_tho = df_c14['Tổng phiếu KHL (Thô)'].iloc[0]
                     c14_ks_sau = df_c14['Tổng phiếu KS (Sau GT)'].iloc[0]
@@ -2876,7 +2526,7 @@ def create_unit_bsc_comparison_report(exclusion_folder, original_data_folder, ou
                 
                 # C1.5 (Thiết lập đúng hạn)
                 try:
-                    df_c15 = pd.read_excel(os.path.join(exclusion_folder, 'So_sanh_C15.xlsx'), sheet_name='Thong_ke_tong_hop')
+                    df_c15 = read_excel(os.path.join(exclusion_folder, 'So_sanh_C15.xlsx'), sheet_name='Thong_ke_tong_hop')
                     c15_tong_tho = df_c15['Tổng Hoàn công (Thô)'].iloc[0]
                     c15_dat_tho = df_c15['Phiếu đạt (Thô)'].iloc[0]
                     c15_tong_sau = df_c15['Tổng Hoàn công (Sau GT)'].iloc[0]
@@ -2888,32 +2538,32 @@ def create_unit_bsc_comparison_report(exclusion_folder, original_data_folder, ou
                 # Tính tỷ lệ và điểm - TRƯỚC
                 r_c11_tp1_tho = c11_tp1_dat_tho / c11_tp1_tong_tho if c11_tp1_tong_tho > 0 else 1.0
                 r_c11_tp2_tho = c11_tp2_dat_tho / c11_tp2_tong_tho if c11_tp2_tong_tho > 0 else 1.0
-                d_c11_tho = tinh_diem_C11_TP1(r_c11_tp1_tho) * 0.3 + tinh_diem_C11_TP2(r_c11_tp2_tho) * 0.7
+                d_c11_tho = tinh_diem_C11_TP1(chuan_hoa_ty_le(r_c11_tp1_tho)) * 0.3 + tinh_diem_C11_TP2(chuan_hoa_ty_le(r_c11_tp2_tho)) * 0.7
                 
                 r_c12_tp1_tho = c12_tp1_hll_tho / c12_tp1_bh_tho if c12_tp1_bh_tho > 0 else 0.0
                 r_c12_tp2_tho = c12_tp2_bh_tho / c12_tp2_tb if c12_tp2_tb > 0 else 0.0
-                d_c12_tho = tinh_diem_C12_TP1(r_c12_tp1_tho) * 0.5 + tinh_diem_C12_TP2(r_c12_tp2_tho) * 0.5
+                d_c12_tho = tinh_diem_C12_TP1(chuan_hoa_ty_le(r_c12_tp1_tho)) * 0.5 + tinh_diem_C12_TP2(chuan_hoa_ty_le(r_c12_tp2_tho)) * 0.5
                 
                 r_c14_tho = (c14_ks_tho - c14_khl_tho) / c14_ks_tho if c14_ks_tho > 0 else 1.0
-                d_c14_tho = tinh_diem_C14(r_c14_tho)
+                d_c14_tho = tinh_diem_C14(chuan_hoa_ty_le(r_c14_tho))
                 
                 r_c15_tho = c15_dat_tho / c15_tong_tho if c15_tong_tho > 0 else 1.0
-                d_c15_tho = tinh_diem_C15(r_c15_tho)
+                d_c15_tho = tinh_diem_C15(chuan_hoa_ty_le(r_c15_tho))
                 
                 # Tính tỷ lệ và điểm - SAU
                 r_c11_tp1_sau = c11_tp1_dat_sau / c11_tp1_tong_sau if c11_tp1_tong_sau > 0 else 1.0
                 r_c11_tp2_sau = c11_tp2_dat_sau / c11_tp2_tong_sau if c11_tp2_tong_sau > 0 else 1.0
-                d_c11_sau = tinh_diem_C11_TP1(r_c11_tp1_sau) * 0.3 + tinh_diem_C11_TP2(r_c11_tp2_sau) * 0.7
+                d_c11_sau = tinh_diem_C11_TP1(chuan_hoa_ty_le(r_c11_tp1_sau)) * 0.3 + tinh_diem_C11_TP2(chuan_hoa_ty_le(r_c11_tp2_sau)) * 0.7
                 
                 r_c12_tp1_sau = c12_tp1_hll_sau / c12_tp1_bh_sau if c12_tp1_bh_sau > 0 else 0.0
                 r_c12_tp2_sau = c12_tp2_bh_sau / c12_tp2_tb if c12_tp2_tb > 0 else 0.0
-                d_c12_sau = tinh_diem_C12_TP1(r_c12_tp1_sau) * 0.5 + tinh_diem_C12_TP2(r_c12_tp2_sau) * 0.5
+                d_c12_sau = tinh_diem_C12_TP1(chuan_hoa_ty_le(r_c12_tp1_sau)) * 0.5 + tinh_diem_C12_TP2(chuan_hoa_ty_le(r_c12_tp2_sau)) * 0.5
                 
                 r_c14_sau = (c14_ks_sau - c14_khl_sau) / c14_ks_sau if c14_ks_sau > 0 else 1.0
-                d_c14_sau = tinh_diem_C14(r_c14_sau)
+                d_c14_sau = tinh_diem_C14(chuan_hoa_ty_le(r_c14_sau))
                 
                 r_c15_sau = c15_dat_sau / c15_tong_sau if c15_tong_sau > 0 else 1.0
-                d_c15_sau = tinh_diem_C15(r_c15_sau)
+                d_c15_sau = tinh_diem_C15(chuan_hoa_ty_le(r_c15_sau))
                 
                 return {
                     'don_vi': 'TTVT Sơn Tây',
@@ -3138,6 +2788,7 @@ def process_exclusion_reports():
                 output_root=output_dir,
                 report_month=None # Tự động lấy tháng hiện tại
             )
+            prune_stale_charts()
             
             # 7. Tạo báo cáo so sánh điểm BSC cấp đơn vị
             create_unit_bsc_comparison_report(
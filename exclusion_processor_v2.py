@@ -18,14 +18,21 @@ CƠ CHẾ GIẢM TRỪ HNI:
 import pandas as pd
 import os
 from datetime import datetime
-import re
 from pathlib import Path
 
+from api_transition.excel_cache import read_excel
+import exclusion_engine
+from exclusion_engine import (
+    POLICY_HNI,
+    compare_stats, group_stats, unit_stats, load_detail,
+    extract_nvkt_series, normalize_id_series, normalize_id_set,
+)
+
 from kpi_scoring import (
     tinh_diem_C11_TP1, tinh_diem_C11_TP2,
     tinh_diem_C12_TP1, tinh_diem_C12_TP2,
     tinh_diem_C14, tinh_diem_C15,
-    chuan_hoa_ty_le,
+    tinh_diem_bsc,
 )
 import kpi_calculator_v2
 from kpi_calculator_v2 import tinh_diem_kpi_nvkt, tinh_diem_kpi_nvkt_sau_giam_tru
@@ -38,32 +45,6 @@ for _team in BRCD_TEAMS:
     TEAM_SHORT_NAMES[f"Tổ Kỹ thuật Địa bàn {_team.short_name}"] = _team.short_name
 
 
-def normalize_id(id_val):
-    """
-    Chuẩn hóa BAOHONG_ID:
-    - Chuyển về string
-    - Loại bỏ ký tự lạ _x000d_, _x000D_ (carriage return từ Excel), khoảng trắng, xuống dòng
-    - Loại bỏ hậu tố .0 nếu có (do pandas đọc nhầm thành float)
-    """
-    if pd.isna(id_val):
-        return ""
-    
-    # Chuyển về string và loại bỏ khoảng trắng
-    s = str(id_val).strip()
-    
-    # Loại bỏ _x000d_ và _x000D_ (case-insensitive) - đây là ký tự carriage return từ Excel
-    s = re.sub(r'_x000[dD]_', '', s).strip()
-    
-    # Loại bỏ các ký tự điều khiển khác
-    s = re.sub(r'[\r\n\t]', '', s)
-    
-    # Loại bỏ .0 nếu là số
-    if s.endswith('.0'):
-        s = s[:-2]
-        
-    return s
-
-
 def add_bsc_scores_to_c12_tp2(file_path):
     """
     Thêm cột Điểm BSC vào file SM4-C12-ti-le-su-co-dv-brcd.xlsx
@@ -88,11 +69,11 @@ def add_bsc_scores_to_c12_tp2(file_path):
         # XỬ LÝ SHEET 1: So_sanh_chi_tiet
         if 'So_sanh_chi_tiet' in excel_file.sheet_names:
             print("✓ Đang xử lý sheet: So_sanh_chi_tiet")
-            df = pd.read_excel(file_path, sheet_name='So_sanh_chi_tiet')
+            df = read_excel(file_path, sheet_name='So_sanh_chi_tiet')
             
             # Tính điểm BSC - LƯU Ý: Dùng tỷ lệ báo hỏng
-            df['Điểm BSC (Thô)'] = df['Tỷ lệ báo hỏng (%) (Thô)'].apply(lambda x: tinh_diem_C12_TP2(chuan_hoa_ty_le(x))).round(2)
-            df['Điểm BSC (Sau GT)'] = df['Tỷ lệ báo hỏng (%) (Sau GT)'].apply(lambda x: tinh_diem_C12_TP2(chuan_hoa_ty_le(x))).round(2)
+            df['Điểm BSC (Thô)'] = tinh_diem_bsc('C12_TP2', df['Tỷ lệ báo hỏng (%) (Thô)'], chuan_hoa=True).round(2)
+            df['Điểm BSC (Sau GT)'] = tinh_diem_bsc('C12_TP2', df['Tỷ lệ báo hỏng (%) (Sau GT)'], chuan_hoa=True).round(2)
             df['Chênh lệch Điểm'] = (df['Điểm BSC (Sau GT)'] - df['Điểm BSC (Thô)']).round(2)
             
             # Sắp xếp lại cột
@@ -109,11 +90,11 @@ def add_bsc_scores_to_c12_tp2(file_path):
         # XỬ LÝ SHEET 2: Thong_ke_theo_don_vi
         if 'Thong_ke_theo_don_vi' in excel_file.sheet_names:
             print("✓ Đang xử lý sheet: Thong_ke_theo_don_vi")
-            df = pd.read_excel(file_path, sheet_name='Thong_ke_theo_don_vi')
+            df = read_excel(file_path, sheet_name='Thong_ke_theo_don_vi')
             
             # Tính điểm BSC - LƯU Ý: Dùng tỷ lệ báo hỏng
-            df['Điểm BSC (Thô)'] = df['Tỷ lệ báo hỏng % (Thô)'].apply(lambda x: tinh_diem_C12_TP2(chuan_hoa_ty_le(x))).round(2)
-            df['Điểm BSC (Sau GT)'] = df['Tỷ lệ báo hỏng % (Sau GT)'].apply(lambda x: tinh_diem_C12_TP2(chuan_hoa_ty_le(x))).round(2)
+            df['Điểm BSC (Thô)'] = tinh_diem_bsc('C12_TP2', df['Tỷ lệ báo hỏng % (Thô)'], chuan_hoa=True).round(2)
+            df['Điểm BSC (Sau GT)'] = tinh_diem_bsc('C12_TP2', df['Tỷ lệ báo hỏng % (Sau GT)'], chuan_hoa=True).round(2)
             df['Chênh lệch Điểm'] = (df['Điểm BSC (Sau GT)'] - df['Điểm BSC (Thô)']).round(2)
             
             # Sắp xếp lại cột
@@ -130,7 +111,7 @@ def add_bsc_scores_to_c12_tp2(file_path):
         # Giữ nguyên các sheet khác
         for sheet_name in excel_file.sheet_names:
             if sheet_name not in all_sheets:
-                all_sheets[sheet_name] = pd.read_excel(file_path, sheet_name=sheet_name)
+                all_sheets[sheet_name] = read_excel(file_path, sheet_name=sheet_name)
         
         # Ghi lại file
         with pd.ExcelWriter(file_path, engine='openpyxl') as writer:
@@ -169,11 +150,11 @@ def add_bsc_scores_to_c15(file_path):
         # XỬ LÝ SHEET 1: So_sanh_chi_tiet
         if 'So_sanh_chi_tiet' in excel_file.sheet_names:
             print("✓ Đang xử lý sheet: So_sanh_chi_tiet")
-            df = pd.read_excel(file_path, sheet_name='So_sanh_chi_tiet')
+            df = read_excel(file_path, sheet_name='So_sanh_chi_tiet')
             
             # Tính điểm BSC
-            df['Điểm BSC (Thô)'] = df['Tỷ lệ đạt (%) (Thô)'].apply(lambda x: tinh_diem_C15(chuan_hoa_ty_le(x))).round(2)
-            df['Điểm BSC (Sau GT)'] = df['Tỷ lệ đạt (%) (Sau GT)'].apply(lambda x: tinh_diem_C15(chuan_hoa_ty_le(x))).round(2)
+            df['Điểm BSC (Thô)'] = tinh_diem_bsc('C15', df['Tỷ lệ đạt (%) (Thô)'], chuan_hoa=True).round(2)
+            df['Điểm BSC (Sau GT)'] = tinh_diem_bsc('C15', df['Tỷ lệ đạt (%) (Sau GT)'], chuan_hoa=True).round(2)
             df['Chênh lệch Điểm'] = (df['Điểm BSC (Sau GT)'] - df['Điểm BSC (Thô)']).round(2)
             
             # Sắp xếp lại cột
@@ -190,11 +171,11 @@ def add_bsc_scores_to_c15(file_path):
         # XỬ LÝ SHEET 2: Thong_ke_theo_don_vi
         if 'Thong_ke_theo_don_vi' in excel_file.sheet_names:
             print("✓ Đang xử lý sheet: Thong_ke_theo_don_vi")
-            df = pd.read_excel(file_path, sheet_name='Thong_ke_theo_don_vi')
+            df = read_excel(file_path, sheet_name='Thong_ke_theo_don_vi')
             
             # Tính điểm BSC
-            df['Điểm BSC (Thô)'] = df['Tỷ lệ đạt % (Thô)'].apply(lambda x: tinh_diem_C15(chuan_hoa_ty_le(x))).round(2)
-            df['Điểm BSC (Sau GT)'] = df['Tỷ lệ đạt % (Sau GT)'].apply(lambda x: tinh_diem_C15(chuan_hoa_ty_le(x))).round(2)
+            df['Điểm BSC (Thô)'] = tinh_diem_bsc('C15', df['Tỷ lệ đạt % (Thô)'], chuan_hoa=True).round(2)
+            df['Điểm BSC (Sau GT)'] = tinh_diem_bsc('C15', df['Tỷ lệ đạt % (Sau GT)'], chuan_hoa=True).round(2)
             df['Chênh lệch Điểm'] = (df['Điểm BSC (Sau GT)'] - df['Điểm BSC (Thô)']).round(2)
             
             # Sắp xếp lại cột
@@ -211,7 +192,7 @@ def add_bsc_scores_to_c15(file_path):
         # Giữ nguyên các sheet khác
         for sheet_name in excel_file.sheet_names:
             if sheet_name not in all_sheets:
-                all_sheets[sheet_name] = pd.read_excel(file_path, sheet_name=sheet_name)
+                all_sheets[sheet_name] = read_excel(file_path, sheet_name=sheet_name)
         
         # Ghi lại file
         with pd.ExcelWriter(file_path, engine='openpyxl') as writer:
@@ -250,11 +231,11 @@ def add_bsc_scores_to_c14(file_path):
         # XỬ LÝ SHEET 1: So_sanh_chi_tiet
         if 'So_sanh_chi_tiet' in excel_file.sheet_names:
             print("✓ Đang xử lý sheet: So_sanh_chi_tiet")
-            df = pd.read_excel(file_path, sheet_name='So_sanh_chi_tiet')
+            df = read_excel(file_path, sheet_name='So_sanh_chi_tiet')
             
             # Tính điểm BSC - LƯU Ý: Dùng tỷ lệ hài lòng
-            df['Điểm BSC (Thô)'] = df['Tỷ lệ HL (%) (Thô)'].apply(lambda x: tinh_diem_C14(chuan_hoa_ty_le(x))).round(2)
-            df['Điểm BSC (Sau GT)'] = df['Tỷ lệ HL (%) (Sau GT)'].apply(lambda x: tinh_diem_C14(chuan_hoa_ty_le(x))).round(2)
+            df['Điểm BSC (Thô)'] = tinh_diem_bsc('C14', df['Tỷ lệ HL (%) (Thô)'], chuan_hoa=True).round(2)
+            df['Điểm BSC (Sau GT)'] = tinh_diem_bsc('C14', df['Tỷ lệ HL (%) (Sau GT)'], chuan_hoa=True).round(2)
             df['Chênh lệch Điểm'] = (df['Điểm BSC (Sau GT)'] - df['Điểm BSC (Thô)']).round(2)
             
             # Sắp xếp lại cột
@@ -271,11 +252,11 @@ def add_bsc_scores_to_c14(file_path):
         # XỬ LÝ SHEET 2: Thong_ke_theo_don_vi
         if 'Thong_ke_theo_don_vi' in excel_file.sheet_names:
             print("✓ Đang xử lý sheet: Thong_ke_theo_don_vi")
-            df = pd.read_excel(file_path, sheet_name='Thong_ke_theo_don_vi')
+            df = read_excel(file_path, sheet_name='Thong_ke_theo_don_vi')
             
             # Tính điểm BSC - LƯU Ý: Dùng tỷ lệ hài lòng
-            df['Điểm BSC (Thô)'] = df['Tỷ lệ HL % (Thô)'].apply(lambda x: tinh_diem_C14(chuan_hoa_ty_le(x))).round(2)
-            df['Điểm BSC (Sau GT)'] = df['Tỷ lệ HL % (Sau GT)'].apply(lambda x: tinh_diem_C14(chuan_hoa_ty_le(x))).round(2)
+            df['Điểm BSC (Thô)'] = tinh_diem_bsc('C14', df['Tỷ lệ HL % (Thô)'], chuan_hoa=True).round(2)
+            df['Điểm BSC (Sau GT)'] = tinh_diem_bsc('C14', df['Tỷ lệ HL % (Sau GT)'], chuan_hoa=True).round(2)
             df['Chênh lệch Điểm'] = (df['Điểm BSC (Sau GT)'] - df['Điểm BSC (Thô)']).round(2)
             
             # Sắp xếp lại cột
@@ -292,7 +273,7 @@ def add_bsc_scores_to_c14(file_path):
         # Giữ nguyên các sheet khác
         for sheet_name in excel_file.sheet_names:
             if sheet_name not in all_sheets:
-                all_sheets[sheet_name] = pd.read_excel(file_path, sheet_name=sheet_name)
+                all_sheets[sheet_name] = read_excel(file_path, sheet_name=sheet_name)
         
         # Ghi lại file
         with pd.ExcelWriter(file_path, engine='openpyxl') as writer:
@@ -331,11 +312,11 @@ def add_bsc_scores_to_c12_sm1(file_path):
         # XỬ LÝ SHEET 1: So_sanh_chi_tiet
         if 'So_sanh_chi_tiet' in excel_file.sheet_names:
             print("✓ Đang xử lý sheet: So_sanh_chi_tiet")
-            df = pd.read_excel(file_path, sheet_name='So_sanh_chi_tiet')
+            df = read_excel(file_path, sheet_name='So_sanh_chi_tiet')
             
             # Tính điểm BSC - LƯU Ý: Dùng tỷ lệ HLL
-            df['Điểm BSC (Thô)'] = df['Tỷ lệ HLL % (Thô)'].apply(lambda x: tinh_diem_C12_TP1(chuan_hoa_ty_le(x))).round(2)
-            df['Điểm BSC (Sau GT)'] = df['Tỷ lệ HLL % (Sau GT)'].apply(lambda x: tinh_diem_C12_TP1(chuan_hoa_ty_le(x))).round(2)
+            df['Điểm BSC (Thô)'] = tinh_diem_bsc('C12_TP1', df['Tỷ lệ HLL % (Thô)'], chuan_hoa=True).round(2)
+            df['Điểm BSC (Sau GT)'] = tinh_diem_bsc('C12_TP1', df['Tỷ lệ HLL % (Sau GT)'], chuan_hoa=True).round(2)
             df['Chênh lệch Điểm'] = (df['Điểm BSC (Sau GT)'] - df['Điểm BSC (Thô)']).round(2)
             
             # Sắp xếp lại cột
@@ -352,11 +333,11 @@ def add_bsc_scores_to_c12_sm1(file_path):
         # XỬ LÝ SHEET 2: Thong_ke_theo_don_vi
         if 'Thong_ke_theo_don_vi' in excel_file.sheet_names:
             print("✓ Đang xử lý sheet: Thong_ke_theo_don_vi")
-            df = pd.read_excel(file_path, sheet_name='Thong_ke_theo_don_vi')
+            df = read_excel(file_path, sheet_name='Thong_ke_theo_don_vi')
             
             # Tính điểm BSC - LƯU Ý: Dùng tỷ lệ HLL
-            df['Điểm BSC (Thô)'] = df['Tỷ lệ HLL % (Thô)'].apply(lambda x: tinh_diem_C12_TP1(chuan_hoa_ty_le(x))).round(2)
-            df['Điểm BSC (Sau GT)'] = df['Tỷ lệ HLL % (Sau GT)'].apply(lambda x: tinh_diem_C12_TP1(chuan_hoa_ty_le(x))).round(2)
+            df['Điểm BSC (Thô)'] = tinh_diem_bsc('C12_TP1', df['Tỷ lệ HLL % (Thô)'], chuan_hoa=True).round(2)
+            df['Điểm BSC (Sau GT)'] = tinh_diem_bsc('C12_TP1', df['Tỷ lệ HLL % (Sau GT)'], chuan_hoa=True).round(2)
             df['Chênh lệch Điểm'] = (df['Điểm BSC (Sau GT)'] - df['Điểm BSC (Thô)']).round(2)
             
             # Sắp xếp lại cột
@@ -373,7 +354,7 @@ def add_bsc_scores_to_c12_sm1(file_path):
         # Giữ nguyên các sheet khác
         for sheet_name in excel_file.sheet_names:
             if sheet_name not in all_sheets:
-                all_sheets[sheet_name] = pd.read_excel(file_path, sheet_name=sheet_name)
+                all_sheets[sheet_name] = read_excel(file_path, sheet_name=sheet_name)
         
         # Ghi lại file
         with pd.ExcelWriter(file_path, engine='openpyxl') as writer:
@@ -412,11 +393,11 @@ def add_bsc_scores_to_c11_sm4(file_path):
         # XỬ LÝ SHEET 1: So_sanh_chi_tiet
         if 'So_sanh_chi_tiet' in excel_file.sheet_names:
             print("✓ Đang xử lý sheet: So_sanh_chi_tiet")
-            df = pd.read_excel(file_path, sheet_name='So_sanh_chi_tiet')
+            df = read_excel(file_path, sheet_name='So_sanh_chi_tiet')
             
             # Tính điểm BSC
-            df['Điểm BSC (Thô)'] = df['Tỷ lệ % (Thô)'].apply(lambda x: tinh_diem_C11_TP2(chuan_hoa_ty_le(x))).round(2)
-            df['Điểm BSC (Sau GT)'] = df['Tỷ lệ % (Sau GT)'].apply(lambda x: tinh_diem_C11_TP2(chuan_hoa_ty_le(x))).round(2)
+            df['Điểm BSC (Thô)'] = tinh_diem_bsc('C11_TP2', df['Tỷ lệ % (Thô)'], chuan_hoa=True).round(2)
+            df['Điểm BSC (Sau GT)'] = tinh_diem_bsc('C11_TP2', df['Tỷ lệ % (Sau GT)'], chuan_hoa=True).round(2)
             df['Chênh lệch Điểm'] = (df['Điểm BSC (Sau GT)'] - df['Điểm BSC (Thô)']).round(2)
             
             # Sắp xếp lại cột
@@ -433,11 +414,11 @@ def add_bsc_scores_to_c11_sm4(file_path):
         # XỬ LÝ SHEET 2: Thong_ke_theo_don_vi
         if 'Thong_ke_theo_don_vi' in excel_file.sheet_names:
             print("✓ Đang xử lý sheet: Thong_ke_theo_don_vi")
-            df = pd.read_excel(file_path, sheet_name='Thong_ke_theo_don_vi')
+            df = read_excel(file_path, sheet_name='Thong_ke_theo_don_vi')
             
             # Tính điểm BSC
-            df['Điểm BSC (Thô)'] = df['Tỷ lệ % (Thô)'].apply(lambda x: tinh_diem_C11_TP2(chuan_hoa_ty_le(x))).round(2)
-            df['Điểm BSC (Sau GT)'] = df['Tỷ lệ % (Sau GT)'].apply(lambda x: tinh_diem_C11_TP2(chuan_hoa_ty_le(x))).round(2)
+            df['Điểm BSC (Thô)'] = tinh_diem_bsc('C11_TP2', df['Tỷ lệ % (Thô)'], chuan_hoa=True).round(2)
+            df['Điểm BSC (Sau GT)'] = tinh_diem_bsc('C11_TP2', df['Tỷ lệ % (Sau GT)'], chuan_hoa=True).round(2)
             df['Chênh lệch Điểm'] = (df['Điểm BSC (Sau GT)'] - df['Điểm BSC (Thô)']).round(2)
             
             # Sắp xếp lại cột
@@ -454,7 +435,7 @@ def add_bsc_scores_to_c11_sm4(file_path):
         # Giữ nguyên các sheet khác
         for sheet_name in excel_file.sheet_names:
             if sheet_name not in all_sheets:
-                all_sheets[sheet_name] = pd.read_excel(file_path, sheet_name=sheet_name)
+                all_sheets[sheet_name] = read_excel(file_path, sheet_name=sheet_name)
         
         # Ghi lại file
         with pd.ExcelWriter(file_path, engine='openpyxl') as writer:
@@ -493,11 +474,11 @@ def add_bsc_scores_to_c11_sm2(file_path):
         # XỬ LÝ SHEET 1: So_sanh_chi_tiet
         if 'So_sanh_chi_tiet' in excel_file.sheet_names:
             print("✓ Đang xử lý sheet: So_sanh_chi_tiet")
-            df = pd.read_excel(file_path, sheet_name='So_sanh_chi_tiet')
+            df = read_excel(file_path, sheet_name='So_sanh_chi_tiet')
             
             # Tính điểm BSC
-            df['Điểm BSC (Thô)'] = df['Tỷ lệ % (Thô)'].apply(lambda x: tinh_diem_C11_TP1(chuan_hoa_ty_le(x))).round(2)
-            df['Điểm BSC (Sau GT)'] = df['Tỷ lệ % (Sau GT)'].apply(lambda x: tinh_diem_C11_TP1(chuan_hoa_ty_le(x))).round(2)
+            df['Điểm BSC (Thô)'] = tinh_diem_bsc('C11_TP1', df['Tỷ lệ % (Thô)'], chuan_hoa=True).round(2)
+            df['Điểm BSC (Sau GT)'] = tinh_diem_bsc('C11_TP1', df['Tỷ lệ % (Sau GT)'], chuan_hoa=True).round(2)
             df['Chênh lệch Điểm'] = (df['Điểm BSC (Sau GT)'] - df['Điểm BSC (Thô)']).round(2)
             
             # Sắp xếp lại cột
@@ -514,11 +495,11 @@ def add_bsc_scores_to_c11_sm2(file_path):
         # XỬ LÝ SHEET 2: Thong_ke_theo_don_vi
         if 'Thong_ke_theo_don_vi' in excel_file.sheet_names:
             print("✓ Đang xử lý sheet: Thong_ke_theo_don_vi")
-            df = pd.read_excel(file_path, sheet_name='Thong_ke_theo_don_vi')
+            df = read_excel(file_path, sheet_name='Thong_ke_theo_don_vi')
             
             # Tính điểm BSC
-            df['Điểm BSC (Thô)'] = df['Tỷ lệ % (Thô)'].apply(lambda x: tinh_diem_C11_TP1(chuan_hoa_ty_le(x))).round(2)
-            df['Điểm BSC (Sau GT)'] = df['Tỷ lệ % (Sau GT)'].apply(lambda x: tinh_diem_C11_TP1(chuan_hoa_ty_le(x))).round(2)
+            df['Điểm BSC (Thô)'] = tinh_diem_bsc('C11_TP1', df['Tỷ lệ % (Thô)'], chuan_hoa=True).round(2)
+            df['Điểm BSC (Sau GT)'] = tinh_diem_bsc('C11_TP1', df['Tỷ lệ % (Sau GT)'], chuan_hoa=True).round(2)
             df['Chênh lệch Điểm'] = (df['Điểm BSC (Sau GT)'] - df['Điểm BSC (Thô)']).round(2)
             
             # Sắp xếp lại cột
@@ -535,7 +516,7 @@ def add_bsc_scores_to_c11_sm2(file_path):
         # Giữ nguyên các sheet khác
         for sheet_name in excel_file.sheet_names:
             if sheet_name not in all_sheets:
-                all_sheets[sheet_name] = pd.read_excel(file_path, sheet_name=sheet_name)
+                all_sheets[sheet_name] = read_excel(file_path, sheet_name=sheet_name)
         
         # Ghi lại file
         with pd.ExcelWriter(file_path, engine='openpyxl') as writer:
@@ -565,15 +546,14 @@ def load_exclusion_list(exclusion_file="du_lieu_tham_chieu/ds_phieu_loai_tru.xls
             print(f"⚠️ Không tìm thấy file loại trừ: {exclusion_file}")
             return set()
         
-        df = pd.read_excel(exclusion_file)
+        df = read_excel(exclusion_file)
         
         if 'BAOHONG_ID' not in df.columns:
             print(f"⚠️ Không tìm thấy cột 'BAOHONG_ID' trong file {exclusion_file}")
             return set()
         
         # Chuẩn hóa tất cả ID
-        exclusion_ids = {normalize_id(idx) for idx in df['BAOHONG_ID'].tolist() if pd.notna(idx)}
-        exclusion_ids.discard("") # Loại bỏ chuỗi rỗng nếu có
+        exclusion_ids = normalize_id_set(df['BAOHONG_ID'])
         
         print(f"✅ Đã đọc {len(exclusion_ids)} mã BAOHONG_ID sau khi chuẩn hóa")
         return exclusion_ids
@@ -583,75 +563,19 @@ def load_exclusion_list(exclusion_file="du_lieu_tham_chieu/ds_phieu_loai_tru.xls
         return set()
 
 
+def normalize_id(id_val):
+    """Chuẩn hóa 1 BAOHONG_ID (giữ tương thích, xem exclusion_engine.normalize_id)"""
+    return exclusion_engine.normalize_id(id_val)
+
+
 def extract_nvkt_name(ten_kv):
-    """
-    Trích xuất tên NVKT từ cột TEN_KV
-    Ví dụ:
-    - Sơn Lộc 1 - Nguyễn Thành Sơn -> Nguyễn Thành Sơn
-    - VNM3-Khuất Anh Chiến( VXN) -> Khuất Anh Chiến
-    """
-    if pd.isna(ten_kv):
-        return None
-    
-    ten_kv = str(ten_kv).strip()
-    
-    # Trường hợp có dấu "-"
-    if '-' in ten_kv:
-        parts = ten_kv.split('-')
-        nvkt_name = parts[-1].strip()
-    else:
-        nvkt_name = ten_kv
-    
-    # Loại bỏ phần trong ngoặc đơn
-    if '(' in nvkt_name:
-        nvkt_name = nvkt_name.split('(')[0].strip()
-    
-    return nvkt_name
+    """Trích xuất tên NVKT từ TEN_KV (giữ tương thích, xem exclusion_engine.extract_nvkt_name)"""
+    return exclusion_engine.extract_nvkt_name(ten_kv)
 
 
 def calculate_statistics(df, has_ten_doi=True, dat_column='DAT_TT_KO_HEN', dat_value=1):
-    """
-    Tính toán thống kê theo TEN_DOI và NVKT
-    
-    Args:
-        df: DataFrame đã được xử lý với cột NVKT
-        has_ten_doi: Có cột TEN_DOI hay không
-        dat_column: Tên cột để xác định phiếu đạt
-        dat_value: Giá trị để xác định phiếu đạt
-        
-    Returns:
-        DataFrame với thống kê
-    """
-    report_data = []
-    
-    if has_ten_doi:
-        group_columns = ['TEN_DOI', 'NVKT']
-    else:
-        group_columns = ['NVKT']
-    
-    for group_key, group_df in df.groupby(group_columns):
-        tong_phieu = len(group_df)
-        so_phieu_dat = len(group_df[group_df[dat_column] == dat_value])
-        ty_le = round((so_phieu_dat / tong_phieu * 100), 2) if tong_phieu > 0 else 0
-        
-        if has_ten_doi:
-            ten_doi, nvkt = group_key
-            report_data.append({
-                'TEN_DOI': ten_doi,
-                'NVKT': nvkt,
-                'Tổng phiếu': tong_phieu,
-                'Số phiếu đạt': so_phieu_dat,
-                'Tỷ lệ %': ty_le
-            })
-        else:
-            report_data.append({
-                'NVKT': group_key,
-                'Tổng phiếu': tong_phieu,
-                'Số phiếu đạt': so_phieu_dat,
-                'Tỷ lệ %': ty_le
-            })
-    
-    return pd.DataFrame(report_data)
+    """Thống kê theo TEN_DOI và NVKT (giữ tương thích, xem exclusion_engine.calculate_statistics)"""
+    return exclusion_engine.calculate_statistics(df, has_ten_doi, dat_column, dat_value)
 
 
 def calculate_statistics_hni(df_raw, exclusion_ids, has_ten_doi=True, 
@@ -671,50 +595,9 @@ def calculate_statistics_hni(df_raw, exclusion_ids, has_ten_doi=True,
     Returns:
         DataFrame với thống kê theo cách HNI
     """
-    report_data = []
-    
-    if has_ten_doi:
-        group_columns = ['TEN_DOI', 'NVKT']
-    else:
-        group_columns = ['NVKT']
-    
-    for group_key, group_df in df_raw.groupby(group_columns):
-        # Tổng phiếu = Tổng phiếu thô (giữ nguyên mẫu số)
-        tong_phieu = len(group_df)
-        
-        # Số phiếu đạt gốc
-        so_phieu_dat_goc = len(group_df[group_df[dat_column] == dat_value])
-        
-        # Số phiếu trong danh sách GT mà KHÔNG ĐẠT (sẽ được chuyển thành ĐẠT)
-        df_gt = group_df[group_df['BAOHONG_ID_STR'].isin(exclusion_ids)]
-        so_phieu_gt_khong_dat = len(df_gt[df_gt[dat_column] != dat_value])
-        
-        # Số phiếu đạt SAU GT = Đạt gốc + GT không đạt (chuyển thành đạt)
-        so_phieu_dat_sau_gt = so_phieu_dat_goc + so_phieu_gt_khong_dat
-        
-        # Tỷ lệ % với MẪU SỐ = Tổng phiếu thô (không đổi)
-        ty_le = round((so_phieu_dat_sau_gt / tong_phieu * 100), 2) if tong_phieu > 0 else 0
-        
-        if has_ten_doi:
-            ten_doi, nvkt = group_key
-            report_data.append({
-                'TEN_DOI': ten_doi,
-                'NVKT': nvkt,
-                'Tổng phiếu': tong_phieu,  # Giữ nguyên = tổng thô
-                'Số phiếu đạt': so_phieu_dat_sau_gt,  # Đạt gốc + GT không đạt
-                'Số phiếu GT': so_phieu_gt_khong_dat,  # Số phiếu được GT
-                'Tỷ lệ %': ty_le
-            })
-        else:
-            report_data.append({
-                'NVKT': group_key,
-                'Tổng phiếu': tong_phieu,
-                'Số phiếu đạt': so_phieu_dat_sau_gt,
-                'Số phiếu GT': so_phieu_gt_khong_dat,
-                'Tỷ lệ %': ty_le
-            })
-    
-    return pd.DataFrame(report_data)
+    group_columns = ['TEN_DOI', 'NVKT'] if has_ten_doi else ['NVKT']
+    return group_stats(df_raw, group_columns, dat_column, dat_value,
+                       exclusion_ids=exclusion_ids, policy=POLICY_HNI)
 
 
 def calculate_unit_stats_hni(df_stats_before, df_stats_after, ten_doi_col='TEN_DOI',
@@ -736,81 +619,8 @@ def calculate_unit_stats_hni(df_stats_before, df_stats_after, ten_doi_col='TEN_D
     Returns:
         DataFrame với thống kê theo từng đơn vị + dòng Tổng TTVT
     """
-    unit_stats = []
-    
-    # Nếu có cột TEN_DOI, nhóm theo đơn vị
-    if ten_doi_col in df_stats_before.columns:
-        # Nhóm theo đơn vị TRƯỚC giảm trừ
-        unit_before = df_stats_before.groupby(ten_doi_col).agg({
-            tong_col: 'sum',
-            dat_col: 'sum'
-        }).reset_index()
-        
-        # Nhóm theo đơn vị SAU giảm trừ (HNI: tổng phiếu không đổi)
-        agg_dict = {tong_col: 'sum', dat_col: 'sum'}
-        if 'Số phiếu GT' in df_stats_after.columns:
-            agg_dict['Số phiếu GT'] = 'sum'
-        unit_after = df_stats_after.groupby(ten_doi_col).agg(agg_dict).reset_index()
-        
-        # Merge để có cả 2
-        unit_merged = pd.merge(
-            unit_before, unit_after,
-            on=ten_doi_col, how='outer',
-            suffixes=(' (Thô)', ' (Sau GT)')
-        )
-        
-        for _, row in unit_merged.iterrows():
-            ten_doi = row[ten_doi_col]
-            short_name = TEAM_SHORT_NAMES.get(ten_doi, ten_doi)
-            
-            tong_tho = row.get(f'{tong_col} (Thô)', 0) or 0
-            # HNI: Tổng phiếu sau GT = Tổng phiếu thô (không đổi)
-            tong_sau = tong_tho  # Giữ nguyên mẫu số
-            dat_tho = row.get(f'{dat_col} (Thô)', 0) or 0
-            dat_sau = row.get(f'{dat_col} (Sau GT)', 0) or 0
-            so_phieu_gt = row.get('Số phiếu GT', 0) or 0
-            
-            # Tỷ lệ với mẫu số = Tổng phiếu thô
-            tyle_tho = round((dat_tho / tong_tho * 100), 2) if tong_tho > 0 else 0
-            tyle_sau = round((dat_sau / tong_tho * 100), 2) if tong_tho > 0 else 0  # HNI: dùng tong_tho
-            
-            unit_stats.append({
-                'Đơn vị': short_name,
-                'Tổng phiếu (Thô)': int(tong_tho),
-                'Phiếu GT (KĐ→Đ)': int(so_phieu_gt),  # Số phiếu chuyển từ không đạt → đạt
-                'Tổng phiếu (Sau GT)': int(tong_sau),  # = Tổng thô
-                'Phiếu đạt (Thô)': int(dat_tho),
-                'Phiếu đạt (Sau GT)': int(dat_sau),
-                'Tỷ lệ % (Thô)': tyle_tho,
-                'Tỷ lệ % (Sau GT)': tyle_sau,
-                'Thay đổi %': round(tyle_sau - tyle_tho, 2)
-            })
-    
-    # Thêm dòng TỔNG TTVT
-    tong_tho_all = df_stats_before[tong_col].sum()
-    dat_tho_all = df_stats_before[dat_col].sum()
-    dat_sau_all = df_stats_after[dat_col].sum()
-    so_phieu_gt_all = df_stats_after['Số phiếu GT'].sum() if 'Số phiếu GT' in df_stats_after.columns else 0
-    
-    # HNI: Tổng phiếu sau GT = Tổng phiếu thô
-    tong_sau_all = tong_tho_all
-    
-    tyle_tho_all = round((dat_tho_all / tong_tho_all * 100), 2) if tong_tho_all > 0 else 0
-    tyle_sau_all = round((dat_sau_all / tong_tho_all * 100), 2) if tong_tho_all > 0 else 0  # HNI: dùng tong_tho_all
-    
-    unit_stats.append({
-        'Đơn vị': 'TTVT Sơn Tây',
-        'Tổng phiếu (Thô)': int(tong_tho_all),
-        'Phiếu GT (KĐ→Đ)': int(so_phieu_gt_all),
-        'Tổng phiếu (Sau GT)': int(tong_sau_all),  # = Tổng thô
-        'Phiếu đạt (Thô)': int(dat_tho_all),
-        'Phiếu đạt (Sau GT)': int(dat_sau_all),
-        'Tỷ lệ % (Thô)': tyle_tho_all,
-        'Tỷ lệ % (Sau GT)': tyle_sau_all,
-        'Thay đổi %': round(tyle_sau_all - tyle_tho_all, 2)
-    })
-    
-    return pd.DataFrame(unit_stats)
+    return unit_stats(df_stats_before, df_stats_after, TEAM_SHORT_NAMES, policy=POLICY_HNI,
+                      ten_doi_col=ten_doi_col, tong_col=tong_col, dat_col=dat_col)
 
 
 def calculate_unit_stats(df_before, df_after, ten_doi_col='TEN_DOI', 
@@ -828,75 +638,8 @@ def calculate_unit_stats(df_before, df_after, ten_doi_col='TEN_DOI',
     Returns:
         DataFrame với thống kê theo từng đơn vị + dòng Tổng TTVT
     """
-    unit_stats = []
-    
-    # Nếu có cột TEN_DOI, nhóm theo đơn vị
-    if ten_doi_col in df_before.columns:
-        # Nhóm theo đơn vị TRƯỚC giảm trừ
-        unit_before = df_before.groupby(ten_doi_col).agg({
-            tong_col: 'sum',
-            dat_col: 'sum'
-        }).reset_index()
-        
-        # Nhóm theo đơn vị SAU giảm trừ
-        unit_after = df_after.groupby(ten_doi_col).agg({
-            tong_col: 'sum',
-            dat_col: 'sum'
-        }).reset_index()
-        
-        # Merge để có cả 2
-        unit_merged = pd.merge(
-            unit_before, unit_after,
-            on=ten_doi_col, how='outer',
-            suffixes=(' (Thô)', ' (Sau GT)')
-        )
-        
-        for _, row in unit_merged.iterrows():
-            ten_doi = row[ten_doi_col]
-            short_name = TEAM_SHORT_NAMES.get(ten_doi, ten_doi)
-            
-            tong_tho = row.get(f'{tong_col} (Thô)', 0) or 0
-            tong_sau = row.get(f'{tong_col} (Sau GT)', 0) or 0
-            dat_tho = row.get(f'{dat_col} (Thô)', 0) or 0
-            dat_sau = row.get(f'{dat_col} (Sau GT)', 0) or 0
-            
-            tyle_tho = round((dat_tho / tong_tho * 100), 2) if tong_tho > 0 else 0
-            tyle_sau = round((dat_sau / tong_sau * 100), 2) if tong_sau > 0 else 0
-            
-            unit_stats.append({
-                'Đơn vị': short_name,
-                'Tổng phiếu (Thô)': int(tong_tho),
-                'Phiếu loại trừ': int(tong_tho - tong_sau),
-                'Tổng phiếu (Sau GT)': int(tong_sau),
-                'Phiếu đạt (Thô)': int(dat_tho),
-                'Phiếu đạt (Sau GT)': int(dat_sau),
-                'Tỷ lệ % (Thô)': tyle_tho,
-                'Tỷ lệ % (Sau GT)': tyle_sau,
-                'Thay đổi %': round(tyle_sau - tyle_tho, 2)
-            })
-    
-    # Thêm dòng TỔNG TTVT
-    tong_tho_all = df_before[tong_col].sum()
-    tong_sau_all = df_after[tong_col].sum()
-    dat_tho_all = df_before[dat_col].sum()
-    dat_sau_all = df_after[dat_col].sum()
-    
-    tyle_tho_all = round((dat_tho_all / tong_tho_all * 100), 2) if tong_tho_all > 0 else 0
-    tyle_sau_all = round((dat_sau_all / tong_sau_all * 100), 2) if tong_sau_all > 0 else 0
-    
-    unit_stats.append({
-        'Đơn vị': 'TTVT Sơn Tây',
-        'Tổng phiếu (Thô)': int(tong_tho_all),
-        'Phiếu loại trừ': int(tong_tho_all - tong_sau_all),
-        'Tổng phiếu (Sau GT)': int(tong_sau_all),
-        'Phiếu đạt (Thô)': int(dat_tho_all),
-        'Phiếu đạt (Sau GT)': int(dat_sau_all),
-        'Tỷ lệ % (Thô)': tyle_tho_all,
-        'Tỷ lệ % (Sau GT)': tyle_sau_all,
-        'Thay đổi %': round(tyle_sau_all - tyle_tho_all, 2)
-    })
-    
-    return pd.DataFrame(unit_stats)
+    return unit_stats(df_before, df_after, TEAM_SHORT_NAMES, ten_doi_col=ten_doi_col,
+                      tong_col=tong_col, dat_col=dat_col)
 
 
 def create_c11_comparison_report(exclusion_ids, output_dir):
@@ -926,7 +669,7 @@ def create_c11_comparison_report(exclusion_ids, output_dir):
             return None
         
         # Đọc dữ liệu thô
-        df_raw = pd.read_excel(input_file, sheet_name='Sheet1')
+        df_raw = load_detail(input_file, sheet_name='Sheet1')
         print(f"✅ Đã đọc file, tổng số dòng thô: {len(df_raw)}")
         
         # Kiểm tra cột cần thiết
@@ -941,24 +684,23 @@ def create_c11_comparison_report(exclusion_ids, output_dir):
         has_ten_doi = 'TEN_DOI' in df_raw.columns
         
         # Chuẩn hóa cột NVKT
-        df_raw['NVKT'] = df_raw['TEN_KV'].apply(extract_nvkt_name)
+        df_raw['NVKT'] = extract_nvkt_series(df_raw['TEN_KV'])
         df_raw = df_raw[df_raw['NVKT'].notna()].copy()
         
         # Chuẩn hóa BAOHONG_ID
-        df_raw['BAOHONG_ID_STR'] = df_raw['BAOHONG_ID'].apply(normalize_id)
+        df_raw['BAOHONG_ID_STR'] = normalize_id_series(df_raw['BAOHONG_ID'])
         
         # Đếm số phiếu trong danh sách GT mà KHÔNG ĐẠT
         df_gt = df_raw[df_raw['BAOHONG_ID_STR'].isin(exclusion_ids)]
         num_gt_khong_dat = len(df_gt[df_gt['DAT_TT_KO_HEN'] != 1])
         print(f"✅ Số phiếu GT (không đạt → đạt): {num_gt_khong_dat}")
         
-        # Tính thống kê TRƯỚC giảm trừ
-        print("\n✓ Đang tính thống kê TRƯỚC giảm trừ...")
-        df_stats_before = calculate_statistics(df_raw, has_ten_doi)
-        
-        # Tính thống kê SAU giảm trừ - THEO CƠ CHẾ HNI
-        print("✓ Đang tính thống kê SAU giảm trừ (HNI: chuyển trạng thái, giữ mẫu số)...")
-        df_stats_after = calculate_statistics_hni(df_raw, exclusion_ids, has_ten_doi)
+        # Tính thống kê TRƯỚC và SAU giảm trừ trong 1 lần groupby
+        print("\n✓ Đang tính thống kê TRƯỚC/SAU giảm trừ (HNI: chuyển trạng thái, giữ mẫu số)...")
+        df_stats_before, df_stats_after = compare_stats(
+            df_raw, exclusion_ids, POLICY_HNI,
+            ['TEN_DOI', 'NVKT'] if has_ten_doi else ['NVKT']
+        )
         
         # Merge kết quả để so sánh
         print("✓ Đang tạo báo cáo so sánh...")
@@ -1104,7 +846,7 @@ def create_c11_sm2_comparison_report(exclusion_ids, output_dir):
             return None
         
         # Đọc dữ liệu thô
-        df_raw = pd.read_excel(input_file, sheet_name='Sheet1')
+        df_raw = load_detail(input_file, sheet_name='Sheet1')
         print(f"✅ Đã đọc file, tổng số dòng thô: {len(df_raw)}")
         
         # Kiểm tra cột cần thiết
@@ -1119,7 +861,7 @@ def create_c11_sm2_comparison_report(exclusion_ids, output_dir):
         has_ten_doi = 'TEN_DOI' in df_raw.columns
         
         # Chuẩn hóa cột NVKT
-        df_raw['NVKT'] = df_raw['TEN_KV'].apply(extract_nvkt_name)
+        df_raw['NVKT'] = extract_nvkt_series(df_raw['TEN_KV'])
         df_raw = df_raw[df_raw['NVKT'].notna()].copy()
         
         # Tính cột TG (thời gian xử lý) nếu chưa có
@@ -1138,20 +880,20 @@ def create_c11_sm2_comparison_report(exclusion_ids, output_dir):
         df_raw['PHIEU_DAT'] = (df_raw['TG'] <= 72).astype(int)
         
         # Chuẩn hóa BAOHONG_ID
-        df_raw['BAOHONG_ID_STR'] = df_raw['BAOHONG_ID'].apply(normalize_id)
+        df_raw['BAOHONG_ID_STR'] = normalize_id_series(df_raw['BAOHONG_ID'])
         
         # Đếm số phiếu trong danh sách GT mà KHÔNG ĐẠT
         df_gt = df_raw[df_raw['BAOHONG_ID_STR'].isin(exclusion_ids)]
         num_gt_khong_dat = len(df_gt[df_gt['PHIEU_DAT'] != 1])
         print(f"✅ Số phiếu GT (không đạt → đạt): {num_gt_khong_dat}")
         
-        # Tính thống kê TRƯỚC giảm trừ
-        print("\n✓ Đang tính thống kê TRƯỚC giảm trừ...")
-        df_stats_before = calculate_statistics(df_raw, has_ten_doi, dat_column='PHIEU_DAT', dat_value=1)
-        
-        # Tính thống kê SAU giảm trừ - THEO CƠ CHẾ HNI
-        print("✓ Đang tính thống kê SAU giảm trừ (HNI: chuyển trạng thái, giữ mẫu số)...")
-        df_stats_after = calculate_statistics_hni(df_raw, exclusion_ids, has_ten_doi, dat_column='PHIEU_DAT', dat_value=1)
+        # Tính thống kê TRƯỚC và SAU giảm trừ trong 1 lần groupby
+        print("\n✓ Đang tính thống kê TRƯỚC/SAU giảm trừ (HNI: chuyển trạng thái, giữ mẫu số)...")
+        df_stats_before, df_stats_after = compare_stats(
+            df_raw, exclusion_ids, POLICY_HNI,
+            ['TEN_DOI', 'NVKT'] if has_ten_doi else ['NVKT'],
+            dat_column='PHIEU_DAT', dat_value=1
+        )
         
         # Merge kết quả để so sánh
         print("✓ Đang tạo báo cáo so sánh...")
@@ -1312,7 +1054,7 @@ def create_c12_comparison_report(exclusion_ids, output_dir):
         print("-"*40)
         
         # Đọc sheet TH_SM1C12_HLL_Thang (dữ liệu đã tổng hợp sẵn)
-        df_before = pd.read_excel(input_file_sm1, sheet_name='TH_SM1C12_HLL_Thang')
+        df_before = load_detail(input_file_sm1, sheet_name='TH_SM1C12_HLL_Thang')
         print(f"✅ Đã đọc TH_SM1C12_HLL_Thang (trước GT): {len(df_before)} dòng")
         print(f"   - Tổng HLL: {df_before['Số phiếu HLL'].sum()}")
         print(f"   - Tổng BH: {df_before['Số phiếu báo hỏng'].sum()}")
@@ -1325,12 +1067,12 @@ def create_c12_comparison_report(exclusion_ids, output_dir):
         print("-"*40)
         
         # ĐỌC SM1 (dữ liệu thô)
-        df_sm1_raw = pd.read_excel(input_file_sm1, sheet_name='Sheet1')
+        df_sm1_raw = load_detail(input_file_sm1, sheet_name='Sheet1')
         print(f"✅ Đã đọc SM1-C12 Sheet1: {len(df_sm1_raw)} dòng")
         
-        df_sm1_raw['NVKT'] = df_sm1_raw['TEN_KV'].apply(extract_nvkt_name)
+        df_sm1_raw['NVKT'] = extract_nvkt_series(df_sm1_raw['TEN_KV'])
         df_sm1_raw = df_sm1_raw[df_sm1_raw['NVKT'].notna()].copy()
-        df_sm1_raw['BAOHONG_ID_STR'] = df_sm1_raw['BAOHONG_ID'].apply(normalize_id)
+        df_sm1_raw['BAOHONG_ID_STR'] = normalize_id_series(df_sm1_raw['BAOHONG_ID'])
         
         # Đếm số phiếu HLL bị giảm trừ
         df_sm1_gt = df_sm1_raw[df_sm1_raw['BAOHONG_ID_STR'].isin(exclusion_ids)]
@@ -1381,12 +1123,12 @@ def create_c12_comparison_report(exclusion_ids, output_dir):
         print("XỬ LÝ SM2-C12 (Tổng phiếu báo hỏng) - HNI: GIỮ NGUYÊN")
         print("-"*40)
         
-        df_sm2_raw = pd.read_excel(input_file_sm2, sheet_name='Sheet1')
+        df_sm2_raw = load_detail(input_file_sm2, sheet_name='Sheet1')
         print(f"✅ Đã đọc SM2-C12 thô: {len(df_sm2_raw)} dòng")
         
-        df_sm2_raw['NVKT'] = df_sm2_raw['TEN_KV'].apply(extract_nvkt_name)
+        df_sm2_raw['NVKT'] = extract_nvkt_series(df_sm2_raw['TEN_KV'])
         df_sm2_raw = df_sm2_raw[df_sm2_raw['NVKT'].notna()].copy()
-        df_sm2_raw['BAOHONG_ID_STR'] = df_sm2_raw['BAOHONG_ID'].apply(normalize_id)
+        df_sm2_raw['BAOHONG_ID_STR'] = normalize_id_series(df_sm2_raw['BAOHONG_ID'])
         
         has_ten_doi_sm2 = 'TEN_DOI' in df_sm2_raw.columns
         
@@ -1610,11 +1352,11 @@ def create_sm1_c12_excluded_file(exclusion_ids, output_dir):
         print("BƯỚC 1: Xử lý dữ liệu Sheet1")
         print("-"*40)
         
-        df_sm1 = pd.read_excel(input_file_sm1, sheet_name='Sheet1')
+        df_sm1 = load_detail(input_file_sm1, sheet_name='Sheet1')
         print(f"✅ Đã đọc SM1-C12, tổng số dòng thô: {len(df_sm1)}")
         
         # Lọc dữ liệu sau giảm trừ
-        df_sm1['BAOHONG_ID_STR'] = df_sm1['BAOHONG_ID'].apply(normalize_id)
+        df_sm1['BAOHONG_ID_STR'] = normalize_id_series(df_sm1['BAOHONG_ID'])
         df_sm1_excluded = df_sm1[~df_sm1['BAOHONG_ID_STR'].isin(exclusion_ids)].copy()
         
         # Xóa cột tạm
@@ -1629,7 +1371,7 @@ def create_sm1_c12_excluded_file(exclusion_ids, output_dir):
         print("-"*40)
         
         # Chuẩn hóa cột NVKT
-        df_sm1_excluded['NVKT'] = df_sm1_excluded['TEN_KV'].apply(extract_nvkt_name)
+        df_sm1_excluded['NVKT'] = extract_nvkt_series(df_sm1_excluded['TEN_KV'])
         
         has_ten_doi = 'TEN_DOI' in df_sm1_excluded.columns
         
@@ -1672,12 +1414,12 @@ def create_sm1_c12_excluded_file(exclusion_ids, output_dir):
         
         # Đọc dữ liệu SM2-C12 để lấy tổng phiếu báo hỏng
         if os.path.exists(input_file_sm2):
-            df_sm2 = pd.read_excel(input_file_sm2, sheet_name='Sheet1')
+            df_sm2 = load_detail(input_file_sm2, sheet_name='Sheet1')
             print(f"✅ Đã đọc SM2-C12, tổng số dòng thô: {len(df_sm2)}")
 
             # KHÔNG ÁP DỤNG GIẢM TRỪ CHO SM2-C12 (Mẫu số giữ nguyên)
             # Chuẩn hóa cột NVKT cho SM2 (dữ liệu gốc)
-            df_sm2['NVKT'] = df_sm2['TEN_KV'].apply(extract_nvkt_name)
+            df_sm2['NVKT'] = extract_nvkt_series(df_sm2['TEN_KV'])
 
             has_ten_doi_sm2 = 'TEN_DOI' in df_sm2.columns
 
@@ -1781,7 +1523,7 @@ def create_sm1_c12_excluded_file(exclusion_ids, output_dir):
         
         # Đọc dữ liệu gốc để so sánh
         try:
-            df_goc = pd.read_excel(input_file_sm1, sheet_name='TH_SM1C12_HLL_Thang')
+            df_goc = load_detail(input_file_sm1, sheet_name='TH_SM1C12_HLL_Thang')
             tong_hll_tho = df_goc['Số phiếu HLL'].sum()
             tong_bh_tho = df_goc['Số phiếu báo hỏng'].sum()
             tyle_tho = round((tong_hll_tho / tong_bh_tho * 100), 2) if tong_bh_tho > 0 else 0
@@ -1843,7 +1585,7 @@ def create_c12_ti_le_bao_hong_comparison_report(exclusion_ids, output_dir):
         print("XỬ LÝ SM4-C11 (Phiếu báo hỏng dịch vụ BRCĐ)")
         print("-"*40)
         
-        df_raw = pd.read_excel(input_file, sheet_name=0)  # Sheet 1
+        df_raw = load_detail(input_file, sheet_name=0)  # Sheet 1
         print(f"✅ Đã đọc SM4-C11 thô: {len(df_raw)} dòng")
         
         # Kiểm tra cột cần thiết
@@ -1865,7 +1607,7 @@ def create_c12_ti_le_bao_hong_comparison_report(exclusion_ids, output_dir):
         print(f"✅ Đã lọc {len(df_brcd)} bản ghi dịch vụ BRCĐ")
         
         # Chuẩn hóa cột NVKT
-        df_brcd['NVKT'] = df_brcd['TEN_KV'].apply(extract_nvkt_name)
+        df_brcd['NVKT'] = extract_nvkt_series(df_brcd['TEN_KV'])
         df_brcd = df_brcd[df_brcd['NVKT'].notna()].copy()
         
         # Chuẩn hóa tên về Title Case để đồng nhất
@@ -1874,7 +1616,7 @@ def create_c12_ti_le_bao_hong_comparison_report(exclusion_ids, output_dir):
         has_ten_doi = 'TEN_DOI' in df_brcd.columns
         
         # Áp dụng giảm trừ
-        df_brcd['BAOHONG_ID_STR'] = df_brcd['BAOHONG_ID'].apply(normalize_id)
+        df_brcd['BAOHONG_ID_STR'] = normalize_id_series(df_brcd['BAOHONG_ID'])
         df_excluded = df_brcd[~df_brcd['BAOHONG_ID_STR'].isin(exclusion_ids)].copy()
         num_excluded = len(df_brcd) - len(df_excluded)
         print(f"✅ Loại trừ: {num_excluded} phiếu, còn lại {len(df_excluded)} phiếu")
@@ -1895,7 +1637,7 @@ def create_c12_ti_le_bao_hong_comparison_report(exclusion_ids, output_dir):
         print("XỬ LÝ FILE THAM CHIẾU THUÊ BAO")
         print("-"*40)
         
-        df_ref = pd.read_excel(ref_file)
+        df_ref = read_excel(ref_file)
         print(f"✅ Đã đọc file tham chiếu: {len(df_ref)} dòng")
         
         # Tìm cột tên NVKT
@@ -1913,7 +1655,7 @@ def create_c12_ti_le_bao_hong_comparison_report(exclusion_ids, output_dir):
         df_ref_clean.columns = ['NVKT', 'Tổng TB']
         
         # Chuẩn hóa tên NVKT để khớp với dữ liệu từ df_brcd
-        df_ref_clean['NVKT'] = df_ref_clean['NVKT'].apply(extract_nvkt_name)
+        df_ref_clean['NVKT'] = extract_nvkt_series(df_ref_clean['NVKT'])
         df_ref_clean = df_ref_clean.dropna(subset=['NVKT', 'Tổng TB'])
         
         # Chuẩn hóa tên về Title Case để đồng nhất
@@ -2098,15 +1840,14 @@ def load_c14_exclusion_list(exclusion_file="du_lieu_tham_chieu/LOAI_TRU_C1.4.xls
             print(f"⚠️ Không tìm thấy file loại trừ C1.4: {exclusion_file}")
             return set()
         
-        df = pd.read_excel(exclusion_file)
+        df = read_excel(exclusion_file)
         
         if 'BAOHONG_ID' not in df.columns:
             print(f"⚠️ Không tìm thấy cột 'BAOHONG_ID' trong file {exclusion_file}")
             return set()
         
         # Chuẩn hóa tất cả ID
-        exclusion_ids = {normalize_id(idx) for idx in df['BAOHONG_ID'].tolist() if pd.notna(idx)}
-        exclusion_ids.discard("")
+        exclusion_ids = normalize_id_set(df['BAOHONG_ID'])
         
         print(f"✅ Đã đọc {len(exclusion_ids)} mã BAOHONG_ID loại trừ C1.4")
         return exclusion_ids
@@ -2146,14 +1887,14 @@ def create_c14_comparison_report(exclusion_ids, output_dir):
             print(f"❌ Không tìm thấy file dữ liệu C1.4: {data_file}")
             return None
         
-        df_raw = pd.read_excel(data_file, sheet_name="Sheet1")
+        df_raw = load_detail(data_file, sheet_name="Sheet1")
         print(f"✅ Đã đọc file dữ liệu: {len(df_raw)} phiếu khảo sát")
         
         # Chuẩn hóa cột NVKT
         if 'TEN_NVKT_DB' in df_raw.columns:
-            df_raw['NVKT'] = df_raw['TEN_NVKT_DB'].apply(extract_nvkt_name)
+            df_raw['NVKT'] = extract_nvkt_series(df_raw['TEN_NVKT_DB'])
         elif 'TEN_KV' in df_raw.columns:
-            df_raw['NVKT'] = df_raw['TEN_KV'].apply(extract_nvkt_name)
+            df_raw['NVKT'] = extract_nvkt_series(df_raw['TEN_KV'])
         else:
             print("❌ Không tìm thấy cột tên NVKT")
             return None
@@ -2180,7 +1921,7 @@ def create_c14_comparison_report(exclusion_ids, output_dir):
         df_ks['IS_KHL'] = df_ks['KHL_KT'].notna().astype(int)
         
         # Chuẩn hóa BAOHONG_ID
-        df_ks['BAOHONG_ID_STR'] = df_ks['BAOHONG_ID'].apply(normalize_id)
+        df_ks['BAOHONG_ID_STR'] = normalize_id_series(df_ks['BAOHONG_ID'])
         
         # Đếm số phiếu KHL được giảm trừ
         df_gt = df_ks[df_ks['BAOHONG_ID_STR'].isin(exclusion_ids)]
@@ -2205,51 +1946,14 @@ def create_c14_comparison_report(exclusion_ids, output_dir):
         
         # ========== TÍNH TOÁN SAU GIẢM TRỪ - HNI ==========
         # HNI: Giữ nguyên Tổng KS, giảm số KHL nếu phiếu đó được GT
-        def calculate_c14_hni(df_ks, exclusion_ids, has_ten_doi):
-            """Tính C1.4 theo HNI: giảm KHL nếu phiếu đó được GT"""
-            report_data = []
-            group_cols = ['TEN_DOI', 'NVKT'] if has_ten_doi else ['NVKT']
-            
-            for group_key, group_df in df_ks.groupby(group_cols):
-                # Tổng phiếu KS = Tổng thô (giữ nguyên mẫu số)
-                tong_ks = len(group_df)
-                
-                # Số phiếu KHL gốc
-                so_khl_goc = group_df['IS_KHL'].sum()
-                
-                # Số phiếu KHL trong nhóm này được GT
-                df_gt_group = group_df[group_df['BAOHONG_ID_STR'].isin(exclusion_ids)]
-                so_khl_gt = df_gt_group['IS_KHL'].sum()
-                
-                # KHL sau GT = KHL gốc - KHL được GT
-                so_khl_sau = max(0, so_khl_goc - so_khl_gt)
-                
-                # Tỷ lệ HL với mẫu số = Tổng KS thô
-                ty_le_hl = round((tong_ks - so_khl_sau) / tong_ks * 100, 2) if tong_ks > 0 else 100
-                
-                if has_ten_doi:
-                    ten_doi, nvkt = group_key
-                    report_data.append({
-                        'TEN_DOI': ten_doi,
-                        'NVKT': nvkt,
-                        'Tổng phiếu KS': tong_ks,  # Giữ nguyên = thô
-                        'Số phiếu KHL': so_khl_sau,  # KHL gốc - KHL GT
-                        'Số phiếu GT': int(so_khl_gt),
-                        'Tỷ lệ HL (%)': ty_le_hl
-                    })
-                else:
-                    report_data.append({
-                        'NVKT': group_key,
-                        'Tổng phiếu KS': tong_ks,
-                        'Số phiếu KHL': so_khl_sau,
-                        'Số phiếu GT': int(so_khl_gt),
-                        'Tỷ lệ HL (%)': ty_le_hl
-                    })
-            
-            return pd.DataFrame(report_data)
-        
-        df_after = calculate_c14_hni(df_ks, exclusion_ids, has_ten_doi)
-        
+        # Phiếu KHL là phiếu "không đạt" (IS_KHL = 0 là đạt), GT chuyển KHL → HL
+        group_cols = ['TEN_DOI', 'NVKT'] if has_ten_doi else ['NVKT']
+        df_after = group_stats(df_ks, group_cols, dat_column='IS_KHL', dat_value=0,
+                               exclusion_ids=exclusion_ids, policy=POLICY_HNI)
+        df_after['Số phiếu KHL'] = df_after['Tổng phiếu'] - df_after['Số phiếu đạt']
+        df_after = df_after.rename(columns={'Tổng phiếu': 'Tổng phiếu KS', 'Tỷ lệ %': 'Tỷ lệ HL (%)'})
+        df_after = df_after[group_cols + ['Tổng phiếu KS', 'Số phiếu KHL', 'Số phiếu GT', 'Tỷ lệ HL (%)']]
+
         # ========== MERGE VÀ SO SÁNH ==========
         merge_cols = ['TEN_DOI', 'NVKT'] if has_ten_doi else ['NVKT']
         
@@ -2389,15 +2093,14 @@ def load_c15_exclusion_list(exclusion_file="du_lieu_tham_chieu/LOAI_TRU_C1.5.xls
             print(f"⚠️ Không tìm thấy file loại trừ C1.5: {exclusion_file}")
             return set()
         
-        df = pd.read_excel(exclusion_file)
+        df = read_excel(exclusion_file)
         
         if 'HDTB_ID' not in df.columns:
             print(f"⚠️ Không tìm thấy cột 'HDTB_ID' trong file {exclusion_file}")
             return set()
         
         # Chuẩn hóa tất cả ID
-        exclusion_ids = {normalize_id(idx) for idx in df['HDTB_ID'].tolist() if pd.notna(idx)}
-        exclusion_ids.discard("")
+        exclusion_ids = normalize_id_set(df['HDTB_ID'])
         
         print(f"✅ Đã đọc {len(exclusion_ids)} mã HDTB_ID loại trừ C1.5")
         return exclusion_ids
@@ -2437,7 +2140,7 @@ def create_c15_comparison_report(exclusion_ids, output_dir):
             print(f"❌ Không tìm thấy file dữ liệu C1.5: {data_file}")
             return None
         
-        df_raw = pd.read_excel(data_file, sheet_name="DATA")
+        df_raw = load_detail(data_file, sheet_name="DATA")
         print(f"✅ Đã đọc file dữ liệu: {len(df_raw)} bản ghi tổng")
         
         # Kiểm tra cột cần thiết
@@ -2452,7 +2155,7 @@ def create_c15_comparison_report(exclusion_ids, output_dir):
         print(f"✅ Số phiếu đã hoàn công (NGAY_HC != null): {len(df_hc)}")
         
         # Chuẩn hóa cột NVKT
-        df_hc['NVKT'] = df_hc['TEN_NVKT'].apply(extract_nvkt_name)
+        df_hc['NVKT'] = extract_nvkt_series(df_hc['TEN_NVKT'])
         df_hc = df_hc[df_hc['NVKT'].notna()].copy()
         df_hc['NVKT'] = df_hc['NVKT'].str.strip().str.title()
         
@@ -2464,7 +2167,7 @@ def create_c15_comparison_report(exclusion_ids, output_dir):
         df_hc['IS_DAT'] = (df_hc['PT2_KR16'] != 1).astype(int)
         
         # Chuẩn hóa HDTB_ID
-        df_hc['HDTB_ID_STR'] = df_hc['HDTB_ID'].apply(normalize_id)
+        df_hc['HDTB_ID_STR'] = normalize_id_series(df_hc['HDTB_ID'])
         
         # Đếm số phiếu không đạt được giảm trừ (sẽ chuyển thành đạt)
         df_gt = df_hc[df_hc['HDTB_ID_STR'].isin(exclusion_ids)]
@@ -2489,54 +2192,15 @@ def create_c15_comparison_report(exclusion_ids, output_dir):
                                       df_before['Tổng Hoàn công'].replace(0, 1) * 100).round(2)
         
         # ========== TÍNH TOÁN SAU GIẢM TRỪ - HNI ==========
-        def calculate_c15_hni(df_hc, exclusion_ids, has_ten_doi):
-            """Tính C1.5 theo HNI: chuyển phiếu không đạt → đạt nếu được GT"""
-            report_data = []
-            group_cols = ['TEN_DOI', 'NVKT'] if has_ten_doi else ['NVKT']
-            
-            for group_key, group_df in df_hc.groupby(group_cols):
-                # Tổng Hoàn công = Tổng thô (giữ nguyên mẫu số)
-                tong_hc = len(group_df)
-                
-                # Số phiếu đạt gốc
-                so_dat_goc = group_df['IS_DAT'].sum()
-                
-                # Số phiếu không đạt trong nhóm này được GT (sẽ chuyển thành đạt)
-                df_gt_group = group_df[group_df['HDTB_ID_STR'].isin(exclusion_ids)]
-                so_khong_dat_gt = len(df_gt_group[df_gt_group['IS_DAT'] == 0])
-                
-                # Phiếu đạt sau GT = Đạt gốc + Không đạt được GT
-                so_dat_sau = so_dat_goc + so_khong_dat_gt
-                so_khong_dat_sau = tong_hc - so_dat_sau
-                
-                # Tỷ lệ đạt với mẫu số = Tổng HC thô
-                ty_le_dat = round(so_dat_sau / tong_hc * 100, 2) if tong_hc > 0 else 100
-                
-                if has_ten_doi:
-                    ten_doi, nvkt = group_key
-                    report_data.append({
-                        'TEN_DOI': ten_doi,
-                        'NVKT': nvkt,
-                        'Tổng Hoàn công': tong_hc,  # Giữ nguyên = thô
-                        'Phiếu đạt': so_dat_sau,
-                        'Phiếu không đạt': so_khong_dat_sau,
-                        'Số phiếu GT': int(so_khong_dat_gt),
-                        'Tỷ lệ đạt (%)': ty_le_dat
-                    })
-                else:
-                    report_data.append({
-                        'NVKT': group_key,
-                        'Tổng Hoàn công': tong_hc,
-                        'Phiếu đạt': so_dat_sau,
-                        'Phiếu không đạt': so_khong_dat_sau,
-                        'Số phiếu GT': int(so_khong_dat_gt),
-                        'Tỷ lệ đạt (%)': ty_le_dat
-                    })
-            
-            return pd.DataFrame(report_data)
-        
-        df_after = calculate_c15_hni(df_hc, exclusion_ids, has_ten_doi)
-        
+        group_cols = ['TEN_DOI', 'NVKT'] if has_ten_doi else ['NVKT']
+        df_after = group_stats(df_hc, group_cols, dat_column='IS_DAT', dat_value=1,
+                               exclusion_ids=exclusion_ids, policy=POLICY_HNI, id_column='HDTB_ID_STR')
+        df_after['Phiếu không đạt'] = df_after['Tổng phiếu'] - df_after['Số phiếu đạt']
+        df_after = df_after.rename(columns={
+            'Tổng phiếu': 'Tổng Hoàn công', 'Số phiếu đạt': 'Phiếu đạt', 'Tỷ lệ %': 'Tỷ lệ đạt (%)'
+        })
+        df_after = df_after[group_cols + ['Tổng Hoàn công', 'Phiếu đạt', 'Phiếu không đạt', 'Số phiếu GT', 'Tỷ lệ đạt (%)']]
+
         # ========== MERGE VÀ SO SÁNH ==========
         merge_cols = ['TEN_DOI', 'NVKT'] if has_ten_doi else ['NVKT']
         
@@ -2683,7 +2347,7 @@ def create_unit_bsc_comparison_report(exclusion_folder, original_data_folder, ou
             
             # Đọc điểm C1.1 TP1 (SM2)
             try:
-                df_tp1 = pd.read_excel(os.path.join(folder, 'So_sanh_C11_SM2.xlsx'), sheet_name='Thong_ke_theo_don_vi')
+                df_tp1 = read_excel(os.path.join(folder, 'So_sanh_C11_SM2.xlsx'), sheet_name='Thong_ke_theo_don_vi')
                 df_tp1 = df_tp1[df_tp1['Đơn vị'] != 'TTVT Sơn Tây'].copy()  # Loại bỏ dòng TTVT (sẽ tính riêng)
                 df_tp1 = df_tp1.rename(columns={'Đơn vị': 'don_vi'})
                 df_tp1['c11_tp1_tho'] = df_tp1['Điểm BSC (Thô)']
@@ -2695,7 +2359,7 @@ def create_unit_bsc_comparison_report(exclusion_folder, original_data_folder, ou
             
             # Đọc điểm C1.1 TP2 (SM4)
             try:
-                df_tp2 = pd.read_excel(os.path.join(folder, 'So_sanh_C11_SM4.xlsx'), sheet_name='Thong_ke_theo_don_vi')
+                df_tp2 = read_excel(os.path.join(folder, 'So_sanh_C11_SM4.xlsx'), sheet_name='Thong_ke_theo_don_vi')
                 df_tp2 = df_tp2[df_tp2['Đơn vị'] != 'TTVT Sơn Tây'].copy()
                 df_tp2 = df_tp2.rename(columns={'Đơn vị': 'don_vi'})
                 df_tp2['c11_tp2_tho'] = df_tp2['Điểm BSC (Thô)']
@@ -2707,7 +2371,7 @@ def create_unit_bsc_comparison_report(exclusion_folder, original_data_folder, ou
             
             # Đọc điểm C1.2 TP1 (SM1 - Hỏng lặp lại)
             try:
-                df_c12_tp1 = pd.read_excel(os.path.join(folder, 'So_sanh_C12_SM1.xlsx'), sheet_name='Thong_ke_theo_don_vi')
+                df_c12_tp1 = read_excel(os.path.join(folder, 'So_sanh_C12_SM1.xlsx'), sheet_name='Thong_ke_theo_don_vi')
                 df_c12_tp1 = df_c12_tp1[df_c12_tp1['Đơn vị'] != 'TTVT Sơn Tây'].copy()
                 df_c12_tp1 = df_c12_tp1.rename(columns={'Đơn vị': 'don_vi'})
                 df_c12_tp1['c12_tp1_tho'] = df_c12_tp1['Điểm BSC (Thô)']
@@ -2719,7 +2383,7 @@ def create_unit_bsc_comparison_report(exclusion_folder, original_data_folder, ou
             
             # Đọc điểm C1.2 TP2 (SM4-C12 - Tỷ lệ sự cố)
             try:
-                df_c12_tp2 = pd.read_excel(os.path.join(folder, 'SM4-C12-ti-le-su-co-dv-brcd.xlsx'), sheet_name='Thong_ke_theo_don_vi')
+                df_c12_tp2 = read_excel(os.path.join(folder, 'SM4-C12-ti-le-su-co-dv-brcd.xlsx'), sheet_name='Thong_ke_theo_don_vi')
                 df_c12_tp2 = df_c12_tp2[df_c12_tp2['Đơn vị'] != 'TTVT Sơn Tây'].copy()
                 df_c12_tp2 = df_c12_tp2.rename(columns={'Đơn vị': 'don_vi'})
                 df_c12_tp2['c12_tp2_tho'] = df_c12_tp2['Điểm BSC (Thô)']
@@ -2731,7 +2395,7 @@ def create_unit_bsc_comparison_report(exclusion_folder, original_data_folder, ou
             
             # Đọc điểm C1.4
             try:
-                df_c14 = pd.read_excel(os.path.join(folder, 'So_sanh_C14.xlsx'), sheet_name='Thong_ke_theo_don_vi')
+                df_c14 = read_excel(os.path.join(folder, 'So_sanh_C14.xlsx'), sheet_name='Thong_ke_theo_don_vi')
                 df_c14 = df_c14[df_c14['Đơn vị'] != 'TTVT Sơn Tây'].copy()
                 df_c14 = df_c14.rename(columns={'Đơn vị': 'don_vi'})
                 df_c14['c14_tho'] = df_c14['Điểm BSC (Thô)']
@@ -2743,7 +2407,7 @@ def create_unit_bsc_comparison_report(exclusion_folder, original_data_folder, ou
             
             # Đọc điểm C1.5
             try:
-                df_c15 = pd.read_excel(os.path.join(folder, 'So_sanh_C15.xlsx'), sheet_name='Thong_ke_theo_don_vi')
+                df_c15 = read_excel(os.path.join(folder, 'So_sanh_C15.xlsx'), sheet_name='Thong_ke_theo_don_vi')
                 df_c15 = df_c15[df_c15['Đơn vị'] != 'TTVT Sơn Tây'].copy()
                 df_c15 = df_c15.rename(columns={'Đơn vị': 'don_vi'})
                 df_c15['c15_tho'] = df_c15['Điểm BSC (Thô)']
@@ -2818,7 +2482,7 @@ def create_unit_bsc_comparison_report(exclusion_folder, original_data_folder, ou
                 # Đọc từng file và lấy số liệu tổng hợp
                 # C1.1 TP1 (SM2)
                 try:
-                    df_c11_tp1 = pd.read_excel(os.path.join(exclusion_folder, 'So_sanh_C11_SM2.xlsx'), sheet_name='Thong_ke_tong_hop')
+                    df_c11_tp1 = read_excel(os.path.join(exclusion_folder, 'So_sanh_C11_SM2.xlsx'), sheet_name='Thong_ke_tong_hop')
                     c11_tp1_tong_tho = df_c11_tp1['Tổng phiếu (Thô)'].iloc[0]
                     c11_tp1_dat_tho = df_c11_tp1['Phiếu đạt (Thô)'].iloc[0]
                     c11_tp1_tong_sau = df_c11_tp1['Tổng phiếu (Sau GT)'].iloc[0]
@@ -2829,7 +2493,7 @@ def create_unit_bsc_comparison_report(exclusion_folder, original_data_folder, ou
                 
                 # C1.1 TP2 (SM4)
                 try:
-                    df_c11_tp2 = pd.read_excel(os.path.join(exclusion_folder, 'So_sanh_C11_SM4.xlsx'), sheet_name='Thong_ke_tong_hop')
+                    df_c11_tp2 = read_excel(os.path.join(exclusion_folder, 'So_sanh_C11_SM4.xlsx'), sheet_name='Thong_ke_tong_hop')
                     c11_tp2_tong_tho = df_c11_tp2['Tổng phiếu (Thô)'].iloc[0]
                     c11_tp2_dat_tho = df_c11_tp2['Phiếu đạt (Thô)'].iloc[0]
                     c11_tp2_tong_sau = df_c11_tp2['Tổng phiếu (Sau GT)'].iloc[0]
@@ -2840,7 +2504,7 @@ def create_unit_bsc_comparison_report(exclusion_folder, original_data_folder, ou
                 
                 # C1.2 TP1 (SM1 - Hỏng lặp lại)
                 try:
-                    df_c12_tp1 = pd.read_excel(os.path.join(exclusion_folder, 'So_sanh_C12_SM1.xlsx'), sheet_name='Thong_ke_tong_hop')
+                    df_c12_tp1 = read_excel(os.path.join(exclusion_folder, 'So_sanh_C12_SM1.xlsx'), sheet_name='Thong_ke_tong_hop')
                     c12_tp1_hll_tho = df_c12_tp1['Phiếu HLL (Thô)'].iloc[0]
                     c12_tp1_bh_tho = df_c12_tp1['Phiếu báo hỏng (Thô)'].iloc[0]
                     c12_tp1_hll_sau = df_c12_tp1['Phiếu HLL (Sau GT)'].iloc[0]
@@ -2851,7 +2515,7 @@ def create_unit_bsc_comparison_report(exclusion_folder, original_data_folder, ou
                 
                 # C1.2 TP2 (SM4 - Sự cố BRCĐ)
                 try:
-                    df_c12_tp2 = pd.read_excel(os.path.join(exclusion_folder, 'SM4-C12-ti-le-su-co-dv-brcd.xlsx'), sheet_name='Thong_ke_tong_hop')
+                    df_c12_tp2 = read_excel(os.path.join(exclusion_folder, 'SM4-C12-ti-le-su-co-dv-brcd.xlsx'), sheet_name='Thong_ke_tong_hop')
                     c12_tp2_tb = df_c12_tp2['Tổng thuê bao'].iloc[0]
                     c12_tp2_bh_tho = df_c12_tp2['Phiếu báo hỏng (Thô)'].iloc[0]
                     c12_tp2_bh_sau = df_c12_tp2['Phiếu báo hỏng (Sau GT)'].iloc[0]
@@ -2860,7 +2524,7 @@ def create_unit_bsc_comparison_report(exclusion_folder, original_data_folder, ou
                 
                 # C1.4 (Độ hài lòng)
                 try:
-                    df_c14 = pd.read_excel(os.path.join(exclusion_folder, 'So_sanh_C14.xlsx'), sheet_name='Thong_ke_tong_hop')
+                    df_c14 = read_excel(os.path.join(exclusion_folder, 'So_sanh_C14.xlsx'), sheet_name='Thong_ke_tong_hop')
                     c14_ks_tho = df_c14['Tổng phiếu KS (Thô)'].iloc[0]
                     c14_khl_tho = df_c14['Tổng phiếu KHL (Thô)'].iloc[0]
                     c14_ks_sau = df_c14['Tổng phiếu KS (Sau GT)'].iloc[0]
@@ -2871,7 +2535,7 @@ def create_unit_bsc_comparison_report(exclusion_folder, original_data_folder, ou
                 
                 # C1.5 (Thiết lập đúng hạn)
                 try:
-                    df_c15 = pd.read_excel(os.path.join(exclusion_folder, 'So_sanh_C15.xlsx'), sheet_name='Thong_ke_tong_hop')
+                    df_c15 = read_excel(os.path.join(exclusion_folder, 'So_sanh_C15.xlsx'), sheet_name='Thong_ke_tong_hop')
                     c15_tong_tho = df_c15['Tổng Hoàn công (Thô)'].iloc[0]
                     c15_dat_tho = df_c15['Phiếu đạt (Thô)'].iloc[0]
                     c15_tong_sau = df_c15['Tổng Hoàn công (Sau GT)'].iloc[0]
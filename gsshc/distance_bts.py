@@ -1,6 +1,21 @@
 import pandas as pd
+import numpy as np
 import math
 import json
+import os
+import threading
+from bisect import bisect_left
+
+EARTH_RADIUS_KM = 6371
+# Kích thước ô lưới chỉ mục không gian (độ), ~1.1 km theo vĩ độ
+GRID_CELL_DEG = 0.01
+# Quá số vòng này mà chưa chắc chắn tìm được điểm gần nhất thì quét toàn bộ
+GRID_MAX_RING = 50
+
+CABINET_COLUMNS = ['Tên kết cuối', 'Vĩ độ', 'Kinh độ']
+BTS_NAME_COLUMNS = ['TEN_TRAM', 'Tên trạm', 'MA_TRAM']
+BTS_LAT_COLUMNS = ['LAT', 'LATITUDE', 'VI_DO', 'Vĩ độ']
+BTS_LONG_COLUMNS = ['LONG', 'LNG', 'LONGITUDE', 'KINH_DO', 'Kinh độ']
 
 def haversine_distance(lat1, lon1, lat2, lon2):
     """
@@ -28,13 +43,166 @@ def haversine_distance(lat1, lon1, lat2, lon2):
     c = 2 * math.asin(math.sqrt(a))
     
     # Bán kính Trái Đất (km)
-    earth_radius = 6371
+    earth_radius = EARTH_RADIUS_KM
     
     # Tính khoảng cách
     distance = earth_radius * c
     
     return distance
 
+def haversine_distance_vec(lat, lon, lats_rad, lons_rad):
+    """
+    Haversine vector hóa: khoảng cách (km) từ 1 điểm (độ) tới mảng điểm (radian)
+    """
+    lat_rad = math.radians(lat)
+    lon_rad = math.radians(lon)
+    a = np.sin((lats_rad - lat_rad) / 2) ** 2 + math.cos(lat_rad) * np.cos(lats_rad) * np.sin((lons_rad - lon_rad) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+class CabinetIndex:
+    """
+    Chỉ mục tên hộp (Tên kết cuối) dựng 1 lần từ file Excel:
+    - dict tên chính xác -> dòng đầu tiên
+    - danh sách tên đã sắp xếp để tìm theo tiền tố (bisect)
+    - quét chuỗi con vector hóa khi 2 cách trên không khớp
+    """
+
+    def __init__(self, df):
+        for col in CABINET_COLUMNS:
+            if col not in df.columns:
+                raise ValueError(f"Không tìm thấy cột '{col}' trong file Excel")
+        self.names = df['Tên kết cuối'].astype(str).str.strip().to_numpy(dtype=object)
+        self.lats = df['Vĩ độ'].to_numpy(dtype=object)
+        self.longs = df['Kinh độ'].to_numpy(dtype=object)
+        self.exact = {}
+        for position, name in enumerate(self.names):
+            self.exact.setdefault(name, position)
+        self.sorted_names = sorted((name, position) for position, name in enumerate(self.names))
+        self.sorted_keys = [name for name, _ in self.sorted_names]
+
+    def find(self, cabinet_name):
+        """Vị trí dòng khớp tên hộp (ưu tiên chính xác, rồi tiền tố, rồi chuỗi con) hoặc None"""
+        query = str(cabinet_name).strip()
+        if not query:
+            return None
+        position = self.exact.get(query)
+        if position is not None:
+            return position
+        start = bisect_left(self.sorted_keys, query)
+        prefix_hits = []
+        for name, candidate in self.sorted_names[start:]:
+            if not name.startswith(query):
+                break
+            prefix_hits.append(candidate)
+        if prefix_hits:
+            return min(prefix_hits)
+        hits = np.flatnonzero(pd.Series(self.names).str.contains(query, regex=False).to_numpy())
+        return int(hits[0]) if len(hits) else None
+
+class GridIndex:
+    """
+    Chỉ mục không gian dạng lưới (kiểu geohash) cho bài toán điểm gần nhất:
+    điểm được chia vào các ô GRID_CELL_DEG độ; truy vấn quét các vòng ô quanh điểm
+    cần tìm và dừng khi vòng kế tiếp chắc chắn xa hơn kết quả tốt nhất.
+    """
+
+    def __init__(self, lats, longs, cell_deg=GRID_CELL_DEG):
+        self.cell_deg = cell_deg
+        self.lats = np.asarray(lats, dtype=float)
+        self.longs = np.asarray(longs, dtype=float)
+        self.lats_rad = np.radians(self.lats)
+        self.longs_rad = np.radians(self.longs)
+        rows = np.floor(self.lats / cell_deg).astype(np.int64)
+        cols = np.floor(self.longs / cell_deg).astype(np.int64)
+        self.cells = {}
+        order = np.lexsort((cols, rows))
+        keys = np.stack([rows[order], cols[order]], axis=1)
+        if len(order):
+            boundaries = np.flatnonzero(np.any(np.diff(keys, axis=0) != 0, axis=1)) + 1
+            for chunk in np.split(order, boundaries):
+                self.cells[(int(rows[chunk[0]]), int(cols[chunk[0]]))] = chunk
+        # Khoảng cách (km) tối thiểu tương ứng 1 ô theo phương kinh độ ở vĩ độ lớn nhất
+        max_abs_lat = min(89.0, float(np.abs(self.lats).max()) + cell_deg) if len(self.lats) else 0.0
+        self.cell_km = math.radians(cell_deg) * EARTH_RADIUS_KM * math.cos(math.radians(max_abs_lat))
+
+    def _ring(self, row, col, radius):
+        if radius == 0:
+            chunk = self.cells.get((row, col))
+            return [chunk] if chunk is not None else []
+        found = []
+        for d_row in range(-radius, radius + 1):
+            step = 1 if abs(d_row) == radius else 2 * radius
+            for d_col in range(-radius, radius + 1, step):
+                chunk = self.cells.get((row + d_row, col + d_col))
+                if chunk is not None:
+                    found.append(chunk)
+        return found
+
+    def nearest(self, lat, lon):
+        """(vị trí, khoảng cách km) của điểm gần nhất, hoặc (None, None) nếu không có điểm"""
+        if not len(self.lats):
+            return None, None
+        row = math.floor(lat / self.cell_deg)
+        col = math.floor(lon / self.cell_deg)
+        best_position, best_km = None, math.inf
+        for radius in range(GRID_MAX_RING + 1):
+            chunks = self._ring(row, col, radius)
+            if chunks:
+                candidates = np.concatenate(chunks)
+                distances = haversine_distance_vec(lat, lon, self.lats_rad[candidates], self.longs_rad[candidates])
+                local = int(np.argmin(distances))
+                if distances[local] < best_km:
+                    best_position, best_km = int(candidates[local]), float(distances[local])
+            # Mọi điểm ở vòng radius+1 trở đi cách ít nhất radius ô
+            if best_position is not None and best_km <= radius * self.cell_km:
+                return best_position, best_km
+        # Dự phòng: quét toàn bộ bằng haversine vector hóa
+        distances = haversine_distance_vec(lat, lon, self.lats_rad, self.longs_rad)
+        position = int(np.argmin(distances))
+        return position, float(distances[position])
+
+class BtsIndex:
+    """Danh sách trạm BTS + GridIndex trên các trạm có tọa độ hợp lệ"""
+
+    def __init__(self, df):
+        name_col = _pick_column(df, BTS_NAME_COLUMNS)
+        lat_col = _pick_column(df, BTS_LAT_COLUMNS)
+        long_col = _pick_column(df, BTS_LONG_COLUMNS)
+        lats = pd.to_numeric(df[lat_col], errors='coerce')
+        longs = pd.to_numeric(df[long_col], errors='coerce')
+        valid = (lats.notna() & longs.notna()).to_numpy()
+        self.names = df[name_col].astype(str).to_numpy(dtype=object)[valid]
+        self.grid = GridIndex(lats.to_numpy()[valid], longs.to_numpy()[valid])
+
+def _pick_column(df, candidates):
+    for col in candidates:
+        if col in df.columns:
+            return col
+    raise ValueError(f"Không tìm thấy cột nào trong {candidates} trong file Excel")
+
+_index_cache = {}
+_index_lock = threading.Lock()
+
+def _load_index(excel_file_path, builder):
+    """
+    Chỉ mục dựng từ file Excel, cache theo đường dẫn; tự dựng lại khi file đổi
+    (mtime/kích thước khác lần đọc trước).
+    """
+    path = os.path.abspath(excel_file_path)
+    stat = os.stat(path)  # FileNotFoundError nếu thiếu file
+    signature = (stat.st_mtime_ns, stat.st_size)
+    key = (path, builder)
+    cached = _index_cache.get(key)
+    if cached is not None and cached[0] == signature:
+        return cached[1]
+    with _index_lock:
+        cached = _index_cache.get(key)
+        if cached is None or cached[0] != signature:
+            print(f"Nạp chỉ mục từ {excel_file_path}")
+            cached = (signature, builder(pd.read_excel(path)))
+            _index_cache[key] = cached
+    return cached[1]
+
 def find_nearest_bts_station(user_lat, user_long, cabinet_name, excel_file_path="ket_qua_gop.xlsx"):
     """
     Tìm khoảng cách từ hộp (cabinet_name) đến tọa độ nhận được
@@ -47,29 +215,17 @@ def find_nearest_bts_station(user_lat, user_long, cabinet_name, excel_file_path=
         Dictionary chứa thông tin hộp và khoảng cách
     """
     try:
-        # Đọc dữ liệu từ file Excel
-        df = pd.read_excel(excel_file_path)
-
-        # Kiểm tra các cột cần thiết
-        required_columns = ['Tên kết cuối', 'Vĩ độ', 'Kinh độ']
-        for col in required_columns:
-            if col not in df.columns:
-                raise ValueError(f"Không tìm thấy cột '{col}' trong file Excel")
+        # Chỉ mục tên hộp được cache, chỉ đọc lại Excel khi file thay đổi
+        index = _load_index(excel_file_path, CabinetIndex)
 
         # Chuyển đổi tọa độ nhận được sang float
         user_lat = float(user_lat)
         user_long = float(user_long)
 
-        print(f"Tìm hộp {cabinet_name} trong file {excel_file_path}")
-
         # Tìm dòng chứa tên hộp
-        matched_row = None
-        for idx, row in df.iterrows():
-            if cabinet_name in str(row['Tên kết cuối']):
-                matched_row = row
-                break
+        position = index.find(cabinet_name)
 
-        if matched_row is None:
+        if position is None:
             return {
                 'error': f'Không tìm thấy hộp {cabinet_name} trong file',
                 'user_coordinates': {'lat': user_lat, 'long': user_long}
@@ -77,8 +233,8 @@ def find_nearest_bts_station(user_lat, user_long, cabinet_name, excel_file_path=
 
         # Lấy tọa độ của hộp từ file
         try:
-            box_lat = float(matched_row['Vĩ độ'])
-            box_long = float(matched_row['Kinh độ'])
+            box_lat = float(index.lats[position])
+            box_long = float(index.longs[position])
         except Exception as e:
             return {
                 'error': f'Lỗi lấy tọa độ hộp: {str(e)}',
@@ -115,6 +271,43 @@ def find_nearest_bts_station(user_lat, user_long, cabinet_name, excel_file_path=
             'user_coordinates': {'lat': user_lat, 'long': user_long}
         }
 
+def find_nearest_bts(user_lat, user_long, excel_file_path="map_gps_all_bts.xlsx"):
+    """
+    Tìm trạm BTS gần nhất với tọa độ nhận được (chỉ mục lưới, cache theo file)
+
+    Returns:
+        Dictionary {'user_coordinates', 'nearest_station': {'TEN_TRAM', 'lat', 'long', 'distance_km'}}
+    """
+    try:
+        user_lat = float(user_lat)
+        user_long = float(user_long)
+        index = _load_index(excel_file_path, BtsIndex)
+        position, distance_km = index.grid.nearest(user_lat, user_long)
+        if position is None:
+            return {
+                'error': f'Không có trạm BTS hợp lệ trong file {excel_file_path}',
+                'user_coordinates': {'lat': user_lat, 'long': user_long}
+            }
+        return {
+            'user_coordinates': {'lat': user_lat, 'long': user_long},
+            'nearest_station': {
+                'TEN_TRAM': index.names[position],
+                'lat': float(index.grid.lats[position]),
+                'long': float(index.grid.longs[position]),
+                'distance_km': round(distance_km, 3)
+            }
+        }
+    except FileNotFoundError:
+        return {
+            'error': f'Không tìm thấy file Excel: {excel_file_path}',
+            'user_coordinates': {'lat': user_lat, 'long': user_long}
+        }
+    except Exception as e:
+        return {
+            'error': f'Lỗi xử lý: {str(e)}',
+            'user_coordinates': {'lat': user_lat, 'long': user_long}
+        }
+
 def get_nearest_bts_name_only(user_lat, user_long, excel_file_path="map_gps_all_bts.xlsx"):
     """
     Trả về chỉ tên trạm BTS gần nhất (để tích hợp vào webhook)
@@ -127,7 +320,7 @@ def get_nearest_bts_name_only(user_lat, user_long, excel_file_path="map_gps_all_
     Returns:
         String: Tên trạm BTS gần nhất hoặc thông báo lỗi
     """
-    result = find_nearest_bts_station(user_lat, user_long, excel_file_path)
+    result = find_nearest_bts(user_lat, user_long, excel_file_path)
     
     if 'error' in result:
         return f"Lỗi: {result['error']}"
@@ -146,7 +339,7 @@ def get_nearest_bts_with_distance(user_lat, user_long, excel_file_path="map_gps_
     Returns:
         Tuple: (Tên trạm BTS gần nhất, Khoảng cách (m)) hoặc (thông báo lỗi, None)
     """
-    result = find_nearest_bts_station(user_lat, user_long, excel_file_path)
+    result = find_nearest_bts(user_lat, user_long, excel_file_path)
     
     if 'error' in result:
         return (f"Lỗi: {result['error']}", None)
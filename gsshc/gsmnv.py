@@ -1,17 +1,35 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Response
 from pydantic import BaseModel
 import uvicorn
 import os
+import asyncio
+import threading
+from contextlib import asynccontextmanager
 from google.cloud import vision
-from openai import OpenAI
+from openai import AsyncOpenAI, OpenAI
 import gspread
+import httpx
 from oauth2client.service_account import ServiceAccountCredentials
 from datetime import datetime
 import json
 import pandas as pd
 import math
+import re
 import requests
 
+from webhook_pipeline import (
+    JOB_QUEUE_SIZE,
+    JOB_WORKERS,
+    SHEETS_SCOPES,
+    TELEGRAM_API_BASE_URL,
+    VISION_API_BASE_URL,
+    VISION_SCOPES,
+    GoogleTokenCache,
+    JobQueue,
+    QueueFullError,
+    SheetAppendBatcher,
+)
+
 # Import BTS distance calculation function
 try:
     from distance_bts import get_nearest_bts_with_distance
@@ -28,8 +46,6 @@ except ImportError:
     def process_telegram_image(update):
         return {"error": "Telegram bot module not available"}
 
-app = FastAPI(title="Webhook API", description="API để nhận thông tin từ n8n workflow")
-
 def _read_secret(env_var: str, fallback_file: str = "") -> str:
     value = os.environ.get(env_var, "").strip()
     if value:
@@ -55,18 +71,93 @@ try:
 except Exception:
     vision_client = None
 
-# Cấu hình OpenAI
+# Cấu hình OpenAI (OPENAI_BASE_URL có thể trỏ sang stub khi load test)
 openai_api_key = _read_secret("OPENAI_API_KEY", "openai-vison-key.txt")
 client = OpenAI(api_key=openai_api_key) if openai_api_key else None
+async_openai_client = AsyncOpenAI(api_key=openai_api_key) if openai_api_key else None
+OPENAI_MODEL = "gpt-4o-mini"  # Hoặc "gpt-4o" nếu cần chất lượng cao hơn
 
 GOOGLE_SHEETS_CREDENTIALS_FILE = os.environ.get("GOOGLE_SHEETS_CREDENTIALS_FILE", "ggsheet-key.json")
+SPREADSHEET_ID = os.environ.get("GSSHC_SPREADSHEET_ID", "10mFy9EzRNG2VvOOWnZe0Tl8OK2QnN3cJXTJiMaeUK9Q")
+WORKSHEET_NAME = os.environ.get("GSSHC_WORKSHEET_NAME", "thang11")
+
+# Cấu hình Google Sheets: client và worksheet được cache, chỉ xác thực 1 lần
+_sheets_lock = threading.Lock()
+_sheets_client = None
+_worksheet = None
 
-# Cấu hình Google Sheets
 def init_google_sheets():
-    scope = ["https://spreadsheets.google.com/feeds", "https://www.googleapis.com/auth/drive"]
-    creds = ServiceAccountCredentials.from_json_keyfile_name(GOOGLE_SHEETS_CREDENTIALS_FILE, scope)
-    client = gspread.authorize(creds)
-    return client
+    global _sheets_client
+    with _sheets_lock:
+        if _sheets_client is None:
+            scope = ["https://spreadsheets.google.com/feeds", "https://www.googleapis.com/auth/drive"]
+            creds = ServiceAccountCredentials.from_json_keyfile_name(GOOGLE_SHEETS_CREDENTIALS_FILE, scope)
+            _sheets_client = gspread.authorize(creds)
+        return _sheets_client
+
+def get_worksheet():
+    """Worksheet đích (cache handle, gspread tự refresh token khi hết hạn)"""
+    global _worksheet
+    if _worksheet is None:
+        sheets_client = init_google_sheets()
+        with _sheets_lock:
+            if _worksheet is None:
+                _worksheet = sheets_client.open_by_key(SPREADSHEET_ID).worksheet(WORKSHEET_NAME)
+    return _worksheet
+
+# System prompt cho bước phân tích text OCR
+OPENAI_SYSTEM_PROMPT = """You are a text analysis assistant.
+You will receive a text content extracted from a photo via the OCR tool.
+Your task is to Analyze information from the text, then return the result in JSON format:
+{
+  "cabinet_name": "box cabinet name",
+  "lat": "coordinates, latitude",
+  "long": "long, longtitude",
+  "date": "date displayed in text",
+  "time": "time displayed in text",
+  "power_after_s2": "power after S2"
+}
+Field Descriptions:
+1. cabinet_name - The box cabinet name will be in the form H-ABC/xxxx, or O-ABC/xxxx
+   where ABC being 3 alphabetic characters, xxxx being 4 or 5 digits
+   Examples: H-STY/7846, H-BVI/5609, H-STY/78463
+   Special case: May appear as "O-ABC/xxxx" - normalize to "H-ABC/xxxx" format
+   Special case: May appear as just "ABC/xxxx" or "ABC/xxxxx" - add "H-" prefix automatically
+   IMPORTANT: Always normalize cabinet names to "H-" prefix regardless of source format
+2. "lat": "coordinate, latitude" - is a coordinate component, latitude
+   May appear with degree symbol (°) like: 21.156801°N
+3. "long": "long, longtitude" - is a coordinate component, longtitude
+   May appear with degree symbol (°) like: 105.477859°E
+4. date - date displayed in text
+   Note: Format date into a unified standard format YYYY-MM-DD
+   Examples: "Thứ Hai, 13 Tháng 10,2025" -> "2025-10-13"
+5. time - time displayed in text
+   Note: Format time into a unified standard format HH:MM:SS
+   Examples: "11:03" -> "11:03:00"
+6. power_after_s2 - Power after S2 (Công suất sau S2)
+   IMPORTANT: This value may appear in different formats in OCR text:
+   Format 1: Standard format like "-20.13dBm" or "-17.62 dBm"
+   Format 2: Separated on multiple lines like:
+      dBm
+      -1700
+   When you see a negative number near "dBm" text, extract and format it:
+   - If value is "-1700" or similar 4-digit number, convert to decimal: "-17.00"
+   - If value is "-2013", convert to: "-20.13"
+   - If value is already with decimal like "-17.62", keep as is
+   - Always add "dBm" unit at the end
+   - Final format examples: "-17.00dBm", "-20.13dBm", "-15.45dBm"
+   If no power value found in the text, return empty string ""
+Important Notes:
+- All fields should be extracted from the OCR text
+- Dates and times should be standardized to consistent formats
+- Cabinet names: ALWAYS normalize to "H-" prefix (convert "O-" to "H-", add "H-" if missing)
+- Cabinet names: Support both 4-digit and 5-digit formats after the slash (e.g., H-ABC/7846 or H-ABC/78463)
+- Power values: Look for "dBm" keyword and nearby negative numbers (may be on different lines)
+- Power values: Convert 4-digit numbers to decimal format (divide by 100)
+- Return empty string for any field that cannot be found in the text
+- Always return valid JSON format only, no additional text"""
+
+REQUIRED_ANALYSIS_FIELDS = ["cabinet_name", "lat", "long", "date", "time", "power_after_s2"]
 
 # Model cho dữ liệu từ n8n
 class WebhookData(BaseModel):
@@ -91,7 +182,7 @@ def send_telegram_message(chat_id: str, message: str, parse_mode: str = "HTML")
         if not TELEGRAM_BOT_TOKEN:
             print("❌ Thiếu TELEGRAM_BOT_TOKEN")
             return False
-        url = f"https://api.telegram.org/bot{TELEGRAM_BOT_TOKEN}/sendMessage"
+        url = f"{TELEGRAM_API_BASE_URL}/bot{TELEGRAM_BOT_TOKEN}/sendMessage"
         payload = {
             "chat_id": chat_id,
             "text": message,
@@ -172,70 +263,38 @@ def process_image_with_vision(image_url):
         print(f"Error with Vision API: {str(e)}")
         return f"Error: {str(e)}"
 
+def _openai_messages(text):
+    return [
+        {"role": "system", "content": OPENAI_SYSTEM_PROMPT},
+        {"role": "user", "content": text}
+    ]
+
+def _check_analysis_fields(result):
+    """Kiểm tra phản hồi OpenAI có đủ trường JSON không (chỉ in cảnh báo)"""
+    try:
+        start_idx = result.find('{')
+        end_idx = result.rfind('}') + 1
+        if start_idx != -1 and end_idx > start_idx:
+            json_str = result[start_idx:end_idx]
+            parsed = json.loads(json_str)
+            missing = [field for field in REQUIRED_ANALYSIS_FIELDS if field not in parsed]
+            if missing:
+                print(f"⚠️ Thiếu trường trong phản hồi: {missing}")
+            else:
+                print("✅ Đầy đủ trường JSON yêu cầu.")
+    except Exception as e:
+        print(f"⚠️ Không thể parse JSON từ phản hồi: {e}")
+
 def analyze_text_with_openai(text, name):
     """Phân tích text với OpenAI Assistant"""
     try:
         if client is None:
             raise RuntimeError("OpenAI API key chưa được cấu hình")
-        # System prompt được nhúng trực tiếp trong code
-        system_prompt = """You are a text analysis assistant.
-You will receive a text content extracted from a photo via the OCR tool.
-Your task is to Analyze information from the text, then return the result in JSON format:
-{
-  "cabinet_name": "box cabinet name",
-  "lat": "coordinates, latitude",
-  "long": "long, longtitude",
-  "date": "date displayed in text",
-  "time": "time displayed in text",
-  "power_after_s2": "power after S2"
-}
-Field Descriptions:
-1. cabinet_name - The box cabinet name will be in the form H-ABC/xxxx, or O-ABC/xxxx
-   where ABC being 3 alphabetic characters, xxxx being 4 or 5 digits
-   Examples: H-STY/7846, H-BVI/5609, H-STY/78463
-   Special case: May appear as "O-ABC/xxxx" - normalize to "H-ABC/xxxx" format
-   Special case: May appear as just "ABC/xxxx" or "ABC/xxxxx" - add "H-" prefix automatically
-   IMPORTANT: Always normalize cabinet names to "H-" prefix regardless of source format
-2. "lat": "coordinate, latitude" - is a coordinate component, latitude
-   May appear with degree symbol (°) like: 21.156801°N
-3. "long": "long, longtitude" - is a coordinate component, longtitude
-   May appear with degree symbol (°) like: 105.477859°E
-4. date - date displayed in text
-   Note: Format date into a unified standard format YYYY-MM-DD
-   Examples: "Thứ Hai, 13 Tháng 10,2025" -> "2025-10-13"
-5. time - time displayed in text
-   Note: Format time into a unified standard format HH:MM:SS
-   Examples: "11:03" -> "11:03:00"
-6. power_after_s2 - Power after S2 (Công suất sau S2)
-   IMPORTANT: This value may appear in different formats in OCR text:
-   Format 1: Standard format like "-20.13dBm" or "-17.62 dBm"
-   Format 2: Separated on multiple lines like:
-      dBm
-      -1700
-   When you see a negative number near "dBm" text, extract and format it:
-   - If value is "-1700" or similar 4-digit number, convert to decimal: "-17.00"
-   - If value is "-2013", convert to: "-20.13"
-   - If value is already with decimal like "-17.62", keep as is
-   - Always add "dBm" unit at the end
-   - Final format examples: "-17.00dBm", "-20.13dBm", "-15.45dBm"
-   If no power value found in the text, return empty string ""
-Important Notes:
-- All fields should be extracted from the OCR text
-- Dates and times should be standardized to consistent formats
-- Cabinet names: ALWAYS normalize to "H-" prefix (convert "O-" to "H-", add "H-" if missing)
-- Cabinet names: Support both 4-digit and 5-digit formats after the slash (e.g., H-ABC/7846 or H-ABC/78463)
-- Power values: Look for "dBm" keyword and nearby negative numbers (may be on different lines)
-- Power values: Convert 4-digit numbers to decimal format (divide by 100)
-- Return empty string for any field that cannot be found in the text
-- Always return valid JSON format only, no additional text"""
 
         # Sử dụng Chat Completions API thay vì Responses API
         response = client.chat.completions.create(
-            model="gpt-4o-mini",  # Hoặc "gpt-4o" nếu cần chất lượng cao hơn
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": text}
-            ],
+            model=OPENAI_MODEL,
+            messages=_openai_messages(text),
             temperature=0.1,
             response_format={"type": "json_object"}
         )
@@ -243,23 +302,7 @@ Important Notes:
         # Lấy kết quả
         result = response.choices[0].message.content
         print("OpenAI Chat API output:", result)
-
-        # Kiểm tra có đủ trường JSON không
-        required_fields = ["cabinet_name", "lat", "long", "date", "time", "power_after_s2"]
-        try:
-            start_idx = result.find('{')
-            end_idx = result.rfind('}') + 1
-            if start_idx != -1 and end_idx > start_idx:
-                json_str = result[start_idx:end_idx]
-                parsed = json.loads(json_str)
-                missing = [field for field in required_fields if field not in parsed]
-                if missing:
-                    print(f"⚠️ Thiếu trường trong phản hồi: {missing}")
-                else:
-                    print("✅ Đầy đủ trường JSON yêu cầu.")
-        except Exception as e:
-            print(f"⚠️ Không thể parse JSON từ phản hồi: {e}")
-
+        _check_analysis_fields(result)
         return result
     except Exception as e:
         print(f"Lỗi khi phân tích với Responses API: {str(e)}")
@@ -312,138 +355,131 @@ def send_analysis_notification(lat, long, date, time, nearest_bts, distance_m, n
         print(f"❌ Unexpected error sending notification: {str(e)}")
         return False
 
+def clean_coordinate(coord_str):
+    """Xử lý tọa độ để loại bỏ ký tự không phải số (như °)"""
+    clean_str = re.sub(r'[^0-9.\-]', '', str(coord_str))
+    return float(clean_str)
+
+def parse_openai_analysis(openai_analysis):
+    """Parse JSON từ phản hồi OpenAI, trả về dict các trường (để trống nếu không parse được)"""
+    analysis = {field: "" for field in REQUIRED_ANALYSIS_FIELDS}
+    try:
+        # Convert openai_analysis to string if it's not already
+        analysis_str = str(openai_analysis) if openai_analysis else ""
+
+        # Thử parse JSON từ OpenAI response
+        if analysis_str and not analysis_str.startswith("Error"):
+            # Tìm JSON trong response (có thể có text khác xung quanh)
+            start_idx = analysis_str.find('{')
+            end_idx = analysis_str.rfind('}') + 1
+
+            if start_idx != -1 and end_idx > start_idx:
+                parsed_data = json.loads(analysis_str[start_idx:end_idx])
+                for field in REQUIRED_ANALYSIS_FIELDS:
+                    analysis[field] = parsed_data.get(field, "")
+                print(
+                    f"Parsed OpenAI data - Cabinet: {analysis['cabinet_name']}, Lat: {analysis['lat']}, "
+                    f"Long: {analysis['long']}, Date: {analysis['date']}, Time: {analysis['time']}, "
+                    f"Power: {analysis['power_after_s2']}"
+                )
+    except (json.JSONDecodeError, KeyError, AttributeError) as e:
+        print(f"Error parsing OpenAI JSON: {str(e)}")
+        # Nếu không parse được JSON, để trống các trường
+    return analysis
+
+def calculate_cabinet_distance(lat, long, cabinet_name):
+    """
+    Tính khoảng cách từ tọa độ nhận được đến hộp cabinet
+
+    Returns:
+        (nearest_bts, distance_m) - chuỗi rỗng nếu thiếu dữ liệu
+    """
+    nearest_bts = ""
+    distance_m = ""
+    if not (lat and long and cabinet_name):
+        return nearest_bts, distance_m
+    try:
+        print("Step 4: Calculating distance to cabinet...")
+        clean_lat = clean_coordinate(lat)
+        clean_long = clean_coordinate(long)
+
+        print(f"Cleaned coordinates: Lat={clean_lat}, Long={clean_long}")
+        from distance_bts import find_nearest_bts_station
+        cabinet_result = find_nearest_bts_station(clean_lat, clean_long, cabinet_name, excel_file_path="ket_qua_gop.xlsx")
+        if 'error' in cabinet_result:
+            nearest_bts = cabinet_result['error']
+            distance_m = None
+        else:
+            nearest_bts = cabinet_result['cabinet']['cabinet_name']
+            # Chuyển đổi từ km sang mét
+            distance_m = round(cabinet_result['distance_km'] * 1000)
+        print(f"Cabinet: {nearest_bts}, Distance: {distance_m} m")
+    except Exception as bts_error:
+        print(f"Error calculating cabinet distance: {str(bts_error)}")
+        nearest_bts = "Cabinet calculation failed"
+        distance_m = "N/A"
+    return nearest_bts, distance_m
+
+def build_sheet_row(thread_id, name, title, image_url, analysis, distance_m):
+    """
+    Chuẩn bị dữ liệu theo format:
+    name, threadId, title, cabinet_name, Ngày, Thời gian, Vĩ độ, Kinh độ,
+    Khoảng cách (mét), Công suất sau S2 (dBm), image_url, created_date, created_time
+    """
+    now = datetime.now()
+    return [
+        name,
+        thread_id,
+        title,
+        analysis["cabinet_name"],
+        analysis["date"],
+        analysis["time"],
+        analysis["lat"],
+        analysis["long"],
+        distance_m,
+        analysis["power_after_s2"],
+        image_url,
+        now.strftime("%Y-%m-%d"),
+        now.strftime("%H:%M:%S"),
+    ]
+
+def missing_notification_fields(analysis):
+    """Các trường bắt buộc còn thiếu để gửi thông báo"""
+    labels = {"lat": "latitude", "long": "longitude", "date": "date", "time": "time"}
+    return [label for field, label in labels.items() if not analysis[field]]
+
+def build_telegram_data(analysis, distance_m, name):
+    return {
+        "cabinet_name": analysis["cabinet_name"],
+        "lat": analysis["lat"],
+        "long": analysis["long"],
+        "date": analysis["date"],
+        "time": analysis["time"],
+        "power_after_s2": analysis["power_after_s2"],
+        "distance_m": distance_m,
+        "sender_name": name
+    }
+
 def save_to_google_sheets(thread_id, name, title, image_url, vision_text, openai_analysis):
-    """Lưu kết quả vào Google Sheets"""
+    """Lưu kết quả vào Google Sheets (đường đồng bộ, dùng cho telegram_bot)"""
     try:
-        print("Initializing Google Sheets client...")
-        client = init_google_sheets()
-        
-        print("Opening Google Sheets document...")
-        # Mở sheet (cần thay đổi tên sheet phù hợp)
-        sheet = client.open_by_key("10mFy9EzRNG2VvOOWnZe0Tl8OK2QnN3cJXTJiMaeUK9Q").worksheet("thang11")
-        print(f"Successfully opened worksheet: {sheet.title}")
-        
-        # Tạo timestamp
-        now = datetime.now()
-        created_date = now.strftime("%Y-%m-%d")
-        created_time = now.strftime("%H:%M:%S")
-        
-        # Parse JSON từ OpenAI analysis
-        cabinet_name = ""
-        lat = ""
-        long = ""
-        extracted_date = ""
-        extracted_time = ""
-        power_after_s2 = ""
-        nearest_bts = ""
-        distance_m = ""
-
-        try:
-            # Convert openai_analysis to string if it's not already
-            analysis_str = str(openai_analysis) if openai_analysis else ""
-
-            # Thử parse JSON từ OpenAI response
-            if analysis_str and not analysis_str.startswith("Error"):
-                # Tìm JSON trong response (có thể có text khác xung quanh)
-                start_idx = analysis_str.find('{')
-                end_idx = analysis_str.rfind('}') + 1
-
-                if start_idx != -1 and end_idx > start_idx:
-                    json_str = analysis_str[start_idx:end_idx]
-                    parsed_data = json.loads(json_str)
-
-                    cabinet_name = parsed_data.get("cabinet_name", "")
-                    lat = parsed_data.get("lat", "")
-                    long = parsed_data.get("long", "")
-                    extracted_date = parsed_data.get("date", "")
-                    extracted_time = parsed_data.get("time", "")
-                    power_after_s2 = parsed_data.get("power_after_s2", "")
-
-                    print(f"Parsed OpenAI data - Cabinet: {cabinet_name}, Lat: {lat}, Long: {long}, Date: {extracted_date}, Time: {extracted_time}, Power: {power_after_s2}")
-
-                    # Tính toán khoảng cách từ tọa độ nhận được đến hộp cabinet
-                    if lat and long and cabinet_name:
-                        try:
-                            print("Step 4: Calculating distance to cabinet...")
-
-                            # Xử lý tọa độ để loại bỏ ký tự không phải số (như °)
-                            def clean_coordinate(coord_str):
-                                import re
-                                clean_str = re.sub(r'[^0-9.\-]', '', str(coord_str))
-                                return float(clean_str)
-
-                            clean_lat = clean_coordinate(lat)
-                            clean_long = clean_coordinate(long)
-
-                            print(f"Cleaned coordinates: Lat={clean_lat}, Long={clean_long}")
-                            from distance_bts import find_nearest_bts_station
-                            cabinet_result = find_nearest_bts_station(clean_lat, clean_long, cabinet_name, excel_file_path="ket_qua_gop.xlsx")
-                            if 'error' in cabinet_result:
-                                nearest_bts = cabinet_result['error']
-                                distance_m = None
-                            else:
-                                nearest_bts = cabinet_result['cabinet']['cabinet_name']
-                                # Chuyển đổi từ km sang mét
-                                distance_m = round(cabinet_result['distance_km'] * 1000)
-                            print(f"Cabinet: {nearest_bts}, Distance: {distance_m} m")
-                        except Exception as bts_error:
-                            print(f"Error calculating cabinet distance: {str(bts_error)}")
-                            nearest_bts = "Cabinet calculation failed"
-                            distance_m = "N/A"
-
-        except (json.JSONDecodeError, KeyError, AttributeError) as e:
-            print(f"Error parsing OpenAI JSON: {str(e)}")
-            # Nếu không parse được JSON, để trống các trường
-
-        # Chuẩn bị dữ liệu theo format mới
-        # name, thread_id, title, cabinet_name, Người gửi, Tủ, Ngày, Thời gian, Tọa độ, Khoảng cách, Công suất sau S2
-        # Người gửi: name
-        # Tủ: cabinet_name
-        # Ngày: extracted_date
-        # Thời gian: extracted_time
-        # Tọa độ: lat, long
-        # Khoảng cách: distance_m (mét)
-        # Công suất sau S2: power_after_s2 (dBm)
-        row_data = [
-            name,           # name
-            thread_id,      # threadId
-            title,          # title
-            cabinet_name,   # cabinet_name
-            extracted_date,
-            extracted_time,
-            lat,
-            long,
-            distance_m,
-            power_after_s2, # power_after_s2
-            image_url,       # image_url
-            created_date,  # created_date
-            created_time,  # created_time
-        ]
-        
+        analysis = parse_openai_analysis(openai_analysis)
+        nearest_bts, distance_m = calculate_cabinet_distance(analysis["lat"], analysis["long"], analysis["cabinet_name"])
+        row_data = build_sheet_row(thread_id, name, title, image_url, analysis, distance_m)
         print(f"Preparing to save row data: {row_data}")
-        
-        # Ghi vào sheet
+
+        # Worksheet được cache, không xác thực lại mỗi lần gọi
+        sheet = get_worksheet()
         result = sheet.append_row(row_data)
         print(f"Google Sheets append result: {result}")
         print("Data saved to Google Sheets successfully")
-        
-        # Gửi thông báo kết quả phân tích chỉ khi có đủ dữ liệu bắt buộc
-        if lat and long and extracted_date and extracted_time:
-            # Chuẩn bị dữ liệu để gửi Telegram
-            telegram_data = {
-                "cabinet_name": cabinet_name,
-                "lat": lat,
-                "long": long,
-                "date": extracted_date,
-                "time": extracted_time,
-                "power_after_s2": power_after_s2,
-                "distance_m": distance_m,
-                "sender_name": name
-            }
 
+        # Gửi thông báo kết quả phân tích chỉ khi có đủ dữ liệu bắt buộc
+        missing_data = missing_notification_fields(analysis)
+        if not missing_data:
             # Gửi Telegram message
             print("\nBước 5: Gửi kết quả phân tích tới Telegram...")
-            telegram_message = format_telegram_response(telegram_data)
+            telegram_message = format_telegram_response(build_telegram_data(analysis, distance_m, name))
             telegram_success = send_telegram_message(TELEGRAM_CHANNEL_ID, telegram_message)
 
             if telegram_success:
@@ -454,124 +490,270 @@ def save_to_google_sheets(thread_id, name, title, image_url, vision_text, openai
             # Gửi thông báo N8N (webhook cũ)
             if nearest_bts:
                 notification_success = send_analysis_notification(
-                    lat, long, extracted_date, extracted_time,
-                    nearest_bts, distance_m, name, thread_id, cabinet_name, power_after_s2
+                    analysis["lat"], analysis["long"], analysis["date"], analysis["time"],
+                    nearest_bts, distance_m, name, thread_id, analysis["cabinet_name"], analysis["power_after_s2"]
                 )
                 if not notification_success:
                     print("⚠️ Warning: Failed to send N8N notification")
             else:
                 print("⚠️ Warning: Missing BTS data - skipping N8N notification")
         else:
-            missing_data = []
-            if not lat: missing_data.append("latitude")
-            if not long: missing_data.append("longitude")
-            if not extracted_date: missing_data.append("date")
-            if not extracted_time: missing_data.append("time")
             print(f"⚠️ Warning: Missing required data ({', '.join(missing_data)}) - skipping notifications")
-        
-        # Verify by getting the last few rows
-        try:
-            all_records = sheet.get_all_records()
-            print(f"Total rows in sheet: {len(all_records)}")
-            if all_records:
-                print(f"Last record: {all_records[-1]}")
-        except Exception as verify_error:
-            print(f"Error verifying data: {verify_error}")
-        
+
         return True
-        
+
     except Exception as e:
         print(f"Error saving to Google Sheets: {str(e)}")
         import traceback
         print(f"Full traceback: {traceback.format_exc()}")
         return False
 
-@app.post("/webhook")
-async def receive_webhook(data: WebhookData):
-    """
-    Endpoint để nhận dữ liệu từ n8n workflow và xử lý đầy đủ
-    """
+# ===================== Đường xử lý bất đồng bộ =====================
+
+async def process_image_with_vision_async(http_client, token_cache, image_url):
+    """Gọi Vision API (REST images:annotate) bằng HTTP client bất đồng bộ"""
     try:
-        print("=" * 50)
-        print("WEBHOOK DATA RECEIVED:")
-        print("=" * 50)
-        print(f"Thread ID: {data.threadId}")
-        print(f"Name: {data.name}")
-        print(f"Title: {data.title}")
-        print(f"Image URL: {data.image_url}")
-        print("=" * 50)
-        
-        # Bước 1: Xử lý ảnh với Google Cloud Vision
-        print("Step 1: Processing image with Google Cloud Vision...")
-        vision_text = process_image_with_vision(data.image_url)
-        
-        # Bước 2: Phân tích text với OpenAI
-        print("Step 2: Analyzing text with OpenAI...")
-        openai_analysis = analyze_text_with_openai(vision_text, data.name)
-        
-        # Bước 3: Lưu vào Google Sheets
-        print("Step 3: Saving to Google Sheets...")
-        sheets_success = save_to_google_sheets(
-            data.threadId, 
-            data.name, 
-            data.title,
-            data.image_url, 
-            vision_text, 
-            openai_analysis
-        )
-        
-        print("=" * 50)
-        print("PROCESSING COMPLETED")
-        print("=" * 50)
-        
-        return {
-            "status": "success",
-            "message": "Webhook processed successfully",
-            "data": {
-                "threadId": data.threadId,
-                "name": data.name,
-                "title": data.title,
-                "image_url": data.image_url,
-                "vision_text": vision_text[:200] + "..." if len(vision_text) > 200 else vision_text,
-                "openai_analysis": openai_analysis[:200] + "..." if len(openai_analysis) > 200 else openai_analysis,
-                "saved_to_sheets": sheets_success
-            }
+        payload = {
+            "requests": [
+                {
+                    "image": {"source": {"imageUri": image_url}},
+                    "features": [{"type": "TEXT_DETECTION"}],
+                }
+            ]
         }
-        
+        response = await http_client.post(
+            f"{VISION_API_BASE_URL}/v1/images:annotate",
+            json=payload,
+            headers=await token_cache.headers(),
+        )
+        response.raise_for_status()
+        result = (response.json().get("responses") or [{}])[0]
+        if "error" in result:
+            raise RuntimeError(result["error"].get("message", "Vision API error"))
+        texts = result.get("textAnnotations") or []
+        if texts:
+            detected_text = texts[0].get("description", "")
+            print(f"Vision API - Text detected: {detected_text}")
+            return detected_text
+        print("Vision API - No text detected")
+        return ""
     except Exception as e:
-        print(f"Error processing webhook: {str(e)}")
-        raise HTTPException(status_code=500, detail=f"Error processing webhook: {str(e)}")
+        print(f"Error with Vision API: {str(e)}")
+        return f"Error: {str(e)}"
 
-@app.post("/telegram-webhook")
-async def telegram_webhook(request: dict):
+async def analyze_text_with_openai_async(text, name):
+    """Phân tích text với OpenAI (client bất đồng bộ)"""
+    try:
+        if async_openai_client is None:
+            raise RuntimeError("OpenAI API key chưa được cấu hình")
+        response = await async_openai_client.chat.completions.create(
+            model=OPENAI_MODEL,
+            messages=_openai_messages(text),
+            temperature=0.1,
+            response_format={"type": "json_object"}
+        )
+        result = response.choices[0].message.content
+        print("OpenAI Chat API output:", result)
+        _check_analysis_fields(result)
+        return result
+    except Exception as e:
+        print(f"Lỗi khi phân tích với Responses API: {str(e)}")
+        return f"Lỗi khi phân tích: {str(e)}"
+
+async def send_telegram_message_async(http_client, chat_id, message, parse_mode="HTML"):
+    try:
+        if not TELEGRAM_BOT_TOKEN:
+            print("❌ Thiếu TELEGRAM_BOT_TOKEN")
+            return False
+        response = await http_client.post(
+            f"{TELEGRAM_API_BASE_URL}/bot{TELEGRAM_BOT_TOKEN}/sendMessage",
+            json={"chat_id": chat_id, "text": message, "parse_mode": parse_mode},
+            timeout=10,
+        )
+        result = response.json()
+        if result.get("ok"):
+            print(f"✅ Gửi tin nhắn Telegram thành công (chat_id: {chat_id})")
+            return True
+        print(f"❌ Lỗi gửi tin nhắn Telegram: {result.get('description', 'Unknown error')}")
+        return False
+    except Exception as e:
+        print(f"❌ Lỗi gửi tin nhắn Telegram: {str(e)}")
+        return False
+
+async def send_analysis_notification_async(http_client, analysis, distance_m, name, thread_id):
+    """Gửi bản tin kết quả phân tích tới N8N webhook (bất đồng bộ)"""
+    try:
+        message = (
+            f"📍 Kết quả phân tích GPS\n"
+            f"👤 Người gửi: {name}\n"
+            f"🗄️ Tủ: {analysis['cabinet_name']}\n"
+            f"📅 Ngày: {analysis['date']}\n"
+            f"🕐 Thời gian: {analysis['time']}\n"
+            f"🌍 Tọa độ: {analysis['lat']}, {analysis['long']}\n"
+            f"📏 Khoảng cách so với capman: {distance_m} mét\n"
+            f"⚡ Công suất sau S2: {analysis['power_after_s2']}"
+        )
+        response = await http_client.request(
+            "GET", WEBHOOK_URL, json={'threadID': thread_id, 'message': message}, timeout=10
+        )
+        if response.status_code == 200:
+            print("✅ Analysis notification sent successfully")
+            return True
+        print(f"❌ Failed to send notification. Status code: {response.status_code}")
+        return False
+    except Exception as e:
+        print(f"❌ Error sending notification: {str(e)}")
+        return False
+
+async def process_webhook_job(state, data):
     """
-    Endpoint để nhận webhook từ Telegram
-    Xử lý ảnh từ group Telegram, upload lên GCS, rồi gửi tới webhook xử lý chính
+    Xử lý đầy đủ 1 webhook trong worker nền:
+    Vision → OpenAI → tính khoảng cách → append Sheets (theo lô) → Telegram + N8N
     """
+    print(f"Step 1: Processing image with Google Cloud Vision... (thread {data.threadId})")
+    vision_text = await process_image_with_vision_async(state.http_client, state.vision_tokens, data.image_url)
+
+    print("Step 2: Analyzing text with OpenAI...")
+    openai_analysis = await analyze_text_with_openai_async(vision_text, data.name)
+
+    analysis = parse_openai_analysis(openai_analysis)
+    # Đọc file Excel hộp cáp là thao tác đồng bộ: chạy trong thread
+    nearest_bts, distance_m = await asyncio.to_thread(
+        calculate_cabinet_distance, analysis["lat"], analysis["long"], analysis["cabinet_name"]
+    )
+
+    print("Step 3: Saving to Google Sheets...")
+    row_data = build_sheet_row(data.threadId, data.name, data.title, data.image_url, analysis, distance_m)
+    try:
+        await state.sheet_batcher.append(row_data)
+        sheets_success = True
+    except Exception as e:
+        print(f"Error saving to Google Sheets: {str(e)}")
+        sheets_success = False
+
+    if sheets_success:
+        missing_data = missing_notification_fields(analysis)
+        if missing_data:
+            print(f"⚠️ Warning: Missing required data ({', '.join(missing_data)}) - skipping notifications")
+        else:
+            notifications = [
+                send_telegram_message_async(
+                    state.http_client,
+                    TELEGRAM_CHANNEL_ID,
+                    format_telegram_response(build_telegram_data(analysis, distance_m, data.name)),
+                )
+            ]
+            if nearest_bts:
+                notifications.append(
+                    send_analysis_notification_async(state.http_client, analysis, distance_m, data.name, data.threadId)
+                )
+            else:
+                print("⚠️ Warning: Missing BTS data - skipping N8N notification")
+            await asyncio.gather(*notifications)
+
+    return {
+        "threadId": data.threadId,
+        "name": data.name,
+        "title": data.title,
+        "image_url": data.image_url,
+        "vision_text": vision_text[:200] + "..." if len(vision_text) > 200 else vision_text,
+        "openai_analysis": openai_analysis[:200] + "..." if len(openai_analysis) > 200 else openai_analysis,
+        "saved_to_sheets": sheets_success
+    }
+
+@asynccontextmanager
+async def lifespan(app):
+    """Khởi tạo HTTP client dùng chung, cache token, bộ gom Sheets và hàng đợi job"""
+    http_client = httpx.AsyncClient(
+        timeout=httpx.Timeout(60.0),
+        limits=httpx.Limits(max_connections=50, max_keepalive_connections=20),
+    )
+    app.state.http_client = http_client
+    app.state.vision_tokens = GoogleTokenCache(google_credentials_path, VISION_SCOPES)
+    app.state.sheet_batcher = SheetAppendBatcher(
+        http_client,
+        GoogleTokenCache(GOOGLE_SHEETS_CREDENTIALS_FILE, SHEETS_SCOPES),
+        SPREADSHEET_ID,
+        WORKSHEET_NAME,
+    )
+    app.state.jobs = JobQueue(JOB_WORKERS, JOB_QUEUE_SIZE)
+    app.state.sheet_batcher.start()
+    app.state.jobs.start()
     try:
-        print("=" * 60)
-        print("TELEGRAM WEBHOOK RECEIVED")
-        print("=" * 60)
-        print(f"Update data: {json.dumps(request, indent=2, ensure_ascii=False)}")
+        yield
+    finally:
+        # Xử lý nốt job đang chờ, ghi nốt các dòng Sheets rồi mới đóng client
+        await app.state.jobs.stop()
+        await app.state.sheet_batcher.stop()
+        await http_client.aclose()
 
-        # Xử lý ảnh từ Telegram
-        result = process_telegram_image(request)
+app = FastAPI(title="Webhook API", description="API để nhận thông tin từ n8n workflow", lifespan=lifespan)
 
-        print("=" * 60)
-        print("TELEGRAM PROCESSING COMPLETED")
-        print("=" * 60)
+def _submit_job(kind, handler):
+    try:
+        return app.state.jobs.submit(kind, handler)
+    except QueueFullError as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "5"})
 
+@app.post("/webhook", status_code=202)
+async def receive_webhook(data: WebhookData, response: Response, wait: bool = False):
+    """
+    Endpoint để nhận dữ liệu từ n8n workflow.
+    Đưa job vào hàng đợi và trả 202 ngay; ?wait=true để chờ kết quả như trước.
+    """
+    print("=" * 50)
+    print(f"WEBHOOK DATA RECEIVED: thread={data.threadId} name={data.name}")
+    print(f"Image URL: {data.image_url}")
+    print("=" * 50)
+
+    job_id = _submit_job("webhook", lambda: process_webhook_job(app.state, data))
+    if not wait:
         return {
-            "status": "success",
-            "message": "Telegram image processed successfully",
-            "result": result
+            "status": "accepted",
+            "message": "Webhook queued for processing",
+            "job_id": job_id,
+            "pending_jobs": app.state.jobs.pending,
         }
 
-    except Exception as e:
-        print(f"❌ Lỗi xử lý Telegram webhook: {str(e)}")
-        import traceback
-        print(f"Traceback: {traceback.format_exc()}")
-        raise HTTPException(status_code=500, detail=f"Error processing Telegram webhook: {str(e)}")
+    job = await app.state.jobs.wait(job_id)
+    if job["status"] == "unknown":
+        raise HTTPException(status_code=404, detail=job["error"])
+    if job["status"] != "done":
+        raise HTTPException(status_code=500, detail=f"Error processing webhook: {job.get('error')}")
+    response.status_code = 200
+    return {
+        "status": "success",
+        "message": "Webhook processed successfully",
+        "job_id": job_id,
+        "data": job["result"],
+    }
+
+@app.get("/jobs/{job_id}")
+async def get_job(job_id: str):
+    """Trạng thái job: queued / running / done / failed"""
+    job = app.state.jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Không tìm thấy job")
+    return job
+
+@app.post("/telegram-webhook")
+async def telegram_webhook(request: dict):
+    """
+    Endpoint để nhận webhook từ Telegram
+    Đưa việc xử lý ảnh (upload GCS → Vision → OpenAI → Sheets) vào hàng đợi và trả về ngay
+    """
+    print("=" * 60)
+    print("TELEGRAM WEBHOOK RECEIVED")
+    print("=" * 60)
+    print(f"Update data: {json.dumps(request, indent=2, ensure_ascii=False)}")
+
+    # process_telegram_image là đồng bộ: chạy trong thread của worker nền
+    job_id = _submit_job("telegram", lambda: asyncio.to_thread(process_telegram_image, request))
+    return {
+        "status": "accepted",
+        "message": "Telegram image queued for processing",
+        "job_id": job_id,
+    }
 
 
 @app.get("/")
@@ -0,0 +1,137 @@
+"""
+Load test webhook gsshc với stub cục bộ (không gọi API thật)
+
+Chạy stub_services và gsmnv trong cùng process (2 server uvicorn), bắn
+--requests request đồng thời vào /webhook rồi đo:
+- độ trễ trả 202 (p50/p95/max),
+- thời gian tới khi toàn bộ job ghi xong vào Sheets,
+- số lần gọi Sheets API (append theo lô) so với số dòng.
+
+Với --wait, mỗi request chờ kết quả (?wait=true) để so sánh.
+
+Cách dùng:
+    python load_test_webhook.py --requests 100 --llm-ms 800
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import threading
+import time
+
+import httpx
+import uvicorn
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from stub_services import create_stub_app
+
+
+def start_server(app, port):
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.05)
+    return server, thread
+
+
+def configure_stub_env(stub_url):
+    """Trỏ mọi API ngoài sang stub (phải gọi trước khi import gsmnv)"""
+    os.environ.update(
+        {
+            "VISION_API_BASE_URL": stub_url,
+            "SHEETS_API_BASE_URL": stub_url,
+            "TELEGRAM_API_BASE_URL": stub_url,
+            "OPENAI_BASE_URL": f"{stub_url}/v1",
+            "OPENAI_API_KEY": "stub-key",
+            "TELEGRAM_BOT_TOKEN": "stub-token",
+            "TELEGRAM_CHANNEL_ID": "-100stub",
+            "MAIN_WEBHOOK_URL": f"{stub_url}/n8n",
+            "GOOGLE_APPLICATION_CREDENTIALS": "stub-vision-key.json",
+            "GOOGLE_SHEETS_CREDENTIALS_FILE": "stub-ggsheet-key.json",
+        }
+    )
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+async def fire_requests(app_url, count, wait):
+    async with httpx.AsyncClient(timeout=600) as http:
+        async def one(index):
+            payload = {
+                "threadId": f"thread-{index}",
+                "name": f"Nhân viên {index}",
+                "title": "Ảnh đo công suất",
+                "image_url": f"https://example.invalid/anh_{index}.jpg",
+            }
+            started = time.perf_counter()
+            response = await http.post(f"{app_url}/webhook", params={"wait": "true"} if wait else None, json=payload)
+            return time.perf_counter() - started, response.status_code
+
+        return await asyncio.gather(*(one(index) for index in range(count)))
+
+
+async def wait_for_rows(stub_url, expected, timeout=600):
+    async with httpx.AsyncClient() as http:
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            stats = (await http.get(f"{stub_url}/__stats")).json()
+            if stats.get("sheets_rows", 0) >= expected:
+                return stats
+            await asyncio.sleep(0.05)
+    raise TimeoutError(f"Sheets chưa nhận đủ {expected} dòng")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test webhook gsshc với stub cục bộ")
+    parser.add_argument("--requests", type=int, default=100)
+    parser.add_argument("--wait", action="store_true", help="Gọi /webhook?wait=true (chờ kết quả)")
+    parser.add_argument("--stub-port", type=int, default=9100)
+    parser.add_argument("--app-port", type=int, default=9107)
+    parser.add_argument("--vision-ms", type=float, default=300)
+    parser.add_argument("--llm-ms", type=float, default=800)
+    parser.add_argument("--sheets-ms", type=float, default=250)
+    args = parser.parse_args()
+
+    stub_url = f"http://127.0.0.1:{args.stub_port}"
+    app_url = f"http://127.0.0.1:{args.app_port}"
+    configure_stub_env(stub_url)
+    stub_server, _ = start_server(create_stub_app(args.vision_ms, args.llm_ms, args.sheets_ms), args.stub_port)
+
+    import gsmnv
+
+    app_server, app_thread = start_server(gsmnv.app, args.app_port)
+    try:
+        started = time.perf_counter()
+        results = asyncio.run(fire_requests(app_url, args.requests, args.wait))
+        accepted_at = time.perf_counter() - started
+        stats = asyncio.run(wait_for_rows(stub_url, args.requests))
+        finished_at = time.perf_counter() - started
+    finally:
+        app_server.should_exit = True
+        app_thread.join()
+        stub_server.should_exit = True
+
+    latencies = [latency for latency, _ in results]
+    codes = sorted({code for _, code in results})
+    serial_estimate = args.requests * (args.vision_ms + args.llm_ms + args.sheets_ms) / 1000
+    print("=" * 60)
+    print(f"{args.requests} request | chế độ {'wait' if args.wait else '202'} | mã trả về {codes}")
+    print(
+        f"Độ trễ phản hồi: p50 {statistics.median(latencies) * 1000:.0f} ms | "
+        f"p95 {percentile(latencies, 95) * 1000:.0f} ms | max {max(latencies) * 1000:.0f} ms"
+    )
+    print(f"Nhận hết request sau {accepted_at:.2f}s, ghi xong Sheets sau {finished_at:.2f}s")
+    print(f"Sheets: {stats.get('sheets_rows', 0)} dòng / {stats.get('sheets_requests', 0)} lần gọi API")
+    print(f"Telegram: {stats.get('telegram_messages', 0)} | N8N: {stats.get('n8n_notifications', 0)}")
+    print(f"Ước tính nếu xử lý tuần tự (event loop bị chặn): {serial_estimate:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+"""
+Stub cục bộ cho các API ngoài mà gsmnv.py gọi, dùng để load test không cần mạng:
+
+- POST /v1/images:annotate                     (Google Cloud Vision REST)
+- POST /v1/chat/completions                    (OpenAI Chat Completions)
+- POST /v4/spreadsheets/{id}/values/{range}    (Sheets values:append)
+- POST /bot{token}/sendMessage                 (Telegram Bot API)
+- GET  /n8n                                    (webhook thông báo N8N)
+- GET  /__stats                                (số request, số dòng đã append...)
+
+Độ trễ mỗi API cấu hình bằng tham số dòng lệnh để giả lập round-trip thật.
+
+Cách dùng:
+    python stub_services.py --port 9100 --vision-ms 400 --llm-ms 1200 --sheets-ms 300
+    VISION_API_BASE_URL=http://127.0.0.1:9100 SHEETS_API_BASE_URL=http://127.0.0.1:9100 \\
+    TELEGRAM_API_BASE_URL=http://127.0.0.1:9100 OPENAI_BASE_URL=http://127.0.0.1:9100/v1 \\
+    MAIN_WEBHOOK_URL=http://127.0.0.1:9100/n8n OPENAI_API_KEY=stub python gsmnv.py
+"""
+import argparse
+import asyncio
+import json
+import time
+from collections import Counter
+
+from fastapi import FastAPI, Request
+import uvicorn
+
+STUB_OCR_TEXT = (
+    "H-STY/7846\n21.156801°N 105.477859°E\nThứ Hai, 13 Tháng 10,2025 11:03\n"
+    "Công suất sau S2\ndBm\n-1762"
+)
+STUB_ANALYSIS = {
+    "cabinet_name": "H-STY/7846",
+    "lat": "21.156801",
+    "long": "105.477859",
+    "date": "2025-10-13",
+    "time": "11:03:00",
+    "power_after_s2": "-17.62dBm",
+}
+
+
+def create_stub_app(vision_ms: float = 300, llm_ms: float = 800, sheets_ms: float = 250, notify_ms: float = 50) -> FastAPI:
+    app = FastAPI(title="gsshc external API stub")
+    stats = Counter()
+    app.state.stats = stats
+
+    async def delay(ms: float):
+        if ms > 0:
+            await asyncio.sleep(ms / 1000)
+
+    @app.post("/v1/images:annotate")
+    async def vision_annotate(request: Request):
+        body = await request.json()
+        stats["vision_requests"] += 1
+        await delay(vision_ms)
+        return {
+            "responses": [
+                {"textAnnotations": [{"description": STUB_OCR_TEXT}]}
+                for _ in body.get("requests", [])
+            ]
+        }
+
+    @app.post("/v1/chat/completions")
+    async def chat_completions(request: Request):
+        body = await request.json()
+        stats["llm_requests"] += 1
+        await delay(llm_ms)
+        return {
+            "id": f"chatcmpl-stub-{stats['llm_requests']}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body.get("model", "stub"),
+            "choices": [
+                {
+                    "index": 0,
+                    "message": {"role": "assistant", "content": json.dumps(STUB_ANALYSIS, ensure_ascii=False)},
+                    "finish_reason": "stop",
+                }
+            ],
+            "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0},
+        }
+
+    @app.post("/v4/spreadsheets/{spreadsheet_id}/values/{sheet_range:path}")
+    async def sheets_append(spreadsheet_id: str, sheet_range: str, request: Request):
+        body = await request.json()
+        rows = body.get("values", [])
+        stats["sheets_requests"] += 1
+        stats["sheets_rows"] += len(rows)
+        await delay(sheets_ms)
+        return {
+            "spreadsheetId": spreadsheet_id,
+            "updates": {"updatedRange": sheet_range, "updatedRows": len(rows)},
+        }
+
+    @app.post("/bot{token}/sendMessage")
+    async def telegram_send(token: str, request: Request):
+        await request.json()
+        stats["telegram_messages"] += 1
+        await delay(notify_ms)
+        return {"ok": True, "result": {"message_id": stats["telegram_messages"]}}
+
+    @app.get("/n8n")
+    async def n8n_notify():
+        stats["n8n_notifications"] += 1
+        await delay(notify_ms)
+        return {"ok": True}
+
+    @app.get("/__stats")
+    async def get_stats():
+        return dict(stats)
+
+    @app.post("/__reset")
+    async def reset_stats():
+        stats.clear()
+        return {"ok": True}
+
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Stub Vision/OpenAI/Sheets/Telegram cho gsshc")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9100)
+    parser.add_argument("--vision-ms", type=float, default=300)
+    parser.add_argument("--llm-ms", type=float, default=800)
+    parser.add_argument("--sheets-ms", type=float, default=250)
+    parser.add_argument("--notify-ms", type=float, default=50)
+    args = parser.parse_args()
+    app = create_stub_app(args.vision_ms, args.llm_ms, args.sheets_ms, args.notify_ms)
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
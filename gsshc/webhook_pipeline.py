@@ -0,0 +1,276 @@
+"""
+Hạ tầng bất đồng bộ cho webhook gsshc
+
+- GoogleTokenCache: cache access token của service account (chỉ refresh khi hết hạn)
+- SheetAppendBatcher: gom nhiều dòng rồi append 1 lần vào Google Sheets qua REST API
+  (gửi ngay khi rảnh; trong lúc chờ giãn cách tối thiểu giữa 2 lần ghi thì gom dòng mới)
+- JobQueue: hàng đợi job có giới hạn + N worker chạy nền, lưu trạng thái job gần nhất
+
+Các URL API đọc từ biến môi trường để có thể trỏ sang stub khi load test
+(xem stub_services.py và load_test_webhook.py).
+"""
+import asyncio
+import os
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+from urllib.parse import quote
+
+try:
+    from google.auth.transport.requests import Request as GoogleAuthRequest
+    from google.oauth2 import service_account
+    GOOGLE_AUTH_AVAILABLE = True
+except ImportError:
+    GOOGLE_AUTH_AVAILABLE = False
+
+VISION_API_BASE_URL = os.environ.get("VISION_API_BASE_URL", "https://vision.googleapis.com").rstrip("/")
+SHEETS_API_BASE_URL = os.environ.get("SHEETS_API_BASE_URL", "https://sheets.googleapis.com").rstrip("/")
+TELEGRAM_API_BASE_URL = os.environ.get("TELEGRAM_API_BASE_URL", "https://api.telegram.org").rstrip("/")
+
+VISION_SCOPES = ["https://www.googleapis.com/auth/cloud-vision"]
+SHEETS_SCOPES = ["https://www.googleapis.com/auth/spreadsheets"]
+
+# Số worker xử lý job song song, số job tối đa chờ trong hàng đợi
+JOB_WORKERS = int(os.environ.get("GSSHC_JOB_WORKERS", "16"))
+JOB_QUEUE_SIZE = int(os.environ.get("GSSHC_JOB_QUEUE_SIZE", "200"))
+# Tối đa N dòng mỗi lần append; 2 lần append cách nhau ít nhất T giây
+# (quota ghi của Sheets API ~60 request/phút/user)
+SHEET_BATCH_SIZE = int(os.environ.get("GSSHC_SHEET_BATCH_SIZE", "50"))
+SHEET_MIN_INTERVAL = float(os.environ.get("GSSHC_SHEET_MIN_INTERVAL", "1.0"))
+JOB_HISTORY_SIZE = 1000
+
+
+class QueueFullError(RuntimeError):
+    """Hàng đợi job đã đầy"""
+
+
+class GoogleTokenCache:
+    """
+    Cache access token OAuth2 của 1 file service account.
+
+    Token chỉ được refresh (gọi đồng bộ trong thread) khi chưa có hoặc sắp hết hạn,
+    thay vì xác thực lại ở mỗi request. Nếu không có file credentials (ví dụ khi chạy
+    với stub) thì trả về chuỗi rỗng và request được gửi không kèm Authorization.
+    """
+
+    def __init__(self, credentials_file: str, scopes: List[str]):
+        self.credentials_file = credentials_file
+        self.scopes = scopes
+        self._credentials = None
+        self._lock = asyncio.Lock()
+        self._warned = False
+
+    def _load(self):
+        if self._credentials is None:
+            self._credentials = service_account.Credentials.from_service_account_file(
+                self.credentials_file, scopes=self.scopes
+            )
+        return self._credentials
+
+    def _refresh(self) -> str:
+        credentials = self._load()
+        if not credentials.valid:
+            credentials.refresh(GoogleAuthRequest())
+        return credentials.token
+
+    async def get_token(self) -> str:
+        if not GOOGLE_AUTH_AVAILABLE or not os.path.exists(self.credentials_file):
+            if not self._warned:
+                print(f"⚠️ Không có credentials {self.credentials_file} - gửi request không xác thực")
+                self._warned = True
+            return ""
+        credentials = self._credentials
+        if credentials is not None and credentials.valid:
+            return credentials.token
+        async with self._lock:
+            return await asyncio.to_thread(self._refresh)
+
+    async def headers(self) -> Dict[str, str]:
+        token = await self.get_token()
+        return {"Authorization": f"Bearer {token}"} if token else {}
+
+
+class SheetAppendBatcher:
+    """
+    Gom các dòng cần ghi vào 1 worksheet và append theo lô qua Sheets API
+    (values:append, valueInputOption=RAW giống gspread.append_row).
+
+    Không chờ cố định: dòng đến lúc rảnh được ghi ngay; dòng đến trong khoảng
+    giãn cách min_interval được gom vào lô kế tiếp. Mỗi lời gọi append() chờ tới
+    khi lô chứa dòng đó được ghi xong (hoặc lỗi).
+    """
+
+    def __init__(
+        self,
+        http_client,
+        token_cache: GoogleTokenCache,
+        spreadsheet_id: str,
+        worksheet_name: str,
+        batch_size: int = SHEET_BATCH_SIZE,
+        min_interval: float = SHEET_MIN_INTERVAL,
+    ):
+        self.http_client = http_client
+        self.token_cache = token_cache
+        self.spreadsheet_id = spreadsheet_id
+        self.worksheet_name = worksheet_name
+        self.batch_size = max(1, batch_size)
+        self.min_interval = min_interval
+        self._last_sent = float("-inf")
+        self._queue: asyncio.Queue = asyncio.Queue()
+        self._task: Optional[asyncio.Task] = None
+        self.batches_sent = 0
+        self.rows_sent = 0
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Ghi nốt các dòng còn lại rồi dừng"""
+        if self._task is None:
+            return
+        await self._queue.put(None)
+        await self._task
+        self._task = None
+
+    async def append(self, row: List[Any]) -> Dict[str, Any]:
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((row, future))
+        return await future
+
+    async def _collect(self, first) -> List[tuple]:
+        batch = [first]
+        deadline = self._last_sent + self.min_interval
+        while len(batch) < self.batch_size:
+            if self._queue.empty():
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(self._queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+            else:
+                item = self._queue.get_nowait()
+            if item is None:
+                self._queue.put_nowait(None)
+                break
+            batch.append(item)
+        # Lô đầy trước hạn: vẫn giữ giãn cách tối thiểu giữa 2 lần ghi
+        remaining = deadline - time.monotonic()
+        if remaining > 0:
+            await asyncio.sleep(remaining)
+        return batch
+
+    async def _run(self) -> None:
+        while True:
+            first = await self._queue.get()
+            if first is None:
+                return
+            batch = await self._collect(first)
+            self._last_sent = time.monotonic()
+            try:
+                result = await self._send([row for row, _ in batch])
+            except Exception as e:
+                print(f"❌ Lỗi append {len(batch)} dòng vào Google Sheets: {e}")
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+            for _, future in batch:
+                if not future.done():
+                    future.set_result(result)
+
+    async def _send(self, rows: List[List[Any]]) -> Dict[str, Any]:
+        sheet_range = quote(f"'{self.worksheet_name}'", safe="")
+        url = f"{SHEETS_API_BASE_URL}/v4/spreadsheets/{self.spreadsheet_id}/values/{sheet_range}:append"
+        response = await self.http_client.post(
+            url,
+            params={"valueInputOption": "RAW"},
+            json={"values": rows},
+            headers=await self.token_cache.headers(),
+        )
+        response.raise_for_status()
+        self.batches_sent += 1
+        self.rows_sent += len(rows)
+        print(f"✅ Đã append {len(rows)} dòng vào Google Sheets (lô #{self.batches_sent})")
+        return response.json()
+
+
+class JobQueue:
+    """
+    Hàng đợi job có giới hạn + N worker chạy nền.
+
+    submit() trả về job_id ngay (hoặc QueueFullError nếu đầy); trạng thái của
+    JOB_HISTORY_SIZE job gần nhất xem qua get().
+    """
+
+    def __init__(self, workers: int = JOB_WORKERS, max_size: int = JOB_QUEUE_SIZE):
+        self.workers = max(1, workers)
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=max_size)
+        self._jobs: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._futures: Dict[str, asyncio.Future] = {}
+        self._tasks: List[asyncio.Task] = []
+
+    def start(self) -> None:
+        if not self._tasks:
+            self._tasks = [asyncio.create_task(self._worker(index)) for index in range(self.workers)]
+
+    async def stop(self) -> None:
+        """Chờ xử lý hết job đang chờ rồi dừng worker"""
+        await self._queue.join()
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    @property
+    def pending(self) -> int:
+        return self._queue.qsize()
+
+    def submit(self, kind: str, handler: Callable[[], Awaitable[Any]]) -> str:
+        job_id = uuid.uuid4().hex
+        try:
+            self._queue.put_nowait((job_id, handler))
+        except asyncio.QueueFull:
+            raise QueueFullError(f"Hàng đợi đã đầy ({self._queue.maxsize} job)")
+        self._jobs[job_id] = {"job_id": job_id, "kind": kind, "status": "queued", "created_at": time.time()}
+        self._futures[job_id] = asyncio.get_running_loop().create_future()
+        # Future của job bị đẩy khỏi lịch sử vẫn giữ tới khi worker xử lý xong (worker tự pop)
+        while len(self._jobs) > JOB_HISTORY_SIZE:
+            self._jobs.popitem(last=False)
+        return job_id
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        return self._jobs.get(job_id)
+
+    async def wait(self, job_id: str) -> Dict[str, Any]:
+        """Chờ job xong; job không có/đã bị đẩy khỏi lịch sử trả về status 'unknown' (404)"""
+        future = self._futures.get(job_id)
+        if future is not None:
+            return await asyncio.shield(future)
+        job = self._jobs.get(job_id)
+        if job is None:
+            return {"job_id": job_id, "status": "unknown", "error": "Không tìm thấy job"}
+        return job
+
+    async def _worker(self, index: int) -> None:
+        while True:
+            job_id, handler = await self._queue.get()
+            job = self._jobs.get(job_id, {"job_id": job_id})
+            job["status"] = "running"
+            started = time.monotonic()
+            try:
+                job["result"] = await handler()
+                job["status"] = "done"
+            except Exception as e:
+                print(f"❌ Job {job_id} lỗi: {e}")
+                job["status"] = "failed"
+                job["error"] = str(e)
+            finally:
+                job["duration_s"] = round(time.monotonic() - started, 3)
+                future = self._futures.pop(job_id, None)
+                if future is not None and not future.done():
+                    future.set_result(job)
+                self._queue.task_done()
@@ -12,6 +12,8 @@ import sqlite3
 import re
 from datetime import datetime, timedelta
 
+from suy_hao_rollups import refresh_rollup_day
+
 
 def normalize_nvkt(x):
     """Chuẩn hóa tên NVKT_DB - giữ phần sau dấu '-'"""
@@ -601,6 +603,9 @@ def _process_I15_generic_with_tracking(input_file, k_suffix="K1", history_db="su
             else:
                 print(f"  ✅ Đã lưu {inserted} bản ghi vào snapshots")
 
+            # Cập nhật rollup cho báo cáo tuần/tháng/xu hướng
+            refresh_rollup_day(hist_conn, report_date)
+
             # Cập nhật tracking table
             print(f"\n✓ Đang cập nhật bảng tracking...")
 
@@ -16,6 +16,8 @@ from datetime import date, datetime
 from pathlib import Path
 import pandas as pd
 
+from baocao_bulk import ReportSpec, bulk_import
+
 
 # Cấu hình
 DB_PATH = Path(__file__).parent / "baocao_hanoi_thang.db"
@@ -278,31 +280,16 @@ def get_or_create_nvkt(conn: sqlite3.Connection, don_vi_id: int, ten_nvkt: str)
     return cursor.lastrowid
 
 
-def import_c11(conn: sqlite3.Connection, thang: str):
-    """Import báo cáo C1.1."""
-    file_path = REPORT_DIR / REPORT_FILES["c11"][0]
-    sheet_name = REPORT_FILES["c11"][1]
-    
-    if not file_path.exists():
-        print(f"  ⚠ C1.1: File không tồn tại: {file_path}")
-        return
-    
-    df = pd.read_excel(file_path, sheet_name=sheet_name)
-    cursor = conn.cursor()
-    
-    count = 0
-    for _, row in df.iterrows():
-        ten_don_vi = row.iloc[0]
-        if pd.isna(ten_don_vi):
-            continue
-        # Đổi tên "Tổng" thành "TTVT Sơn Tây" (đơn vị cha)
-        if ten_don_vi == "Tổng":
-            ten_don_vi = "TTVT Sơn Tây"
-            
-        don_vi_id = get_or_create_don_vi(conn, ten_don_vi)
-        
-        cursor.execute("""
-            INSERT INTO bao_cao_c11 
+def _cot_ty_le(df: pd.DataFrame) -> str:
+    """Tên cột tỷ lệ (có thể dài)."""
+    return [c for c in df.columns if 'Tỷ lệ' in c][0]
+
+
+REPORT_SPECS = {
+    "c11": ReportSpec(
+        label="C1.1",
+        sql="""
+            INSERT INTO bao_cao_c11
             (thang_bao_cao, don_vi_id, sm1_cl_chu_dong, sm2_cl_chu_dong, ty_le_cl_chu_dong,
              sm3_brcd, sm4_brcd, ty_le_brcd, chi_tieu_bsc, updated_at)
             VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
@@ -315,47 +302,14 @@ def import_c11(conn: sqlite3.Connection, thang: str):
                 ty_le_brcd = excluded.ty_le_brcd,
                 chi_tieu_bsc = excluded.chi_tieu_bsc,
                 updated_at = CURRENT_TIMESTAMP
-        """, (
-            thang, don_vi_id,
-            int(row.iloc[1]) if pd.notna(row.iloc[1]) else None,
-            int(row.iloc[2]) if pd.notna(row.iloc[2]) else None,
-            float(row.iloc[3]) if pd.notna(row.iloc[3]) else None,
-            int(row.iloc[4]) if pd.notna(row.iloc[4]) else None,
-            int(row.iloc[5]) if pd.notna(row.iloc[5]) else None,
-            float(row.iloc[6]) if pd.notna(row.iloc[6]) else None,
-            float(row.iloc[10]) if pd.notna(row.iloc[10]) else None,
-        ))
-        count += 1
-    
-    conn.commit()
-    print(f"  ✓ C1.1: {count} records imported")
-
-
-def import_c12(conn: sqlite3.Connection, thang: str):
-    """Import báo cáo C1.2."""
-    file_path = REPORT_DIR / REPORT_FILES["c12"][0]
-    sheet_name = REPORT_FILES["c12"][1]
-    
-    if not file_path.exists():
-        print(f"  ⚠ C1.2: File không tồn tại: {file_path}")
-        return
-    
-    df = pd.read_excel(file_path, sheet_name=sheet_name)
-    cursor = conn.cursor()
-    
-    count = 0
-    for _, row in df.iterrows():
-        ten_don_vi = row.iloc[0]
-        if pd.isna(ten_don_vi):
-            continue
-        # Đổi tên "Tổng" thành "TTVT Sơn Tây" (đơn vị cha)
-        if ten_don_vi == "Tổng":
-            ten_don_vi = "TTVT Sơn Tây"
-            
-        don_vi_id = get_or_create_don_vi(conn, ten_don_vi)
-        
-        cursor.execute("""
-            INSERT INTO bao_cao_c12 
+        """,
+        values=((1, int), (2, int), (3, float), (4, int), (5, int), (6, float), (10, float)),
+        tong_don_vi="TTVT Sơn Tây",  # Đổi tên "Tổng" thành "TTVT Sơn Tây" (đơn vị cha)
+    ),
+    "c12": ReportSpec(
+        label="C1.2",
+        sql="""
+            INSERT INTO bao_cao_c12
             (thang_bao_cao, don_vi_id, sm1_lap_lai, sm2_lap_lai, ty_le_lap_lai,
              sm3_su_co, sm4_su_co, ty_le_su_co, chi_tieu_bsc, updated_at)
             VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
@@ -368,47 +322,14 @@ def import_c12(conn: sqlite3.Connection, thang: str):
                 ty_le_su_co = excluded.ty_le_su_co,
                 chi_tieu_bsc = excluded.chi_tieu_bsc,
                 updated_at = CURRENT_TIMESTAMP
-        """, (
-            thang, don_vi_id,
-            int(row.iloc[1]) if pd.notna(row.iloc[1]) else None,
-            int(row.iloc[2]) if pd.notna(row.iloc[2]) else None,
-            float(row.iloc[3]) if pd.notna(row.iloc[3]) else None,
-            int(row.iloc[4]) if pd.notna(row.iloc[4]) else None,
-            int(row.iloc[5]) if pd.notna(row.iloc[5]) else None,
-            float(row.iloc[6]) if pd.notna(row.iloc[6]) else None,
-            float(row.iloc[7]) if pd.notna(row.iloc[7]) else None,
-        ))
-        count += 1
-    
-    conn.commit()
-    print(f"  ✓ C1.2: {count} records imported")
-
-
-def import_c13(conn: sqlite3.Connection, thang: str):
-    """Import báo cáo C1.3."""
-    file_path = REPORT_DIR / REPORT_FILES["c13"][0]
-    sheet_name = REPORT_FILES["c13"][1]
-    
-    if not file_path.exists():
-        print(f"  ⚠ C1.3: File không tồn tại: {file_path}")
-        return
-    
-    df = pd.read_excel(file_path, sheet_name=sheet_name)
-    cursor = conn.cursor()
-    
-    count = 0
-    for _, row in df.iterrows():
-        ten_don_vi = row.iloc[0]
-        if pd.isna(ten_don_vi):
-            continue
-        # Đổi tên "Tổng" thành "TTVT Sơn Tây" (đơn vị cha)
-        if ten_don_vi == "Tổng":
-            ten_don_vi = "TTVT Sơn Tây"
-            
-        don_vi_id = get_or_create_don_vi(conn, ten_don_vi)
-        
-        cursor.execute("""
-            INSERT INTO bao_cao_c13 
+        """,
+        values=((1, int), (2, int), (3, float), (4, int), (5, int), (6, float), (7, float)),
+        tong_don_vi="TTVT Sơn Tây",  # Đổi tên "Tổng" thành "TTVT Sơn Tây" (đơn vị cha)
+    ),
+    "c13": ReportSpec(
+        label="C1.3",
+        sql="""
+            INSERT INTO bao_cao_c13
             (thang_bao_cao, don_vi_id, sm1_sua_chua, sm2_sua_chua, ty_le_sua_chua,
              sm3_lap_lai, sm4_lap_lai, ty_le_lap_lai, sm5_su_co, sm6_su_co, ty_le_su_co, chi_tieu_bsc, updated_at)
             VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
@@ -424,50 +345,14 @@ def import_c13(conn: sqlite3.Connection, thang: str):
                 ty_le_su_co = excluded.ty_le_su_co,
                 chi_tieu_bsc = excluded.chi_tieu_bsc,
                 updated_at = CURRENT_TIMESTAMP
-        """, (
-            thang, don_vi_id,
-            int(row.iloc[1]) if pd.notna(row.iloc[1]) else None,
-            int(row.iloc[2]) if pd.notna(row.iloc[2]) else None,
-            float(row.iloc[3]) if pd.notna(row.iloc[3]) else None,
-            int(row.iloc[4]) if pd.notna(row.iloc[4]) else None,
-            int(row.iloc[5]) if pd.notna(row.iloc[5]) else None,
-            float(row.iloc[6]) if pd.notna(row.iloc[6]) else None,
-            int(row.iloc[7]) if pd.notna(row.iloc[7]) else None,
-            int(row.iloc[8]) if pd.notna(row.iloc[8]) else None,
-            float(row.iloc[9]) if pd.notna(row.iloc[9]) else None,
-            float(row.iloc[10]) if pd.notna(row.iloc[10]) else None,
-        ))
-        count += 1
-    
-    conn.commit()
-    print(f"  ✓ C1.3: {count} records imported")
-
-
-def import_c14(conn: sqlite3.Connection, thang: str):
-    """Import báo cáo C1.4."""
-    file_path = REPORT_DIR / REPORT_FILES["c14"][0]
-    sheet_name = REPORT_FILES["c14"][1]
-    
-    if not file_path.exists():
-        print(f"  ⚠ C1.4: File không tồn tại: {file_path}")
-        return
-    
-    df = pd.read_excel(file_path, sheet_name=sheet_name)
-    cursor = conn.cursor()
-    
-    count = 0
-    for _, row in df.iterrows():
-        ten_don_vi = row.iloc[0]
-        if pd.isna(ten_don_vi):
-            continue
-        # Đổi tên "Tổng" thành "TTVT Sơn Tây" (đơn vị cha)
-        if ten_don_vi == "Tổng":
-            ten_don_vi = "TTVT Sơn Tây"
-            
-        don_vi_id = get_or_create_don_vi(conn, ten_don_vi)
-        
-        cursor.execute("""
-            INSERT INTO bao_cao_c14 
+        """,
+        values=((1, int), (2, int), (3, float), (4, int), (5, int), (6, float), (7, int), (8, int), (9, float), (10, float)),
+        tong_don_vi="TTVT Sơn Tây",  # Đổi tên "Tổng" thành "TTVT Sơn Tây" (đơn vị cha)
+    ),
+    "c14": ReportSpec(
+        label="C1.4",
+        sql="""
+            INSERT INTO bao_cao_c14
             (thang_bao_cao, don_vi_id, tong_phieu, sl_da_ks, sl_ks_thanh_cong, sl_kh_hai_long,
              khong_hl_kt_phuc_vu, ty_le_hl_kt_phuc_vu, khong_hl_kt_dich_vu, ty_le_hl_kt_dich_vu,
              tong_phieu_hai_long_kt, ty_le_kh_hai_long, diem_bsc, updated_at)
@@ -485,51 +370,14 @@ def import_c14(conn: sqlite3.Connection, thang: str):
                 ty_le_kh_hai_long = excluded.ty_le_kh_hai_long,
                 diem_bsc = excluded.diem_bsc,
                 updated_at = CURRENT_TIMESTAMP
-        """, (
-            thang, don_vi_id,
-            int(row.iloc[1]) if pd.notna(row.iloc[1]) else None,
-            int(row.iloc[2]) if pd.notna(row.iloc[2]) else None,
-            int(row.iloc[3]) if pd.notna(row.iloc[3]) else None,
-            int(row.iloc[4]) if pd.notna(row.iloc[4]) else None,
-            int(row.iloc[5]) if pd.notna(row.iloc[5]) else None,
-            float(row.iloc[6]) if pd.notna(row.iloc[6]) else None,
-            int(row.iloc[7]) if pd.notna(row.iloc[7]) else None,
-            float(row.iloc[8]) if pd.notna(row.iloc[8]) else None,
-            int(row.iloc[9]) if pd.notna(row.iloc[9]) else None,
-            float(row.iloc[10]) if pd.notna(row.iloc[10]) else None,
-            float(row.iloc[11]) if pd.notna(row.iloc[11]) else None,
-        ))
-        count += 1
-    
-    conn.commit()
-    print(f"  ✓ C1.4: {count} records imported")
-
-
-def import_c14_nvkt(conn: sqlite3.Connection, thang: str):
-    """Import báo cáo C1.4 chi tiết NVKT."""
-    file_path = REPORT_DIR / REPORT_FILES["c14_nvkt"][0]
-    sheet_name = REPORT_FILES["c14_nvkt"][1]
-    
-    if not file_path.exists():
-        print(f"  ⚠ C1.4 NVKT: File không tồn tại: {file_path}")
-        return
-    
-    df = pd.read_excel(file_path, sheet_name=sheet_name)
-    cursor = conn.cursor()
-    
-    count = 0
-    for _, row in df.iterrows():
-        ten_don_vi = row.iloc[0]  # DOIVT
-        ten_nvkt = row.iloc[1]    # NVKT
-        
-        if pd.isna(ten_don_vi) or pd.isna(ten_nvkt):
-            continue
-            
-        don_vi_id = get_or_create_don_vi(conn, ten_don_vi)
-        nvkt_id = get_or_create_nvkt(conn, don_vi_id, ten_nvkt)
-        
-        cursor.execute("""
-            INSERT INTO bao_cao_c14_nvkt 
+        """,
+        values=((1, int), (2, int), (3, int), (4, int), (5, int), (6, float), (7, int), (8, float), (9, int), (10, float), (11, float)),
+        tong_don_vi="TTVT Sơn Tây",  # Đổi tên "Tổng" thành "TTVT Sơn Tây" (đơn vị cha)
+    ),
+    "c14_nvkt": ReportSpec(
+        label="C1.4 NVKT",
+        sql="""
+            INSERT INTO bao_cao_c14_nvkt
             (thang_bao_cao, nvkt_id, tong_phieu_ks_thanh_cong, tong_phieu_khl, ty_le_hai_long, updated_at)
             VALUES (?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
             ON CONFLICT(thang_bao_cao, nvkt_id) DO UPDATE SET
@@ -537,43 +385,15 @@ def import_c14_nvkt(conn: sqlite3.Connection, thang: str):
                 tong_phieu_khl = excluded.tong_phieu_khl,
                 ty_le_hai_long = excluded.ty_le_hai_long,
                 updated_at = CURRENT_TIMESTAMP
-        """, (
-            thang, nvkt_id,
-            int(row.iloc[2]) if pd.notna(row.iloc[2]) else None,
-            int(row.iloc[3]) if pd.notna(row.iloc[3]) else None,
-            float(row.iloc[4]) if pd.notna(row.iloc[4]) else None,
-        ))
-        count += 1
-    
-    conn.commit()
-    print(f"  ✓ C1.4 NVKT: {count} records imported")
-
-
-def import_sm1c12_hll(conn: sqlite3.Connection, thang: str):
-    """Import báo cáo SM1-C12: Tỷ lệ hỏng lại tháng theo NVKT."""
-    file_path = REPORT_DIR / REPORT_FILES["sm1c12"][0]
-    sheet_name = REPORT_FILES["sm1c12"][1]
-    
-    if not file_path.exists():
-        print(f"  ⚠ SM1-C12 HLL: File không tồn tại: {file_path}")
-        return
-    
-    df = pd.read_excel(file_path, sheet_name=sheet_name)
-    cursor = conn.cursor()
-    
-    count = 0
-    for _, row in df.iterrows():
-        ten_don_vi = row['TEN_DOI']
-        ten_nvkt = row['NVKT']
-        
-        if pd.isna(ten_don_vi) or pd.isna(ten_nvkt):
-            continue
-        
-        don_vi_id = get_or_create_don_vi(conn, ten_don_vi)
-        nvkt_id = get_or_create_nvkt(conn, don_vi_id, ten_nvkt)
-        
-        cursor.execute("""
-            INSERT INTO bao_cao_sm1c12_hll 
+        """,
+        values=((2, int), (3, int), (4, float)),
+        don_vi_col=0,  # DOIVT
+        nvkt_col=1,    # NVKT
+    ),
+    "sm1c12": ReportSpec(
+        label="SM1-C12 HLL",
+        sql="""
+            INSERT INTO bao_cao_sm1c12_hll
             (thang_bao_cao, nvkt_id, so_phieu_hll, so_phieu_bao_hong, ty_le_hll, updated_at)
             VALUES (?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
             ON CONFLICT(thang_bao_cao, nvkt_id) DO UPDATE SET
@@ -581,46 +401,15 @@ def import_sm1c12_hll(conn: sqlite3.Connection, thang: str):
                 so_phieu_bao_hong = excluded.so_phieu_bao_hong,
                 ty_le_hll = excluded.ty_le_hll,
                 updated_at = CURRENT_TIMESTAMP
-        """, (
-            thang, nvkt_id,
-            int(row['Số phiếu HLL']) if pd.notna(row['Số phiếu HLL']) else None,
-            int(row['Số phiếu báo hỏng']) if pd.notna(row['Số phiếu báo hỏng']) else None,
-            float(row['Tỉ lệ HLL tháng (2.5%)']) if pd.notna(row['Tỉ lệ HLL tháng (2.5%)']) else None,
-        ))
-        count += 1
-    
-    conn.commit()
-    print(f"  ✓ SM1-C12 HLL: {count} records imported")
-
-
-def import_sm4c11_chitiet(conn: sqlite3.Connection, thang: str):
-    """Import báo cáo SM4-C11: Chi tiết BRCD không hẹn theo NVKT."""
-    file_path = REPORT_DIR / REPORT_FILES["sm4c11_chitiet"][0]
-    sheet_name = REPORT_FILES["sm4c11_chitiet"][1]
-    
-    if not file_path.exists():
-        print(f"  ⚠ SM4-C11 Chi tiết: File không tồn tại: {file_path}")
-        return
-    
-    df = pd.read_excel(file_path, sheet_name=sheet_name)
-    cursor = conn.cursor()
-    
-    # Lấy tên cột tỷ lệ (có thể dài)
-    ty_le_col = [c for c in df.columns if 'Tỷ lệ' in c][0]
-    
-    count = 0
-    for _, row in df.iterrows():
-        ten_don_vi = row['TEN_DOI']
-        ten_nvkt = row['NVKT']
-        
-        if pd.isna(ten_don_vi) or pd.isna(ten_nvkt):
-            continue
-        
-        don_vi_id = get_or_create_don_vi(conn, ten_don_vi)
-        nvkt_id = get_or_create_nvkt(conn, don_vi_id, ten_nvkt)
-        
-        cursor.execute("""
-            INSERT INTO bao_cao_sm4c11_chitiet 
+        """,
+        values=(('Số phiếu HLL', int), ('Số phiếu báo hỏng', int), ('Tỉ lệ HLL tháng (2.5%)', float)),
+        don_vi_col='TEN_DOI',
+        nvkt_col='NVKT',
+    ),
+    "sm4c11_chitiet": ReportSpec(
+        label="SM4-C11 Chi tiết",
+        sql="""
+            INSERT INTO bao_cao_sm4c11_chitiet
             (thang_bao_cao, nvkt_id, tong_phieu, so_phieu_dat, ty_le_dat, updated_at)
             VALUES (?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
             ON CONFLICT(thang_bao_cao, nvkt_id) DO UPDATE SET
@@ -628,46 +417,15 @@ def import_sm4c11_chitiet(conn: sqlite3.Connection, thang: str):
                 so_phieu_dat = excluded.so_phieu_dat,
                 ty_le_dat = excluded.ty_le_dat,
                 updated_at = CURRENT_TIMESTAMP
-        """, (
-            thang, nvkt_id,
-            int(row['Tổng phiếu']) if pd.notna(row['Tổng phiếu']) else None,
-            int(row['Số phiếu đạt']) if pd.notna(row['Số phiếu đạt']) else None,
-            float(row[ty_le_col]) if pd.notna(row[ty_le_col]) else None,
-        ))
-        count += 1
-    
-    conn.commit()
-    print(f"  ✓ SM4-C11 Chi tiết: {count} records imported")
-
-
-def import_sm4c11_18h(conn: sqlite3.Connection, thang: str):
-    """Import báo cáo SM4-C11: Chỉ tiêu không hẹn 18h theo NVKT."""
-    file_path = REPORT_DIR / REPORT_FILES["sm4c11_18h"][0]
-    sheet_name = REPORT_FILES["sm4c11_18h"][1]
-    
-    if not file_path.exists():
-        print(f"  ⚠ SM4-C11 18h: File không tồn tại: {file_path}")
-        return
-    
-    df = pd.read_excel(file_path, sheet_name=sheet_name)
-    cursor = conn.cursor()
-    
-    # Lấy tên cột tỷ lệ (có thể dài)
-    ty_le_col = [c for c in df.columns if 'Tỷ lệ' in c][0]
-    
-    count = 0
-    for _, row in df.iterrows():
-        ten_don_vi = row['TEN_DOI']
-        ten_nvkt = row['NVKT']
-        
-        if pd.isna(ten_don_vi) or pd.isna(ten_nvkt):
-            continue
-        
-        don_vi_id = get_or_create_don_vi(conn, ten_don_vi)
-        nvkt_id = get_or_create_nvkt(conn, don_vi_id, ten_nvkt)
-        
-        cursor.execute("""
-            INSERT INTO bao_cao_sm4c11_18h 
+        """,
+        values=(('Tổng phiếu', int), ('Số phiếu đạt', int), (_cot_ty_le, float)),
+        don_vi_col='TEN_DOI',
+        nvkt_col='NVKT',
+    ),
+    "sm4c11_18h": ReportSpec(
+        label="SM4-C11 18h",
+        sql="""
+            INSERT INTO bao_cao_sm4c11_18h
             (thang_bao_cao, nvkt_id, tong_phieu, so_phieu_dat, ty_le_dat, updated_at)
             VALUES (?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
             ON CONFLICT(thang_bao_cao, nvkt_id) DO UPDATE SET
@@ -675,16 +433,67 @@ def import_sm4c11_18h(conn: sqlite3.Connection, thang: str):
                 so_phieu_dat = excluded.so_phieu_dat,
                 ty_le_dat = excluded.ty_le_dat,
                 updated_at = CURRENT_TIMESTAMP
-        """, (
-            thang, nvkt_id,
-            int(row['Tổng phiếu']) if pd.notna(row['Tổng phiếu']) else None,
-            int(row['Số phiếu đạt']) if pd.notna(row['Số phiếu đạt']) else None,
-            float(row[ty_le_col]) if pd.notna(row[ty_le_col]) else None,
-        ))
-        count += 1
-    
-    conn.commit()
-    print(f"  ✓ SM4-C11 18h: {count} records imported")
+        """,
+        values=(('Tổng phiếu', int), ('Số phiếu đạt', int), (_cot_ty_le, float)),
+        don_vi_col='TEN_DOI',
+        nvkt_col='NVKT',
+    ),
+}
+
+
+def _import_report(conn: sqlite3.Connection, key: str, thang: str):
+    """Đọc 1 báo cáo và nạp theo lô (xem baocao_bulk)."""
+    file_path = REPORT_DIR / REPORT_FILES[key][0]
+    sheet_name = REPORT_FILES[key][1]
+    spec = REPORT_SPECS[key]
+
+    if not file_path.exists():
+        print(f"  ⚠ {spec.label}: File không tồn tại: {file_path}")
+        return
+
+    df = pd.read_excel(file_path, sheet_name=sheet_name)
+    count = bulk_import(conn, spec, df, thang)
+    print(f"  ✓ {spec.label}: {count} records imported")
+
+
+def import_c11(conn: sqlite3.Connection, thang: str):
+    """Import báo cáo C1.1."""
+    _import_report(conn, "c11", thang)
+
+
+def import_c12(conn: sqlite3.Connection, thang: str):
+    """Import báo cáo C1.2."""
+    _import_report(conn, "c12", thang)
+
+
+def import_c13(conn: sqlite3.Connection, thang: str):
+    """Import báo cáo C1.3."""
+    _import_report(conn, "c13", thang)
+
+
+def import_c14(conn: sqlite3.Connection, thang: str):
+    """Import báo cáo C1.4."""
+    _import_report(conn, "c14", thang)
+
+
+def import_c14_nvkt(conn: sqlite3.Connection, thang: str):
+    """Import báo cáo C1.4 chi tiết NVKT."""
+    _import_report(conn, "c14_nvkt", thang)
+
+
+def import_sm1c12_hll(conn: sqlite3.Connection, thang: str):
+    """Import báo cáo SM1-C12: Tỷ lệ hỏng lại tháng theo NVKT."""
+    _import_report(conn, "sm1c12", thang)
+
+
+def import_sm4c11_chitiet(conn: sqlite3.Connection, thang: str):
+    """Import báo cáo SM4-C11: Chi tiết BRCD không hẹn theo NVKT."""
+    _import_report(conn, "sm4c11_chitiet", thang)
+
+
+def import_sm4c11_18h(conn: sqlite3.Connection, thang: str):
+    """Import báo cáo SM4-C11: Chỉ tiêu không hẹn 18h theo NVKT."""
+    _import_report(conn, "sm4c11_18h", thang)
 
 
 def import_baocao_thang(month_str: str = None):
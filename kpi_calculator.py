@@ -4,150 +4,11 @@ Các chỉ tiêu: C1.1, C1.2, C1.4
 """
 
 import pandas as pd
-import numpy as np
 from pathlib import Path
 from datetime import datetime
 
-
-# ============================================================================
-# CÁC HÀM TÍNH ĐIỂM THÀNH PHẦN
-# ============================================================================
-
-def tinh_diem_C11_TP1(kq):
-    """
-    Tính điểm C1.1 Thành phần 1 (30%): Tỷ lệ sửa chữa phiếu chất lượng chủ động
-    
-    Args:
-        kq: Tỷ lệ sửa chữa chủ động (dạng thập phân, vd: 0.98 = 98%)
-    
-    Returns:
-        Điểm từ 1-5
-    """
-    if pd.isna(kq) or kq is None:
-        return 5  # Không có dữ liệu = không có phiếu cần sửa = tốt
-    
-    if kq >= 0.99:
-        return 5
-    elif kq > 0.96:
-        return 1 + 4 * (kq - 0.96) / 0.03
-    else:
-        return 1
-
-
-def tinh_diem_C11_TP2(kq):
-    """
-    Tính điểm C1.1 Thành phần 2 (70%): Tỷ lệ sửa chữa báo hỏng đúng quy định (không tính hẹn)
-    
-    Args:
-        kq: Tỷ lệ sửa chữa báo hỏng đúng quy định (dạng thập phân)
-    
-    Returns:
-        Điểm từ 1-5
-    """
-    if pd.isna(kq) or kq is None:
-        return 5  # Không có dữ liệu = không có phiếu báo hỏng = tốt
-    
-    if kq >= 0.85:
-        return 5
-    elif kq >= 0.82:
-        return 4 + (kq - 0.82) / 0.03
-    elif kq >= 0.79:
-        return 3 + (kq - 0.79) / 0.03
-    elif kq >= 0.76:
-        return 2
-    else:
-        return 1
-
-
-def tinh_diem_C12_TP1(kq):
-    """
-    Tính điểm C1.2 Thành phần 1 (50%): Tỷ lệ thuê bao báo hỏng lặp lại
-    LƯU Ý: Càng thấp càng tốt
-    
-    Args:
-        kq: Tỷ lệ báo hỏng lặp lại (dạng thập phân)
-    
-    Returns:
-        Điểm từ 1-5
-    """
-    if pd.isna(kq) or kq is None:
-        return 5  # Không có dữ liệu = không có hỏng lặp lại = tốt
-    
-    if kq <= 0.025:
-        return 5
-    elif kq < 0.04:
-        return 5 - 4 * (kq - 0.025) / 0.015
-    else:
-        return 1
-
-
-def tinh_diem_C12_TP2(kq):
-    """
-    Tính điểm C1.2 Thành phần 2 (50%): Tỷ lệ sự cố dịch vụ BRCĐ
-    LƯU Ý: Càng thấp càng tốt
-    
-    Args:
-        kq: Tỷ lệ sự cố dịch vụ BRCĐ (dạng thập phân)
-    
-    Returns:
-        Điểm từ 1-5
-    """
-    if pd.isna(kq) or kq is None:
-        return 5  # Không có dữ liệu = không có sự cố = tốt
-    
-    if kq <= 0.02:
-        return 5
-    elif kq < 0.03:
-        return 5 - 4 * (kq - 0.02) / 0.01
-    else:
-        return 1
-
-
-def tinh_diem_C14(kq):
-    """
-    Tính điểm C1.4: Độ hài lòng của khách hàng sau lắp đặt và sửa chữa
-    
-    Args:
-        kq: Độ hài lòng khách hàng (dạng thập phân)
-    
-    Returns:
-        Điểm từ 1-5
-    """
-    if pd.isna(kq) or kq is None:
-        return np.nan
-    
-    if kq >= 0.995:
-        return 5
-    elif kq > 0.95:
-        return 1 + 4 * (kq - 0.95) / 0.045
-    else:
-        return 1
-
-
-def tinh_diem_C15(kq):
-    """
-    Tính điểm C1.5: Tỉ lệ thiết lập dịch vụ đạt thời gian quy định
-    
-    Args:
-        kq: Tỉ lệ thiết lập dịch vụ đạt (dạng thập phân, vd: 0.995 = 99.5%)
-    
-    Returns:
-        Điểm từ 1-5
-    
-    Công thức:
-        - KQ ≥ 99.5% = 5
-        - 89.5% < KQ < 99.5% = 1 + 4*(KQ - 89.5%)/10%
-        - KQ ≤ 89.5% = 1
-    """
-    if pd.isna(kq) or kq is None:
-        return np.nan
-    
-    if kq >= 0.995:
-        return 5
-    elif kq > 0.895:
-        return 1 + 4 * (kq - 0.895) / 0.10
-    else:
-        return 1
+from api_transition.excel_cache import read_excel
+from kpi_scoring import tinh_diem_bsc
 
 
 # ============================================================================
@@ -183,7 +44,7 @@ def doc_C11_TP1(data_folder):
     """
     file_path = Path(data_folder) / "SM2-C11.xlsx"
     #df = pd.read_excel(file_path, sheet_name="TH_SM2") #theo công thức của bc HN
-    df = pd.read_excel(file_path, sheet_name="CT_C1.1_TP1") #đọc từ dữ liệu thực đã KP
+    df = read_excel(file_path, sheet_name="CT_C1.1_TP1") #đọc từ dữ liệu thực đã KP
     
     # Lấy các cột cần thiết
     df = df[['TEN_DOI', 'NVKT', 'Tổng phiếu', 'Phiếu đạt', 'Tỉ lệ đạt (%)']].copy()
@@ -210,7 +71,7 @@ def doc_C11_TP2(data_folder):
     File: SM4-C11.xlsx, Sheet: chi_tiet
     """
     file_path = Path(data_folder) / "SM4-C11.xlsx"
-    df = pd.read_excel(file_path, sheet_name="chi_tiet")
+    df = read_excel(file_path, sheet_name="chi_tiet")
     
     # Tên cột thực tế khá dài
     col_ty_le = 'Tỷ lệ phiếu sửa chữa báo hỏng dịch vụ BRCD đúng quy định không tính hẹn'
@@ -233,7 +94,7 @@ def doc_C12_TP1(data_folder):
     File: SM1-C12.xlsx, Sheet: TH_SM1C12_HLL_Thang
     """
     file_path = Path(data_folder) / "SM1-C12.xlsx"
-    df = pd.read_excel(file_path, sheet_name="TH_SM1C12_HLL_Thang")
+    df = read_excel(file_path, sheet_name="TH_SM1C12_HLL_Thang")
     
     df = df[['TEN_DOI', 'NVKT', 'Số phiếu HLL', 'Số phiếu báo hỏng', 'Tỉ lệ HLL tháng (2.5%)']].copy()
     df.columns = ['don_vi', 'nvkt', 'c12_tp1_phieu_hll', 'c12_tp1_phieu_bh', 'c12_tp1_ty_le']
@@ -256,7 +117,7 @@ def doc_C12_TP2(data_folder):
            Cần chia 100 để chuyển về dạng thập phân: 0.37 / 100 = 0.0037
     """
     file_path = Path(data_folder) / "SM4-C12-ti-le-su-co-dv-brcd.xlsx"
-    df = pd.read_excel(file_path, sheet_name="TH_C12_TiLeBaoHong")
+    df = read_excel(file_path, sheet_name="TH_C12_TiLeBaoHong")
     
     df = df[['TEN_DOI', 'NVKT', 'Số phiếu báo hỏng', 'Tổng TB', 'Tỷ lệ báo hỏng (%)']].copy()
     df.columns = ['don_vi', 'nvkt', 'c12_tp2_phieu_bh', 'c12_tp2_tong_tb', 'c12_tp2_ty_le']
@@ -280,7 +141,7 @@ def doc_C14(data_folder):
            tỷ lệ hài lòng sẽ được mặc định = 100% (1.0)
     """
     file_path = Path(data_folder) / "c1.4_chitiet_report.xlsx"
-    df = pd.read_excel(file_path, sheet_name="TH_HL_NVKT")
+    df = read_excel(file_path, sheet_name="TH_HL_NVKT")
     
     df = df[['DOIVT', 'NVKT', 'Tổng phiếu KS thành công', 'Tổng phiếu KHL', 'Tỉ lệ HL NVKT (%)']].copy()
     df.columns = ['don_vi', 'nvkt', 'c14_phieu_ks', 'c14_phieu_khl', 'c14_ty_le']
@@ -305,7 +166,7 @@ def doc_C15(data_folder):
     File: c1.5_chitiet_report.xlsx, Sheet: KQ_C15_chitiet
     """
     file_path = Path(data_folder) / "c1.5_chitiet_report.xlsx"
-    df = pd.read_excel(file_path, sheet_name="KQ_C15_chitiet")
+    df = read_excel(file_path, sheet_name="KQ_C15_chitiet")
     
     df = df[['DOIVT', 'NVKT', 'Phiếu đạt', 'Phiếu không đạt', 'Tổng Hoàn công', 'Tỉ lệ đạt (%)']].copy()
     df.columns = ['don_vi', 'nvkt', 'c15_phieu_dat', 'c15_phieu_khong_dat', 'c15_tong_phieu', 'c15_ty_le']
@@ -329,7 +190,7 @@ def doc_C11_TP1_sau_giam_tru(exclusion_folder):
     File: So_sanh_C11_SM2.xlsx, Sheet: So_sanh_chi_tiet
     """
     file_path = Path(exclusion_folder) / "So_sanh_C11_SM2.xlsx"
-    df = pd.read_excel(file_path, sheet_name="So_sanh_chi_tiet")
+    df = read_excel(file_path, sheet_name="So_sanh_chi_tiet")
     
     df = df[['TEN_DOI', 'NVKT', 'Tổng phiếu (Sau GT)', 'Số phiếu đạt (Sau GT)', 'Tỷ lệ % (Sau GT)']].copy()
     df.columns = ['don_vi', 'nvkt', 'c11_tp1_tong_phieu', 'c11_tp1_phieu_dat', 'c11_tp1_ty_le']
@@ -358,7 +219,7 @@ def doc_C11_TP2_sau_giam_tru(exclusion_folder):
     File: So_sanh_C11_SM4.xlsx, Sheet: So_sanh_chi_tiet
     """
     file_path = Path(exclusion_folder) / "So_sanh_C11_SM4.xlsx"
-    df = pd.read_excel(file_path, sheet_name="So_sanh_chi_tiet")
+    df = read_excel(file_path, sheet_name="So_sanh_chi_tiet")
     
     df = df[['TEN_DOI', 'NVKT', 'Tổng phiếu (Sau GT)', 'Số phiếu đạt (Sau GT)', 'Tỷ lệ % (Sau GT)']].copy()
     df.columns = ['don_vi', 'nvkt', 'c11_tp2_tong_phieu', 'c11_tp2_phieu_dat', 'c11_tp2_ty_le']
@@ -386,7 +247,7 @@ def doc_C12_TP1_sau_giam_tru(exclusion_folder):
     File: So_sanh_C12_SM1.xlsx, Sheet: So_sanh_chi_tiet
     """
     file_path = Path(exclusion_folder) / "So_sanh_C12_SM1.xlsx"
-    df = pd.read_excel(file_path, sheet_name="So_sanh_chi_tiet")
+    df = read_excel(file_path, sheet_name="So_sanh_chi_tiet")
     
     df = df[['TEN_DOI', 'NVKT', 'Số phiếu HLL (Sau GT)', 'Số phiếu báo hỏng (Sau GT)', 'Tỷ lệ HLL % (Sau GT)']].copy()
     df.columns = ['don_vi', 'nvkt', 'c12_tp1_phieu_hll', 'c12_tp1_phieu_bh', 'c12_tp1_ty_le']
@@ -417,7 +278,7 @@ def doc_C12_TP2_sau_giam_tru(exclusion_folder):
            chuan_hoa_ty_le sẽ chia 100 vì max > 1
     """
     file_path = Path(exclusion_folder) / "SM4-C12-ti-le-su-co-dv-brcd.xlsx"
-    df = pd.read_excel(file_path, sheet_name="So_sanh_chi_tiet")
+    df = read_excel(file_path, sheet_name="So_sanh_chi_tiet")
     
     df = df[['TEN_DOI', 'NVKT', 'Tổng TB (Thô)', 'Số phiếu báo hỏng (Sau GT)', 'Tỷ lệ báo hỏng (%) (Sau GT)']].copy()
     df.columns = ['don_vi', 'nvkt', 'c12_tp2_tong_tb', 'c12_tp2_phieu_bh', 'c12_tp2_ty_le']
@@ -450,7 +311,7 @@ def doc_C14_sau_giam_tru(exclusion_folder):
         print(f"⚠️ Không tìm thấy file C1.4 sau giảm trừ: {file_path}")
         return None
     
-    df = pd.read_excel(file_path, sheet_name="So_sanh_chi_tiet")
+    df = read_excel(file_path, sheet_name="So_sanh_chi_tiet")
     
     # Lấy các cột cần thiết (sau giảm trừ)
     cols_needed = ['TEN_DOI', 'NVKT', 'Tổng phiếu KS (Sau GT)', 'Số phiếu KHL (Sau GT)', 'Tỷ lệ HL (%) (Sau GT)']
@@ -501,7 +362,7 @@ def doc_C15_sau_giam_tru(exclusion_folder):
         print(f"⚠️ Không tìm thấy file C1.5 sau giảm trừ: {file_path}")
         return None
     
-    df = pd.read_excel(file_path, sheet_name="So_sanh_chi_tiet")
+    df = read_excel(file_path, sheet_name="So_sanh_chi_tiet")
     
     # Lấy các cột cần thiết (sau giảm trừ)
     cols_needed = ['TEN_DOI', 'NVKT', 'Tổng Hoàn công (Sau GT)', 'Phiếu đạt (Sau GT)', 'Tỷ lệ đạt (%) (Sau GT)']
@@ -624,12 +485,12 @@ def tinh_diem_kpi_nvkt(data_folder, output_folder=None):
     # 3. Tính điểm từng thành phần
     print("Đang tính điểm các thành phần...")
     
-    df_all['diem_c11_tp1'] = df_all['c11_tp1_ty_le'].apply(tinh_diem_C11_TP1)
-    df_all['diem_c11_tp2'] = df_all['c11_tp2_ty_le'].apply(tinh_diem_C11_TP2)
-    df_all['diem_c12_tp1'] = df_all['c12_tp1_ty_le'].apply(tinh_diem_C12_TP1)
-    df_all['diem_c12_tp2'] = df_all['c12_tp2_ty_le'].apply(tinh_diem_C12_TP2)
-    df_all['diem_c14'] = df_all['c14_ty_le'].apply(tinh_diem_C14)
-    df_all['diem_c15'] = df_all['c15_ty_le'].apply(tinh_diem_C15)
+    df_all['diem_c11_tp1'] = tinh_diem_bsc('C11_TP1', df_all['c11_tp1_ty_le'])
+    df_all['diem_c11_tp2'] = tinh_diem_bsc('C11_TP2', df_all['c11_tp2_ty_le'])
+    df_all['diem_c12_tp1'] = tinh_diem_bsc('C12_TP1', df_all['c12_tp1_ty_le'])
+    df_all['diem_c12_tp2'] = tinh_diem_bsc('C12_TP2', df_all['c12_tp2_ty_le'])
+    df_all['diem_c14'] = tinh_diem_bsc('C14', df_all['c14_ty_le'])
+    df_all['diem_c15'] = tinh_diem_bsc('C15', df_all['c15_ty_le'])
     
     # 4. Tính điểm tổng hợp
     df_all['Diem_C1.1'] = df_all['diem_c11_tp1'] * 0.30 + df_all['diem_c11_tp2'] * 0.70
@@ -813,12 +674,12 @@ def tinh_diem_kpi_nvkt_sau_giam_tru(exclusion_folder, original_data_folder, outp
     # 3. Tính điểm từng thành phần
     print("Đang tính điểm các thành phần...")
     
-    df_all['diem_c11_tp1'] = df_all['c11_tp1_ty_le'].apply(tinh_diem_C11_TP1)
-    df_all['diem_c11_tp2'] = df_all['c11_tp2_ty_le'].apply(tinh_diem_C11_TP2)
-    df_all['diem_c12_tp1'] = df_all['c12_tp1_ty_le'].apply(tinh_diem_C12_TP1)
-    df_all['diem_c12_tp2'] = df_all['c12_tp2_ty_le'].apply(tinh_diem_C12_TP2)
-    df_all['diem_c14'] = df_all['c14_ty_le'].apply(tinh_diem_C14)
-    df_all['diem_c15'] = df_all['c15_ty_le'].apply(tinh_diem_C15)
+    df_all['diem_c11_tp1'] = tinh_diem_bsc('C11_TP1', df_all['c11_tp1_ty_le'])
+    df_all['diem_c11_tp2'] = tinh_diem_bsc('C11_TP2', df_all['c11_tp2_ty_le'])
+    df_all['diem_c12_tp1'] = tinh_diem_bsc('C12_TP1', df_all['c12_tp1_ty_le'])
+    df_all['diem_c12_tp2'] = tinh_diem_bsc('C12_TP2', df_all['c12_tp2_ty_le'])
+    df_all['diem_c14'] = tinh_diem_bsc('C14', df_all['c14_ty_le'])
+    df_all['diem_c15'] = tinh_diem_bsc('C15', df_all['c15_ty_le'])
     
     # 4. Tính điểm tổng hợp
     df_all['Diem_C1.1'] = df_all['diem_c11_tp1'] * 0.30 + df_all['diem_c11_tp2'] * 0.70
@@ -11,61 +11,8 @@ from pathlib import Path
 from datetime import datetime
 import math
 
-
-# ============================================================================
-# CÁC HÀM TÍNH ĐIỂM (copy từ kpi_calculator.py)
-# ============================================================================
-
-def tinh_diem_C11_TP1(kq):
-    """C1.1 TP1 (30%): Tỷ lệ sửa chữa phiếu chất lượng chủ động"""
-    if pd.isna(kq) or kq is None:
-        return np.nan
-    if kq >= 0.99:
-        return 5
-    elif kq > 0.96:
-        return 1 + 4 * (kq - 0.96) / 0.03
-    else:
-        return 1
-
-
-def tinh_diem_C11_TP2(kq):
-    """C1.1 TP2 (70%): Tỷ lệ sửa chữa báo hỏng đúng quy định (không tính hẹn)"""
-    if pd.isna(kq) or kq is None:
-        return np.nan
-    if kq >= 0.85:
-        return 5
-    elif kq >= 0.82:
-        return 4 + (kq - 0.82) / 0.03
-    elif kq >= 0.79:
-        return 3 + (kq - 0.79) / 0.03
-    elif kq >= 0.76:
-        return 2
-    else:
-        return 1
-
-
-def tinh_diem_C12_TP1(kq):
-    """C1.2 TP1 (50%): Tỷ lệ thuê bao báo hỏng lặp lại - càng thấp càng tốt"""
-    if pd.isna(kq) or kq is None:
-        return np.nan
-    if kq <= 0.025:
-        return 5
-    elif kq < 0.04:
-        return 5 - 4 * (kq - 0.025) / 0.015
-    else:
-        return 1
-
-
-def tinh_diem_C12_TP2(kq):
-    """C1.2 TP2 (50%): Tỷ lệ sự cố dịch vụ BRCĐ - càng thấp càng tốt"""
-    if pd.isna(kq) or kq is None:
-        return np.nan
-    if kq <= 0.02:
-        return 5
-    elif kq < 0.03:
-        return 5 - 4 * (kq - 0.02) / 0.01
-    else:
-        return 1
+from api_transition.excel_cache import read_excel
+from kpi_scoring import tinh_diem_bsc
 
 
 # ============================================================================
@@ -78,7 +25,7 @@ def load_exclusion_list(exclusion_file="du_lieu_tham_chieu/ds_phieu_loai_tru.xls
         print(f"⚠️ Không tìm thấy file loại trừ: {exclusion_file}")
         return set()
     
-    df = pd.read_excel(exclusion_file)
+    df = read_excel(exclusion_file)
     if 'BAOHONG_ID' not in df.columns:
         print(f"⚠️ Không tìm thấy cột 'BAOHONG_ID'")
         return set()
@@ -91,7 +38,7 @@ def load_exclusion_list(exclusion_file="du_lieu_tham_chieu/ds_phieu_loai_tru.xls
 def load_c11_report(data_folder):
     """Đọc báo cáo C1.1 tổng hợp theo đơn vị"""
     file_path = Path(data_folder) / "c1.1 report.xlsx"
-    df = pd.read_excel(file_path, sheet_name="TH_C1.1")
+    df = read_excel(file_path, sheet_name="TH_C1.1")
     
     # Rename columns for clarity
     # SM3 = số phiếu đạt (tử số)
@@ -117,7 +64,7 @@ def load_c11_report(data_folder):
 def load_c12_report(data_folder):
     """Đọc báo cáo C1.2 tổng hợp theo đơn vị"""
     file_path = Path(data_folder) / "c1.2 report.xlsx"
-    df = pd.read_excel(file_path, sheet_name="TH_C1.2")
+    df = read_excel(file_path, sheet_name="TH_C1.2")
     
     df = df.rename(columns={
         'Đơn vị': 'don_vi',
@@ -146,7 +93,7 @@ def get_exclusion_stats_c11(data_folder, exclusion_ids):
     Returns: DataFrame với c11_loai_tru_sm3 (phiếu đạt loại trừ) và c11_loai_tru_sm4 (tổng loại trừ)
     """
     file_path = Path(data_folder) / "SM4-C11.xlsx"
-    df = pd.read_excel(file_path, sheet_name="Sheet1")
+    df = read_excel(file_path, sheet_name="Sheet1")
     
     df['BAOHONG_ID_STR'] = df['BAOHONG_ID'].astype(str)
     excluded = df[df['BAOHONG_ID_STR'].isin(exclusion_ids)]
@@ -171,7 +118,7 @@ def get_exclusion_stats_c12_sm1(data_folder, exclusion_ids):
     Tính số phiếu loại trừ theo đơn vị cho C1.2 SM1 (phiếu HLL)
     """
     file_path = Path(data_folder) / "SM1-C12.xlsx"
-    df = pd.read_excel(file_path, sheet_name="Sheet1")
+    df = read_excel(file_path, sheet_name="Sheet1")
     
     df['BAOHONG_ID_STR'] = df['BAOHONG_ID'].astype(str)
     excluded = df[df['BAOHONG_ID_STR'].isin(exclusion_ids)]
@@ -196,7 +143,7 @@ def get_exclusion_stats_c12_sm2(data_folder, exclusion_ids):
     SM3 = số phiếu báo hỏng (tử số tỷ lệ sự cố)
     """
     file_path = Path(data_folder) / "SM2-C12.xlsx"
-    df = pd.read_excel(file_path, sheet_name="Sheet1")
+    df = read_excel(file_path, sheet_name="Sheet1")
     
     df['BAOHONG_ID_STR'] = df['BAOHONG_ID'].astype(str)
     excluded = df[df['BAOHONG_ID_STR'].isin(exclusion_ids)]
@@ -301,23 +248,23 @@ def tinh_kpi_donvi_sau_giam_tru(data_folder, exclusion_file, output_folder):
     print("\n📈 Tính điểm KPI...")
     
     # C1.1 TRƯỚC giảm trừ
-    df_result['diem_c11_tp1_truoc'] = (df_result['c11_tp1_ty_le'] / 100).apply(tinh_diem_C11_TP1).round(2)
-    df_result['diem_c11_tp2_truoc'] = (df_result['c11_tp2_ty_le'] / 100).apply(tinh_diem_C11_TP2).round(2)
+    df_result['diem_c11_tp1_truoc'] = tinh_diem_bsc('C11_TP1', df_result['c11_tp1_ty_le'] / 100, missing=np.nan).round(2)
+    df_result['diem_c11_tp2_truoc'] = tinh_diem_bsc('C11_TP2', df_result['c11_tp2_ty_le'] / 100, missing=np.nan).round(2)
     df_result['diem_c11_truoc'] = (df_result['diem_c11_tp1_truoc'] * 0.30 + df_result['diem_c11_tp2_truoc'] * 0.70).round(2)
     
     # C1.1 SAU giảm trừ (TP1 giữ nguyên, chỉ TP2 thay đổi)
     df_result['diem_c11_tp1_sau'] = df_result['diem_c11_tp1_truoc']  # Không thay đổi
-    df_result['diem_c11_tp2_sau'] = (df_result['c11_tp2_ty_le_sau'] / 100).apply(tinh_diem_C11_TP2).round(2)
+    df_result['diem_c11_tp2_sau'] = tinh_diem_bsc('C11_TP2', df_result['c11_tp2_ty_le_sau'] / 100, missing=np.nan).round(2)
     df_result['diem_c11_sau'] = (df_result['diem_c11_tp1_sau'] * 0.30 + df_result['diem_c11_tp2_sau'] * 0.70).round(2)
     
     # C1.2 TRƯỚC giảm trừ
-    df_result['diem_c12_tp1_truoc'] = (df_result['c12_tp1_ty_le'] / 100).apply(tinh_diem_C12_TP1).round(2)
-    df_result['diem_c12_tp2_truoc'] = (df_result['c12_tp2_ty_le'] / 100).apply(tinh_diem_C12_TP2).round(2)
+    df_result['diem_c12_tp1_truoc'] = tinh_diem_bsc('C12_TP1', df_result['c12_tp1_ty_le'] / 100, missing=np.nan).round(2)
+    df_result['diem_c12_tp2_truoc'] = tinh_diem_bsc('C12_TP2', df_result['c12_tp2_ty_le'] / 100, missing=np.nan).round(2)
     df_result['diem_c12_truoc'] = (df_result['diem_c12_tp1_truoc'] * 0.50 + df_result['diem_c12_tp2_truoc'] * 0.50).round(2)
     
     # C1.2 SAU giảm trừ
-    df_result['diem_c12_tp1_sau'] = (df_result['c12_tp1_ty_le_sau'] / 100).apply(tinh_diem_C12_TP1).round(2)
-    df_result['diem_c12_tp2_sau'] = (df_result['c12_tp2_ty_le_sau'] / 100).apply(tinh_diem_C12_TP2).round(2)
+    df_result['diem_c12_tp1_sau'] = tinh_diem_bsc('C12_TP1', df_result['c12_tp1_ty_le_sau'] / 100, missing=np.nan).round(2)
+    df_result['diem_c12_tp2_sau'] = tinh_diem_bsc('C12_TP2', df_result['c12_tp2_ty_le_sau'] / 100, missing=np.nan).round(2)
     df_result['diem_c12_sau'] = (df_result['diem_c12_tp1_sau'] * 0.50 + df_result['diem_c12_tp2_sau'] * 0.50).round(2)
     
     # 6. Tính chênh lệch
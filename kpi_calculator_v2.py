@@ -6,15 +6,13 @@ Refactored: Import scoring từ kpi_scoring.py (single source of truth)
 """
 
 import pandas as pd
-import numpy as np
 from pathlib import Path
 from datetime import datetime
+from api_transition.excel_cache import read_excel
 
 from kpi_scoring import (
-    tinh_diem_C11_TP1, tinh_diem_C11_TP2,
-    tinh_diem_C12_TP1, tinh_diem_C12_TP2,
-    tinh_diem_C14, tinh_diem_C15,
     chuan_hoa_ty_le_df, chuan_hoa_ten,
+    tinh_diem_bsc,
 )
 
 
@@ -28,7 +26,7 @@ def doc_C11_TP1(data_folder):
     File: SM2-C11.xlsx, Sheet: CT_C1.1_TP1
     """
     file_path = Path(data_folder) / "SM2-C11.xlsx"
-    df = pd.read_excel(file_path, sheet_name="CT_C1.1_TP1")
+    df = read_excel(file_path, sheet_name="CT_C1.1_TP1")
 
     df = df[['TEN_DOI', 'NVKT', 'Tổng phiếu', 'Phiếu đạt', 'Tỉ lệ đạt (%)']].copy()
     df.columns = ['don_vi', 'nvkt', 'c11_tp1_tong_phieu', 'c11_tp1_phieu_dat', 'c11_tp1_ty_le']
@@ -51,7 +49,7 @@ def doc_C11_TP2(data_folder):
     File: SM4-C11.xlsx, Sheet: chi_tiet
     """
     file_path = Path(data_folder) / "SM4-C11.xlsx"
-    df = pd.read_excel(file_path, sheet_name="chi_tiet")
+    df = read_excel(file_path, sheet_name="chi_tiet")
 
     col_ty_le = 'Tỷ lệ phiếu sửa chữa báo hỏng dịch vụ BRCD đúng quy định không tính hẹn'
 
@@ -70,7 +68,7 @@ def doc_C12_TP1(data_folder):
     File: SM1-C12.xlsx, Sheet: TH_SM1C12_HLL_Thang
     """
     file_path = Path(data_folder) / "SM1-C12.xlsx"
-    df = pd.read_excel(file_path, sheet_name="TH_SM1C12_HLL_Thang")
+    df = read_excel(file_path, sheet_name="TH_SM1C12_HLL_Thang")
 
     df = df[['TEN_DOI', 'NVKT', 'Số phiếu HLL', 'Số phiếu báo hỏng', 'Tỉ lệ HLL tháng (2.5%)']].copy()
     df.columns = ['don_vi', 'nvkt', 'c12_tp1_phieu_hll', 'c12_tp1_phieu_bh', 'c12_tp1_ty_le']
@@ -90,7 +88,7 @@ def doc_C12_TP2(data_folder):
            Cần chia 100 để chuyển về dạng thập phân: 0.37 / 100 = 0.0037
     """
     file_path = Path(data_folder) / "SM4-C12-ti-le-su-co-dv-brcd.xlsx"
-    df = pd.read_excel(file_path, sheet_name="TH_C12_TiLeBaoHong")
+    df = read_excel(file_path, sheet_name="TH_C12_TiLeBaoHong")
 
     df = df[['TEN_DOI', 'NVKT', 'Số phiếu báo hỏng', 'Tổng TB', 'Tỷ lệ báo hỏng (%)']].copy()
     df.columns = ['don_vi', 'nvkt', 'c12_tp2_phieu_bh', 'c12_tp2_tong_tb', 'c12_tp2_ty_le']
@@ -109,7 +107,7 @@ def doc_C14(data_folder):
     File: c1.4_chitiet_report.xlsx, Sheet: TH_HL_NVKT
     """
     file_path = Path(data_folder) / "c1.4_chitiet_report.xlsx"
-    df = pd.read_excel(file_path, sheet_name="TH_HL_NVKT")
+    df = read_excel(file_path, sheet_name="TH_HL_NVKT")
 
     df = df[['DOIVT', 'NVKT', 'Tổng phiếu KS thành công', 'Tổng phiếu KHL', 'Tỉ lệ HL NVKT (%)']].copy()
     df.columns = ['don_vi', 'nvkt', 'c14_phieu_ks', 'c14_phieu_khl', 'c14_ty_le']
@@ -130,7 +128,7 @@ def doc_C15(data_folder):
     File: c1.5_chitiet_report.xlsx, Sheet: KQ_C15_chitiet
     """
     file_path = Path(data_folder) / "c1.5_chitiet_report.xlsx"
-    df = pd.read_excel(file_path, sheet_name="KQ_C15_chitiet")
+    df = read_excel(file_path, sheet_name="KQ_C15_chitiet")
 
     df = df[['DOIVT', 'NVKT', 'Phiếu đạt', 'Phiếu không đạt', 'Tổng Hoàn công', 'Tỉ lệ đạt (%)']].copy()
     df.columns = ['don_vi', 'nvkt', 'c15_phieu_dat', 'c15_phieu_khong_dat', 'c15_tong_phieu', 'c15_ty_le']
@@ -151,7 +149,7 @@ def doc_C11_TP1_sau_giam_tru(exclusion_folder):
     File: So_sanh_C11_SM2.xlsx, Sheet: So_sanh_chi_tiet
     """
     file_path = Path(exclusion_folder) / "So_sanh_C11_SM2.xlsx"
-    df = pd.read_excel(file_path, sheet_name="So_sanh_chi_tiet")
+    df = read_excel(file_path, sheet_name="So_sanh_chi_tiet")
 
     df = df[['TEN_DOI', 'NVKT', 'Tổng phiếu (Sau GT)', 'Số phiếu đạt (Sau GT)', 'Tỷ lệ % (Sau GT)']].copy()
     df.columns = ['don_vi', 'nvkt', 'c11_tp1_tong_phieu', 'c11_tp1_phieu_dat', 'c11_tp1_ty_le']
@@ -175,7 +173,7 @@ def doc_C11_TP2_sau_giam_tru(exclusion_folder):
     File: So_sanh_C11_SM4.xlsx, Sheet: So_sanh_chi_tiet
     """
     file_path = Path(exclusion_folder) / "So_sanh_C11_SM4.xlsx"
-    df = pd.read_excel(file_path, sheet_name="So_sanh_chi_tiet")
+    df = read_excel(file_path, sheet_name="So_sanh_chi_tiet")
 
     df = df[['TEN_DOI', 'NVKT', 'Tổng phiếu (Sau GT)', 'Số phiếu đạt (Sau GT)', 'Tỷ lệ % (Sau GT)']].copy()
     df.columns = ['don_vi', 'nvkt', 'c11_tp2_tong_phieu', 'c11_tp2_phieu_dat', 'c11_tp2_ty_le']
@@ -199,7 +197,7 @@ def doc_C12_TP1_sau_giam_tru(exclusion_folder):
     File: So_sanh_C12_SM1.xlsx, Sheet: So_sanh_chi_tiet
     """
     file_path = Path(exclusion_folder) / "So_sanh_C12_SM1.xlsx"
-    df = pd.read_excel(file_path, sheet_name="So_sanh_chi_tiet")
+    df = read_excel(file_path, sheet_name="So_sanh_chi_tiet")
 
     df = df[['TEN_DOI', 'NVKT', 'Số phiếu HLL (Sau GT)', 'Số phiếu báo hỏng (Sau GT)', 'Tỷ lệ HLL % (Sau GT)']].copy()
     df.columns = ['don_vi', 'nvkt', 'c12_tp1_phieu_hll', 'c12_tp1_phieu_bh', 'c12_tp1_ty_le']
@@ -223,7 +221,7 @@ def doc_C12_TP2_sau_giam_tru(exclusion_folder):
     File: SM4-C12-ti-le-su-co-dv-brcd.xlsx, Sheet: So_sanh_chi_tiet
     """
     file_path = Path(exclusion_folder) / "SM4-C12-ti-le-su-co-dv-brcd.xlsx"
-    df = pd.read_excel(file_path, sheet_name="So_sanh_chi_tiet")
+    df = read_excel(file_path, sheet_name="So_sanh_chi_tiet")
 
     df = df[['TEN_DOI', 'NVKT', 'Tổng TB (Thô)', 'Số phiếu báo hỏng (Sau GT)', 'Tỷ lệ báo hỏng (%) (Sau GT)']].copy()
     df.columns = ['don_vi', 'nvkt', 'c12_tp2_tong_tb', 'c12_tp2_phieu_bh', 'c12_tp2_ty_le']
@@ -252,7 +250,7 @@ def doc_C14_sau_giam_tru(exclusion_folder):
         print(f"  [WARN] Không tìm thấy file C1.4 sau giảm trừ: {file_path}")
         return None
 
-    df = pd.read_excel(file_path, sheet_name="So_sanh_chi_tiet")
+    df = read_excel(file_path, sheet_name="So_sanh_chi_tiet")
 
     cols_needed = ['TEN_DOI', 'NVKT', 'Tổng phiếu KS (Sau GT)', 'Số phiếu KHL (Sau GT)', 'Tỷ lệ HL (%) (Sau GT)']
     cols_available = [c for c in cols_needed if c in df.columns]
@@ -296,7 +294,7 @@ def doc_C15_sau_giam_tru(exclusion_folder):
         print(f"  [WARN] Không tìm thấy file C1.5 sau giảm trừ: {file_path}")
         return None
 
-    df = pd.read_excel(file_path, sheet_name="So_sanh_chi_tiet")
+    df = read_excel(file_path, sheet_name="So_sanh_chi_tiet")
 
     cols_needed = ['TEN_DOI', 'NVKT', 'Tổng Hoàn công (Sau GT)', 'Phiếu đạt (Sau GT)', 'Tỷ lệ đạt (%) (Sau GT)']
     cols_available = [c for c in cols_needed if c in df.columns]
@@ -347,12 +345,12 @@ def _merge_all_data(df_c11_tp1, df_c11_tp2, df_c12_tp1, df_c12_tp2, df_c14, df_c
 def _tinh_diem_va_lam_tron(df_all):
     """Tính điểm từng thành phần và tổng hợp, làm tròn"""
     # Tính điểm từng thành phần
-    df_all['diem_c11_tp1'] = df_all['c11_tp1_ty_le'].apply(tinh_diem_C11_TP1)
-    df_all['diem_c11_tp2'] = df_all['c11_tp2_ty_le'].apply(tinh_diem_C11_TP2)
-    df_all['diem_c12_tp1'] = df_all['c12_tp1_ty_le'].apply(tinh_diem_C12_TP1)
-    df_all['diem_c12_tp2'] = df_all['c12_tp2_ty_le'].apply(tinh_diem_C12_TP2)
-    df_all['diem_c14'] = df_all['c14_ty_le'].apply(tinh_diem_C14)
-    df_all['diem_c15'] = df_all['c15_ty_le'].apply(tinh_diem_C15)
+    df_all['diem_c11_tp1'] = tinh_diem_bsc('C11_TP1', df_all['c11_tp1_ty_le'])
+    df_all['diem_c11_tp2'] = tinh_diem_bsc('C11_TP2', df_all['c11_tp2_ty_le'])
+    df_all['diem_c12_tp1'] = tinh_diem_bsc('C12_TP1', df_all['c12_tp1_ty_le'])
+    df_all['diem_c12_tp2'] = tinh_diem_bsc('C12_TP2', df_all['c12_tp2_ty_le'])
+    df_all['diem_c14'] = tinh_diem_bsc('C14', df_all['c14_ty_le'])
+    df_all['diem_c15'] = tinh_diem_bsc('C15', df_all['c15_ty_le'])
 
     # Tính điểm tổng hợp
     df_all['Diem_C1.1'] = df_all['diem_c11_tp1'] * 0.30 + df_all['diem_c11_tp2'] * 0.70
@@ -6,6 +6,7 @@ Tất cả hàm tính điểm BSC cho các chỉ tiêu C1.1, C1.2, C1.4, C1.5
 Quy ước:
 - Input luôn ở dạng thập phân (0-1), vd: 0.98 = 98%
 - Dùng chuan_hoa_ty_le() để chuẩn hóa nếu input có thể là % (>1)
+- Tính cả cột (Series/array) thì dùng tinh_diem_bsc() thay cho .apply()
 """
 
 import pandas as pd
@@ -205,6 +206,120 @@ def tinh_diem_C15(kq):
         return 1
 
 
+# ============================================================================
+# BẢNG NGƯỠNG & TÍNH ĐIỂM VECTOR HÓA
+# ============================================================================
+
+# Bảng ngưỡng khai báo cho từng chỉ tiêu, khớp 1-1 với các hàm tinh_diem_* ở trên.
+# - missing: điểm khi không có dữ liệu (NaN/None)
+# - bands: xét lần lượt (toán tử, ngưỡng, điểm); điểm là hằng số hoặc bộ
+#   (base, he_so, moc, buoc) = base + he_so * (kq - moc) / buoc
+# - default: điểm khi không rơi vào band nào
+# Giữ nguyên thứ tự phép tính như hàm scalar để kết quả trùng từng bit
+# (he_so âm thay cho dạng "5 - 4 * ...").
+BSC_THRESHOLDS = {
+    "C11_TP1": {
+        "missing": 5,
+        "bands": [
+            (">=", 0.99, 5),
+            (">", 0.96, (1, 4, 0.96, 0.03)),
+        ],
+        "default": 1,
+    },
+    "C11_TP2": {
+        "missing": 5,
+        "bands": [
+            (">=", 0.85, 5),
+            (">=", 0.82, (4, 1, 0.82, 0.03)),
+            (">=", 0.79, (3, 1, 0.79, 0.03)),
+            (">=", 0.76, 2),
+        ],
+        "default": 1,
+    },
+    "C12_TP1": {
+        "missing": 5,
+        "bands": [
+            ("<=", 0.025, 5),
+            ("<", 0.04, (5, -4, 0.025, 0.015)),
+        ],
+        "default": 1,
+    },
+    "C12_TP2": {
+        "missing": 5,
+        "bands": [
+            ("<=", 0.02, 5),
+            ("<", 0.03, (5, -4, 0.02, 0.01)),
+        ],
+        "default": 1,
+    },
+    "C14": {
+        "missing": np.nan,
+        "bands": [
+            (">=", 0.995, 5),
+            (">", 0.95, (1, 4, 0.95, 0.045)),
+        ],
+        "default": 1,
+    },
+    "C15": {
+        "missing": np.nan,
+        "bands": [
+            (">=", 0.995, 5),
+            (">", 0.895, (1, 4, 0.895, 0.10)),
+        ],
+        "default": 1,
+    },
+}
+
+_SO_SANH = {
+    ">=": np.greater_equal,
+    ">": np.greater,
+    "<=": np.less_equal,
+    "<": np.less,
+}
+
+
+def _diem_band(diem, kq):
+    if isinstance(diem, tuple):
+        base, he_so, moc, buoc = diem
+        return base + he_so * (kq - moc) / buoc
+    return diem
+
+
+def tinh_diem_bsc(chi_tieu, kq, chuan_hoa=False, missing=None):
+    """
+    Tính điểm BSC cho cả cột theo BSC_THRESHOLDS (np.select, không lặp từng dòng).
+
+    Args:
+        chi_tieu: Mã chỉ tiêu: C11_TP1, C11_TP2, C12_TP1, C12_TP2, C14, C15
+        kq: Series/array/list tỷ lệ (dạng thập phân, hoặc % nếu chuan_hoa=True)
+        chuan_hoa: True thì áp dụng chuan_hoa_ty_le() cho từng giá trị (>1 thì chia 100)
+        missing: Điểm cho giá trị thiếu; None = theo bảng ngưỡng
+
+    Returns:
+        Series float (giữ index, name nếu input là Series) hoặc numpy array
+    """
+    if chi_tieu not in BSC_THRESHOLDS:
+        raise ValueError(f"Chỉ tiêu không hợp lệ: {chi_tieu}")
+    quy_tac = BSC_THRESHOLDS[chi_tieu]
+
+    series = kq if isinstance(kq, pd.Series) else pd.Series(np.atleast_1d(np.asarray(kq, dtype=object)))
+    gia_tri = pd.to_numeric(series, errors="coerce").to_numpy(dtype=float, na_value=np.nan)
+    if chuan_hoa:
+        gia_tri = np.where(gia_tri > 1, gia_tri / 100, gia_tri)
+
+    thieu = np.isnan(gia_tri)
+    dieu_kien = [thieu]
+    lua_chon = [quy_tac["missing"] if missing is None else missing]
+    for toan_tu, nguong, diem in quy_tac["bands"]:
+        dieu_kien.append(_SO_SANH[toan_tu](gia_tri, nguong))
+        lua_chon.append(_diem_band(diem, gia_tri))
+    diem = np.select(dieu_kien, lua_chon, default=quy_tac["default"]).astype(float)
+
+    if isinstance(kq, pd.Series):
+        return pd.Series(diem, index=kq.index, name=kq.name)
+    return diem
+
+
 # ============================================================================
 # SELF-TEST
 # ============================================================================
@@ -269,6 +384,22 @@ if __name__ == "__main__":
     assert 1 < score < 5, f"C15(0.95) = {score}, expected between 1-5"
     print("[PASS] tinh_diem_C15")
 
+    # Test tinh_diem_bsc khớp từng bit với hàm scalar
+    ham_scalar = {
+        "C11_TP1": tinh_diem_C11_TP1, "C11_TP2": tinh_diem_C11_TP2,
+        "C12_TP1": tinh_diem_C12_TP1, "C12_TP2": tinh_diem_C12_TP2,
+        "C14": tinh_diem_C14, "C15": tinh_diem_C15,
+    }
+    luoi = pd.Series(np.concatenate([np.linspace(0, 1, 20001), [np.nan, 0.025, 0.04, 0.76, 0.79, 0.82]]))
+    for chi_tieu, ham in ham_scalar.items():
+        cu = luoi.apply(ham).astype(float).to_numpy()
+        moi = tinh_diem_bsc(chi_tieu, luoi).to_numpy()
+        assert np.array_equal(cu, moi, equal_nan=True), f"tinh_diem_bsc({chi_tieu}) lệch"
+        cu_pct = (luoi * 100).apply(lambda x: ham(chuan_hoa_ty_le(x))).astype(float).to_numpy()
+        moi_pct = tinh_diem_bsc(chi_tieu, luoi * 100, chuan_hoa=True).to_numpy()
+        assert np.array_equal(cu_pct, moi_pct, equal_nan=True), f"tinh_diem_bsc({chi_tieu}, chuan_hoa) lệch"
+    print("[PASS] tinh_diem_bsc")
+
     print("\n" + "=" * 60)
     print("ALL TESTS PASSED")
     print("=" * 60)
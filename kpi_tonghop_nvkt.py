@@ -64,6 +64,7 @@ import re
 import pandas as pd
 from openpyxl.styles import Alignment, Font, Border, Side, PatternFill
 from openpyxl.utils import get_column_letter
+from api_transition.excel_cache import read_excel
 
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 
@@ -130,7 +131,7 @@ def doc_c11() -> pd.DataFrame | None:
     """
     try:
         file_path = os.path.join(BASE_DIR, "KPI-DOWNLOAD", "c11-nvktdb report.xlsx")
-        df = pd.read_excel(file_path, sheet_name="c11 kpi nvkt")
+        df = read_excel(file_path, sheet_name="c11 kpi nvkt")
         df = df[df['NVKT'] != 'Tổng'].copy()
         df['nvkt'] = df['NVKT'].apply(chuan_hoa_ten)
         cols = df.columns.tolist()
@@ -166,7 +167,7 @@ def doc_c12() -> pd.DataFrame | None:
     """
     try:
         file_path = os.path.join(BASE_DIR, "KPI-DOWNLOAD", "c12-nvktdb report.xlsx")
-        df = pd.read_excel(file_path, sheet_name="c12 kpi nvkt")
+        df = read_excel(file_path, sheet_name="c12 kpi nvkt")
         df = df[df['NVKT'] != 'Tổng'].copy()
         df['nvkt'] = df['NVKT'].apply(chuan_hoa_ten)
         cols = df.columns.tolist()
@@ -203,7 +204,7 @@ def doc_c14() -> pd.DataFrame | None:
     """
     try:
         file_path = os.path.join(BASE_DIR, "downloads", "baocao_hanoi", "c1.4_chitiet_report.xlsx")
-        df = pd.read_excel(file_path, sheet_name="TH_HL_NVKT")
+        df = read_excel(file_path, sheet_name="TH_HL_NVKT")
         df['nvkt'] = df['NVKT'].apply(chuan_hoa_ten)
         # Gộp các dòng trùng tên
         df_agg = df.groupby('nvkt', as_index=False).agg({
@@ -239,7 +240,7 @@ def doc_c15() -> pd.DataFrame | None:
     """
     try:
         file_path = os.path.join(BASE_DIR, "downloads", "baocao_hanoi", "c1.5_chitiet_report.xlsx")
-        df = pd.read_excel(file_path, sheet_name="KQ_C15_chitiet")
+        df = read_excel(file_path, sheet_name="KQ_C15_chitiet")
         df['nvkt'] = df['NVKT'].apply(chuan_hoa_ten)
         result = pd.DataFrame({
             'nvkt': df['nvkt'],
@@ -270,7 +271,7 @@ def doc_kq_tiep_thi() -> pd.DataFrame | None:
         file_path = tim_file_moi_nhat("KQ-TIEP-THI", "kq_tiep_thi_*.xlsx")
         if not file_path:
             return None
-        df = pd.read_excel(file_path, sheet_name="kq_tiep_thi")
+        df = read_excel(file_path, sheet_name="kq_tiep_thi")
         df['nvkt'] = df['Tên NV'].apply(chuan_hoa_ten)
         # Gộp các dòng trùng tên (cùng NVKT có thể xuất hiện nhiều lần)
         df_agg = df.groupby('nvkt', as_index=False).agg({
@@ -305,7 +306,7 @@ def doc_ghtt() -> pd.DataFrame | None:
     """
     try:
         file_path = os.path.join(BASE_DIR, "GHTT", "tong_hop_ghtt_nvktdb.xlsx")
-        df = pd.read_excel(file_path, sheet_name="kq_nvktdb")
+        df = read_excel(file_path, sheet_name="kq_nvktdb")
         df['nvkt'] = df['NVKT'].apply(chuan_hoa_ten)
         result = pd.DataFrame({
             'nvkt': df['nvkt'],
@@ -338,7 +339,7 @@ def doc_fiber() -> pd.DataFrame | None:
         file_path = tim_file_moi_nhat("PTTB-PSC", "fiber_thuc_tang_*.xlsx")
         if not file_path:
             return None
-        df = pd.read_excel(file_path, sheet_name="thuc_tang_theo_NVKT")
+        df = read_excel(file_path, sheet_name="thuc_tang_theo_NVKT")
         df['nvkt'] = df['NVKT'].apply(chuan_hoa_ten)
         result = pd.DataFrame({
             'nvkt': df['nvkt'],
@@ -368,7 +369,7 @@ def doc_mytv() -> pd.DataFrame | None:
         file_path = tim_file_moi_nhat("PTTB-PSC", "mytv_thuc_tang_*.xlsx")
         if not file_path:
             return None
-        df = pd.read_excel(file_path, sheet_name="thuc_tang_theo_NVKT")
+        df = read_excel(file_path, sheet_name="thuc_tang_theo_NVKT")
         df['nvkt'] = df['NVKT'].apply(chuan_hoa_ten)
         result = pd.DataFrame({
             'nvkt': df['nvkt'],
@@ -397,7 +398,7 @@ def doc_i15() -> pd.DataFrame | None:
     """
     try:
         file_path = os.path.join(BASE_DIR, "downloads", "baocao_hanoi", "I1.5 report.xlsx")
-        df = pd.read_excel(file_path, sheet_name="TH_SHC_I15")
+        df = read_excel(file_path, sheet_name="TH_SHC_I15")
         df['nvkt'] = df['NVKT_DB'].apply(chuan_hoa_ten)
         result = pd.DataFrame({
             'nvkt': df['nvkt'],
@@ -467,7 +468,7 @@ def tong_hop_kpi_nvkt() -> pd.DataFrame | None:
     # 1. Đọc master list
     print("\n[1/3] Đọc danh sách NVKT từ dsnv.xlsx...")
     dsnv_path = os.path.join(BASE_DIR, "dsnv.xlsx")
-    df_dsnv = pd.read_excel(dsnv_path)
+    df_dsnv = read_excel(dsnv_path)
     df_master = df_dsnv[['Họ tên', 'đơn vị']].copy()
     df_master.columns = ['nvkt', 'don_vi']
     df_master['nvkt'] = df_master['nvkt'].apply(chuan_hoa_ten)
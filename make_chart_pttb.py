@@ -6,6 +6,8 @@ from datetime import datetime
 from team_config import get_id_to_shortname_mapping
 import glob
 
+from api_transition.chart_cache import chart_key, is_chart_current, mark_chart_current
+
 
 
 def make_chart_pttb_thuc_tang_fiber():
@@ -69,6 +71,13 @@ def make_chart_pttb_thuc_tang_fiber():
     x = np.arange(len(labels))
     width = 0.25  # Độ rộng mỗi cột
 
+    # Bỏ qua nếu dữ liệu (và code vẽ) không đổi so với lần vẽ trước
+    chart_path = os.path.join(chart_folder, "thuc_tang_fiber_pttb.png")
+    data_key = chart_key("make_chart_pttb_thuc_tang_fiber", make_chart_pttb_thuc_tang_fiber, df, file_time)
+    if is_chart_current(chart_path, data_key):
+        print(f"Dữ liệu không đổi, giữ biểu đồ: {chart_path}")
+        return
+
     plt.figure(figsize=(14, 7))
 
     # Vẽ 3 nhóm cột với tổng trong legend
@@ -107,9 +116,9 @@ def make_chart_pttb_thuc_tang_fiber():
 
     # Lưu biểu đồ
     plt.tight_layout()
-    chart_path = os.path.join(chart_folder, "thuc_tang_fiber_pttb.png")
     plt.savefig(chart_path, dpi=300, bbox_inches='tight')
     plt.close()
+    mark_chart_current(chart_path, data_key)
     print(f"Biểu đồ đã được lưu tại: {chart_path}")
 
 
@@ -174,6 +183,13 @@ def make_chart_pttb_mytv_thuc_tang():
     x = np.arange(len(labels))
     width = 0.25  # Độ rộng mỗi cột
 
+    # Bỏ qua nếu dữ liệu (và code vẽ) không đổi so với lần vẽ trước
+    chart_path = os.path.join(chart_folder, "thuc_tang_mytv_pttb.png")
+    data_key = chart_key("make_chart_pttb_mytv_thuc_tang", make_chart_pttb_mytv_thuc_tang, df, file_time)
+    if is_chart_current(chart_path, data_key):
+        print(f"Dữ liệu không đổi, giữ biểu đồ: {chart_path}")
+        return
+
     plt.figure(figsize=(14, 7))
 
     # Vẽ 3 nhóm cột với tổng trong legend
@@ -212,9 +228,9 @@ def make_chart_pttb_mytv_thuc_tang():
 
     # Lưu biểu đồ
     plt.tight_layout()
-    chart_path = os.path.join(chart_folder, "thuc_tang_mytv_pttb.png")
     plt.savefig(chart_path, dpi=300, bbox_inches='tight')
     plt.close()
+    mark_chart_current(chart_path, data_key)
     print(f"Biểu đồ đã được lưu tại: {chart_path}")
 
 
@@ -286,6 +302,14 @@ def make_chart_pttb_thuc_tang_nvkt():
     width = 0.25  # Độ rộng mỗi cột
 
     fig_width = max(16, len(labels) * 0.5)  # Tự động điều chỉnh độ rộng
+
+    # Bỏ qua nếu dữ liệu (và code vẽ) không đổi so với lần vẽ trước
+    chart_path = os.path.join(chart_folder, "fiber_thuctang_nvkt.png")
+    data_key = chart_key("make_chart_pttb_thuc_tang_nvkt", make_chart_pttb_thuc_tang_nvkt, df, file_time)
+    if is_chart_current(chart_path, data_key):
+        print(f"Dữ liệu không đổi, giữ biểu đồ: {chart_path}")
+        return
+
     plt.figure(figsize=(fig_width, 8))
 
     # Vẽ 3 nhóm cột với tổng trong legend
@@ -324,9 +348,9 @@ def make_chart_pttb_thuc_tang_nvkt():
 
     # Lưu biểu đồ
     plt.tight_layout()
-    chart_path = os.path.join(chart_folder, "fiber_thuctang_nvkt.png")
     plt.savefig(chart_path, dpi=300, bbox_inches='tight')
     plt.close()
+    mark_chart_current(chart_path, data_key)
     print(f"Biểu đồ đã được lưu tại: {chart_path}")
 
 
@@ -398,6 +422,14 @@ def make_chart_mytv_thuc_tang_nvkt():
     width = 0.25  # Độ rộng mỗi cột
 
     fig_width = max(16, len(labels) * 0.5)  # Tự động điều chỉnh độ rộng
+
+    # Bỏ qua nếu dữ liệu (và code vẽ) không đổi so với lần vẽ trước
+    chart_path = os.path.join(chart_folder, "mytv_thuctang_nvkt.png")
+    data_key = chart_key("make_chart_mytv_thuc_tang_nvkt", make_chart_mytv_thuc_tang_nvkt, df, file_time)
+    if is_chart_current(chart_path, data_key):
+        print(f"Dữ liệu không đổi, giữ biểu đồ: {chart_path}")
+        return
+
     plt.figure(figsize=(fig_width, 8))
 
     # Vẽ 3 nhóm cột với tổng trong legend
@@ -436,9 +468,9 @@ def make_chart_mytv_thuc_tang_nvkt():
 
     # Lưu biểu đồ
     plt.tight_layout()
-    chart_path = os.path.join(chart_folder, "mytv_thuctang_nvkt.png")
     plt.savefig(chart_path, dpi=300, bbox_inches='tight')
     plt.close()
+    mark_chart_current(chart_path, data_key)
     print(f"Biểu đồ đã được lưu tại: {chart_path}")
 
 
@@ -20,9 +20,11 @@ from docx.enum.table import WD_TABLE_ALIGNMENT
 from docx.enum.style import WD_STYLE_TYPE
 from docx.oxml.ns import qn
 from docx.oxml import OxmlElement
-import io
 import os
 
+from api_transition.excel_cache import read_excel
+from api_transition.chart_cache import cached_chart, chart_figure, prune_stale_charts, save_chart
+
 # Thiết lập matplotlib để hỗ trợ tiếng Việt
 matplotlib.rcParams['font.family'] = 'DejaVu Sans'
 matplotlib.use('Agg')  # Use non-interactive backend
@@ -99,11 +101,11 @@ def load_kpi_data(kpi_folder=DEFAULT_KPI_FOLDER):
     
     # Đọc file tóm tắt
     summary_file = kpi_path / "KPI_NVKT_TomTat.xlsx"
-    df_summary = pd.read_excel(summary_file)
+    df_summary = read_excel(summary_file)
     
     # Đọc file chi tiết
     detail_file = kpi_path / "KPI_NVKT_ChiTiet.xlsx"
-    df_detail = pd.read_excel(detail_file)
+    df_detail = read_excel(detail_file)
     
     return df_summary, df_detail
 
@@ -122,7 +124,7 @@ def load_c1x_reports(data_folder="downloads/baocao_hanoi"):
     try:
         c11_file = data_path / "c1.1 report.xlsx"
         if c11_file.exists():
-            reports['c11'] = pd.read_excel(c11_file, sheet_name='TH_C1.1')
+            reports['c11'] = read_excel(c11_file, sheet_name='TH_C1.1')
             print("   ✅ Đọc C1.1 report thành công")
     except Exception as e:
         print(f"   ⚠️ Không thể đọc C1.1 report: {e}")
@@ -131,7 +133,7 @@ def load_c1x_reports(data_folder="downloads/baocao_hanoi"):
     try:
         c12_file = data_path / "c1.2 report.xlsx"
         if c12_file.exists():
-            reports['c12'] = pd.read_excel(c12_file, sheet_name='TH_C1.2')
+            reports['c12'] = read_excel(c12_file, sheet_name='TH_C1.2')
             print("   ✅ Đọc C1.2 report thành công")
     except Exception as e:
         print(f"   ⚠️ Không thể đọc C1.2 report: {e}")
@@ -140,7 +142,7 @@ def load_c1x_reports(data_folder="downloads/baocao_hanoi"):
     try:
         c13_file = data_path / "c1.3 report.xlsx"
         if c13_file.exists():
-            reports['c13'] = pd.read_excel(c13_file, sheet_name='TH_C1.3')
+            reports['c13'] = read_excel(c13_file, sheet_name='TH_C1.3')
             print("   ✅ Đọc C1.3 report thành công")
     except Exception as e:
         print(f"   ⚠️ Không thể đọc C1.3 report: {e}")
@@ -149,7 +151,7 @@ def load_c1x_reports(data_folder="downloads/baocao_hanoi"):
     try:
         c14_file = data_path / "c1.4 report.xlsx"
         if c14_file.exists():
-            reports['c14'] = pd.read_excel(c14_file, sheet_name='TH_C1.4')
+            reports['c14'] = read_excel(c14_file, sheet_name='TH_C1.4')
             print("   ✅ Đọc C1.4 report thành công")
     except Exception as e:
         print(f"   ⚠️ Không thể đọc C1.4 report: {e}")
@@ -158,7 +160,7 @@ def load_c1x_reports(data_folder="downloads/baocao_hanoi"):
     try:
         c15_file = data_path / "c1.5_chitiet_report.xlsx"
         if c15_file.exists():
-            reports['c15_ttvtst'] = pd.read_excel(c15_file, sheet_name='TH_TTVTST')
+            reports['c15_ttvtst'] = read_excel(c15_file, sheet_name='TH_TTVTST')
             print("   ✅ Đọc C1.5 report (TH_TTVTST) thành công")
     except Exception as e:
         print(f"   ⚠️ Không thể đọc C1.5 report: {e}")
@@ -195,8 +197,8 @@ def load_exclusion_comparison_data(exclusion_folder="downloads/kq_sau_giam_tru")
         c11_sm4_file = data_path / "So_sanh_C11_SM4.xlsx"
         if c11_sm4_file.exists():
             comparison_data['c11_sm4'] = {
-                'chi_tiet': pd.read_excel(c11_sm4_file, sheet_name='So_sanh_chi_tiet'),
-                'tong_hop': pd.read_excel(c11_sm4_file, sheet_name='Thong_ke_tong_hop')
+                'chi_tiet': read_excel(c11_sm4_file, sheet_name='So_sanh_chi_tiet'),
+                'tong_hop': read_excel(c11_sm4_file, sheet_name='Thong_ke_tong_hop')
             }
             print("   ✅ Đọc So_sanh_C11_SM4.xlsx thành công")
     except Exception as e:
@@ -207,8 +209,8 @@ def load_exclusion_comparison_data(exclusion_folder="downloads/kq_sau_giam_tru")
         c11_sm2_file = data_path / "So_sanh_C11_SM2.xlsx"
         if c11_sm2_file.exists():
             comparison_data['c11_sm2'] = {
-                'chi_tiet': pd.read_excel(c11_sm2_file, sheet_name='So_sanh_chi_tiet'),
-                'tong_hop': pd.read_excel(c11_sm2_file, sheet_name='Thong_ke_tong_hop')
+                'chi_tiet': read_excel(c11_sm2_file, sheet_name='So_sanh_chi_tiet'),
+                'tong_hop': read_excel(c11_sm2_file, sheet_name='Thong_ke_tong_hop')
             }
             print("   ✅ Đọc So_sanh_C11_SM2.xlsx thành công")
     except Exception as e:
@@ -219,8 +221,8 @@ def load_exclusion_comparison_data(exclusion_folder="downloads/kq_sau_giam_tru")
         c12_sm1_file = data_path / "So_sanh_C12_SM1.xlsx"
         if c12_sm1_file.exists():
             comparison_data['c12_sm1'] = {
-                'chi_tiet': pd.read_excel(c12_sm1_file, sheet_name='So_sanh_chi_tiet'),
-                'tong_hop': pd.read_excel(c12_sm1_file, sheet_name='Thong_ke_tong_hop')
+                'chi_tiet': read_excel(c12_sm1_file, sheet_name='So_sanh_chi_tiet'),
+                'tong_hop': read_excel(c12_sm1_file, sheet_name='Thong_ke_tong_hop')
             }
             print("   ✅ Đọc So_sanh_C12_SM1.xlsx thành công")
     except Exception as e:
@@ -231,8 +233,8 @@ def load_exclusion_comparison_data(exclusion_folder="downloads/kq_sau_giam_tru")
         c12_sm4_file = data_path / "SM4-C12-ti-le-su-co-dv-brcd.xlsx"
         if c12_sm4_file.exists():
             comparison_data['c12_sm4'] = {
-                'chi_tiet': pd.read_excel(c12_sm4_file, sheet_name='So_sanh_chi_tiet'),
-                'tong_hop': pd.read_excel(c12_sm4_file, sheet_name='Thong_ke_tong_hop')
+                'chi_tiet': read_excel(c12_sm4_file, sheet_name='So_sanh_chi_tiet'),
+                'tong_hop': read_excel(c12_sm4_file, sheet_name='Thong_ke_tong_hop')
             }
             print("   ✅ Đọc SM4-C12-ti-le-su-co-dv-brcd.xlsx thành công")
     except Exception as e:
@@ -243,8 +245,8 @@ def load_exclusion_comparison_data(exclusion_folder="downloads/kq_sau_giam_tru")
         c14_file = data_path / "So_sanh_C14.xlsx"
         if c14_file.exists():
             comparison_data['c14'] = {
-                'chi_tiet': pd.read_excel(c14_file, sheet_name='So_sanh_chi_tiet'),
-                'tong_hop': pd.read_excel(c14_file, sheet_name='Thong_ke_tong_hop')
+                'chi_tiet': read_excel(c14_file, sheet_name='So_sanh_chi_tiet'),
+                'tong_hop': read_excel(c14_file, sheet_name='Thong_ke_tong_hop')
             }
             print("   ✅ Đọc So_sanh_C14.xlsx thành công")
     except Exception as e:
@@ -256,8 +258,8 @@ def load_exclusion_comparison_data(exclusion_folder="downloads/kq_sau_giam_tru")
         c15_file = data_path / "So_sanh_C15.xlsx"
         if c15_file.exists():
             comparison_data['c15'] = {
-                'chi_tiet': pd.read_excel(c15_file, sheet_name='So_sanh_chi_tiet'),
-                'tong_hop': pd.read_excel(c15_file, sheet_name='Thong_ke_tong_hop')
+                'chi_tiet': read_excel(c15_file, sheet_name='So_sanh_chi_tiet'),
+                'tong_hop': read_excel(c15_file, sheet_name='Thong_ke_tong_hop')
             }
             print("   ✅ Đọc So_sanh_C15.xlsx thành công")
     except Exception as e:
@@ -267,7 +269,7 @@ def load_exclusion_comparison_data(exclusion_folder="downloads/kq_sau_giam_tru")
     try:
         tong_hop_file = data_path / "Tong_hop_giam_tru.xlsx"
         if tong_hop_file.exists():
-            comparison_data['tong_hop'] = pd.read_excel(tong_hop_file)
+            comparison_data['tong_hop'] = read_excel(tong_hop_file)
             print("   ✅ Đọc Tong_hop_giam_tru.xlsx thành công")
     except Exception as e:
         print(f"   ⚠️ Không thể đọc Tong_hop_giam_tru.xlsx: {e}")
@@ -293,7 +295,7 @@ def load_unit_level_exclusion_data(exclusion_folder="downloads/kq_sau_giam_tru")
     try:
         c11_sm4_file = data_path / "So_sanh_C11_SM4.xlsx"
         if c11_sm4_file.exists():
-            unit_data['c11_sm4'] = pd.read_excel(c11_sm4_file, sheet_name='Thong_ke_theo_don_vi')
+            unit_data['c11_sm4'] = read_excel(c11_sm4_file, sheet_name='Thong_ke_theo_don_vi')
             print("   ✅ Đọc unit stats C1.1 SM4 thành công")
     except Exception as e:
         print(f"   ⚠️ Không thể đọc unit stats C1.1 SM4: {e}")
@@ -302,7 +304,7 @@ def load_unit_level_exclusion_data(exclusion_folder="downloads/kq_sau_giam_tru")
     try:
         c11_sm2_file = data_path / "So_sanh_C11_SM2.xlsx"
         if c11_sm2_file.exists():
-            unit_data['c11_sm2'] = pd.read_excel(c11_sm2_file, sheet_name='Thong_ke_theo_don_vi')
+            unit_data['c11_sm2'] = read_excel(c11_sm2_file, sheet_name='Thong_ke_theo_don_vi')
             print("   ✅ Đọc unit stats C1.1 SM2 thành công")
     except Exception as e:
         print(f"   ⚠️ Không thể đọc unit stats C1.1 SM2: {e}")
@@ -311,7 +313,7 @@ def load_unit_level_exclusion_data(exclusion_folder="downloads/kq_sau_giam_tru")
     try:
         c12_sm1_file = data_path / "So_sanh_C12_SM1.xlsx"
         if c12_sm1_file.exists():
-            unit_data['c12_sm1'] = pd.read_excel(c12_sm1_file, sheet_name='Thong_ke_theo_don_vi')
+            unit_data['c12_sm1'] = read_excel(c12_sm1_file, sheet_name='Thong_ke_theo_don_vi')
             print("   ✅ Đọc unit stats C1.2 SM1 thành công")
     except Exception as e:
         print(f"   ⚠️ Không thể đọc unit stats C1.2 SM1: {e}")
@@ -321,7 +323,7 @@ def load_unit_level_exclusion_data(exclusion_folder="downloads/kq_sau_giam_tru")
     try:
         c12_sm4_file = data_path / "SM4-C12-ti-le-su-co-dv-brcd.xlsx"
         if c12_sm4_file.exists():
-            unit_data['c12_sm4'] = pd.read_excel(c12_sm4_file, sheet_name='Thong_ke_theo_don_vi')
+            unit_data['c12_sm4'] = read_excel(c12_sm4_file, sheet_name='Thong_ke_theo_don_vi')
             print("   ✅ Đọc unit stats C1.2 SM4 thành công")
     except Exception as e:
         print(f"   ⚠️ Không thể đọc unit stats C1.2 SM4: {e}")
@@ -330,7 +332,7 @@ def load_unit_level_exclusion_data(exclusion_folder="downloads/kq_sau_giam_tru")
     try:
         c14_file = data_path / "So_sanh_C14.xlsx"
         if c14_file.exists():
-            unit_data['c14'] = pd.read_excel(c14_file, sheet_name='Thong_ke_theo_don_vi')
+            unit_data['c14'] = read_excel(c14_file, sheet_name='Thong_ke_theo_don_vi')
             print("   ✅ Đọc unit stats C1.4 thành công")
     except Exception as e:
         print(f"   ⚠️ Không thể đọc unit stats C1.4: {e}")
@@ -339,7 +341,7 @@ def load_unit_level_exclusion_data(exclusion_folder="downloads/kq_sau_giam_tru")
     try:
         c15_file = data_path / "So_sanh_C15.xlsx"
         if c15_file.exists():
-            unit_data['c15'] = pd.read_excel(c15_file, sheet_name='Thong_ke_theo_don_vi')
+            unit_data['c15'] = read_excel(c15_file, sheet_name='Thong_ke_theo_don_vi')
             print("   ✅ Đọc unit stats C1.5 thành công")
     except Exception as e:
         print(f"   ⚠️ Không thể đọc unit stats C1.5: {e}")
@@ -367,13 +369,13 @@ def load_bsc_unit_scores_from_comparison(exclusion_folder="downloads/kq_sau_giam
         return result
     
     try:
-        result['units'] = pd.read_excel(file_path, sheet_name='Tong_hop_Don_vi')
+        result['units'] = read_excel(file_path, sheet_name='Tong_hop_Don_vi')
         print(f"   ✅ Đọc điểm BSC đơn vị từ Tong_hop_Diem_BSC_Don_Vi.xlsx: {len(result['units'])} dòng")
     except Exception as e:
         print(f"   ⚠️ Không thể đọc sheet Tong_hop_Don_vi: {e}")
     
     try:
-        result['individuals'] = pd.read_excel(file_path, sheet_name='Chi_tiet_Ca_nhan')
+        result['individuals'] = read_excel(file_path, sheet_name='Chi_tiet_Ca_nhan')
         print(f"   ✅ Đọc điểm BSC cá nhân từ Tong_hop_Diem_BSC_Don_Vi.xlsx: {len(result['individuals'])} dòng")
     except Exception as e:
         print(f"   ⚠️ Không thể đọc sheet Chi_tiet_Ca_nhan: {e}")
@@ -503,7 +505,7 @@ def load_nvkt_raw_detail(exclusion_folder="downloads/kq_sau_giam_tru"):
         try:
             f_path = data_path / filename
             if f_path.exists():
-                df = pd.read_excel(f_path, sheet_name=sheet)
+                df = read_excel(f_path, sheet_name=sheet)
                 if 'NVKT' in df.columns:
                     # Chuẩn hóa tên NVKT về Title Case để tránh trùng lặp
                     df['NVKT'] = df['NVKT'].apply(chuan_hoa_ten_nvkt)
@@ -651,7 +653,7 @@ def load_nvkt_exclusion_detail(exclusion_folder="downloads/kq_sau_giam_tru"):
             # Đọc file, bỏ qua dòng tiêu đề phụ nếu có (thường header=0 là đủ nếu cột nằm ở dòng 1)
             f_path = data_path / filename
             if f_path.exists():
-                df = pd.read_excel(f_path, sheet_name=sheet)
+                df = read_excel(f_path, sheet_name=sheet)
                 # Chuẩn hóa tên cột NVKT và TEN_DOI
                 if 'Mã nhân viên' in df.columns:
                     df.rename(columns={'Mã nhân viên': 'NVKT'}, inplace=True)
@@ -1048,6 +1050,7 @@ def add_c15_detail_table_after_exclusion(doc, df_exclusion_detail, team_name):
                 set_cell_shading(cells[i], 'EDE7F6')  # Tím nhạt
 
 
+@cached_chart
 def create_nvkt_bar_chart_after_exclusion(df_exclusion, team_name, output_path=None):
     """
     Tạo biểu đồ cột so sánh điểm KPI sau giảm trừ theo NVKT trong 1 tổ
@@ -1082,7 +1085,7 @@ def create_nvkt_bar_chart_after_exclusion(df_exclusion, team_name, output_path=N
     c15 = df['Diem_C1.5'].fillna(0).tolist()
 
     # Tạo biểu đồ
-    fig, ax = plt.subplots(figsize=(12, 6))
+    fig, ax = chart_figure((12, 6))
 
     x = np.arange(len(nvkts))
     width = 0.2
@@ -1113,20 +1116,10 @@ def create_nvkt_bar_chart_after_exclusion(df_exclusion, team_name, output_path=N
     ax.legend(loc='upper right')
     ax.grid(axis='y', linestyle='--', alpha=0.7)
     
-    plt.tight_layout()
-    
-    if output_path:
-        plt.savefig(output_path, dpi=150, bbox_inches='tight')
-        plt.close()
-        return output_path
-    else:
-        buf = io.BytesIO()
-        plt.savefig(buf, format='png', dpi=150, bbox_inches='tight')
-        plt.close()
-        buf.seek(0)
-        return buf
+    return save_chart(fig, output_path)
 
 
+@cached_chart
 def create_unit_comparison_chart(unit_data, chi_tieu='c11_sm4', output_path=None):
     """
     Tạo biểu đồ grouped bar so sánh tỷ lệ trước/sau GT theo đơn vị
@@ -1153,7 +1146,7 @@ def create_unit_comparison_chart(unit_data, chi_tieu='c11_sm4', output_path=None
     if not tyle_tho_col or not tyle_sau_col:
         return None
     
-    fig, ax = plt.subplots(figsize=(12, 6))
+    fig, ax = chart_figure((12, 6))
     
     x = np.arange(len(df))
     width = 0.35
@@ -1190,18 +1183,7 @@ def create_unit_comparison_chart(unit_data, chi_tieu='c11_sm4', output_path=None
     ax.legend(loc='upper right')
     ax.grid(axis='y', linestyle='--', alpha=0.5)
     
-    plt.tight_layout()
-    
-    if output_path:
-        plt.savefig(output_path, dpi=150, bbox_inches='tight')
-        plt.close()
-        return output_path
-    else:
-        buf = io.BytesIO()
-        plt.savefig(buf, format='png', dpi=150, bbox_inches='tight')
-        plt.close()
-        buf.seek(0)
-        return buf
+    return save_chart(fig, output_path)
 
 
 def add_unit_exclusion_table(doc, unit_data, chi_tieu='c11_sm4'):
@@ -1341,6 +1323,7 @@ def add_unit_level_exclusion_section(doc, unit_data, c1x_reports=None):
         doc.add_paragraph()
 
 
+@cached_chart
 def create_comparison_bar_chart(comparison_data, output_path=None):
     """
     Tạo biểu đồ grouped bar so sánh tỷ lệ trước/sau giảm trừ
@@ -1360,7 +1343,7 @@ def create_comparison_bar_chart(comparison_data, output_path=None):
     # Sắp xếp theo thứ tự
     chi_tieu_order = ['C1.1 SM4', 'C1.1 SM2', 'C1.2', 'C1.2 Tỷ lệ BRCĐ báo hỏng', 'C1.4 Độ hài lòng KH']
     
-    fig, ax = plt.subplots(figsize=(12, 6))
+    fig, ax = chart_figure((12, 6))
     
     x = np.arange(len(df))
     width = 0.35
@@ -1390,18 +1373,7 @@ def create_comparison_bar_chart(comparison_data, output_path=None):
     ax.legend(loc='upper right')
     ax.grid(axis='y', linestyle='--', alpha=0.5)
     
-    plt.tight_layout()
-    
-    if output_path:
-        plt.savefig(output_path, dpi=150, bbox_inches='tight')
-        plt.close()
-        return output_path
-    else:
-        buf = io.BytesIO()
-        plt.savefig(buf, format='png', dpi=150, bbox_inches='tight')
-        plt.close()
-        buf.seek(0)
-        return buf
+    return save_chart(fig, output_path)
 
 
 def add_exclusion_summary_table(doc, comparison_data):
@@ -2482,6 +2454,7 @@ def add_c14_exclusion_table(doc, comparison_data):
     doc.add_paragraph()
 
 
+@cached_chart
 def create_exclusion_bar_chart(comparison_data, output_path=None):
     """
     Tạo biểu đồ bar riêng cho dữ liệu sau giảm trừ
@@ -2491,7 +2464,7 @@ def create_exclusion_bar_chart(comparison_data, output_path=None):
     
     df = comparison_data['tong_hop']
     
-    fig, ax = plt.subplots(figsize=(12, 6))
+    fig, ax = chart_figure((12, 6))
     
     x = np.arange(len(df))
     
@@ -2523,18 +2496,7 @@ def create_exclusion_bar_chart(comparison_data, output_path=None):
     ax.grid(axis='y', linestyle='--', alpha=0.5)
     ax.set_ylim(0, max(tyle_sau) * 1.15 if len(tyle_sau) > 0 else 100)
     
-    plt.tight_layout()
-    
-    if output_path:
-        plt.savefig(output_path, dpi=150, bbox_inches='tight')
-        plt.close()
-        return output_path
-    else:
-        buf = io.BytesIO()
-        plt.savefig(buf, format='png', dpi=150, bbox_inches='tight')
-        plt.close()
-        buf.seek(0)
-        return buf
+    return save_chart(fig, output_path)
 
 
 def add_c1x_overview_table(doc, c1x_reports, comparison_data=None, unit_data=None, exclusion_folder="downloads/kq_sau_giam_tru"):
@@ -2947,6 +2909,7 @@ def add_c1x_overview_table(doc, c1x_reports, comparison_data=None, unit_data=Non
 # =============================================================================
 # HÀM TẠO BIỂU ĐỒ
 # =============================================================================
+@cached_chart
 def create_team_comparison_chart(c1x_reports, output_path=None, bsc_data=None):
     """
     Tạo biểu đồ so sánh điểm BSC thực tế giữa 4 tổ
@@ -3056,7 +3019,7 @@ def create_team_comparison_chart(c1x_reports, output_path=None, bsc_data=None):
     chart_data = chart_data.reindex(teams_order)  # Đảm bảo thứ tự
     
     # Tạo biểu đồ
-    fig, ax = plt.subplots(figsize=(14, 6))
+    fig, ax = chart_figure((14, 6))
     
     x = np.arange(len(teams_order))
     width = 0.15  # Thu hẹp để có chỗ cho 5 cột
@@ -3081,21 +3044,10 @@ def create_team_comparison_chart(c1x_reports, output_path=None, bsc_data=None):
     ax.legend(loc='upper right')
     ax.grid(axis='y', linestyle='--', alpha=0.7)
     
-    plt.tight_layout()
-    
-    # Lưu hoặc trả về bytes
-    if output_path:
-        plt.savefig(output_path, dpi=150, bbox_inches='tight')
-        plt.close()
-        return output_path
-    else:
-        buf = io.BytesIO()
-        plt.savefig(buf, format='png', dpi=150, bbox_inches='tight')
-        plt.close()
-        buf.seek(0)
-        return buf
+    return save_chart(fig, output_path)
 
 
+@cached_chart
 def create_team_bsc_after_exclusion_chart(unit_data, c1x_reports=None, output_path=None, bsc_data=None):
     """
     Tạo biểu đồ so sánh điểm BSC SAU GIẢM TRỪ giữa 4 tổ
@@ -3155,7 +3107,7 @@ def create_team_bsc_after_exclusion_chart(unit_data, c1x_reports=None, output_pa
         chart_data = pd.DataFrame(bsc_scores).T
         chart_data = chart_data.reindex(teams_order)
         
-        fig, ax = plt.subplots(figsize=(14, 6))
+        fig, ax = chart_figure((14, 6))
         x = np.arange(len(teams_order))
         width = 0.15
         metrics = ['C1.1', 'C1.2', 'C1.3', 'C1.4', 'C1.5']
@@ -3176,18 +3128,7 @@ def create_team_bsc_after_exclusion_chart(unit_data, c1x_reports=None, output_pa
         ax.set_ylim(0, 6)
         ax.legend(loc='upper right')
         ax.grid(axis='y', linestyle='--', alpha=0.7)
-        plt.tight_layout()
-        
-        if output_path:
-            plt.savefig(output_path, dpi=150, bbox_inches='tight')
-            plt.close()
-            return output_path
-        else:
-            buf = io.BytesIO()
-            plt.savefig(buf, format='png', dpi=150, bbox_inches='tight')
-            plt.close()
-            buf.seek(0)
-            return buf
+        return save_chart(fig, output_path)
     
     # FALLBACK: Tính từ unit_data (cách cũ) - chỉ chạy nếu không có bsc_data
     # ================================================================
@@ -3381,7 +3322,7 @@ def create_team_bsc_after_exclusion_chart(unit_data, c1x_reports=None, output_pa
     chart_data = chart_data.reindex(teams_order)
     
     # Tạo biểu đồ
-    fig, ax = plt.subplots(figsize=(14, 6))
+    fig, ax = chart_figure((14, 6))
     
     x = np.arange(len(teams_order))
     width = 0.15
@@ -3405,19 +3346,9 @@ def create_team_bsc_after_exclusion_chart(unit_data, c1x_reports=None, output_pa
     ax.legend(loc='upper right')
     ax.grid(axis='y', linestyle='--', alpha=0.7)
     
-    plt.tight_layout()
-    
-    if output_path:
-        plt.savefig(output_path, dpi=150, bbox_inches='tight')
-        plt.close()
-        return output_path
-    else:
-        buf = io.BytesIO()
-        plt.savefig(buf, format='png', dpi=150, bbox_inches='tight')
-        plt.close()
-        buf.seek(0)
-        return buf
+    return save_chart(fig, output_path)
 
+@cached_chart
 def create_nvkt_bar_chart(df_summary, team_name, output_path=None):
     """
     Tạo biểu đồ cột so sánh điểm KPI theo NVKT trong 1 tổ
@@ -3440,7 +3371,7 @@ def create_nvkt_bar_chart(df_summary, team_name, output_path=None):
     df_team = df_team.sort_values('nvkt')
     
     # Tạo biểu đồ
-    fig, ax = plt.subplots(figsize=(14, 6))
+    fig, ax = chart_figure((14, 6))
     
     x = np.arange(len(df_team))
     width = 0.2
@@ -3467,18 +3398,7 @@ def create_nvkt_bar_chart(df_summary, team_name, output_path=None):
     ax.legend(loc='upper right')
     ax.grid(axis='y', linestyle='--', alpha=0.7)
     
-    plt.tight_layout()
-    
-    if output_path:
-        plt.savefig(output_path, dpi=150, bbox_inches='tight')
-        plt.close()
-        return output_path
-    else:
-        buf = io.BytesIO()
-        plt.savefig(buf, format='png', dpi=150, bbox_inches='tight')
-        plt.close()
-        buf.seek(0)
-        return buf
+    return save_chart(fig, output_path)
 
 
 # =============================================================================
@@ -3805,7 +3725,7 @@ def load_shc_summary_by_unit(data_folder="downloads/baocao_hanoi"):
     latest_file = max(files, key=os.path.getmtime)
     
     try:
-        df = pd.read_excel(latest_file, sheet_name='Xu_huong_theo_don_vi')
+        df = read_excel(latest_file, sheet_name='Xu_huong_theo_don_vi')
         
         # Cột đầu tiên là Đơn vị, các cột còn lại là ngày
         date_columns = [col for col in df.columns if col != 'Đơn vị']
@@ -3841,7 +3761,7 @@ def load_shc_by_nvkt_for_unit(unit_name, data_folder="downloads/baocao_hanoi"):
     latest_file = max(files, key=os.path.getmtime)
     
     try:
-        df = pd.read_excel(latest_file, sheet_name='Xu_huong_theo_NVKT')
+        df = read_excel(latest_file, sheet_name='Xu_huong_theo_NVKT')
         
         # Lọc theo đơn vị
         df_unit = df[df['Đơn vị'] == unit_name]
@@ -3869,6 +3789,7 @@ def load_shc_by_nvkt_for_unit(unit_name, data_folder="downloads/baocao_hanoi"):
         return None
 
 
+@cached_chart
 def create_nvkt_shc_grouped_chart(nvkt_data, unit_name, output_path=None):
     """
     Tạo biểu đồ nhóm cột SHC theo NVKT, mỗi ngày 1 màu khác nhau
@@ -3884,7 +3805,7 @@ def create_nvkt_shc_grouped_chart(nvkt_data, unit_name, output_path=None):
     nvkt_labels = nvkt_list
     
     # Setup figure
-    fig, ax = plt.subplots(figsize=(14, 6))
+    fig, ax = chart_figure((14, 6))
     
     x = np.arange(len(nvkt_list))
     n_dates = len(dates)
@@ -3919,20 +3840,10 @@ def create_nvkt_shc_grouped_chart(nvkt_data, unit_name, output_path=None):
     ax.grid(axis='y', alpha=0.3, linestyle='--')
     ax.set_axisbelow(True)
     
-    plt.tight_layout()
-    
-    if output_path:
-        plt.savefig(output_path, dpi=150, bbox_inches='tight')
-        plt.close()
-        return output_path
-    else:
-        buf = io.BytesIO()
-        plt.savefig(buf, format='png', dpi=150, bbox_inches='tight')
-        plt.close()
-        buf.seek(0)
-        return buf
+    return save_chart(fig, output_path)
 
 
+@cached_chart
 def create_shc_overview_chart(shc_data, output_path=None):
     """
     Tạo biểu đồ tổng hợp SHC theo ngày cho tất cả đơn vị (stacked bar)
@@ -3943,7 +3854,7 @@ def create_shc_overview_chart(shc_data, output_path=None):
     dates = [str(d) for d in shc_data['dates']]
     units = shc_data['units']
     
-    fig, ax = plt.subplots(figsize=(12, 6))
+    fig, ax = chart_figure((12, 6))
     
     x = np.arange(len(dates))
     width = 0.2
@@ -3970,18 +3881,7 @@ def create_shc_overview_chart(shc_data, output_path=None):
     ax.legend(loc='upper right')
     ax.grid(axis='y', alpha=0.3, linestyle='--')
     
-    plt.tight_layout()
-    
-    if output_path:
-        plt.savefig(output_path, dpi=150, bbox_inches='tight')
-        plt.close()
-        return output_path
-    else:
-        buf = io.BytesIO()
-        plt.savefig(buf, format='png', dpi=150, bbox_inches='tight')
-        plt.close()
-        buf.seek(0)
-        return buf
+    return save_chart(fig, output_path)
 
 
 def add_shc_overview_section(doc, data_folder="downloads/baocao_hanoi"):
@@ -4753,6 +4653,7 @@ def sanitize_filename(name):
     return name
 
 
+@cached_chart
 def create_individual_radar_chart(nvkt_data, output_path=None):
     """
     Tạo biểu đồ radar so sánh điểm KPI của 1 NVKT
@@ -4786,7 +4687,7 @@ def create_individual_radar_chart(nvkt_data, output_path=None):
     angles += angles[:1]
     
     # Tạo figure
-    fig, ax = plt.subplots(figsize=(8, 8), subplot_kw=dict(polar=True))
+    fig, ax = chart_figure((8, 8), polar=True)
     
     # Vẽ radar
     ax.fill(angles, values, color='#2E86AB', alpha=0.25)
@@ -4813,18 +4714,7 @@ def create_individual_radar_chart(nvkt_data, output_path=None):
     ax.legend(loc='upper right', bbox_to_anchor=(1.2, 1.1))
     ax.set_title('BIỂU ĐỒ ĐIỂM KPI', fontsize=14, fontweight='bold', pad=20)
     
-    plt.tight_layout()
-    
-    if output_path:
-        plt.savefig(output_path, dpi=150, bbox_inches='tight')
-        plt.close()
-        return output_path
-    else:
-        buf = io.BytesIO()
-        plt.savefig(buf, format='png', dpi=150, bbox_inches='tight')
-        plt.close()
-        buf.seek(0)
-        return buf
+    return save_chart(fig, output_path)
 
 
 def add_individual_summary_table(doc, nvkt_data):
@@ -5159,7 +5049,7 @@ def load_shc_trend_data(nvkt_name, data_folder="downloads/baocao_hanoi"):
     
     try:
         # Đọc sheet Xu_huong_theo_NVKT
-        df = pd.read_excel(latest_file, sheet_name='Xu_huong_theo_NVKT')
+        df = read_excel(latest_file, sheet_name='Xu_huong_theo_NVKT')
         
         # Tìm NVKT trong cột 'NVKT'
         nvkt_row = df[df['NVKT'] == nvkt_name]
@@ -5190,6 +5080,7 @@ def load_shc_trend_data(nvkt_name, data_folder="downloads/baocao_hanoi"):
         return None
 
 
+@cached_chart
 def create_shc_trend_bar_chart(shc_data, nvkt_name, output_path=None):
     """
     Tạo biểu đồ cột thể hiện xu hướng số TB suy hao cao theo ngày
@@ -5209,7 +5100,7 @@ def create_shc_trend_bar_chart(shc_data, nvkt_name, output_path=None):
     values = shc_data['values']
     
     # Tạo figure
-    fig, ax = plt.subplots(figsize=(10, 5))
+    fig, ax = chart_figure((10, 5))
     
     # Vẽ biểu đồ cột
     x_pos = range(len(dates))
@@ -5243,18 +5134,7 @@ def create_shc_trend_bar_chart(shc_data, nvkt_name, output_path=None):
                    label=f'TB: {avg:.1f}')
         ax.legend(loc='upper right')
     
-    plt.tight_layout()
-    
-    if output_path:
-        plt.savefig(output_path, dpi=150, bbox_inches='tight')
-        plt.close()
-        return output_path
-    else:
-        buf = io.BytesIO()
-        plt.savefig(buf, format='png', dpi=150, bbox_inches='tight')
-        plt.close()
-        buf.seek(0)
-        return buf
+    return save_chart(fig, output_path)
 
 
 def add_individual_shc_section(doc, nvkt_name, data_folder="downloads/baocao_hanoi"):
@@ -5384,7 +5264,7 @@ def generate_individual_kpi_report(nvkt_name, don_vi, kpi_folder=DEFAULT_KPI_FOL
     # Đọc dữ liệu KPI chi tiết
     kpi_path = Path(kpi_folder)
     detail_file = kpi_path / "KPI_NVKT_ChiTiet.xlsx"
-    df_detail = pd.read_excel(detail_file)
+    df_detail = read_excel(detail_file)
     
     # Lọc dữ liệu cho NVKT cụ thể
     nvkt_df = df_detail[(df_detail['nvkt'] == nvkt_name) & (df_detail['don_vi'] == don_vi)]
@@ -5517,7 +5397,7 @@ def generate_all_individual_reports(kpi_folder=DEFAULT_KPI_FOLDER, output_folder
     # Đọc dữ liệu KPI
     kpi_path = Path(kpi_folder)
     detail_file = kpi_path / "KPI_NVKT_ChiTiet.xlsx"
-    df_detail = pd.read_excel(detail_file)
+    df_detail = read_excel(detail_file)
     
     # Lấy danh sách NVKT
     nvkt_list = df_detail[['don_vi', 'nvkt']].drop_duplicates()
@@ -5586,7 +5466,7 @@ def generate_all_individual_reports_after_exclusion(kpi_folder, output_root, rep
         print(f"❌ Không tìm thấy file: {detail_file}")
         return 0
         
-    df_detail = pd.read_excel(detail_file)
+    df_detail = read_excel(detail_file)
     nvkt_list = df_detail[['don_vi', 'nvkt']].drop_duplicates()
     total = len(nvkt_list)
     
@@ -5784,3 +5664,4 @@ if __name__ == "__main__":
             report_month=args.month
         )
 
+    prune_stale_charts()
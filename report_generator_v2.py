@@ -20,9 +20,13 @@ from docx.enum.table import WD_TABLE_ALIGNMENT
 from docx.enum.style import WD_STYLE_TYPE
 from docx.oxml.ns import qn
 from docx.oxml import OxmlElement
-import io
 import os
 import re
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from api_transition.excel_cache import read_excel
+from api_transition.chart_cache import cached_chart, chart_figure, prune_stale_charts, save_chart
 
 from kpi_scoring import (
     tinh_diem_C11_TP1, tinh_diem_C11_TP2,
@@ -41,6 +45,8 @@ matplotlib.use('Agg')  # Use non-interactive backend
 # =============================================================================
 DEFAULT_KPI_FOLDER = "downloads/KPI"
 DEFAULT_OUTPUT_FOLDER = "downloads/reports"
+# Số process tạo báo cáo cá nhân song song
+DEFAULT_REPORT_WORKERS = max(1, min(8, (os.cpu_count() or 2) - 1))
 
 # Mapping tên đơn vị ngắn gọn - từ team_config (single source of truth)
 TEAM_SHORT_NAMES = {}
@@ -139,11 +145,11 @@ def load_kpi_data(kpi_folder=DEFAULT_KPI_FOLDER):
     
     # Đọc file tóm tắt
     summary_file = kpi_path / "KPI_NVKT_TomTat.xlsx"
-    df_summary = pd.read_excel(summary_file)
+    df_summary = read_excel(summary_file)
     
     # Đọc file chi tiết
     detail_file = kpi_path / "KPI_NVKT_ChiTiet.xlsx"
-    df_detail = pd.read_excel(detail_file)
+    df_detail = read_excel(detail_file)
     
     return df_summary, df_detail
 
@@ -162,7 +168,7 @@ def load_c1x_reports(data_folder="downloads/baocao_hanoi"):
     try:
         c11_file = data_path / "c1.1 report.xlsx"
         if c11_file.exists():
-            reports['c11'] = pd.read_excel(c11_file, sheet_name='TH_C1.1')
+            reports['c11'] = read_excel(c11_file, sheet_name='TH_C1.1')
             print("   ✅ Đọc C1.1 report thành công")
     except Exception as e:
         print(f"   ⚠️ Không thể đọc C1.1 report: {e}")
@@ -171,7 +177,7 @@ def load_c1x_reports(data_folder="downloads/baocao_hanoi"):
     try:
         c12_file = data_path / "c1.2 report.xlsx"
         if c12_file.exists():
-            reports['c12'] = pd.read_excel(c12_file, sheet_name='TH_C1.2')
+            reports['c12'] = read_excel(c12_file, sheet_name='TH_C1.2')
             print("   ✅ Đọc C1.2 report thành công")
     except Exception as e:
         print(f"   ⚠️ Không thể đọc C1.2 report: {e}")
@@ -180,7 +186,7 @@ def load_c1x_reports(data_folder="downloads/baocao_hanoi"):
     try:
         c13_file = data_path / "c1.3 report.xlsx"
         if c13_file.exists():
-            reports['c13'] = pd.read_excel(c13_file, sheet_name='TH_C1.3')
+            reports['c13'] = read_excel(c13_file, sheet_name='TH_C1.3')
             print("   ✅ Đọc C1.3 report thành công")
     except Exception as e:
         print(f"   ⚠️ Không thể đọc C1.3 report: {e}")
@@ -189,7 +195,7 @@ def load_c1x_reports(data_folder="downloads/baocao_hanoi"):
     try:
         c14_file = data_path / "c1.4 report.xlsx"
         if c14_file.exists():
-            reports['c14'] = pd.read_excel(c14_file, sheet_name='TH_C1.4')
+            reports['c14'] = read_excel(c14_file, sheet_name='TH_C1.4')
             print("   ✅ Đọc C1.4 report thành công")
     except Exception as e:
         print(f"   ⚠️ Không thể đọc C1.4 report: {e}")
@@ -198,7 +204,7 @@ def load_c1x_reports(data_folder="downloads/baocao_hanoi"):
     try:
         c15_file = data_path / "c1.5_chitiet_report.xlsx"
         if c15_file.exists():
-            reports['c15_ttvtst'] = pd.read_excel(c15_file, sheet_name='TH_TTVTST')
+            reports['c15_ttvtst'] = read_excel(c15_file, sheet_name='TH_TTVTST')
             print("   ✅ Đọc C1.5 report (TH_TTVTST) thành công")
     except Exception as e:
         print(f"   ⚠️ Không thể đọc C1.5 report: {e}")
@@ -235,8 +241,8 @@ def load_exclusion_comparison_data(exclusion_folder="downloads/kq_sau_giam_tru_h
         c11_sm4_file = data_path / "So_sanh_C11_SM4.xlsx"
         if c11_sm4_file.exists():
             comparison_data['c11_sm4'] = {
-                'chi_tiet': pd.read_excel(c11_sm4_file, sheet_name='So_sanh_chi_tiet'),
-                'tong_hop': pd.read_excel(c11_sm4_file, sheet_name='Thong_ke_tong_hop')
+                'chi_tiet': read_excel(c11_sm4_file, sheet_name='So_sanh_chi_tiet'),
+                'tong_hop': read_excel(c11_sm4_file, sheet_name='Thong_ke_tong_hop')
             }
             print("   ✅ Đọc So_sanh_C11_SM4.xlsx thành công")
     except Exception as e:
@@ -247,8 +253,8 @@ def load_exclusion_comparison_data(exclusion_folder="downloads/kq_sau_giam_tru_h
         c11_sm2_file = data_path / "So_sanh_C11_SM2.xlsx"
         if c11_sm2_file.exists():
             comparison_data['c11_sm2'] = {
-                'chi_tiet': pd.read_excel(c11_sm2_file, sheet_name='So_sanh_chi_tiet'),
-                'tong_hop': pd.read_excel(c11_sm2_file, sheet_name='Thong_ke_tong_hop')
+                'chi_tiet': read_excel(c11_sm2_file, sheet_name='So_sanh_chi_tiet'),
+                'tong_hop': read_excel(c11_sm2_file, sheet_name='Thong_ke_tong_hop')
             }
             print("   ✅ Đọc So_sanh_C11_SM2.xlsx thành công")
     except Exception as e:
@@ -259,8 +265,8 @@ def load_exclusion_comparison_data(exclusion_folder="downloads/kq_sau_giam_tru_h
         c12_sm1_file = data_path / "So_sanh_C12_SM1.xlsx"
         if c12_sm1_file.exists():
             comparison_data['c12_sm1'] = {
-                'chi_tiet': pd.read_excel(c12_sm1_file, sheet_name='So_sanh_chi_tiet'),
-                'tong_hop': pd.read_excel(c12_sm1_file, sheet_name='Thong_ke_tong_hop')
+                'chi_tiet': read_excel(c12_sm1_file, sheet_name='So_sanh_chi_tiet'),
+                'tong_hop': read_excel(c12_sm1_file, sheet_name='Thong_ke_tong_hop')
             }
             print("   ✅ Đọc So_sanh_C12_SM1.xlsx thành công")
     except Exception as e:
@@ -271,8 +277,8 @@ def load_exclusion_comparison_data(exclusion_folder="downloads/kq_sau_giam_tru_h
         c12_sm4_file = data_path / "SM4-C12-ti-le-su-co-dv-brcd.xlsx"
         if c12_sm4_file.exists():
             comparison_data['c12_sm4'] = {
-                'chi_tiet': pd.read_excel(c12_sm4_file, sheet_name='So_sanh_chi_tiet'),
-                'tong_hop': pd.read_excel(c12_sm4_file, sheet_name='Thong_ke_tong_hop')
+                'chi_tiet': read_excel(c12_sm4_file, sheet_name='So_sanh_chi_tiet'),
+                'tong_hop': read_excel(c12_sm4_file, sheet_name='Thong_ke_tong_hop')
             }
             print("   ✅ Đọc SM4-C12-ti-le-su-co-dv-brcd.xlsx thành công")
     except Exception as e:
@@ -283,8 +289,8 @@ def load_exclusion_comparison_data(exclusion_folder="downloads/kq_sau_giam_tru_h
         c14_file = data_path / "So_sanh_C14.xlsx"
         if c14_file.exists():
             comparison_data['c14'] = {
-                'chi_tiet': pd.read_excel(c14_file, sheet_name='So_sanh_chi_tiet'),
-                'tong_hop': pd.read_excel(c14_file, sheet_name='Thong_ke_tong_hop')
+                'chi_tiet': read_excel(c14_file, sheet_name='So_sanh_chi_tiet'),
+                'tong_hop': read_excel(c14_file, sheet_name='Thong_ke_tong_hop')
             }
             print("   ✅ Đọc So_sanh_C14.xlsx thành công")
     except Exception as e:
@@ -296,8 +302,8 @@ def load_exclusion_comparison_data(exclusion_folder="downloads/kq_sau_giam_tru_h
         c15_file = data_path / "So_sanh_C15.xlsx"
         if c15_file.exists():
             comparison_data['c15'] = {
-                'chi_tiet': pd.read_excel(c15_file, sheet_name='So_sanh_chi_tiet'),
-                'tong_hop': pd.read_excel(c15_file, sheet_name='Thong_ke_tong_hop')
+                'chi_tiet': read_excel(c15_file, sheet_name='So_sanh_chi_tiet'),
+                'tong_hop': read_excel(c15_file, sheet_name='Thong_ke_tong_hop')
             }
             print("   ✅ Đọc So_sanh_C15.xlsx thành công")
     except Exception as e:
@@ -307,7 +313,7 @@ def load_exclusion_comparison_data(exclusion_folder="downloads/kq_sau_giam_tru_h
     try:
         tong_hop_file = data_path / "Tong_hop_giam_tru.xlsx"
         if tong_hop_file.exists():
-            comparison_data['tong_hop'] = pd.read_excel(tong_hop_file)
+            comparison_data['tong_hop'] = read_excel(tong_hop_file)
             print("   ✅ Đọc Tong_hop_giam_tru.xlsx thành công")
     except Exception as e:
         print(f"   ⚠️ Không thể đọc Tong_hop_giam_tru.xlsx: {e}")
@@ -333,7 +339,7 @@ def load_unit_level_exclusion_data(exclusion_folder="downloads/kq_sau_giam_tru_h
     try:
         c11_sm4_file = data_path / "So_sanh_C11_SM4.xlsx"
         if c11_sm4_file.exists():
-            unit_data['c11_sm4'] = pd.read_excel(c11_sm4_file, sheet_name='Thong_ke_theo_don_vi')
+            unit_data['c11_sm4'] = read_excel(c11_sm4_file, sheet_name='Thong_ke_theo_don_vi')
             print("   ✅ Đọc unit stats C1.1 SM4 thành công")
     except Exception as e:
         print(f"   ⚠️ Không thể đọc unit stats C1.1 SM4: {e}")
@@ -342,7 +348,7 @@ def load_unit_level_exclusion_data(exclusion_folder="downloads/kq_sau_giam_tru_h
     try:
         c11_sm2_file = data_path / "So_sanh_C11_SM2.xlsx"
         if c11_sm2_file.exists():
-            unit_data['c11_sm2'] = pd.read_excel(c11_sm2_file, sheet_name='Thong_ke_theo_don_vi')
+            unit_data['c11_sm2'] = read_excel(c11_sm2_file, sheet_name='Thong_ke_theo_don_vi')
             print("   ✅ Đọc unit stats C1.1 SM2 thành công")
     except Exception as e:
         print(f"   ⚠️ Không thể đọc unit stats C1.1 SM2: {e}")
@@ -351,7 +357,7 @@ def load_unit_level_exclusion_data(exclusion_folder="downloads/kq_sau_giam_tru_h
     try:
         c12_sm1_file = data_path / "So_sanh_C12_SM1.xlsx"
         if c12_sm1_file.exists():
-            unit_data['c12_sm1'] = pd.read_excel(c12_sm1_file, sheet_name='Thong_ke_theo_don_vi')
+            unit_data['c12_sm1'] = read_excel(c12_sm1_file, sheet_name='Thong_ke_theo_don_vi')
             print("   ✅ Đọc unit stats C1.2 SM1 thành công")
     except Exception as e:
         print(f"   ⚠️ Không thể đọc unit stats C1.2 SM1: {e}")
@@ -361,7 +367,7 @@ def load_unit_level_exclusion_data(exclusion_folder="downloads/kq_sau_giam_tru_h
     try:
         c12_sm4_file = data_path / "SM4-C12-ti-le-su-co-dv-brcd.xlsx"
         if c12_sm4_file.exists():
-            unit_data['c12_sm4'] = pd.read_excel(c12_sm4_file, sheet_name='Thong_ke_theo_don_vi')
+            unit_data['c12_sm4'] = read_excel(c12_sm4_file, sheet_name='Thong_ke_theo_don_vi')
             print("   ✅ Đọc unit stats C1.2 SM4 thành công")
     except Exception as e:
         print(f"   ⚠️ Không thể đọc unit stats C1.2 SM4: {e}")
@@ -370,7 +376,7 @@ def load_unit_level_exclusion_data(exclusion_folder="downloads/kq_sau_giam_tru_h
     try:
         c14_file = data_path / "So_sanh_C14.xlsx"
         if c14_file.exists():
-            unit_data['c14'] = pd.read_excel(c14_file, sheet_name='Thong_ke_theo_don_vi')
+            unit_data['c14'] = read_excel(c14_file, sheet_name='Thong_ke_theo_don_vi')
             print("   ✅ Đọc unit stats C1.4 thành công")
     except Exception as e:
         print(f"   ⚠️ Không thể đọc unit stats C1.4: {e}")
@@ -379,7 +385,7 @@ def load_unit_level_exclusion_data(exclusion_folder="downloads/kq_sau_giam_tru_h
     try:
         c15_file = data_path / "So_sanh_C15.xlsx"
         if c15_file.exists():
-            unit_data['c15'] = pd.read_excel(c15_file, sheet_name='Thong_ke_theo_don_vi')
+            unit_data['c15'] = read_excel(c15_file, sheet_name='Thong_ke_theo_don_vi')
             print("   ✅ Đọc unit stats C1.5 thành công")
     except Exception as e:
         print(f"   ⚠️ Không thể đọc unit stats C1.5: {e}")
@@ -415,13 +421,13 @@ def load_bsc_unit_scores_from_comparison(exclusion_folder="downloads/kq_sau_giam
         return result
     
     try:
-        result['units'] = pd.read_excel(file_path, sheet_name='Tong_hop_Don_vi')
+        result['units'] = read_excel(file_path, sheet_name='Tong_hop_Don_vi')
         print(f"   ✅ Đọc điểm BSC đơn vị từ Tong_hop_Diem_BSC_Don_Vi.xlsx: {len(result['units'])} dòng")
     except Exception as e:
         print(f"   ⚠️ Không thể đọc sheet Tong_hop_Don_vi: {e}")
     
     try:
-        result['individuals'] = pd.read_excel(file_path, sheet_name='Chi_tiet_Ca_nhan')
+        result['individuals'] = read_excel(file_path, sheet_name='Chi_tiet_Ca_nhan')
         print(f"   ✅ Đọc điểm BSC cá nhân từ Tong_hop_Diem_BSC_Don_Vi.xlsx: {len(result['individuals'])} dòng")
     except Exception as e:
         print(f"   ⚠️ Không thể đọc sheet Chi_tiet_Ca_nhan: {e}")
@@ -551,7 +557,7 @@ def load_nvkt_raw_detail(exclusion_folder="downloads/kq_sau_giam_tru_hni"):
         try:
             f_path = data_path / filename
             if f_path.exists():
-                df = pd.read_excel(f_path, sheet_name=sheet)
+                df = read_excel(f_path, sheet_name=sheet)
                 if 'NVKT' in df.columns:
                     # Chuẩn hóa tên NVKT về Title Case để tránh trùng lặp
                     df['NVKT'] = df['NVKT'].apply(chuan_hoa_ten_nvkt)
@@ -699,7 +705,7 @@ def load_nvkt_exclusion_detail(exclusion_folder="downloads/kq_sau_giam_tru_hni")
             # Đọc file, bỏ qua dòng tiêu đề phụ nếu có (thường header=0 là đủ nếu cột nằm ở dòng 1)
             f_path = data_path / filename
             if f_path.exists():
-                df = pd.read_excel(f_path, sheet_name=sheet)
+                df = read_excel(f_path, sheet_name=sheet)
                 # Chuẩn hóa tên cột NVKT và TEN_DOI
                 if 'Mã nhân viên' in df.columns:
                     df.rename(columns={'Mã nhân viên': 'NVKT'}, inplace=True)
@@ -1096,6 +1102,7 @@ def add_c15_detail_table_after_exclusion(doc, df_exclusion_detail, team_name):
                 set_cell_shading(cells[i], 'EDE7F6')  # Tím nhạt
 
 
+@cached_chart
 def create_nvkt_bar_chart_after_exclusion(df_exclusion, team_name, output_path=None):
     """
     Tạo biểu đồ cột so sánh điểm KPI sau giảm trừ theo NVKT trong 1 tổ
@@ -1130,7 +1137,7 @@ def create_nvkt_bar_chart_after_exclusion(df_exclusion, team_name, output_path=N
     c15 = df['Diem_C1.5'].fillna(0).tolist()
 
     # Tạo biểu đồ
-    fig, ax = plt.subplots(figsize=(12, 6))
+    fig, ax = chart_figure((12, 6))
 
     x = np.arange(len(nvkts))
     width = 0.2
@@ -1161,20 +1168,10 @@ def create_nvkt_bar_chart_after_exclusion(df_exclusion, team_name, output_path=N
     ax.legend(loc='upper right')
     ax.grid(axis='y', linestyle='--', alpha=0.7)
     
-    plt.tight_layout()
-    
-    if output_path:
-        plt.savefig(output_path, dpi=150, bbox_inches='tight')
-        plt.close()
-        return output_path
-    else:
-        buf = io.BytesIO()
-        plt.savefig(buf, format='png', dpi=150, bbox_inches='tight')
-        plt.close()
-        buf.seek(0)
-        return buf
+    return save_chart(fig, output_path)
 
 
+@cached_chart
 def create_unit_comparison_chart(unit_data, chi_tieu='c11_sm4', output_path=None):
     """
     Tạo biểu đồ grouped bar so sánh tỷ lệ trước/sau GT theo đơn vị
@@ -1201,7 +1198,7 @@ def create_unit_comparison_chart(unit_data, chi_tieu='c11_sm4', output_path=None
     if not tyle_tho_col or not tyle_sau_col:
         return None
     
-    fig, ax = plt.subplots(figsize=(12, 6))
+    fig, ax = chart_figure((12, 6))
     
     x = np.arange(len(df))
     width = 0.35
@@ -1238,18 +1235,7 @@ def create_unit_comparison_chart(unit_data, chi_tieu='c11_sm4', output_path=None
     ax.legend(loc='upper right')
     ax.grid(axis='y', linestyle='--', alpha=0.5)
     
-    plt.tight_layout()
-    
-    if output_path:
-        plt.savefig(output_path, dpi=150, bbox_inches='tight')
-        plt.close()
-        return output_path
-    else:
-        buf = io.BytesIO()
-        plt.savefig(buf, format='png', dpi=150, bbox_inches='tight')
-        plt.close()
-        buf.seek(0)
-        return buf
+    return save_chart(fig, output_path)
 
 
 def add_unit_exclusion_table(doc, unit_data, chi_tieu='c11_sm4'):
@@ -1389,6 +1375,7 @@ def add_unit_level_exclusion_section(doc, unit_data, c1x_reports=None):
         doc.add_paragraph()
 
 
+@cached_chart
 def create_comparison_bar_chart(comparison_data, output_path=None):
     """
     Tạo biểu đồ grouped bar so sánh tỷ lệ trước/sau giảm trừ
@@ -1408,7 +1395,7 @@ def create_comparison_bar_chart(comparison_data, output_path=None):
     # Sắp xếp theo thứ tự
     chi_tieu_order = ['C1.1 SM4', 'C1.1 SM2', 'C1.2', 'C1.2 Tỷ lệ BRCĐ báo hỏng', 'C1.4 Độ hài lòng KH']
     
-    fig, ax = plt.subplots(figsize=(12, 6))
+    fig, ax = chart_figure((12, 6))
     
     x = np.arange(len(df))
     width = 0.35
@@ -1438,18 +1425,7 @@ def create_comparison_bar_chart(comparison_data, output_path=None):
     ax.legend(loc='upper right')
     ax.grid(axis='y', linestyle='--', alpha=0.5)
     
-    plt.tight_layout()
-    
-    if output_path:
-        plt.savefig(output_path, dpi=150, bbox_inches='tight')
-        plt.close()
-        return output_path
-    else:
-        buf = io.BytesIO()
-        plt.savefig(buf, format='png', dpi=150, bbox_inches='tight')
-        plt.close()
-        buf.seek(0)
-        return buf
+    return save_chart(fig, output_path)
 
 
 def add_exclusion_summary_table(doc, comparison_data):
@@ -2478,6 +2454,7 @@ def add_c14_exclusion_table(doc, comparison_data):
     doc.add_paragraph()
 
 
+@cached_chart
 def create_exclusion_bar_chart(comparison_data, output_path=None):
     """
     Tạo biểu đồ bar riêng cho dữ liệu sau giảm trừ
@@ -2487,7 +2464,7 @@ def create_exclusion_bar_chart(comparison_data, output_path=None):
     
     df = comparison_data['tong_hop']
     
-    fig, ax = plt.subplots(figsize=(12, 6))
+    fig, ax = chart_figure((12, 6))
     
     x = np.arange(len(df))
     
@@ -2519,18 +2496,7 @@ def create_exclusion_bar_chart(comparison_data, output_path=None):
     ax.grid(axis='y', linestyle='--', alpha=0.5)
     ax.set_ylim(0, max(tyle_sau) * 1.15 if len(tyle_sau) > 0 else 100)
     
-    plt.tight_layout()
-    
-    if output_path:
-        plt.savefig(output_path, dpi=150, bbox_inches='tight')
-        plt.close()
-        return output_path
-    else:
-        buf = io.BytesIO()
-        plt.savefig(buf, format='png', dpi=150, bbox_inches='tight')
-        plt.close()
-        buf.seek(0)
-        return buf
+    return save_chart(fig, output_path)
 
 
 def add_c1x_overview_table(doc, c1x_reports, comparison_data=None, unit_data=None, exclusion_folder="downloads/kq_sau_giam_tru_hni"):
@@ -2927,6 +2893,7 @@ def add_c1x_overview_table(doc, c1x_reports, comparison_data=None, unit_data=Non
 # =============================================================================
 # HÀM TẠO BIỂU ĐỒ
 # =============================================================================
+@cached_chart
 def create_team_comparison_chart(c1x_reports, output_path=None, bsc_data=None):
     """
     Tạo biểu đồ so sánh điểm BSC thực tế giữa 4 tổ
@@ -3028,7 +2995,7 @@ def create_team_comparison_chart(c1x_reports, output_path=None, bsc_data=None):
     chart_data = chart_data.reindex(teams_order)  # Đảm bảo thứ tự
     
     # Tạo biểu đồ
-    fig, ax = plt.subplots(figsize=(14, 6))
+    fig, ax = chart_figure((14, 6))
     
     x = np.arange(len(teams_order))
     width = 0.15  # Thu hẹp để có chỗ cho 5 cột
@@ -3053,21 +3020,10 @@ def create_team_comparison_chart(c1x_reports, output_path=None, bsc_data=None):
     ax.legend(loc='upper right')
     ax.grid(axis='y', linestyle='--', alpha=0.7)
     
-    plt.tight_layout()
-    
-    # Lưu hoặc trả về bytes
-    if output_path:
-        plt.savefig(output_path, dpi=150, bbox_inches='tight')
-        plt.close()
-        return output_path
-    else:
-        buf = io.BytesIO()
-        plt.savefig(buf, format='png', dpi=150, bbox_inches='tight')
-        plt.close()
-        buf.seek(0)
-        return buf
+    return save_chart(fig, output_path)
 
 
+@cached_chart
 def create_team_bsc_after_exclusion_chart(unit_data, c1x_reports=None, output_path=None, bsc_data=None):
     """
     Tạo biểu đồ so sánh điểm BSC SAU GIẢM TRỪ giữa 4 tổ
@@ -3119,7 +3075,7 @@ def create_team_bsc_after_exclusion_chart(unit_data, c1x_reports=None, output_pa
         chart_data = pd.DataFrame(bsc_scores).T
         chart_data = chart_data.reindex(teams_order)
         
-        fig, ax = plt.subplots(figsize=(14, 6))
+        fig, ax = chart_figure((14, 6))
         x = np.arange(len(teams_order))
         width = 0.15
         metrics = ['C1.1', 'C1.2', 'C1.3', 'C1.4', 'C1.5']
@@ -3140,18 +3096,7 @@ def create_team_bsc_after_exclusion_chart(unit_data, c1x_reports=None, output_pa
         ax.set_ylim(0, 6)
         ax.legend(loc='upper right')
         ax.grid(axis='y', linestyle='--', alpha=0.7)
-        plt.tight_layout()
-        
-        if output_path:
-            plt.savefig(output_path, dpi=150, bbox_inches='tight')
-            plt.close()
-            return output_path
-        else:
-            buf = io.BytesIO()
-            plt.savefig(buf, format='png', dpi=150, bbox_inches='tight')
-            plt.close()
-            buf.seek(0)
-            return buf
+        return save_chart(fig, output_path)
     
     # FALLBACK: Tính từ unit_data (cách cũ) - chỉ chạy nếu không có bsc_data
     # Sử dụng scoring functions từ kpi_scoring (imported ở top level)
@@ -3300,7 +3245,7 @@ def create_team_bsc_after_exclusion_chart(unit_data, c1x_reports=None, output_pa
     chart_data = chart_data.reindex(teams_order)
     
     # Tạo biểu đồ
-    fig, ax = plt.subplots(figsize=(14, 6))
+    fig, ax = chart_figure((14, 6))
     
     x = np.arange(len(teams_order))
     width = 0.15
@@ -3324,19 +3269,9 @@ def create_team_bsc_after_exclusion_chart(unit_data, c1x_reports=None, output_pa
     ax.legend(loc='upper right')
     ax.grid(axis='y', linestyle='--', alpha=0.7)
     
-    plt.tight_layout()
-    
-    if output_path:
-        plt.savefig(output_path, dpi=150, bbox_inches='tight')
-        plt.close()
-        return output_path
-    else:
-        buf = io.BytesIO()
-        plt.savefig(buf, format='png', dpi=150, bbox_inches='tight')
-        plt.close()
-        buf.seek(0)
-        return buf
+    return save_chart(fig, output_path)
 
+@cached_chart
 def create_nvkt_bar_chart(df_summary, team_name, output_path=None):
     """
     Tạo biểu đồ cột so sánh điểm KPI theo NVKT trong 1 tổ
@@ -3359,7 +3294,7 @@ def create_nvkt_bar_chart(df_summary, team_name, output_path=None):
     df_team = df_team.sort_values('nvkt')
     
     # Tạo biểu đồ
-    fig, ax = plt.subplots(figsize=(14, 6))
+    fig, ax = chart_figure((14, 6))
     
     x = np.arange(len(df_team))
     width = 0.2
@@ -3386,18 +3321,7 @@ def create_nvkt_bar_chart(df_summary, team_name, output_path=None):
     ax.legend(loc='upper right')
     ax.grid(axis='y', linestyle='--', alpha=0.7)
     
-    plt.tight_layout()
-    
-    if output_path:
-        plt.savefig(output_path, dpi=150, bbox_inches='tight')
-        plt.close()
-        return output_path
-    else:
-        buf = io.BytesIO()
-        plt.savefig(buf, format='png', dpi=150, bbox_inches='tight')
-        plt.close()
-        buf.seek(0)
-        return buf
+    return save_chart(fig, output_path)
 
 
 # =============================================================================
@@ -3724,7 +3648,7 @@ def load_shc_summary_by_unit(data_folder="downloads/baocao_hanoi"):
     latest_file = max(files, key=os.path.getmtime)
     
     try:
-        df = pd.read_excel(latest_file, sheet_name='Xu_huong_theo_don_vi')
+        df = read_excel(latest_file, sheet_name='Xu_huong_theo_don_vi')
         
         # Cột đầu tiên là Đơn vị, các cột còn lại là ngày
         date_columns = [col for col in df.columns if col != 'Đơn vị']
@@ -3760,7 +3684,7 @@ def load_shc_by_nvkt_for_unit(unit_name, data_folder="downloads/baocao_hanoi"):
     latest_file = max(files, key=os.path.getmtime)
     
     try:
-        df = pd.read_excel(latest_file, sheet_name='Xu_huong_theo_NVKT')
+        df = read_excel(latest_file, sheet_name='Xu_huong_theo_NVKT')
         
         # Lọc theo đơn vị
         df_unit = _match_unit(df, 'Đơn vị', unit_name)
@@ -3788,6 +3712,7 @@ def load_shc_by_nvkt_for_unit(unit_name, data_folder="downloads/baocao_hanoi"):
         return None
 
 
+@cached_chart
 def create_nvkt_shc_grouped_chart(nvkt_data, unit_name, output_path=None):
     """
     Tạo biểu đồ nhóm cột SHC theo NVKT, mỗi ngày 1 màu khác nhau
@@ -3803,7 +3728,7 @@ def create_nvkt_shc_grouped_chart(nvkt_data, unit_name, output_path=None):
     nvkt_labels = nvkt_list
     
     # Setup figure
-    fig, ax = plt.subplots(figsize=(14, 6))
+    fig, ax = chart_figure((14, 6))
     
     x = np.arange(len(nvkt_list))
     n_dates = len(dates)
@@ -3838,20 +3763,10 @@ def create_nvkt_shc_grouped_chart(nvkt_data, unit_name, output_path=None):
     ax.grid(axis='y', alpha=0.3, linestyle='--')
     ax.set_axisbelow(True)
     
-    plt.tight_layout()
-    
-    if output_path:
-        plt.savefig(output_path, dpi=150, bbox_inches='tight')
-        plt.close()
-        return output_path
-    else:
-        buf = io.BytesIO()
-        plt.savefig(buf, format='png', dpi=150, bbox_inches='tight')
-        plt.close()
-        buf.seek(0)
-        return buf
+    return save_chart(fig, output_path)
 
 
+@cached_chart
 def create_shc_overview_chart(shc_data, output_path=None):
     """
     Tạo biểu đồ tổng hợp SHC theo ngày cho tất cả đơn vị (stacked bar)
@@ -3862,7 +3777,7 @@ def create_shc_overview_chart(shc_data, output_path=None):
     dates = [str(d) for d in shc_data['dates']]
     units = shc_data['units']
     
-    fig, ax = plt.subplots(figsize=(12, 6))
+    fig, ax = chart_figure((12, 6))
     
     x = np.arange(len(dates))
     width = 0.2
@@ -3889,18 +3804,7 @@ def create_shc_overview_chart(shc_data, output_path=None):
     ax.legend(loc='upper right')
     ax.grid(axis='y', alpha=0.3, linestyle='--')
     
-    plt.tight_layout()
-    
-    if output_path:
-        plt.savefig(output_path, dpi=150, bbox_inches='tight')
-        plt.close()
-        return output_path
-    else:
-        buf = io.BytesIO()
-        plt.savefig(buf, format='png', dpi=150, bbox_inches='tight')
-        plt.close()
-        buf.seek(0)
-        return buf
+    return save_chart(fig, output_path)
 
 
 def add_shc_overview_section(doc, data_folder="downloads/baocao_hanoi"):
@@ -4664,6 +4568,7 @@ def sanitize_filename(name):
     return name
 
 
+@cached_chart
 def create_individual_radar_chart(nvkt_data, output_path=None):
     """
     Tạo biểu đồ radar so sánh điểm KPI của 1 NVKT
@@ -4697,7 +4602,7 @@ def create_individual_radar_chart(nvkt_data, output_path=None):
     angles += angles[:1]
     
     # Tạo figure
-    fig, ax = plt.subplots(figsize=(8, 8), subplot_kw=dict(polar=True))
+    fig, ax = chart_figure((8, 8), polar=True)
     
     # Vẽ radar
     ax.fill(angles, values, color='#2E86AB', alpha=0.25)
@@ -4724,18 +4629,7 @@ def create_individual_radar_chart(nvkt_data, output_path=None):
     ax.legend(loc='upper right', bbox_to_anchor=(1.2, 1.1))
     ax.set_title('BIỂU ĐỒ ĐIỂM KPI', fontsize=14, fontweight='bold', pad=20)
     
-    plt.tight_layout()
-    
-    if output_path:
-        plt.savefig(output_path, dpi=150, bbox_inches='tight')
-        plt.close()
-        return output_path
-    else:
-        buf = io.BytesIO()
-        plt.savefig(buf, format='png', dpi=150, bbox_inches='tight')
-        plt.close()
-        buf.seek(0)
-        return buf
+    return save_chart(fig, output_path)
 
 
 def add_individual_summary_table(doc, nvkt_data):
@@ -5044,63 +4938,72 @@ def add_individual_c15_detail(doc, nvkt_data):
     p.add_run('≥ 99.5% = 5 điểm, 89.5% < KQ < 99.5% = nội suy, ≤ 89.5% = 1 điểm')
 
 
-def load_shc_trend_data(nvkt_name, data_folder="downloads/baocao_hanoi"):
+def load_shc_trend_table(data_folder="downloads/baocao_hanoi"):
     """
-    Đọc dữ liệu xu hướng SHC cho 1 NVKT từ file Bao_cao_xu_huong_*.xlsx
-    
+    Đọc 1 lần sheet Xu_huong_theo_NVKT của file Bao_cao_xu_huong_SHC_*.xlsx mới nhất
+    và dựng bảng tra cứu theo tên NVKT (dùng chung cho cả lô báo cáo cá nhân)
+
     Args:
-        nvkt_name: Tên NVKT cần tìm
         data_folder: Thư mục chứa file báo cáo
-    
+
     Returns:
-        dict: {'dates': [...], 'values': [...], 'don_vi': '...'} hoặc None
+        dict: {nvkt_name: {'dates': [...], 'values': [...], 'don_vi': '...'}} (rỗng nếu không có dữ liệu)
     """
     import glob
-    
+
     # Tìm file Bao_cao_xu_huong mới nhất
     pattern = os.path.join(data_folder, "Bao_cao_xu_huong_SHC_*.xlsx")
     files = glob.glob(pattern)
-    
+
     if not files:
-        return None
-    
+        return {}
+
     # Sắp xếp theo thời gian chỉnh sửa file (mới nhất cuối cùng)
     latest_file = max(files, key=os.path.getmtime)
     print(f"   📊 Sử dụng file SHC: {os.path.basename(latest_file)}")
-    
+
     try:
         # Đọc sheet Xu_huong_theo_NVKT
-        df = pd.read_excel(latest_file, sheet_name='Xu_huong_theo_NVKT')
-        
-        # Tìm NVKT trong cột 'NVKT'
-        nvkt_row = df[df['NVKT'] == nvkt_name]
-        
-        if nvkt_row.empty:
-            return None
-        
-        row = nvkt_row.iloc[0]
-        don_vi = row.get('Đơn vị', '')
-        
+        df = read_excel(latest_file, sheet_name='Xu_huong_theo_NVKT')
+
         # Lấy các cột ngày (không phải 'Đơn vị' và 'NVKT')
         date_columns = [col for col in df.columns if col not in ['Đơn vị', 'NVKT']]
-        
-        dates = []
-        values = []
-        for col in date_columns:
-            dates.append(str(col))
-            val = row[col]
-            values.append(int(val) if pd.notna(val) else 0)
-        
-        return {
-            'dates': dates,
-            'values': values,
-            'don_vi': don_vi
-        }
+        dates = [str(col) for col in date_columns]
+        values = df[date_columns].apply(pd.to_numeric, errors='coerce')
+        don_vi_values = df['Đơn vị'] if 'Đơn vị' in df.columns else pd.Series('', index=df.index)
+
+        table = {}
+        for position, nvkt_name in enumerate(df['NVKT']):
+            # Giữ dòng đầu tiên nếu NVKT xuất hiện nhiều lần
+            if nvkt_name in table:
+                continue
+            row_values = values.iloc[position]
+            table[nvkt_name] = {
+                'dates': list(dates),
+                'values': [int(val) if pd.notna(val) else 0 for val in row_values],
+                'don_vi': don_vi_values.iloc[position]
+            }
+        return table
     except Exception as e:
         print(f"   ⚠️ Lỗi đọc dữ liệu SHC: {e}")
-        return None
+        return {}
 
 
+def load_shc_trend_data(nvkt_name, data_folder="downloads/baocao_hanoi"):
+    """
+    Đọc dữ liệu xu hướng SHC cho 1 NVKT từ file Bao_cao_xu_huong_*.xlsx
+    
+    Args:
+        nvkt_name: Tên NVKT cần tìm
+        data_folder: Thư mục chứa file báo cáo
+    
+    Returns:
+        dict: {'dates': [...], 'values': [...], 'don_vi': '...'} hoặc None
+    """
+    return load_shc_trend_table(data_folder).get(nvkt_name)
+
+
+@cached_chart
 def create_shc_trend_bar_chart(shc_data, nvkt_name, output_path=None):
     """
     Tạo biểu đồ cột thể hiện xu hướng số TB suy hao cao theo ngày
@@ -5120,7 +5023,7 @@ def create_shc_trend_bar_chart(shc_data, nvkt_name, output_path=None):
     values = shc_data['values']
     
     # Tạo figure
-    fig, ax = plt.subplots(figsize=(10, 5))
+    fig, ax = chart_figure((10, 5))
     
     # Vẽ biểu đồ cột
     x_pos = range(len(dates))
@@ -5154,21 +5057,10 @@ def create_shc_trend_bar_chart(shc_data, nvkt_name, output_path=None):
                    label=f'TB: {avg:.1f}')
         ax.legend(loc='upper right')
     
-    plt.tight_layout()
-    
-    if output_path:
-        plt.savefig(output_path, dpi=150, bbox_inches='tight')
-        plt.close()
-        return output_path
-    else:
-        buf = io.BytesIO()
-        plt.savefig(buf, format='png', dpi=150, bbox_inches='tight')
-        plt.close()
-        buf.seek(0)
-        return buf
+    return save_chart(fig, output_path)
 
 
-def add_individual_shc_section(doc, nvkt_name, data_folder="downloads/baocao_hanoi"):
+def add_individual_shc_section(doc, nvkt_name, data_folder="downloads/baocao_hanoi", shc_data=None):
     """
     Thêm phần Số liệu Suy Hao Cao vào báo cáo cá nhân
     Bao gồm: Bảng dữ liệu + Biểu đồ bar
@@ -5177,9 +5069,11 @@ def add_individual_shc_section(doc, nvkt_name, data_folder="downloads/baocao_han
         doc: Document Word
         nvkt_name: Tên NVKT
         data_folder: Thư mục chứa file báo cáo
+        shc_data: Dữ liệu SHC đã nạp sẵn (None = tự đọc từ data_folder, {} = không có dữ liệu)
     """
     # Load dữ liệu SHC
-    shc_data = load_shc_trend_data(nvkt_name, data_folder)
+    if shc_data is None:
+        shc_data = load_shc_trend_data(nvkt_name, data_folder)
     
     if not shc_data:
         return  # Không có dữ liệu SHC
@@ -5273,45 +5167,64 @@ def add_individual_shc_section(doc, nvkt_name, data_folder="downloads/baocao_han
         print(f"   ⚠️ Không thể tạo biểu đồ SHC: {e}")
 
 
-def generate_individual_kpi_report(nvkt_name, don_vi, kpi_folder=DEFAULT_KPI_FOLDER, 
-                                    output_folder=DEFAULT_OUTPUT_FOLDER, report_month=None):
+class IndividualReportData:
     """
-    Tạo báo cáo Word cho 1 NVKT cụ thể
+    Dữ liệu đầu vào của báo cáo cá nhân, nạp 1 lần cho cả lô:
+    - KPI chi tiết (KPI_NVKT_ChiTiet.xlsx / KPI_NVKT_SauGiamTru_ChiTiet.xlsx) đánh chỉ mục
+      theo (NVKT, tên ngắn đơn vị) -> dòng đầu tiên, tương đương _match_unit
+    - Xu hướng SHC theo NVKT (file Bao_cao_xu_huong_SHC_*.xlsx mới nhất)
+    """
+
+    def __init__(self, df_detail, shc_table):
+        self.df_detail = df_detail
+        self.shc_table = shc_table
+        # Danh sách NVKT theo thứ tự xuất hiện trong file (giống drop_duplicates)
+        self.people = list(df_detail[['don_vi', 'nvkt']].drop_duplicates().itertuples(index=False, name=None))
+        short_names = {don_vi: _get_short_name(str(don_vi)) for don_vi in df_detail['don_vi'].dropna().unique()}
+        self._rows = {}
+        for position, (don_vi, nvkt_name) in enumerate(zip(df_detail['don_vi'], df_detail['nvkt'])):
+            key = (nvkt_name, short_names[don_vi] if pd.notna(don_vi) else None)
+            self._rows.setdefault(key, position)
+
+    @classmethod
+    def load(cls, detail_file, shc_folder="downloads/baocao_hanoi"):
+        return cls(read_excel(detail_file), load_shc_trend_table(shc_folder))
+
+    def nvkt_data(self, nvkt_name, don_vi, match_missing_unit=False):
+        """
+        Dữ liệu KPI của 1 NVKT (dict) hoặc None nếu không có
+
+        match_missing_unit: True = don_vi NaN khớp các dòng không có đơn vị
+        (mặc định như _match_unit: không khớp)
+        """
+        if pd.isna(don_vi) and not match_missing_unit:
+            return None
+        short = _get_short_name(str(don_vi)) if pd.notna(don_vi) else None
+        position = self._rows.get((nvkt_name, short))
+        if position is None:
+            return None
+        return self.df_detail.iloc[position].to_dict()
+
+    def shc_data(self, nvkt_name):
+        return self.shc_table.get(nvkt_name, {})
+
+
+def build_individual_kpi_document(nvkt_name, short_name, nvkt_data, report_month, shc_data=None,
+                                  after_exclusion=False):
+    """
+    Dựng document Word báo cáo KPI của 1 NVKT từ dữ liệu đã nạp sẵn (không đọc file)
     
     Args:
-        nvkt_name: Tên NVKT (vd: "Bùi Văn Duẩn")
-        don_vi: Tên đơn vị/tổ (vd: "Tổ Kỹ thuật Địa bàn Phúc Thọ")
-        kpi_folder: Thư mục chứa file KPI
-        output_folder: Thư mục xuất báo cáo
+        nvkt_name: Tên NVKT
+        short_name: Tên ngắn đơn vị
+        nvkt_data: Dictionary dữ liệu KPI của NVKT
         report_month: Tháng báo cáo (vd: "01/2026")
+        shc_data: Dữ liệu SHC của NVKT (None = tự đọc, {} = không có)
+        after_exclusion: True = mẫu báo cáo sau giảm trừ
     
     Returns:
-        str: Đường dẫn file Word đã tạo
+        Document
     """
-    # Xác định tháng báo cáo
-    if report_month is None:
-        report_month = datetime.now().strftime("%m/%Y")
-    
-    # Đọc dữ liệu KPI chi tiết
-    kpi_path = Path(kpi_folder)
-    detail_file = kpi_path / "KPI_NVKT_ChiTiet.xlsx"
-    df_detail = pd.read_excel(detail_file)
-    
-    # Lọc dữ liệu cho NVKT cụ thể
-    nvkt_df = _match_unit(df_detail[df_detail['nvkt'] == nvkt_name], 'don_vi', don_vi)
-    
-    if nvkt_df.empty:
-        print(f"⚠️ Không tìm thấy dữ liệu cho NVKT: {nvkt_name} - {don_vi}")
-        return None
-    
-    nvkt_data = nvkt_df.iloc[0].to_dict()
-    
-    # Tạo thư mục output theo tổ
-    short_name = _get_short_name(don_vi)
-    folder_name = sanitize_filename(short_name)
-    output_path = Path(output_folder) / "individual_reports" / folder_name
-    output_path.mkdir(parents=True, exist_ok=True)
-    
     # Tạo document
     doc = Document()
     
@@ -5325,8 +5238,17 @@ def generate_individual_kpi_report(nvkt_name, don_vi, kpi_folder=DEFAULT_KPI_FOL
     # =========================================================================
     created_time = datetime.now().strftime('%d/%m/%Y %H:%M')
     
+    if after_exclusion:
+        header = doc.sections[0].header
+        p = header.paragraphs[0]
+        p.text = f"BÁO CÁO KẾT QUẢ KPI CÁ NHÂN - THÁNG {report_month} (SAU GIẢM TRỪ)"
+        p.alignment = WD_ALIGN_PARAGRAPH.CENTER
+
     title = doc.add_heading(level=0)
-    title_run = title.add_run('BÁO CÁO KẾT QUẢ BSC/KPI CÁ NHÂN')
+    title_text = 'BÁO CÁO KẾT QUẢ BSC/KPI CÁ NHÂN'
+    if after_exclusion:
+        title_text += ' (SAU GIẢM TRỪ)'
+    title_run = title.add_run(title_text)
     title_run.font.size = Pt(18)
     title_run.font.bold = True
     title.alignment = WD_ALIGN_PARAGRAPH.CENTER
@@ -5362,7 +5284,8 @@ def generate_individual_kpi_report(nvkt_name, don_vi, kpi_folder=DEFAULT_KPI_FOL
     
     # Bảng tổng hợp
     add_individual_summary_table(doc, nvkt_data)
-    doc.add_paragraph()
+    if not after_exclusion:
+        doc.add_paragraph()
     
     # Biểu đồ radar
     try:
@@ -5371,7 +5294,8 @@ def generate_individual_kpi_report(nvkt_name, don_vi, kpi_folder=DEFAULT_KPI_FOL
         last_paragraph = doc.paragraphs[-1]
         last_paragraph.alignment = WD_ALIGN_PARAGRAPH.CENTER
     except Exception as e:
-        print(f"   ⚠️ Không thể tạo biểu đồ radar: {e}")
+        if not after_exclusion:
+            print(f"   ⚠️ Không thể tạo biểu đồ radar: {e}")
     
     doc.add_page_break()
     
@@ -5392,28 +5316,156 @@ def generate_individual_kpi_report(nvkt_name, don_vi, kpi_folder=DEFAULT_KPI_FOL
     # =========================================================================
     # PHẦN 6: SỐ LIỆU SUY HAO CAO
     # =========================================================================
-    add_individual_shc_section(doc, nvkt_name, data_folder="downloads/baocao_hanoi")
+    add_individual_shc_section(doc, nvkt_name, data_folder="downloads/baocao_hanoi", shc_data=shc_data)
     
-    # =========================================================================
-    # LƯU FILE
-    # =========================================================================
-    safe_name = sanitize_filename(nvkt_name)
-    output_file = output_path / f"Bao_cao_KPI_{safe_name}_{report_month.replace('/', '_')}.docx"
+    return doc
+
+
+def _render_individual_report(task):
+    """
+    Worker tạo 1 báo cáo cá nhân (chạy trong process con): dựng document, vẽ
+    biểu đồ matplotlib, lưu file .docx
+
+    Returns:
+        tuple: (đường dẫn file, số giây xử lý)
+    """
+    started = time.perf_counter()
+    output_file = Path(task['output_file'])
+    output_file.parent.mkdir(parents=True, exist_ok=True)
+    doc = build_individual_kpi_document(
+        nvkt_name=task['nvkt_name'],
+        short_name=task['short_name'],
+        nvkt_data=task['nvkt_data'],
+        report_month=task['report_month'],
+        shc_data=task['shc_data'],
+        after_exclusion=task['after_exclusion']
+    )
     doc.save(output_file)
-    
-    return str(output_file)
+    return str(output_file), time.perf_counter() - started
+
+
+def render_individual_reports(tasks, workers=None):
+    """
+    Tạo hàng loạt báo cáo cá nhân, chia việc dựng document + vẽ biểu đồ cho
+    process pool, in tiến độ và thống kê thời gian
+
+    Args:
+        tasks: Danh sách dict (nvkt_name, short_name, nvkt_data, report_month,
+               shc_data, after_exclusion, output_file)
+        workers: Số process (None = DEFAULT_REPORT_WORKERS, 1 = chạy tuần tự trong process hiện tại)
+
+    Returns:
+        list: Danh sách (task, đường dẫn file hoặc None, số giây, lỗi hoặc None) theo thứ tự tasks
+    """
+    workers = DEFAULT_REPORT_WORKERS if workers is None else workers
+    if workers < 1:
+        raise ValueError("workers phải >= 1")
+    total = len(tasks)
+    workers = min(workers, total) if total else 1
+    results = [None] * total
+    started = time.perf_counter()
+
+    def report(done, index, output_file, seconds, error):
+        task = tasks[index]
+        results[index] = (task, output_file, seconds, error)
+        status = f"✅ {seconds:.2f}s" if error is None else f"❌ ({str(error)[:60]})"
+        print(f"   [{done}/{total}] {task['nvkt_name']} ({task['short_name']}) {status}")
+
+    print(f"⚙️ Tạo {total} báo cáo với {workers} process")
+    if workers == 1:
+        for index, task in enumerate(tasks):
+            try:
+                output_file, seconds = _render_individual_report(task)
+                report(index + 1, index, output_file, seconds, None)
+            except Exception as e:
+                report(index + 1, index, None, 0.0, e)
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = {executor.submit(_render_individual_report, task): index for index, task in enumerate(tasks)}
+            for done, future in enumerate(as_completed(futures), start=1):
+                index = futures[future]
+                try:
+                    output_file, seconds = future.result()
+                    report(done, index, output_file, seconds, None)
+                except Exception as e:
+                    report(done, index, None, 0.0, e)
+
+    elapsed = time.perf_counter() - started
+    render_seconds = sum(seconds for _, _, seconds, _ in results)
+    if total:
+        print(
+            f"⏱️ Tổng thời gian: {elapsed:.1f}s | xử lý {render_seconds:.1f}s "
+            f"(TB {render_seconds / total:.2f}s/báo cáo) | song song x{render_seconds / elapsed if elapsed else 1:.1f}"
+        )
+    return results
+
+
+def generate_individual_kpi_report(nvkt_name, don_vi, kpi_folder=DEFAULT_KPI_FOLDER,
+                                    output_folder=DEFAULT_OUTPUT_FOLDER, report_month=None, data=None):
+    """
+    Tạo báo cáo Word cho 1 NVKT cụ thể
+
+    Args:
+        nvkt_name: Tên NVKT (vd: "Bùi Văn Duẩn")
+        don_vi: Tên đơn vị/tổ (vd: "Tổ Kỹ thuật Địa bàn Phúc Thọ")
+        kpi_folder: Thư mục chứa file KPI
+        output_folder: Thư mục xuất báo cáo
+        report_month: Tháng báo cáo (vd: "01/2026")
+        data: IndividualReportData đã nạp sẵn (None = đọc từ kpi_folder)
+
+    Returns:
+        str: Đường dẫn file Word đã tạo
+    """
+    # Xác định tháng báo cáo
+    if report_month is None:
+        report_month = datetime.now().strftime("%m/%Y")
+
+    # Đọc dữ liệu KPI chi tiết
+    if data is None:
+        data = IndividualReportData.load(Path(kpi_folder) / "KPI_NVKT_ChiTiet.xlsx")
 
+    # Lọc dữ liệu cho NVKT cụ thể
+    nvkt_data = data.nvkt_data(nvkt_name, don_vi)
+
+    if nvkt_data is None:
+        print(f"⚠️ Không tìm thấy dữ liệu cho NVKT: {nvkt_name} - {don_vi}")
+        return None
+
+    task = _individual_report_task(nvkt_name, don_vi, nvkt_data, data, output_folder, report_month)
+    output_file, _ = _render_individual_report(task)
+    return output_file
+
+
+def _individual_report_task(nvkt_name, don_vi, nvkt_data, data, output_folder, report_month):
+    # Thư mục output theo tổ
+    short_name = _get_short_name(don_vi)
+    folder_name = sanitize_filename(short_name)
+    safe_name = sanitize_filename(nvkt_name)
+    output_file = (Path(output_folder) / "individual_reports" / folder_name
+                   / f"Bao_cao_KPI_{safe_name}_{report_month.replace('/', '_')}.docx")
+    return {
+        'nvkt_name': nvkt_name,
+        'short_name': short_name,
+        'nvkt_data': nvkt_data,
+        'report_month': report_month,
+        'shc_data': data.shc_data(nvkt_name),
+        'after_exclusion': False,
+        'output_file': str(output_file)
+    }
 
 
 def generate_all_individual_reports(kpi_folder=DEFAULT_KPI_FOLDER, output_folder=DEFAULT_OUTPUT_FOLDER, 
-                                     report_month=None):
+                                     report_month=None, workers=None):
     """
     Tạo báo cáo cho TẤT CẢ NVKT
+
+    Dữ liệu KPI và SHC được nạp 1 lần, việc dựng document/vẽ biểu đồ chia cho process pool.
     
     Args:
         kpi_folder: Thư mục chứa file KPI
         output_folder: Thư mục xuất báo cáo
         report_month: Tháng báo cáo
+        workers: Số process song song (None = DEFAULT_REPORT_WORKERS)
     
     Returns:
         list: Danh sách đường dẫn các file đã tạo
@@ -5425,46 +5477,27 @@ def generate_all_individual_reports(kpi_folder=DEFAULT_KPI_FOLDER, output_folder
     if report_month is None:
         report_month = datetime.now().strftime("%m/%Y")
     
-    # Đọc dữ liệu KPI
+    # Đọc dữ liệu KPI + SHC 1 lần cho cả lô
     kpi_path = Path(kpi_folder)
-    detail_file = kpi_path / "KPI_NVKT_ChiTiet.xlsx"
-    df_detail = pd.read_excel(detail_file)
-    
-    # Lấy danh sách NVKT
-    nvkt_list = df_detail[['don_vi', 'nvkt']].drop_duplicates()
-    total = len(nvkt_list)
+    data = IndividualReportData.load(kpi_path / "KPI_NVKT_ChiTiet.xlsx")
+    total = len(data.people)
     
     print(f"📊 Tìm thấy {total} NVKT")
     print()
     
-    success_files = []
+    tasks = []
     failed_count = 0
-    
-    for idx, row in nvkt_list.iterrows():
-        don_vi = row['don_vi']
-        nvkt_name = row['nvkt']
-        short_name = _get_short_name(don_vi)
-        
-        current = len(success_files) + failed_count + 1
-        print(f"   [{current}/{total}] {nvkt_name} ({short_name})...", end=" ")
-        
-        try:
-            result = generate_individual_kpi_report(
-                nvkt_name=nvkt_name,
-                don_vi=don_vi,
-                kpi_folder=kpi_folder,
-                output_folder=output_folder,
-                report_month=report_month
-            )
-            if result:
-                success_files.append(result)
-                print("✅")
-            else:
-                failed_count += 1
-                print("❌ (không có dữ liệu)")
-        except Exception as e:
+    for don_vi, nvkt_name in data.people:
+        nvkt_data = data.nvkt_data(nvkt_name, don_vi)
+        if nvkt_data is None:
             failed_count += 1
-            print(f"❌ ({str(e)[:30]})")
+            print(f"   {nvkt_name} ({_get_short_name(don_vi)})... ❌ (không có dữ liệu)")
+            continue
+        tasks.append(_individual_report_task(nvkt_name, don_vi, nvkt_data, data, output_folder, report_month))
+    
+    results = render_individual_reports(tasks, workers=workers)
+    success_files = [output_file for _, output_file, _, error in results if error is None]
+    failed_count += len(results) - len(success_files)
     
     print()
     print("="*60)
@@ -5477,7 +5510,7 @@ def generate_all_individual_reports(kpi_folder=DEFAULT_KPI_FOLDER, output_folder
     return success_files
 
 
-def generate_all_individual_reports_after_exclusion(kpi_folder, output_root, report_month=None):
+def generate_all_individual_reports_after_exclusion(kpi_folder, output_root, report_month=None, workers=None):
     """
     Tạo báo cáo cá nhân sau giảm trừ, phân loại theo thư mục Tổ kỹ thuật
     Lưu tại: {output_root}/ca_nhan/{tên tổ kỹ thuật}/
@@ -5491,134 +5524,44 @@ def generate_all_individual_reports_after_exclusion(kpi_folder, output_root, rep
         
     kpi_path = Path(kpi_folder)
     detail_file = kpi_path / "KPI_NVKT_SauGiamTru_ChiTiet.xlsx"
-    summary_file = kpi_path / "KPI_NVKT_SauGiamTru_TomTat.xlsx"
     
     if not detail_file.exists():
         print(f"❌ Không tìm thấy file: {detail_file}")
         return 0
         
-    df_detail = pd.read_excel(detail_file)
-    nvkt_list = df_detail[['don_vi', 'nvkt']].drop_duplicates()
-    total = len(nvkt_list)
+    data = IndividualReportData.load(detail_file)
+    total = len(data.people)
     
     print(f"📊 Tìm thấy {total} NVKT sau giảm trừ")
     
-    success_count = 0
-    for idx, row in nvkt_list.iterrows():
-        don_vi = row['don_vi']
-        nvkt_name = row['nvkt']
-        
+    current_date = datetime.now().strftime("%d_%m_%Y")
+    tasks = []
+    for don_vi, nvkt_name in data.people:
         # Đảm bảo don_vi là chuỗi
         don_vi_str = str(don_vi) if pd.notna(don_vi) else "Unknown"
         
-        # Tạo thư mục cho từng Đội (Tổ)
+        # Lấy data NVKT - logic lọc an toàn với NaN
+        nvkt_data = data.nvkt_data(nvkt_name, don_vi, match_missing_unit=True)
+        if nvkt_data is None:
+            print(f"   {nvkt_name} ({don_vi})... ❌ (Không tìm thấy data)")
+            continue
+
+        # Thư mục cho từng Đội (Tổ)
         team_folder_name = sanitize_filename(don_vi_str)
-        team_output_path = Path(output_root) / "ca_nhan" / team_folder_name
-        team_output_path.mkdir(parents=True, exist_ok=True)
-        
-        current = success_count + 1
-        print(f"   [{current}/{total}] {nvkt_name} ({don_vi})...", end=" ")
+        safe_name = sanitize_filename(nvkt_name)
+        output_file = Path(output_root) / "ca_nhan" / team_folder_name / f"{safe_name}_Bao_cao_KPI_{current_date}.docx"
+        tasks.append({
+            'nvkt_name': nvkt_name,
+            'short_name': _get_short_name(don_vi_str),
+            'nvkt_data': nvkt_data,
+            'report_month': report_month,
+            'shc_data': data.shc_data(nvkt_name),
+            'after_exclusion': True,
+            'output_file': str(output_file)
+        })
         
-        try:
-            # Tạo document mới
-            doc = Document()
-            
-            # Thiết lập style mặc định cho doc
-            style = doc.styles['Normal']
-            style.font.name = 'Times New Roman'
-            style.font.size = Pt(12)
-            
-            # Lấy data NVKT
-            # Lấy data NVKT - sử dụng logic lọc an toàn với NaN
-            if pd.isna(don_vi):
-                mask = (df_detail['nvkt'] == nvkt_name) & (df_detail['don_vi'].isna())
-            else:
-                nvkt_filtered = df_detail[df_detail['nvkt'] == nvkt_name]
-                nvkt_df_match_temp = _match_unit(nvkt_filtered, 'don_vi', don_vi)
-                mask = df_detail.index.isin(nvkt_df_match_temp.index)
-            
-            nvkt_df_match = df_detail[mask]
-            if nvkt_df_match.empty:
-                print(f"❌ (Không tìm thấy data)")
-                continue
-                
-            nvkt_data = nvkt_df_match.iloc[0].to_dict()
-            
-            short_name = _get_short_name(don_vi_str)
-            created_time = datetime.now().strftime("%d/%m/%Y %H:%M")
-            
-            # Header
-            header = doc.sections[0].header
-            p = header.paragraphs[0]
-            p.text = f"BÁO CÁO KẾT QUẢ KPI CÁ NHÂN - THÁNG {report_month} (SAU GIẢM TRỪ)"
-            p.alignment = WD_ALIGN_PARAGRAPH.CENTER
-            
-            # Title
-            title = doc.add_heading(level=0)
-            title_run = title.add_run('BÁO CÁO KẾT QUẢ BSC/KPI CÁ NHÂN (SAU GIẢM TRỪ)')
-            title_run.font.size = Pt(18)
-            title_run.font.bold = True
-            title.alignment = WD_ALIGN_PARAGRAPH.CENTER
-            
-            subtitle = doc.add_heading(level=1)
-            subtitle_run = subtitle.add_run(f'THÁNG {report_month}')
-            subtitle_run.font.size = Pt(16)
-            subtitle.alignment = WD_ALIGN_PARAGRAPH.CENTER
-            
-            doc.add_paragraph()
-            
-            # Thông tin cá nhân
-            info_table = doc.add_table(rows=3, cols=2)
-            info_table.style = 'Table Grid'
-            info_data = [
-                ('Họ và tên:', nvkt_name),
-                ('Đơn vị:', short_name),
-                ('Ngày tạo báo cáo:', created_time)
-            ]
-            for i, (label, value) in enumerate(info_data):
-                info_table.rows[i].cells[0].text = label
-                info_table.rows[i].cells[0].paragraphs[0].runs[0].font.bold = True
-                info_table.rows[i].cells[1].text = value
-            
-            doc.add_paragraph()
-            
-            # Phần 1: Tổng quan
-            doc.add_heading('1. TỔNG QUAN ĐIỂM KPI', level=2)
-            add_individual_summary_table(doc, nvkt_data)
-            
-            # Biểu đồ radar
-            try:
-                radar_chart = create_individual_radar_chart(nvkt_data)
-                doc.add_picture(radar_chart, width=Inches(5))
-                doc.paragraphs[-1].alignment = WD_ALIGN_PARAGRAPH.CENTER
-            except:
-                pass
-                
-            doc.add_page_break()
-            
-            # Chi tiết từng chỉ tiêu
-            add_individual_c11_detail(doc, nvkt_data)
-            doc.add_paragraph()
-            add_individual_c12_detail(doc, nvkt_data)
-            doc.add_paragraph()
-            add_individual_c14_detail(doc, nvkt_data)
-            doc.add_paragraph()
-            add_individual_c15_detail(doc, nvkt_data)
-            
-            # Suy hao cao - truyền data_folder mặc định
-            add_individual_shc_section(doc, nvkt_name, data_folder="downloads/baocao_hanoi")
-            
-            # Lưu file
-            safe_name = sanitize_filename(nvkt_name)
-            current_date = datetime.now().strftime("%d_%m_%Y")
-            filename = f"{safe_name}_Bao_cao_KPI_{current_date}.docx"
-            output_file = team_output_path / filename
-            doc.save(output_file)
-            
-            success_count += 1
-            print("✅")
-        except Exception as e:
-            print(f"❌ (Lỗi: {e})")
+    results = render_individual_reports(tasks, workers=workers)
+    success_count = sum(1 for _, _, _, error in results if error is None)
             
     print(f"\n✅ Hoàn thành: Đã tạo {success_count}/{total} báo cáo cá nhân sau giảm trừ.")
     print(f"📁 Thư mục xuất: {output_root}/ca_nhan/")
@@ -5647,6 +5590,8 @@ if __name__ == "__main__":
                        help='Thư mục chứa file KPI')
     parser.add_argument('--output-folder', type=str, default="downloads/reports",
                        help='Thư mục xuất báo cáo')
+    parser.add_argument('--workers', type=int, default=DEFAULT_REPORT_WORKERS,
+                       help='Số process tạo báo cáo cá nhân song song (1 = tuần tự)')
     
     args = parser.parse_args()
     
@@ -5656,7 +5601,8 @@ if __name__ == "__main__":
             generate_all_individual_reports(
                 kpi_folder=args.kpi_folder,
                 output_folder=args.output_folder,
-                report_month=args.month
+                report_month=args.month,
+                workers=args.workers
             )
         elif args.nvkt and args.donvi:
             # Tạo báo cáo cho 1 NVKT cụ thể
@@ -5694,6 +5640,8 @@ if __name__ == "__main__":
         generate_all_individual_reports(
             kpi_folder=args.kpi_folder,
             output_folder=args.output_folder,
-            report_month=args.month
+            report_month=args.month,
+            workers=args.workers
         )
 
+    prune_stale_charts()
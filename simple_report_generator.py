@@ -18,9 +18,10 @@ from docx.shared import Inches, Pt, Cm, RGBColor
 from docx.enum.text import WD_ALIGN_PARAGRAPH
 from docx.oxml.ns import qn
 from docx.oxml import OxmlElement
-import io
 import os
 
+from api_transition.chart_cache import cached_chart, chart_figure, prune_stale_charts, save_chart
+
 # Thiết lập matplotlib
 matplotlib.rcParams['font.family'] = 'DejaVu Sans'
 matplotlib.use('Agg')
@@ -413,6 +414,7 @@ def add_c15_detail_table(doc, df):
 # =============================================================================
 # TẠO BIỂU ĐỒ
 # =============================================================================
+@cached_chart
 def create_bsc_bar_chart(reports):
     """Biểu đồ cột nhóm: Điểm BSC 5 chỉ tiêu theo đơn vị"""
     teams_data = {}
@@ -469,7 +471,7 @@ def create_bsc_bar_chart(reports):
 
     # Vẽ biểu đồ
     chi_tieus = ['C1.1', 'C1.2', 'C1.3', 'C1.4', 'C1.5']
-    fig, ax = plt.subplots(figsize=(12, 6))
+    fig, ax = chart_figure((12, 6))
 
     x = np.arange(len(teams))
     width = 0.15
@@ -495,14 +497,10 @@ def create_bsc_bar_chart(reports):
     ax.grid(axis='y', linestyle='--', alpha=0.5)
     ax.axhline(y=5, color='green', linestyle=':', alpha=0.5, label='Mục tiêu')
 
-    plt.tight_layout()
-    buf = io.BytesIO()
-    plt.savefig(buf, format='png', dpi=150, bbox_inches='tight')
-    plt.close()
-    buf.seek(0)
-    return buf
+    return save_chart(fig)
 
 
+@cached_chart
 def create_radar_chart(reports):
     """Biểu đồ radar tổng hợp 5 chỉ tiêu BSC"""
     teams_data = {}
@@ -562,7 +560,7 @@ def create_radar_chart(reports):
     angles = np.linspace(0, 2 * np.pi, len(chi_tieus), endpoint=False).tolist()
     angles += angles[:1]  # Đóng vòng
 
-    fig, ax = plt.subplots(figsize=(8, 8), subplot_kw=dict(polar=True))
+    fig, ax = chart_figure((8, 8), polar=True)
 
     colors = CHART_COLORS[:len(teams)]
     for i, team in enumerate(teams):
@@ -578,14 +576,10 @@ def create_radar_chart(reports):
     ax.legend(loc='upper right', bbox_to_anchor=(1.3, 1.1), fontsize=10)
     ax.grid(True)
 
-    plt.tight_layout()
-    buf = io.BytesIO()
-    plt.savefig(buf, format='png', dpi=150, bbox_inches='tight')
-    plt.close()
-    buf.seek(0)
-    return buf
+    return save_chart(fig)
 
 
+@cached_chart
 def create_single_indicator_chart(reports, chi_tieu_key, title, value_col, don_vi_col='Đơn vị', color='#2196F3'):
     """Biểu đồ cột cho 1 chỉ tiêu cụ thể"""
     if chi_tieu_key not in reports:
@@ -605,7 +599,7 @@ def create_single_indicator_chart(reports, chi_tieu_key, title, value_col, don_v
         teams.append(short)
         values.append(val)
 
-    fig, ax = plt.subplots(figsize=(10, 5))
+    fig, ax = chart_figure((10, 5))
     bars = ax.bar(teams, values, color=color, alpha=0.85, edgecolor='white', linewidth=1.5)
 
     for bar, val in zip(bars, values):
@@ -617,12 +611,7 @@ def create_single_indicator_chart(reports, chi_tieu_key, title, value_col, don_v
     ax.set_ylim(0, max(values) * 1.2 + 1 if values else 6)
     ax.grid(axis='y', linestyle='--', alpha=0.5)
 
-    plt.tight_layout()
-    buf = io.BytesIO()
-    plt.savefig(buf, format='png', dpi=150, bbox_inches='tight')
-    plt.close()
-    buf.seek(0)
-    return buf
+    return save_chart(fig)
 
 
 def add_shc_detail_table(doc, df_shc):
@@ -664,6 +653,7 @@ def add_shc_detail_table(doc, df_shc):
     doc.add_paragraph()
 
 
+@cached_chart
 def create_shc_bar_chart(df_shc):
     """Biểu đồ cột: Số SHC ngày gần nhất theo đơn vị"""
     if df_shc is None or df_shc.empty:
@@ -677,7 +667,7 @@ def create_shc_bar_chart(df_shc):
     teams = [get_short_name(r['Đơn vị']) for _, r in df_shc.iterrows()]
     values = [int(r.get(last_date, 0)) for _, r in df_shc.iterrows()]
 
-    fig, ax = plt.subplots(figsize=(10, 5))
+    fig, ax = chart_figure((10, 5))
     colors_bar = ['#EF5350', '#42A5F5', '#66BB6A', '#FFA726']
     bars = ax.bar(teams, values, color=colors_bar[:len(teams)], alpha=0.85, edgecolor='white', linewidth=1.5)
 
@@ -690,14 +680,10 @@ def create_shc_bar_chart(df_shc):
     ax.set_ylim(0, max(values) * 1.3 + 1 if values else 10)
     ax.grid(axis='y', linestyle='--', alpha=0.5)
 
-    plt.tight_layout()
-    buf = io.BytesIO()
-    plt.savefig(buf, format='png', dpi=150, bbox_inches='tight')
-    plt.close()
-    buf.seek(0)
-    return buf
+    return save_chart(fig)
 
 
+@cached_chart
 def create_shc_trend_chart(df_shc):
     """Biểu đồ đường: Xu hướng SHC theo ngày cho từng đơn vị"""
     if df_shc is None or df_shc.empty:
@@ -717,7 +703,7 @@ def create_shc_trend_chart(df_shc):
         else:
             short_dates.append(s[:5])
 
-    fig, ax = plt.subplots(figsize=(12, 6))
+    fig, ax = chart_figure((12, 6))
     colors_line = ['#EF5350', '#42A5F5', '#66BB6A', '#FFA726']
     markers = ['o', 's', '^', 'D']
 
@@ -737,14 +723,9 @@ def create_shc_trend_chart(df_shc):
     ax.set_title('XU HƯỚNG SUY HAO CAO THEO ĐƠN VỊ', fontsize=14, fontweight='bold')
     ax.legend(loc='upper right', fontsize=10)
     ax.grid(True, linestyle='--', alpha=0.5)
-    plt.xticks(rotation=45, ha='right')
+    plt.setp(ax.get_xticklabels(), rotation=45, ha='right')
 
-    plt.tight_layout()
-    buf = io.BytesIO()
-    plt.savefig(buf, format='png', dpi=150, bbox_inches='tight')
-    plt.close()
-    buf.seek(0)
-    return buf
+    return save_chart(fig)
 
 
 # =============================================================================
@@ -959,3 +940,4 @@ if __name__ == "__main__":
     )
     if output:
         print(f"\n🎉 Hoàn thành! File: {output}")
+    prune_stale_charts()
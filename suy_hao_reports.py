@@ -8,6 +8,8 @@ import sqlite3
 import os
 from datetime import datetime, timedelta
 
+from suy_hao_rollups import ensure_rollups, load_accounts_in_range, load_daily_counts
+
 
 def _build_daily_comparison(conn, today_date, yesterday_date):
     """
@@ -378,6 +380,7 @@ def generate_weekly_report(year, week_number, output_file=None):
         return None
 
     conn = sqlite3.connect(db_path)
+    ensure_rollups(conn)
 
     # Tính ngày bắt đầu và kết thúc tuần
     week_start = datetime.strptime(f'{year}-W{week_number:02d}-1', '%Y-W%W-%w')
@@ -390,21 +393,9 @@ def generate_weekly_report(year, week_number, output_file=None):
     print(f"✓ Tuần hiện tại: {week_start.strftime('%d/%m/%Y')} - {week_end.strftime('%d/%m/%Y')}")
     print(f"✓ Tuần trước: {prev_week_start.strftime('%d/%m/%Y')} - {prev_week_end.strftime('%d/%m/%Y')}")
 
-    # Lấy danh sách thuê bao tuần hiện tại
-    df_current = pd.read_sql_query(f"""
-        SELECT DISTINCT account_cts, doi_one, nvkt_db_normalized, sa, ten_tb_one
-        FROM suy_hao_snapshots
-        WHERE ngay_bao_cao BETWEEN '{week_start.strftime('%Y-%m-%d')}'
-          AND '{week_end.strftime('%Y-%m-%d')}'
-    """, conn)
-
-    # Lấy danh sách thuê bao tuần trước
-    df_previous = pd.read_sql_query(f"""
-        SELECT DISTINCT account_cts, doi_one, nvkt_db_normalized, sa, ten_tb_one
-        FROM suy_hao_snapshots
-        WHERE ngay_bao_cao BETWEEN '{prev_week_start.strftime('%Y-%m-%d')}'
-          AND '{prev_week_end.strftime('%Y-%m-%d')}'
-    """, conn)
+    # Lấy danh sách thuê bao tuần hiện tại / tuần trước (từ rollup đoạn ngày)
+    df_current = load_accounts_in_range(conn, week_start, week_end)
+    df_previous = load_accounts_in_range(conn, prev_week_start, prev_week_end)
 
     print(f"\n✓ Tuần hiện tại: {len(df_current)} thuê bao")
     print(f"✓ Tuần trước: {len(df_previous)} thuê bao")
@@ -442,12 +433,12 @@ def generate_weekly_report(year, week_number, output_file=None):
     df_summary['ty_le_thay_doi'] = df_summary['ty_le_thay_doi'].replace([float('inf'), -float('inf')], 0)
 
     # Lấy thông tin tỉ lệ SHC từ suy_hao_daily_summary (ngày cuối tuần)
-    df_ratio = pd.read_sql_query(f"""
+    df_ratio = pd.read_sql_query("""
         SELECT doi_one, nvkt_db_normalized, so_tb_quan_ly, ty_le_shc
         FROM suy_hao_daily_summary
         WHERE ngay_bao_cao = (SELECT MAX(ngay_bao_cao) FROM suy_hao_daily_summary 
-                              WHERE ngay_bao_cao <= '{week_end.strftime('%Y-%m-%d')}')
-    """, conn)
+                              WHERE ngay_bao_cao <= ?)
+    """, conn, params=(week_end.strftime('%Y-%m-%d'),))
     
     if len(df_ratio) > 0:
         df_summary = df_summary.merge(
@@ -525,6 +516,7 @@ def generate_monthly_report(year, month, output_file=None):
         return None
 
     conn = sqlite3.connect(db_path)
+    ensure_rollups(conn)
 
     # Tháng hiện tại
     month_start = datetime(year, month, 1)
@@ -544,21 +536,9 @@ def generate_monthly_report(year, month, output_file=None):
     print(f"✓ Tháng hiện tại: {month_start.strftime('%d/%m/%Y')} - {month_end.strftime('%d/%m/%Y')}")
     print(f"✓ Tháng trước: {prev_month_start.strftime('%d/%m/%Y')} - {prev_month_end.strftime('%d/%m/%Y')}")
 
-    # Lấy danh sách thuê bao tháng hiện tại
-    df_current = pd.read_sql_query(f"""
-        SELECT DISTINCT account_cts, doi_one, nvkt_db_normalized, sa, ten_tb_one
-        FROM suy_hao_snapshots
-        WHERE ngay_bao_cao BETWEEN '{month_start.strftime('%Y-%m-%d')}'
-          AND '{month_end.strftime('%Y-%m-%d')}'
-    """, conn)
-
-    # Lấy danh sách thuê bao tháng trước
-    df_previous = pd.read_sql_query(f"""
-        SELECT DISTINCT account_cts, doi_one, nvkt_db_normalized, sa, ten_tb_one
-        FROM suy_hao_snapshots
-        WHERE ngay_bao_cao BETWEEN '{prev_month_start.strftime('%Y-%m-%d')}'
-          AND '{prev_month_end.strftime('%Y-%m-%d')}'
-    """, conn)
+    # Lấy danh sách thuê bao tháng hiện tại / tháng trước (từ rollup đoạn ngày)
+    df_current = load_accounts_in_range(conn, month_start, month_end)
+    df_previous = load_accounts_in_range(conn, prev_month_start, prev_month_end)
 
     print(f"\n✓ Tháng hiện tại: {len(df_current)} thuê bao")
     print(f"✓ Tháng trước: {len(df_previous)} thuê bao")
@@ -596,12 +576,12 @@ def generate_monthly_report(year, month, output_file=None):
     df_summary['ty_le_thay_doi'] = df_summary['ty_le_thay_doi'].replace([float('inf'), -float('inf')], 0)
 
     # Lấy thông tin tỉ lệ SHC từ suy_hao_daily_summary (ngày cuối tháng)
-    df_ratio = pd.read_sql_query(f"""
+    df_ratio = pd.read_sql_query("""
         SELECT doi_one, nvkt_db_normalized, so_tb_quan_ly, ty_le_shc
         FROM suy_hao_daily_summary
         WHERE ngay_bao_cao = (SELECT MAX(ngay_bao_cao) FROM suy_hao_daily_summary 
-                              WHERE ngay_bao_cao <= '{month_end.strftime('%Y-%m-%d')}')
-    """, conn)
+                              WHERE ngay_bao_cao <= ?)
+    """, conn, params=(month_end.strftime('%Y-%m-%d'),))
     
     if len(df_ratio) > 0:
         df_summary = df_summary.merge(
@@ -619,16 +599,7 @@ def generate_monthly_report(year, month, output_file=None):
 
     # Thống kê theo ngày trong tháng
     print(f"\n✓ Tạo xu hướng theo ngày...")
-    df_daily = pd.read_sql_query(f"""
-        SELECT
-            ngay_bao_cao,
-            COUNT(DISTINCT account_cts) as so_luong
-        FROM suy_hao_snapshots
-        WHERE ngay_bao_cao BETWEEN '{month_start.strftime('%Y-%m-%d')}'
-          AND '{month_end.strftime('%Y-%m-%d')}'
-        GROUP BY ngay_bao_cao
-        ORDER BY ngay_bao_cao
-    """, conn)
+    df_daily = load_daily_counts(conn, month_start, month_end)
 
     df_daily['ngay_bao_cao'] = pd.to_datetime(df_daily['ngay_bao_cao']).dt.strftime('%d/%m')
     df_daily.columns = ['Ngày', 'Số lượng TB suy hao']
@@ -703,19 +674,10 @@ def generate_trend_report(start_date, end_date, output_file=None):
         return None
 
     conn = sqlite3.connect(db_path)
+    ensure_rollups(conn)
 
     # Xu hướng theo ngày
-    df_daily = pd.read_sql_query(f"""
-        SELECT
-            ngay_bao_cao,
-            doi_one,
-            COUNT(DISTINCT account_cts) as so_luong
-        FROM suy_hao_snapshots
-        WHERE ngay_bao_cao BETWEEN '{start_date.strftime('%Y-%m-%d')}'
-          AND '{end_date.strftime('%Y-%m-%d')}'
-        GROUP BY ngay_bao_cao, doi_one
-        ORDER BY ngay_bao_cao, doi_one
-    """, conn)
+    df_daily = load_daily_counts(conn, start_date, end_date, group_by=('doi_one',))
 
     df_daily['ngay_bao_cao'] = pd.to_datetime(df_daily['ngay_bao_cao']).dt.strftime('%d/%m/%Y')
     df_daily.columns = ['Ngày', 'Đơn vị', 'Số lượng']
@@ -725,18 +687,7 @@ def generate_trend_report(start_date, end_date, output_file=None):
     df_pivot = df_pivot.reset_index()
 
     # Biến động theo NVKT_DB
-    df_nvkt_trend = pd.read_sql_query(f"""
-        SELECT
-            ngay_bao_cao,
-            doi_one,
-            nvkt_db_normalized,
-            COUNT(DISTINCT account_cts) as so_luong
-        FROM suy_hao_snapshots
-        WHERE ngay_bao_cao BETWEEN '{start_date.strftime('%Y-%m-%d')}'
-          AND '{end_date.strftime('%Y-%m-%d')}'
-        GROUP BY ngay_bao_cao, doi_one, nvkt_db_normalized
-        ORDER BY doi_one, nvkt_db_normalized, ngay_bao_cao
-    """, conn)
+    df_nvkt_trend = load_daily_counts(conn, start_date, end_date, group_by=('doi_one', 'nvkt_db_normalized'))
 
     conn.close()
 
@@ -0,0 +1,320 @@
+# -*- coding: utf-8 -*-
+"""
+Lớp tổng hợp sẵn (rollup) cho lịch sử suy hao cao trong suy_hao_history.db
+
+Báo cáo tuần/tháng/xu hướng đọc từ 2 bảng được cập nhật dần mỗi khi nạp
+một ngày mới, thay vì quét lại toàn bộ suy_hao_snapshots:
+
+- suy_hao_rollup_daily: số thuê bao SHC theo (ngày, đơn vị, NVKT).
+- suy_hao_account_intervals: mỗi dòng là 1 đoạn ngày liên tục (theo lịch)
+  mà thuê bao xuất hiện với cùng (đơn vị, NVKT, SA, tên TB). Thuê bao có mặt
+  trong khoảng [a, b] <=> có đoạn giao với [a, b], nên danh sách
+  ``SELECT DISTINCT ...`` theo khoảng ngày chỉ cần đọc các đoạn giao nhau.
+
+Bảng suy_hao_rollup_days ghi lại các ngày đã tổng hợp. DB cũ chưa có rollup
+sẽ được dựng lại toàn bộ ở lần gọi đầu tiên (hoặc chạy tay):
+
+    python suy_hao_rollups.py --rebuild --verify
+"""
+
+import argparse
+import os
+import sqlite3
+from datetime import datetime, timedelta
+
+import pandas as pd
+
+
+ATTR_COLUMNS = ['doi_one', 'nvkt_db_normalized', 'sa', 'ten_tb_one']
+
+
+ROLLUP_SCHEMA = (
+    """
+    CREATE TABLE IF NOT EXISTS suy_hao_rollup_daily (
+        ngay_bao_cao DATE NOT NULL,
+        doi_one TEXT,
+        nvkt_db_normalized TEXT,
+        so_luong INTEGER NOT NULL DEFAULT 0
+    )
+    """,
+    """
+    CREATE INDEX IF NOT EXISTS idx_suy_hao_rollup_daily_ngay
+        ON suy_hao_rollup_daily (ngay_bao_cao)
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS suy_hao_account_intervals (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        account_cts TEXT NOT NULL,
+        doi_one TEXT,
+        nvkt_db_normalized TEXT,
+        sa TEXT,
+        ten_tb_one TEXT,
+        ngay_bat_dau DATE NOT NULL,
+        ngay_ket_thuc DATE NOT NULL
+    )
+    """,
+    """
+    CREATE INDEX IF NOT EXISTS idx_suy_hao_intervals_ket_thuc
+        ON suy_hao_account_intervals (ngay_ket_thuc, ngay_bat_dau)
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS suy_hao_rollup_days (
+        ngay_bao_cao DATE PRIMARY KEY,
+        so_thue_bao INTEGER NOT NULL DEFAULT 0,
+        cap_nhat_luc TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    """,
+)
+
+
+def ensure_rollup_schema(conn):
+    """Tạo các bảng rollup (nếu chưa có). Không dùng executescript để không commit giao dịch đang mở."""
+    for statement in ROLLUP_SCHEMA:
+        conn.execute(statement)
+
+
+def _shift_day(ngay, so_ngay):
+    return (datetime.strptime(ngay, '%Y-%m-%d') + timedelta(days=so_ngay)).strftime('%Y-%m-%d')
+
+
+def _as_iso(ngay):
+    if isinstance(ngay, datetime):
+        return ngay.strftime('%Y-%m-%d')
+    return str(ngay)
+
+
+def refresh_rollup_day(conn, ngay_bao_cao):
+    """
+    Tính lại rollup cho 1 ngày từ suy_hao_snapshots (gọi sau khi ghi/ghi đè
+    snapshot ngày đó). Chi phí tỉ lệ với số thuê bao quanh ngày đó, không phụ
+    thuộc độ dài lịch sử. Không commit.
+    """
+    ensure_rollup_schema(conn)
+    if _needs_rebuild(conn, exclude_day=_as_iso(ngay_bao_cao)):
+        rebuild_rollups(conn)
+        return
+
+    ngay = _as_iso(ngay_bao_cao)
+    ngay_truoc = _shift_day(ngay, -1)
+    ngay_sau = _shift_day(ngay, 1)
+
+    conn.execute("DELETE FROM suy_hao_rollup_daily WHERE ngay_bao_cao = ?", (ngay,))
+    conn.execute("""
+        INSERT INTO suy_hao_rollup_daily (ngay_bao_cao, doi_one, nvkt_db_normalized, so_luong)
+        SELECT ngay_bao_cao, doi_one, nvkt_db_normalized, COUNT(*)
+        FROM suy_hao_snapshots
+        WHERE ngay_bao_cao = ?
+        GROUP BY doi_one, nvkt_db_normalized
+    """, (ngay,))
+
+    hien_dien = conn.execute("""
+        SELECT DISTINCT account_cts, doi_one, nvkt_db_normalized, sa, ten_tb_one
+        FROM suy_hao_snapshots
+        WHERE ngay_bao_cao = ?
+    """, (ngay,)).fetchall()
+
+    # Các đoạn chạm tới ngày này: chứa ngày đó, kết thúc hôm trước hoặc bắt đầu hôm sau.
+    # Bỏ ngày đó khỏi các đoạn rồi nối lại theo dữ liệu mới.
+    lien_quan = conn.execute("""
+        SELECT id, account_cts, doi_one, nvkt_db_normalized, sa, ten_tb_one, ngay_bat_dau, ngay_ket_thuc
+        FROM suy_hao_account_intervals
+        WHERE ngay_ket_thuc >= ? AND ngay_bat_dau <= ?
+    """, (ngay_truoc, ngay_sau)).fetchall()
+
+    ket_thuc_hom_truoc = {}
+    bat_dau_hom_sau = {}
+    for _, *key, bat_dau, ket_thuc in lien_quan:
+        key = tuple(key)
+        if bat_dau <= ngay_truoc:
+            ket_thuc_hom_truoc[key] = bat_dau
+        if ket_thuc >= ngay_sau:
+            bat_dau_hom_sau[key] = ket_thuc
+
+    doan_moi = []
+    for key in hien_dien:
+        bat_dau = ket_thuc_hom_truoc.pop(key, ngay)
+        ket_thuc = bat_dau_hom_sau.pop(key, ngay)
+        doan_moi.append((*key, bat_dau, ket_thuc))
+    doan_moi.extend((*key, bat_dau, ngay_truoc) for key, bat_dau in ket_thuc_hom_truoc.items())
+    doan_moi.extend((*key, ngay_sau, ket_thuc) for key, ket_thuc in bat_dau_hom_sau.items())
+
+    conn.executemany(
+        "DELETE FROM suy_hao_account_intervals WHERE id = ?",
+        [(row[0],) for row in lien_quan],
+    )
+    conn.executemany("""
+        INSERT INTO suy_hao_account_intervals (
+            account_cts, doi_one, nvkt_db_normalized, sa, ten_tb_one, ngay_bat_dau, ngay_ket_thuc
+        ) VALUES (?, ?, ?, ?, ?, ?, ?)
+    """, doan_moi)
+
+    if hien_dien:
+        conn.execute("""
+            INSERT INTO suy_hao_rollup_days (ngay_bao_cao, so_thue_bao)
+            VALUES (?, (SELECT COUNT(*) FROM suy_hao_snapshots WHERE ngay_bao_cao = ?))
+            ON CONFLICT (ngay_bao_cao) DO UPDATE SET
+                so_thue_bao = excluded.so_thue_bao,
+                cap_nhat_luc = CURRENT_TIMESTAMP
+        """, (ngay, ngay))
+    else:
+        conn.execute("DELETE FROM suy_hao_rollup_days WHERE ngay_bao_cao = ?", (ngay,))
+
+
+def rebuild_rollups(conn):
+    """Dựng lại toàn bộ rollup từ suy_hao_snapshots (gaps-and-islands). Không commit."""
+    ensure_rollup_schema(conn)
+    conn.execute("DELETE FROM suy_hao_rollup_daily")
+    conn.execute("DELETE FROM suy_hao_account_intervals")
+    conn.execute("DELETE FROM suy_hao_rollup_days")
+
+    conn.execute("""
+        INSERT INTO suy_hao_rollup_daily (ngay_bao_cao, doi_one, nvkt_db_normalized, so_luong)
+        SELECT ngay_bao_cao, doi_one, nvkt_db_normalized, COUNT(*)
+        FROM suy_hao_snapshots
+        GROUP BY ngay_bao_cao, doi_one, nvkt_db_normalized
+    """)
+
+    # Ngày liên tục cùng thuộc tính => julianday - ROW_NUMBER không đổi
+    conn.execute("""
+        INSERT INTO suy_hao_account_intervals (
+            account_cts, doi_one, nvkt_db_normalized, sa, ten_tb_one, ngay_bat_dau, ngay_ket_thuc
+        )
+        WITH hien_dien AS (
+            SELECT DISTINCT ngay_bao_cao, account_cts, doi_one, nvkt_db_normalized, sa, ten_tb_one
+            FROM suy_hao_snapshots
+        ),
+        nhom AS (
+            SELECT *,
+                   julianday(ngay_bao_cao) - ROW_NUMBER() OVER (
+                       PARTITION BY account_cts, doi_one, nvkt_db_normalized, sa, ten_tb_one
+                       ORDER BY ngay_bao_cao
+                   ) AS dao
+            FROM hien_dien
+        )
+        SELECT account_cts, doi_one, nvkt_db_normalized, sa, ten_tb_one,
+               MIN(ngay_bao_cao), MAX(ngay_bao_cao)
+        FROM nhom
+        GROUP BY account_cts, doi_one, nvkt_db_normalized, sa, ten_tb_one, dao
+    """)
+
+    conn.execute("""
+        INSERT INTO suy_hao_rollup_days (ngay_bao_cao, so_thue_bao)
+        SELECT ngay_bao_cao, COUNT(*)
+        FROM suy_hao_snapshots
+        GROUP BY ngay_bao_cao
+    """)
+
+
+def _needs_rebuild(conn, exclude_day=None):
+    """Rollup trống trong khi snapshots đã có dữ liệu (DB tạo trước khi có rollup)."""
+    if conn.execute("SELECT 1 FROM suy_hao_rollup_days LIMIT 1").fetchone():
+        return False
+    if exclude_day is None:
+        row = conn.execute("SELECT 1 FROM suy_hao_snapshots LIMIT 1").fetchone()
+    else:
+        row = conn.execute(
+            "SELECT 1 FROM suy_hao_snapshots WHERE ngay_bao_cao <> ? LIMIT 1", (exclude_day,)
+        ).fetchone()
+    return row is not None
+
+
+def ensure_rollups(conn):
+    """Đảm bảo có bảng rollup; dựng lại nếu DB chưa từng được tổng hợp."""
+    ensure_rollup_schema(conn)
+    if _needs_rebuild(conn):
+        print("✓ Chưa có rollup suy hao, đang dựng lại từ snapshots...")
+        rebuild_rollups(conn)
+        conn.commit()
+
+
+def load_accounts_in_range(conn, start_date, end_date):
+    """
+    Thuê bao SHC trong khoảng ngày, tương đương
+    ``SELECT DISTINCT account_cts, doi_one, nvkt_db_normalized, sa, ten_tb_one
+    FROM suy_hao_snapshots WHERE ngay_bao_cao BETWEEN ...``.
+    """
+    return pd.read_sql_query("""
+        SELECT DISTINCT account_cts, doi_one, nvkt_db_normalized, sa, ten_tb_one
+        FROM suy_hao_account_intervals
+        WHERE ngay_ket_thuc >= ? AND ngay_bat_dau <= ?
+        ORDER BY account_cts
+    """, conn, params=(_as_iso(start_date), _as_iso(end_date)))
+
+
+def load_daily_counts(conn, start_date, end_date, group_by=()):
+    """
+    Số thuê bao SHC theo ngày (và theo ``group_by`` ⊆ {doi_one, nvkt_db_normalized})
+    trong khoảng ngày, cột kết quả ``so_luong``.
+    """
+    cols = ['ngay_bao_cao'] + [col for col in ('doi_one', 'nvkt_db_normalized') if col in group_by]
+    col_sql = ', '.join(cols)
+    return pd.read_sql_query(f"""
+        SELECT {col_sql}, SUM(so_luong) AS so_luong
+        FROM suy_hao_rollup_daily
+        WHERE ngay_bao_cao BETWEEN ? AND ?
+        GROUP BY {col_sql}
+        ORDER BY {col_sql}
+    """, conn, params=(_as_iso(start_date), _as_iso(end_date)))
+
+
+def verify_rollups(conn):
+    """So sánh rollup với truy vấn trực tiếp snapshots cho từng ngày đã nạp. Trả về số ngày lệch."""
+    days = [row[0] for row in conn.execute(
+        "SELECT DISTINCT ngay_bao_cao FROM suy_hao_snapshots ORDER BY ngay_bao_cao"
+    )]
+    sai = 0
+    for ngay in days:
+        raw = pd.read_sql_query("""
+            SELECT DISTINCT account_cts, doi_one, nvkt_db_normalized, sa, ten_tb_one
+            FROM suy_hao_snapshots
+            WHERE ngay_bao_cao = ?
+            ORDER BY account_cts
+        """, conn, params=(ngay,))
+        from_rollup = load_accounts_in_range(conn, ngay, ngay)
+        raw_count = conn.execute(
+            "SELECT COUNT(DISTINCT account_cts) FROM suy_hao_snapshots WHERE ngay_bao_cao = ?", (ngay,)
+        ).fetchone()[0]
+        rollup_count = int(load_daily_counts(conn, ngay, ngay)['so_luong'].sum())
+        key = ['account_cts'] + ATTR_COLUMNS
+        if raw_count != rollup_count or not raw.sort_values(key).reset_index(drop=True).equals(
+            from_rollup.sort_values(key).reset_index(drop=True)
+        ):
+            print(f"❌ Rollup lệch ngày {ngay}: snapshots {raw_count}, rollup {rollup_count}")
+            sai += 1
+    print(f"✓ Đã kiểm tra {len(days)} ngày, lệch {sai} ngày")
+    return sai
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Quản lý rollup lịch sử suy hao cao")
+    parser.add_argument("--db", default="suy_hao_history.db", help="File database lịch sử suy hao")
+    parser.add_argument("--rebuild", action="store_true", help="Dựng lại toàn bộ rollup từ snapshots")
+    parser.add_argument("--day", help="Chỉ tính lại rollup cho 1 ngày (YYYY-MM-DD)")
+    parser.add_argument("--verify", action="store_true", help="So sánh rollup với snapshots")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.db):
+        print(f"❌ Không tìm thấy database: {args.db}")
+        return 1
+
+    conn = sqlite3.connect(args.db)
+    try:
+        if args.rebuild:
+            rebuild_rollups(conn)
+            conn.commit()
+            print("✅ Đã dựng lại rollup suy hao")
+        elif args.day:
+            refresh_rollup_day(conn, args.day)
+            conn.commit()
+            print(f"✅ Đã cập nhật rollup ngày {args.day}")
+        else:
+            ensure_rollups(conn)
+        if args.verify:
+            return 1 if verify_rollups(conn) else 0
+    finally:
+        conn.close()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
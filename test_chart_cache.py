@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Script test cache biểu đồ: đổi mapping tổ (team_config) thì biểu đồ phải được vẽ lại
+"""
+
+import os
+import sys
+import tempfile
+
+# Thêm thư mục hiện tại vào path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from api_transition import chart_cache
+from api_transition.settings import Settings
+import report_generator_v2
+
+SHC_DATA = {
+    'dates': ['01/10', '02/10', '03/10'],
+    'units': {
+        'Tổ Kỹ thuật Địa bàn Phúc Thọ': [3, 5, 4],
+        'Tổ Kỹ thuật Địa bàn Sơn Tây': [2, 1, 6],
+    },
+}
+
+
+def _draw():
+    before = chart_cache.chart_cache_stats()
+    png = report_generator_v2.create_shc_overview_chart(SHC_DATA).getvalue()
+    after = chart_cache.chart_cache_stats()
+    return png, after['hits'] - before['hits'], after['misses'] - before['misses']
+
+
+def test_doi_mapping_to_thi_ve_lai():
+    old_dir, old_enabled = Settings.CHART_CACHE_DIR, Settings.CHART_CACHE_ENABLED
+    old_names = dict(report_generator_v2.TEAM_SHORT_NAMES)
+    with tempfile.TemporaryDirectory(prefix="chart_cache_test_") as cache_dir:
+        Settings.CHART_CACHE_DIR, Settings.CHART_CACHE_ENABLED = cache_dir, True
+        try:
+            png_goc, _, misses = _draw()
+            assert misses == 1
+            png, hits, misses = _draw()
+            assert (hits, misses) == (1, 0) and png == png_goc
+
+            # Đổi tên hiển thị 1 tổ như khi sửa team_config.py
+            report_generator_v2.TEAM_SHORT_NAMES['Tổ Kỹ thuật Địa bàn Phúc Thọ'] = 'Phúc Thọ mới'
+            png_moi, hits, misses = _draw()
+            assert (hits, misses) == (0, 1), "mapping đổi nhưng vẫn lấy PNG cũ"
+            assert png_moi != png_goc
+
+            # Thêm tổ mới vào mapping cũng phải vẽ lại
+            report_generator_v2.TEAM_SHORT_NAMES['Tổ Kỹ thuật Địa bàn Ba Vì'] = 'Ba Vì'
+            _, hits, misses = _draw()
+            assert (hits, misses) == (0, 1)
+
+            # Trả mapping về như cũ thì dùng lại PNG ban đầu
+            report_generator_v2.TEAM_SHORT_NAMES.clear()
+            report_generator_v2.TEAM_SHORT_NAMES.update(old_names)
+            png, hits, misses = _draw()
+            assert (hits, misses) == (1, 0) and png == png_goc
+        finally:
+            report_generator_v2.TEAM_SHORT_NAMES.clear()
+            report_generator_v2.TEAM_SHORT_NAMES.update(old_names)
+            Settings.CHART_CACHE_DIR, Settings.CHART_CACHE_ENABLED = old_dir, old_enabled
+
+
+if __name__ == "__main__":
+    test_doi_mapping_to_thi_ve_lai()
+    print("✅ Đổi mapping tổ thì biểu đồ được vẽ lại")